@@ -1,7 +1,7 @@
 /**
  * Auto-generated API client for PDF-TEI Editor API v1
  *
- * Generated from OpenAPI schema at 2026-06-25T10:30:30.924Z
+ * Generated from OpenAPI schema at 2026-10-16T22:47:19.080Z
  *
  * DO NOT EDIT MANUALLY - regenerate using: npm run generate-client
  */
@@ -287,6 +287,10 @@
 /**
  * @typedef {Object} FileListResponseModel
  * @property {Array<DocumentGroupModel>} files
+ * @property {number=} version
+ * @property {boolean=} delta
+ * @property {Array<string>=} removed
+ * @property {Array<string>=} locked
  */
 
 /**
@@ -347,6 +351,18 @@
  * @property {Array<ValidationError>=} detail
  */
 
+/**
+ * @typedef {Object} HeartbeatBatchRequest
+ * @property {Array<string>} stable_ids
+ */
+
+/**
+ * @typedef {Object} HeartbeatBatchResponse
+ * @property {Array<string>} renewed
+ * @property {Array<string>} lost
+ * @property {Array<string>} not_found
+ */
+
 /**
  * @typedef {Object} HeartbeatRequest
  * @property {string} file_id
@@ -589,11 +605,16 @@
 /**
  * @typedef {Object} ValidateRequest
  * @property {string} xml_string - XML document to validate
+ * @property {string=} file_id - Identifier of the edited document. Enables caching of the validation result for incremental validation of subsequent versions.
+ * @property {string=} base_hash - content_hash of the previously validated version of the document. If it matches the cached version, only the changed subtree is revalidated.
+ * @property {string=} xpath - Optional XPath of the element containing the edit (tei: prefix available). Revalidated as a whole if it contains the detected change.
  */
 
 /**
  * @typedef {Object} ValidateResponse
  * @property {Array<ValidationErrorModel>=} errors - List of validation errors/warnings. Empty if validation passed.
+ * @property {string=} content_hash - Hash of the validated content (only with file_id); send as base_hash with the next version
+ * @property {boolean=} incremental - True if only the changed subtree was revalidated
  */
 
 /**
@@ -611,6 +632,22 @@
  * @property {string=} severity - Error severity (e.g., 'warning' for timeout messages)
  */
 
+/**
+ * @typedef {Object} ValidatorPoolStatsResponse
+ * @property {number} size - Maximum number of worker processes
+ * @property {number} workers - Number of running (or starting) worker processes
+ * @property {number} idle_workers - Number of idle worker processes
+ * @property {number} busy_workers - Number of worker processes currently validating
+ * @property {number} requests - Number of validation requests handled
+ * @property {number} schema_compiles - Number of schema compilations in workers
+ * @property {number} schema_cache_hits - Number of validations using an already compiled schema
+ * @property {number} timeouts - Number of validations that timed out (worker killed)
+ * @property {number} crashes - Number of workers that died during validation
+ * @property {number} workers_started - Number of worker processes started, including replacements
+ * @property {number} wait_seconds - Total time spent waiting for a free worker
+ * @property {number} validation_seconds - Total time spent validating in workers
+ */
+
 /**
  * @typedef {Object} fastapi_app__lib__models__models_extraction__ExtractRequest
  * @property {string} extractor - ID of the extractor to use
@@ -1220,7 +1257,12 @@ export class ApiClientV1 {
    * Validate XML document against embedded schema references.
    * Supports both XSD (xsi:schemaLocation) and RelaxNG (xml-model) schemas.
    * Automatically downloads and caches schemas on first use.
-   * Uses subprocess isolation for timeout protection on complex schemas.
+   * Validation runs in a pool of worker processes that keep compiled schemas
+   * cached; stuck workers are killed when the schema's timeout is exceeded.
+   * If file_id is given, the result is cached per session and document. A
+   * subsequent request with base_hash set to the returned content_hash only
+   * revalidates the subtree that changed, falling back to full validation
+   * where the RelaxNG grammar does not allow this.
    * Returns:
    * List of validation errors. Empty list if validation passed.
    *
@@ -1232,6 +1274,18 @@ export class ApiClientV1 {
     return this.callApi(endpoint, 'POST', requestBody);
   }
 
+  /**
+   * Get metrics of the schema validator worker pool (admin only).
+   * Returns:
+   * Worker counts and cumulative request, compile, timeout and timing counters.
+   *
+   * @returns {Promise<ValidatorPoolStatsResponse>}
+   */
+  async validatePoolStats() {
+    const endpoint = `/validate/pool-stats`
+    return this.callApi(endpoint);
+  }
+
   /**
    * Generate CodeMirror autocomplete data from the schema associated with an XML document.
    * Only supports RelaxNG schemas. The schema is extracted from the XML document's
@@ -1292,10 +1346,18 @@ export class ApiClientV1 {
    * - Lock information for each file
    * - Access control filtering applied
    * - Stable IDs throughout
+   * The response carries the list `version` and an ETag, which also covers
+   * the user's collections, roles and document permissions. Requests with a
+   * matching If-None-Match header receive 304 Not Modified. With `since`
+   * set to a previously received version, only documents changed since then
+   * are returned in `files` (`delta` = true), doc_ids that disappeared are
+   * listed in `removed`, and `locked` holds all locked artifact ids. If the
+   * version is too old, a full list is returned (`delta` = false).
    * Note: 'refresh' parameter ignored - database is always current.
    * Args:
    * variant: Optional variant filter (e.g., "grobid")
    * refresh: Deprecated parameter (ignored)
+   * since: Optional list version for delta responses
    * repo: File repository (injected)
    * session_id: Current session ID (injected)
    * current_user: Current user dict (injected)
@@ -1305,6 +1367,7 @@ export class ApiClientV1 {
    * @param {Object=} params - Query parameters
    * @param {(string | null)=} params.variant
    * @param {boolean=} params.refresh
+   * @param {(number | null)=} params.since
    * @returns {Promise<FileListResponseModel>}
    */
   async filesList(params) {
@@ -1572,6 +1635,29 @@ export class ApiClientV1 {
     return this.callApi(endpoint, 'POST', requestBody);
   }
 
+  /**
+   * Refresh the locks of many files (keep-alive for all open editors).
+   * Replaces one heartbeat request per file: the files are looked up with one
+   * query and all locks are refreshed in one transaction. Only locks held by
+   * the session are refreshed; a lock that was released, expired or taken
+   * over by another session is reported as lost and not acquired again.
+   * Lock changes of other sessions are pushed as lockChanged SSE events, see
+   * lib/sse/lock_events.py.
+   * Args:
+   * request: HeartbeatBatchRequest with stable_ids
+   * repo: File repository (injected)
+   * session_id: Current session ID (injected)
+   * Returns:
+   * HeartbeatBatchResponse listing the refreshed, lost and unknown files
+   *
+   * @param {HeartbeatBatchRequest} requestBody
+   * @returns {Promise<HeartbeatBatchResponse>}
+   */
+  async filesHeartbeatBatch(requestBody) {
+    const endpoint = `/files/heartbeat/batch`
+    return this.callApi(endpoint, 'POST', requestBody);
+  }
+
   /**
    * Export files as a downloadable zip archive or return export statistics.
    * Two-step export process:
@@ -1591,9 +1677,12 @@ export class ApiClientV1 {
    * db: Database manager (injected)
    * repo: File repository (injected)
    * storage: File storage (injected)
+   * session_id: Session ID for progress events (injected)
+   * sse_service: SSE service (injected)
    * current_user: Current user dict (injected)
    * Returns:
-   * FileResponse with zip archive (download=true) or JSONResponse with stats
+   * StreamingResponse with the zip archive, or FileResponse if the same
+   * export is cached (download=true); JSONResponse with stats otherwise
    *
    * @param {Object=} params - Query parameters
    * @param {(string | null)=} params.collections
@@ -1744,10 +1833,13 @@ export class ApiClientV1 {
    * ```
    * Example event types:
    * - connected: Initial connection confirmation
+   * - ping: Keep-alive after SSE_KEEPALIVE_INTERVAL seconds without events
    * - syncProgress: Progress percentage (0-100)
    * - syncMessage: Status message
    * - syncComplete: Sync finished successfully
    * - syncError: Sync error occurred
+   * The stream is an async generator, so open connections don't occupy
+   * threadpool threads. Returns 503 if SSE_MAX_STREAMS streams are open.
    * Returns:
    * StreamingResponse with text/event-stream content type
    *
@@ -1851,6 +1943,19 @@ export class ApiClientV1 {
     return this.callApi(endpoint, 'POST');
   }
 
+  /**
+   * Get metrics of the SQLite connection pools of this worker process.
+   * Per database: profile, open/idle/in-use connections, hits (reused
+   * connection), misses (new connection), waits and total wait time for a
+   * free connection, and overflow connections opened beyond the limit.
+   *
+   * @returns {Promise<any>}
+   */
+  async maintenanceDbPoolStats() {
+    const endpoint = `/maintenance/db-pool-stats`
+    return this.callApi(endpoint);
+  }
+
   /**
    * List available plugins filtered by user roles and optional category.
    * Args:
@@ -1889,26 +1994,55 @@ export class ApiClientV1 {
     return this.callApi(endpoint, 'POST', requestBody);
   }
 
+  /**
+   * Serve file content by content hash, cacheable forever.
+   * Args:
+   * file_hash: Full content hash (64 hex chars)
+   * request: Request (for conditional and Range requests)
+   * repo: File repository (injected)
+   * storage: File storage (injected)
+   * current_user: Current user dict (injected)
+   * Returns:
+   * FileResponse with file content, 206 for Range requests, or 304 if
+   * the client has the content already
+   * Raises:
+   * HTTPException: 404 if file not found, 403 if access denied
+   *
+   * @param {string} file_hash
+   * @returns {Promise<any>}
+   */
+  async filesContent(file_hash) {
+    const endpoint = `/files/content/${file_hash}`
+    return this.callApi(endpoint);
+  }
+
   /**
    * Serve file content by document identifier (stable_id or full hash).
-   * Returns the actual file content with appropriate MIME type.
-   * Access control is enforced.
+   * Returns the actual file content with appropriate MIME type, or with
+   * redirect=true a redirect to /files/content/{hash}. Access control is
+   * enforced. The content is not cached, since the file a stable_id points
+   * to changes when it is saved.
    * Args:
    * document_id: stable_id or full hash (64 chars)
+   * request: Request (for conditional and Range requests)
+   * redirect: Redirect to the immutable content URL instead of serving the content
    * repo: File repository (injected)
    * storage: File storage (injected)
    * current_user: Current user dict (injected)
    * Returns:
-   * FileResponse with file content
+   * FileResponse with file content, 307 redirect, or 304 if the client
+   * has the current content already
    * Raises:
    * HTTPException: 404 if file not found, 403 if access denied
    *
    * @param {string} document_id
+   * @param {Object=} params - Query parameters
+   * @param {boolean=} params.redirect
    * @returns {Promise<any>}
    */
-  async files(document_id) {
+  async files(document_id, params) {
     const endpoint = `/files/${document_id}`
-    return this.callApi(endpoint);
+    return this.callApi(endpoint, 'GET', params);
   }
 
 }
@@ -341,6 +341,20 @@ async function validateXml(xmlString) {
   return response.errors || [];
 }
 
+/**
+ * Validates a TEI XML string, allowing the server to revalidate only the subtree
+ * that changed since the version identified by `baseHash`.
+ *
+ * @param {string} xmlString - The TEI XML string to validate.
+ * @param {string} fileId - Id of the edited document
+ * @param {string|null} [baseHash] - `contentHash` returned for the previously validated version
+ * @returns {Promise<{errors: ValidationError[], contentHash: string|null}>}
+ */
+async function validateXmlIncremental(xmlString, fileId, baseHash = null) {
+  const response = await apiClient.validate({ xml_string: xmlString, file_id: fileId, base_hash: baseHash });
+  return { errors: response.errors || [], contentHash: response.content_hash || null };
+}
+
 /**
  * Gets autocomplete data for the XML schema associated with the given XML string.
  *
@@ -533,8 +547,15 @@ async function setConfigValue(key, value) {
   return await apiClient.configSet({ key, value });
 }
 
+/**
+ * Stable IDs of the files this client holds a lock on, refreshed by {@link sendHeartbeats}
+ * @type {Set<string>}
+ */
+const heldLocks = new Set();
+
 /**
  * Sends a heartbeat to the server to keep the file lock alive.
+ * @deprecated Use {@link sendHeartbeats}, which refreshes all held locks with one request
  * @param {string} fileId The file ID to send the heartbeat for
  * @returns {Promise<{status:string, cache_status:{dirty:boolean, last_modified:number|null, last_checked:number|null}}>} The response from the server
  * @throws {Error} If the file ID is not provided or if the heartbeat fails
@@ -546,6 +567,28 @@ async function sendHeartbeat(fileId) {
   return await apiClient.filesHeartbeat({ file_id: fileId });
 }
 
+/**
+ * Refreshes all locks held by this client with a single request.
+ * Locks reported as lost or not found are no longer considered held.
+ * @returns {Promise<{renewed:string[], lost:string[], not_found:string[]}>} The response from the server
+ * @throws {Error} If the heartbeat fails
+ */
+async function sendHeartbeats() {
+  const response = await apiClient.filesHeartbeatBatch({ stable_ids: [...heldLocks] });
+  for (const fileId of [...response.lost, ...response.not_found]) {
+    heldLocks.delete(fileId);
+  }
+  return response;
+}
+
+/**
+ * Returns the stable IDs of the files this client holds a lock on.
+ * @returns {string[]}
+ */
+function getHeldLocks() {
+  return [...heldLocks];
+}
+
 /**
  * Checks if a file is locked by another user.
  * @param {string} fileId The file ID to check the lock for
@@ -568,7 +611,9 @@ async function acquireLock(fileId) {
   if (!fileId) {
     throw new Error("File ID is required to acquire lock");
   }
-  return await apiClient.filesAcquireLock({ file_id: fileId });
+  const result = await apiClient.filesAcquireLock({ file_id: fileId });
+  heldLocks.add(fileId);
+  return result;
 }
 
 /**
@@ -580,6 +625,7 @@ async function releaseLock(fileId) {
   if (!fileId) {
     throw new Error("File ID is required to release lock");
   }
+  heldLocks.delete(fileId);
   return await apiClient.filesReleaseLock({ file_id: fileId });
 }
 
@@ -758,6 +804,7 @@ const api = {
   callApi,
   getFileList,
   validateXml,
+  validateXmlIncremental,
   getAutocompleteData,
   saveXml,
   extract,
@@ -776,6 +823,8 @@ const api = {
   createCollection,
   state,
   sendHeartbeat,
+  sendHeartbeats,
+  getHeldLocks,
   checkLock,
   acquireLock,
   releaseLock,
@@ -110,7 +110,7 @@ class FiledataPlugin extends Plugin {
       const data = JSON.parse(event.data);
 
       // Only reload for metadata changes, not lock status changes
-      // Lock status is already updated through other mechanisms
+      // Lock status is updated from lockChanged events (see below)
       if (data.reason === 'lock_acquired') {
         return;
       }
@@ -145,6 +145,48 @@ class FiledataPlugin extends Plugin {
       // Reload file data when changes occur from other sessions
       this.reload({ refresh: true });
     });
+
+    // Apply lock state deltas of other sessions without reloading the file list
+    this.getDependency('sse').addEventListener('lockChanged', async (event) => {
+      const { changes } = JSON.parse(event.data);
+      await this.applyLockChanges(changes);
+    });
+  }
+
+  /**
+   * Applies lock state deltas from a lockChanged SSE event to the file data.
+   * @param {{stable_id: string, action: 'acquired'|'released'|'expired', locked_by?: string}[]} changes
+   * @returns {Promise<void>}
+   */
+  async applyLockChanges(changes) {
+    const fileData = this.state?.fileData;
+    if (!fileData || !changes?.length) {
+      return;
+    }
+
+    /** @type {Map<string, boolean>} */
+    const lockedById = new Map(changes.map(change => [change.stable_id, change.action === 'acquired']));
+
+    let changed = false;
+    const data = fileData.map((doc) => {
+      if (!doc.artifacts?.some(a => lockedById.has(a.id) && a.is_locked !== lockedById.get(a.id))) {
+        return doc;
+      }
+      changed = true;
+      return {
+        ...doc,
+        artifacts: doc.artifacts.map(a =>
+          lockedById.has(a.id) ? { ...a, is_locked: lockedById.get(a.id) } : a
+        )
+      };
+    });
+
+    if (!changed) {
+      return;
+    }
+    this.#logger.debug(`Applying ${changes.length} lock change(s) to file data`);
+    createIdLookupIndex(data);
+    await this.dispatchStateChange({ fileData: data });
   }
 
   async start() {
@@ -1,5 +1,6 @@
 /**
- * Heartbeat plugin for file locking and offline detection
+ * Heartbeat plugin for file locking and offline detection.
+ * Refreshes all locks held by this client with one batch request per interval.
  * @import { PluginContext } from '../modules/plugin-context.js'
  */
 
@@ -57,11 +58,15 @@ class HeartbeatPlugin extends Plugin {
         return
       }
 
-      const filePath = this.state.xml || ''
+      const client = this.getDependency('client')
+      const authentication = this.getDependency('authentication')
+
+      // One request refreshes all locks held by this client
+      const heldLocks = client.getHeldLocks()
       const reasonsToSkip = {
         'Maintenance mode is active': this.state.maintenanceMode,
         'No user is logged in': this.state.user === null,
-        'No file path specified': !filePath
+        'No locks held': heldLocks.length === 0 && !this.#isConnectionLost
       }
 
       for (const reason in reasonsToSkip) {
@@ -71,23 +76,40 @@ class HeartbeatPlugin extends Plugin {
         }
       }
 
-      const client = this.getDependency('client')
-      const dialog = this.getDependency('dialog')
-      const authentication = this.getDependency('authentication')
-
       try {
-        if (this.state.editorReadOnly && !this.#isConnectionLost) {
-          logger.debug(`Read-only mode: skipping heartbeat for ${filePath}`)
-          return
+        logger.debug(`Sending heartbeat to server${this.#isConnectionLost ? ' (connectivity probe)' : ''} for ${heldLocks.length} lock(s)`)
+        const { lost, not_found } = await client.sendHeartbeats()
+
+        if (not_found.length > 0) {
+          logger.debug(`Heartbeat files not found (${not_found.join(', ')}), skipping. Files may have been deleted.`)
         }
-        logger.debug(`Sending heartbeat to server${this.#isConnectionLost ? ' (connectivity probe)' : ''} for ${filePath}`)
-        await client.sendHeartbeat(filePath)
+
+        const filePath = this.state.xml
+        const currentLockLost = Boolean(filePath) && lost.includes(filePath)
 
         if (this.#isConnectionLost) {
           this.#isConnectionLost = false
-          logger.info('Connection restored.')
+          if (currentLockLost && await this.#reacquireLock(filePath)) {
+            logger.info('Connection restored (lock expired during outage and was acquired again).')
+          } else {
+            logger.info('Connection restored.')
+          }
           notify('Connection restored.')
           await this.dispatchStateChange({ connectionLost: false, editorReadOnly: this.#editorReadOnlyState })
+          if (!currentLockLost || client.getHeldLocks().includes(filePath)) {
+            return
+          }
+        }
+
+        if (currentLockLost) {
+          const currentReadOnlyState = this.state?.editorReadOnly || false
+          if (!currentReadOnlyState) {
+            logger.critical('Lock lost for file: ' + filePath)
+            this.getDependency('dialog').error('Your file lock has expired or was taken by another user. To prevent data loss, please save your work to a new file. Further saving to the original file is disabled.')
+            await this.dispatchStateChange({ editorReadOnly: true })
+          } else {
+            logger.debug(`Heartbeat reported lost lock for read-only file ${filePath} (expected, not showing error)`)
+          }
         }
       } catch (error) {
         console.warn('Error during heartbeat:', error.name, String(error), error.statusCode)
@@ -103,25 +125,6 @@ class HeartbeatPlugin extends Plugin {
           this.#isConnectionLost = true
           this.#editorReadOnlyState = this.state.editorReadOnly
           await this.dispatchStateChange({ connectionLost: true, editorReadOnly: true })
-        } else if (error.statusCode === 409 || error.statusCode === 423) {
-          if (this.#isConnectionLost) {
-            this.#isConnectionLost = false
-            logger.info('Connection restored (lock expired during outage).')
-            notify('Connection restored.')
-            await this.dispatchStateChange({ connectionLost: false, editorReadOnly: this.#editorReadOnlyState })
-            return
-          }
-          const currentReadOnlyState = this.state?.editorReadOnly || false
-          if (!currentReadOnlyState) {
-            logger.critical('Lock lost for file: ' + filePath)
-            dialog.error('Your file lock has expired or was taken by another user. To prevent data loss, please save your work to a new file. Further saving to the original file is disabled.')
-            await this.dispatchStateChange({ editorReadOnly: true })
-          } else {
-            logger.debug(`Heartbeat received lock conflict for read-only file ${filePath} (expected, not showing error)`)
-          }
-        } else if (error.statusCode === 404) {
-          logger.debug(`Heartbeat file not found (${filePath}), skipping. File may have been deleted.`)
-          return
         } else if (error.statusCode === 504) {
           logger.warn('Temporary connection failure, will try again...')
         } else if (error.statusCode === 403) {
@@ -147,9 +150,24 @@ class HeartbeatPlugin extends Plugin {
       logger.debug('Heartbeat stopped.')
     }
 
-    const filePath = this.state.xml
-    if (filePath) {
-      this.getDependency('client').releaseLock(filePath).catch(() => {})
+    const client = this.getDependency('client')
+    for (const fileId of client.getHeldLocks()) {
+      client.releaseLock(fileId).catch(() => {})
+    }
+  }
+
+  /**
+   * Tries to acquire a lock again that expired while the connection was lost.
+   * @param {string} fileId
+   * @returns {Promise<boolean>} Whether the lock was acquired
+   */
+  async #reacquireLock(fileId) {
+    try {
+      await this.getDependency('client').acquireLock(fileId)
+      return true
+    } catch (error) {
+      this.getDependency('logger').debug(`Could not acquire lock for ${fileId} again: ${error}`)
+      return false
     }
   }
 }
@@ -146,8 +146,9 @@ class ServicesPlugin extends Plugin {
       if (pdf) {
         await this.dispatchStateChange({ pdf: null, xml: null, diff: null })
         this.#logger.info("Loading PDF: " + pdf)
-        // Convert document identifier to static file URL
-        const pdfUrl = `/api/files/${pdf}` // TODO unhardcode this!
+        // Convert document identifier to static file URL; the redirect resolves it to the
+        // immutable content URL of the current version, which the browser can cache
+        const pdfUrl = `/api/files/${pdf}?redirect=true` // TODO unhardcode this!
         promises.push(this.#pdfViewer.load(pdfUrl))
       }
 
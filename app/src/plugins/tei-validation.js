@@ -33,6 +33,9 @@ class TeiValidationPlugin extends Plugin {
   /** @type {Diagnostic[]} */
   #lastDiagnostics = [];
   #modeCache;
+  // Content hash of the last validated version, for incremental validation
+  /** @type {{fileId: string, hash: string}|null} */
+  #lastValidated = null;
 
   /** @param {ApplicationState} state */
   async install(state) {
@@ -184,7 +187,15 @@ class TeiValidationPlugin extends Plugin {
         this.#logger.debug(`Requesting validation for document version ${this.#validatedVersion}...`);
         this.context.invokePluginEndpoint(ep.validation.inProgress, [this.#validationPromise]);
         try {
-          validationErrors = await this.#client.validateXml(xml);
+          const fileId = this.state?.xml;
+          if (fileId) {
+            const baseHash = this.#lastValidated?.fileId === fileId ? this.#lastValidated.hash : null;
+            const result = await this.#client.validateXmlIncremental(xml, fileId, baseHash);
+            validationErrors = result.errors;
+            this.#lastValidated = result.contentHash ? { fileId, hash: result.contentHash } : null;
+          } else {
+            validationErrors = await this.#client.validateXml(xml);
+          }
         } catch (error) {
           this.#logger.warn(`Validation request failed: ${error.message}`);
           return resolve([]);
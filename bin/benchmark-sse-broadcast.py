@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark SSE broadcast latency across worker processes.
+
+Starts worker processes that each hold the SSE queues of a share of the
+clients, like uvicorn workers with --workers N. A publisher process broadcasts
+messages to all clients through the socket broker; every client has a thread
+waiting on its queue that records the time from sending to receiving.
+
+Usage:
+    python bin/benchmark-sse-broadcast.py
+    python bin/benchmark-sse-broadcast.py --workers 4 --clients 500 --rounds 50
+    python bin/benchmark-sse-broadcast.py --per-client   # one send_message() per client
+"""
+
+import argparse
+import json
+import multiprocessing
+import queue
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi_app.lib.sse.sse_broker import SocketSSEBroker
+from fastapi_app.lib.sse.sse_service import SSEService
+
+
+def run_worker(index: int, socket_dir: str, client_ids: list, rounds: int, ready, results) -> None:
+    """Worker process: hold the client queues and record receive latencies."""
+    service = SSEService(broker=SocketSSEBroker(Path(socket_dir), name=f"worker{index}"))
+    latencies: list[tuple[int, float]] = []
+    lock = threading.Lock()
+
+    def consume(client_id: str) -> None:
+        msg_queue = service.create_queue(client_id)
+        for _ in range(rounds):
+            try:
+                message = msg_queue.get(timeout=5)
+            except queue.Empty:
+                # Dropped messages never arrive
+                break
+            received = time.time()
+            payload = json.loads(message['data'])
+            with lock:
+                latencies.append((payload['round'], received - payload['sent']))
+
+    threads = [threading.Thread(target=consume, args=(client_id,)) for client_id in client_ids]
+    for thread in threads:
+        thread.start()
+    # Queues are created by the threads, wait until all exist
+    while len(service.get_active_clients()) < len(client_ids):
+        time.sleep(0.01)
+    ready.put(index)
+
+    for thread in threads:
+        thread.join()
+    results.put((latencies, service.get_stats()['broker']))
+    service.close()
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Return the value below which the given fraction of values lies."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SSE broadcast latency across worker processes')
+    parser.add_argument('--workers', type=int, default=4, help='Number of worker processes (default: 4)')
+    parser.add_argument('--clients', type=int, default=500, help='Number of SSE clients (default: 500)')
+    parser.add_argument('--rounds', type=int, default=50, help='Number of broadcasts (default: 50)')
+    parser.add_argument('--interval', type=float, default=0.02,
+                        help='Seconds between broadcasts (default: 0.02)')
+    parser.add_argument('--per-client', action='store_true',
+                        help='Send one message per client instead of one broadcast')
+    args = parser.parse_args()
+
+    socket_dir = Path(tempfile.mkdtemp(prefix="sse-bench-"))
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Queue()
+    results = ctx.Queue()
+
+    client_ids = [f"session-{i:05d}" for i in range(args.clients)]
+    processes = [
+        ctx.Process(
+            target=run_worker,
+            args=(i, str(socket_dir), client_ids[i::args.workers], args.rounds, ready, results)
+        )
+        for i in range(args.workers)
+    ]
+
+    try:
+        for process in processes:
+            process.start()
+        for _ in processes:
+            ready.get(timeout=60)
+
+        publisher = SSEService(broker=SocketSSEBroker(socket_dir, name="publisher"))
+        send_times = []
+        for round_number in range(args.rounds):
+            data = json.dumps({'round': round_number, 'sent': time.time()})
+            start = time.perf_counter()
+            if args.per_client:
+                for client_id in client_ids:
+                    publisher.send_message(client_id, 'bench', data)
+            else:
+                publisher.send_messages(client_ids, 'bench', data)
+            send_times.append(time.perf_counter() - start)
+            time.sleep(args.interval)
+
+        latencies = []
+        completion: dict[int, float] = {}
+        dropped = 0
+        for _ in processes:
+            worker_latencies, broker_stats = results.get(timeout=60)
+            dropped += broker_stats['dropped']
+            for round_number, latency in worker_latencies:
+                latencies.append(latency)
+                completion[round_number] = max(completion.get(round_number, 0.0), latency)
+        dropped += publisher.get_stats()['broker']['dropped']
+        publisher.close()
+    finally:
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        shutil.rmtree(socket_dir, ignore_errors=True)
+
+    mode = "one send_message() per client" if args.per_client else "send_messages() broadcast"
+    print("\n" + "=" * 60)
+    print(f"SSE broadcast: {args.workers} workers, {args.clients} clients, {args.rounds} rounds ({mode})")
+    print("=" * 60)
+    print(f"  Messages received:      {len(latencies)} of {args.clients * args.rounds}")
+    print(f"  Dropped:                {dropped}")
+    print(f"  Publish call (median):  {statistics.median(send_times) * 1000:.2f} ms")
+    print(f"  Client latency p50:     {percentile(latencies, 0.5) * 1000:.2f} ms")
+    print(f"  Client latency p95:     {percentile(latencies, 0.95) * 1000:.2f} ms")
+    print(f"  Client latency p99:     {percentile(latencies, 0.99) * 1000:.2f} ms")
+    print(f"  All clients reached p50: {statistics.median(completion.values()) * 1000:.2f} ms")
+    print(f"  All clients reached max: {max(completion.values()) * 1000:.2f} ms")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Benchmark size and read latency of the storage encodings of XML files.
+
+Stores the same set of documents, each with a number of versions, once per
+encoding (plain, compressed, delta) and reports the size on disk, the time
+to save, and the latency of read_file() and of the first get_file_path()
+call, which decodes encoded files into the cache directory.
+
+Versions are derived from the first version of each document by changing
+a few lines, like edits in the editor. The first versions are synthetic TEI
+documents, or the TEI files in a directory (--source).
+
+Usage:
+    python bin/benchmark-storage.py
+    python bin/benchmark-storage.py --docs 50 --versions 20 --edits 5
+    python bin/benchmark-storage.py --source data/export/tei
+"""
+
+import argparse
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi_app.lib.core.database import DatabaseManager
+from fastapi_app.lib.storage.file_storage import XML_ENCODINGS, FileStorage
+
+
+def synthetic_tei(index: int, references: int, rng: random.Random) -> bytes:
+    """Create a TEI document with a header and a list of references."""
+    words = ["analysis", "law", "history", "society", "method", "theory", "court", "state", "data", "market"]
+    bibls = []
+    for ref in range(references):
+        title = " ".join(rng.choice(words) for _ in range(6)).capitalize()
+        bibls.append(
+            f'        <biblStruct xml:id="b{ref}">\n'
+            f'          <analytic><title level="a">{title}</title>'
+            f'<author><persName><forename>A.</forename><surname>Author{rng.randint(1, 500)}</surname></persName></author></analytic>\n'
+            f'          <monogr><title level="j">Journal {rng.randint(1, 50)}</title>'
+            f'<imprint><date when="{rng.randint(1950, 2024)}"/><biblScope unit="page">{rng.randint(1, 400)}</biblScope></imprint></monogr>\n'
+            f'        </biblStruct>\n'
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<TEI xmlns="http://www.tei-c.org/ns/1.0">\n'
+        '  <teiHeader>\n'
+        f'    <fileDesc><titleStmt><title>Document {index}</title></titleStmt></fileDesc>\n'
+        '  </teiHeader>\n'
+        '  <text><back><div type="references"><listBibl>\n'
+        + "".join(bibls) +
+        '  </listBibl></div></back></text>\n'
+        '</TEI>\n'
+    ).encode('utf-8')
+
+
+def edit(content: bytes, edits: int, rng: random.Random, version: int) -> bytes:
+    """Change, insert or delete a few lines."""
+    lines = content.splitlines(keepends=True)
+    for _ in range(edits):
+        position = rng.randrange(1, len(lines) - 1)
+        action = rng.random()
+        if action < 0.6:
+            lines[position] = lines[position].replace(b">", f' n="v{version}">'.encode(), 1)
+        elif action < 0.8:
+            lines.insert(position, f'        <note>Added in version {version}</note>\n'.encode())
+        elif len(lines) > 10:
+            del lines[position]
+    return b"".join(lines)
+
+
+def build_documents(args) -> list:
+    """Return a list of documents, each a list of version contents."""
+    rng = random.Random(args.seed)
+    if args.source:
+        first_versions = [path.read_bytes() for path in sorted(Path(args.source).rglob("*.tei.xml"))[:args.docs]]
+        if not first_versions:
+            sys.exit(f"No *.tei.xml files in {args.source}")
+    else:
+        first_versions = [synthetic_tei(i, args.references, rng) for i in range(args.docs)]
+
+    documents = []
+    for content in first_versions:
+        versions = [content]
+        for version in range(1, args.versions):
+            versions.append(edit(versions[-1], args.edits, rng, version))
+        documents.append(versions)
+    return documents
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Return the value below which the given fraction of values lies."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run(encoding: str, documents: list, rounds: int) -> dict:
+    """Store the documents with one encoding and measure size and latencies."""
+    work_dir = Path(tempfile.mkdtemp(prefix=f"storage-bench-{encoding}-"))
+    try:
+        db = DatabaseManager(work_dir / "metadata.db")
+        storage = FileStorage(work_dir / "files", db, xml_encoding=encoding, cache_dir=work_dir / "cache")
+
+        hashes = []
+        start = time.perf_counter()
+        for versions in documents:
+            base_hash = None
+            for content in versions:
+                base_hash, _ = storage.save_file(content, 'tei', base_hash=base_hash)
+                hashes.append(base_hash)
+        save_time = time.perf_counter() - start
+
+        read_times = []
+        for _ in range(rounds):
+            for file_hash in random.sample(hashes, len(hashes)):
+                start = time.perf_counter()
+                storage.read_file(file_hash, 'tei')
+                read_times.append(time.perf_counter() - start)
+
+        path_times = []
+        for file_hash in hashes:
+            start = time.perf_counter()
+            storage.get_file_path(file_hash, 'tei')
+            path_times.append(time.perf_counter() - start)
+
+        return {
+            'size': storage.get_storage_stats()['total_size'],
+            'save': save_time / len(hashes),
+            'read_p50': percentile(read_times, 0.5),
+            'read_p95': percentile(read_times, 0.95),
+            'read_mean': statistics.mean(read_times),
+            'path_first': statistics.mean(path_times),
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark size and read latency of XML storage encodings')
+    parser.add_argument('--docs', type=int, default=20, help='Number of documents (default: 20)')
+    parser.add_argument('--versions', type=int, default=10, help='Versions per document (default: 10)')
+    parser.add_argument('--edits', type=int, default=3, help='Changed lines per version (default: 3)')
+    parser.add_argument('--references', type=int, default=150,
+                        help='References per synthetic document (default: 150)')
+    parser.add_argument('--source', help='Directory with TEI files to use as first versions')
+    parser.add_argument('--rounds', type=int, default=5, help='Read rounds over all files (default: 5)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+    args = parser.parse_args()
+
+    documents = build_documents(args)
+    file_count = sum(len(versions) for versions in documents)
+    content_size = sum(len(content) for versions in documents for content in versions)
+
+    results = {encoding: run(encoding, documents, args.rounds) for encoding in XML_ENCODINGS}
+
+    print("\n" + "=" * 78)
+    print(f"Storage encodings: {len(documents)} documents x {args.versions} versions "
+          f"= {file_count} files, {content_size / 1024:.0f} KiB content")
+    print("=" * 78)
+    print(f"  {'encoding':<12}{'size KiB':>10}{'ratio':>8}{'save ms':>10}"
+          f"{'read p50':>10}{'read p95':>10}{'path 1st':>10}")
+    plain_size = results['plain']['size']
+    for encoding, result in results.items():
+        print(
+            f"  {encoding:<12}{result['size'] / 1024:>10.0f}{result['size'] / plain_size:>8.1%}"
+            f"{result['save'] * 1000:>10.2f}{result['read_p50'] * 1000:>10.3f}"
+            f"{result['read_p95'] * 1000:>10.3f}{result['path_first'] * 1000:>10.3f}"
+        )
+    print("=" * 78)
+    print("  Latencies in ms per file; 'path 1st' is the first get_file_path() call.")
+
+
+if __name__ == '__main__':
+    main()
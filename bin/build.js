@@ -18,6 +18,7 @@
  *   - pdfjs: Copy PDF.js files for production
  *   - highlight: Bundle highlight.js for syntax highlighting
  *   - bundle: Bundle application with Rollup
+ *   - compress: Write precompressed .br/.gz variants of the static assets
  */
 
 import { execSync } from 'child_process';
@@ -39,7 +40,7 @@ function runCommand(command, description) {
 
 // Parse command line arguments
 const args = process.argv.slice(2);
-let stepsToRun = new Set(['plugins', 'modules', 'importmap', 'icons', 'templates', 'version', 'pdfjs', 'highlight', 'bundle']);
+let stepsToRun = new Set(['plugins', 'modules', 'importmap', 'icons', 'templates', 'version', 'pdfjs', 'highlight', 'bundle', 'compress']);
 let stepsToSkip = new Set();
 
 args.forEach(arg => {
@@ -77,11 +78,12 @@ const buildSteps = {
   bundle: () => {
     const rollupPath = path.join('node_modules', '.bin', 'rollup');
     runCommand(`"${rollupPath}" -c rollup.config.js`, 'Bundling application');
-  }
+  },
+  compress: () => runCommand('node bin/precompress-assets.js', 'Precompressing static assets')
 };
 
 // Execute selected steps in order
-const stepOrder = ['plugins', 'modules', 'importmap', 'icons', 'templates', 'version', 'pdfjs', 'highlight', 'bundle'];
+const stepOrder = ['plugins', 'modules', 'importmap', 'icons', 'templates', 'version', 'pdfjs', 'highlight', 'bundle', 'compress'];
 stepOrder.forEach(step => {
   if (stepsToRun.has(step) && buildSteps[step]) {
     buildSteps[step]();
@@ -147,6 +147,10 @@ def main():
     total_deleted = stats['zero_refs']['deleted'] + stats['orphaned']['deleted']
     total_errors = stats['zero_refs']['errors'] + stats['orphaned']['errors']
 
+    print("\nPack files:")
+    print(f"  Rewritten:   {stats['packs']['packs_rewritten']}")
+    print(f"  Bytes freed: {stats['packs']['bytes_freed']}")
+
     print(f"\nTotal deleted: {total_deleted}")
     print(f"Total errors:  {total_errors}")
 
@@ -20,7 +20,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from fastapi_app.lib.core.database import DatabaseManager
 from fastapi_app.lib.storage.file_storage import FileStorage
 from fastapi_app.lib.repository.file_repository import FileRepository
-from fastapi_app.lib.storage.file_importer import FileImporter
+from fastapi_app.lib.storage.file_importer import FileImporter, IMPORT_WORKERS
 from fastapi_app.lib.storage.file_zip_importer import FileZipImporter
 from fastapi_app.config import get_settings
 
@@ -44,6 +44,9 @@ Examples:
   # Import from arbitrary directory
   python bin/import_files.py /path/to/files --collection corpus1
 
+  # Import a large corpus with 8 worker processes
+  python bin/import_files.py /path/to/corpus --collection corpus1 --workers 8
+
   # Dry-run (preview without importing)
   python bin/import_files.py demo/data --collection example --dry-run
 
@@ -109,6 +112,11 @@ Examples:
                        help='Enable verbose logging')
     parser.add_argument('--zip', action='store_true',
                        help='Treat directory argument as a zip file to import')
+    parser.add_argument('--workers', type=int, default=IMPORT_WORKERS,
+                       help='Number of processes that read, hash and parse files. '
+                            'Values above 1 import in batched transactions. '
+                            f'Use 1 for a sequential import (default: {IMPORT_WORKERS}, '
+                            'set via IMPORT_WORKERS).')
     args = parser.parse_args()
 
     if args.verbose:
@@ -158,7 +166,7 @@ Examples:
         # Import from zip file
         logger.info(f"Importing from zip file: {directory}")
 
-        zip_importer = FileZipImporter(db, storage, repo, args.dry_run)
+        zip_importer = FileZipImporter(db, storage, repo, args.dry_run, workers=args.workers)
 
         if args.gold_pattern:
             logger.info(f"Gold standard pattern: {args.gold_pattern}")
@@ -194,7 +202,8 @@ Examples:
         skip_dirs = args.skip_dirs if args.recursive_collections else None
         importer = FileImporter(
             db, storage, repo, args.dry_run, skip_dirs,
-            args.gold_dir_name, args.gold_pattern, args.version_pattern
+            args.gold_dir_name, args.gold_pattern, args.version_pattern,
+            workers=args.workers
         )
 
         logger.info(f"Importing from directory: {directory}")
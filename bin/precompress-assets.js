@@ -0,0 +1,100 @@
+#!/usr/bin/env node
+
+/**
+ * Writes precompressed .br and .gz variants of the static assets in app/web
+ *
+ * The server sends these variants instead of the original files to clients
+ * that accept them (see fastapi_app/lib/core/compression.py), so that
+ * assets are compressed once at maximum level instead of on every request.
+ * Variants are only written if they save at least 10%; outdated variants are
+ * removed.
+ *
+ * Usage:
+ *   node bin/precompress-assets.js [directory...]   # default: app/web
+ */
+
+import fs from 'fs';
+import path from 'path';
+import zlib from 'zlib';
+import { fileURLToPath } from 'url';
+
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+const rootDir = path.join(__dirname, '..');
+
+const COMPRESSIBLE_EXTENSIONS = new Set([
+  '.js', '.mjs', '.css', '.html', '.json', '.map', '.svg', '.xml', '.txt', '.md', '.rng', '.ftl'
+]);
+
+// Files smaller than this are sent uncompressed
+const MIN_SIZE = 1024;
+
+// Variants must be smaller than this fraction of the original
+const MAX_RATIO = 0.9;
+
+/** @type {Record<string, (content: Buffer) => Buffer>} */
+const encoders = {
+  '.br': content => zlib.brotliCompressSync(content, {
+    params: {
+      [zlib.constants.BROTLI_PARAM_QUALITY]: zlib.constants.BROTLI_MAX_QUALITY,
+      [zlib.constants.BROTLI_PARAM_SIZE_HINT]: content.length
+    }
+  }),
+  '.gz': content => zlib.gzipSync(content, { level: zlib.constants.Z_BEST_COMPRESSION })
+};
+
+/**
+ * Precompress the files of a directory recursively
+ * @param {string} dir
+ * @param {{files: number, bytes: number, compressedBytes: number}} stats
+ */
+function precompressDir(dir, stats) {
+  for (const entry of fs.readdirSync(dir, { withFileTypes: true })) {
+    const filePath = path.join(dir, entry.name);
+    if (entry.isDirectory()) {
+      precompressDir(filePath, stats);
+    } else if (entry.isFile() && COMPRESSIBLE_EXTENSIONS.has(path.extname(entry.name).toLowerCase())) {
+      precompressFile(filePath, stats);
+    }
+  }
+}
+
+/**
+ * Write the variants of a file, or remove them if they are not worth it
+ * @param {string} filePath
+ * @param {{files: number, bytes: number, compressedBytes: number}} stats
+ */
+function precompressFile(filePath, stats) {
+  const content = fs.readFileSync(filePath);
+  for (const [suffix, encode] of Object.entries(encoders)) {
+    const variantPath = filePath + suffix;
+    const compressed = content.length >= MIN_SIZE ? encode(content) : null;
+    if (compressed && compressed.length < content.length * MAX_RATIO) {
+      fs.writeFileSync(variantPath, compressed);
+      if (suffix === '.br') {
+        stats.files += 1;
+        stats.bytes += content.length;
+        stats.compressedBytes += compressed.length;
+      }
+    } else if (fs.existsSync(variantPath)) {
+      fs.unlinkSync(variantPath);
+    }
+  }
+}
+
+const dirs = process.argv.slice(2);
+if (dirs.length === 0) {
+  dirs.push(path.join(rootDir, 'app', 'web'));
+}
+
+const stats = { files: 0, bytes: 0, compressedBytes: 0 };
+for (const dir of dirs) {
+  if (!fs.existsSync(dir)) {
+    console.warn(`  ⚠ Directory not found: ${dir}`);
+    continue;
+  }
+  precompressDir(dir, stats);
+}
+
+const kib = (/** @type {number} */ bytes) => `${(bytes / 1024).toFixed(0)} KiB`;
+console.log(`Precompressed ${stats.files} files: ${kib(stats.bytes)} -> ${kib(stats.compressedBytes)} (brotli)`);
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Repack files in storage
+
+Converts the TEI and RelaxNG files in data/files to another storage encoding,
+and/or moves all stored files to another storage backend. Set
+STORAGE_XML_ENCODING and STORAGE_BACKEND to the same values so that new
+files are stored the same way.
+
+Usage:
+    python bin/repack-storage.py [--encoding ENCODING] [--backend BACKEND] [--dry-run]
+
+Encodings:
+    plain        Uncompressed files (the default storage format)
+    compressed   Deflate with a preset TEI dictionary
+    delta        Compressed, and versions of a document as deltas against
+                 the previous version where that is smaller
+
+Backends:
+    files        One file per blob in hash-sharded directories (the default)
+    pack         Blobs appended to a few pack files with an index
+
+Examples:
+    # Show how many files would be repacked
+    python bin/repack-storage.py --encoding delta --dry-run
+
+    # Compress all XML files, storing versions as deltas
+    python bin/repack-storage.py --encoding delta
+
+    # Go back to plain files
+    python bin/repack-storage.py --encoding plain
+
+    # Move all files into pack files, compressing XML files
+    python bin/repack-storage.py --backend pack --encoding compressed
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi_app.config import get_settings
+from fastapi_app.lib.core.dependencies import get_db
+from fastapi_app.lib.storage.file_storage import STORAGE_BACKENDS, XML_ENCODINGS, FileStorage
+from fastapi_app.lib.storage.storage_repack import move_storage, repack_storage
+from fastapi_app.lib.utils.logging_utils import get_logger
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Convert XML files in storage to another encoding or move files to another backend',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        '--encoding',
+        choices=XML_ENCODINGS,
+        help='Target storage encoding of XML files'
+    )
+    parser.add_argument(
+        '--backend',
+        choices=STORAGE_BACKENDS,
+        help='Target storage backend of all files'
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='Only count the files that would be repacked'
+    )
+
+    args = parser.parse_args()
+    if not args.encoding and not args.backend:
+        parser.error('at least one of --encoding and --backend is required')
+
+    settings = get_settings()
+    logger = get_logger(__name__)
+    storage_root = settings.data_root / "files"
+    storage = FileStorage(
+        storage_root, get_db(), logger, xml_encoding=args.encoding, backend=args.backend
+    )
+
+    print(f"Storage root: {storage_root}")
+    if args.encoding:
+        print(f"Encoding: {args.encoding}")
+    if args.backend:
+        print(f"Backend: {args.backend}")
+    print(f"Mode: {'DRY RUN' if args.dry_run else 'LIVE'}")
+
+    def on_progress(done: int, total: int):
+        print(f"\r  {done}/{total} files", end="", flush=True)
+
+    # Re-encoded files are written to the target backend; moving takes the rest
+    if args.encoding:
+        print("\nRepacking XML files...")
+        stats = repack_storage(storage, args.encoding, dry_run=args.dry_run, progress_callback=on_progress)
+        print_results(stats)
+    if args.backend:
+        print("\nMoving files...")
+        stats = move_storage(storage, args.backend, dry_run=args.dry_run, progress_callback=on_progress)
+        print_results(stats)
+
+    if args.dry_run:
+        print("\n⚠️  DRY RUN - No files were changed")
+    else:
+        print("\n✓ Repack complete")
+
+
+def print_results(stats: dict):
+    print()
+    print("\nResults:")
+    print(f"  Files:   {stats['files']}")
+    if 'missing' in stats:
+        print(f"  Missing: {stats['missing']}")
+    print(f"  Errors:  {stats['errors']}")
+    print(f"  Size:    {stats['size_before']:,} -> {stats['size_after']:,} bytes")
+    if stats['size_before']:
+        print(f"  Ratio:   {stats['size_after'] / stats['size_before']:.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,333 @@
+"""
+HTTP response compression.
+
+- CompressionMiddleware compresses responses of compressible media types
+  (JSON, XML, HTML, JavaScript, CSS, ...) with the best encoding the client
+  accepts: zstd, br or gzip. Streaming responses are compressed chunk by
+  chunk. Responses below RESPONSE_COMPRESSION_MIN_SIZE, partial content
+  (206), server-sent events and responses that are encoded already are
+  sent as they are. Compressed responses do not advertise Accept-Ranges,
+  since ranges of the original body do not apply to the encoded one.
+- PrecompressedStaticFiles serves the .br/.gz variants of static files that
+  the build writes next to them (bin/precompress-assets.js), so that static
+  assets are not compressed again on every request.
+
+gzip uses zlib, br and zstd use the brotli and zstandard packages.
+
+Configuration:
+- RESPONSE_COMPRESSION_MIN_SIZE: minimum body size in bytes (default 1024)
+- RESPONSE_COMPRESSION_ENCODINGS: encodings in order of preference
+  (default "zstd,br,gzip"; empty disables compression)
+"""
+
+import os
+import re
+import zlib
+from mimetypes import guess_type
+from typing import Callable, Dict, Optional, Protocol, Sequence
+
+import brotli
+import zstandard
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .executors import run_in_io_pool
+
+# Minimum response body size in bytes for compression
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.environ.get("RESPONSE_COMPRESSION_MIN_SIZE", 1024))
+
+# Content encodings in order of preference
+RESPONSE_COMPRESSION_ENCODINGS = [
+    encoding.strip()
+    for encoding in os.environ.get("RESPONSE_COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",")
+    if encoding.strip()
+]
+
+# Chunks of at least this size are compressed in the I/O pool instead of on the event loop
+THREAD_MIN_SIZE = 64 * 1024
+
+# Compression levels: fast enough to compress on the fly
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+# Precompressed variants of static files, in order of preference
+PRECOMPRESSED_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+# Static files with a content hash in their name (app.3f2a9c1b.js) never change
+FINGERPRINTED_RE = re.compile(r"[.-](?=[0-9a-f]*[0-9])[0-9a-f]{8,}\.\w+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_COMPRESSIBLE_TYPES = {
+    "application/javascript",
+    "application/json",
+    "application/manifest+json",
+    "application/xml",
+    "application/xhtml+xml",
+    "application/xslt+xml",
+    "image/svg+xml",
+    "text/css",
+    "text/csv",
+    "text/html",
+    "text/javascript",
+    "text/markdown",
+    "text/plain",
+    "text/xml",
+}
+
+
+def is_compressible(content_type: str) -> bool:
+    """Check whether a media type is worth compressing."""
+    media_type = content_type.partition(";")[0].strip().lower()
+    return media_type in _COMPRESSIBLE_TYPES or media_type.endswith(("+json", "+xml"))
+
+
+class _Encoder(Protocol):
+    def compress(self, data: bytes, final: bool) -> bytes: ...
+
+
+class _GzipEncoder:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        )
+
+
+class _BrotliEncoder:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        output = self._compressor.process(data)
+        return output + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class _ZstdEncoder:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        output = self._compressor.compress(data)
+        if final:
+            return output + self._compressor.flush()
+        return output + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+
+_ENCODERS: Dict[str, Callable[[], _Encoder]] = {
+    "gzip": _GzipEncoder,
+    "br": _BrotliEncoder,
+    "zstd": _ZstdEncoder,
+}
+
+
+def available_encodings() -> list:
+    """Return the configured encodings that can be used, in order of preference."""
+    return [encoding for encoding in RESPONSE_COMPRESSION_ENCODINGS if encoding in _ENCODERS]
+
+
+def negotiate_encoding(accept_encoding: str, encodings: Sequence[str]) -> Optional[str]:
+    """
+    Select a content encoding according to an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Accept-Encoding request header
+        encodings: Encodings the server can use, in order of preference
+
+    Returns:
+        The encoding with the highest quality value (ties are resolved by the
+        server's preference), or None if the client accepts none of them
+    """
+    qualities: Dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.partition(";")
+        name = name.strip()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with zstd, br or gzip."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = RESPONSE_COMPRESSION_MIN_SIZE,
+        encodings: Optional[Sequence[str]] = None
+    ):
+        """
+        Args:
+            app: ASGI application
+            minimum_size: Minimum body size in bytes for compression
+            encodings: Encodings in order of preference (default: available_encodings())
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = [e for e in encodings if e in _ENCODERS] if encodings is not None \
+            else available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        responder = _CompressionResponder(self.app, self.minimum_size, encoding)
+        await responder(scope, receive, send)
+
+
+class _CompressionResponder:
+    """Compresses the response of one request."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int, encoding: Optional[str]):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoding = encoding
+        self.encoder: Optional[_Encoder] = None
+        self.send: Send
+        self.initial_message: Message = {}
+        self.passthrough = False
+        self.started = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            # Hold back the headers until the first body chunk shows whether to compress
+            self.initial_message = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = (
+                message["status"] in (204, 206, 304)
+                or "content-encoding" in headers
+                or not is_compressible(headers.get("content-type", ""))
+                or "no-transform" in headers.get("cache-control", "")
+            )
+            if self.passthrough:
+                await self.send(message)
+            return
+
+        if self.passthrough or message_type != "http.response.body":
+            if message_type == "http.response.pathsend" and not self.passthrough and not self.started:
+                self.started = True
+                await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            if len(body) < self.minimum_size and not more_body:
+                await self.send(self.initial_message)
+                await self.send(message)
+                self.passthrough = True
+                return
+
+            headers.add_vary_header("Accept-Encoding")
+            if self.encoding is None:
+                self.passthrough = True
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+
+            self.encoder = _ENCODERS[self.encoding]()
+            headers["Content-Encoding"] = self.encoding
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            if "accept-ranges" in headers:
+                del headers["Accept-Ranges"]
+            # The encoded representation is not byte-identical to the original
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+            message["body"] = await self._compress(body, final=not more_body)
+            if not more_body:
+                headers["Content-Length"] = str(len(message["body"]))
+            await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        message["body"] = await self._compress(body, final=not more_body)
+        await self.send(message)
+
+    async def _compress(self, body: bytes, final: bool) -> bytes:
+        encoder = self.encoder
+        if encoder is None:
+            return body
+        if len(body) >= THREAD_MIN_SIZE:
+            return await run_in_io_pool(encoder.compress, body, final)
+        return encoder.compress(body, final)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles serving precompressed .br/.gz variants of files if the client accepts them.
+
+    Variants are used only if they are at least as recent as the original.
+    Fingerprinted files are cached forever, all other files are revalidated
+    (with ETag/Last-Modified) on every use.
+    """
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        full_path = str(full_path)
+        cache_control = IMMUTABLE_CACHE_CONTROL if FINGERPRINTED_RE.search(full_path) else "no-cache"
+        content_type = guess_type(full_path)[0] or "text/plain"
+
+        if not is_compressible(content_type):
+            response = super().file_response(full_path, stat_result, scope, status_code)
+            response.headers.setdefault("cache-control", cache_control)
+            return response
+
+        # Not every file has every variant: try the accepted encodings in order of preference
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        encodings = list(PRECOMPRESSED_SUFFIXES)
+        response = None
+        while response is None:
+            encoding = negotiate_encoding(accept_encoding, encodings)
+            if encoding is None:
+                break
+            encodings.remove(encoding)
+            variant_path = full_path + PRECOMPRESSED_SUFFIXES[encoding]
+            try:
+                variant_stat = os.stat(variant_path)
+            except OSError:
+                continue
+            if variant_stat.st_mtime < stat_result.st_mtime:
+                continue
+            response = super().file_response(variant_path, variant_stat, scope, status_code)
+            if response.status_code != 304:
+                response.headers["content-encoding"] = encoding
+                response.headers["content-type"] = (
+                    f"{content_type}; charset=utf-8" if content_type.startswith("text/") else content_type
+                )
+        if response is None:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+
+        response.headers.add_vary_header("Accept-Encoding")
+        response.headers.setdefault("cache-control", cache_control)
+        return response
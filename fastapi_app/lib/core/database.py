@@ -6,7 +6,6 @@ Uses context managers for proper resource cleanup.
 """
 
 import sqlite3
-import queue
 from contextlib import contextmanager
 from pathlib import Path
 from typing import Optional, Generator
@@ -33,7 +32,7 @@ class DatabaseManager:
         self.db_path = db_path
         self.logger = logger
         self._ensure_db_exists()
-        self._pool = queue.Queue()
+        self._pool = sqlite_utils.ConnectionPool(db_path)
 
     def _ensure_db_exists(self) -> None:
         """
@@ -69,8 +68,9 @@ class DatabaseManager:
         """
         Context manager for database connections.
 
-        Yields a connection with row_factory set to sqlite3.Row
-        for dict-like access to query results.
+        Yields a pooled connection with row_factory set to sqlite3.Row
+        for dict-like access to query results. Uncommitted changes are
+        rolled back when the connection is returned to the pool.
 
         Usage:
             with db_manager.get_connection() as conn:
@@ -80,22 +80,17 @@ class DatabaseManager:
         Yields:
             sqlite3.Connection: Database connection
         """
-        try:
-            conn = self._pool.get(block=False)
-        except queue.Empty:
-            conn = sqlite3.connect(str(self.db_path), timeout=60.0, check_same_thread=False, isolation_level=None)
-            conn.row_factory = sqlite3.Row
-            conn.execute("PRAGMA foreign_keys = ON")
-
-        try:
+        with self._pool.connection() as conn:
             yield conn
-        finally:
-            # Rollback any uncommitted changes to ensure clean state for next use
-            try:
-                conn.rollback()
-            except sqlite3.OperationalError:
-                pass
-            self._pool.put(conn)
+
+    def get_pool_stats(self) -> dict:
+        """
+        Get connection pool metrics (hits, misses, waits, open connections).
+
+        Returns:
+            Dict as returned by ConnectionPool.get_stats()
+        """
+        return self._pool.get_stats()
 
     @contextmanager
     def transaction(self) -> Generator[sqlite3.Connection, None, None]:
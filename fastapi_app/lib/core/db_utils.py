@@ -133,14 +133,13 @@ def init_database(db_path: Path, schema: str, logger=None):
 
     # Use per-database lock to prevent concurrent schema initialization
     with sqlite_utils.with_db_lock(db_path):
-        conn = get_connection(db_path)
+        with sqlite_utils.get_connection(db_path) as conn:
+            if logger:
+                logger.debug(f"Initializing database at {db_path}")
 
-        if logger:
-            logger.debug(f"Initializing database at {db_path}")
-
-        # Execute schema (CREATE TABLE IF NOT EXISTS statements)
-        conn.executescript(schema)
-        conn.commit()
+            # Execute schema (CREATE TABLE IF NOT EXISTS statements)
+            conn.executescript(schema)
+            conn.commit()
 
     if logger:
         logger.debug("Database initialized successfully")
@@ -165,10 +164,13 @@ def close_connection(db_path: Path):
 
 def close_all_connections():
     """
-    Close all thread-local database connections.
+    Close all thread-local database connections and shared connection pools.
 
     Useful for cleanup or testing.
     """
+    from . import sqlite_utils
+    sqlite_utils.close_all_pools()
+
     if not hasattr(_thread_local, 'connections'):
         return
 
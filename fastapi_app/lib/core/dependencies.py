@@ -19,7 +19,10 @@ from fastapi_app.lib.utils.auth import AuthManager
 from fastapi_app.lib.utils.server_utils import get_session_id_from_request
 from fastapi_app.lib.utils.logging_utils import get_logger
 from fastapi_app.lib.sse.sse_service import SSEService
+from fastapi_app.lib.sse.sse_broker import create_sse_broker
 from fastapi_app.lib.sse.event_bus import EventBus, get_event_bus
+from fastapi_app.lib.services.derived_data import DerivedDataCache
+from fastapi_app.lib.services.doi_resolver import DoiMetadataCache
 
 
 logger = get_logger(__name__)
@@ -29,6 +32,8 @@ _sse_service_instance: Optional[SSEService] = None
 _db_manager_instance: Optional[DatabaseManager] = None
 _session_manager_instance: Optional[SessionManager] = None
 _auth_manager_instance: Optional[AuthManager] = None
+_derived_data_cache_instance: Optional[DerivedDataCache] = None
+_doi_metadata_cache_instance: Optional[DoiMetadataCache] = None
 _db_manager_lock = None  # Lazy init to avoid import-time issues
 
 
@@ -131,6 +136,24 @@ def get_file_storage() -> FileStorage:
     return FileStorage(storage_root, db_manager)
 
 
+def get_derived_data_cache() -> DerivedDataCache:
+    """Get DerivedDataCache instance for the configured database directory"""
+    global _derived_data_cache_instance
+    settings = get_settings()
+    if _derived_data_cache_instance is None or _derived_data_cache_instance.db_dir != settings.db_dir:
+        _derived_data_cache_instance = DerivedDataCache(settings.db_dir, logger=logger)
+    return _derived_data_cache_instance
+
+
+def get_doi_metadata_cache() -> DoiMetadataCache:
+    """Get DoiMetadataCache instance for the configured database directory"""
+    global _doi_metadata_cache_instance
+    settings = get_settings()
+    if _doi_metadata_cache_instance is None or _doi_metadata_cache_instance.db_dir != settings.db_dir:
+        _doi_metadata_cache_instance = DoiMetadataCache(settings.db_dir, logger=logger)
+    return _doi_metadata_cache_instance
+
+
 # Auth dependencies
 
 def get_session_manager() -> SessionManager:
@@ -290,7 +313,7 @@ def get_sse_service() -> SSEService:
     """Get singleton SSEService instance"""
     global _sse_service_instance
     if _sse_service_instance is None:
-        _sse_service_instance = SSEService(logger=logger)
+        _sse_service_instance = SSEService(logger=logger, broker=create_sse_broker(logger))
     return _sse_service_instance
 
 
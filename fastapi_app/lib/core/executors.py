@@ -0,0 +1,333 @@
+"""
+Shared executors for blocking work in async request handlers.
+
+Async handlers run on the event loop: every SQLite query, file read or lxml
+parse done directly in them stalls all other requests and SSE streams of the
+worker. Such work is handed to one of two process-wide executors:
+
+- I/O pool (threads): SQLite, file system, HTTP requests and other work that
+  releases the GIL or is short. Use run_in_io_pool() or the @run_blocking
+  decorator, which turns a sync route handler into one that runs in the pool.
+- CPU pool (spawned processes): long pure-Python computations. Functions and
+  arguments must be picklable, so only module-level functions can be used.
+
+EventLoopLagMonitor logs the handler that blocked the loop whenever the loop
+stalls for longer than EVENT_LOOP_LAG_THRESHOLD seconds.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Number of threads for blocking I/O
+IO_POOL_SIZE = int(os.environ.get("IO_POOL_SIZE", 32))
+
+# Number of worker processes for CPU-bound work (started on demand)
+CPU_POOL_SIZE = int(os.environ.get("CPU_POOL_SIZE", min(4, os.cpu_count() or 1)))
+
+# Event loop stalls longer than this (in seconds) are logged; 0 disables the monitor
+EVENT_LOOP_LAG_THRESHOLD = float(os.environ.get("EVENT_LOOP_LAG_THRESHOLD", 0.25))
+
+# Application source directory, used to find the blocking handler in a stack
+_APP_DIR = str(Path(__file__).resolve().parents[2]) + os.sep
+
+_io_executor: Optional[ThreadPoolExecutor] = None
+_cpu_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+_stats = {
+    "io_submitted": 0,
+    "io_active": 0,
+    "cpu_submitted": 0,
+    "cpu_active": 0,
+    "cpu_pool_restarts": 0,
+}
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """
+    Get the process-wide I/O thread pool, creating it on first use.
+
+    Returns:
+        ThreadPoolExecutor instance
+    """
+    global _io_executor
+    with _executor_lock:
+        if _io_executor is None:
+            _io_executor = ThreadPoolExecutor(
+                max_workers=max(1, IO_POOL_SIZE), thread_name_prefix="io-pool"
+            )
+        return _io_executor
+
+
+def get_cpu_executor() -> ProcessPoolExecutor:
+    """
+    Get the process-wide CPU process pool, creating it on first use.
+
+    Returns:
+        ProcessPoolExecutor instance
+    """
+    global _cpu_executor
+    with _executor_lock:
+        if _cpu_executor is None:
+            _cpu_executor = ProcessPoolExecutor(
+                max_workers=max(1, CPU_POOL_SIZE),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _cpu_executor
+
+
+async def run_in_io_pool(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking function in the I/O thread pool.
+
+    Context variables are copied to the worker thread, as with asyncio.to_thread().
+
+    Args:
+        func: Function to call
+        *args: Positional arguments
+        **kwargs: Keyword arguments
+
+    Returns:
+        The function's return value
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    _count("io_submitted")
+    _count("io_active")
+    try:
+        return await loop.run_in_executor(get_io_executor(), call)
+    finally:
+        _count("io_active", -1)
+
+
+async def run_in_cpu_pool(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a CPU-bound function in a worker process.
+
+    The function must be defined at module level; it and all arguments and
+    return values are pickled. If a worker process dies, the pool is replaced.
+
+    Args:
+        func: Module-level function to call
+        *args: Positional arguments
+        **kwargs: Keyword arguments
+
+    Returns:
+        The function's return value
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_cpu_executor()
+    _count("cpu_submitted")
+    _count("cpu_active")
+    try:
+        return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+    except BrokenProcessPool:
+        discard_cpu_executor(executor)
+        raise
+    finally:
+        _count("cpu_active", -1)
+
+
+def discard_cpu_executor(executor: ProcessPoolExecutor) -> None:
+    """
+    Replace a broken CPU worker pool; the next get_cpu_executor() creates a new one.
+
+    Args:
+        executor: The pool that raised BrokenProcessPool
+    """
+    global _cpu_executor
+    with _executor_lock:
+        if _cpu_executor is executor:
+            _cpu_executor = None
+            _stats["cpu_pool_restarts"] += 1
+    executor.shutdown(wait=False)
+
+
+def run_blocking(func: Callable[..., T]) -> Callable[..., Any]:
+    """
+    Decorator turning a sync function into a coroutine function that runs in the I/O pool.
+
+    Can be applied to route handlers below the router decorator; FastAPI still
+    sees the original signature for dependency injection:
+
+        @router.get("/report")
+        @run_blocking
+        def report(collection: str, user: dict = Depends(get_current_user)):
+            ...
+
+    Args:
+        func: Blocking function
+
+    Returns:
+        Coroutine function with the same signature
+    """
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        return await run_in_io_pool(func, *args, **kwargs)
+
+    return wrapper
+
+
+def get_executor_stats() -> Dict[str, Any]:
+    """
+    Get executor metrics.
+
+    Returns:
+        Dict with pool sizes and task counters
+    """
+    with _executor_lock:
+        stats: Dict[str, Any] = dict(_stats)
+    stats.update({
+        "io_pool_size": max(1, IO_POOL_SIZE),
+        "cpu_pool_size": max(1, CPU_POOL_SIZE),
+    })
+    return stats
+
+
+def shutdown_executors() -> None:
+    """Shut down the shared executors (if started)."""
+    global _io_executor, _cpu_executor
+    with _executor_lock:
+        io_executor, _io_executor = _io_executor, None
+        cpu_executor, _cpu_executor = _cpu_executor, None
+    if cpu_executor is not None:
+        cpu_executor.shutdown(wait=False, cancel_futures=True)
+    if io_executor is not None:
+        io_executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _count(key: str, delta: int = 1) -> None:
+    with _executor_lock:
+        _stats[key] += delta
+
+
+class EventLoopLagMonitor:
+    """
+    Detects and logs event loop stalls.
+
+    A heartbeat task on the loop records when it last ran. A watchdog thread
+    checks the heartbeat; when the loop has not run for longer than the
+    threshold, it captures the stack of the loop thread to find the code that
+    is blocking it. Once the loop runs again, the stall is logged with its
+    duration and the blocking handler.
+    """
+
+    def __init__(self, threshold: float = EVENT_LOOP_LAG_THRESHOLD, logger_inst=None):
+        """
+        Args:
+            threshold: Stall duration in seconds that is logged
+            logger_inst: Optional logger instance (default: module logger)
+        """
+        self.threshold = threshold
+        self.interval = threshold / 2
+        self.logger = logger_inst or logger
+
+        self.stalls = 0
+        self.max_lag = 0.0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._last_beat = 0.0
+        self._blocker: Optional[List[str]] = None
+
+    def start(self) -> None:
+        """Start monitoring the running event loop. Must be called from the loop."""
+        if self.threshold <= 0 or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopping.clear()
+        self._task = self._loop.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-lag-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop monitoring."""
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=2)
+            self._watchdog = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return the number of logged stalls and the longest stall in seconds."""
+        return {
+            "threshold": self.threshold,
+            "stalls": self.stalls,
+            "max_lag": self.max_lag,
+        }
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_beat = now
+            lag = now - expected
+            if lag > self.threshold:
+                self._report(lag)
+            self._blocker = None
+
+    def _watch(self) -> None:
+        """Watchdog thread: capture the loop thread's stack while the loop is stalled."""
+        while not self._stopping.wait(self.interval):
+            if self._blocker is not None:
+                continue
+            if time.monotonic() - self._last_beat <= self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)  # type: ignore[arg-type]
+            if frame is not None:
+                self._blocker = _app_frames(frame)
+
+    def _report(self, lag: float) -> None:
+        self.stalls += 1
+        self.max_lag = max(self.max_lag, lag)
+        blocker = self._blocker
+        if blocker:
+            self.logger.warning(
+                f"Event loop blocked for {lag * 1000:.0f} ms in {blocker[0]}"
+                + (f" (at {blocker[-1]})" if len(blocker) > 1 else "")
+            )
+        else:
+            self.logger.warning(f"Event loop blocked for {lag * 1000:.0f} ms")
+
+
+def _app_frames(frame) -> List[str]:
+    """Describe the application frames of a stack, outermost first."""
+    frames = []
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_APP_DIR) and filename != __file__:
+            module = Path(filename).relative_to(Path(_APP_DIR).parent).with_suffix("")
+            frames.append(
+                f"{'.'.join(module.parts)}.{frame.f_code.co_name}:{frame.f_lineno}"
+            )
+        frame = frame.f_back
+    frames.reverse()
+    return frames
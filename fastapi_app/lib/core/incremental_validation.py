@@ -0,0 +1,468 @@
+"""
+Incremental XML/TEI validation.
+
+Keeps the last validated tree and error list per (session, document) and,
+when a client sends a new version of the same document together with the
+content hash of the cached version, only revalidates the subtree that
+changed:
+
+1. Unchanged leading/trailing lines of the two versions are determined.
+2. The cached and the new tree are compared top-down (skipping children that
+   lie entirely in the unchanged lines) to find the deepest element that
+   contains all changes.
+3. If the RelaxNG grammar defines that element with exactly one named
+   pattern, a fragment grammar that includes the schema with an overridden
+   <start> is used to validate the subtree on its own (in the validator pool).
+4. The subtree errors replace the cached errors for that subtree; errors
+   after the subtree are shifted by the change in line count.
+
+Whenever one of the preconditions does not hold (no or outdated cache entry,
+schema is not RelaxNG, the root element changed, the element is ambiguous in
+the grammar, the subtree's validity changed, ...), the document is validated
+in full.
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from lxml import etree  # type: ignore
+
+from .schema_validator import (
+    RELAXNG_NAMESPACE,
+    ValidationError,
+    ValidationTimeoutError,
+    extract_schema_locations,
+    get_validation_timeout,
+    resolve_schema,
+    validate,
+    validate_with_timeout,
+)
+from ..utils.hash_utils import generate_file_hash
+from ..utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Maximum number of (session, document) entries kept in memory
+INCREMENTAL_CACHE_SIZE = 16
+
+# Directory (below the schema's cache directory) holding fragment grammars
+FRAGMENT_DIR_NAME = ".fragments"
+
+TEI_NAMESPACES = {"tei": "http://www.tei-c.org/ns/1.0"}
+
+
+class _ValidatedDocument:
+    """Cached result of the last validation of a document."""
+
+    __slots__ = ("content_hash", "lines", "root", "errors", "schema_locations")
+
+    def __init__(self, content_hash: str, lines: List[str], root, errors: List[Dict],
+                 schema_locations: List[Dict[str, str]]):
+        self.content_hash = content_hash
+        self.lines = lines
+        self.root = root
+        self.errors = errors
+        self.schema_locations = schema_locations
+
+
+_cache: "OrderedDict[Tuple[str, str], _ValidatedDocument]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+# (schema path, schema mtime, element tag) -> fragment grammar path or None
+_fragment_schemas: Dict[Tuple[str, int, str], Optional[Path]] = {}
+_fragment_lock = threading.Lock()
+
+
+def compute_content_hash(xml_string: str) -> str:
+    """Hash of the document content as returned to and sent back by clients."""
+    return generate_file_hash(xml_string.encode("utf-8"))
+
+
+def clear_incremental_cache(session_id: Optional[str] = None) -> None:
+    """
+    Drop cached validation results.
+
+    Args:
+        session_id: Only drop entries of this session (default: all)
+    """
+    with _cache_lock:
+        if session_id is None:
+            _cache.clear()
+        else:
+            for key in [key for key in _cache if key[0] == session_id]:
+                del _cache[key]
+
+
+def validate_incremental(
+    xml_string: str,
+    session_id: str,
+    document_id: str,
+    base_hash: Optional[str] = None,
+    xpath: Optional[str] = None,
+    cache_root: Optional[Path] = None
+) -> Tuple[List[Dict], str, bool]:
+    """
+    Validate a document, revalidating only the changed subtree if possible.
+
+    Args:
+        xml_string: XML document to validate
+        session_id: Session the document is edited in
+        document_id: Identifier of the edited document (e.g. file stable id)
+        base_hash: Content hash of the previously validated version, as
+            returned by the previous call
+        xpath: Optional hint: element that contains the edit. If it is an
+            ancestor of the detected change, the whole element is revalidated.
+        cache_root: Root directory for schema cache (default: schema/cache)
+
+    Returns:
+        Tuple of (errors, content_hash, incremental), where incremental is
+        True if only a subtree was revalidated
+    """
+    if cache_root is None:
+        from fastapi_app.config import get_settings
+        cache_root = get_settings().schema_cache_dir
+
+    key = (session_id, document_id)
+    content_hash = compute_content_hash(xml_string)
+
+    with _cache_lock:
+        entry = _cache.get(key)
+    if entry is not None and base_hash is not None and entry.content_hash == base_hash:
+        if entry.content_hash == content_hash:
+            return list(entry.errors), content_hash, True
+        try:
+            result = _validate_changed_subtree(entry, xml_string, content_hash, xpath, cache_root)
+        except (ValidationError, etree.XMLSyntaxError, etree.XPathError) as e:
+            logger.debug(f"Incremental validation not possible: {e}")
+            result = None
+        if result is not None:
+            _store(key, result)
+            return list(result.errors), content_hash, True
+
+    errors = validate(xml_string, cache_root=cache_root)
+    new_entry = _build_entry(xml_string, content_hash, errors)
+    if new_entry is not None:
+        _store(key, new_entry)
+    else:
+        with _cache_lock:
+            _cache.pop(key, None)
+    return errors, content_hash, False
+
+
+def _store(key: Tuple[str, str], entry: _ValidatedDocument) -> None:
+    with _cache_lock:
+        _cache.pop(key, None)
+        _cache[key] = entry
+        while len(_cache) > INCREMENTAL_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _build_entry(xml_string: str, content_hash: str, errors: List[Dict]) -> Optional[_ValidatedDocument]:
+    """Create a cache entry after full validation, or None if the result cannot be reused."""
+    # Timeouts and infrastructure errors are not per-element results
+    if any(error.get("severity") or error["message"].startswith("Validation error:") for error in errors):
+        return None
+    schema_locations = extract_schema_locations(xml_string)
+    if not _is_incremental_schema(schema_locations):
+        return None
+    try:
+        root = etree.fromstring(xml_string.encode("utf-8"))
+    except etree.XMLSyntaxError:
+        return None
+    return _ValidatedDocument(content_hash, xml_string.split("\n"), root, errors, schema_locations)
+
+
+def _is_incremental_schema(schema_locations: List[Dict[str, str]]) -> bool:
+    return (
+        len(schema_locations) == 1
+        and schema_locations[0].get("type") == "relaxng"
+        and schema_locations[0]["schemaLocation"].startswith("http")
+    )
+
+
+def _validate_changed_subtree(
+    entry: _ValidatedDocument,
+    xml_string: str,
+    content_hash: str,
+    xpath: Optional[str],
+    cache_root: Path
+) -> Optional[_ValidatedDocument]:
+    """Revalidate the changed subtree; returns the new cache entry or None to fall back."""
+    schema_locations = extract_schema_locations(xml_string)
+    if schema_locations != entry.schema_locations:
+        return None
+
+    new_lines = xml_string.split("\n")
+    old_lines = entry.lines
+    unchanged_before, unchanged_after = _common_line_counts(old_lines, new_lines)
+    # Last changed line (1-based) in each version
+    last_changed_old = len(old_lines) - unchanged_after
+    last_changed_new = len(new_lines) - unchanged_after
+
+    new_root = etree.fromstring(xml_string.encode("utf-8"))
+    changed = _find_changed_subtree(entry.root, new_root, unchanged_before, last_changed_new)
+    if changed is None:
+        return None
+    old_el, new_el = changed
+
+    if xpath:
+        hinted = new_root.getroottree().xpath(xpath, namespaces=TEI_NAMESPACES)
+        if hinted and isinstance(hinted[0], etree._Element):
+            old_el, new_el = _widen_to(old_el, new_el, hinted[0])
+
+    # Move up until the subtree occupies lines of its own, so that cached
+    # errors can be assigned to it by line number
+    while new_el is not None and new_el is not new_root:
+        if _has_own_lines(old_el, unchanged_before, last_changed_old) and \
+                _has_own_lines(new_el, unchanged_before, last_changed_new):
+            break
+        old_el, new_el = old_el.getparent(), new_el.getparent()
+    if new_el is None or new_el is new_root or not isinstance(new_el.tag, str):
+        return None
+
+    schema_cache_file, root_namespace = resolve_schema(schema_locations[0], cache_root)
+    if root_namespace != RELAXNG_NAMESPACE:
+        return None
+    fragment_schema = _get_fragment_schema(schema_cache_file, new_el.tag)
+    if fragment_schema is None:
+        return None
+
+    subtree_errors = _validate_subtree(
+        new_el, new_lines, fragment_schema, get_validation_timeout(schema_locations[0]["schemaLocation"])
+    )
+    if subtree_errors is None:
+        return None
+
+    old_start = old_el.sourceline
+    old_end = _following_line(old_el)
+    old_subtree_errors = [
+        e for e in entry.errors
+        if e["line"] >= old_start and (old_end is None or e["line"] < old_end)
+    ]
+    # If the subtree became valid or invalid, errors reported on ancestors
+    # may change as well
+    if bool(old_subtree_errors) != bool(subtree_errors):
+        return None
+
+    line_delta = len(new_lines) - len(old_lines)
+    errors = [e for e in entry.errors if e["line"] < old_start]
+    errors.extend(subtree_errors)
+    if old_end is not None:
+        errors.extend(
+            {**e, "line": e["line"] + line_delta} for e in entry.errors if e["line"] >= old_end
+        )
+
+    logger.debug(
+        f"Incrementally validated <{etree.QName(new_el).localname}> at line {new_el.sourceline}: "
+        f"{len(subtree_errors)} errors in subtree, {len(errors)} in total"
+    )
+    return _ValidatedDocument(content_hash, new_lines, new_root, errors, schema_locations)
+
+
+def _common_line_counts(old_lines: List[str], new_lines: List[str]) -> Tuple[int, int]:
+    """Number of identical lines at the start and at the end of both versions."""
+    limit = min(len(old_lines), len(new_lines))
+    before = 0
+    while before < limit and old_lines[before] == new_lines[before]:
+        before += 1
+    after = 0
+    while after < limit - before and old_lines[-1 - after] == new_lines[-1 - after]:
+        after += 1
+    return before, after
+
+
+def _following_line(element) -> Optional[int]:
+    """Start line of the first node after the element's subtree (None at the end of the document)."""
+    node = element
+    while node is not None:
+        following = node.getnext()
+        if following is not None:
+            return following.sourceline
+        node = node.getparent()
+    return None
+
+
+def _find_changed_subtree(old_root, new_root, unchanged_before: int, last_changed_new: int):
+    """
+    Find the deepest element pair that contains all differences between two trees.
+
+    Children located entirely in the unchanged leading or trailing lines are not
+    compared. Returns None if the root element changed or no difference was found.
+    """
+    if old_root.tag != new_root.tag:
+        return None
+    old, new = old_root, new_root
+    while True:
+        if dict(old.attrib) != dict(new.attrib) or old.text != new.text:
+            return old, new
+        old_children, new_children = list(old), list(new)
+        if len(old_children) != len(new_children):
+            return old, new
+
+        changed = []
+        for index, (old_child, new_child) in enumerate(zip(old_children, new_children)):
+            if index + 1 < len(new_children):
+                next_line = new_children[index + 1].sourceline
+            else:
+                next_line = _following_line(new)
+            if next_line is not None and next_line <= unchanged_before:
+                continue
+            if new_child.sourceline > last_changed_new:
+                continue
+            if etree.tostring(old_child, with_tail=True) != etree.tostring(new_child, with_tail=True):
+                changed.append(index)
+                if len(changed) > 1:
+                    return old, new
+
+        if not changed:
+            return None if old is old_root else (old, new)
+        old_child, new_child = old_children[changed[0]], new_children[changed[0]]
+        if old_child.tag != new_child.tag or old_child.tail != new_child.tail \
+                or not isinstance(new_child.tag, str):
+            return old, new
+        old, new = old_child, new_child
+
+
+def _widen_to(old_el, new_el, hinted):
+    """Move up to the hinted element if it is an ancestor of the changed element."""
+    old_node, new_node = old_el, new_el
+    while new_node is not None:
+        if new_node is hinted:
+            return old_node, new_node
+        old_node, new_node = old_node.getparent(), new_node.getparent()
+    return old_el, new_el
+
+
+def _has_own_lines(element, unchanged_before: int, last_changed: int) -> bool:
+    """
+    Check that the element starts on a line of its own, starts no later than the
+    first changed line, and that the next node starts on an unchanged line of its
+    own after the element's content.
+    """
+    start = element.sourceline
+    if start is None or start > unchanged_before + 1:
+        return False
+    previous = element.getprevious()
+    if previous is not None:
+        previous_last = max(node.sourceline for node in previous.iter())
+    else:
+        previous_last = element.getparent().sourceline
+    if previous_last >= start:
+        return False
+    following = _following_line(element)
+    if following is None:
+        return True
+    if following <= last_changed:
+        return False
+    return max(node.sourceline for node in element.iter()) < following
+
+
+def _get_fragment_schema(schema_file: Path, tag: str) -> Optional[Path]:
+    """
+    Get a grammar that validates a single element of the given schema.
+
+    The fragment grammar includes the schema and overrides its <start> with a
+    reference to the define holding the element's pattern. Returns None if the
+    schema does not have exactly one named pattern for the element.
+    """
+    mtime = os.stat(schema_file).st_mtime_ns
+    key = (str(schema_file), mtime, tag)
+    with _fragment_lock:
+        if key in _fragment_schemas:
+            return _fragment_schemas[key]
+
+    fragment = _create_fragment_schema(schema_file, mtime, tag)
+    with _fragment_lock:
+        _fragment_schemas[key] = fragment
+    return fragment
+
+
+def _create_fragment_schema(schema_file: Path, mtime: int, tag: str) -> Optional[Path]:
+    grammar = etree.parse(str(schema_file)).getroot()
+    rng = f"{{{RELAXNG_NAMESPACE}}}"
+    if grammar.tag != f"{rng}grammar":
+        return None
+    # Patterns in other files are not visible here
+    if next(grammar.iter(f"{rng}include", f"{rng}externalRef"), None) is not None:
+        return None
+
+    qname = etree.QName(tag)
+    matches = []
+    for pattern in grammar.iter(f"{rng}element"):
+        name = pattern.get("name")
+        if name is None:
+            name_el = pattern.find(f"{rng}name")
+            name = name_el.text.strip() if name_el is not None and name_el.text else None
+        if name is None:
+            continue
+        prefix, _, local_name = name.rpartition(":")
+        if local_name != qname.localname:
+            continue
+        if prefix:
+            namespace = pattern.nsmap.get(prefix)
+        else:
+            ns_holder = next((node for node in pattern.iterancestors() if node.get("ns") is not None), None)
+            namespace = pattern.get("ns", ns_holder.get("ns") if ns_holder is not None else "")
+        if (namespace or None) == qname.namespace:
+            matches.append(pattern)
+
+    if len(matches) != 1 or matches[0].getparent().tag != f"{rng}define":
+        return None
+    define_name = matches[0].getparent().get("name")
+
+    fragment_dir = schema_file.parent / FRAGMENT_DIR_NAME
+    fragment_dir.mkdir(parents=True, exist_ok=True)
+    fragment_file = fragment_dir / f"{schema_file.stem}.{mtime}.{define_name}.rng"
+    if not fragment_file.exists():
+        fragment = etree.Element(f"{rng}grammar", nsmap={None: RELAXNG_NAMESPACE})
+        include = etree.SubElement(fragment, f"{rng}include", href=schema_file.resolve().as_uri())
+        start = etree.SubElement(include, f"{rng}start")
+        etree.SubElement(start, f"{rng}ref", name=define_name)
+        tmp_file = fragment_file.with_suffix(f".{os.getpid()}.tmp")
+        etree.ElementTree(fragment).write(str(tmp_file), xml_declaration=True, encoding="utf-8")
+        os.replace(tmp_file, fragment_file)
+    return fragment_file
+
+
+def _validate_subtree(element, lines: List[str], fragment_schema: Path, timeout: int) -> Optional[List[Dict]]:
+    """
+    Validate an element against a fragment grammar.
+
+    Returns errors with line and column numbers of the full document (lines),
+    or None on failure.
+    """
+    subtree_bytes = etree.tostring(element)
+    # Map line numbers of the serialized subtree back to the document
+    subtree = etree.fromstring(subtree_bytes)
+    line_map: Dict[int, int] = {}
+    for original, copy in zip(element.iter(), subtree.iter()):
+        line_map.setdefault(copy.sourceline, original.sourceline)
+
+    try:
+        errors = validate_with_timeout(str(fragment_schema), subtree_bytes, RELAXNG_NAMESPACE, timeout=timeout)
+    except (ValidationError, ValidationTimeoutError) as e:
+        logger.debug(f"Subtree validation failed: {e}")
+        return None
+
+    # The serialized subtree starts at column 0, in the document it may be indented
+    start_column = _start_column(element, lines)
+    mapped = []
+    for error in errors:
+        mapped_error = {**error, "line": line_map.get(error["line"], element.sourceline)}
+        # Column 0 means the position within the line is unknown
+        if error["line"] == 1 and error.get("column"):
+            mapped_error["column"] = error["column"] + start_column
+        mapped.append(mapped_error)
+    return mapped
+
+
+def _start_column(element, lines: List[str]) -> int:
+    """Offset of the element's start tag within its first line of the document."""
+    localname = etree.QName(element).localname
+    name = f"{element.prefix}:{localname}" if element.prefix else localname
+    match = re.search(rf"<{re.escape(name)}(?=[\s/>])", lines[element.sourceline - 1])
+    return match.start() if match else 0
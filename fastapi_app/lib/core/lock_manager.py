@@ -0,0 +1,395 @@
+"""
+Lease-based file lock manager.
+
+Keeps the lock table of locks.db and the remote lock cache (from
+sync_metadata['remote_locks'] in metadata.db) in memory, so that checking,
+listing and renewing locks does not query the databases:
+
+- A lock is a lease that ends at its expires_at (Unix time, an indexed
+  integer column generated from updated_at, see migration 011).
+- Every change is written through to locks.db in a single statement (the
+  renewals of a batched heartbeat in a single transaction) before it is
+  applied in memory. Acquiring a lock is a conditional upsert, so two
+  processes can never both win the same lock.
+- The in-memory tables are coherent across worker processes: before each
+  operation the manager compares PRAGMA data_version of its own connection,
+  which changes whenever another connection (process) has committed, and
+  reloads the table only then.
+
+One manager exists per database directory and process, see
+get_lock_manager(). The functions in locking.py are the public API.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+import logging
+
+from . import sqlite_utils
+
+# Lease duration; must match the expires_at column of migration 011
+LEASE_SECONDS = 90
+
+# Remote locks are considered active for heartbeat interval + grace period
+REMOTE_LOCK_TTL_SECONDS = 90 + 360
+
+# Acquires or renews a lease; an existing row is only changed if it belongs to
+# the same session or has expired
+_UPSERT_LEASE = """
+    INSERT INTO locks (file_id, session_id, acquired_at, updated_at)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(file_id) DO UPDATE SET
+        session_id  = excluded.session_id,
+        acquired_at = CASE WHEN locks.session_id = excluded.session_id
+                           THEN locks.acquired_at ELSE excluded.acquired_at END,
+        updated_at  = excluded.updated_at
+    WHERE locks.session_id = excluded.session_id OR locks.expires_at <= ?
+"""
+
+
+class Lease(NamedTuple):
+    """A lock held by a session until expires_at (Unix time)."""
+    session_id: str
+    expires_at: int
+
+
+def _timestamp(now: int) -> str:
+    """Format Unix time like SQLite's CURRENT_TIMESTAMP (UTC)."""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(now))
+
+
+def parse_remote_locks(remote_locks: dict) -> Dict[str, int]:
+    """
+    Get the expiry of each remote lock.
+
+    Args:
+        remote_locks: Dict mapping stable_id -> {client_id, acquired_at, updated_at}
+
+    Returns:
+        Dict mapping stable_id -> Unix time at which the remote lock expires
+    """
+    expiry = {}
+    for stable_id, lock_info in remote_locks.items():
+        if not isinstance(lock_info, dict):
+            continue
+        updated_at_str = lock_info.get("updated_at") or lock_info.get("acquired_at", "")
+        if not updated_at_str:
+            continue
+        try:
+            updated_at = datetime.fromisoformat(updated_at_str)
+        except (ValueError, TypeError):
+            continue
+        if updated_at.tzinfo is None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+        expiry[stable_id] = int(updated_at.timestamp()) + REMOTE_LOCK_TTL_SECONDS
+    return expiry
+
+
+class LockManager:
+    """
+    In-memory lock table with write-through persistence to locks.db.
+
+    Thread-safe. The database must have been initialized with
+    locking.init_locks_db().
+    """
+
+    def __init__(self, db_dir: Path):
+        self.db_path = db_dir / "locks.db"
+        self.metadata_path = db_dir / "metadata.db"
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+        self._leases: Dict[str, Lease] = {}
+        self._metadata_conn: Optional[sqlite3.Connection] = None
+        self._metadata_version: Optional[int] = None
+        self._remote_expiry: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------
+    # Operations
+    # ------------------------------------------------------------------
+
+    def acquire(self, file_id: str, session_id: str, logger: logging.Logger) -> bool:
+        """
+        Acquire or renew the lease on a file.
+
+        Args:
+            file_id: The file's stable_id
+            session_id: The session requesting the lock
+            logger: Logger instance
+
+        Returns:
+            True if the lease was acquired or renewed, False if the file is
+            locked by another session (here or on a remote instance)
+        """
+        with self._lock:
+            self._sync()
+            now = int(time.time())
+            lease = self._leases.get(file_id)
+
+            if lease is None or lease.session_id != session_id:
+                if lease is not None and lease.expires_at > now:
+                    logger.warning(
+                        f"[LOCK] Session {session_id[:8]}... DENIED lock for file {file_id[:8]}.... "
+                        f"Held by {lease.session_id[:8]}... "
+                        f"(age={now - lease.expires_at + LEASE_SECONDS}s, still fresh)"
+                    )
+                    return False
+                if lease is None and self._remote_expiry_of(file_id) > now:
+                    logger.warning(
+                        f"[LOCK] Session {session_id[:8]}... DENIED lock for file {file_id[:8]}...: "
+                        f"file is locked on a remote instance"
+                    )
+                    return False
+
+            timestamp = _timestamp(now)
+            cursor = self._conn.execute(  # type: ignore[union-attr]
+                _UPSERT_LEASE, (file_id, session_id, timestamp, timestamp, now)
+            )
+            if cursor.rowcount == 0:
+                # Another process took the lock since the last reload
+                self._reload()
+                holder = self._leases.get(file_id)
+                logger.warning(
+                    f"[LOCK] Session {session_id[:8]}... DENIED lock for file {file_id[:8]}.... "
+                    f"Held by {holder.session_id[:8] if holder else '?'}... (acquired concurrently)"
+                )
+                return False
+            self._leases[file_id] = Lease(session_id, now + LEASE_SECONDS)
+
+        if lease is None:
+            logger.info(f"[LOCK] Session {session_id[:8]}... acquired NEW lock for file {file_id[:8]}...")
+        elif lease.session_id == session_id:
+            logger.debug(f"[LOCK] Session {session_id[:8]}... refreshed own lock for file {file_id[:8]}...")
+        else:
+            logger.warning(
+                f"[LOCK] Session {session_id[:8]}... took over stale lock for file {file_id[:8]}... "
+                f"from session {lease.session_id[:8]}... "
+                f"(was {now - lease.expires_at + LEASE_SECONDS}s old)"
+            )
+        return True
+
+    def renew_many(self, file_ids: List[str], session_id: str) -> Dict[str, bool]:
+        """
+        Renew the leases of a session on several files in one transaction.
+
+        Unlike acquire(), only leases the session holds are renewed (also
+        expired ones that were neither removed nor taken over); no new leases
+        are created.
+
+        Args:
+            file_ids: The files' stable_ids
+            session_id: The session holding the leases
+
+        Returns:
+            Dict mapping each file_id to True if the lease was renewed, False
+            if the session does not hold it (released, expired and removed,
+            or taken over by another session)
+        """
+        results: Dict[str, bool] = {}
+        with self._lock:
+            self._sync()
+            self._conn.execute("BEGIN IMMEDIATE")  # type: ignore[union-attr]
+            try:
+                # Include changes committed before the write lock was taken
+                self._sync()
+                now = int(time.time())
+                timestamp = _timestamp(now)
+                for file_id in dict.fromkeys(file_ids):
+                    lease = self._leases.get(file_id)
+                    renewed = False
+                    if lease is not None and lease.session_id == session_id:
+                        cursor = self._conn.execute(  # type: ignore[union-attr]
+                            "UPDATE locks SET updated_at = ? WHERE file_id = ? AND session_id = ?",
+                            (timestamp, file_id, session_id)
+                        )
+                        renewed = cursor.rowcount > 0
+                    results[file_id] = renewed
+                self._conn.execute("COMMIT")  # type: ignore[union-attr]
+            except BaseException:
+                self._conn.execute("ROLLBACK")  # type: ignore[union-attr]
+                raise
+            for file_id, renewed in results.items():
+                if renewed:
+                    self._leases[file_id] = Lease(session_id, now + LEASE_SECONDS)
+        return results
+
+    def release(self, file_id: str, session_id: str) -> Optional[Lease]:
+        """
+        Release the lease on a file if it is held by the session.
+
+        Args:
+            file_id: The file's stable_id
+            session_id: The session releasing the lock
+
+        Returns:
+            The lease found on the file (None if there was none); it was
+            released if it belongs to session_id
+        """
+        with self._lock:
+            self._sync()
+            lease = self._leases.get(file_id)
+            if lease is not None and lease.session_id == session_id:
+                self._conn.execute(  # type: ignore[union-attr]
+                    "DELETE FROM locks WHERE file_id = ? AND session_id = ?", (file_id, session_id)
+                )
+                del self._leases[file_id]
+            return lease
+
+    def get_lease(self, file_id: str) -> Optional[Lease]:
+        """Get the lease on a file, also if it has expired (None if there is none)."""
+        with self._lock:
+            self._sync()
+            return self._leases.get(file_id)
+
+    def active_locks(self, timeout_seconds: int = LEASE_SECONDS) -> Dict[str, str]:
+        """
+        Get all active leases.
+
+        Args:
+            timeout_seconds: Lock timeout in seconds (counted from the last renewal)
+
+        Returns:
+            Dict mapping file stable_ids to session IDs
+        """
+        # Active while expires_at - LEASE_SECONDS + timeout_seconds > now
+        threshold = int(time.time()) + LEASE_SECONDS - timeout_seconds
+        with self._lock:
+            self._sync()
+            return {
+                file_id: lease.session_id
+                for file_id, lease in self._leases.items()
+                if lease.expires_at > threshold
+            }
+
+    def purge_expired(self, timeout_seconds: int = LEASE_SECONDS) -> int:
+        """
+        Delete expired leases.
+
+        Args:
+            timeout_seconds: Lock timeout in seconds (counted from the last renewal)
+
+        Returns:
+            Number of leases deleted
+        """
+        return len(self.expire(timeout_seconds))
+
+    def expire(self, timeout_seconds: int = LEASE_SECONDS) -> Dict[str, str]:
+        """
+        Delete expired leases and return them.
+
+        Each lease is returned by one call only, also if the managers of
+        several processes expire leases at the same time.
+
+        Args:
+            timeout_seconds: Lock timeout in seconds (counted from the last renewal)
+
+        Returns:
+            Dict mapping the file stable_ids of the deleted leases to the
+            session IDs that held them
+        """
+        threshold = int(time.time()) + LEASE_SECONDS - timeout_seconds
+        with self._lock:
+            self._sync()
+            rows = self._conn.execute(  # type: ignore[union-attr]
+                "DELETE FROM locks WHERE expires_at <= ? RETURNING file_id, session_id", (threshold,)
+            ).fetchall()
+            self._leases = {
+                file_id: lease for file_id, lease in self._leases.items()
+                if lease.expires_at > threshold
+            }
+            return {row[0]: row[1] for row in rows}
+
+    def close(self) -> None:
+        """Close the database connections."""
+        with self._lock:
+            for conn in (self._conn, self._metadata_conn):
+                if conn is not None:
+                    conn.close()
+            self._conn = self._metadata_conn = None
+            self._data_version = self._metadata_version = None
+
+    # ------------------------------------------------------------------
+    # Coherence
+    # ------------------------------------------------------------------
+
+    def _sync(self) -> None:
+        """Reload the lock table if another connection has changed it."""
+        if self._conn is None:
+            self._conn = sqlite_utils.open_connection(self.db_path)
+            self._conn.isolation_level = None
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._reload()
+            self._data_version = version
+
+    def _reload(self) -> None:
+        rows = self._conn.execute(  # type: ignore[union-attr]
+            "SELECT file_id, session_id, expires_at FROM locks"
+        ).fetchall()
+        self._leases = {row[0]: Lease(row[1], row[2] or 0) for row in rows}
+
+    def _remote_expiry_of(self, file_id: str) -> int:
+        """Expiry of the remote lock on a file (0 if there is none)."""
+        try:
+            if self._metadata_conn is None:
+                if not self.metadata_path.exists():
+                    return 0
+                self._metadata_conn = sqlite_utils.open_connection(self.metadata_path)
+            version = self._metadata_conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != self._metadata_version:
+                row = self._metadata_conn.execute(
+                    "SELECT value FROM sync_metadata WHERE key = 'remote_locks'"
+                ).fetchone()
+                self._remote_expiry = parse_remote_locks(json.loads(row[0]) if row and row[0] else {})
+                self._metadata_version = version
+        except (sqlite3.Error, ValueError) as exc:
+            logging.getLogger(__name__).debug(f"[LOCK] Remote lock check failed (non-fatal): {exc}")
+            return 0
+        return self._remote_expiry.get(file_id, 0)
+
+
+_managers: Dict[str, LockManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_lock_manager(db_dir: Path) -> LockManager:
+    """
+    Get the lock manager of a database directory.
+
+    Args:
+        db_dir: Directory containing locks.db
+
+    Returns:
+        LockManager shared by all threads of this process
+    """
+    # No resolve() (file system calls on every lock operation): managers of
+    # different paths to the same directory are coherent like those of workers
+    key = os.path.abspath(db_dir)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = _managers[key] = LockManager(db_dir)
+        return manager
+
+
+def close_lock_managers(db_dir: Optional[Path] = None) -> None:
+    """
+    Close lock managers (all, or the one of db_dir).
+
+    Used when locks.db is (re)initialized and in tests after database files
+    were deleted/recreated.
+    """
+    with _managers_lock:
+        if db_dir is None:
+            managers = list(_managers.values())
+            _managers.clear()
+        else:
+            manager = _managers.pop(os.path.abspath(db_dir), None)
+            managers = [manager] if manager else []
+    for manager in managers:
+        manager.close()
@@ -6,17 +6,22 @@ Ported from server/lib/locking.py with FastAPI adaptations:
 - Accept db_dir and logger as parameters
 - Use stable_id-based file identification instead of paths
 - Keep SQLite-based implementation (migrated schema)
+
+Locks are leases kept in memory by the lock manager of the database
+directory (see lock_manager.py) and written through to locks.db.
 """
 
 import sqlite3
 import threading
-from datetime import datetime, timezone, timedelta
 from contextlib import contextmanager
 from pathlib import Path
 from typing import Dict, Optional, List
 import logging
 
-LOCK_TIMEOUT_SECONDS = 90
+from . import sqlite_utils
+from .lock_manager import LEASE_SECONDS, close_lock_managers, get_lock_manager
+
+LOCK_TIMEOUT_SECONDS = LEASE_SECONDS
 
 # Track if locks database has been initialized (to avoid redundant init calls)
 _locks_db_initialized: set[str] = set()
@@ -28,7 +33,9 @@ def get_db_connection(db_dir: Path, logger: logging.Logger):
     """
     Context manager for database connections with proper error handling.
 
-    Uses DELETE journal mode instead of WAL for the locks database because:
+    Connections are borrowed from the shared pool for locks.db, whose pragma
+    profile (sqlite_utils.PRAGMA_PROFILES) sets DELETE journal mode once
+    instead of WAL because:
     - It's a small database with infrequent writes
     - Locks are short-lived and don't benefit from WAL's read concurrency
     - DELETE mode avoids WAL file corruption under rapid concurrent access
@@ -41,26 +48,13 @@ def get_db_connection(db_dir: Path, logger: logging.Logger):
         sqlite3.Connection: Database connection with row factory enabled
     """
     db_path = db_dir / "locks.db"
-    conn = None
     try:
-        conn = sqlite3.connect(
-            str(db_path),
-            timeout=30.0,
-            check_same_thread=False
-        )
-        conn.row_factory = sqlite3.Row
-        # Use DELETE journal mode (simpler, avoids WAL corruption issues)
-        conn.execute("PRAGMA journal_mode = DELETE")
-        # Set busy timeout to wait for locks
-        conn.execute("PRAGMA busy_timeout = 30000")
-        yield conn
-        conn.commit()
+        with sqlite_utils.get_connection(db_path) as conn:
+            yield conn
+            conn.commit()
     except sqlite3.Error as e:
         logger.error(f"Database error: {e}")
         raise RuntimeError(f"Database error: {e}")
-    finally:
-        if conn:
-            conn.close()
 
 
 def init_locks_db(db_dir: Path, logger: logging.Logger, force: bool = False) -> None:
@@ -96,6 +90,9 @@ def init_locks_db(db_dir: Path, logger: logging.Logger, force: bool = False) ->
 
         db_path.parent.mkdir(parents=True, exist_ok=True)
 
+        # The database may have been replaced; reconnect on next use
+        close_lock_managers(db_dir)
+
         # Create database and schema if it doesn't exist
         if not db_path.exists():
             with get_db_connection(db_dir, logger) as conn:
@@ -203,128 +200,48 @@ def acquire_lock(file_id: str, session_id: str, db_dir: Path, logger: logging.Lo
 
 def _acquire_lock_impl(file_id: str, session_id: str, db_dir: Path, logger: logging.Logger) -> bool:
     """Internal implementation of acquire_lock without retry logic."""
-    with get_db_connection(db_dir, logger) as conn:
-        # Use IMMEDIATE transaction to get write lock upfront, preventing race conditions
-        # This ensures only one transaction can modify locks at a time
-        conn.isolation_level = None  # Auto-commit off for explicit transaction control
-        conn.execute("BEGIN IMMEDIATE")
-
-        try:
-            cursor = conn.cursor()
-
-            # Calculate staleness threshold
-            stale_threshold = datetime.now(timezone.utc) - timedelta(seconds=LOCK_TIMEOUT_SECONDS)
-
-            # Check if there's an existing lock
-            cursor.execute("""
-                SELECT session_id, updated_at
-                FROM locks
-                WHERE file_id = ?
-            """, (file_id,))
-
-            existing = cursor.fetchone()
-
-            if existing:
-                existing_session = existing['session_id']
-                updated_at = datetime.fromisoformat(existing['updated_at'])
-                updated_at_utc = updated_at.replace(tzinfo=timezone.utc)
-                is_stale = updated_at_utc < stale_threshold
-                age_seconds = (datetime.now(timezone.utc) - updated_at_utc).total_seconds()
-
-                logger.debug(
-                    f"[LOCK] Existing lock found: owner={existing_session[:8]}..., "
-                    f"age={age_seconds:.1f}s, stale={is_stale}, threshold={LOCK_TIMEOUT_SECONDS}s"
-                )
-
-                if existing_session == session_id:
-                    # It's our lock, refresh it
-                    cursor.execute("""
-                        UPDATE locks
-                        SET updated_at = CURRENT_TIMESTAMP
-                        WHERE file_id = ?
-                    """, (file_id,))
-                    conn.commit()
-                    logger.debug(f"[LOCK] Session {session_id[:8]}... refreshed own lock for file {file_id[:8]}...")
-                    return True
-                elif is_stale:
-                    # Lock is stale, take it over
-                    cursor.execute("""
-                        UPDATE locks
-                        SET session_id = ?, updated_at = CURRENT_TIMESTAMP
-                        WHERE file_id = ?
-                    """, (session_id, file_id))
-                    conn.commit()
-                    logger.warning(
-                        f"[LOCK] Session {session_id[:8]}... took over stale lock for file {file_id[:8]}... "
-                        f"from session {existing_session[:8]}... (was {age_seconds:.1f}s old)"
-                    )
-                    return True
-                else:
-                    # Lock is held by another active session - DENY
-                    conn.rollback()
-                    logger.warning(
-                        f"[LOCK] Session {session_id[:8]}... DENIED lock for file {file_id[:8]}.... "
-                        f"Held by {existing_session[:8]}... (age={age_seconds:.1f}s, still fresh)"
-                    )
-                    return False
-            else:
-                # No local lock — check remote lock cache before granting
-                if _is_remotely_locked(file_id, db_dir, logger):
-                    conn.rollback()
-                    logger.warning(
-                        f"[LOCK] Session {session_id[:8]}... DENIED lock for file {file_id[:8]}...: "
-                        f"file is locked on a remote instance"
-                    )
-                    return False
-
-                # No lock at all, create new one
-                logger.debug(f"[LOCK] No existing lock found for file {file_id[:8]}...")
-                cursor.execute("""
-                    INSERT INTO locks (file_id, session_id, updated_at)
-                    VALUES (?, ?, CURRENT_TIMESTAMP)
-                """, (file_id, session_id))
-                conn.commit()
-                logger.info(f"[LOCK] Session {session_id[:8]}... acquired NEW lock for file {file_id[:8]}...")
-                return True
-        except Exception as e:
-            conn.rollback()
-            logger.error(f"[LOCK] Error during lock acquisition: {e}")
-            raise
-
+    try:
+        return get_lock_manager(db_dir).acquire(file_id, session_id, logger)
+    except sqlite3.Error as e:
+        logger.error(f"[LOCK] Error during lock acquisition: {e}")
+        raise RuntimeError(f"Database error: {e}")
 
-_REMOTE_LOCK_TTL_SECONDS = 90 + 360  # local timeout + one sync-cycle buffer
 
+def renew_locks(file_ids: List[str], session_id: str, db_dir: Path, logger: logging.Logger) -> Dict[str, bool]:
+    """
+    Refreshes the locks of a session on several files at once (batched heartbeat).
 
-def _is_remotely_locked(file_id: str, db_dir: Path, logger: logging.Logger) -> bool:
-    """Check the remote lock cache to see if another instance holds this file.
+    All locks are written in one transaction. Only locks held by the session
+    are refreshed; locks that were released, expired and removed, or taken
+    over by another session are not acquired again.
 
     Args:
-        file_id: The file's stable_id.
-        db_dir: Application db directory (contains metadata.db).
-        logger: Logger instance.
+        file_ids: The files' stable_ids
+        session_id: The session ID holding the locks
+        db_dir: Directory containing locks.db
+        logger: Logger instance
 
     Returns:
-        True if a non-expired remote lock exists for this file.
+        dict: Maps each file stable_id to True if its lock was refreshed, False if the lock is lost
+
+    Raises:
+        RuntimeError: If database operations fail
     """
+    logger.debug(f"[LOCK] Session {session_id[:8]}... refreshing {len(file_ids)} locks")
+
+    # Ensure database is initialized
+    init_locks_db(db_dir, logger)
+
     try:
-        from fastapi_app.lib.core.database import DatabaseManager
-        from fastapi_app.lib.repository.file_repository import FileRepository
-        repo = FileRepository(DatabaseManager(db_dir / "metadata.db"))
-        remote_locks = repo.get_remote_locks()
-        if file_id not in remote_locks:
-            return False
-        lock_info = remote_locks[file_id]
-        updated_at_str = lock_info.get("updated_at") or lock_info.get("acquired_at", "")
-        if not updated_at_str:
-            return False
-        updated_at = datetime.fromisoformat(updated_at_str)
-        if updated_at.tzinfo is None:
-            updated_at = updated_at.replace(tzinfo=timezone.utc)
-        age_seconds = (datetime.now(timezone.utc) - updated_at).total_seconds()
-        return age_seconds < _REMOTE_LOCK_TTL_SECONDS
-    except Exception as exc:
-        logger.debug(f"[LOCK] Remote lock check failed (non-fatal): {exc}")
-        return False
+        results = get_lock_manager(db_dir).renew_many(file_ids, session_id)
+    except sqlite3.Error as e:
+        logger.error(f"[LOCK] Error during lock renewal: {e}")
+        raise RuntimeError(f"Database error: {e}")
+
+    for file_id, renewed in results.items():
+        if not renewed:
+            logger.warning(f"[LOCK] Session {session_id[:8]}... lost lock for file {file_id[:8]}...")
+    return results
 
 
 def release_lock(file_id: str, session_id: str, db_dir: Path, logger: logging.Logger) -> Dict[str, str]:
@@ -351,52 +268,40 @@ def release_lock(file_id: str, session_id: str, db_dir: Path, logger: logging.Lo
     # Ensure database is initialized
     init_locks_db(db_dir, logger)
 
-    with get_db_connection(db_dir, logger) as conn:
-        cursor = conn.cursor()
-
-        # Check if lock exists and who owns it
-        cursor.execute("""
-            SELECT session_id
-            FROM locks
-            WHERE file_id = ?
-        """, (file_id,))
-
-        existing = cursor.fetchone()
-
-        if existing:
-            existing_session = existing['session_id']
-            if existing_session == session_id:
-                # Delete the lock
-                cursor.execute("""
-                    DELETE FROM locks
-                    WHERE file_id = ?
-                """, (file_id,))
-                logger.info(f"[LOCK] Session {session_id[:8]}... released lock for file {file_id[:8]}...")
-                return {
-                    "status": "success",
-                    "action": "released",
-                    "message": f"Lock successfully released for file {file_id}"
-                }
-            else:
-                # Attempting to release someone else's lock
-                logger.warning(
-                    f"[LOCK] Session {session_id[:8]}... DENIED release of lock for file {file_id[:8]}.... "
-                    f"Owned by {existing_session[:8]}..."
-                )
-                raise RuntimeError(
-                    f"Session {session_id} attempted to release a lock owned by {existing_session}"
-                )
-        else:
-            # Lock doesn't exist - idempotent success
-            logger.info(
-                f"[LOCK] Session {session_id[:8]}... attempted to release lock for file {file_id[:8]}..., "
-                f"but no lock exists (idempotent success)"
-            )
-            return {
-                "status": "success",
-                "action": "already_released",
-                "message": f"Lock was already released for file {file_id}"
-            }
+    try:
+        lease = get_lock_manager(db_dir).release(file_id, session_id)
+    except sqlite3.Error as e:
+        logger.error(f"Database error: {e}")
+        raise RuntimeError(f"Database error: {e}")
+
+    if lease is None:
+        # Lock doesn't exist - idempotent success
+        logger.info(
+            f"[LOCK] Session {session_id[:8]}... attempted to release lock for file {file_id[:8]}..., "
+            f"but no lock exists (idempotent success)"
+        )
+        return {
+            "status": "success",
+            "action": "already_released",
+            "message": f"Lock was already released for file {file_id}"
+        }
+
+    if lease.session_id != session_id:
+        # Attempting to release someone else's lock
+        logger.warning(
+            f"[LOCK] Session {session_id[:8]}... DENIED release of lock for file {file_id[:8]}.... "
+            f"Owned by {lease.session_id[:8]}..."
+        )
+        raise RuntimeError(
+            f"Session {session_id} attempted to release a lock owned by {lease.session_id}"
+        )
+
+    logger.info(f"[LOCK] Session {session_id[:8]}... released lock for file {file_id[:8]}...")
+    return {
+        "status": "success",
+        "action": "released",
+        "message": f"Lock successfully released for file {file_id}"
+    }
 
 
 def cleanup_stale_locks(db_dir: Path, logger: logging.Logger, timeout_seconds: int = LOCK_TIMEOUT_SECONDS) -> int:
@@ -419,27 +324,40 @@ def cleanup_stale_locks(db_dir: Path, logger: logging.Logger, timeout_seconds: i
         return 0
 
     try:
-        with get_db_connection(db_dir, logger) as conn:
-            cursor = conn.cursor()
+        purged_count = get_lock_manager(db_dir).purge_expired(timeout_seconds)
+        if purged_count > 0:
+            logger.info(f"Purged {purged_count} stale locks")
+        return purged_count
+    except Exception as e:
+        logger.error(f"Error purging stale locks: {e}")
+        return 0
 
-            # Calculate the staleness threshold
-            stale_threshold = datetime.now(timezone.utc) - timedelta(seconds=timeout_seconds)
 
-            # Delete stale locks
-            cursor.execute("""
-                DELETE FROM locks
-                WHERE datetime(updated_at) < datetime(?)
-            """, (stale_threshold.isoformat(),))
+def expire_stale_locks(db_dir: Path, logger: logging.Logger, timeout_seconds: int = LOCK_TIMEOUT_SECONDS) -> Dict[str, str]:
+    """
+    Removes all stale locks from the database and returns them.
 
-            purged_count = cursor.rowcount
+    Unlike cleanup_stale_locks(), reports which locks expired, so that the
+    expiry can be announced to clients. Each lock is reported by one caller
+    only, also with several worker processes.
 
-            if purged_count > 0:
-                logger.info(f"Purged {purged_count} stale locks")
+    Args:
+        db_dir: Directory containing locks.db
+        logger: Logger instance
+        timeout_seconds: Lock timeout in seconds
 
-            return purged_count
+    Returns:
+        dict: Maps the file stable_ids of the removed locks to the session IDs that held them
+    """
+    try:
+        init_locks_db(db_dir, logger)
+        expired = get_lock_manager(db_dir).expire(timeout_seconds)
     except Exception as e:
-        logger.error(f"Error purging stale locks: {e}")
-        return 0
+        logger.error(f"Error expiring stale locks: {e}")
+        return {}
+    if expired:
+        logger.info(f"Expired {len(expired)} stale locks")
+    return expired
 
 
 def get_all_active_locks(db_dir: Path, logger: logging.Logger, timeout_seconds: int = LOCK_TIMEOUT_SECONDS) -> Dict[str, str]:
@@ -462,22 +380,7 @@ def get_all_active_locks(db_dir: Path, logger: logging.Logger, timeout_seconds:
         return {}
 
     try:
-        with get_db_connection(db_dir, logger) as conn:
-            cursor = conn.cursor()
-
-            # Calculate the staleness threshold
-            stale_threshold = datetime.now(timezone.utc) - timedelta(seconds=timeout_seconds)
-
-            # Get all non-stale locks
-            cursor.execute("""
-                SELECT file_id, session_id
-                FROM locks
-                WHERE datetime(updated_at) >= datetime(?)
-            """, (stale_threshold.isoformat(),))
-
-            active_locks = {row['file_id']: row['session_id'] for row in cursor.fetchall()}
-
-            return active_locks
+        return get_lock_manager(db_dir).active_locks(timeout_seconds)
     except Exception as e:
         logger.error(f"Error fetching active locks: {e}")
         return {}
@@ -550,3 +453,4 @@ def reset_locks_db_initialized() -> None:
     """
     with _locks_db_init_lock:
         _locks_db_initialized.clear()
+    close_lock_managers()
@@ -22,6 +22,12 @@ from fastapi_app.lib.core.migrations.versions.m006_add_last_revision_column impo
 from fastapi_app.lib.core.migrations.versions.m007_add_created_by_column import (
     Migration007AddCreatedByColumn,
 )
+from fastapi_app.lib.core.migrations.versions.m009_add_file_changes_log import (
+    Migration009AddFileChangesLog,
+)
+from fastapi_app.lib.core.migrations.versions.m010_add_file_collections_table import (
+    Migration010AddFileCollectionsTable,
+)
 
 
 class TestMigrations005To007(unittest.TestCase):
@@ -58,6 +64,8 @@ class TestMigrations005To007(unittest.TestCase):
         manager.register_migration(Migration005AddStatusColumn(self.logger))
         manager.register_migration(Migration006AddLastRevisionColumn(self.logger))
         manager.register_migration(Migration007AddCreatedByColumn(self.logger))
+        manager.register_migration(Migration009AddFileChangesLog(self.logger))
+        manager.register_migration(Migration010AddFileCollectionsTable(self.logger))
         manager.rollback_migration(4)
 
     def _rollback_to_version_5(self):
@@ -65,12 +73,16 @@ class TestMigrations005To007(unittest.TestCase):
         manager = MigrationManager(self.db_path, self.logger)
         manager.register_migration(Migration006AddLastRevisionColumn(self.logger))
         manager.register_migration(Migration007AddCreatedByColumn(self.logger))
+        manager.register_migration(Migration009AddFileChangesLog(self.logger))
+        manager.register_migration(Migration010AddFileCollectionsTable(self.logger))
         manager.rollback_migration(5)
 
     def _rollback_to_version_6(self):
         """Roll back migrations to version 6 (pre-migration-007 state)."""
         manager = MigrationManager(self.db_path, self.logger)
         manager.register_migration(Migration007AddCreatedByColumn(self.logger))
+        manager.register_migration(Migration009AddFileChangesLog(self.logger))
+        manager.register_migration(Migration010AddFileCollectionsTable(self.logger))
         manager.rollback_migration(6)
 
     def _create_test_tei_file(self, file_id: str, status: str = "draft") -> bytes:
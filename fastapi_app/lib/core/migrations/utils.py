@@ -149,19 +149,17 @@ def repopulate_column_from_tei_files(
     logger.info(f"Found {total_files} TEI file(s) to process")
 
     # Import here to avoid circular dependencies during module loading
-    from fastapi_app.lib.utils.hash_utils import get_storage_path
+    from fastapi_app.lib.storage.file_storage import read_storage_file
 
     for file_id, file_type in tei_files:
         try:
-            # Get storage path and read file content directly
-            storage_path = get_storage_path(files_dir, file_id, file_type)
-            if not storage_path.exists():
+            # Read file content directly (decoding compressed files)
+            content = read_storage_file(files_dir, file_id, file_type)
+            if content is None:
                 file_id_short = file_id[:8] if len(file_id) >= 8 else file_id
                 logger.warning(f"File not found in storage: {file_id_short}")
                 continue
 
-            content = storage_path.read_bytes()
-
             # Extract value from XML
             value = extract_function(content)
 
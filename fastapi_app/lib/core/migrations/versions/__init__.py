@@ -15,10 +15,14 @@ from .m005_add_status_column import Migration005AddStatusColumn
 from .m006_add_last_revision_column import Migration006AddLastRevisionColumn
 from .m007_add_created_by_column import Migration007AddCreatedByColumn
 from .m008_change_primary_key import Migration008ChangePrimaryKey
+from .m009_add_file_changes_log import Migration009AddFileChangesLog
+from .m010_add_file_collections_table import Migration010AddFileCollectionsTable
+from .m011_locks_expires_at import Migration011LocksExpiresAt
 
 # Migrations by target database
 LOCKS_MIGRATIONS = [
     Migration001LocksFileId,
+    Migration011LocksExpiresAt,
 ]
 
 METADATA_MIGRATIONS = [
@@ -29,6 +33,8 @@ METADATA_MIGRATIONS = [
     Migration006AddLastRevisionColumn,
     Migration007AddCreatedByColumn,
     Migration008ChangePrimaryKey,
+    Migration009AddFileChangesLog,
+    Migration010AddFileCollectionsTable,
 ]
 
 # Permissions database migrations (for future schema changes)
@@ -45,6 +51,9 @@ ALL_MIGRATIONS = [
     Migration006AddLastRevisionColumn,
     Migration007AddCreatedByColumn,
     Migration008ChangePrimaryKey,
+    Migration009AddFileChangesLog,
+    Migration010AddFileCollectionsTable,
+    Migration011LocksExpiresAt,
 ]
 
 __all__ = ["ALL_MIGRATIONS", "LOCKS_MIGRATIONS", "METADATA_MIGRATIONS", "PERMISSIONS_MIGRATIONS"]
@@ -0,0 +1,139 @@
+"""
+Migration 009: Add file_changes log for incremental file list snapshots
+
+Adds an append-only change log that records the doc_id of every document
+whose file rows were inserted, updated or deleted. The log is filled by
+triggers, so every write path (including sync and migrations) is covered,
+and every worker process sharing metadata.db sees the same monotonically
+increasing version number.
+
+Before: /api/files/list had to rebuild the whole document tree on every call
+After: The file list snapshot only reloads documents changed since its version
+"""
+
+import sqlite3
+from fastapi_app.lib.core.migrations.base import Migration
+
+
+# Number of change entries kept in the log. Clients whose version is older
+# than the retained window receive a full file list instead of a delta.
+FILE_CHANGES_RETENTION = 10000
+
+
+class Migration009AddFileChangesLog(Migration):
+    """
+    Add file_changes table and triggers on files and sync_metadata.
+
+    Schema changes:
+    1. Create file_changes table (version AUTOINCREMENT, doc_id)
+    2. Create triggers on files that log the affected doc_id(s)
+    3. Create trigger on sync_metadata that logs remote lock changes (doc_id NULL)
+    4. Create trigger that prunes entries outside the retention window
+    """
+
+    @property
+    def version(self) -> int:
+        return 9
+
+    @property
+    def description(self) -> str:
+        return "Add file_changes log for incremental file list snapshots"
+
+    def check_can_apply(self, conn: sqlite3.Connection) -> bool:
+        """
+        Check if migration can be applied.
+
+        Returns False if the file_changes table already exists.
+        """
+        cursor = conn.execute("""
+            SELECT name FROM sqlite_master
+            WHERE type='table' AND name IN ('files', 'file_changes')
+        """)
+        tables = {row[0] for row in cursor.fetchall()}
+
+        if "file_changes" in tables:
+            self.logger.info("Migration already applied (file_changes table exists)")
+            return False
+
+        if "files" not in tables:
+            self.logger.info("Files table does not exist yet, skipping migration")
+            return False
+
+        return True
+
+    def upgrade(self, conn: sqlite3.Connection) -> None:
+        """
+        Apply migration: create change log table and triggers.
+        """
+        self.logger.info("Creating file_changes log")
+
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS file_changes (
+                version INTEGER PRIMARY KEY AUTOINCREMENT,
+                doc_id TEXT,               -- NULL = remote lock state changed
+                changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_files_log_insert
+            AFTER INSERT ON files
+            BEGIN
+                INSERT INTO file_changes (doc_id) VALUES (NEW.doc_id);
+            END
+        """)
+
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_files_log_update
+            AFTER UPDATE ON files
+            BEGIN
+                INSERT INTO file_changes (doc_id) VALUES (NEW.doc_id);
+                INSERT INTO file_changes (doc_id)
+                    SELECT OLD.doc_id WHERE OLD.doc_id IS NOT NEW.doc_id;
+            END
+        """)
+
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_files_log_delete
+            AFTER DELETE ON files
+            BEGIN
+                INSERT INTO file_changes (doc_id) VALUES (OLD.doc_id);
+            END
+        """)
+
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_remote_locks_log
+            AFTER INSERT ON sync_metadata
+            WHEN NEW.key = 'remote_locks'
+            BEGIN
+                INSERT INTO file_changes (doc_id) VALUES (NULL);
+            END
+        """)
+
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_file_changes_prune
+            AFTER INSERT ON file_changes
+            WHEN NEW.version % 1000 = 0
+            BEGIN
+                DELETE FROM file_changes
+                WHERE version <= NEW.version - {FILE_CHANGES_RETENTION};
+            END
+        """)
+
+        self.logger.info("file_changes log created successfully")
+
+    def downgrade(self, conn: sqlite3.Connection) -> None:
+        """
+        Revert migration: drop triggers and change log table.
+        """
+        self.logger.info("Removing file_changes log")
+        for trigger in (
+            "trg_files_log_insert",
+            "trg_files_log_update",
+            "trg_files_log_delete",
+            "trg_remote_locks_log",
+            "trg_file_changes_prune",
+        ):
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        conn.execute("DROP TABLE IF EXISTS file_changes")
+        self.logger.info("file_changes log removed successfully")
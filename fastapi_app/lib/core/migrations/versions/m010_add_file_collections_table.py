@@ -0,0 +1,133 @@
+"""
+Migration 010: Add file_collections membership table
+
+Adds a normalized (collection_id, stable_id) table that mirrors the JSON
+doc_collections array of every file row. The table is filled from existing
+rows and kept in sync by triggers, so every write path (repository, sync,
+imports, other migrations) is covered.
+
+Before: Collection queries scanned all files with
+        json_extract(doc_collections, '$') LIKE '%"collection"%'
+After: Collection queries are index seeks on file_collections
+"""
+
+import sqlite3
+from fastapi_app.lib.core.migrations.base import Migration
+
+
+# (stable_id, collection_id) rows for the collection ids in doc_collections.
+# Invalid or NULL JSON yields no rows instead of an error.
+_COLLECTIONS_OF = """
+    SELECT {row}.stable_id, value FROM {tables}json_each(
+        CASE WHEN json_valid({row}.doc_collections) THEN {row}.doc_collections ELSE '[]' END
+    )
+    WHERE type = 'text'
+"""
+
+
+class Migration010AddFileCollectionsTable(Migration):
+    """
+    Add file_collections table and triggers on files.
+
+    Schema changes:
+    1. Create file_collections table (collection_id, stable_id) with index on stable_id
+    2. Populate it from files.doc_collections
+    3. Create insert/update/delete triggers on files that keep it in sync
+    """
+
+    @property
+    def version(self) -> int:
+        return 10
+
+    @property
+    def description(self) -> str:
+        return "Add file_collections membership table"
+
+    def check_can_apply(self, conn: sqlite3.Connection) -> bool:
+        """
+        Check if migration can be applied.
+
+        Returns False if the file_collections table already exists.
+        """
+        cursor = conn.execute("""
+            SELECT name FROM sqlite_master
+            WHERE type='table' AND name IN ('files', 'file_collections')
+        """)
+        tables = {row[0] for row in cursor.fetchall()}
+
+        if "file_collections" in tables:
+            self.logger.info("Migration already applied (file_collections table exists)")
+            return False
+
+        if "files" not in tables:
+            self.logger.info("Files table does not exist yet, skipping migration")
+            return False
+
+        return True
+
+    def upgrade(self, conn: sqlite3.Connection) -> None:
+        """
+        Apply migration: create membership table, populate it and add triggers.
+        """
+        self.logger.info("Creating file_collections table")
+
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS file_collections (
+                collection_id TEXT NOT NULL,
+                stable_id TEXT NOT NULL,
+                PRIMARY KEY (collection_id, stable_id)
+            ) WITHOUT ROWID
+        """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_file_collections_stable_id "
+            "ON file_collections(stable_id)"
+        )
+
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO file_collections (stable_id, collection_id) "
+            + _COLLECTIONS_OF.format(row="files", tables="files, ")
+        )
+        self.logger.info(f"Indexed {cursor.rowcount} collection memberships")
+
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_file_collections_insert
+            AFTER INSERT ON files
+            BEGIN
+                INSERT OR IGNORE INTO file_collections (stable_id, collection_id)
+                {_COLLECTIONS_OF.format(row="NEW", tables="")};
+            END
+        """)
+
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_file_collections_update
+            AFTER UPDATE OF stable_id, doc_collections ON files
+            BEGIN
+                DELETE FROM file_collections WHERE stable_id = OLD.stable_id;
+                INSERT OR IGNORE INTO file_collections (stable_id, collection_id)
+                {_COLLECTIONS_OF.format(row="NEW", tables="")};
+            END
+        """)
+
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_file_collections_delete
+            AFTER DELETE ON files
+            BEGIN
+                DELETE FROM file_collections WHERE stable_id = OLD.stable_id;
+            END
+        """)
+
+        self.logger.info("file_collections table created successfully")
+
+    def downgrade(self, conn: sqlite3.Connection) -> None:
+        """
+        Revert migration: drop triggers and membership table.
+        """
+        self.logger.info("Removing file_collections table")
+        for trigger in (
+            "trg_file_collections_insert",
+            "trg_file_collections_update",
+            "trg_file_collections_delete",
+        ):
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        conn.execute("DROP TABLE IF EXISTS file_collections")
+        self.logger.info("file_collections table removed successfully")
@@ -0,0 +1,79 @@
+"""
+Migration 011: Add indexed lease expiry to locks
+
+Adds locks.expires_at, the Unix time at which a lock expires, as a generated
+column computed from updated_at, with an index. Every writer of updated_at
+(including older code and tools) therefore keeps the expiry correct.
+
+Before: Active locks were found with datetime(updated_at) >= datetime(?),
+        which cannot use an index
+After: Active locks are found with expires_at > ? (index range scan on an
+       integer)
+"""
+
+import sqlite3
+from fastapi_app.lib.core.migrations.base import Migration
+
+# Lease duration, equal to locking.LOCK_TIMEOUT_SECONDS at the time of the
+# migration (a generated column cannot refer to application settings)
+LEASE_SECONDS = 90
+
+
+class Migration011LocksExpiresAt(Migration):
+    """
+    Add generated expires_at column and index to the locks table.
+
+    Schema changes:
+    1. Add expires_at INTEGER, generated from updated_at + LEASE_SECONDS
+    2. Create index idx_locks_expires_at on expires_at
+    """
+
+    @property
+    def version(self) -> int:
+        return 11
+
+    @property
+    def description(self) -> str:
+        return "Add indexed lease expiry (expires_at) to locks"
+
+    def check_can_apply(self, conn: sqlite3.Connection) -> bool:
+        """
+        Check if migration can be applied.
+
+        Returns False if the expires_at column already exists.
+        """
+        cursor = conn.execute("PRAGMA table_xinfo(locks)")
+        columns = {row[1] for row in cursor.fetchall()}
+
+        if "expires_at" in columns:
+            self.logger.info("Migration already applied (expires_at column exists)")
+            return False
+
+        # Checks run before any migration is applied: on a new database the
+        # table still has file_hash, and migration 001 runs first
+        if "file_id" not in columns and "file_hash" not in columns:
+            self.logger.info("Locks table does not exist yet, skipping migration")
+            return False
+
+        return True
+
+    def upgrade(self, conn: sqlite3.Connection) -> None:
+        """
+        Apply migration: add generated column and index.
+        """
+        self.logger.info("Adding expires_at column to locks")
+        conn.execute(f"""
+            ALTER TABLE locks ADD COLUMN expires_at INTEGER
+            GENERATED ALWAYS AS (CAST(strftime('%s', updated_at) AS INTEGER) + {LEASE_SECONDS}) VIRTUAL
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_locks_expires_at ON locks(expires_at)")
+        self.logger.info("Migration complete: locks have an indexed expiry")
+
+    def downgrade(self, conn: sqlite3.Connection) -> None:
+        """
+        Revert migration: drop index and column.
+        """
+        self.logger.info("Removing expires_at column from locks")
+        conn.execute("DROP INDEX IF EXISTS idx_locks_expires_at")
+        conn.execute("ALTER TABLE locks DROP COLUMN expires_at")
+        self.logger.info("Downgrade complete: expires_at removed")
@@ -2,6 +2,8 @@
 XML/TEI schema validation module.
 
 Provides validation against XSD and RelaxNG schemas with timeout protection.
+Validation runs in a pool of long-lived worker processes that cache compiled
+schemas, so stuck validations can be killed without affecting the server.
 Framework-agnostic design using dependency injection.
 
 Ported from server/api/validate.py for FastAPI migration.
@@ -9,10 +11,11 @@ Ported from server/api/validate.py for FastAPI migration.
 
 import os
 import re
-import json
-import subprocess
-import tempfile
+import time
+import atexit
 import logging
+import threading
+import multiprocessing
 from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 from lxml import etree  # type: ignore
@@ -28,6 +31,12 @@ XSD_NAMESPACE = "http://www.w3.org/2001/XMLSchema"
 # Validation timeout in seconds
 VALIDATION_TIMEOUT = 30
 
+# Number of validator worker processes (started on demand)
+VALIDATOR_POOL_SIZE = int(os.environ.get("VALIDATOR_POOL_SIZE", min(4, os.cpu_count() or 1)))
+
+# Maximum number of compiled schemas kept per worker
+WORKER_SCHEMA_CACHE_SIZE = 8
+
 # Known schemas with special handling requirements
 SCHEMA_CONFIG = {
     "https://raw.githubusercontent.com/kermitt2/grobid/refs/heads/master/grobid-home/schemas/rng/Grobid.rng": {
@@ -47,63 +56,304 @@ class ValidationError(Exception):
     pass
 
 
-def create_validation_script() -> str:
+def _validator_worker_main(conn) -> None:
     """
-    Create a standalone validation script that can be run in a subprocess.
+    Main loop of a validator worker process.
 
-    Returns:
-        Python script as string
+    Receives (schema_file, namespace_type, xml_bytes) tuples over the pipe and
+    answers with a result dict. Compiled schemas are kept in memory, keyed by
+    schema cache path and invalidated when the file's mtime changes.
+
+    Args:
+        conn: Child end of a multiprocessing pipe
     """
-    return '''#!/usr/bin/env python3
-import sys
-import json
-from lxml import etree
-from lxml.etree import XMLSyntaxError, XMLSchema, RelaxNG, DocumentInvalid
+    import signal
+    # Ctrl+C is handled by the parent, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
 
-def main():
-    if len(sys.argv) != 4:
-        print(json.dumps({"error": "Usage: script.py <schema_file> <xml_file> <namespace_type>"}))
-        sys.exit(1)
+    schemas: Dict[str, Tuple[int, object]] = {}
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            break
+        if request is None:
+            break
 
-    schema_file, xml_file, namespace_type = sys.argv[1:4]
+        schema_file, namespace_type, xml_bytes = request
+        try:
+            mtime = os.stat(schema_file).st_mtime_ns
+            cached = schemas.get(schema_file)
+            compiled = cached is None or cached[0] != mtime
+            if compiled:
+                schema_tree = etree.parse(schema_file)
+                if namespace_type == RELAXNG_NAMESPACE:
+                    schema = etree.RelaxNG(schema_tree)
+                else:
+                    schema = etree.XMLSchema(schema_tree)
+                schemas.pop(schema_file, None)
+                schemas[schema_file] = (mtime, schema)
+                while len(schemas) > WORKER_SCHEMA_CACHE_SIZE:
+                    del schemas[next(iter(schemas))]
+            else:
+                schema = cached[1]  # type: ignore[index]
+
+            validation_xmldoc = etree.XML(xml_bytes, etree.XMLParser())
+
+            errors = []
+            if not schema.validate(validation_xmldoc):  # type: ignore[attr-defined]
+                for error in schema.error_log:  # type: ignore[attr-defined]
+                    errors.append({
+                        "message": error.message.replace("{http://www.tei-c.org/ns/1.0}", "tei:"),
+                        "line": max(1, error.line),
+                        "column": max(0, error.column)
+                    })
+            response = {"success": True, "errors": errors, "compiled": compiled}
+        except Exception as e:
+            response = {"success": False, "error": str(e)}
 
-    try:
-        # Parse schema
-        schema_tree = etree.parse(schema_file)
+        try:
+            conn.send(response)
+        except (EOFError, OSError):
+            break
 
-        # Parse XML
-        with open(xml_file, 'rb') as f:
-            xml_bytes = f.read()
 
-        parser = etree.XMLParser()
-        validation_xmldoc = etree.XML(xml_bytes, parser)
+class _ValidatorWorker:
+    """Handle for a single validator worker process."""
 
-        # Load schema based on type
-        if namespace_type == "http://relaxng.org/ns/structure/1.0":
-            schema = RelaxNG(schema_tree)
-        else:
-            schema = XMLSchema(schema_tree)
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_validator_worker_main,
+            args=(child_conn,),
+            name="schema-validator",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        # Schema files this worker has compiled (used to route requests to warm workers)
+        self.schemas: set = set()
 
-        # Perform validation
-        errors = []
+    def stop(self, kill: bool = False) -> None:
+        """Stop the worker, killing it if it is stuck."""
         try:
-            schema.assertValid(validation_xmldoc)
-        except DocumentInvalid:
-            for error in schema.error_log:
-                errors.append({
-                    "message": error.message.replace("{http://www.tei-c.org/ns/1.0}", "tei:"),
-                    "line": max(1, error.line),
-                    "column": max(0, error.column)
-                })
+            if kill:
+                self.process.kill()
+            else:
+                self.conn.send(None)
+            self.process.join(timeout=2)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join(timeout=2)
+        except Exception:
+            pass
+        finally:
+            self.conn.close()
+
+
+class ValidatorPool:
+    """
+    Pool of long-lived validator worker processes.
 
-        print(json.dumps({"success": True, "errors": errors}))
+    Workers are started on demand up to `size` and keep compiled RelaxNG/XSD
+    schemas cached, so that only the first validation against a schema pays
+    for interpreter start-up and schema compilation. Documents are sent over
+    a pipe. A worker that exceeds the timeout is killed and replaced in the
+    background; a worker that crashes is replaced on the next request.
 
-    except Exception as e:
-        print(json.dumps({"success": False, "error": str(e)}))
+    Thread-safe: request handlers running in the threadpool share one pool.
+    """
 
-if __name__ == "__main__":
-    main()
-'''
+    def __init__(self, size: int = VALIDATOR_POOL_SIZE):
+        self.size = max(1, size)
+        self._ctx = multiprocessing.get_context("spawn")
+        self._cond = threading.Condition()
+        self._idle: List[_ValidatorWorker] = []
+        self._worker_count = 0
+        self._closed = False
+        self._stats = {
+            "requests": 0,
+            "schema_compiles": 0,
+            "schema_cache_hits": 0,
+            "timeouts": 0,
+            "crashes": 0,
+            "workers_started": 0,
+            "wait_seconds": 0.0,
+            "validation_seconds": 0.0,
+        }
+
+    def validate(
+        self,
+        schema_file: str,
+        validation_xml_bytes: bytes,
+        namespace_type: str,
+        timeout: float = VALIDATION_TIMEOUT
+    ) -> List[Dict]:
+        """
+        Validate XML bytes against a schema in a worker process.
+
+        Args:
+            schema_file: Path to the schema file
+            validation_xml_bytes: XML content as bytes
+            namespace_type: Schema namespace URI
+            timeout: Timeout in seconds (covers waiting for a free worker)
+
+        Returns:
+            List of validation error dictionaries
+
+        Raises:
+            ValidationTimeoutError: If validation times out
+            ValidationError: If validation fails or the worker dies
+        """
+        started = time.monotonic()
+        worker = self._acquire(schema_file, timeout)
+        acquired = time.monotonic()
+        remaining = max(0.0, timeout - (acquired - started))
+
+        healthy = False
+        try:
+            worker.conn.send((schema_file, namespace_type, validation_xml_bytes))
+            if not worker.conn.poll(remaining):
+                self._count("timeouts")
+                raise ValidationTimeoutError(f"Schema validation timed out after {timeout} seconds")
+            response = worker.conn.recv()
+            if response.get("success"):
+                worker.schemas.add(schema_file)
+            healthy = True
+        except (EOFError, OSError) as e:
+            self._count("crashes")
+            raise ValidationError(f"Validation worker failed: {e}")
+        finally:
+            self._release(worker, healthy)
+            with self._cond:
+                self._stats["requests"] += 1
+                self._stats["wait_seconds"] += acquired - started
+                self._stats["validation_seconds"] += time.monotonic() - acquired
+
+        if not response.get("success"):
+            raise ValidationError(response.get("error", "Unknown validation error"))
+
+        self._count("schema_compiles" if response.get("compiled") else "schema_cache_hits")
+        return response.get("errors", [])
+
+    def get_stats(self) -> Dict:
+        """
+        Get pool metrics.
+
+        Returns:
+            Dict with pool size, worker counts and cumulative counters
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "size": self.size,
+                "workers": self._worker_count,
+                "idle_workers": len(self._idle),
+                "busy_workers": self._worker_count - len(self._idle),
+            })
+        return stats
+
+    def shutdown(self) -> None:
+        """Stop all idle workers; busy workers are stopped when released."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._worker_count -= len(idle)
+            self._cond.notify_all()
+        for worker in idle:
+            worker.stop()
+
+    def _count(self, key: str) -> None:
+        with self._cond:
+            self._stats[key] += 1
+
+    def _acquire(self, schema_file: str, timeout: float) -> _ValidatorWorker:
+        """Take an idle worker (preferring one with the schema compiled) or start a new one."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise ValidationError("Validator pool is shut down")
+                if self._idle:
+                    for index, worker in enumerate(self._idle):
+                        if schema_file in worker.schemas:
+                            return self._idle.pop(index)
+                    return self._idle.pop()
+                if self._worker_count < self.size:
+                    self._worker_count += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ValidationTimeoutError(
+                        f"No validation worker available within {timeout} seconds"
+                    )
+                self._cond.wait(remaining)
+        return self._start_worker()
+
+    def _start_worker(self) -> _ValidatorWorker:
+        """Start a worker for a slot already reserved in _worker_count."""
+        try:
+            worker = _ValidatorWorker(self._ctx)
+        except Exception as e:
+            with self._cond:
+                self._worker_count -= 1
+                self._cond.notify()
+            raise ValidationError(f"Failed to start validation worker: {e}")
+        self._count("workers_started")
+        return worker
+
+    def _release(self, worker: _ValidatorWorker, healthy: bool) -> None:
+        """Return a worker to the pool, or kill it and start a replacement."""
+        with self._cond:
+            if healthy and not self._closed:
+                self._idle.append(worker)
+                self._cond.notify()
+                return
+            replace = not self._closed
+            if not replace:
+                self._worker_count -= 1
+                self._cond.notify()
+
+        worker.stop(kill=not healthy)
+        if replace:
+            # Keep the reserved slot and refill it without delaying the caller
+            threading.Thread(target=self._replace_worker, daemon=True).start()
+
+    def _replace_worker(self) -> None:
+        try:
+            worker = self._start_worker()
+        except ValidationError as e:
+            logger.error(str(e))
+            return
+        self._release(worker, True)
+
+
+_validator_pool: Optional[ValidatorPool] = None
+_validator_pool_lock = threading.Lock()
+
+
+def get_validator_pool() -> ValidatorPool:
+    """
+    Get the process-wide validator pool, creating it on first use.
+
+    Returns:
+        ValidatorPool instance
+    """
+    global _validator_pool
+    with _validator_pool_lock:
+        if _validator_pool is None:
+            _validator_pool = ValidatorPool()
+            atexit.register(_validator_pool.shutdown)
+        return _validator_pool
+
+
+def shutdown_validator_pool() -> None:
+    """Stop the process-wide validator pool (if started)."""
+    global _validator_pool
+    with _validator_pool_lock:
+        pool, _validator_pool = _validator_pool, None
+    if pool is not None:
+        pool.shutdown()
 
 
 def validate_with_timeout(
@@ -113,7 +363,7 @@ def validate_with_timeout(
     timeout: int = VALIDATION_TIMEOUT
 ) -> List[Dict]:
     """
-    Validate XML with a timeout using subprocess isolation.
+    Validate XML with a timeout using the persistent validator pool.
 
     Args:
         schema_file: Path to the schema file
@@ -128,59 +378,14 @@ def validate_with_timeout(
         ValidationTimeoutError: If validation times out
         ValidationError: If validation process fails
     """
-    # Create temporary files for the validation script and XML data
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as script_file:
-        script_file.write(create_validation_script())
-        script_path = script_file.name
-
-    with tempfile.NamedTemporaryFile(mode='wb', delete=False) as xml_file:
-        xml_file.write(validation_xml_bytes)
-        xml_path = xml_file.name
-
     try:
-        # Run validation in subprocess with timeout
-        # Use the Python executable directly instead of 'uv run python'
-        # to avoid dependency on uv being in PATH (e.g., in production systemd service)
-        import sys
-        result = subprocess.run(
-            [
-                sys.executable,
-                script_path,
-                schema_file,
-                xml_path,
-                namespace_type
-            ],
-            capture_output=True,
-            text=True,
-            timeout=timeout
+        return get_validator_pool().validate(
+            schema_file, validation_xml_bytes, namespace_type, timeout=timeout
         )
-
-        if result.returncode != 0:
-            raise ValidationError(f"Validation process failed: {result.stderr}")
-
-        # Parse the JSON response
-        try:
-            response = json.loads(result.stdout)
-            if response.get("success"):
-                return response.get("errors", [])
-            else:
-                raise ValidationError(response.get("error", "Unknown validation error"))
-        except json.JSONDecodeError:
-            raise ValidationError(f"Invalid response from validation process: {result.stdout}")
-
-    except subprocess.TimeoutExpired:
-        raise ValidationTimeoutError(f"Schema validation timed out after {timeout} seconds")
-    except ValidationError:
+    except (ValidationTimeoutError, ValidationError):
         raise
     except Exception as e:
         raise ValidationError(f"Validation failed: {str(e)}")
-    finally:
-        # Clean up temporary files
-        try:
-            os.unlink(script_path)
-            os.unlink(xml_path)
-        except OSError:
-            pass  # Ignore cleanup errors
 
 
 def extract_schema_locations(xml_string: str) -> List[Dict[str, str]]:
@@ -283,6 +488,83 @@ def download_schema_file(
         raise ValidationError(f"Failed to download schema: {str(e)}")
 
 
+def get_validation_timeout(schema_location: str) -> int:
+    """
+    Get the validation timeout for a schema, taking SCHEMA_CONFIG into account.
+
+    Args:
+        schema_location: URL of the schema
+
+    Returns:
+        Timeout in seconds
+    """
+    validation_timeout = VALIDATION_TIMEOUT
+    if schema_location in SCHEMA_CONFIG:
+        schema_config = SCHEMA_CONFIG[schema_location]
+        validation_timeout = schema_config.get("timeout", VALIDATION_TIMEOUT)
+        logger.debug(
+            f"Using custom timeout {validation_timeout}s for {schema_location}: "
+            f"{schema_config.get('reason', '')}"
+        )
+    return validation_timeout
+
+
+def resolve_schema(schema_location_info: Dict[str, str], cache_root: Path) -> Tuple[Path, str]:
+    """
+    Make sure a schema is in the local cache and determine its type.
+
+    Args:
+        schema_location_info: Dict as returned by extract_schema_locations()
+        cache_root: Root directory for schema cache
+
+    Returns:
+        Tuple of (schema_cache_file, root_namespace), where root_namespace is
+        RELAXNG_NAMESPACE or XSD_NAMESPACE
+
+    Raises:
+        ValidationError: If the schema cannot be downloaded or parsed
+    """
+    namespace = schema_location_info['namespace']
+    schema_location = schema_location_info['schemaLocation']
+    schema_type = schema_location_info.get('type', 'unknown')
+
+    schema_cache_dir, schema_cache_file, _ = get_schema_cache_info(schema_location, cache_root)
+
+    # Download schema if not cached
+    if not schema_cache_file.is_file():
+        logger.debug(f"Downloading schema from {schema_location} and caching it at {schema_cache_file}")
+        schema_cache_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            if schema_type == "relaxng":
+                # Download the RelaxNG schema file
+                download_schema_file(schema_location, schema_cache_dir, schema_cache_file)
+            else:
+                # For XSD, use xmlschema which handles includes/imports
+                xmlschema.download_schemas(str(schema_location), target=str(schema_cache_dir), save_remote=True)
+        except requests.HTTPError as e:
+            raise ValidationError(
+                f"Failed to download schema for {namespace} from {schema_location} - check the URL: {e}"
+            )
+        except xmlschema.XMLSchemaParseError as e:
+            raise ValidationError(
+                f"Failed to parse schema for {namespace} from {schema_location}: {str(e)}"
+            )
+    else:
+        logger.debug(f"Using cached version at {schema_cache_file}")
+
+    # Parse schema to determine actual type from file content
+    try:
+        schema_tree = etree.parse(str(schema_cache_file))
+        root_namespace = schema_tree.getroot().tag.split('}')[0][1:]
+    except Exception as e:
+        raise ValidationError(f"Failed to parse schema file {schema_cache_file}: {str(e)}")
+
+    if root_namespace not in [XSD_NAMESPACE, RELAXNG_NAMESPACE]:
+        raise ValidationError(f'Unsupported schema namespace: {root_namespace}')
+
+    return schema_cache_file, root_namespace
+
+
 def validate(xml_string: str, cache_root: Optional[Path] = None) -> List[Dict]:
     """
     Validate an XML string using the schema declaration in the document.
@@ -336,49 +618,8 @@ def validate(xml_string: str, cache_root: Optional[Path] = None) -> List[Dict]:
 
         logger.debug(f"Validating doc for namespace {namespace} with {schema_type} schema at {schema_location}")
 
-        # Check for schema-specific configuration
-        validation_timeout = VALIDATION_TIMEOUT
-        if schema_location in SCHEMA_CONFIG:
-            schema_config = SCHEMA_CONFIG[schema_location]
-            validation_timeout = schema_config.get("timeout", VALIDATION_TIMEOUT)
-            logger.debug(
-                f"Using custom timeout {validation_timeout}s for {schema_location}: "
-                f"{schema_config.get('reason', '')}"
-            )
-
-        schema_cache_dir, schema_cache_file, _ = get_schema_cache_info(schema_location, cache_root)
-
-        # Download schema if not cached
-        if not schema_cache_file.is_file():
-            logger.debug(f"Downloading schema from {schema_location} and caching it at {schema_cache_file}")
-            schema_cache_dir.mkdir(parents=True, exist_ok=True)
-            try:
-                if schema_type == "relaxng":
-                    # Download the RelaxNG schema file
-                    download_schema_file(schema_location, schema_cache_dir, schema_cache_file)
-                else:
-                    # For XSD, use xmlschema which handles includes/imports
-                    xmlschema.download_schemas(str(schema_location), target=str(schema_cache_dir), save_remote=True)
-            except requests.HTTPError as e:
-                raise ValidationError(
-                    f"Failed to download schema for {namespace} from {schema_location} - check the URL: {e}"
-                )
-            except xmlschema.XMLSchemaParseError as e:
-                raise ValidationError(
-                    f"Failed to parse schema for {namespace} from {schema_location}: {str(e)}"
-                )
-        else:
-            logger.debug(f"Using cached version at {schema_cache_file}")
-
-        # Parse schema to determine actual type from file content
-        try:
-            schema_tree = etree.parse(str(schema_cache_file))
-            root_namespace = schema_tree.getroot().tag.split('}')[0][1:]
-        except Exception as e:
-            raise ValidationError(f"Failed to parse schema file {schema_cache_file}: {str(e)}")
-
-        if root_namespace not in [XSD_NAMESPACE, RELAXNG_NAMESPACE]:
-            raise ValidationError(f'Unsupported schema namespace: {root_namespace}')
+        validation_timeout = get_validation_timeout(schema_location)
+        schema_cache_file, root_namespace = resolve_schema(sl, cache_root)
 
         # Prepare XML document for validation based on schema type
         if root_namespace == RELAXNG_NAMESPACE:
@@ -390,7 +631,7 @@ def validate(xml_string: str, cache_root: Optional[Path] = None) -> List[Dict]:
             # For XSD, use original XML
             validation_xml_bytes = xml_string.encode('utf-8') if isinstance(xml_string, str) else xml_string
 
-        # Perform validation with timeout protection using subprocess isolation
+        # Perform validation with timeout protection in the validator pool
         try:
             logger.debug(f"Starting validation with {validation_timeout}s timeout")
             validation_errors = validate_with_timeout(
@@ -3,14 +3,28 @@ Session management for PDF-TEI-Editor.
 
 This module provides SQLite-based session management with dependency injection.
 No Flask or FastAPI dependencies - all parameters are explicitly passed.
+
+Sessions are cached in memory per database file for SESSION_CACHE_TTL
+seconds, so validating a session on every request does not hit the database.
+Deletions are counted in sessions.db by a trigger; before serving a cached
+session the cache compares PRAGMA data_version of its own connection and,
+only if another connection has committed, re-reads the counter, so sessions
+deleted by other worker processes are dropped at once.
+Last-access updates are recorded in the cache and written to the database in
+batches at most every ACCESS_FLUSH_INTERVAL seconds (write-behind).
 """
 
+import os
+import sqlite3
+import threading
 import time
 import uuid
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, TypedDict
+from typing import Dict, Optional, TypedDict
 
-from fastapi_app.lib.core.db_utils import get_connection, init_database
+from fastapi_app.lib.core.db_utils import init_database
+from fastapi_app.lib.core.sqlite_utils import get_connection, open_connection
 
 
 class SessionDict(TypedDict):
@@ -32,8 +46,171 @@ CREATE TABLE IF NOT EXISTS sessions (
 
 CREATE INDEX IF NOT EXISTS idx_username ON sessions(username);
 CREATE INDEX IF NOT EXISTS idx_last_access ON sessions(last_access);
+
+-- Number of deleted sessions, watched by the session caches of all processes
+CREATE TABLE IF NOT EXISTS session_deletions (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    count INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO session_deletions (id, count) VALUES (1, 0);
+
+CREATE TRIGGER IF NOT EXISTS sessions_count_deletions AFTER DELETE ON sessions
+BEGIN
+    UPDATE session_deletions SET count = count + 1 WHERE id = 1;
+END;
 """
 
+# Seconds a cached session is trusted before it is re-read from the database.
+# Bounds how long changes other than deletions (e.g. last-access times written
+# by another worker process) take to show up here.
+SESSION_CACHE_TTL = float(os.environ.get("SESSION_CACHE_TTL", 30))
+SESSION_CACHE_SIZE = 10000
+# Seconds between batched writes of last-access times
+ACCESS_FLUSH_INTERVAL = float(os.environ.get("SESSION_ACCESS_FLUSH_INTERVAL", 10))
+
+
+class _SessionCache:
+    """
+    In-memory session cache with pending last-access times for one database.
+
+    Entries map session_id -> (session dict, time loaded). Pending access
+    times map session_id -> last_access not yet written to the database.
+
+    The generation is incremented by every invalidation. Readers take it
+    before querying the database and pass it to put(), which does not cache
+    rows read before an invalidation (e.g. a session deleted meanwhile).
+    Deletions by any process invalidate all entries (see _check_deletions()).
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[str, tuple[dict, float]]" = OrderedDict()
+        self.pending: Dict[str, float] = {}
+        self.last_flush = time.monotonic()
+        self.generation = 0
+        # Own connection: PRAGMA data_version only reports commits of other connections
+        self._conn: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+        self._deletions: Optional[int] = None
+
+    def get(self, session_id: str) -> Optional[dict]:
+        with self.lock:
+            if not self.entries:
+                return None
+            self._check_deletions()
+            entry = self.entries.get(session_id)
+            if entry is None:
+                return None
+            session, loaded_at = entry
+            if time.monotonic() - loaded_at > SESSION_CACHE_TTL:
+                del self.entries[session_id]
+                return None
+            self.entries.move_to_end(session_id)
+            return dict(session)
+
+    def put(self, session: dict, generation: int) -> dict:
+        with self.lock:
+            session = dict(session)
+            # A pending access time is newer than what the database returned
+            pending = self.pending.get(session['session_id'])
+            if pending is not None and pending > session['last_access']:
+                session['last_access'] = pending
+            self._check_deletions()
+            if generation != self.generation:
+                # Invalidated while the row was read, it may be deleted by now
+                return dict(session)
+            self.entries[session['session_id']] = (session, time.monotonic())
+            self.entries.move_to_end(session['session_id'])
+            while len(self.entries) > SESSION_CACHE_SIZE:
+                self.entries.popitem(last=False)
+            return dict(session)
+
+    def touch(self, session_id: str, access_time: float):
+        with self.lock:
+            entry = self.entries.get(session_id)
+            if entry is not None:
+                entry[0]['last_access'] = access_time
+            self.pending[session_id] = access_time
+
+    def discard(self, session_id: str):
+        with self.lock:
+            self.generation += 1
+            self.entries.pop(session_id, None)
+            self.pending.pop(session_id, None)
+
+    def discard_user(self, username: str):
+        with self.lock:
+            self.generation += 1
+            for session_id in [sid for sid, (session, _) in self.entries.items()
+                               if session['username'] == username]:
+                del self.entries[session_id]
+                self.pending.pop(session_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.entries.clear()
+
+    def _check_deletions(self):
+        """Drop all entries if sessions were deleted since the last check (lock must be held)."""
+        try:
+            if self._conn is None:
+                self._conn = open_connection(self.db_path)
+                self._conn.isolation_level = None
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._data_version:
+                return
+            row = self._conn.execute("SELECT count FROM session_deletions WHERE id = 1").fetchone()
+            deletions = row[0] if row else 0
+        except sqlite3.Error:
+            # Database replaced or unreadable: trust nothing, reconnect next time
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = None
+            self._data_version = self._deletions = None
+            self.generation += 1
+            self.entries.clear()
+            return
+        self._data_version = version
+        if deletions != self._deletions:
+            if self._deletions is not None:
+                self.generation += 1
+                self.entries.clear()
+            self._deletions = deletions
+
+    def take_pending(self, force: bool = False) -> Dict[str, float]:
+        """Remove and return pending access times if a flush is due."""
+        with self.lock:
+            now = time.monotonic()
+            if not self.pending or (not force and now - self.last_flush < ACCESS_FLUSH_INTERVAL):
+                return {}
+            pending, self.pending = self.pending, {}
+            self.last_flush = now
+            return pending
+
+
+_session_caches: Dict[str, _SessionCache] = {}
+_session_caches_lock = threading.Lock()
+
+
+def _get_session_cache(db_path: Path) -> _SessionCache:
+    """Get the session cache shared by all SessionManager instances for db_path."""
+    key = str(db_path)
+    with _session_caches_lock:
+        cache = _session_caches.get(key)
+        if cache is None:
+            cache = _session_caches[key] = _SessionCache(db_path)
+        return cache
+
+
+def flush_all_session_access_times():
+    """Write pending last-access times of all session databases (e.g. on shutdown)."""
+    with _session_caches_lock:
+        db_paths = list(_session_caches)
+    for db_path in db_paths:
+        SessionManager._flush(Path(db_path), _get_session_cache(Path(db_path)), force=True)
+
 
 class SessionManager:
     """
@@ -54,6 +231,7 @@ class SessionManager:
         self.db_dir = db_dir
         self.logger = logger
         self.db_path = db_dir / 'sessions.db'
+        self._cache = _get_session_cache(self.db_path)
         self._init_db()
 
     def _init_db(self):
@@ -73,15 +251,15 @@ class SessionManager:
         session_id = str(uuid.uuid4())
         current_time = time.time()
 
-        conn = get_connection(self.db_path)
-        conn.execute(
-            """
-            INSERT INTO sessions (session_id, username, created_at, last_access)
-            VALUES (?, ?, ?, ?)
-            """,
-            (session_id, username, current_time, current_time)
-        )
-        conn.commit()
+        with get_connection(self.db_path) as conn:
+            conn.execute(
+                """
+                INSERT INTO sessions (session_id, username, created_at, last_access)
+                VALUES (?, ?, ?, ?)
+                """,
+                (session_id, username, current_time, current_time)
+            )
+            conn.commit()
 
         if self.logger:
             self.logger.info(f"Created session {session_id} for user {username}")
@@ -101,24 +279,30 @@ class SessionManager:
         if not session_id:
             return None
 
-        conn = get_connection(self.db_path)
-        cursor = conn.execute(
-            """
-            SELECT session_id, username, created_at, last_access
-            FROM sessions
-            WHERE session_id = ?
-            """,
-            (session_id,)
-        )
-
-        row = cursor.fetchone()
+        session = self._cache.get(session_id)
+        if session is not None:
+            return session
+
+        generation = self._cache.generation
+        with get_connection(self.db_path) as conn:
+            cursor = conn.execute(
+                """
+                SELECT session_id, username, created_at, last_access
+                FROM sessions
+                WHERE session_id = ?
+                """,
+                (session_id,)
+            )
+
+            row = cursor.fetchone()
+
         if row:
-            return {
+            return self._cache.put({
                 'session_id': row['session_id'],
                 'username': row['username'],
                 'created_at': row['created_at'],
                 'last_access': row['last_access']
-            }
+            }, generation)
 
         return None
 
@@ -158,29 +342,39 @@ class SessionManager:
         """
         Update last access time for a session.
 
+        The new time is stored in the session cache immediately and written to
+        the database together with other pending updates once
+        ACCESS_FLUSH_INTERVAL has passed since the last write.
+
         Args:
             session_id: Session ID to update
 
         Returns:
             True if updated, False if session not found
         """
-        if not session_id:
+        if not session_id or not self.get_session(session_id):
             return False
 
-        current_time = time.time()
-
-        conn = get_connection(self.db_path)
-        cursor = conn.execute(
-            """
-            UPDATE sessions
-            SET last_access = ?
-            WHERE session_id = ?
-            """,
-            (current_time, session_id)
-        )
-        conn.commit()
-
-        return cursor.rowcount > 0
+        self._cache.touch(session_id, time.time())
+        self._flush(self.db_path, self._cache)
+        return True
+
+    def flush_access_times(self):
+        """Write all pending last-access times to the database."""
+        self._flush(self.db_path, self._cache, force=True)
+
+    @staticmethod
+    def _flush(db_path: Path, cache: _SessionCache, force: bool = False):
+        pending = cache.take_pending(force)
+        if not pending:
+            return
+        with get_connection(db_path) as conn:
+            # MAX() keeps newer times written by other worker processes
+            conn.executemany(
+                "UPDATE sessions SET last_access = MAX(last_access, ?) WHERE session_id = ?",
+                [(access_time, session_id) for session_id, access_time in pending.items()]
+            )
+            conn.commit()
 
     def delete_session(self, session_id: str) -> bool:
         """
@@ -202,12 +396,14 @@ class SessionManager:
 
         username = session['username']
 
-        conn = get_connection(self.db_path)
-        cursor = conn.execute(
-            "DELETE FROM sessions WHERE session_id = ?",
-            (session_id,)
-        )
-        conn.commit()
+        with get_connection(self.db_path) as conn:
+            cursor = conn.execute(
+                "DELETE FROM sessions WHERE session_id = ?",
+                (session_id,)
+            )
+            conn.commit()
+        # After the delete, so that no concurrent read can cache the row again
+        self._cache.discard(session_id)
 
         if cursor.rowcount > 0:
             if self.logger:
@@ -226,12 +422,13 @@ class SessionManager:
         Returns:
             Number of sessions deleted
         """
-        conn = get_connection(self.db_path)
-        cursor = conn.execute(
-            "DELETE FROM sessions WHERE username = ?",
-            (username,)
-        )
-        conn.commit()
+        with get_connection(self.db_path) as conn:
+            cursor = conn.execute(
+                "DELETE FROM sessions WHERE username = ?",
+                (username,)
+            )
+            conn.commit()
+        self._cache.discard_user(username)
 
         count = cursor.rowcount
 
@@ -250,34 +447,38 @@ class SessionManager:
         Returns:
             Number of sessions cleaned up
         """
+        self.flush_access_times()
+
         current_time = time.time()
         expiry_time = current_time - timeout_seconds
 
-        conn = get_connection(self.db_path)
+        with get_connection(self.db_path) as conn:
+            # Get expired sessions for logging
+            if self.logger:
+                cursor = conn.execute(
+                    """
+                    SELECT session_id, username
+                    FROM sessions
+                    WHERE last_access < ?
+                    """,
+                    (expiry_time,)
+                )
+                expired_sessions = cursor.fetchall()
 
-        # Get expired sessions for logging
-        if self.logger:
+                for row in expired_sessions:
+                    self.logger.info(
+                        f"Cleaning up expired session {row['session_id']} for user {row['username']}"
+                    )
+
+            # Delete expired sessions
             cursor = conn.execute(
-                """
-                SELECT session_id, username
-                FROM sessions
-                WHERE last_access < ?
-                """,
+                "DELETE FROM sessions WHERE last_access < ?",
                 (expiry_time,)
             )
-            expired_sessions = cursor.fetchall()
+            conn.commit()
 
-            for row in expired_sessions:
-                self.logger.info(
-                    f"Cleaning up expired session {row['session_id']} for user {row['username']}"
-                )
-
-        # Delete expired sessions
-        cursor = conn.execute(
-            "DELETE FROM sessions WHERE last_access < ?",
-            (expiry_time,)
-        )
-        conn.commit()
+        if cursor.rowcount > 0:
+            self._cache.clear()
 
         return cursor.rowcount
 
@@ -291,13 +492,14 @@ class SessionManager:
         Returns:
             Number of active sessions
         """
-        conn = get_connection(self.db_path)
-        cursor = conn.execute(
-            "SELECT COUNT(*) as count FROM sessions WHERE username = ?",
-            (username,)
-        )
+        with get_connection(self.db_path) as conn:
+            cursor = conn.execute(
+                "SELECT COUNT(*) as count FROM sessions WHERE username = ?",
+                (username,)
+            )
+
+            row = cursor.fetchone()
 
-        row = cursor.fetchone()
         return row['count'] if row else 0
 
     def get_all_sessions(self) -> list[SessionDict]:
@@ -307,21 +509,23 @@ class SessionManager:
         Returns:
             List of session dictionaries with keys: session_id, username, created_at, last_access
         """
-        conn = get_connection(self.db_path)
-        cursor = conn.execute(
-            """
-            SELECT session_id, username, created_at, last_access
-            FROM sessions
-            ORDER BY last_access DESC
-            """
-        )
-
-        return [
-            {
-                'session_id': row['session_id'],
-                'username': row['username'],
-                'created_at': row['created_at'],
-                'last_access': row['last_access']
-            }
-            for row in cursor.fetchall()
-        ]
+        self.flush_access_times()
+
+        with get_connection(self.db_path) as conn:
+            cursor = conn.execute(
+                """
+                SELECT session_id, username, created_at, last_access
+                FROM sessions
+                ORDER BY last_access DESC
+                """
+            )
+
+            return [
+                {
+                    'session_id': row['session_id'],
+                    'username': row['username'],
+                    'created_at': row['created_at'],
+                    'last_access': row['last_access']
+                }
+                for row in cursor.fetchall()
+            ]
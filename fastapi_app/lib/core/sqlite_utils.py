@@ -1,8 +1,9 @@
 """
 Centralized SQLite connection utilities.
 
-Provides thread-safe connection management with WAL mode initialization
-and retry logic for concurrent access scenarios.
+Provides thread-safe connection management with journal mode initialization,
+bounded connection pools with per-database pragma profiles, and retry logic
+for concurrent access scenarios.
 
 All SQLite database code should use these utilities instead of raw sqlite3.connect().
 """
@@ -10,9 +11,12 @@ All SQLite database code should use these utilities instead of raw sqlite3.conne
 import sqlite3
 import time
 import threading
+import weakref
+from collections import OrderedDict
 from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Generator
+from typing import Dict, Generator, List, Literal, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -31,6 +35,10 @@ _db_locks_lock = threading.Lock()  # Lock for accessing _db_locks dict
 DEFAULT_RETRY_COUNT = 5
 DEFAULT_RETRY_DELAY = 0.05  # seconds
 
+# sqlite3 isolation levels: None = autocommit, otherwise the BEGIN statement
+# issued implicitly before data-modifying statements
+IsolationLevel = Optional[Literal["DEFERRED", "IMMEDIATE", "EXCLUSIVE"]]
+
 
 def _get_db_lock(db_path: Path) -> threading.RLock:
     """
@@ -62,6 +70,19 @@ def _ensure_wal_mode(db_path: Path) -> None:
     Args:
         db_path: Path to the SQLite database file
     """
+    _ensure_journal_mode(db_path, "WAL")
+
+
+def _ensure_journal_mode(db_path: Path, journal_mode: str) -> None:
+    """
+    Ensure the journal mode of a database is set (once per database path).
+
+    For WAL, WAL2 is tried first (available in some SQLite builds).
+
+    Args:
+        db_path: Path to the SQLite database file
+        journal_mode: Journal mode, e.g. "WAL" or "DELETE"
+    """
     db_key = str(db_path.resolve())
 
     # Quick check without lock
@@ -80,28 +101,32 @@ def _ensure_wal_mode(db_path: Path) -> None:
         # Ensure parent directory exists
         db_path.parent.mkdir(parents=True, exist_ok=True)
 
-        # Use a dedicated connection to set WAL mode
+        # Use a dedicated connection to set the journal mode
         for attempt in range(DEFAULT_RETRY_COUNT):
             try:
                 conn = sqlite3.connect(str(db_path), timeout=30.0, isolation_level=None)
                 try:
                     # Set busy timeout to wait for locks
                     conn.execute("PRAGMA busy_timeout = 30000")
-                    # Try WAL2 mode first (available in SQLite 3.37+)
-                    try:
-                        conn.execute("PRAGMA journal_mode = WAL2")
-                        result = conn.execute("PRAGMA journal_mode").fetchone()[0]
-                        if result == 'wal2':
-                            logger.debug(f"WAL2 mode enabled for {db_path.name}")
-                        else:
-                            # Fall back to WAL mode
+                    if journal_mode.upper() != "WAL":
+                        conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+                        logger.debug(f"{journal_mode} journal mode enabled for {db_path.name}")
+                    else:
+                        # Try WAL2 mode first (available in SQLite 3.37+)
+                        try:
+                            conn.execute("PRAGMA journal_mode = WAL2")
+                            result = conn.execute("PRAGMA journal_mode").fetchone()[0]
+                            if result == 'wal2':
+                                logger.debug(f"WAL2 mode enabled for {db_path.name}")
+                            else:
+                                # Fall back to WAL mode
+                                conn.execute("PRAGMA journal_mode = WAL")
+                                logger.debug(f"WAL mode enabled for {db_path.name}")
+                        except sqlite3.OperationalError:
+                            # WAL2 not supported, fall back to WAL mode
                             conn.execute("PRAGMA journal_mode = WAL")
                             logger.debug(f"WAL mode enabled for {db_path.name}")
-                    except sqlite3.OperationalError:
-                        # WAL2 not supported, fall back to WAL mode
-                        conn.execute("PRAGMA journal_mode = WAL")
-                        logger.debug(f"WAL mode enabled for {db_path.name}")
-                    
+
                     with _init_lock:
                         _initialized_databases.add(db_key)
                     return
@@ -110,12 +135,14 @@ def _ensure_wal_mode(db_path: Path) -> None:
             except sqlite3.OperationalError as e:
                 if attempt < DEFAULT_RETRY_COUNT - 1:
                     logger.warning(
-                        f"Failed to set WAL mode for {db_path.name} "
+                        f"Failed to set {journal_mode} mode for {db_path.name} "
                         f"(attempt {attempt + 1}/{DEFAULT_RETRY_COUNT}): {e}"
                     )
                     time.sleep(DEFAULT_RETRY_DELAY * (attempt + 1))
                 else:
-                    logger.error(f"Failed to set WAL mode for {db_path.name} after {DEFAULT_RETRY_COUNT} attempts")
+                    logger.error(
+                        f"Failed to set {journal_mode} mode for {db_path.name} after {DEFAULT_RETRY_COUNT} attempts"
+                    )
                     raise
 
 
@@ -144,25 +171,26 @@ def with_db_lock(db_path: Path):
 @contextmanager
 def get_connection(
     db_path: Path,
-    timeout: float = 30.0,
+    timeout: Optional[float] = None,
     row_factory: bool = True,
-    foreign_keys: bool = True,
+    foreign_keys: Optional[bool] = None,
     retry_count: int = DEFAULT_RETRY_COUNT,
     retry_delay: float = DEFAULT_RETRY_DELAY
 ) -> Generator[sqlite3.Connection, None, None]:
     """
     Get a database connection with proper configuration.
 
-    Ensures WAL mode is enabled (once per database) and provides
-    retry logic for transient connection failures.
+    Borrows a connection from the database's shared pool (see get_pool()),
+    which sets the journal mode once per database. Settings that differ from
+    the pragma profile apply to this use of the connection only.
 
     Args:
         db_path: Path to the SQLite database file
-        timeout: Connection timeout in seconds
+        timeout: Seconds to wait for database locks (default: profile's busy timeout)
         row_factory: If True, use sqlite3.Row for dict-like access
-        foreign_keys: If True, enable foreign key constraints
-        retry_count: Number of connection retry attempts
-        retry_delay: Base delay between retries (multiplied by attempt number)
+        foreign_keys: Enable/disable foreign key constraints (default: profile setting)
+        retry_count: Attempts to open a new connection on transient failures
+        retry_delay: Base delay between attempts (multiplied by attempt number)
 
     Yields:
         sqlite3.Connection: Configured database connection
@@ -170,71 +198,38 @@ def get_connection(
     Raises:
         sqlite3.Error: If connection fails after all retries
     """
-    # Ensure WAL mode is set (no-op if already done)
-    _ensure_wal_mode(db_path)
-
-    conn = None
-    last_error = None
-
-    for attempt in range(retry_count):
+    pool = get_pool(db_path)
+    override_foreign_keys = foreign_keys is not None and foreign_keys != pool.profile.foreign_keys
+    busy_timeout_ms = int(timeout * 1000) if timeout is not None else pool.profile.busy_timeout_ms
+    override_timeout = busy_timeout_ms != pool.profile.busy_timeout_ms
+    with pool.connection(retry_count=retry_count, retry_delay=retry_delay) as conn:
+        if not row_factory:
+            conn.row_factory = None
+        if override_foreign_keys:
+            conn.execute(f"PRAGMA foreign_keys = {'ON' if foreign_keys else 'OFF'}")
+        if override_timeout:
+            conn.execute(f"PRAGMA busy_timeout = {busy_timeout_ms}")
         try:
-            conn = sqlite3.connect(
-                str(db_path),
-                timeout=timeout,
-                isolation_level=None,  # autocommit mode
-                check_same_thread=False
-            )
-
-            if row_factory:
-                conn.row_factory = sqlite3.Row
-
-            if foreign_keys:
-                conn.execute("PRAGMA foreign_keys = ON")
-
-            # Set busy timeout to wait for locks instead of failing immediately
-            # This helps prevent "disk I/O error" during concurrent access
-            conn.execute("PRAGMA busy_timeout = 30000")
-
-            # Connection successful
-            break
-
-        except sqlite3.OperationalError as e:
-            last_error = e
-            if conn:
+            yield conn
+        finally:
+            if override_foreign_keys or override_timeout:
                 try:
-                    conn.close()
-                except Exception:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    if override_foreign_keys:
+                        conn.execute(f"PRAGMA foreign_keys = {'ON' if pool.profile.foreign_keys else 'OFF'}")
+                    if override_timeout:
+                        conn.execute(f"PRAGMA busy_timeout = {int(pool.profile.busy_timeout_ms)}")
+                except sqlite3.Error:
                     pass
-                conn = None
-
-            if attempt < retry_count - 1:
-                delay = retry_delay * (attempt + 1)
-                logger.warning(
-                    f"Database connection failed for {db_path.name} "
-                    f"(attempt {attempt + 1}/{retry_count}): {e}. "
-                    f"Retrying in {delay:.2f}s..."
-                )
-                time.sleep(delay)
-            else:
-                logger.error(
-                    f"Database connection failed for {db_path.name} "
-                    f"after {retry_count} attempts: {e}"
-                )
-                raise last_error or sqlite3.OperationalError("Connection failed")
-
-    try:
-        yield conn # type: ignore
-    finally:
-        if conn:
-            conn.close()
 
 
 @contextmanager
 def transaction(
     db_path: Path,
-    timeout: float = 30.0,
+    timeout: Optional[float] = None,
     row_factory: bool = True,
-    foreign_keys: bool = True
+    foreign_keys: Optional[bool] = None
 ) -> Generator[sqlite3.Connection, None, None]:
     """
     Get a database connection with transaction semantics.
@@ -243,9 +238,9 @@ def transaction(
 
     Args:
         db_path: Path to the SQLite database file
-        timeout: Connection timeout in seconds
+        timeout: Seconds to wait for database locks (default: profile's busy timeout)
         row_factory: If True, use sqlite3.Row for dict-like access
-        foreign_keys: If True, enable foreign key constraints
+        foreign_keys: Enable/disable foreign key constraints (default: profile setting)
 
     Yields:
         sqlite3.Connection: Database connection with active transaction
@@ -253,32 +248,14 @@ def transaction(
     Raises:
         sqlite3.Error: If transaction fails
     """
-    _ensure_wal_mode(db_path)
-
-    conn = None
-    try:
-        conn = sqlite3.connect(str(db_path), timeout=timeout)
-
-        if row_factory:
-            conn.row_factory = sqlite3.Row
-
-        if foreign_keys:
-            conn.execute("PRAGMA foreign_keys = ON")
-
-        # Set busy timeout to wait for locks instead of failing immediately
-        conn.execute("PRAGMA busy_timeout = 30000")
-
+    with get_connection(db_path, timeout=timeout, row_factory=row_factory, foreign_keys=foreign_keys) as conn:
         conn.execute("BEGIN")
-        yield conn
-        conn.commit()
-
-    except Exception:
-        if conn:
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
             conn.rollback()
-        raise
-    finally:
-        if conn:
-            conn.close()
+            raise
 
 
 def reset_initialized_databases() -> None:
@@ -286,8 +263,363 @@ def reset_initialized_databases() -> None:
     Reset the set of initialized databases.
 
     This is primarily for testing purposes, to allow re-initialization
-    of WAL mode after database files are deleted/recreated.
+    of WAL mode after database files are deleted/recreated. Shared
+    connection pools are closed as well.
     """
     with _init_lock:
         _initialized_databases.clear()
         logger.debug("Reset initialized databases tracking")
+    close_all_pools()
+
+
+@dataclass(frozen=True)
+class PragmaProfile:
+    """
+    Connection settings for a class of databases.
+
+    Per-connection pragmas are applied when a pooled connection is created;
+    the journal mode is set once per database file.
+    """
+    name: str
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    cache_size: int = -2000          # negative: KiB (-2000 = 2 MB)
+    mmap_size: int = 0               # bytes, 0 = disabled
+    temp_store: str = "MEMORY"
+    foreign_keys: bool = True
+    busy_timeout_ms: int = 30000
+    isolation_level: IsolationLevel = None  # None = autocommit, else implicit transactions
+    max_connections: int = 8
+
+
+# Pragma profiles by database file name. DELETE-journal databases keep
+# synchronous=FULL, WAL databases use NORMAL (durable up to the last checkpoint,
+# never corrupt).
+PRAGMA_PROFILES: Dict[str, PragmaProfile] = {
+    "metadata.db": PragmaProfile(
+        name="metadata",
+        cache_size=-16000,
+        mmap_size=256 * 1024 * 1024,
+        max_connections=16,
+    ),
+    "sessions.db": PragmaProfile(
+        name="sessions",
+        isolation_level="DEFERRED",
+    ),
+    "locks.db": PragmaProfile(
+        name="locks",
+        journal_mode="DELETE",
+        synchronous="FULL",
+        cache_size=-1000,
+        foreign_keys=False,
+        isolation_level="DEFERRED",
+        max_connections=4,
+    ),
+    "permissions.db": PragmaProfile(
+        name="permissions",
+        journal_mode="DELETE",
+        synchronous="FULL",
+        max_connections=4,
+    ),
+}
+
+DEFAULT_PROFILE = PragmaProfile(name="default")
+
+# Seconds to wait for a free pooled connection before opening an extra one
+POOL_WAIT_TIMEOUT = 10.0
+
+# Maximum number of pools kept by get_pool() (least recently used are closed)
+MAX_REGISTERED_POOLS = 32
+
+
+def get_profile(db_path: Path) -> PragmaProfile:
+    """Get the pragma profile for a database file (by file name)."""
+    return PRAGMA_PROFILES.get(db_path.name, DEFAULT_PROFILE)
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-aware pool of SQLite connections to one database file.
+
+    - At most `max_connections` pooled connections are open. When all are in
+      use, callers wait for one to be released.
+    - A thread that already holds a connection of this pool and asks for
+      another one (nested use) never waits, since that could deadlock; it
+      gets an extra, unpooled connection instead. The same happens if no
+      connection becomes free within POOL_WAIT_TIMEOUT.
+    - Released connections are rolled back if a transaction is still open
+      and reset to the profile's isolation level and row factory.
+
+    Hit, miss, wait and overflow counters are available via get_stats().
+    """
+
+    def __init__(self, db_path: Path, profile: Optional[PragmaProfile] = None,
+                 wait_timeout: float = POOL_WAIT_TIMEOUT):
+        self.db_path = Path(db_path)
+        self.profile = profile or get_profile(self.db_path)
+        self.max_size = max(1, self.profile.max_connections)
+        self.wait_timeout = wait_timeout
+        self._cond = threading.Condition()
+        self._idle: List[sqlite3.Connection] = []
+        self._open = 0
+        self._closed = False
+        self._local = threading.local()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "overflows": 0,
+            "discarded": 0,
+        }
+        _all_pools.add(self)
+
+    @contextmanager
+    def connection(self, retry_count: int = DEFAULT_RETRY_COUNT,
+                   retry_delay: float = DEFAULT_RETRY_DELAY) -> Generator[sqlite3.Connection, None, None]:
+        """
+        Borrow a connection from the pool.
+
+        Args:
+            retry_count: Attempts to open a new connection on transient failures
+            retry_delay: Base delay between attempts (multiplied by attempt number)
+
+        Yields:
+            sqlite3.Connection configured according to the pool's profile
+        """
+        conn, pooled = self._acquire(retry_count, retry_delay)
+        self._local.depth = getattr(self._local, "depth", 0) + 1
+        try:
+            yield conn
+        finally:
+            self._local.depth -= 1
+            self._release(conn, pooled)
+
+    def get_stats(self) -> Dict:
+        """
+        Get pool metrics.
+
+        Returns:
+            Dict with database name, profile, connection counts and counters
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "database": str(self.db_path),
+                "profile": self.profile.name,
+                "max_size": self.max_size,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._open - len(self._idle),
+            })
+        return stats
+
+    def close(self) -> None:
+        """Close idle connections; connections in use are closed when released."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            _close_quietly(conn)
+
+    def _acquire(self, retry_count: int = DEFAULT_RETRY_COUNT,
+                 retry_delay: float = DEFAULT_RETRY_DELAY) -> Tuple[sqlite3.Connection, bool]:
+        nested = getattr(self._local, "depth", 0) > 0
+        with self._cond:
+            if self._closed:
+                raise sqlite3.ProgrammingError(f"Connection pool for {self.db_path.name} is closed")
+            if self._idle:
+                self._stats["hits"] += 1
+                return self._idle.pop(), True
+            if self._open < self.max_size:
+                self._open += 1
+                self._stats["misses"] += 1
+                reserved = True
+            elif nested:
+                self._stats["overflows"] += 1
+                reserved = False
+            else:
+                self._stats["waits"] += 1
+                started = time.monotonic()
+                deadline = started + self.wait_timeout
+                while not self._idle and self._open >= self.max_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                self._stats["wait_seconds"] += time.monotonic() - started
+                if self._idle:
+                    self._stats["hits"] += 1
+                    return self._idle.pop(), True
+                if self._open < self.max_size and not self._closed:
+                    self._open += 1
+                    self._stats["misses"] += 1
+                    reserved = True
+                else:
+                    logger.warning(
+                        f"No pooled connection for {self.db_path.name} within {self.wait_timeout}s, "
+                        "opening an extra connection"
+                    )
+                    self._stats["overflows"] += 1
+                    reserved = False
+
+        try:
+            return self._connect(retry_count, retry_delay), reserved
+        except Exception:
+            if reserved:
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+            raise
+
+    def _release(self, conn: sqlite3.Connection, pooled: bool) -> None:
+        # Reset state changed by the borrower; connections that fail this are discarded
+        healthy = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.isolation_level = self.profile.isolation_level
+            conn.row_factory = sqlite3.Row
+        except sqlite3.Error:
+            healthy = False
+
+        with self._cond:
+            if pooled and healthy and not self._closed:
+                self._idle.append(conn)
+                self._cond.notify()
+                return
+            if pooled:
+                self._open -= 1
+                if not healthy:
+                    self._stats["discarded"] += 1
+                self._cond.notify()
+        _close_quietly(conn)
+
+    def _connect(self, retry_count: int = DEFAULT_RETRY_COUNT,
+                 retry_delay: float = DEFAULT_RETRY_DELAY) -> sqlite3.Connection:
+        """Open a connection and apply the profile, retrying transient failures."""
+        return open_connection(self.db_path, self.profile, retry_count, retry_delay)
+
+
+def open_connection(db_path: Path, profile: Optional[PragmaProfile] = None,
+                    retry_count: int = DEFAULT_RETRY_COUNT,
+                    retry_delay: float = DEFAULT_RETRY_DELAY) -> sqlite3.Connection:
+    """
+    Open an unpooled connection configured with the database's pragma profile.
+
+    For callers that need to keep one connection open, e.g. to watch
+    PRAGMA data_version, which only reports commits of other connections.
+    Transient connection failures are retried.
+
+    Args:
+        db_path: Path to the SQLite database file
+        profile: Pragma profile (default: by file name, see get_profile())
+        retry_count: Attempts on transient connection failures
+        retry_delay: Base delay between attempts (multiplied by attempt number)
+
+    Returns:
+        sqlite3.Connection usable from any thread (callers must serialize access)
+    """
+    profile = profile or get_profile(db_path)
+    _ensure_journal_mode(db_path, profile.journal_mode)
+
+    last_error: Optional[Exception] = None
+    retry_count = max(1, retry_count)
+    for attempt in range(retry_count):
+        conn = None
+        try:
+            conn = sqlite3.connect(
+                str(db_path),
+                timeout=profile.busy_timeout_ms / 1000,
+                isolation_level=profile.isolation_level,
+                check_same_thread=False
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute(f"PRAGMA busy_timeout = {int(profile.busy_timeout_ms)}")
+            conn.execute(f"PRAGMA foreign_keys = {'ON' if profile.foreign_keys else 'OFF'}")
+            conn.execute(f"PRAGMA synchronous = {profile.synchronous}")
+            conn.execute(f"PRAGMA cache_size = {int(profile.cache_size)}")
+            conn.execute(f"PRAGMA mmap_size = {int(profile.mmap_size)}")
+            conn.execute(f"PRAGMA temp_store = {profile.temp_store}")
+            return conn
+        except sqlite3.OperationalError as e:
+            last_error = e
+            if conn is not None:
+                _close_quietly(conn)
+            if attempt < retry_count - 1:
+                delay = retry_delay * (attempt + 1)
+                logger.warning(
+                    f"Database connection failed for {db_path.name} "
+                    f"(attempt {attempt + 1}/{retry_count}): {e}. "
+                    f"Retrying in {delay:.2f}s..."
+                )
+                time.sleep(delay)
+    logger.error(
+        f"Database connection failed for {db_path.name} "
+        f"after {retry_count} attempts: {last_error}"
+    )
+    raise last_error or sqlite3.OperationalError("Connection failed")
+
+
+def _close_quietly(conn: sqlite3.Connection) -> None:
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+# All live pools (for metrics), and pools shared by path (for function-style callers)
+_all_pools: "weakref.WeakSet[ConnectionPool]" = weakref.WeakSet()
+_pools: "OrderedDict[str, ConnectionPool]" = OrderedDict()
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: Path) -> ConnectionPool:
+    """
+    Get the shared connection pool for a database file.
+
+    Args:
+        db_path: Path to the SQLite database file
+
+    Returns:
+        ConnectionPool using the database's pragma profile
+    """
+    db_key = str(db_path.resolve())
+    evicted = None
+    with _pools_lock:
+        pool = _pools.get(db_key)
+        if pool is None:
+            pool = ConnectionPool(db_path)
+            _pools[db_key] = pool
+            if len(_pools) > MAX_REGISTERED_POOLS:
+                _, evicted = _pools.popitem(last=False)
+        else:
+            _pools.move_to_end(db_key)
+    if evicted is not None:
+        evicted.close()
+    return pool
+
+
+def get_pool_stats() -> List[Dict]:
+    """
+    Get metrics of all live connection pools.
+
+    Returns:
+        List of dicts as returned by ConnectionPool.get_stats()
+    """
+    return [pool.get_stats() for pool in list(_all_pools)]
+
+
+def close_all_pools() -> None:
+    """
+    Close all shared connection pools.
+
+    Used at shutdown and in tests after database files were deleted/recreated.
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -58,6 +58,10 @@ class DocumentGroupModel(BaseModel):
 class FileListResponseModel(BaseModel):
     """Response for GET /api/files/list"""
     files: List[DocumentGroupModel]
+    version: Optional[int] = None              # File list version (monotonically increasing)
+    delta: Optional[bool] = None               # Set if 'since' was requested: True if files only holds changes
+    removed: Optional[List[str]] = None        # Delta only: doc_ids no longer in the list
+    locked: Optional[List[str]] = None         # Delta only: all currently locked artifact ids
 
 
 # Legacy models (kept for backward compatibility with other endpoints)
@@ -216,6 +220,18 @@ class HeartbeatResponse(BaseModel):
     # No cache_status in FastAPI (deprecated)
 
 
+class HeartbeatBatchRequest(BaseModel):
+    """Request for POST /api/files/heartbeat/batch"""
+    stable_ids: List[str]
+
+
+class HeartbeatBatchResponse(BaseModel):
+    """Response for POST /api/files/heartbeat/batch"""
+    renewed: List[str]      # Locks refreshed
+    lost: List[str]         # Locks no longer held by the session
+    not_found: List[str]    # No such file
+
+
 class GarbageCollectRequest(BaseModel):
     """Request for POST /api/files/garbage_collect"""
     deleted_before: datetime  # ISO timestamp - purge files deleted before this time
@@ -15,6 +15,21 @@ class ValidateRequest(BaseModel):
         description="XML document to validate",
         min_length=1
     )
+    file_id: Optional[str] = Field(
+        None,
+        description="Identifier of the edited document. Enables caching of the validation result "
+                    "for incremental validation of subsequent versions."
+    )
+    base_hash: Optional[str] = Field(
+        None,
+        description="content_hash of the previously validated version of the document. If it matches "
+                    "the cached version, only the changed subtree is revalidated."
+    )
+    xpath: Optional[str] = Field(
+        None,
+        description="Optional XPath of the element containing the edit (tei: prefix available). "
+                    "Revalidated as a whole if it contains the detected change."
+    )
 
 
 class ValidationErrorModel(BaseModel):
@@ -45,6 +60,14 @@ class ValidateResponse(BaseModel):
         default_factory=list,
         description="List of validation errors/warnings. Empty if validation passed."
     )
+    content_hash: Optional[str] = Field(
+        None,
+        description="Hash of the validated content (only with file_id); send as base_hash with the next version"
+    )
+    incremental: bool = Field(
+        False,
+        description="True if only the changed subtree was revalidated"
+    )
 
 
 class AutocompleteDataRequest(BaseModel):
@@ -98,3 +121,19 @@ class AutocompleteDataResponse(BaseModel):
             }
         }
     })
+
+
+class ValidatorPoolStatsResponse(BaseModel):
+    """Metrics of the schema validator worker pool."""
+    size: int = Field(..., description="Maximum number of worker processes")
+    workers: int = Field(..., description="Number of running (or starting) worker processes")
+    idle_workers: int = Field(..., description="Number of idle worker processes")
+    busy_workers: int = Field(..., description="Number of worker processes currently validating")
+    requests: int = Field(..., description="Number of validation requests handled")
+    schema_compiles: int = Field(..., description="Number of schema compilations in workers")
+    schema_cache_hits: int = Field(..., description="Number of validations using an already compiled schema")
+    timeouts: int = Field(..., description="Number of validations that timed out (worker killed)")
+    crashes: int = Field(..., description="Number of workers that died during validation")
+    workers_started: int = Field(..., description="Number of worker processes started, including replacements")
+    wait_seconds: float = Field(..., description="Total time spent waiting for a free worker")
+    validation_seconds: float = Field(..., description="Total time spent validating in workers")
@@ -341,3 +341,31 @@ class DocumentAccessFilter:
                 filtered_documents.append(doc)
 
         return filtered_documents
+
+    @staticmethod
+    def access_key(user: Optional[Dict]) -> tuple:
+        """
+        Get a key covering everything filter_files_by_access() depends on.
+
+        Used to key cached file listings, so that changes to the access
+        control mode, the user's roles or (in granular mode) the document
+        permissions invalidate them.
+
+        Args:
+            user: User dict or None
+
+        Returns:
+            Hashable tuple
+        """
+        mode = get_access_control_mode()
+        roles = tuple(sorted(user.get('roles', []))) if user else ()
+
+        if mode != 'granular' or user_has_reviewer_role(user) or user_is_admin(user):
+            return (mode, roles)
+
+        from .acl_utils import _get_permissions_db
+        from fastapi_app.lib.repository.permissions_db import get_permissions_version
+
+        config = get_config()
+        default_visibility = config.get('access-control.default-visibility', default='collection')
+        return (mode, roles, default_visibility, get_permissions_version(_get_permissions_db()))
@@ -15,7 +15,9 @@ All queries filter deleted = 0 by default unless explicitly requesting deleted f
 import json
 import re
 import sqlite3
-from typing import Optional, List
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, List, Dict, Set
 from datetime import datetime
 from fastapi_app.lib.core.database import DatabaseManager
 from fastapi_app.lib.storage.storage_references import StorageReferenceManager
@@ -28,6 +30,43 @@ from fastapi_app.lib.models.models import (
 )
 
 
+# How often an insert is retried with new stable_ids after a UNIQUE conflict
+# (see FileRepository._insert_with_stable_id_retry)
+STABLE_ID_INSERT_ATTEMPTS = 3
+
+# Maximum number of IDs from allocate_stable_ids() remembered as replaceable
+# until they are inserted (unused ones are forgotten oldest first)
+MAX_ALLOCATED_STABLE_IDS = 100000
+
+# stable_ids of the files in a collection: files whose own doc_collections
+# contain it (file_collections is maintained by triggers, see migration 010),
+# plus the non-PDF files of documents whose PDF is in the collection.
+# Parameters: collection_id, collection_id
+_COLLECTION_MEMBERS_SQL = """
+    SELECT stable_id FROM file_collections WHERE collection_id = ?
+    UNION
+    SELECT f.stable_id
+    FROM file_collections fc
+    JOIN files p ON p.stable_id = fc.stable_id AND p.file_type = 'pdf' AND p.deleted = 0
+    JOIN files f ON f.doc_id = p.doc_id AND f.file_type != 'pdf'
+    WHERE fc.collection_id = ?
+"""
+
+
+class _StableIdProbe:
+    """Container whose membership test is a primary key lookup in files."""
+
+    def __init__(self, db: DatabaseManager):
+        self.db = db
+
+    def __contains__(self, stable_id: object) -> bool:
+        with self.db.get_connection() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM files WHERE stable_id = ?", (stable_id,)
+            ).fetchone()
+        return row is not None
+
+
 class FileRepository:
     """
     Repository for file metadata operations using Pydantic models.
@@ -53,6 +92,9 @@ class FileRepository:
         self.logger = logger
         # Initialize reference manager for storage cleanup
         self.ref_manager = StorageReferenceManager(db_manager, logger)
+        # IDs handed out by allocate_stable_ids() and not inserted yet
+        self._allocated_ids: "OrderedDict[str, None]" = OrderedDict()
+        self._allocated_lock = threading.Lock()
 
     def resolve_file_id(self, file_id: str) -> str:
         """
@@ -193,36 +235,17 @@ class FileRepository:
         Raises:
             sqlite3.Error: If database operation fails
         """
-        # Convert Pydantic model to dict and serialize JSON fields
-        data = file_data.model_dump()
-
-        # Generate stable_id if not provided
-        if not data.get('stable_id'):
-            from fastapi_app.lib.utils.stable_id import generate_stable_id
-            # Get all existing stable IDs to avoid collisions
-            existing_ids = self._get_all_stable_ids()
-            data['stable_id'] = generate_stable_id(existing_ids)
-
-        data['doc_collections'] = json.dumps(data['doc_collections'])
-        data['doc_metadata'] = json.dumps(data['doc_metadata'])
-        data['file_metadata'] = json.dumps(data['file_metadata'])
-
-        # Build column names and placeholders
-        columns = list(data.keys())
-        placeholders = ', '.join('?' * len(columns))
-        column_names = ', '.join(columns)
-
-        query = f"""
-            INSERT INTO files ({column_names}, local_modified_at, sync_status)
-            VALUES ({placeholders}, CURRENT_TIMESTAMP, 'modified')
-        """
+        data = self._prepare_insert(file_data)
+        query = self._insert_query(list(data.keys()))
 
-        with self.db.transaction() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, tuple(data.values()))
+        def write(rows: List[dict]) -> None:
+            with self.db.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, tuple(rows[0].values()))
 
-            if self.logger:
-                self.logger.debug(f"Inserted file: {file_data.id}")
+        self._insert_with_stable_id_retry([data], [self._is_replaceable(file_data)], write)
+        if self.logger:
+            self.logger.debug(f"Inserted file: {file_data.id}")
 
         # Increment storage reference count (database entry now references this file)
         self.ref_manager.increment_reference(file_data.id, file_data.file_type)
@@ -375,20 +398,86 @@ class FileRepository:
                 return self._row_to_model(row)
             return None
 
-    def _get_all_stable_ids(self) -> set[str]:
+    def get_existing_stable_ids(self, stable_ids: List[str]) -> Set[str]:
         """
-        Get all stable IDs currently in use (for collision detection).
+        Find which of many stable_ids belong to non-deleted files, with one query.
+
+        Args:
+            stable_ids: Stable IDs to look up
 
         Returns:
-            Set of all stable_id values in the database
+            The stable_ids that belong to a non-deleted file
         """
-        query = "SELECT stable_id FROM files"
+        if not stable_ids:
+            return set()
 
         with self.db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query)
-            rows = cursor.fetchall()
-            return {row['stable_id'] for row in rows}
+            rows = conn.execute("""
+                SELECT stable_id FROM files
+                WHERE stable_id IN (SELECT value FROM json_each(?)) AND deleted = 0
+            """, (json.dumps(list(stable_ids)),)).fetchall()
+
+        return {row['stable_id'] for row in rows}
+
+    def allocate_stable_ids(self, count: int) -> List[str]:
+        """
+        Generate stable IDs for a batch of new files.
+
+        Candidates are checked against the files table in one query per round
+        (a round is repeated only for the rare colliding candidates). Use this
+        instead of letting insert_file() generate IDs one by one for bulk imports,
+        and pass the IDs as FileCreate.stable_id when inserting.
+
+        The IDs are not reserved: a concurrent writer may use one of them before
+        it is inserted. insert_file() and insert_files() of this repository
+        instance then replace the taken IDs and retry, so the stable_id of an
+        inserted file can differ from the allocated one. Other stable_ids passed
+        in by callers are never replaced.
+
+        Args:
+            count: Number of IDs to allocate
+
+        Returns:
+            List of unique IDs that were unused at the time of the call
+
+        Raises:
+            RuntimeError: If no free IDs could be found within MAX_LENGTH
+        """
+        from fastapi_app.lib.utils.stable_id import random_stable_id, MIN_LENGTH, MAX_LENGTH
+
+        allocated: List[str] = []
+        seen: set[str] = set()
+        length = MIN_LENGTH
+        while len(allocated) < count:
+            if length > MAX_LENGTH:
+                raise RuntimeError(
+                    f"Unable to generate unique stable_id: exceeded max length {MAX_LENGTH}"
+                )
+            candidates = set()
+            while len(candidates) < count - len(allocated):
+                candidate = random_stable_id(length)
+                if candidate not in seen:
+                    candidates.add(candidate)
+            seen.update(candidates)
+
+            with self.db.get_connection() as conn:
+                rows = conn.execute(
+                    "SELECT stable_id FROM files WHERE stable_id IN (SELECT value FROM json_each(?))",
+                    (json.dumps(sorted(candidates)),)
+                ).fetchall()
+            taken = {row['stable_id'] for row in rows}
+            allocated.extend(sorted(candidates - taken))
+            if taken:
+                # Same escalation as generate_stable_id() on collisions
+                length += 1
+
+        with self._allocated_lock:
+            for stable_id in allocated:
+                self._allocated_ids[stable_id] = None
+            while len(self._allocated_ids) > MAX_ALLOCATED_STABLE_IDS:
+                self._allocated_ids.popitem(last=False)
+
+        return allocated
 
     def get_file_by_content_and_doc(
         self,
@@ -600,7 +689,7 @@ class FileRepository:
         List files with optional filters.
 
         Args:
-            collection: Filter by collection name
+            collection: Filter by collection id (non-PDF files also match via their PDF)
             variant: Filter by variant
             file_type: Filter by file type
             include_deleted: If True, include soft-deleted files
@@ -623,8 +712,8 @@ class FileRepository:
             params.append(variant)
 
         if collection:
-            conditions.append("json_extract(doc_collections, '$') LIKE ?")
-            params.append(f"%{collection}%")
+            conditions.append(f"stable_id IN ({_COLLECTION_MEMBERS_SQL})")
+            params.extend([collection, collection])
 
         where_clause = " AND ".join(conditions) if conditions else "1=1"
         query = f"SELECT * FROM files WHERE {where_clause} ORDER BY created_at DESC"
@@ -636,6 +725,142 @@ class FileRepository:
 
             return [self._row_to_model(row) for row in rows]
 
+    def insert_files(self, files: List[FileCreate]) -> int:
+        """
+        Insert many new file records in a single transaction.
+
+        Bulk counterpart of insert_file() for imports: the rows are written
+        with one multi-row insert and the storage reference counts are
+        incremented in the same transaction, so either all files of the
+        batch are recorded or none. Missing stable_ids are generated as in
+        insert_file(), but callers should pass IDs from allocate_stable_ids().
+
+        Args:
+            files: FileCreate models to insert
+
+        Returns:
+            Number of inserted files
+
+        Raises:
+            sqlite3.Error: If database operation fails (nothing is inserted)
+        """
+        if not files:
+            return 0
+
+        rows = [self._prepare_insert(file_data) for file_data in files]
+        columns = list(rows[0].keys())
+        query = self._insert_query(columns)
+
+        def write(rows: List[dict]) -> None:
+            with self.db.transaction() as conn:
+                conn.executemany(query, [tuple(row[col] for col in columns) for row in rows])
+                self.ref_manager.increment_references(
+                    conn, [(file_data.id, file_data.file_type) for file_data in files]
+                )
+
+        self._insert_with_stable_id_retry(
+            rows, [self._is_replaceable(file_data) for file_data in files], write
+        )
+
+        if self.logger:
+            self.logger.debug(f"Inserted {len(files)} files")
+
+        return len(files)
+
+    def _is_replaceable(self, file_data: FileCreate) -> bool:
+        """Whether the stable_id of a new file is generated here and may be replaced on conflict."""
+        if not file_data.stable_id:
+            return True
+        with self._allocated_lock:
+            return file_data.stable_id in self._allocated_ids
+
+    def _insert_with_stable_id_retry(
+        self,
+        rows: List[dict],
+        replaceable: List[bool],
+        write: Callable[[List[dict]], None]
+    ) -> None:
+        """
+        Run an insert transaction, replacing generated stable_ids that were taken in the meantime.
+
+        Stable IDs from allocate_stable_ids() and _prepare_insert() are only
+        checked, not reserved. If a concurrent writer used one of them first,
+        the UNIQUE constraint on files.stable_id rejects the insert; the
+        colliding IDs are then replaced and the transaction is run again.
+        Explicit stable_ids of the caller (e.g. shared with other instances
+        by sync) are never replaced; their conflicts are raised.
+
+        Args:
+            rows: Column dicts from _prepare_insert() (modified in place)
+            replaceable: For each row, whether its stable_id may be replaced
+            write: Function inserting the rows in one transaction
+
+        Raises:
+            sqlite3.IntegrityError: On a conflict of an explicit stable_id,
+                or if the conflicts persist
+        """
+        for attempt in range(STABLE_ID_INSERT_ATTEMPTS):
+            try:
+                write(rows)
+                break
+            except sqlite3.IntegrityError as e:
+                if 'stable_id' not in str(e) or attempt == STABLE_ID_INSERT_ATTEMPTS - 1:
+                    raise
+                error = e
+
+            with self.db.get_connection() as conn:
+                taken = {
+                    row['stable_id'] for row in conn.execute(
+                        "SELECT stable_id FROM files WHERE stable_id IN (SELECT value FROM json_each(?))",
+                        (json.dumps([row['stable_id'] for row in rows]),)
+                    )
+                }
+            colliding = []
+            # Explicit IDs first, so that a generated duplicate of one is replaced
+            for index in sorted(range(len(rows)), key=lambda i: replaceable[i]):
+                row = rows[index]
+                if row['stable_id'] in taken:
+                    if not replaceable[index]:
+                        raise error
+                    colliding.append(row)
+                taken.add(row['stable_id'])
+            for row, stable_id in zip(colliding, self.allocate_stable_ids(len(colliding))):
+                if self.logger:
+                    self.logger.debug(f"stable_id {row['stable_id']} was taken, using {stable_id}")
+                with self._allocated_lock:
+                    self._allocated_ids.pop(row['stable_id'], None)
+                row['stable_id'] = stable_id
+
+        with self._allocated_lock:
+            for row in rows:
+                self._allocated_ids.pop(row['stable_id'], None)
+
+    def _prepare_insert(self, file_data: FileCreate) -> dict:
+        """Convert a FileCreate model to a column dict for INSERT, generating a stable_id if needed."""
+        # Convert Pydantic model to dict and serialize JSON fields
+        data = file_data.model_dump()
+
+        # Generate stable_id if not provided
+        if not data.get('stable_id'):
+            from fastapi_app.lib.utils.stable_id import generate_stable_id
+            # Collisions are checked with primary key lookups
+            data['stable_id'] = generate_stable_id(_StableIdProbe(self.db))
+
+        data['doc_collections'] = json.dumps(data['doc_collections'])
+        data['doc_metadata'] = json.dumps(data['doc_metadata'])
+        data['file_metadata'] = json.dumps(data['file_metadata'])
+        return data
+
+    @staticmethod
+    def _insert_query(columns: List[str]) -> str:
+        """Build the INSERT statement for the given files columns."""
+        placeholders = ', '.join('?' * len(columns))
+        column_names = ', '.join(columns)
+        return f"""
+            INSERT INTO files ({column_names}, local_modified_at, sync_status)
+            VALUES ({placeholders}, CURRENT_TIMESTAMP, 'modified')
+        """
+
     # Document-Centric Queries
 
     def get_files_by_doc_id(self, doc_id: str, include_deleted: bool = False) -> List[FileMetadata]:
@@ -659,6 +884,229 @@ class FileRepository:
 
             return [self._row_to_model(row) for row in rows]
 
+    def get_files_by_doc_ids(self, doc_ids: List[str]) -> Dict[str, List[FileMetadata]]:
+        """
+        Get the non-deleted files of many documents with one query.
+
+        Args:
+            doc_ids: Document identifiers
+
+        Returns:
+            Dict mapping each doc_id to its files (ordered by created_at);
+            doc_ids without files map to an empty list
+        """
+        result: Dict[str, List[FileMetadata]] = {doc_id: [] for doc_id in doc_ids}
+        if not result:
+            return result
+
+        with self.db.get_connection() as conn:
+            rows = conn.execute("""
+                SELECT * FROM files
+                WHERE doc_id IN (SELECT value FROM json_each(?)) AND deleted = 0
+                ORDER BY created_at
+            """, (json.dumps(list(result)),)).fetchall()
+
+        for row in rows:
+            result[row['doc_id']].append(self._row_to_model(row))
+        return result
+
+    def list_document_groups(
+        self,
+        variant: Optional[str] = None,
+        collections: Optional[List[str]] = None,
+        doc_ids: Optional[List[str]] = None
+    ) -> List[dict]:
+        """
+        List all non-deleted files pre-grouped by document in a single query.
+
+        The source file of each document (its PDF, or for standalone documents
+        the most recent file) is selected with a window function, so no
+        per-document lookup is needed. Rows are returned as lightweight dicts
+        instead of FileMetadata models to avoid per-row Pydantic validation.
+
+        Documents are ordered by their most recently created file, and the
+        files within each document by created_at DESC.
+
+        Args:
+            variant: Only include documents having a non-PDF file with this variant
+            collections: Only include documents whose source file belongs to at
+                least one of these collections (None = no collection filter)
+            doc_ids: Only include these documents (None = all documents)
+
+        Returns:
+            List of dicts with keys 'doc_id', 'source' (row dict) and 'files'
+            (row dicts of all other files of the document)
+        """
+        if (collections is not None and not collections) or (doc_ids is not None and not doc_ids):
+            return []
+
+        if doc_ids is not None and len(doc_ids) > 500:
+            # Stay well below SQLite's bound parameter limit
+            batched: List[dict] = []
+            for start in range(0, len(doc_ids), 500):
+                batched.extend(self.list_document_groups(
+                    variant=variant,
+                    collections=collections,
+                    doc_ids=doc_ids[start:start + 500]
+                ))
+            return batched
+
+        doc_filter = ""
+        conditions = []
+        params: list = []
+
+        if doc_ids is not None:
+            doc_filter = f"AND doc_id IN ({', '.join('?' * len(doc_ids))})"
+            params.extend(doc_ids)
+
+        if variant is not None:
+            conditions.append("""
+                EXISTS (
+                    SELECT 1 FROM files v
+                    WHERE v.doc_id = live.doc_id
+                      AND v.deleted = 0
+                      AND v.file_type != 'pdf'
+                      AND v.variant = ?
+                )
+            """)
+            params.append(variant)
+
+        if collections is not None:
+            placeholders = ', '.join('?' * len(collections))
+            conditions.append(f"""
+                EXISTS (
+                    SELECT 1 FROM json_each(
+                        CASE WHEN json_valid(sources.source_collections)
+                             THEN sources.source_collections ELSE '[]' END
+                    )
+                    WHERE json_each.value IN ({placeholders})
+                )
+            """)
+            params.extend(collections)
+
+        where_clause = " AND ".join(conditions) if conditions else "1=1"
+        query = f"""
+            WITH live AS (
+                SELECT rowid AS row_order, stable_id, id, filename, doc_id, file_type,
+                       file_size, label, variant, version, is_gold_standard, status,
+                       created_at, updated_at, created_by, doc_collections, doc_metadata
+                FROM files
+                WHERE deleted = 0 {doc_filter}
+            ),
+            sources AS (
+                SELECT doc_id, stable_id AS source_id, doc_collections AS source_collections
+                FROM (
+                    SELECT doc_id, stable_id, doc_collections,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY doc_id
+                               ORDER BY file_type = 'pdf' DESC, created_at DESC, row_order
+                           ) AS rn
+                    FROM live
+                )
+                WHERE rn = 1
+            )
+            SELECT live.*, sources.source_id
+            FROM live
+            JOIN sources ON sources.doc_id = live.doc_id
+            WHERE {where_clause}
+            ORDER BY live.created_at DESC, live.row_order
+        """
+
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, tuple(params))
+            rows = cursor.fetchall()
+
+        groups: dict[str, dict] = {}
+        for row in rows:
+            group = groups.get(row['doc_id'])
+            if group is None:
+                group = groups[row['doc_id']] = {
+                    'doc_id': row['doc_id'],
+                    'source': None,
+                    'files': []
+                }
+            if row['stable_id'] == row['source_id']:
+                group['source'] = self._row_to_listing_dict(row, with_doc_metadata=True)
+            else:
+                group['files'].append(self._row_to_listing_dict(row))
+
+        return list(groups.values())
+
+    @staticmethod
+    def _row_to_listing_dict(row: sqlite3.Row, with_doc_metadata: bool = False) -> dict:
+        """
+        Convert a row from list_document_groups() to a plain dict.
+
+        Only source rows carry document-level metadata, so JSON parsing of
+        doc_collections/doc_metadata is skipped for all other rows.
+
+        Args:
+            row: Database row
+            with_doc_metadata: If True, parse doc_collections and doc_metadata
+
+        Returns:
+            Dict with typed file fields
+        """
+        data = dict(row)
+        del data['row_order'], data['source_id']
+
+        if with_doc_metadata:
+            data['doc_collections'] = json.loads(data['doc_collections']) if data['doc_collections'] else []
+            data['doc_metadata'] = json.loads(data['doc_metadata']) if data['doc_metadata'] else {}
+        else:
+            del data['doc_collections'], data['doc_metadata']
+
+        data['is_gold_standard'] = bool(data['is_gold_standard'])
+        for field in ['created_at', 'updated_at']:
+            if data[field]:
+                data[field] = datetime.fromisoformat(data[field])
+
+        return data
+
+    def get_change_version(self) -> int:
+        """
+        Get the current version of the file change log.
+
+        The version increases monotonically with every insert, update or
+        delete of a file row (maintained by triggers, see migration 009).
+
+        Returns:
+            Latest change version, 0 if no changes were logged yet
+        """
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT MAX(version) AS version FROM file_changes")
+            row = cursor.fetchone()
+            return row['version'] or 0
+
+    def get_changed_doc_ids(self, since_version: int, until_version: int) -> Optional[set]:
+        """
+        Get the doc_ids of documents changed in the given version range.
+
+        A None entry in the result means that the remote lock state changed.
+
+        Args:
+            since_version: Exclusive lower bound
+            until_version: Inclusive upper bound
+
+        Returns:
+            Set of changed doc_ids, or None if the log no longer reaches back to
+            since_version (entries were pruned) and the range cannot be answered
+        """
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT MIN(version) AS version FROM file_changes")
+            oldest = cursor.fetchone()['version']
+            if oldest is not None and since_version + 1 < oldest:
+                return None
+
+            cursor.execute(
+                "SELECT DISTINCT doc_id FROM file_changes WHERE version > ? AND version <= ?",
+                (since_version, until_version)
+            )
+            return {row['doc_id'] for row in cursor.fetchall()}
+
     def get_max_collection_counter(self, prefix: str) -> int:
         """Return the max numeric suffix N in non-deleted doc_ids '{prefix}-NNNN', or 0."""
         suffix_re = re.compile(rf"^{re.escape(prefix)}-(\d+)$")
@@ -708,6 +1156,9 @@ class FileRepository:
         """
         Get all files that belong to a specific collection.
 
+        TEI and other non-PDF files belong to the collections of their
+        document's PDF, in addition to those in their own doc_collections.
+
         Args:
             collection_id: Collection identifier
             include_deleted: If True, include soft-deleted files
@@ -718,14 +1169,14 @@ class FileRepository:
         deleted_filter = "" if include_deleted else "AND deleted = 0"
         query = f"""
             SELECT * FROM files
-            WHERE json_extract(doc_collections, '$') LIKE ?
+            WHERE stable_id IN ({_COLLECTION_MEMBERS_SQL})
             {deleted_filter}
             ORDER BY created_at
         """
 
         with self.db.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(query, (f'%"{collection_id}"%',))
+            cursor.execute(query, (collection_id, collection_id))
             rows = cursor.fetchall()
 
             return [self._row_to_model(row) for row in rows]
@@ -6,7 +6,6 @@ Uses DELETE journal mode (simple database with infrequent writes).
 """
 
 import sqlite3
-import queue
 from datetime import datetime, timezone
 from contextlib import contextmanager
 from pathlib import Path
@@ -35,14 +34,15 @@ class PermissionsDB:
     Manages permissions database connections with pooling.
 
     Uses DELETE journal mode (not WAL) since this is a simple database
-    with infrequent writes that doesn't benefit from WAL's read concurrency.
+    with infrequent writes that doesn't benefit from WAL's read concurrency
+    (see the "permissions.db" profile in sqlite_utils.PRAGMA_PROFILES).
     """
 
     def __init__(self, db_path: Path, logger=None):
         self.db_path = db_path
         self.logger = logger or logging.getLogger(__name__)
-        self._pool = queue.Queue()
         self._ensure_db_exists()
+        self._pool = sqlite_utils.ConnectionPool(db_path)
 
     def _ensure_db_exists(self) -> None:
         """Ensure database and schema exist with migrations."""
@@ -62,27 +62,8 @@ class PermissionsDB:
     @contextmanager
     def get_connection(self) -> Generator[sqlite3.Connection, None, None]:
         """Context manager for database connections with pooling."""
-        try:
-            conn = self._pool.get(block=False)
-        except queue.Empty:
-            conn = sqlite3.connect(
-                str(self.db_path),
-                timeout=60.0,
-                check_same_thread=False,
-                isolation_level=None
-            )
-            conn.row_factory = sqlite3.Row
-            conn.execute("PRAGMA busy_timeout = 30000")
-            conn.execute("PRAGMA foreign_keys = ON")
-
-        try:
+        with self._pool.connection() as conn:
             yield conn
-        finally:
-            try:
-                conn.rollback()
-            except sqlite3.OperationalError:
-                pass
-            self._pool.put(conn)
 
 
 def initialize_permissions_schema(conn: sqlite3.Connection, logger=None, db_path=None) -> None:
@@ -251,3 +232,23 @@ def delete_document_permissions(stable_id: str, permissions_db: PermissionsDB) -
         conn.execute("DELETE FROM document_permissions WHERE stable_id = ?", (stable_id,))
         conn.commit()
         return True
+
+
+def get_permissions_version(permissions_db: PermissionsDB) -> tuple:
+    """
+    Get a value that changes whenever document permissions change.
+
+    Upserts always set updated_at to the current time and deletes reduce the
+    row count, so the pair is sufficient to invalidate cached listings.
+
+    Args:
+        permissions_db: PermissionsDB instance (use dependency injection)
+
+    Returns:
+        Tuple of (row count, latest updated_at)
+    """
+    with permissions_db.get_connection() as conn:
+        row = conn.execute(
+            "SELECT COUNT(*), MAX(updated_at) FROM document_permissions"
+        ).fetchone()
+        return (row[0], row[1])
@@ -0,0 +1,414 @@
+"""
+Persistent cache of facts derived from TEI file content.
+
+Analytics plugins (annotation progress, edit history, ...) report on facts
+like the revision changes or the label of every TEI file of a collection.
+Extracting them means reading and parsing each file on every request. Files
+are addressed by the SHA-256 hash of their content, so anything derived from
+a file never changes; results are therefore stored in derived.db, keyed by
+(content_hash, extractor, version):
+
+- Extractors are functions of a parsed TEI root element returning
+  JSON-serializable data, registered with @derived_extractor(name, version).
+  Bumping the version of an extractor invalidates its stored results.
+- Eager extractors are computed when files are saved or imported (see
+  DerivedDataCache.populate()), so that collection reports are pure database
+  reads. Other extractors are computed and stored on first use.
+- get_many() returns the results for many files at once. Missing results are
+  computed from the file content, with one parse per file for all eager
+  extractors and the requested one.
+
+Content that cannot be parsed is stored with a null result, so that it is
+not parsed again.
+"""
+
+import json
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from lxml import etree
+
+from fastapi_app.lib.core.db_utils import init_database
+from fastapi_app.lib.core.sqlite_utils import get_connection, transaction
+from fastapi_app.lib.utils.logging_utils import get_logger
+from fastapi_app.lib.utils.tei_utils import (
+    extract_tei_metadata,
+    get_annotator_name,
+    get_artifact_label,
+)
+
+logger = get_logger(__name__)
+
+# SQLite schema for the derived data table
+DERIVED_DATA_SCHEMA = """
+CREATE TABLE IF NOT EXISTS derived_data (
+    content_hash TEXT NOT NULL,
+    extractor TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (content_hash, extractor, version)
+) WITHOUT ROWID;
+"""
+
+# Number of hashes per IN (...) query
+QUERY_CHUNK_SIZE = 500
+
+TEI_NS = {"tei": "http://www.tei-c.org/ns/1.0"}
+
+
+@dataclass(frozen=True)
+class DerivedExtractor:
+    """A registered function deriving data from a parsed TEI document."""
+    name: str
+    version: int
+    extract: Callable[[Any], Any]
+    eager: bool = False
+
+
+_extractors: Dict[str, DerivedExtractor] = {}
+_extractors_lock = threading.Lock()
+
+
+def register_extractor(
+    name: str,
+    extract: Callable[[Any], Any],
+    version: int = 1,
+    eager: bool = False
+) -> DerivedExtractor:
+    """
+    Register an extractor (replaces an extractor with the same name).
+
+    Args:
+        name: Unique name, by convention prefixed with the plugin id
+        extract: Function of the TEI root element returning JSON-serializable data
+        version: Version of the extraction logic; bump it when the result changes
+        eager: If True, computed whenever files are saved or imported
+
+    Returns:
+        The registered extractor
+    """
+    extractor = DerivedExtractor(name=name, version=version, extract=extract, eager=eager)
+    with _extractors_lock:
+        _extractors[name] = extractor
+    return extractor
+
+
+def derived_extractor(name: str, version: int = 1, eager: bool = False):
+    """
+    Decorator registering a function as extractor.
+
+        @derived_extractor("my-plugin.figures", version=1)
+        def count_figures(root):
+            return len(root.findall(".//{http://www.tei-c.org/ns/1.0}figure"))
+    """
+    def decorator(func: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        register_extractor(name, func, version=version, eager=eager)
+        return func
+
+    return decorator
+
+
+def get_extractor(name: str) -> DerivedExtractor:
+    """
+    Get a registered extractor.
+
+    Raises:
+        ValueError: If no extractor with this name is registered
+    """
+    with _extractors_lock:
+        extractor = _extractors.get(name)
+    if extractor is None:
+        raise ValueError(f"Unknown derived data extractor: {name}")
+    return extractor
+
+
+def get_eager_extractors() -> List[DerivedExtractor]:
+    """Return the extractors that are computed on save and import."""
+    with _extractors_lock:
+        return [extractor for extractor in _extractors.values() if extractor.eager]
+
+
+def extract_derived_data(
+    content: bytes,
+    extractors: Optional[Iterable[DerivedExtractor]] = None
+) -> Dict[str, tuple]:
+    """
+    Parse content once and run extractors on it.
+
+    Args:
+        content: TEI XML content
+        extractors: Extractors to run (default: the eager ones)
+
+    Returns:
+        Dict mapping extractor name to (version, data), see run_extractors()
+    """
+    try:
+        root = etree.fromstring(content)
+    except Exception as e:
+        logger.warning(f"Cannot derive data from unparseable content: {e}")
+        root = None
+    return run_extractors(root, extractors)
+
+
+def run_extractors(
+    root,
+    extractors: Optional[Iterable[DerivedExtractor]] = None
+) -> Dict[str, tuple]:
+    """
+    Run extractors on a parsed TEI document.
+
+    Args:
+        root: TEI root element, or None if the content cannot be parsed
+        extractors: Extractors to run (default: the eager ones)
+
+    Returns:
+        Dict mapping extractor name to (version, data). data is None for all
+        extractors if root is None, and for a single extractor that fails.
+    """
+    if extractors is None:
+        extractors = get_eager_extractors()
+
+    results = {}
+    for extractor in extractors:
+        data = None
+        if root is not None:
+            try:
+                data = extractor.extract(root)
+            except Exception as e:
+                logger.error(f"Derived data extractor {extractor.name} failed: {e}")
+        results[extractor.name] = (extractor.version, data)
+    return results
+
+
+@derived_extractor("tei.summary", version=1, eager=True)
+def summarize_tei(root) -> Dict[str, Any]:
+    """
+    Extract the header facts used by the collection reports.
+
+    Returns:
+        Dict with label, title, edition_title, doi, has_biblstruct and
+        changes, the list of revisionDesc/change entries in document order.
+        Each change has the raw who, when and status attributes ("" if
+        missing), the resolved annotator name, and the stripped text of its
+        desc element (desc) and of the change itself (text), or None.
+    """
+    tei_metadata = extract_tei_metadata(root)
+
+    changes = []
+    for change in root.findall(".//tei:revisionDesc/tei:change", TEI_NS):
+        who = change.get("who", "")
+        desc_elem = change.find("tei:desc", TEI_NS)
+        changes.append({
+            "who": who,
+            "when": change.get("when", ""),
+            "status": change.get("status", ""),
+            "annotator": get_annotator_name(root, who),
+            "desc": desc_elem.text.strip() if desc_elem is not None and desc_elem.text else None,
+            "text": change.text.strip() if change.text else None,
+        })
+
+    doi_elem = root.find('.//tei:sourceDesc/tei:biblStruct/tei:idno[@type="DOI"]', TEI_NS)
+    if doi_elem is None or not doi_elem.text:
+        doi_elem = root.find('.//tei:publicationStmt/tei:idno[@type="DOI"]', TEI_NS)
+
+    return {
+        "label": get_artifact_label(root),
+        "title": tei_metadata.get("title"),
+        "edition_title": tei_metadata.get("edition_title"),
+        "doi": doi_elem.text.strip() if doi_elem is not None and doi_elem.text else None,
+        "has_biblstruct": root.find(".//tei:sourceDesc/tei:biblStruct", TEI_NS) is not None,
+        "changes": changes,
+    }
+
+
+def change_signatures(summary: Dict[str, Any]) -> List[tuple]:
+    """Return the (who, when, status) signatures of a tei.summary's changes."""
+    return [(c["who"], c["when"], c["status"]) for c in summary["changes"]]
+
+
+class DerivedDataCache:
+    """
+    SQLite store of derived data with dependency injection.
+
+    Thread-safe; results are written with INSERT OR REPLACE, so concurrent
+    computations of the same entry are harmless.
+    """
+
+    def __init__(self, db_dir: Path, logger=None):
+        """
+        Initialize the cache with its SQLite backend.
+
+        Args:
+            db_dir: Path to the database directory
+            logger: Optional logger instance for logging operations
+        """
+        self.db_dir = Path(db_dir)
+        self.logger = logger if logger is not None else get_logger(__name__)
+        self.db_path = self.db_dir / 'derived.db'
+        self.hits = 0
+        self.misses = 0
+        init_database(self.db_path, DERIVED_DATA_SCHEMA, logger)
+
+    def get(self, content_hash: str, extractor: str, file_storage, file_type: str = 'tei') -> Any:
+        """
+        Get the derived data of a single file.
+
+        Returns:
+            The extractor's result, or None if the file cannot be read or parsed
+        """
+        return self.get_many([content_hash], extractor, file_storage, file_type).get(content_hash)
+
+    def get_many(
+        self,
+        content_hashes: Iterable[str],
+        extractor: str,
+        file_storage,
+        file_type: str = 'tei'
+    ) -> Dict[str, Any]:
+        """
+        Get the derived data of many files, computing missing entries.
+
+        Args:
+            content_hashes: File ids (content hashes)
+            extractor: Name of a registered extractor
+            file_storage: FileStorage used to read files without stored results
+            file_type: Storage file type of the files
+
+        Returns:
+            Dict mapping content hash to the extractor's result (None if the
+            content cannot be parsed). Files that cannot be read are omitted.
+        """
+        spec = get_extractor(extractor)
+        hashes = list(dict.fromkeys(content_hashes))
+        results = self._load(hashes, spec)
+
+        missing = [content_hash for content_hash in hashes if content_hash not in results]
+        self.hits += len(results)
+        self.misses += len(missing)
+        if not missing:
+            return results
+
+        # Compute the eager extractors along with the requested one, so that
+        # the file does not need to be parsed again for them
+        extractors = {e.name: e for e in get_eager_extractors()}
+        extractors[spec.name] = spec
+        rows = []
+        for content_hash in missing:
+            try:
+                content = file_storage.read_file(content_hash, file_type)
+            except Exception as e:
+                self.logger.error(f"Failed to read {file_type} file {content_hash}: {e}")
+                continue
+            if not content:
+                continue
+            derived = extract_derived_data(content, extractors.values())
+            results[content_hash] = derived[spec.name][1]
+            rows.append((content_hash, derived))
+
+        self.put_many(rows)
+        return results
+
+    def populate(self, content_hash: str, content: bytes) -> None:
+        """
+        Compute and store the eager extractors for new content (never raises).
+
+        Args:
+            content_hash: Hash of the content
+            content: TEI XML content
+        """
+        try:
+            self.put_many([(content_hash, extract_derived_data(content))])
+        except Exception as e:
+            self.logger.error(f"Failed to store derived data of {content_hash[:8]}: {e}")
+
+    def put_many(self, rows: Iterable[tuple]) -> int:
+        """
+        Store extractor results.
+
+        Args:
+            rows: (content_hash, results) tuples, results as returned by
+                extract_derived_data()
+
+        Returns:
+            Number of stored entries
+        """
+        now = time.time()
+        values = [
+            (content_hash, name, version, json.dumps(data), now)
+            for content_hash, derived in rows
+            for name, (version, data) in derived.items()
+        ]
+        if not values:
+            return 0
+        with transaction(self.db_path) as conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO derived_data
+                    (content_hash, extractor, version, data, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                values
+            )
+        return len(values)
+
+    def prune(self, keep_hashes: Iterable[str]) -> int:
+        """
+        Delete the entries of content that no longer exists and of outdated extractor versions.
+
+        Args:
+            keep_hashes: Hashes of all files that still exist
+
+        Returns:
+            Number of deleted entries
+        """
+        keep = set(keep_hashes)
+        with get_connection(self.db_path) as conn:
+            stored = [
+                (row['content_hash'], row['extractor'], row['version'])
+                for row in conn.execute(
+                    "SELECT content_hash, extractor, version FROM derived_data"
+                )
+            ]
+
+        with _extractors_lock:
+            versions = {name: extractor.version for name, extractor in _extractors.items()}
+        stale = [
+            key for key in stored
+            if key[0] not in keep or versions.get(key[1], key[2]) != key[2]
+        ]
+        if stale:
+            with transaction(self.db_path) as conn:
+                conn.executemany(
+                    "DELETE FROM derived_data WHERE content_hash = ? AND extractor = ? AND version = ?",
+                    stale
+                )
+            self.logger.info(f"Pruned {len(stale)} derived data entries")
+        return len(stale)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return the number of stored entries and the hit/miss counters."""
+        with get_connection(self.db_path) as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM derived_data").fetchone()[0]
+        return {'entries': entries, 'hits': self.hits, 'misses': self.misses}
+
+    def _load(self, hashes: List[str], spec: DerivedExtractor) -> Dict[str, Any]:
+        """Load the stored results of an extractor, in chunks of QUERY_CHUNK_SIZE hashes."""
+        results = {}
+        with get_connection(self.db_path) as conn:
+            for start in range(0, len(hashes), QUERY_CHUNK_SIZE):
+                chunk = hashes[start:start + QUERY_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = conn.execute(
+                    f"""
+                    SELECT content_hash, data FROM derived_data
+                    WHERE extractor = ? AND version = ? AND content_hash IN ({placeholders})
+                    """,
+                    (spec.name, spec.version, *chunk)
+                )
+                for row in cursor:
+                    results[row['content_hash']] = json.loads(row['data'])
+        return results
@@ -0,0 +1,350 @@
+"""
+Concurrent DOI metadata lookup with a persistent cache.
+
+Bulk metadata updates look up thousands of DOIs at CrossRef and DataCite.
+DoiResolver resolves them concurrently while staying within the APIs' limits:
+
+- At most DOI_LOOKUP_CONCURRENCY lookups run at the same time.
+- Requests to each host are spaced to at most DOI_HOST_RATE per second.
+- Timeouts, connection errors, 429 and 5xx responses are retried up to
+  DOI_LOOKUP_RETRIES times with exponential backoff (a Retry-After header
+  takes precedence).
+- Results are stored in doi_metadata.db (DoiMetadataCache), so that repeated
+  runs only query the APIs for DOIs they have not seen. DOIs unknown to both
+  registries are stored as not found and asked for again after
+  DOI_NOT_FOUND_TTL seconds. Failed lookups are not stored.
+"""
+
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from fastapi_app.lib.core.db_utils import init_database
+from fastapi_app.lib.core.executors import run_in_io_pool
+from fastapi_app.lib.core.sqlite_utils import get_connection, transaction
+from fastapi_app.lib.utils.doi_utils import (
+    CROSSREF_API_URL,
+    DATACITE_API_URL,
+    crossref_to_metadata,
+    datacite_to_metadata,
+    normalize_doi,
+    validate_doi,
+)
+from fastapi_app.lib.utils.logging_utils import get_logger
+
+# Maximum number of concurrent lookups
+DOI_LOOKUP_CONCURRENCY = int(os.environ.get("DOI_LOOKUP_CONCURRENCY", 4))
+
+# Maximum number of requests per second to each API host
+DOI_HOST_RATE = float(os.environ.get("DOI_HOST_RATE", 5))
+
+# Number of retries of failed requests
+DOI_LOOKUP_RETRIES = int(os.environ.get("DOI_LOOKUP_RETRIES", 3))
+
+# Seconds after which DOIs that were not found are looked up again
+DOI_NOT_FOUND_TTL = int(os.environ.get("DOI_NOT_FOUND_TTL", 7 * 24 * 3600))
+
+# Request timeout in seconds
+DOI_LOOKUP_TIMEOUT = 10
+
+# Delay before the first retry in seconds, doubled for each further retry
+RETRY_BACKOFF = 1.0
+
+# Longest honoured Retry-After delay in seconds
+MAX_RETRY_DELAY = 60.0
+
+QUERY_CHUNK_SIZE = 500
+
+DOI_METADATA_SCHEMA = """
+CREATE TABLE IF NOT EXISTS doi_metadata (
+    doi TEXT PRIMARY KEY,       -- Normalized, lowercase DOI
+    data TEXT,                  -- JSON metadata, NULL if the DOI was not found
+    fetched_at REAL NOT NULL
+)
+"""
+
+
+class DoiMetadataCache:
+    """
+    SQLite store of DOI metadata with dependency injection.
+
+    DOIs are case-insensitive and stored in lowercase.
+    """
+
+    def __init__(self, db_dir: Path, not_found_ttl: int = DOI_NOT_FOUND_TTL, logger=None):
+        """
+        Initialize the cache with its SQLite backend.
+
+        Args:
+            db_dir: Path to the database directory
+            not_found_ttl: Seconds for which a "not found" result is valid
+            logger: Optional logger instance for logging operations
+        """
+        self.db_dir = Path(db_dir)
+        self.not_found_ttl = not_found_ttl
+        self.logger = logger if logger is not None else get_logger(__name__)
+        self.db_path = self.db_dir / 'doi_metadata.db'
+        init_database(self.db_path, DOI_METADATA_SCHEMA, logger)
+
+    def get_many(self, dois: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get the stored results of DOIs.
+
+        Args:
+            dois: Normalized DOIs
+
+        Returns:
+            Dict mapping each DOI with a valid stored result to its metadata,
+            or to None if it was not found. Other DOIs are omitted.
+        """
+        keys = {doi.lower(): doi for doi in dois}
+        lowered = list(keys)
+        expired_before = time.time() - self.not_found_ttl
+        results = {}
+        with get_connection(self.db_path) as conn:
+            for start in range(0, len(lowered), QUERY_CHUNK_SIZE):
+                chunk = lowered[start:start + QUERY_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = conn.execute(
+                    f"SELECT doi, data, fetched_at FROM doi_metadata WHERE doi IN ({placeholders})",
+                    chunk
+                )
+                for row in cursor:
+                    if row['data'] is None and row['fetched_at'] < expired_before:
+                        continue
+                    results[keys[row['doi']]] = json.loads(row['data']) if row['data'] else None
+        return results
+
+    def put(self, doi: str, metadata: Optional[Dict[str, Any]]) -> None:
+        """
+        Store the result of a lookup.
+
+        Args:
+            doi: Normalized DOI
+            metadata: Metadata, or None if the DOI was not found
+        """
+        with transaction(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO doi_metadata (doi, data, fetched_at) VALUES (?, ?, ?)",
+                (doi.lower(), json.dumps(metadata) if metadata is not None else None, time.time())
+            )
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return the number of stored DOIs and of DOIs that were not found."""
+        with get_connection(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT COUNT(*), SUM(data IS NULL) FROM doi_metadata"
+            ).fetchone()
+        return {'entries': row[0], 'not_found': row[1] or 0}
+
+
+class HostRateLimiter:
+    """Spaces requests to each host to at most `rate` per second (for one event loop)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+
+    async def acquire(self, host: str) -> None:
+        """Wait until the next request to the host may be sent."""
+        if not self.interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class DoiLookupError(Exception):
+    """A DOI lookup failed after all retries."""
+
+
+class DoiResolver:
+    """
+    Resolves DOIs to bibliographic metadata via CrossRef, falling back to DataCite.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[DoiMetadataCache] = None,
+        concurrency: int = DOI_LOOKUP_CONCURRENCY,
+        host_rate: float = DOI_HOST_RATE,
+        retries: int = DOI_LOOKUP_RETRIES,
+        timeout: float = DOI_LOOKUP_TIMEOUT,
+        backoff: float = RETRY_BACKOFF,
+        crossref_url: str = CROSSREF_API_URL,
+        datacite_url: str = DATACITE_API_URL,
+        logger=None
+    ):
+        """
+        Args:
+            cache: Persistent result cache (no caching if None)
+            concurrency: Maximum number of concurrent lookups
+            host_rate: Maximum number of requests per second to each host
+            retries: Number of retries of failed requests
+            timeout: Request timeout in seconds
+            backoff: Delay before the first retry in seconds
+            crossref_url: CrossRef works endpoint, the DOI is appended
+            datacite_url: DataCite dois endpoint, the DOI is appended
+            logger: Optional logger instance for logging operations
+        """
+        self.cache = cache
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self.crossref_url = crossref_url
+        self.datacite_url = datacite_url
+        self.logger = logger if logger is not None else get_logger(__name__)
+        self.rate_limiter = HostRateLimiter(host_rate)
+        self.session = requests.Session()
+        self.stats = {'cached': 0, 'fetched': 0, 'not_found': 0, 'failed': 0, 'retries': 0}
+
+    async def resolve(self, doi: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve a single DOI.
+
+        Returns:
+            Metadata dict, or None if the DOI is invalid, unknown or the lookup failed
+        """
+        return (await self.resolve_many([doi])).get(doi)
+
+    async def resolve_many(
+        self,
+        dois: Iterable[str],
+        progress_callback: Optional[Callable[[int, int, str], None]] = None,
+        cancellation_check: Optional[Callable[[], bool]] = None
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Resolve many DOIs concurrently.
+
+        Args:
+            dois: DOIs in any notation accepted by normalize_doi()
+            progress_callback: Optional callback(done, total, doi) after each lookup
+            cancellation_check: Optional callback() -> bool; when it returns
+                True, no further lookups are started
+
+        Returns:
+            Dict mapping each given DOI to its metadata, or to None if the DOI
+            is invalid, unknown or the lookup failed. If cancelled, DOIs that
+            were not looked up are omitted.
+        """
+        by_doi: Dict[str, list] = {}
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        for given in dict.fromkeys(dois):
+            doi = normalize_doi(given) if given else ""
+            if not validate_doi(doi):
+                self.logger.warning(f"Invalid DOI format, skipping lookup: {given}")
+                results[given] = None
+                continue
+            by_doi.setdefault(doi, []).append(given)
+
+        cached = await run_in_io_pool(self.cache.get_many, list(by_doi)) if self.cache else {}
+        self.stats['cached'] += len(cached)
+        for doi, metadata in cached.items():
+            for given in by_doi.pop(doi):
+                results[given] = metadata
+
+        pending = list(by_doi)
+        total = len(pending)
+        done = 0
+
+        async def worker():
+            nonlocal done
+            while pending:
+                if cancellation_check and cancellation_check():
+                    return
+                doi = pending.pop()
+                metadata = await self._lookup(doi)
+                for given in by_doi[doi]:
+                    results[given] = metadata
+                done += 1
+                if progress_callback:
+                    progress_callback(done, total, doi)
+
+        if pending:
+            self.logger.info(
+                f"Looking up {total} DOIs ({len(cached)} cached, concurrency {self.concurrency})"
+            )
+            await asyncio.gather(*(worker() for _ in range(min(self.concurrency, total))))
+        return results
+
+    async def _lookup(self, doi: str) -> Optional[Dict[str, Any]]:
+        """Look up a DOI at CrossRef, then DataCite, and store the result (never raises)."""
+        try:
+            data = await self._fetch(f"{self.crossref_url}{doi}")
+            if data is not None:
+                metadata = crossref_to_metadata(data)
+            else:
+                self.logger.debug(f"DOI {doi} not found at CrossRef, trying DataCite")
+                data = await self._fetch(f"{self.datacite_url}{doi}")
+                metadata = datacite_to_metadata(data) if data is not None else None
+        except Exception as e:
+            self.stats['failed'] += 1
+            self.logger.warning(f"DOI lookup failed for {doi}: {e}")
+            return None
+
+        if metadata is None:
+            self.stats['not_found'] += 1
+            self.logger.warning(f"DOI {doi} not found at CrossRef or DataCite")
+        else:
+            self.stats['fetched'] += 1
+        if self.cache:
+            try:
+                await run_in_io_pool(self.cache.put, doi, metadata)
+            except Exception as e:
+                self.logger.error(f"Failed to cache metadata of DOI {doi}: {e}")
+        return metadata
+
+    async def _fetch(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        GET a JSON document, retrying transient failures.
+
+        Returns:
+            The parsed JSON, or None if the server responded with 404
+
+        Raises:
+            DoiLookupError: If the request still fails after all retries
+        """
+        host = urlparse(url).netloc
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire(host)
+            retry_after = None
+            try:
+                response = await run_in_io_pool(self.session.get, url, timeout=self.timeout)
+                if response.status_code == 404:
+                    return None
+                if response.status_code == 429 or response.status_code >= 500:
+                    error = f"HTTP {response.status_code}"
+                    retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+                else:
+                    response.raise_for_status()
+                    return response.json()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = str(e) or type(e).__name__
+            except requests.exceptions.RequestException as e:
+                raise DoiLookupError(f"{url}: {e}") from e
+
+            if attempt >= self.retries:
+                raise DoiLookupError(f"{url}: {error} after {attempt + 1} attempts")
+            delay = retry_after if retry_after is not None else self.backoff * 2 ** attempt
+            attempt += 1
+            self.stats['retries'] += 1
+            self.logger.debug(f"Retrying {url} in {delay:.1f}s ({error})")
+            await asyncio.sleep(delay)
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds."""
+    try:
+        return min(max(float(value), 0.0), MAX_RETRY_DELAY) if value else None
+    except ValueError:
+        return None
@@ -0,0 +1,417 @@
+"""
+Versioned snapshot of the document-centric file list.
+
+Keeps the grouped listing served by GET /api/files/list in memory as
+JSON-ready dicts, one per document. The snapshot is versioned by the
+file_changes log in metadata.db (see migration 009), which is filled by
+triggers on every write to the files table. A refresh therefore costs a
+single MAX(version) lookup when nothing changed, and otherwise reloads only
+the documents that changed since the snapshot's version. Because the
+version lives in the shared database, all worker processes agree on it,
+which makes it usable as the basis of an ETag.
+
+Per-request state (lock overlay, collection access, variant filter) is
+applied on top of the shared snapshot by documents_view().
+"""
+
+import hashlib
+import json
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from fastapi_app.lib.core.database import DatabaseManager
+from fastapi_app.lib.models.models_files import (
+    ArtifactModel,
+    DocumentGroupModel,
+    FileItemModel,
+)
+from fastapi_app.lib.repository.file_repository import FileRepository
+from fastapi_app.lib.utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Remote locks are considered active for heartbeat interval + grace period
+REMOTE_LOCK_TTL_SECONDS = 90 + 360
+
+# Number of serialized response bodies kept per snapshot (keyed by ETag)
+BODY_CACHE_SIZE = 16
+
+
+def build_file_item(file_row: dict) -> FileItemModel:
+    """
+    Build FileItemModel from a listing row (for source files).
+
+    Args:
+        file_row: File row dict from FileRepository.list_document_groups()
+
+    Returns:
+        FileItemModel with stable_id as id, label from file.label, doc_metadata.title, doc_id, or filename
+    """
+    # Priority: file.label > doc_metadata.title > doc_id > filename
+    label = None
+    doc_metadata = file_row.get('doc_metadata')
+
+    if file_row['label'] and file_row['label'].lower() not in ['untitled', 'unknown title']:
+        label = file_row['label']
+    elif doc_metadata and isinstance(doc_metadata, dict):
+        title = doc_metadata.get('title', '')
+        if title and title.lower() not in ['untitled', 'unknown title']:
+            label = title
+
+    # Fallback to doc_id or filename
+    if not label:
+        if file_row['doc_id']:
+            label = file_row['doc_id']
+        else:
+            # Remove extension from filename
+            label = os.path.splitext(file_row['filename'])[0]
+
+    return FileItemModel(
+        id=file_row['stable_id'],
+        filename=file_row['filename'],
+        file_type=file_row['file_type'],
+        label=label,
+        file_size=file_row['file_size'] or 0,
+        created_at=file_row['created_at'],
+        updated_at=file_row['updated_at'],
+        created_by=file_row['created_by']  # Owner for access control
+    )
+
+
+def build_artifact(file_row: dict) -> ArtifactModel:
+    """
+    Build ArtifactModel from a listing row (for TEI artifacts).
+
+    Args:
+        file_row: File row dict from FileRepository.list_document_groups()
+
+    Returns:
+        ArtifactModel with all required fields
+    """
+    # Extract label - prefer metadata label (edition title), with smart fallbacks
+    if file_row['label'] and file_row['label'].lower() not in ['untitled', 'unknown title']:
+        label = file_row['label']
+    elif file_row['is_gold_standard']:
+        label = f"Gold ({file_row['variant']})" if file_row['variant'] else "Gold"
+    else:
+        # Fallback to doc_id or filename
+        if file_row['doc_id']:
+            label = file_row['doc_id']
+        else:
+            label = os.path.splitext(file_row['filename'])[0]
+
+    return ArtifactModel(
+        id=file_row['stable_id'],
+        filename=file_row['filename'],
+        file_type=file_row['file_type'],
+        label=label,
+        file_size=file_row['file_size'] or 0,
+        created_at=file_row['created_at'],
+        updated_at=file_row['updated_at'],
+        variant=file_row['variant'],
+        version=file_row['version'],
+        is_gold_standard=file_row['is_gold_standard'],
+        status=file_row['status'],
+        is_locked=False,  # Lock overlay is applied per request
+        access_control=None,
+        created_by=file_row['created_by']  # Owner for access control
+    )
+
+
+def build_document_group(document_row: dict) -> DocumentGroupModel:
+    """
+    Build DocumentGroupModel from a pre-grouped document row.
+
+    Args:
+        document_row: Dict from FileRepository.list_document_groups()
+
+    Returns:
+        DocumentGroupModel with source file and flattened artifacts
+    """
+    source_row = document_row['source']
+
+    artifacts = []
+    if source_row['file_type'] != 'pdf' and source_row['variant']:
+        # Standalone file (e.g., RNG schema) that is its own source: create an
+        # artifact entry from it so that variant filtering works on the client
+        artifacts.append(build_artifact(source_row))
+
+    for file_row in document_row['files']:
+        # Build artifact for TEI and RNG files (additional PDFs are skipped)
+        if file_row['file_type'] in ['tei', 'rng']:
+            artifacts.append(build_artifact(file_row))
+
+    return DocumentGroupModel(
+        doc_id=document_row['doc_id'],
+        collections=source_row['doc_collections'] or [],
+        doc_metadata=source_row['doc_metadata'] or {},
+        source=build_file_item(source_row),
+        artifacts=artifacts
+    )
+
+
+def get_remote_locked_ids(remote_locks: dict, now: Optional[datetime] = None) -> set:
+    """
+    Get the stable_ids of files with a non-expired remote lock.
+
+    Remote lock state is populated during WebDAV sync and stored in
+    sync_metadata['remote_locks'].
+
+    Args:
+        remote_locks: Dict mapping stable_id -> {client_id, acquired_at, updated_at}
+        now: Reference time (defaults to current UTC time)
+
+    Returns:
+        Set of locked stable_ids
+    """
+    now = now or datetime.now(timezone.utc)
+    locked = set()
+    for stable_id, lock_info in remote_locks.items():
+        updated_at_str = lock_info.get("updated_at") or lock_info.get("acquired_at", "")
+        if not updated_at_str:
+            continue
+        try:
+            updated_at = datetime.fromisoformat(updated_at_str)
+            if updated_at.tzinfo is None:
+                updated_at = updated_at.replace(tzinfo=timezone.utc)
+            if (now - updated_at).total_seconds() < REMOTE_LOCK_TTL_SECONDS:
+                locked.add(stable_id)
+        except (ValueError, TypeError):
+            continue
+    return locked
+
+
+class FileListSnapshot:
+    """
+    In-memory, incrementally maintained snapshot of the grouped file list.
+
+    Thread-safe. One instance exists per DatabaseManager, see
+    get_file_list_snapshot().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = -1
+        self._documents: Dict[str, dict] = {}
+        self._sort_keys: Dict[str, str] = {}
+        self._variants: Dict[str, frozenset] = {}
+        self._ordered_doc_ids: Optional[List[str]] = None
+        self._remote_locks: dict = {}
+        self._bodies: "OrderedDict[str, bytes]" = OrderedDict()
+
+    @property
+    def remote_locks(self) -> dict:
+        """Remote lock cache as of the snapshot version."""
+        return self._remote_locks
+
+    def refresh(self, repo: FileRepository) -> int:
+        """
+        Bring the snapshot up to date with the database.
+
+        Performs a full build on first use (or if the change log no longer
+        covers the snapshot's version), and otherwise reloads only the
+        documents that changed since the snapshot version.
+
+        Args:
+            repo: File repository for the database this snapshot belongs to
+
+        Returns:
+            Current snapshot version
+        """
+        current_version = repo.get_change_version()
+        with self._lock:
+            if current_version == self.version:
+                return self.version
+
+            changed = None
+            if 0 <= self.version < current_version:
+                changed = repo.get_changed_doc_ids(self.version, current_version)
+
+            if changed is None:
+                self._full_build(repo)
+            else:
+                self._apply_changes(repo, changed)
+
+            self.version = current_version
+            self._ordered_doc_ids = None
+            self._bodies.clear()
+            return self.version
+
+    def _full_build(self, repo: FileRepository) -> None:
+        """Rebuild all documents and the remote lock cache."""
+        documents: Dict[str, dict] = {}
+        sort_keys: Dict[str, str] = {}
+        variants: Dict[str, frozenset] = {}
+        for document_row in repo.list_document_groups():
+            self._store(document_row, documents, sort_keys, variants)
+        # Swap in new dicts so that concurrent readers see a consistent state
+        self._documents, self._sort_keys, self._variants = documents, sort_keys, variants
+        self._remote_locks = repo.get_remote_locks()
+        logger.debug(f"Built file list snapshot with {len(documents)} documents")
+
+    def _apply_changes(self, repo: FileRepository, changed: set) -> None:
+        """Reload the given documents (None entry = remote locks changed)."""
+        if None in changed:
+            changed.discard(None)
+            self._remote_locks = repo.get_remote_locks()
+
+        documents = dict(self._documents)
+        sort_keys = dict(self._sort_keys)
+        variants = dict(self._variants)
+        for doc_id in changed:
+            documents.pop(doc_id, None)
+            sort_keys.pop(doc_id, None)
+            variants.pop(doc_id, None)
+
+        for document_row in repo.list_document_groups(doc_ids=sorted(changed)):
+            self._store(document_row, documents, sort_keys, variants)
+
+        self._documents, self._sort_keys, self._variants = documents, sort_keys, variants
+        logger.debug(f"Reloaded {len(changed)} document(s) in file list snapshot")
+
+    @staticmethod
+    def _store(
+        document_row: dict,
+        documents: Dict[str, dict],
+        sort_keys: Dict[str, str],
+        variants: Dict[str, frozenset]
+    ) -> None:
+        """Build a document group and store it as JSON-ready dict."""
+        doc_id = document_row['doc_id']
+        doc = build_document_group(document_row).model_dump(mode='json')
+        documents[doc_id] = doc
+        rows = [document_row['source'], *document_row['files']]
+        sort_keys[doc_id] = max(
+            (row['created_at'].isoformat() for row in rows if row['created_at']), default=''
+        )
+        variants[doc_id] = frozenset(a['variant'] for a in doc['artifacts'])
+
+    def _doc_ids_in_order(self) -> List[str]:
+        """Doc ids ordered by their most recently created file (newest first)."""
+        if self._ordered_doc_ids is None:
+            self._ordered_doc_ids = sorted(
+                self._documents, key=lambda doc_id: self._sort_keys.get(doc_id, ''), reverse=True
+            )
+        return self._ordered_doc_ids
+
+    def documents_view(
+        self,
+        variant: Optional[str] = None,
+        collections: Optional[Iterable[str]] = None,
+        locked_ids: Optional[set] = None,
+        doc_ids: Optional[Iterable[str]] = None
+    ) -> List[dict]:
+        """
+        Get documents with request-specific filters and lock overlay applied.
+
+        Stored documents are never modified; documents that need changes are
+        shallow-copied.
+
+        Args:
+            variant: Only include documents with an artifact of this variant
+            collections: Accessible collections (None = all); documents outside
+                them are excluded and their collection lists are trimmed
+            locked_ids: Artifact stable_ids to mark as locked
+            doc_ids: Only include these documents (in snapshot order)
+
+        Returns:
+            List of document dicts
+        """
+        with self._lock:
+            ordered = self._doc_ids_in_order()
+            documents = self._documents
+            variants = self._variants
+
+        if doc_ids is not None:
+            wanted = set(doc_ids)
+            ordered = [doc_id for doc_id in ordered if doc_id in wanted]
+
+        accessible = set(collections) if collections is not None else None
+        locked_ids = locked_ids or set()
+
+        result = []
+        for doc_id in ordered:
+            doc = documents.get(doc_id)
+            if doc is None:
+                continue
+            if variant is not None and variant not in variants[doc_id]:
+                continue
+            if accessible is not None:
+                doc_collections = [col for col in doc['collections'] if col in accessible]
+                if not doc_collections:
+                    continue
+                if len(doc_collections) != len(doc['collections']):
+                    doc = {**doc, 'collections': doc_collections}
+            if locked_ids and any(a['id'] in locked_ids for a in doc['artifacts']):
+                doc = {
+                    **doc,
+                    'artifacts': [
+                        {**a, 'is_locked': True} if a['id'] in locked_ids else a
+                        for a in doc['artifacts']
+                    ]
+                }
+            result.append(doc)
+        return result
+
+    @staticmethod
+    def etag(version: int, *parts) -> str:
+        """
+        Compute a strong ETag for a response derived from a snapshot version.
+
+        The version comes first so that ETags increase monotonically with
+        database changes; the digest covers all request-specific inputs.
+
+        Args:
+            version: Snapshot version as returned by refresh()
+            *parts: Request-specific values the response depends on
+
+        Returns:
+            Quoted ETag string
+        """
+        digest = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:16]
+        return f'"{version}-{digest}"'
+
+    def get_body(self, etag: str) -> Optional[bytes]:
+        """Get a cached serialized response body by its ETag."""
+        with self._lock:
+            body = self._bodies.get(etag)
+            if body is not None:
+                self._bodies.move_to_end(etag)
+            return body
+
+    def put_body(self, etag: str, body: bytes) -> None:
+        """Cache a serialized response body by its ETag."""
+        with self._lock:
+            self._bodies[etag] = body
+            while len(self._bodies) > BODY_CACHE_SIZE:
+                self._bodies.popitem(last=False)
+
+
+_snapshots: "weakref.WeakKeyDictionary[DatabaseManager, FileListSnapshot]" = weakref.WeakKeyDictionary()
+_snapshots_lock = threading.Lock()
+
+
+def get_file_list_snapshot(db: DatabaseManager) -> FileListSnapshot:
+    """
+    Get the file list snapshot for a database.
+
+    Args:
+        db: DatabaseManager of metadata.db
+
+    Returns:
+        FileListSnapshot instance (created on first use)
+    """
+    with _snapshots_lock:
+        snapshot = _snapshots.get(db)
+        if snapshot is None:
+            snapshot = _snapshots[db] = FileListSnapshot()
+        return snapshot
+
+
+def serialize_file_list(payload: dict) -> bytes:
+    """Serialize a file list payload to compact JSON bytes."""
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
@@ -5,13 +5,15 @@ Provides functions for:
 - Checking if TEI documents have biblStruct elements
 - Extracting DOIs from TEI headers
 - Updating biblStruct elements with complete metadata
-- Batch updating TEI files with progress tracking and cancellation support
+- Batch updating TEI files with progress tracking and cancellation support,
+  with concurrent, cached DOI lookups (see doi_resolver.py)
 """
 
 import asyncio
 import logging
+from pathlib import Path
 from lxml import etree
-from typing import Callable, Optional
+from typing import Callable, Dict, Iterable, Optional
 
 from fastapi_app.lib.repository.file_repository import FileRepository
 from fastapi_app.lib.storage.file_storage import FileStorage
@@ -19,6 +21,9 @@ from fastapi_app.lib.utils.tei_utils import (
     serialize_tei_with_formatted_header,
     extract_processing_instructions
 )
+from fastapi_app.lib.core.executors import run_in_io_pool
+from fastapi_app.lib.services.derived_data import DerivedDataCache
+from fastapi_app.lib.services.doi_resolver import DoiMetadataCache, DoiResolver
 from fastapi_app.lib.services.metadata_extraction import get_metadata_for_document
 from fastapi_app.lib.models.models import FileUpdate
 from fastapi_app.lib.utils.doi_utils import decode_filename, validate_doi
@@ -261,6 +266,51 @@ def update_biblstruct_in_tei(tei_root: etree._Element, metadata: dict) -> tuple[
     return (True, "updated")
 
 
+def group_tei_files_by_doc_id(tei_files: Iterable) -> Dict[str, list]:
+    """
+    Index TEI files by the doc_id of their document.
+
+    Args:
+        tei_files: TEI file records
+
+    Returns:
+        Dict mapping doc_id to the list of its TEI files, in the given order
+    """
+    tei_by_doc_id: Dict[str, list] = {}
+    for tei_file in tei_files:
+        tei_by_doc_id.setdefault(tei_file.doc_id, []).append(tei_file)
+    return tei_by_doc_id
+
+
+def _find_doi(pdf_obj, tei_summary: dict | None) -> str | None:
+    """
+    Find the DOI of a document.
+
+    Sources in priority order: the doc_id (many doc_ids are encoded DOIs),
+    the header of the first TEI file and the PDF's doc_metadata.
+    """
+    doc_id = pdf_obj.doc_id
+    if doc_id:
+        try:
+            decoded_doc_id = decode_filename(doc_id)
+            if validate_doi(decoded_doc_id):
+                logger.debug(f"  DOI found from doc_id: {decoded_doc_id}")
+                return decoded_doc_id
+        except Exception:
+            # Not an encoded DOI, that's fine
+            pass
+
+    if tei_summary and tei_summary.get('doi'):
+        logger.debug(f"  DOI found in TEI header: {tei_summary['doi']}")
+        return tei_summary['doi']
+
+    if pdf_obj.doc_metadata and pdf_obj.doc_metadata.get('doi'):
+        logger.debug(f"  DOI found in PDF metadata: {pdf_obj.doc_metadata['doi']}")
+        return pdf_obj.doc_metadata['doi']
+
+    return None
+
+
 async def update_tei_metadata(
     file_repo: FileRepository,
     file_storage: FileStorage,
@@ -268,26 +318,35 @@ async def update_tei_metadata(
     force: bool = False,
     extraction_fallback: bool = True,
     progress_callback: Optional[Callable[[int, int, str], None]] = None,
-    cancellation_check: Optional[Callable[[], bool]] = None
+    cancellation_check: Optional[Callable[[], bool]] = None,
+    doi_resolver: Optional[DoiResolver] = None,
+    derived_cache: Optional[DerivedDataCache] = None
 ) -> dict:
     """
     Update all TEI files with complete metadata from DOI lookup or LLM extraction.
 
     Workflow:
-    1. Query all PDF entries (which have doc_metadata and doc_id)
-    2. For each PDF, enrich metadata using DOI lookup or LLM extraction
-    3. Find all TEI files linked via doc_id
-    4. Update each TEI file's biblStruct with enriched metadata
+    1. Query all PDF entries (which have doc_metadata and doc_id) and all TEI
+       files, indexed by doc_id
+    2. Select the PDFs with linked TEI files to update and find their DOIs,
+       using the stored tei.summary facts of the TEI files
+    3. Resolve all DOIs concurrently (cached in doi_metadata.db)
+    4. For each PDF, use the DOI metadata or LLM extraction and update the
+       biblStruct of its TEI files
 
     Args:
         file_repo: FileRepository instance for database operations
         file_storage: FileStorage instance for file operations
         limit: Maximum number of PDFs to process (for testing)
         force: If True, overwrite existing biblStruct elements
-        extraction_fallback: If True, use LLM extraction when DOI lookup fails.
+        extraction_fallback: If True, use LLM extraction when no DOI is found.
                              If False, skip documents without a DOI.
         progress_callback: Optional callback(current, total, label) for progress updates
         cancellation_check: Optional callback() -> bool to check if operation should be cancelled
+        doi_resolver: DoiResolver for DOI lookups (default: one with a cache
+                      in the database directory)
+        derived_cache: DerivedDataCache for TEI facts (default: the one in
+                       the database directory)
 
     Returns:
         Statistics dict with keys: processed, updated, skipped, errors
@@ -295,125 +354,121 @@ async def update_tei_metadata(
     Raises:
         Exception: If operation is cancelled via cancellation_check
     """
-    # Get all PDF files (these have doc_metadata and doc_id)
+    # Get all PDF files (these have doc_metadata and doc_id) and all TEI files
     try:
         all_pdfs = file_repo.list_files(file_type="pdf")
+        all_tei_files = file_repo.list_files(file_type="tei")
     except Exception as e:
         logger.error(f"Failed to query database: {e}")
         raise
 
-    logger.info(f"Found {len(all_pdfs)} PDF files in database")
+    logger.info(f"Found {len(all_pdfs)} PDF files and {len(all_tei_files)} TEI files in database")
 
     if limit:
         all_pdfs = all_pdfs[:limit]
         logger.info(f"Limited to {limit} PDFs for testing")
 
+    db_dir = Path(file_repo.db.db_path).parent
+    if derived_cache is None:
+        derived_cache = DerivedDataCache(db_dir)
+    if doi_resolver is None:
+        doi_resolver = DoiResolver(DoiMetadataCache(db_dir))
+
+    tei_by_doc_id = group_tei_files_by_doc_id(all_tei_files)
+    summaries = await run_in_io_pool(
+        derived_cache.get_many,
+        [tei.id for pdf in all_pdfs for tei in tei_by_doc_id.get(pdf.doc_id, [])],
+        "tei.summary",
+        file_storage
+    )
+
     pdfs_processed = 0
     tei_files_updated = 0
     pdfs_skipped = 0
     errors = 0
 
+    # Select the PDFs to update and find their DOIs
+    candidates = []
     for pdf_obj in all_pdfs:
+        pdfs_processed += 1
+        doc_id = pdf_obj.doc_id
+        logger.debug(f"Processing PDF {pdf_obj.stable_id} (doc_id={doc_id})")
+
+        linked_tei_files = tei_by_doc_id.get(doc_id, [])
+        if not linked_tei_files:
+            logger.debug(f"  No TEI files found for doc_id={doc_id}")
+            pdfs_skipped += 1
+            continue
+
+        logger.debug(f"  Found {len(linked_tei_files)} linked TEI file(s)")
+
+        # Check if any TEI already has biblStruct (unless force)
+        if not force and any(
+            (summaries.get(tei_obj.id) or {}).get('has_biblstruct')
+            for tei_obj in linked_tei_files
+        ):
+            logger.debug(f"  Skipping - TEI already has biblStruct (use --force to overwrite)")
+            pdfs_skipped += 1
+            continue
+
+        doi = _find_doi(pdf_obj, summaries.get(linked_tei_files[0].id))
+        if not doi:
+            logger.debug(f"  DOI: not found")
+
+            # Skip documents without DOI when extraction fallback is disabled
+            if not extraction_fallback:
+                logger.debug(f"  No DOI found and extraction fallback disabled - skipping")
+                pdfs_skipped += 1
+                continue
+
+        candidates.append((pdf_obj, linked_tei_files, doi))
+
+    # Resolve all DOIs at once
+    def on_doi_resolved(done: int, total: int, doi: str):
+        if progress_callback:
+            progress_callback(done, total, f"DOI {done}/{total}: {doi[:20]}...")
+
+    resolved = await doi_resolver.resolve_many(
+        [doi for _, _, doi in candidates if doi],
+        progress_callback=on_doi_resolved,
+        cancellation_check=cancellation_check
+    )
+
+    for index, (pdf_obj, linked_tei_files, doi) in enumerate(candidates, 1):
         # Check for cancellation
         if cancellation_check and cancellation_check():
             logger.info("Update cancelled by user")
             raise Exception("Update cancelled by user")
 
-        pdfs_processed += 1
         pdf_stable_id = pdf_obj.stable_id
         doc_id = pdf_obj.doc_id
 
-        logger.debug(f"Processing PDF {pdf_stable_id} (doc_id={doc_id})")
-
         # Update progress
         if progress_callback:
             progress_callback(
-                pdfs_processed,
-                len(all_pdfs),
-                f"PDF {pdfs_processed}/{len(all_pdfs)}: {doc_id[:20] if doc_id else pdf_stable_id[:20]}..."
+                index,
+                len(candidates),
+                f"PDF {index}/{len(candidates)}: {doc_id[:20] if doc_id else pdf_stable_id[:20]}..."
             )
             await asyncio.sleep(0)  # Yield to allow SSE event delivery
 
         try:
-            # Find all TEI files linked to this PDF via doc_id
-            all_tei_files = file_repo.list_files(file_type="tei")
-            linked_tei_files = [f for f in all_tei_files if f.doc_id == doc_id]
-
-            if not linked_tei_files:
-                logger.debug(f"  No TEI files found for doc_id={doc_id}")
-                pdfs_skipped += 1
-                continue
-
-            logger.debug(f"  Found {len(linked_tei_files)} linked TEI file(s)")
-
-            # Check if any TEI already has biblStruct (unless force)
-            if not force:
-                already_has_biblstruct = False
-                for tei_obj in linked_tei_files:
-                    tei_content = file_storage.read_file(tei_obj.id, "tei")
-                    if tei_content:
-                        tei_root = etree.fromstring(tei_content)
-                        if has_biblstruct(tei_root):
-                            already_has_biblstruct = True
-                            break
-
-                if already_has_biblstruct:
-                    logger.debug(f"  Skipping - TEI already has biblStruct (use --force to overwrite)")
-                    pdfs_skipped += 1
-                    continue
-
-            # Extract DOI from multiple sources (in priority order)
-            doi = None
-
-            # 1. Try decoding doc_id as DOI (many doc_ids are encoded DOIs)
-            if doc_id:
-                try:
-                    decoded_doc_id = decode_filename(doc_id)
-                    if validate_doi(decoded_doc_id):
-                        doi = decoded_doc_id
-                        logger.debug(f"  DOI found from doc_id: {doi}")
-                except Exception:
-                    # Not an encoded DOI, that's fine
-                    pass
-
-            # 2. Fallback to first TEI file
-            if not doi:
-                first_tei_content = file_storage.read_file(linked_tei_files[0].id, "tei")
-                if first_tei_content:
-                    first_tei_root = etree.fromstring(first_tei_content)
-                    doi = extract_doi_from_tei(first_tei_root)
-                    if doi:
-                        logger.debug(f"  DOI found in TEI header: {doi}")
-
-            # 3. Fallback to PDF metadata if available
-            if not doi and pdf_obj.doc_metadata:
-                doi = pdf_obj.doc_metadata.get('doi')
-                if doi:
-                    logger.debug(f"  DOI found in PDF metadata: {doi}")
-
-            if not doi:
-                logger.debug(f"  DOI: not found")
-
-            # Skip documents without DOI when extraction fallback is disabled
-            if not doi and not extraction_fallback:
-                logger.debug(f"  No DOI found and extraction fallback disabled - skipping")
-                pdfs_skipped += 1
-                continue
-
             # Get complete metadata (DOI lookup or LLM extraction)
             extraction_method = "DOI lookup" if doi else "LLM extraction"
-            logger.debug(f"  Attempting {extraction_method}...")
-            try:
-                metadata = await get_metadata_for_document(
-                    doi=doi,
-                    stable_id=pdf_stable_id if not doi else None,  # Use PDF stable_id for LLM
-                    use_extraction=extraction_fallback
-                )
-                logger.debug(f"  Metadata returned: {metadata}")
-            except Exception as e:
-                logger.error(f"Failed to fetch metadata for PDF {pdf_stable_id}: {e}", exc_info=True)
-                errors += 1
-                continue
+            if doi:
+                metadata = resolved.get(doi) or {}
+            else:
+                logger.debug(f"  Attempting {extraction_method} for PDF {pdf_stable_id}...")
+                try:
+                    metadata = await get_metadata_for_document(
+                        stable_id=pdf_stable_id,
+                        use_extraction=extraction_fallback
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to fetch metadata for PDF {pdf_stable_id}: {e}", exc_info=True)
+                    errors += 1
+                    continue
+            logger.debug(f"  Metadata returned: {metadata}")
 
             # Check if we got useful metadata
             has_useful_metadata = (
@@ -465,7 +520,9 @@ async def update_tei_metadata(
                     updated_xml = serialize_tei_with_formatted_header(tei_root, processing_instructions)
 
                     # Save to storage (gets new content hash)
-                    new_tei_file_id, _ = file_storage.save_file(updated_xml.encode('utf-8'), "tei")
+                    updated_content = updated_xml.encode('utf-8')
+                    new_tei_file_id, _ = file_storage.save_file(updated_content, "tei")
+                    derived_cache.populate(new_tei_file_id, updated_content)
 
                     # Update database record
                     file_repo.update_file(tei_file_id, FileUpdate(id=new_tei_file_id))
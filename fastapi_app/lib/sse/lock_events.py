@@ -0,0 +1,172 @@
+"""
+Lock state deltas for SSE subscribers.
+
+Clients keep the lock state of the files they display up to date from
+lockChanged events instead of polling GET /api/files/locks:
+
+```
+event: lockChanged
+data: {"changes": [{"stable_id": "abc123", "action": "acquired", "locked_by": "alice"}]}
+```
+
+Actions:
+- acquired: a session acquired the lock (POST /files/acquire_lock),
+  locked_by is the user name
+- released: the lock was released (POST /files/release_lock)
+- expired: the lock was not renewed in time and was removed (sent by
+  LockExpiryWatcher, which removes expired locks periodically)
+
+Heartbeats only refresh locks and do not cause events.
+"""
+
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from fastapi_app.lib.core.locking import expire_stale_locks
+from fastapi_app.lib.core.executors import run_in_io_pool
+from fastapi_app.lib.core.sessions import SessionManager
+from fastapi_app.lib.sse.sse_service import SSEService
+from fastapi_app.lib.sse.sse_utils import broadcast_to_all_sessions, broadcast_to_other_sessions
+
+logger = logging.getLogger(__name__)
+
+LOCK_CHANGED_EVENT = "lockChanged"
+
+# Seconds between checks for expired locks; 0 disables the watcher
+LOCK_EXPIRY_INTERVAL = float(os.environ.get("LOCK_EXPIRY_INTERVAL", 15))
+
+
+def lock_change(stable_id: str, action: str, locked_by: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Create a lock state delta.
+
+    Args:
+        stable_id: The file's stable_id
+        action: "acquired", "released" or "expired"
+        locked_by: User name of the lock holder (acquired only)
+
+    Returns:
+        Delta dict for broadcast_lock_changes()
+    """
+    change: Dict[str, Any] = {"stable_id": stable_id, "action": action}
+    if locked_by is not None:
+        change["locked_by"] = locked_by
+    return change
+
+
+def broadcast_lock_changes(
+    sse_service: SSEService,
+    session_manager: SessionManager,
+    changes: List[Dict[str, Any]],
+    current_session_id: Optional[str] = None,
+    logger_inst: Optional[Any] = None
+) -> int:
+    """
+    Send lock state deltas to all sessions as one lockChanged event.
+
+    Args:
+        sse_service: SSE service instance
+        session_manager: Session manager instance
+        changes: Deltas created with lock_change()
+        current_session_id: Session that made the changes (excluded, it knows them)
+        logger_inst: Optional logger instance for debug output
+
+    Returns:
+        Number of sessions notified
+    """
+    if not changes:
+        return 0
+    data = {"changes": changes}
+    if current_session_id is None:
+        return broadcast_to_all_sessions(
+            sse_service=sse_service,
+            session_manager=session_manager,
+            event_type=LOCK_CHANGED_EVENT,
+            data=data,
+            logger=logger_inst
+        )
+    return broadcast_to_other_sessions(
+        sse_service=sse_service,
+        session_manager=session_manager,
+        current_session_id=current_session_id,
+        event_type=LOCK_CHANGED_EVENT,
+        data=data,
+        logger=logger_inst
+    )
+
+
+class LockExpiryWatcher:
+    """
+    Removes expired locks periodically and announces them as "expired" deltas.
+
+    Every worker process runs a watcher; each expired lock is removed, and
+    therefore announced, by one of them only.
+    """
+
+    def __init__(
+        self,
+        db_dir: Path,
+        sse_service: SSEService,
+        session_manager: SessionManager,
+        interval: float = LOCK_EXPIRY_INTERVAL,
+        logger_inst: Optional[logging.Logger] = None
+    ):
+        """
+        Args:
+            db_dir: Directory containing locks.db
+            sse_service: SSE service instance
+            session_manager: Session manager instance
+            interval: Seconds between checks (0 disables the watcher)
+            logger_inst: Optional logger instance (default: module logger)
+        """
+        self.db_dir = db_dir
+        self.sse_service = sse_service
+        self.session_manager = session_manager
+        self.interval = interval
+        self.logger = logger_inst or logger
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start watching. Must be called from the event loop."""
+        if self.interval <= 0 or self._task is not None:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop watching."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def check(self) -> Dict[str, str]:
+        """
+        Remove expired locks and announce them (blocking).
+
+        Returns:
+            Dict mapping the file stable_ids of the expired locks to the
+            session IDs that held them
+        """
+        expired = expire_stale_locks(self.db_dir, self.logger)
+        if expired:
+            broadcast_lock_changes(
+                self.sse_service,
+                self.session_manager,
+                [lock_change(stable_id, "expired") for stable_id in expired],
+                logger_inst=self.logger
+            )
+        return expired
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await run_in_io_pool(self.check)
+            except Exception as e:
+                self.logger.error(f"Error checking for expired locks: {e}")
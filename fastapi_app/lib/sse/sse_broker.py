@@ -0,0 +1,436 @@
+"""
+Fan-out backends for delivering SSE messages across worker processes.
+
+With several uvicorn workers, each worker only holds the message queues of the
+SSE streams connected to it. SSEService delivers messages for its own clients
+directly and hands messages for all other clients to a broker, which forwards
+them to the other workers:
+
+- LocalSSEBroker: single process, nothing to forward (default)
+- SocketSSEBroker: every worker binds a Unix datagram socket in a shared
+  directory and registers the clients connected to it there. Messages are
+  sent to the sockets of the workers holding the clients and picked up by a
+  receiver thread blocking on its socket, so delivery needs no polling.
+
+The broker is selected with the SSE_BROKER environment variable
+('local' or 'socket', see create_sse_broker()).
+"""
+
+import hashlib
+import json
+import os
+import queue
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Callback receiving forwarded messages: (client_ids, event_type, data)
+DeliverCallback = Callable[[List[str], str, str], None]
+
+# Largest datagram sent; messages for many clients are split to stay below it
+MAX_DATAGRAM_SIZE = 128 * 1024
+
+# Socket buffer size, determines how many messages can be in flight per worker
+SOCKET_BUFFER_SIZE = 4 * 1024 * 1024
+
+# Seconds the sender thread waits for room in a busy worker's receive buffer
+# before the message is dropped
+SEND_TIMEOUT = 0.1
+
+# Maximum number of datagrams waiting for the sender thread
+BACKLOG_SIZE = 10000
+
+# Seconds after which the client registry is re-read even if the directory's
+# modification time did not change (coarse timestamps on some filesystems)
+REGISTRY_MAX_AGE = 1.0
+
+
+class SSEBroker:
+    """Base class of the SSE fan-out backends."""
+
+    def start(self, deliver: DeliverCallback) -> None:
+        """
+        Start receiving messages from other processes.
+
+        Args:
+            deliver: Called with messages published by other processes
+        """
+
+    def subscribe(self, client_id: str) -> None:
+        """
+        Announce that a client is connected to this process.
+
+        Args:
+            client_id: Client identifier
+        """
+
+    def unsubscribe(self, client_id: str) -> None:
+        """
+        Announce that a client is no longer connected to this process.
+
+        Args:
+            client_id: Client identifier
+        """
+
+    def publish(self, client_ids: List[str], event_type: str, data: str) -> bool:
+        """
+        Forward a message to the processes holding the given clients.
+
+        Never blocks: callers may run on the event loop.
+
+        Args:
+            client_ids: Clients that are not connected to this process
+            event_type: SSE event type
+            data: Event data
+
+        Returns:
+            True if the message was handed to at least one process holding
+            one of the clients
+        """
+        return False
+
+    def stop(self) -> None:
+        """Stop receiving messages and release resources."""
+
+    def get_stats(self) -> dict:
+        """Return broker statistics."""
+        return {'broker': 'local'}
+
+
+class LocalSSEBroker(SSEBroker):
+    """Broker for single-process deployments: every client is local, nothing is forwarded."""
+
+
+class SocketSSEBroker(SSEBroker):
+    """
+    Forwards messages to other worker processes over Unix datagram sockets.
+
+    Each process binds `<socket_dir>/<pid>.sock` and registers its clients as
+    empty files `<socket_dir>/clients/<hex client id>@<pid>`. Publishing sends
+    datagrams only to the workers holding the clients, on a non-blocking
+    socket. Datagrams a busy peer cannot take right away are queued for a
+    sender thread (later datagrams for that peer follow them, to keep the
+    order), which waits up to SEND_TIMEOUT per datagram. Messages that are
+    too large, time out or exceed BACKLOG_SIZE are dropped and counted.
+    Sockets and registrations of dead processes are removed when sending to
+    them fails.
+    """
+
+    def __init__(self, socket_dir: Path, logger=None, name: Optional[str] = None):
+        """
+        Args:
+            socket_dir: Directory shared by the worker processes of one server
+            logger: Optional logger instance
+            name: Socket name, unique among the workers (default: process id)
+        """
+        self.socket_dir = Path(socket_dir)
+        self.clients_dir = self.socket_dir / "clients"
+        self.name = name or str(os.getpid())
+        self.socket_path = self.socket_dir / f"{self.name}.sock"
+        self.logger = logger
+
+        self._recv_sock: Optional[socket.socket] = None
+        self._send_sock: Optional[socket.socket] = None
+        self._backlog_sock: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._sender: Optional[threading.Thread] = None
+        self._backlog: queue.Queue = queue.Queue(maxsize=BACKLOG_SIZE)
+        # peer name -> number of its datagrams in the backlog
+        self._pending: Dict[str, int] = {}
+        self._stopping = False
+
+        # client id -> names of the other workers holding it
+        self._routes: Dict[str, List[str]] = {}
+        self._routes_mtime: Optional[int] = None
+        self._routes_loaded = 0.0
+        self._lock = threading.Lock()
+
+        self.sent = 0
+        self.received = 0
+        self.dropped = 0
+
+    def start(self, deliver: DeliverCallback) -> None:
+        self.socket_dir.mkdir(parents=True, exist_ok=True, mode=0o700)
+        self.clients_dir.mkdir(exist_ok=True, mode=0o700)
+        # Files with our name can only be left over from a dead process
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+        self._remove_registrations(self.name)
+
+        self._recv_sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._recv_sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+        self._recv_sock.bind(str(self.socket_path))
+
+        self._send_sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._send_sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
+        self._send_sock.setblocking(False)
+
+        self._backlog_sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._backlog_sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
+        self._backlog_sock.settimeout(SEND_TIMEOUT)
+
+        self._thread = threading.Thread(
+            target=self._receive, args=(deliver,), name="sse-broker", daemon=True
+        )
+        self._thread.start()
+        self._sender = threading.Thread(
+            target=self._send_backlog, name="sse-broker-sender", daemon=True
+        )
+        self._sender.start()
+
+        if self.logger:
+            self.logger.info(f"SSE broker listening on {self.socket_path}")
+
+    def subscribe(self, client_id: str) -> None:
+        try:
+            self._registration(client_id).touch()
+        except OSError as e:
+            if self.logger:
+                self.logger.error(f"Failed to register SSE client {client_id}: {e}")
+
+    def unsubscribe(self, client_id: str) -> None:
+        try:
+            self._registration(client_id).unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    def publish(self, client_ids: List[str], event_type: str, data: str) -> bool:
+        if self._send_sock is None or not client_ids:
+            return False
+
+        routes = self._get_routes()
+        clients_by_peer: Dict[str, List[str]] = {}
+        for client_id in client_ids:
+            for peer in routes.get(client_id, ()):
+                clients_by_peer.setdefault(peer, []).append(client_id)
+
+        forwarded = False
+        for peer, peer_client_ids in clients_by_peer.items():
+            peer_path = str(self.socket_dir / f"{peer}.sock")
+            for payload in self._encode(peer_client_ids, event_type, data):
+                if self._pending.get(peer):
+                    # Queue behind the peer's waiting datagrams to keep the order
+                    forwarded = self._defer(peer, payload, event_type) or forwarded
+                    continue
+                try:
+                    self._send_sock.sendto(payload, peer_path)
+                    self.sent += 1
+                    forwarded = True
+                except BlockingIOError:
+                    # The peer's receive buffer is full
+                    forwarded = self._defer(peer, payload, event_type) or forwarded
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Nobody listens anymore - the worker has exited
+                    self._remove_peer(peer)
+                    break
+                except OSError as e:
+                    self.dropped += 1
+                    if self.logger:
+                        self.logger.warning(f"Dropped SSE {event_type} for {peer}: {e}")
+        return forwarded
+
+    def stop(self) -> None:
+        self._stopping = True
+        if self._recv_sock is not None and self._send_sock is not None:
+            # Wake up the receiver thread with an empty datagram
+            try:
+                self._send_sock.sendto(b"", str(self.socket_path))
+            except OSError:
+                pass
+            if self._thread is not None:
+                self._thread.join(timeout=2)
+        if self._sender is not None:
+            try:
+                self._backlog.put(None, timeout=2)
+            except queue.Full:
+                pass
+            self._sender.join(timeout=2)
+        for sock in (self._recv_sock, self._send_sock, self._backlog_sock):
+            if sock is not None:
+                sock.close()
+        self._recv_sock = None
+        self._send_sock = None
+        self._backlog_sock = None
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
+        self._remove_registrations(self.name)
+
+    def get_stats(self) -> dict:
+        return {
+            'broker': 'socket',
+            'peers': len(self._get_peers()) if self._send_sock is not None else 0,
+            'remote_clients': len(self._get_routes()) if self._send_sock is not None else 0,
+            'sent': self.sent,
+            'received': self.received,
+            'dropped': self.dropped,
+            'backlog': self._backlog.qsize(),
+        }
+
+    def _receive(self, deliver: DeliverCallback) -> None:
+        """Receiver thread: blocks on the socket and delivers incoming messages."""
+        sock = self._recv_sock
+        if sock is None:
+            return
+        while not self._stopping:
+            try:
+                payload = sock.recv(MAX_DATAGRAM_SIZE)
+            except OSError:
+                break
+            if not payload:
+                continue
+            self.received += 1
+            try:
+                message = json.loads(payload)
+                deliver(message['c'], message['e'], message['d'])
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"Failed to deliver forwarded SSE message: {e}")
+
+    def _defer(self, peer: str, payload: bytes, event_type: str) -> bool:
+        """Queue a datagram for the sender thread; False if the backlog is full."""
+        with self._lock:
+            try:
+                self._backlog.put_nowait((peer, payload, event_type))
+            except queue.Full:
+                self.dropped += 1
+                if self.logger:
+                    self.logger.warning(f"Dropped SSE {event_type} for {peer}: send backlog full")
+                return False
+            self._pending[peer] = self._pending.get(peer, 0) + 1
+        return True
+
+    def _send_backlog(self) -> None:
+        """Sender thread: sends queued datagrams, waiting for busy peers."""
+        sock = self._backlog_sock
+        if sock is None:
+            return
+        while True:
+            item = self._backlog.get()
+            if item is None:
+                break
+            peer, payload, event_type = item
+            try:
+                sock.sendto(payload, str(self.socket_dir / f"{peer}.sock"))
+                self.sent += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                self._remove_peer(peer)
+            except OSError as e:
+                # Timeout: the peer's receive buffer stayed full
+                self.dropped += 1
+                if self.logger:
+                    reason = "peer busy" if isinstance(e, TimeoutError) else str(e)
+                    self.logger.warning(f"Dropped SSE {event_type} for {peer}: {reason}")
+            finally:
+                with self._lock:
+                    self._pending[peer] -= 1
+                    if not self._pending[peer]:
+                        del self._pending[peer]
+
+    def _encode(self, client_ids: List[str], event_type: str, data: str) -> List[bytes]:
+        """Encode a message, splitting the client list until each datagram fits."""
+        payload = json.dumps({'c': client_ids, 'e': event_type, 'd': data}).encode('utf-8')
+        if len(payload) <= MAX_DATAGRAM_SIZE:
+            return [payload]
+        if len(client_ids) == 1:
+            self.dropped += 1
+            if self.logger:
+                self.logger.error(
+                    f"Dropped SSE {event_type}: message of {len(payload)} bytes is too large to forward"
+                )
+            return []
+        middle = len(client_ids) // 2
+        return (
+            self._encode(client_ids[:middle], event_type, data)
+            + self._encode(client_ids[middle:], event_type, data)
+        )
+
+    def _registration(self, client_id: str) -> Path:
+        """Registry file announcing that this process holds a client."""
+        return self.clients_dir / f"{client_id.encode('utf-8').hex()}@{self.name}"
+
+    def _get_routes(self) -> Dict[str, List[str]]:
+        """Clients of the other workers, re-read when the registry changes."""
+        try:
+            mtime = self.clients_dir.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        now = time.monotonic()
+        with self._lock:
+            if mtime != self._routes_mtime or now - self._routes_loaded > REGISTRY_MAX_AGE:
+                routes: Dict[str, List[str]] = {}
+                for entry in os.scandir(self.clients_dir):
+                    client_hex, _, peer = entry.name.partition("@")
+                    if peer == self.name or not peer:
+                        continue
+                    try:
+                        client_id = bytes.fromhex(client_hex).decode('utf-8')
+                    except ValueError:
+                        continue
+                    routes.setdefault(client_id, []).append(peer)
+                self._routes = routes
+                self._routes_mtime = mtime
+                self._routes_loaded = now
+            return self._routes
+
+    def _get_peers(self) -> List[str]:
+        """Names of the other workers with a bound socket."""
+        return [
+            path.stem for path in self.socket_dir.glob("*.sock")
+            if path.stem != self.name
+        ]
+
+    def _remove_registrations(self, peer: str) -> None:
+        """Remove the client registrations of a worker."""
+        for path in self.clients_dir.glob(f"*@{peer}"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def _remove_peer(self, peer: str) -> None:
+        """Remove the socket and client registrations of an exited worker."""
+        try:
+            os.unlink(self.socket_dir / f"{peer}.sock")
+        except OSError:
+            pass
+        self._remove_registrations(peer)
+        with self._lock:
+            self._routes_mtime = None
+        if self.logger:
+            self.logger.debug(f"Removed stale SSE broker socket and clients of: {peer}")
+
+
+def default_socket_dir(data_root: Path) -> Path:
+    """
+    Socket directory shared by the workers of the server using data_root.
+
+    Located in the system temp directory because Unix socket paths are limited
+    to about 100 characters.
+    """
+    digest = hashlib.sha1(str(Path(data_root).resolve()).encode('utf-8')).hexdigest()[:12]
+    return Path(tempfile.gettempdir()) / f"pdf-tei-sse-{digest}"
+
+
+def create_sse_broker(logger=None) -> SSEBroker:
+    """
+    Create the broker selected by the SSE_BROKER environment variable.
+
+    - 'local' (default): single worker process
+    - 'socket': Unix datagram sockets, for several worker processes on one host.
+      The socket directory can be set with SSE_BROKER_DIR.
+    """
+    kind = os.environ.get("SSE_BROKER", "local").lower()
+    if kind == "socket":
+        socket_dir = os.environ.get("SSE_BROKER_DIR")
+        if not socket_dir:
+            from fastapi_app.config import get_settings
+            socket_dir = default_socket_dir(get_settings().data_root)
+        return SocketSSEBroker(Path(socket_dir), logger=logger)
+    if kind != "local" and logger:
+        logger.warning(f"Unknown SSE_BROKER '{kind}', using local broker")
+    return LocalSSEBroker()
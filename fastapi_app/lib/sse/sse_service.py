@@ -2,41 +2,92 @@
 Server-Sent Events (SSE) service for real-time progress updates.
 
 Provides:
-- Message queues per client for async event delivery
-- Event stream generation for FastAPI StreamingResponse
+- Bounded message queues per client for async event delivery
+- Event stream generation for FastAPI StreamingResponse (asyncio-native,
+  so idle connections hold no threadpool thread)
 - Thread-safe message delivery
-- Automatic queue cleanup
+- Delivery to clients connected to other worker processes (see sse_broker)
 """
 
+import asyncio
+import os
 import queue
 import threading
-from typing import Dict, Generator, Optional
-from datetime import datetime, timedelta
+from typing import AsyncGenerator, Dict, List, Optional
+
+from fastapi_app.lib.sse.sse_broker import SSEBroker, LocalSSEBroker
+
+# Maximum number of undelivered messages per client. When a queue is full the
+# oldest message is dropped, so a stalled client cannot exhaust memory.
+SSE_QUEUE_SIZE = 1000
+
+# Seconds without messages after which an async stream sends a keep-alive ping
+SSE_KEEPALIVE_INTERVAL = float(os.environ.get("SSE_KEEPALIVE_INTERVAL", 20))
+
+# Maximum number of concurrent async streams per process (0 = unlimited)
+SSE_MAX_STREAMS = int(os.environ.get("SSE_MAX_STREAMS", 5000))
+
+
+class NotifyingQueue(queue.Queue):
+    """
+    Message queue of an async stream.
+
+    Messages are put from any thread (request handlers, broker receiver);
+    each put sets an asyncio.Event in the stream's event loop, so the stream
+    awaits messages instead of blocking a thread on the queue.
+    """
+
+    def __init__(self, maxsize: int, loop: asyncio.AbstractEventLoop):
+        super().__init__(maxsize)
+        self.loop = loop
+        self.ready = asyncio.Event()
+
+    def _put(self, item) -> None:
+        super()._put(item)
+        try:
+            self.loop.call_soon_threadsafe(self.ready.set)
+        except RuntimeError:
+            # Event loop closed, the stream is gone
+            pass
 
 
 class SSEService:
     """
     Service for managing Server-Sent Events streams.
 
-    Maintains message queues for each connected client and provides
-    methods to send events and generate event streams.
+    Maintains message queues for each client connected to this process and
+    provides methods to send events and generate event streams. Messages for
+    clients connected to other worker processes are handed to the broker.
     """
 
-    def __init__(self, logger=None):
+    def __init__(
+        self,
+        logger=None,
+        broker: Optional[SSEBroker] = None,
+        max_queue_size: int = SSE_QUEUE_SIZE
+    ):
         """
         Initialize SSE service.
 
         Args:
             logger: Optional logger instance
+            broker: Fan-out backend for clients of other processes
+                (default: LocalSSEBroker, single process)
+            max_queue_size: Maximum number of queued messages per client
         """
         self.logger = logger
         self.message_queues: Dict[str, queue.Queue] = {}
-        self.queue_timestamps: Dict[str, datetime] = {}
+        self.dropped_messages: Dict[str, int] = {}
+        self.max_queue_size = max_queue_size
         self.lock = threading.Lock()
 
+        self.broker = broker or LocalSSEBroker()
+        self.broker.start(self._deliver_forwarded)
+
         # Configuration
-        self.queue_timeout = 0.5  # Seconds to wait for new messages
-        self.max_queue_age = timedelta(hours=1)  # Max age before cleanup
+        self.keepalive_interval = SSE_KEEPALIVE_INTERVAL  # Idle seconds before a ping (async stream)
+        self.max_streams = SSE_MAX_STREAMS  # Concurrent async streams, 0 = unlimited
+        self.active_streams = 0
 
     def create_queue(self, client_id: str) -> queue.Queue:
         """
@@ -49,29 +100,38 @@ class SSEService:
             Message queue for the client
         """
         with self.lock:
-            if client_id not in self.message_queues:
-                self.message_queues[client_id] = queue.Queue()
-                self.queue_timestamps[client_id] = datetime.now()
+            created = client_id not in self.message_queues
+            if created:
+                self.message_queues[client_id] = queue.Queue(maxsize=self.max_queue_size)
+            msg_queue = self.message_queues[client_id]
 
-                if self.logger:
-                    self.logger.debug(f"Created SSE queue for client: {client_id}")
+        if created:
+            self.broker.subscribe(client_id)
+            if self.logger:
+                self.logger.debug(f"Created SSE queue for client: {client_id}")
 
-            return self.message_queues[client_id]
+        return msg_queue
 
-    def remove_queue(self, client_id: str) -> None:
+    def remove_queue(self, client_id: str, msg_queue: Optional[queue.Queue] = None) -> None:
         """
         Remove message queue for a client.
 
         Args:
             client_id: Client identifier
+            msg_queue: Only remove the queue if it is this one (a newer stream
+                of the same client may have replaced it)
         """
         with self.lock:
-            if client_id in self.message_queues:
-                del self.message_queues[client_id]
-                del self.queue_timestamps[client_id]
+            if client_id not in self.message_queues:
+                return
+            if msg_queue is not None and self.message_queues[client_id] is not msg_queue:
+                return
+            del self.message_queues[client_id]
+            self.dropped_messages.pop(client_id, None)
 
-                if self.logger:
-                    self.logger.debug(f"Removed SSE queue for client: {client_id}")
+        self.broker.unsubscribe(client_id)
+        if self.logger:
+            self.logger.debug(f"Removed SSE queue for client: {client_id}")
 
     def send_message(
         self,
@@ -88,36 +148,98 @@ class SSEService:
             data: Event data (string)
 
         Returns:
-            True if message was queued, False if queue doesn't exist
+            True if message was queued or handed to a worker process holding
+            the client, False if no process holds a queue for the client or
+            the message could not be forwarded
         """
         with self.lock:
-            if client_id not in self.message_queues:
-                if self.logger:
-                    self.logger.debug(f"No SSE queue for client: {client_id}")
-                return False
+            if client_id in self.message_queues:
+                self._enqueue(client_id, event_type, data)
+                return True
 
-            try:
-                self.message_queues[client_id].put({
-                    'event': event_type,
-                    'data': data
-                }, block=False)
+        if self.broker.publish([client_id], event_type, data):
+            if self.logger:
+                self.logger.debug(f"Forwarded SSE {event_type} to {client_id}: {data[:50]}")
+            return True
 
-                if self.logger:
-                    self.logger.debug(f"Sent SSE {event_type} to {client_id}: {data[:50]}")
+        if self.logger:
+            self.logger.debug(f"No SSE queue for client: {client_id}")
+        return False
 
-                return True
+    def send_messages(
+        self,
+        client_ids: List[str],
+        event_type: str,
+        data: str
+    ) -> int:
+        """
+        Send the same SSE message to several clients.
 
-            except queue.Full:
-                if self.logger:
-                    self.logger.error(f"SSE queue full for client: {client_id}")
-                return False
+        Clients of other worker processes are reached with a single forwarded
+        message instead of one per client.
 
-    def event_stream(self, client_id: str) -> Generator[str, None, None]:
+        Args:
+            client_ids: Client identifiers
+            event_type: Event type
+            data: Event data (string)
+
+        Returns:
+            Number of clients the message was queued for locally
         """
-        Generate SSE event stream for a client.
+        remote = []
+        queued = 0
+        with self.lock:
+            for client_id in client_ids:
+                if client_id in self.message_queues:
+                    self._enqueue(client_id, event_type, data)
+                    queued += 1
+                else:
+                    remote.append(client_id)
+
+        if remote:
+            self.broker.publish(remote, event_type, data)
+        return queued
+
+    def _deliver_forwarded(self, client_ids: List[str], event_type: str, data: str) -> None:
+        """Queue a message forwarded by another process for the clients held here."""
+        with self.lock:
+            for client_id in client_ids:
+                if client_id in self.message_queues:
+                    self._enqueue(client_id, event_type, data)
+
+    def _enqueue(self, client_id: str, event_type: str, data: str) -> None:
+        """Queue a message, dropping the oldest one if the queue is full (lock must be held)."""
+        msg_queue = self.message_queues[client_id]
+        message = {'event': event_type, 'data': data}
+        try:
+            msg_queue.put(message, block=False)
+        except queue.Full:
+            try:
+                msg_queue.get_nowait()
+            except queue.Empty:
+                pass
+            msg_queue.put(message, block=False)
+            dropped = self.dropped_messages.get(client_id, 0) + 1
+            self.dropped_messages[client_id] = dropped
+            if self.logger and dropped == 1:
+                self.logger.warning(f"SSE queue full for client {client_id}, dropping oldest messages")
 
-        This generator yields formatted SSE messages and should be used
-        with FastAPI's StreamingResponse.
+        if self.logger:
+            self.logger.debug(f"Sent SSE {event_type} to {client_id}: {data[:50]}")
+
+    def has_stream_capacity(self) -> bool:
+        """Return True if another async stream may be opened (see SSE_MAX_STREAMS)."""
+        return not self.max_streams or self.active_streams < self.max_streams
+
+    async def async_event_stream(self, client_id: str) -> AsyncGenerator[str, None]:
+        """
+        Generate SSE event stream for a client without blocking a thread.
+
+        Waits for messages on an asyncio.Event set by the client's queue and
+        sends a keep-alive ping only after keepalive_interval seconds without
+        messages. An idle connection therefore costs neither a thread nor
+        regular wake-ups. Messages queued for the client before the stream
+        started (e.g. by a previous stream) are kept.
 
         Args:
             client_id: Client identifier
@@ -125,8 +247,19 @@ class SSEService:
         Yields:
             Formatted SSE message strings
         """
-        # Create queue if it doesn't exist
-        msg_queue = self.create_queue(client_id)
+        msg_queue = NotifyingQueue(self.max_queue_size, asyncio.get_running_loop())
+        with self.lock:
+            previous = self.message_queues.get(client_id)
+            if previous is not None:
+                while True:
+                    try:
+                        msg_queue.put_nowait(previous.get_nowait())
+                    except (queue.Empty, queue.Full):
+                        break
+            self.message_queues[client_id] = msg_queue
+            self.active_streams += 1
+        if previous is None:
+            self.broker.subscribe(client_id)
 
         if self.logger:
             self.logger.info(f"Starting SSE stream for client: {client_id}")
@@ -135,29 +268,30 @@ class SSEService:
             # Send initial connection event
             yield self._format_sse_message('connected', 'Stream connected')
 
-            # Stream messages from queue
             while True:
-                try:
-                    # Wait for message with timeout
-                    message = msg_queue.get(timeout=self.queue_timeout)
+                # Clear before draining, so that a put during the drain
+                # sets the event again and is not missed
+                msg_queue.ready.clear()
+                while True:
+                    try:
+                        message = msg_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    yield self._format_sse_message(message['event'], message['data'])
 
-                    # Send the message
-                    yield self._format_sse_message(
-                        message['event'],
-                        message['data']
-                    )
-
-                except queue.Empty:
-                    # Send keep-alive ping event (every ~0.5s when no messages)
+                try:
+                    await asyncio.wait_for(msg_queue.ready.wait(), timeout=self.keepalive_interval)
+                except asyncio.TimeoutError:
                     yield self._format_sse_message('ping', 'keepalive')
-                    continue
 
-        except GeneratorExit:
+        except (GeneratorExit, asyncio.CancelledError):
             if self.logger:
                 self.logger.info(f"SSE stream closed for client: {client_id}")
+            raise
         finally:
-            # Clean up queue when stream ends
-            self.remove_queue(client_id)
+            with self.lock:
+                self.active_streams -= 1
+            self.remove_queue(client_id, msg_queue)
 
     def _format_sse_message(self, event: str, data: str) -> str:
         """
@@ -172,36 +306,36 @@ class SSEService:
         """
         return f"event: {event}\ndata: {data}\n\n"
 
-    def cleanup_stale_queues(self) -> int:
+    def get_active_clients(self) -> list[str]:
         """
-        Remove stale message queues that haven't been accessed recently.
+        Get list of currently active client IDs.
 
         Returns:
-            Number of queues removed
+            List of client IDs with active queues
         """
         with self.lock:
-            now = datetime.now()
-            stale_clients = []
-
-            for client_id, timestamp in self.queue_timestamps.items():
-                if now - timestamp > self.max_queue_age:
-                    stale_clients.append(client_id)
-
-            for client_id in stale_clients:
-                del self.message_queues[client_id]
-                del self.queue_timestamps[client_id]
-
-                if self.logger:
-                    self.logger.info(f"Cleaned up stale SSE queue: {client_id}")
-
-            return len(stale_clients)
+            return list(self.message_queues.keys())
 
-    def get_active_clients(self) -> list[str]:
+    def get_stats(self) -> dict:
         """
-        Get list of currently active client IDs.
+        Get queue and delivery statistics.
 
         Returns:
-            List of client IDs with active queues
+            Dict with number of clients and async streams, queued and dropped
+            messages per client and the broker statistics
         """
         with self.lock:
-            return list(self.message_queues.keys())
+            return {
+                'clients': len(self.message_queues),
+                'streams': self.active_streams,
+                'queued': {
+                    client_id: msg_queue.qsize()
+                    for client_id, msg_queue in self.message_queues.items()
+                },
+                'dropped': dict(self.dropped_messages),
+                'broker': self.broker.get_stats(),
+            }
+
+    def close(self) -> None:
+        """Stop the broker (on application shutdown)."""
+        self.broker.stop()
@@ -213,17 +213,20 @@ def _broadcast_event(
         Number of sessions notified
     """
     active_sessions: list[SessionDict] = session_manager.get_all_sessions()
-    notification_count = 0
-
-    for session_dict in active_sessions:
-        session_id: str = session_dict['session_id']
-        if exclude_session_id is None or session_id != exclude_session_id:
-            sse_service.send_message(
-                client_id=session_id,
-                event_type=event_type,
-                data=json.dumps(data)
-            )
-            notification_count += 1
+    target_session_ids = [
+        session_dict['session_id'] for session_dict in active_sessions
+        if exclude_session_id is None or session_dict['session_id'] != exclude_session_id
+    ]
+    notification_count = len(target_session_ids)
+
+    # One call for all sessions, so that sessions connected to other worker
+    # processes are reached with a single forwarded message
+    if target_session_ids:
+        sse_service.send_messages(
+            client_ids=target_session_ids,
+            event_type=event_type,
+            data=json.dumps(data)
+        )
 
     if logger and notification_count > 0:
         excluded_msg = f" (excluded session {exclude_session_id[:8]}...)" if exclude_session_id else ""
@@ -0,0 +1,230 @@
+"""
+Encoding of XML blobs in hash-sharded storage.
+
+XML files (TEI, RelaxNG) can be stored encoded instead of as plain files:
+
+- compressed: deflate with a preset dictionary of common TEI markup, which
+  pays off even for small files where plain deflate finds little to reuse
+- delta: the line differences against another stored blob (usually the
+  previous version of the same document), compressed the same way
+
+Encoded blobs start with a small header:
+
+    MAGIC (4) | kind (1) | dictionary id (1) | chain depth (1) | [base hash (32)] | payload
+
+The base hash is present for deltas only; the chain depth counts the deltas
+that must be applied to get the content (0 for compressed blobs). Blobs are
+still addressed by the SHA-256 hash of their decoded content.
+"""
+
+import struct
+import zlib
+from difflib import SequenceMatcher
+from typing import Callable, List, NamedTuple, Optional
+
+MAGIC = b"PTB\x01"
+
+KIND_COMPRESSED = 1
+KIND_DELTA = 2
+
+# Delta operations: copy lines of the base, insert literal bytes
+_OP_COPY = b"C"
+_OP_INSERT = b"I"
+
+# Preset dictionary for TEI documents. zlib prefers matches close to the end
+# of the dictionary, so the most frequent strings come last.
+TEI_DICTIONARY_V1 = b"""<?xml version="1.0" encoding="UTF-8"?>
+<?xml-model href="https://raw.githubusercontent.com/mpilhlt/pdf-tei-editor/refs/heads/main/schema/rng/" type="application/xml" schematypens="http://relaxng.org/ns/structure/1.0"?>
+<grammar xmlns="http://relaxng.org/ns/structure/1.0" datatypeLibrary="http://www.w3.org/2001/XMLSchema-datatypes"><start><element name="<attribute name="<ref name="<define name="<zeroOrMore><optional><choice><text/></choice></optional></zeroOrMore></define></element>
+<encodingDesc><appInfo><application version="" ident="" type="extractor"><label></label><desc></desc><ref target=""/></application></appInfo></encodingDesc>
+<revisionDesc><change when="" status="draft" who="#"><desc></desc></change></revisionDesc>
+<respStmt><persName xml:id=""></persName><resp></resp></respStmt>
+<editionStmt><edition><title></title><idno type="fileref"></idno></edition></editionStmt>
+<publicationStmt><publisher></publisher><availability status="unknown"><licence target="https://creativecommons.org/licenses/by/4.0/"></licence></availability><date when="" type="publication"></date><idno type="DOI"></idno></publicationStmt>
+<sourceDesc><biblStruct><analytic><title level="a"></title><author><persName><forename></forename><surname></surname></persName></author></analytic><monogr><title level="j"></title><imprint><biblScope unit="volume"></biblScope><biblScope unit="issue"></biblScope><biblScope unit="page" from="" to=""></biblScope><date when=""></date><publisher></publisher></imprint></monogr></biblStruct></sourceDesc>
+<TEI xmlns="http://www.tei-c.org/ns/1.0"><teiHeader><fileDesc><titleStmt><title level="a"></title></titleStmt></fileDesc></teiHeader>
+<text><body><div><head></head><p></p></div></body><back><div type="references"><listBibl>
+<biblStruct xml:id="b"><analytic><title level="a" type="main"></title><author><persName><forename type="first"></forename><surname></surname></persName></author></analytic><monogr><title level="j"></title><imprint><date type="published" when=""></date><biblScope unit="page"></biblScope></imprint></monogr></biblStruct>
+<bibl><author><surname></surname>, <forename></forename></author> (<date></date>): <title level="a"></title>. <title level="j"></title> <biblScope unit="volume"></biblScope>, <biblScope unit="page"></biblScope>.</bibl>
+</listBibl></div></back></text></TEI>
+"""
+
+# Dictionaries by id. Never change a published dictionary - add a new id
+# instead, since existing blobs refer to it.
+DICTIONARIES = {
+    0: b"",
+    1: TEI_DICTIONARY_V1,
+}
+DEFAULT_DICTIONARY_ID = 1
+
+COMPRESSION_LEVEL = 9
+
+
+class BlobHeader(NamedTuple):
+    """Parsed header of an encoded blob."""
+    kind: int
+    dictionary_id: int
+    depth: int
+    base_hash: Optional[str]
+    payload_offset: int
+
+
+class BlobFormatError(ValueError):
+    """Raised for data that is not a valid encoded blob."""
+
+
+def is_encoded(data: bytes) -> bool:
+    """Whether data starts with the encoded blob header."""
+    return data[:len(MAGIC)] == MAGIC
+
+
+def parse_header(data: bytes) -> BlobHeader:
+    """
+    Parse the header of an encoded blob.
+
+    Args:
+        data: Encoded blob, or at least its first 39 bytes
+
+    Returns:
+        BlobHeader
+
+    Raises:
+        BlobFormatError: If the data is not an encoded blob
+    """
+    if not is_encoded(data) or len(data) < len(MAGIC) + 3:
+        raise BlobFormatError("Not an encoded blob")
+    offset = len(MAGIC)
+    kind, dictionary_id, depth = data[offset], data[offset + 1], data[offset + 2]
+    offset += 3
+    base_hash = None
+    if kind == KIND_DELTA:
+        base_hash = data[offset:offset + 32].hex()
+        offset += 32
+    elif kind != KIND_COMPRESSED:
+        raise BlobFormatError(f"Unknown blob kind: {kind}")
+    if dictionary_id not in DICTIONARIES:
+        raise BlobFormatError(f"Unknown compression dictionary: {dictionary_id}")
+    return BlobHeader(kind, dictionary_id, depth, base_hash, offset)
+
+
+def _compress(data: bytes, dictionary_id: int) -> bytes:
+    zdict = DICTIONARIES[dictionary_id]
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=zdict) if zdict else zlib.compressobj(COMPRESSION_LEVEL)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _decompress(data: bytes, dictionary_id: int) -> bytes:
+    zdict = DICTIONARIES[dictionary_id]
+    decompressor = zlib.decompressobj(zdict=zdict) if zdict else zlib.decompressobj()
+    result = decompressor.decompress(data) + decompressor.flush()
+    if not decompressor.eof or decompressor.unused_data:
+        raise zlib.error("incomplete or trailing data")
+    return result
+
+
+def compress_blob(content: bytes, dictionary_id: int = DEFAULT_DICTIONARY_ID) -> bytes:
+    """
+    Encode content as a compressed blob.
+
+    Args:
+        content: Plain content
+        dictionary_id: Preset dictionary to compress with
+
+    Returns:
+        Encoded blob
+    """
+    header = MAGIC + bytes((KIND_COMPRESSED, dictionary_id, 0))
+    return header + _compress(content, dictionary_id)
+
+
+def delta_blob(
+    content: bytes,
+    base_content: bytes,
+    base_hash: str,
+    base_depth: int,
+    dictionary_id: int = DEFAULT_DICTIONARY_ID
+) -> bytes:
+    """
+    Encode content as a delta against a base blob.
+
+    Args:
+        content: Plain content
+        base_content: Plain content of the base
+        base_hash: Content hash of the base
+        base_depth: Chain depth of the base blob (0 if it is not a delta)
+        dictionary_id: Preset dictionary to compress the delta with
+
+    Returns:
+        Encoded blob
+    """
+    header = MAGIC + bytes((KIND_DELTA, dictionary_id, min(base_depth + 1, 255))) + bytes.fromhex(base_hash)
+    return header + _compress(_diff_lines(base_content, content), dictionary_id)
+
+
+def decode_blob(data: bytes, read_base: Callable[[str], Optional[bytes]]) -> bytes:
+    """
+    Decode an encoded blob.
+
+    Args:
+        data: Encoded blob
+        read_base: Callback returning the plain content of a base blob by hash
+
+    Returns:
+        Plain content
+
+    Raises:
+        BlobFormatError: If the blob is invalid or its base is missing
+    """
+    header = parse_header(data)
+    try:
+        payload = _decompress(data[header.payload_offset:], header.dictionary_id)
+    except zlib.error as e:
+        raise BlobFormatError(f"Corrupt blob: {e}")
+    base_hash = header.base_hash
+    if base_hash is None:
+        # Compressed, not a delta
+        return payload
+
+    base_content = read_base(base_hash)
+    if base_content is None:
+        raise BlobFormatError(f"Delta base {base_hash[:8]}... not found")
+    return _apply_delta(base_content, payload)
+
+
+def _diff_lines(base: bytes, content: bytes) -> bytes:
+    """Serialize the line operations that turn base into content."""
+    base_lines = base.splitlines(keepends=True)
+    content_lines = content.splitlines(keepends=True)
+    matcher = SequenceMatcher(None, base_lines, content_lines)
+
+    ops: List[bytes] = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append(_OP_COPY + struct.pack('>II', i1, i2 - i1))
+        elif tag in ('replace', 'insert'):
+            data = b''.join(content_lines[j1:j2])
+            ops.append(_OP_INSERT + struct.pack('>I', len(data)) + data)
+    return b''.join(ops)
+
+
+def _apply_delta(base: bytes, delta: bytes) -> bytes:
+    """Rebuild content from a base and serialized line operations."""
+    base_lines = base.splitlines(keepends=True)
+    parts: List[bytes] = []
+    offset = 0
+    try:
+        while offset < len(delta):
+            op = delta[offset:offset + 1]
+            if op == _OP_COPY:
+                start, count = struct.unpack_from('>II', delta, offset + 1)
+                parts.extend(base_lines[start:start + count])
+                offset += 9
+            elif op == _OP_INSERT:
+                (length,) = struct.unpack_from('>I', delta, offset + 1)
+                parts.append(delta[offset + 5:offset + 5 + length])
+                offset += 5 + length
+            else:
+                raise BlobFormatError(f"Unknown delta operation at offset {offset}")
+    except struct.error as e:
+        raise BlobFormatError(f"Truncated delta: {e}")
+    return b''.join(parts)
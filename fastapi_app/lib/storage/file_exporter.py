@@ -6,7 +6,7 @@ structures based on various grouping strategies.
 """
 
 from pathlib import Path
-from typing import Optional, List, Dict, TypedDict
+from typing import Optional, List, Dict, Tuple, TypedDict
 import logging
 import re
 import fnmatch
@@ -102,6 +102,66 @@ class FileExporter:
         Raises:
             ValueError: If group_by is invalid or target_path is invalid
         """
+        plan = self.plan_export(
+            target_path=target_path,
+            collections=collections,
+            variants=variants,
+            regex=regex,
+            include_versions=include_versions,
+            group_by=group_by,
+            filename_transforms=filename_transforms,
+            tei_only=tei_only
+        )
+
+        # Create target directory
+        if not self.dry_run:
+            target_path = Path(target_path)
+            target_path.mkdir(parents=True, exist_ok=True)
+        else:
+            logger.info("[DRY RUN] Would create target directory: %s", target_path)
+
+        # Export to all paths (handles multi-collection duplication)
+        for file_meta, output_path in plan:
+            try:
+                self._export_file(file_meta, output_path)
+            except Exception as e:
+                self._record_error(file_meta, e)
+
+        logger.info(
+            f"Export complete: {self.stats['files_exported']} exported, "
+            f"{self.stats['files_skipped']} skipped, "
+            f"{len(self.stats['errors'])} errors"
+        )
+
+        return self.stats
+
+    def plan_export(
+        self,
+        target_path: Path = Path(),
+        collections: Optional[List[str]] = None,
+        variants: Optional[List[str]] = None,
+        regex: Optional[str] = None,
+        include_versions: bool = False,
+        group_by: str = "type",
+        filename_transforms: Optional[List[str]] = None,
+        tei_only: bool = False
+    ) -> List[Tuple[FileMetadata, Path]]:
+        """
+        Determine the files to export and their output paths, without exporting them.
+
+        Resets the statistics and counts scanned and skipped files and errors;
+        takes the same filters as export_files().
+
+        Args:
+            target_path: Base of the output paths (default: relative paths)
+
+        Returns:
+            List of (file metadata, output path) tuples. Files in several
+            collections have several entries with group_by="collection".
+
+        Raises:
+            ValueError: If group_by or a filename transform is invalid
+        """
         # Validate parameters
         if group_by not in ("type", "collection", "variant"):
             raise ValueError(f"Invalid group_by: {group_by}. Must be 'type', 'collection', or 'variant'")
@@ -111,13 +171,6 @@ class FileExporter:
             for transform in filename_transforms:
                 self._validate_transform(transform)
 
-        # Create target directory
-        if not self.dry_run:
-            target_path = Path(target_path)
-            target_path.mkdir(parents=True, exist_ok=True)
-        else:
-            logger.info("[DRY RUN] Would create target directory: %s", target_path)
-
         # Reset stats
         self.stats = {
             'files_scanned': 0,
@@ -131,7 +184,7 @@ class FileExporter:
 
         logger.info(f"Found {len(files_to_export)} files matching filters")
 
-        # Export each file
+        plan: List[Tuple[FileMetadata, Path]] = []
         for file_meta in files_to_export:
             self.stats['files_scanned'] += 1
 
@@ -155,29 +208,24 @@ class FileExporter:
 
                 # Determine output paths based on grouping
                 output_paths = self._get_output_paths(
-                    target_path, file_meta, file_collections, filename, group_by,
+                    Path(target_path), file_meta, file_collections, filename, group_by,
                     requested_collections=collections
                 )
-
-                # Export to all paths (handles multi-collection duplication)
-                for output_path in output_paths:
-                    self._export_file(file_meta, output_path)
+                plan.extend((file_meta, output_path) for output_path in output_paths)
 
             except Exception as e:
-                logger.error(f"Error exporting file {file_meta.id[:8]}: {e}")
-                self.stats['errors'].append({
-                    'file_id': file_meta.id,
-                    'filename': file_meta.filename,
-                    'error': str(e)
-                })
+                self._record_error(file_meta, e)
 
-        logger.info(
-            f"Export complete: {self.stats['files_exported']} exported, "
-            f"{self.stats['files_skipped']} skipped, "
-            f"{len(self.stats['errors'])} errors"
-        )
+        return plan
 
-        return self.stats
+    def _record_error(self, file_meta: FileMetadata, error: Exception) -> None:
+        """Log a failed file and add it to the statistics."""
+        logger.error(f"Error exporting file {file_meta.id[:8]}: {error}")
+        self.stats['errors'].append({
+            'file_id': file_meta.id,
+            'filename': file_meta.filename,
+            'error': str(error)
+        })
 
     def _query_files(
         self,
@@ -202,27 +250,19 @@ class FileExporter:
 
         # If collections specified, query each collection
         if collections:
-            # Get PDFs in specified collections (always needed to resolve doc_ids,
-            # since TEI files inherit collections from their PDF)
-            collection_pdfs = []
+            # Query each collection; TEI files inherit the collections of their
+            # PDF in the query. Files in several collections are listed once.
+            pdfs_by_id = {}
+            tei_by_id = {}
             for collection in collections:
-                pdfs = self.repo.list_files(
-                    collection=collection,
-                    file_type='pdf',
-                    include_deleted=False
-                )
-                collection_pdfs.extend(pdfs)
-
-            doc_ids = {pdf.doc_id for pdf in collection_pdfs}
+                for pdf in self.repo.list_files(collection=collection, file_type='pdf'):
+                    pdfs_by_id[pdf.stable_id] = pdf
+                for tei in self.repo.list_files(collection=collection, file_type='tei'):
+                    tei_by_id[tei.stable_id] = tei
+            collection_pdfs = list(pdfs_by_id.values())
+            collection_tei_files = list(tei_by_id.values())
 
-            # Get all TEI files and filter by doc_id
-            all_tei_files = self.repo.list_files(file_type='tei', include_deleted=False)
-
-            # Filter for gold files belonging to documents in target collections
-            gold_files = [
-                f for f in all_tei_files
-                if f.is_gold_standard and f.doc_id in doc_ids
-            ]
+            gold_files = [f for f in collection_tei_files if f.is_gold_standard]
 
             if variants:
                 gold_files = self._filter_by_variants(gold_files, variants)
@@ -230,10 +270,7 @@ class FileExporter:
             # Gather non-gold files when include_versions is set, so that
             # _ensure_gold_files can promote one to pseudo-gold when no gold exists.
             if include_versions:
-                non_gold_files = [
-                    f for f in all_tei_files
-                    if not f.is_gold_standard and f.doc_id in doc_ids
-                ]
+                non_gold_files = [f for f in collection_tei_files if not f.is_gold_standard]
                 if variants:
                     non_gold_files = self._filter_by_variants(non_gold_files, variants)
             else:
@@ -5,25 +5,39 @@ Imports files from various directory structures into the hash-sharded
 storage system with SQLite metadata tracking.
 """
 
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import Optional, List, Dict, TypedDict
+from typing import Any, Optional, List, Dict, Mapping, TypedDict
 from datetime import datetime
 import logging
+import multiprocessing
+import os
+import queue
 import re
+import threading
 from lxml import etree
 
-from fastapi_app.lib.storage.file_storage import FileStorage
+from fastapi_app.lib.storage.file_storage import FileStorage, write_storage_file
 from fastapi_app.lib.repository.file_repository import FileRepository
 from fastapi_app.lib.core.database import DatabaseManager
 from fastapi_app.lib.models.models import FileCreate, FileUpdate
+from fastapi_app.lib.services.derived_data import DerivedDataCache, run_extractors
 from fastapi_app.lib.utils.tei_utils import extract_tei_metadata
 from fastapi_app.lib.utils.hash_utils import generate_file_hash
 from fastapi_app.lib.utils.doc_id_resolver import DocIdResolver
 from fastapi_app.lib.utils.collection_utils import add_collection, load_entity_data
+from fastapi_app.lib.sse.sse_utils import ProgressBar
 from fastapi_app.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Documents per write transaction in the pipelined import mode
+IMPORT_BATCH_SIZE = 500
+
+# Worker processes used by the CLI and the import API (1 = sequential import)
+IMPORT_WORKERS = int(os.environ.get("IMPORT_WORKERS", os.cpu_count() or 1))
+
 
 class ImportStats(TypedDict):
     """Statistics for file import operations."""
@@ -41,6 +55,96 @@ class DocumentFiles(TypedDict):
     metadata: Dict[str, str]
 
 
+class FileAnalysis(TypedDict):
+    """Result of analyzing a single file in the pipelined import mode."""
+    hash: Optional[str]
+    size: int
+    metadata: Optional[Dict[str, Any]]  # TEI metadata, None for PDFs
+    derived: Optional[Dict[str, tuple]]  # Eager derived data of TEIs, None for PDFs
+    stored: bool  # True if the content was newly written to storage
+    error: Optional[str]
+
+
+def _analyze_file(path: str, storage_root: Optional[str], xml_encoding: Optional[str] = None) -> FileAnalysis:
+    """
+    Read, hash and (for XML files) parse a file.
+
+    Runs in the worker processes of the pipelined import. If storage_root is
+    given, the content is also written to storage (unless already present),
+    so that every file is read exactly once. Blobs of rows that are not
+    committed are removed again, see
+    FileImporter._remove_unreferenced_blobs().
+
+    TEI files are parsed once for both the metadata and the eager derived data.
+    """
+    try:
+        content = Path(path).read_bytes()
+        file_hash = generate_file_hash(content)
+        file_type = 'pdf' if path.endswith('.pdf') else 'tei'
+        stored = False
+        if storage_root:
+            _, stored = write_storage_file(Path(storage_root), content, file_hash, file_type, xml_encoding)
+    except OSError as e:
+        return FileAnalysis(hash=None, size=0, metadata=None, derived=None, stored=False, error=str(e))
+
+    metadata: Optional[Dict[str, Any]] = None
+    derived = None
+    if file_type == 'tei':
+        try:
+            root = etree.fromstring(content)
+            metadata = dict(extract_tei_metadata(root))
+        except Exception as e:
+            logger.error(f"Failed to parse TEI {path}: {e}")
+            root = None
+            metadata = {}
+        derived = run_extractors(root)
+
+    return FileAnalysis(
+        hash=file_hash, size=len(content), metadata=metadata,
+        derived=derived, stored=stored, error=None
+    )
+
+
+class _ImportBatch:
+    """Rows of a group of documents, committed together by the writer thread."""
+
+    def __init__(self):
+        self.doc_ids: List[str] = []
+        self.creates: List[FileCreate] = []
+        # (file_id, updates, is_content_update)
+        self.updates: List[tuple] = []
+        # (content_hash, derived data) of the TEI files
+        self.derived: List[tuple] = []
+        # (content_hash, file_type) of blobs the workers newly wrote for these rows
+        self.blobs: List[tuple] = []
+
+
+class _BatchWriter(threading.Thread):
+    """
+    Single writer thread of the pipelined import.
+
+    Takes batches from a bounded queue, so that preparing the next batch
+    overlaps with committing the current one, and passes them to write().
+    """
+
+    def __init__(self, write):
+        super().__init__(name="file-import-writer", daemon=True)
+        self.write = write
+        self.batches: queue.Queue = queue.Queue(maxsize=2)
+
+    def run(self) -> None:
+        while (batch := self.batches.get()) is not None:
+            self.write(batch)
+
+    def submit(self, batch: _ImportBatch) -> None:
+        self.batches.put(batch)
+
+    def close(self) -> None:
+        """Wait until all submitted batches are written and stop the thread."""
+        self.batches.put(None)
+        self.join()
+
+
 class FileImporter:
     """
     Import files from directory structures into SQLite + hash-sharded storage.
@@ -61,7 +165,11 @@ class FileImporter:
         gold_dir_name: Optional[str] = None,
         gold_pattern: Optional[str] = None,
         version_pattern: Optional[str] = None,
-        on_collection_created: Optional[callable] = None
+        on_collection_created: Optional[callable] = None,
+        workers: int = 1,
+        progress: Optional[ProgressBar] = None,
+        batch_size: int = IMPORT_BATCH_SIZE,
+        derived_cache: Optional[DerivedDataCache] = None
     ):
         """
         Args:
@@ -89,6 +197,17 @@ class FileImporter:
                   - r'\\.v\\d+\\.' - matches '.v1.', '.v2.', etc. (default)
                   - r'\\.version\\d+\\.' - matches '.version1.', '.version2.', etc.
                 Default: r'\\.v\\d+\\.' (matches .v1., .v2., etc.)
+            on_collection_created: Called with the collection id of each
+                auto-created collection
+            workers: Number of processes that read, hash and parse files. Values
+                above 1 enable the pipelined import mode: files are analyzed by a
+                process pool and a single writer thread commits the new rows in
+                transactions of batch_size documents.
+            progress: Optional progress bar that receives label and value updates
+                (showing and hiding it is up to the caller)
+            batch_size: Documents per write transaction in the pipelined mode
+            derived_cache: Cache receiving the derived data of imported TEI files
+                (default: derived.db next to the metadata database)
         """
         self.db = db
         self.storage = storage
@@ -130,6 +249,28 @@ class FileImporter:
         # Callback when a collection is created (for granting user access)
         self.on_collection_created = on_collection_created
 
+        self.workers = max(1, workers)
+        self.progress = progress
+        self.batch_size = max(1, batch_size)
+        self._progress_value: Optional[int] = None
+
+        if derived_cache is None and not dry_run:
+            derived_cache = DerivedDataCache(Path(db.db_path).parent)
+        self.derived_cache = derived_cache
+
+        # Pre-allocated stable IDs for the files of the current import
+        self._stable_ids: List[str] = []
+
+        # Collections known to exist during the current import
+        self._known_collections: set[str] = set()
+
+        # Pipelined mode: files per doc_id, as fetched from the database and
+        # created so far by the current import
+        self._known_files: Dict[str, List[Any]] = {}
+        self._written_documents = 0
+        # Pipelined mode: (content_hash, file_type) of blobs of failed batches
+        self._failed_blobs: List[tuple] = []
+
         self.stats: ImportStats = {
             'files_scanned': 0,
             'files_imported': 0,
@@ -163,44 +304,389 @@ class FileImporter:
         # Scan directory for files
         files = self._scan_directory(directory, recursive)
 
-        # Group files by document
-        documents = self._group_by_document(files, directory)
+        if self.workers > 1:
+            self._import_pipelined(files, directory, collection, recursive_collections)
+        else:
+            # Group files by document
+            documents = self._group_by_document(files, directory)
+
+            # Allocate stable IDs for all files at once instead of one by one
+            if not self.dry_run:
+                file_count = sum(
+                    len(doc_files.get('pdf', [])[:1]) + len(doc_files.get('tei', []))
+                    for doc_files in documents.values()
+                )
+                self._stable_ids = self.repo.allocate_stable_ids(file_count)
 
-        # Import each document
-        for doc_id, doc_files in documents.items():
-            try:
-                # Determine collection based on file location
-                if recursive_collections:
-                    # Use subdirectory name as collection
-                    file_collection = self._get_collection_from_path(
-                        doc_files, directory
+            # Import each document
+            for index, (doc_id, doc_files) in enumerate(documents.items()):
+                try:
+                    file_collection = self._document_collection(
+                        doc_files, directory, collection, recursive_collections
                     )
-                    # Fall back to explicit collection if path didn't yield one
-                    if not file_collection:
-                        file_collection = collection
+                    self._import_document(doc_id, doc_files, file_collection)
+                except Exception as e:
+                    logger.error(f"Error importing document {doc_id}: {e}")
+                    self.stats['errors'].append({
+                        'doc_id': doc_id,
+                        'error': str(e)
+                    })
+                self._report_progress(index + 1, len(documents))
+
+        # IDs of skipped files were not used
+        self._stable_ids = []
+        self._known_collections.clear()
+        self._known_files.clear()
+
+        logger.info(
+            f"Import complete: {self.stats['files_imported']} imported, "
+            f"{self.stats['files_skipped']} skipped, "
+            f"{len(self.stats['errors'])} errors"
+        )
+
+        return self.stats
+
+    def _import_pipelined(
+        self,
+        files: List[Path],
+        directory: Path,
+        collection: Optional[str],
+        recursive_collections: bool
+    ) -> None:
+        """
+        Import scanned files with a process pool and a single writer thread.
+
+        Worker processes read, hash and parse every file exactly once and write
+        new content to storage (progress 0-50). The documents are then grouped
+        using the extracted metadata and turned into rows batch by batch; the
+        writer thread commits each batch in one transaction while the next one
+        is prepared (progress 50-100). Existing files are looked up with one
+        query per batch instead of one per file.
+        """
+        if self.progress:
+            self.progress.set_label(f"Analyzing {len(files)} files...")
+
+        storage_root = None if self.dry_run else str(self.storage.data_root)
+        chunksize = max(1, min(64, len(files) // (self.workers * 4)))
+        analyses: Dict[Path, FileAnalysis] = {}
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            results = executor.map(
+                _analyze_file, [str(path) for path in files], repeat(storage_root),
+                repeat(self.storage.xml_encoding), chunksize=chunksize
+            )
+            for index, (path, analysis) in enumerate(zip(files, results)):
+                analyses[path] = analysis
+                self._report_progress(index + 1, len(files), 0, 50)
+
+        tei_metadata = {
+            path: analysis['metadata'] or {}
+            for path, analysis in analyses.items()
+            if path.suffix == '.xml'
+        }
+        documents = self._group_by_document(files, directory, tei_metadata)
+
+        if self.progress:
+            self.progress.set_label(f"Importing {len(documents)} documents...")
+
+        if not self.dry_run:
+            file_count = sum(
+                len(doc_files.get('pdf', [])[:1]) + len(doc_files.get('tei', []))
+                for doc_files in documents.values()
+            )
+            self._stable_ids = self.repo.allocate_stable_ids(file_count)
+
+        writer = None
+        if not self.dry_run:
+            self._written_documents = 0
+            self._failed_blobs = []
+            writer = _BatchWriter(lambda batch: self._write_batch(batch, len(documents)))
+            writer.start()
+
+        items = list(documents.items())
+        try:
+            for start in range(0, len(items), self.batch_size):
+                chunk = items[start:start + self.batch_size]
+                if not self.dry_run:
+                    self._prefetch_known_files(chunk, analyses)
+
+                batch = _ImportBatch()
+                for doc_id, doc_files in chunk:
+                    batch.doc_ids.append(doc_id)
+                    try:
+                        file_collection = self._document_collection(
+                            doc_files, directory, collection, recursive_collections
+                        )
+                        self._prepare_document(batch, doc_id, doc_files, file_collection, analyses)
+                    except Exception as e:
+                        logger.error(f"Error importing document {doc_id}: {e}")
+                        self.stats['errors'].append({
+                            'doc_id': doc_id,
+                            'error': str(e)
+                        })
+
+                if writer:
+                    # The writer gets copies, so that rows of later batches can
+                    # still update the cached records without racing it
+                    batch.creates = [create.model_copy(deep=True) for create in batch.creates]
+                    writer.submit(batch)
                 else:
-                    # Use provided collection
-                    file_collection = collection
+                    self._report_progress(start + len(chunk), len(items), 50, 100)
+        finally:
+            if writer:
+                writer.close()
+                self._remove_unreferenced_blobs(self._failed_blobs)
+
+    def _remove_unreferenced_blobs(self, blobs: List[tuple]) -> None:
+        """
+        Delete blobs the worker processes wrote for rows that were not committed.
 
-                # Ensure files always have a collection
-                if not file_collection:
-                    file_collection = "_inbox"
+        Blobs that are referenced by a file row (e.g. the same content imported
+        by a later batch) or by a reference count are kept.
 
-                self._import_document(doc_id, doc_files, file_collection)
+        Args:
+            blobs: (content_hash, file_type) tuples
+        """
+        for file_hash, file_type in dict.fromkeys(blobs):
+            if self.repo.get_file_by_id(file_hash, include_deleted=True) is not None:
+                continue
+            if self.storage.ref_manager.get_reference_count(file_hash):
+                continue
+            try:
+                self.storage.delete_file(file_hash, file_type, decrement_ref=False)
+                logger.info(f"Removed blob of failed import batch: {file_hash[:8]}")
             except Exception as e:
-                logger.error(f"Error importing document {doc_id}: {e}")
+                logger.error(f"Error removing blob {file_hash[:8]} of failed import batch: {e}")
+
+    def _prefetch_known_files(
+        self,
+        chunk: List[tuple],
+        analyses: Dict[Path, FileAnalysis]
+    ) -> None:
+        """Load the existing files of all doc_ids a batch of documents can touch."""
+        doc_ids = set()
+        for doc_id, doc_files in chunk:
+            doc_ids.add(doc_id)
+            for tei_path in doc_files.get('tei', []):
+                metadata = analyses[tei_path]['metadata'] or {}
+                if metadata.get('doc_id'):
+                    doc_ids.add(metadata['doc_id'])
+
+        missing = [doc_id for doc_id in doc_ids if doc_id not in self._known_files]
+        self._known_files.update(self.repo.get_files_by_doc_ids(missing))
+
+    def _prepare_document(
+        self,
+        batch: _ImportBatch,
+        doc_id: str,
+        doc_files: DocumentFiles,
+        default_collection: Optional[str],
+        analyses: Dict[Path, FileAnalysis]
+    ) -> None:
+        """Pipelined counterpart of _import_document(): adds the document's rows to batch."""
+        for path in doc_files.get('pdf', [])[:1] + doc_files.get('tei', []):
+            if analyses[path]['error']:
+                raise OSError(analyses[path]['error'])
+
+        if default_collection and not self.dry_run:
+            self._ensure_collection(default_collection)
+
+        pdf_paths = doc_files.get('pdf', [])
+        pdf_record = None
+        if pdf_paths:
+            pdf_record = self._prepare_pdf(batch, pdf_paths[0], doc_id, default_collection, analyses[pdf_paths[0]])
+        else:
+            logger.warning(f"No PDF found for document {doc_id}")
+
+        for tei_path in doc_files.get('tei', []):
+            self._prepare_tei(batch, tei_path, doc_id, pdf_record, default_collection, analyses[tei_path])
+
+    def _prepare_pdf(
+        self,
+        batch: _ImportBatch,
+        pdf_path: Path,
+        doc_id: str,
+        collection: Optional[str],
+        analysis: FileAnalysis
+    ) -> Optional[Any]:
+        """Pipelined counterpart of _import_pdf(), returns the record of the document's PDF."""
+        file_hash = analysis['hash']
+        if file_hash is None:
+            raise OSError(analysis['error'])
+
+        if self.dry_run:
+            logger.info(f"[DRY RUN] Would import PDF: {pdf_path}")
+            return None
+
+        known_files = self._known_files.setdefault(doc_id, [])
+        existing_pdf = next((f for f in known_files if f.file_type == 'pdf'), None)
+
+        if existing_pdf:
+            if existing_pdf.id == file_hash:
+                self._stage_collection(batch, existing_pdf, collection)
+                logger.info(f"Skipping PDF (already exists): {pdf_path.name} -> {file_hash[:8]}")
+                self.stats['files_skipped'] += 1
+            else:
+                logger.info(
+                    f"Updating PDF (content changed): {pdf_path.name} "
+                    f"{existing_pdf.id[:8]} -> {file_hash[:8]}"
+                )
+                self._stage_update(
+                    batch, existing_pdf, True,
+                    id=file_hash, filename=pdf_path.name, file_size=analysis['size']
+                )
+                if analysis['stored']:
+                    batch.blobs.append((file_hash, 'pdf'))
+            return existing_pdf
+
+        file_create = self._pdf_file_create(pdf_path, doc_id, file_hash, analysis['size'], collection)
+        batch.creates.append(file_create)
+        if analysis['stored']:
+            batch.blobs.append((file_hash, 'pdf'))
+        known_files.append(file_create)
+        logger.debug(f"Prepared PDF: {pdf_path.name} -> {file_hash[:8]}")
+        return file_create
+
+    def _prepare_tei(
+        self,
+        batch: _ImportBatch,
+        tei_path: Path,
+        doc_id: str,
+        pdf_record: Optional[Any],
+        collection: Optional[str],
+        analysis: FileAnalysis
+    ) -> None:
+        """Pipelined counterpart of _import_tei()."""
+        file_hash = analysis['hash']
+        if file_hash is None:
+            raise OSError(analysis['error'])
+        metadata = analysis['metadata'] or {}
+
+        if metadata.get('doc_id'):
+            doc_id = metadata['doc_id']
+            doc_id_type = metadata.get('doc_id_type', 'doi')
+        else:
+            doc_id_type = 'custom'
+
+        if self.dry_run:
+            logger.info(f"[DRY RUN] Would import TEI: {tei_path}")
+            return
+
+        known_files = self._known_files.setdefault(doc_id, [])
+        existing_tei = next(
+            (f for f in known_files if f.id == file_hash and f.file_type == 'tei'),
+            None
+        )
+        if analysis['derived']:
+            batch.derived.append((file_hash, analysis['derived']))
+
+        if existing_tei:
+            self._stage_collection(batch, existing_tei, collection)
+            logger.info(f"Skipping TEI (already exists): {tei_path.name} -> {file_hash[:8]}")
+            self.stats['files_skipped'] += 1
+            return
+
+        variant = metadata.get('variant')
+        version = sum(1 for f in known_files if f.file_type == 'tei' and f.variant == variant)
+
+        file_create = self._tei_file_create(
+            tei_path, doc_id, doc_id_type, file_hash, analysis['size'], metadata, version, collection
+        )
+        batch.creates.append(file_create)
+        known_files.append(file_create)
+        if analysis['stored']:
+            batch.blobs.append((file_hash, 'tei'))
+
+        # Update PDF metadata and label from the TEI (first TEI wins per key)
+        if pdf_record is not None and metadata.get('doc_metadata'):
+            current_metadata = pdf_record.doc_metadata or {}
+            updated_metadata = {**metadata['doc_metadata'], **current_metadata}
+            pdf_label = self._format_pdf_label(updated_metadata, doc_id, pdf_record.filename)
+            if updated_metadata != current_metadata or pdf_label != pdf_record.label:
+                self._stage_update(batch, pdf_record, False, doc_metadata=updated_metadata, label=pdf_label)
+
+        logger.debug(f"Prepared TEI: {tei_path.name} -> {file_hash[:8]}")
+
+    def _stage_update(self, batch: _ImportBatch, record: Any, is_content_update: bool, **changes) -> None:
+        """
+        Apply changes to a cached file record and schedule them for the database.
+
+        Records created in the current batch are simply modified before they are
+        inserted; all others get an update that the writer runs after the inserts.
+        """
+        file_id = record.id
+        for field, value in changes.items():
+            setattr(record, field, value)
+        if not any(record is create for create in batch.creates):
+            batch.updates.append((file_id, FileUpdate(**changes), is_content_update))
+
+    def _stage_collection(self, batch: _ImportBatch, record: Any, collection: Optional[str]) -> None:
+        """Pipelined counterpart of _ensure_file_in_collection()."""
+        current = record.doc_collections or []
+        if collection and collection not in current:
+            self._stage_update(batch, record, False, doc_collections=current + [collection])
+            logger.info(f"Added collection '{collection}' to existing file {record.id[:8]}")
+
+    def _write_batch(self, batch: _ImportBatch, total_documents: int) -> None:
+        """Commit a batch (runs in the writer thread, never raises)."""
+        try:
+            self.stats['files_imported'] += self.repo.insert_files(batch.creates)
+            for file_id, updates, is_content_update in batch.updates:
+                self.repo.update_file(file_id, updates)
+                if is_content_update:
+                    self.stats['files_updated'] += 1
+            logger.info(f"Imported batch of {len(batch.doc_ids)} documents ({len(batch.creates)} files)")
+        except Exception as e:
+            logger.error(f"Error writing import batch: {e}")
+            self._failed_blobs.extend(batch.blobs)
+            for doc_id in batch.doc_ids:
                 self.stats['errors'].append({
                     'doc_id': doc_id,
                     'error': str(e)
                 })
 
-        logger.info(
-            f"Import complete: {self.stats['files_imported']} imported, "
-            f"{self.stats['files_skipped']} skipped, "
-            f"{len(self.stats['errors'])} errors"
-        )
+        if self.derived_cache and batch.derived:
+            try:
+                self.derived_cache.put_many(batch.derived)
+            except Exception as e:
+                logger.error(f"Error storing derived data of import batch: {e}")
 
-        return self.stats
+        self._written_documents += len(batch.doc_ids)
+        self._report_progress(self._written_documents, total_documents, 50, 100)
+
+    def _document_collection(
+        self,
+        doc_files: DocumentFiles,
+        directory: Path,
+        collection: Optional[str],
+        recursive_collections: bool
+    ) -> str:
+        """Determine the collection of a document (never empty, defaults to '_inbox')."""
+        if recursive_collections:
+            # Use subdirectory name as collection, fall back to explicit
+            # collection if path didn't yield one
+            file_collection = self._get_collection_from_path(doc_files, directory) or collection
+        else:
+            # Use provided collection
+            file_collection = collection
+
+        # Ensure files always have a collection
+        return file_collection or "_inbox"
+
+    def _report_progress(self, done: int, total: int, start: int = 0, end: int = 100) -> None:
+        """Map done/total onto the start..end range of the progress bar, sending only changes."""
+        if not self.progress or total <= 0:
+            return
+        value = start + (end - start) * done // total
+        if value != self._progress_value:
+            self._progress_value = value
+            self.progress.set_value(value)
+
+    def _next_stable_id(self) -> Optional[str]:
+        """Return a pre-allocated stable ID, or None to let the repository generate one."""
+        return self._stable_ids.pop() if self._stable_ids else None
 
     def _get_collection_from_path(
         self,
@@ -314,7 +800,8 @@ class FileImporter:
     def _group_by_document(
         self,
         files: List[Path],
-        base_path: Path
+        base_path: Path,
+        tei_metadata: Optional[Dict[Path, Dict]] = None
     ) -> Dict[str, DocumentFiles]:
         """
         Group files by document ID using intelligent matching.
@@ -322,6 +809,12 @@ class FileImporter:
         Uses DocIdResolver to match PDFs and TEIs even with different encodings.
         Normalizes filenames by stripping gold pattern before matching.
 
+        Args:
+            files: Scanned files
+            base_path: Import root directory
+            tei_metadata: Already extracted metadata of the TEI files; files
+                missing from it are parsed here
+
         Returns:
             {doc_id: {'pdf': [path], 'tei': [path1, path2], 'metadata': {...}}}
         """
@@ -339,8 +832,10 @@ class FileImporter:
             tei_normalized_to_original[normalized] = tei_path
 
         # First pass: Extract metadata from all TEI files (using original paths)
-        tei_metadata: Dict[Path, Dict] = {}
+        tei_metadata = dict(tei_metadata or {})
         for tei_path in tei_files:
+            if tei_path in tei_metadata:
+                continue
             try:
                 tree = etree.parse(str(tei_path))
                 metadata = extract_tei_metadata(tree.getroot())
@@ -357,11 +852,13 @@ class FileImporter:
 
         # Second pass: Match PDFs to TEIs and resolve doc_ids
         documents: Dict[str, DocumentFiles] = {}
+        grouped_teis: set[Path] = set()
+        tei_index = self.resolver.build_tei_index(tei_normalized, tei_metadata_normalized)
 
         for pdf_path in pdf_files:
             # Find matching TEI files for this PDF using normalized names
             matching_teis = self.resolver.find_matching_teis(
-                pdf_path, tei_normalized, tei_metadata_normalized
+                pdf_path, tei_normalized, tei_metadata_normalized, tei_index
             )
 
             # Resolve doc_id using all available information
@@ -386,19 +883,14 @@ class FileImporter:
                 original_tei_path = tei_normalized_to_original[normalized_tei_path]
                 if original_tei_path not in documents[doc_id]['tei']:
                     documents[doc_id]['tei'].append(original_tei_path)
+                    grouped_teis.add(original_tei_path)
 
         # Third pass: Handle orphaned TEI files (no matching PDF)
         for tei_path in tei_files:
             metadata = tei_metadata.get(tei_path, {})
 
             # Check if this TEI is already in a document group
-            already_grouped = False
-            for doc_id, doc_files in documents.items():
-                if tei_path in doc_files['tei']:
-                    already_grouped = True
-                    break
-
-            if not already_grouped:
+            if tei_path not in grouped_teis:
                 # TEI without matching PDF - create standalone group
                 doc_id, doc_id_type = self.resolver.resolve_doc_id_for_tei(metadata)
 
@@ -440,34 +932,7 @@ class FileImporter:
 
         # Auto-create collection if it doesn't exist
         if default_collection:
-            try:
-                settings = get_settings()
-                db_dir = settings.db_dir
-                collections_data = load_entity_data(db_dir, 'collections')
-
-                # Check if collection exists
-                collection_exists = any(
-                    c.get('id') == default_collection
-                    for c in collections_data
-                )
-
-                if not collection_exists:
-                    # Create new collection with ID and name from directory name
-                    success, message = add_collection(
-                        db_dir,
-                        collection_id=default_collection,
-                        name=default_collection,
-                        description=""
-                    )
-                    if success:
-                        logger.info(f"Auto-created collection: {default_collection}")
-                        # Notify callback so user can be granted access
-                        if self.on_collection_created:
-                            self.on_collection_created(default_collection)
-                    else:
-                        logger.warning(f"Failed to create collection '{default_collection}': {message}")
-            except Exception as e:
-                logger.error(f"Error checking/creating collection '{default_collection}': {e}")
+            self._ensure_collection(default_collection)
 
         # Import PDF first (contains document metadata)
         pdf_paths = doc_files.get('pdf', [])
@@ -481,6 +946,42 @@ class FileImporter:
         for tei_path in doc_files.get('tei', []):
             self._import_tei(tei_path, doc_id, pdf_file_id, default_collection)
 
+    def _ensure_collection(self, collection: str) -> None:
+        """Auto-create a collection if it doesn't exist (checked once per import)."""
+        if collection in self._known_collections:
+            return
+        try:
+            settings = get_settings()
+            db_dir = settings.db_dir
+            collections_data = load_entity_data(db_dir, 'collections')
+
+            # Check if collection exists
+            collection_exists = any(
+                c.get('id') == collection
+                for c in collections_data
+            )
+
+            if collection_exists:
+                self._known_collections.add(collection)
+            else:
+                # Create new collection with ID and name from directory name
+                success, message = add_collection(
+                    db_dir,
+                    collection_id=collection,
+                    name=collection,
+                    description=""
+                )
+                if success:
+                    self._known_collections.add(collection)
+                    logger.info(f"Auto-created collection: {collection}")
+                    # Notify callback so user can be granted access
+                    if self.on_collection_created:
+                        self.on_collection_created(collection)
+                else:
+                    logger.warning(f"Failed to create collection '{collection}': {message}")
+        except Exception as e:
+            logger.error(f"Error checking/creating collection '{collection}': {e}")
+
     def _import_pdf(
         self,
         pdf_path: Path,
@@ -540,21 +1041,7 @@ class FileImporter:
             saved_hash, storage_path = self.storage.save_file(content, 'pdf', increment_ref=False)
             assert saved_hash == file_hash
 
-        file_create = FileCreate(
-            id=file_hash,
-            filename=pdf_path.name,
-            doc_id=doc_id,
-            doc_id_type='custom',
-            file_type='pdf',
-            file_size=len(content),
-            doc_collections=[collection] if collection else [],
-            doc_metadata={},
-            file_metadata={
-                'original_path': str(pdf_path),
-                'imported_at': datetime.now().isoformat()
-            }
-        )
-
+        file_create = self._pdf_file_create(pdf_path, doc_id, file_hash, len(content), collection)
         self.repo.insert_file(file_create)
         self.stats['files_imported'] += 1
 
@@ -581,10 +1068,11 @@ class FileImporter:
 
         # Parse TEI metadata first (needed to determine doc_id and variant for duplicate check)
         try:
-            tree = etree.parse(str(tei_path))
-            metadata = extract_tei_metadata(tree.getroot())
+            root = etree.parse(str(tei_path)).getroot()
+            metadata = extract_tei_metadata(root)
         except Exception as e:
             logger.error(f"Failed to parse TEI metadata from {tei_path}: {e}")
+            root = None
             metadata = {}
 
         # Use doc_id from metadata if available, otherwise use provided doc_id
@@ -617,6 +1105,85 @@ class FileImporter:
         # Check if content already exists in storage (for deduplication)
         content_exists = self.storage.file_exists(file_hash, 'tei')
 
+        # Determine version number by counting existing files with same doc_id + variant
+        # Version numbering is sequential: 0, 1, 2, 3...
+        # The version number increments for each new file with the same (doc_id, variant),
+        # regardless of gold status. Gold status is independent of version number.
+        existing_files = self.repo.get_files_by_doc_id(doc_id)
+        same_variant_files = [
+            f for f in existing_files
+            if f.file_type == 'tei'
+            and f.variant == variant  # Match exact variant (including None)
+        ]
+
+        # Assign next version number (0 for first, 1 for second, etc.)
+        version = len(same_variant_files)
+
+        # Save to storage (deduplication happens at storage level)
+        # Note: increment_ref=False because insert_file handles reference counting
+        if not content_exists:
+            saved_hash, storage_path = self.storage.save_file(content, 'tei', increment_ref=False)
+            assert saved_hash == file_hash
+        else:
+            logger.debug(f"Content already in storage, creating new database entry: {file_hash[:8]}")
+
+        file_create = self._tei_file_create(
+            tei_path, doc_id, doc_id_type, file_hash, len(content), metadata, version, collection
+        )
+
+        # Insert into database
+        self.repo.insert_file(file_create)
+        self.stats['files_imported'] += 1
+
+        if self.derived_cache:
+            try:
+                self.derived_cache.put_many([(file_hash, run_extractors(root))])
+            except Exception as e:
+                logger.error(f"Failed to store derived data of {tei_path.name}: {e}")
+
+        # Update PDF metadata if this is the first TEI file
+        if pdf_file_id and metadata.get('doc_metadata'):
+            self._update_pdf_metadata(pdf_file_id, doc_id, metadata['doc_metadata'])
+
+        logger.info(f"Imported TEI: {tei_path.name} -> {file_hash[:8]}")
+
+    def _pdf_file_create(
+        self,
+        pdf_path: Path,
+        doc_id: str,
+        file_hash: str,
+        file_size: int,
+        collection: Optional[str]
+    ) -> FileCreate:
+        """Build the database entry of a new PDF."""
+        return FileCreate(
+            id=file_hash,
+            stable_id=self._next_stable_id(),
+            filename=pdf_path.name,
+            doc_id=doc_id,
+            doc_id_type='custom',
+            file_type='pdf',
+            file_size=file_size,
+            doc_collections=[collection] if collection else [],
+            doc_metadata={},
+            file_metadata={
+                'original_path': str(pdf_path),
+                'imported_at': datetime.now().isoformat()
+            }
+        )
+
+    def _tei_file_create(
+        self,
+        tei_path: Path,
+        doc_id: str,
+        doc_id_type: str,
+        file_hash: str,
+        file_size: int,
+        metadata: Mapping[str, Any],
+        version: int,
+        collection: Optional[str]
+    ) -> FileCreate:
+        """Build the database entry of a new TEI file, determining gold status and label."""
         # Determine if this is a gold standard file
         # Default: gold = file without .vN. version marker in filename
         # Can be overridden with gold_pattern (for legacy imports)
@@ -643,28 +1210,6 @@ class FileImporter:
             is_gold = not has_version_marker
             logger.debug(f"Gold determination for {filename}: has_version_marker={has_version_marker}, is_gold={is_gold}")
 
-        # Determine version number by counting existing files with same doc_id + variant
-        # Version numbering is sequential: 0, 1, 2, 3...
-        # The version number increments for each new file with the same (doc_id, variant),
-        # regardless of gold status. Gold status is independent of version number.
-        existing_files = self.repo.get_files_by_doc_id(doc_id)
-        same_variant_files = [
-            f for f in existing_files
-            if f.file_type == 'tei'
-            and f.variant == variant  # Match exact variant (including None)
-        ]
-
-        # Assign next version number (0 for first, 1 for second, etc.)
-        version = len(same_variant_files)
-
-        # Save to storage (deduplication happens at storage level)
-        # Note: increment_ref=False because insert_file handles reference counting
-        if not content_exists:
-            saved_hash, storage_path = self.storage.save_file(content, 'tei', increment_ref=False)
-            assert saved_hash == file_hash
-        else:
-            logger.debug(f"Content already in storage, creating new database entry: {file_hash[:8]}")
-
         # Create metadata
         # Prefer edition_title over label for display, with fallbacks
         label = metadata.get('edition_title') or metadata.get('label')
@@ -673,15 +1218,16 @@ class FileImporter:
         if not label or label.lower() in ['unknown title', 'untitled']:
             label = doc_id or tei_path.name
 
-        file_create = FileCreate(
+        return FileCreate(
             id=file_hash,
+            stable_id=self._next_stable_id(),
             filename=tei_path.name,  # Preserve original filename
             doc_id=doc_id,
             doc_id_type=doc_id_type,
             file_type='tei',
-            file_size=len(content),
+            file_size=file_size,
             label=label,
-            variant=variant,
+            variant=metadata.get('variant'),
             version=version,
             is_gold_standard=is_gold,
             doc_collections=[collection] if collection else [],
@@ -692,17 +1238,7 @@ class FileImporter:
             }
         )
 
-        # Insert into database
-        self.repo.insert_file(file_create)
-        self.stats['files_imported'] += 1
-
-        # Update PDF metadata if this is the first TEI file
-        if pdf_file_id and metadata.get('doc_metadata'):
-            self._update_pdf_metadata(pdf_file_id, doc_id, metadata['doc_metadata'])
-
-        logger.info(f"Imported TEI: {tei_path.name} -> {file_hash[:8]}")
-
-    def _format_pdf_label(self, doc_metadata: Dict, doc_id: str = None, filename: str = None) -> str:
+    def _format_pdf_label(self,doc_metadata: Dict, doc_id: str = None, filename: str = None) -> str:
         """
         Format PDF label as "Author (Year) Title..." with fallbacks.
 
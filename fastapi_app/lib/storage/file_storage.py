@@ -6,15 +6,224 @@ Provides content-addressable file storage with:
 - Automatic deduplication (same content = one file)
 - Safe file operations (atomic writes, cleanup)
 - Reference counting for safe cleanup (no orphaned files)
+- Optional encoding of XML files (see blob_codec.py): compressed, or as
+  deltas against the previous version of the same document. Encoded files
+  are stored as {hash}{extension}.z and decoded transparently on read.
+- Optional pack file backend (see pack_store.py), which appends blobs to a
+  few large files instead of creating one file per blob. Files are read
+  from either backend, so existing storage stays readable after switching.
 """
 
+import os
 import shutil
+import uuid
 from pathlib import Path
 from typing import Optional, Tuple, Dict
-from fastapi_app.lib.utils.hash_utils import generate_file_hash, get_storage_path, get_file_extension
+from fastapi_app.lib.utils.hash_utils import (
+    ENCODED_SUFFIX,
+    generate_file_hash,
+    get_encoded_storage_path,
+    get_storage_path,
+    get_file_extension,
+    parse_storage_filename,
+)
+from fastapi_app.lib.storage.blob_codec import (
+    BlobHeader,
+    compress_blob,
+    decode_blob,
+    delta_blob,
+    parse_header,
+)
+from fastapi_app.lib.storage.pack_store import get_pack_store
 from fastapi_app.lib.storage.storage_references import StorageReferenceManager
 from fastapi_app.lib.core.database import DatabaseManager
 
+# Storage encodings of XML files
+XML_ENCODINGS = ('plain', 'compressed', 'delta')
+
+# Encoding of newly stored XML files: plain, compressed, or delta (compressed,
+# and new versions as deltas against the previous version where smaller)
+STORAGE_XML_ENCODING = os.environ.get("STORAGE_XML_ENCODING", "plain")
+
+# Maximum number of deltas that must be applied to read a file
+STORAGE_MAX_DELTA_DEPTH = int(os.environ.get("STORAGE_MAX_DELTA_DEPTH", 10))
+
+# Storage backends: one file per blob in shard directories, or pack files
+STORAGE_BACKENDS = ('files', 'pack')
+
+# Backend that new files are written to
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "files")
+
+# File types that are encoded (binary formats like PDF are always stored plain)
+ENCODED_FILE_TYPES = ('tei', 'rng')
+
+# Bytes needed to parse a blob header (see blob_codec.py)
+_HEADER_SIZE = 39
+
+
+def _atomic_write(path: Path, content: bytes) -> None:
+    """Write a file via a uniquely named temp file, so readers never see partial content."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        temp_path.write_bytes(content)
+        os.replace(temp_path, path)
+    except Exception:
+        if temp_path.exists():
+            temp_path.unlink()
+        raise
+
+
+def find_storage_file(data_root: Path, file_hash: str, file_type: str) -> Optional[Path]:
+    """
+    Find the stored file for a hash, plain or encoded.
+
+    Only looks for single files; blobs in pack files are not found.
+
+    Args:
+        data_root: Root directory for file storage
+        file_hash: SHA-256 hash of content
+        file_type: Type of file ('pdf', 'tei', 'rng')
+
+    Returns:
+        Path of the stored file, or None if it does not exist
+    """
+    storage_path = get_storage_path(data_root, file_hash, file_type, create=False)
+    if storage_path.exists():
+        return storage_path
+    if file_type in ENCODED_FILE_TYPES:
+        encoded_path = storage_path.with_name(storage_path.name + ENCODED_SUFFIX)
+        if encoded_path.exists():
+            return encoded_path
+    return None
+
+
+def read_stored_blob(data_root: Path, file_hash: str, file_type: str) -> Optional[Tuple[bytes, bool]]:
+    """
+    Read the stored bytes of a file from either backend, without decoding.
+
+    Args:
+        data_root: Root directory for file storage
+        file_hash: SHA-256 hash of content
+        file_type: Type of file ('pdf', 'tei', 'rng')
+
+    Returns:
+        Tuple of (data, encoded), or None if the file is not stored
+    """
+    path = find_storage_file(data_root, file_hash, file_type)
+    if path is not None:
+        return path.read_bytes(), path.name.endswith(ENCODED_SUFFIX)
+    pack_store = get_pack_store(data_root, create=False)
+    if pack_store is None:
+        return None
+    return pack_store.read(file_hash)
+
+
+def storage_file_exists(data_root: Path, file_hash: str, file_type: str) -> bool:
+    """Whether a file is stored in either backend."""
+    if find_storage_file(data_root, file_hash, file_type) is not None:
+        return True
+    pack_store = get_pack_store(data_root, create=False)
+    return pack_store is not None and pack_store.contains(file_hash)
+
+
+def read_storage_file(data_root: Path, file_hash: str, file_type: str) -> Optional[bytes]:
+    """
+    Read the content of a stored file, decoding it if it is encoded.
+
+    Needs no database, like write_storage_file().
+
+    Args:
+        data_root: Root directory for file storage
+        file_hash: SHA-256 hash of content
+        file_type: Type of file ('pdf', 'tei', 'rng')
+
+    Returns:
+        File content bytes or None if file not found
+
+    Raises:
+        OSError: If file read fails
+        BlobFormatError: If an encoded file cannot be decoded
+    """
+    blob = read_stored_blob(data_root, file_hash, file_type)
+    if blob is None:
+        return None
+    data, encoded = blob
+    if not encoded:
+        return data
+    return decode_blob(data, lambda base_hash: read_storage_file(data_root, base_hash, file_type))
+
+
+def _write_blob(
+    data_root: Path,
+    file_hash: str,
+    file_type: str,
+    data: bytes,
+    encoded: bool,
+    backend: str
+) -> Path:
+    """Write stored bytes to a backend; returns the file or pack file written to."""
+    if backend == 'pack':
+        pack_store = get_pack_store(data_root)
+        entry = pack_store.write(file_hash, file_type, data, encoded)
+        return pack_store.pack_path(entry.pack_id)
+    if encoded:
+        storage_path = get_encoded_storage_path(data_root, file_hash, file_type)
+    else:
+        storage_path = get_storage_path(data_root, file_hash, file_type)
+    _atomic_write(storage_path, data)
+    return storage_path
+
+
+def write_storage_file(
+    data_root: Path,
+    content: bytes,
+    file_hash: str,
+    file_type: str,
+    xml_encoding: Optional[str] = None,
+    backend: Optional[str] = None
+) -> Tuple[Path, bool]:
+    """
+    Write content to storage unless it is already there.
+
+    Single files are written to a uniquely named temp file and renamed into
+    place, pack files are appended to under a lock, so concurrent writers
+    of the same content (threads or processes) are safe. Does not touch
+    reference counts and needs no database, which makes it usable from
+    worker processes.
+
+    Args:
+        data_root: Root directory for file storage
+        content: File content bytes
+        file_hash: SHA-256 hash of content
+        file_type: Type of file ('pdf', 'tei', 'rng')
+        xml_encoding: Encoding of XML files (default: STORAGE_XML_ENCODING);
+            'delta' stores compressed here, since there is no base
+        backend: 'files' or 'pack' (default: STORAGE_BACKEND)
+
+    Returns:
+        Tuple of (storage_path, written) - written is False if the file existed.
+        For blobs in pack files, storage_path is the pack file.
+
+    Raises:
+        OSError: If file write fails
+    """
+    existing_path = find_storage_file(data_root, file_hash, file_type)
+    if existing_path:
+        return existing_path, False
+    pack_store = get_pack_store(data_root, create=False)
+    if pack_store is not None:
+        entry = pack_store.lookup(file_hash)
+        if entry is not None:
+            return pack_store.pack_path(entry.pack_id), False
+
+    xml_encoding = xml_encoding or STORAGE_XML_ENCODING
+    encoded = xml_encoding != 'plain' and file_type in ENCODED_FILE_TYPES
+    if encoded:
+        content = compress_blob(content)
+    storage_path = _write_blob(data_root, file_hash, file_type, content, encoded, backend or STORAGE_BACKEND)
+    return storage_path, True
+
 
 class FileStorage:
     """
@@ -28,9 +237,23 @@ class FileStorage:
     - Fast filesystem operations (max ~390 files per shard with 100k files)
     - Reference counting for safe cleanup
     - No orphaned files from content changes
+
+    Encoded XML files are stored as {hash}{extension}.z, and with the 'pack'
+    backend, new files are appended to pack files in {data_root}/packs.
+    read_file() decodes them; get_file_path() returns a decoded copy in the
+    cache directory, so callers that serve or open files by path are
+    unaffected.
     """
 
-    def __init__(self, data_root: Path, db_manager: DatabaseManager, logger=None):
+    def __init__(
+        self,
+        data_root: Path,
+        db_manager: DatabaseManager,
+        logger=None,
+        xml_encoding: Optional[str] = None,
+        cache_dir: Optional[Path] = None,
+        backend: Optional[str] = None
+    ):
         """
         Initialize file storage with reference counting.
 
@@ -38,15 +261,37 @@ class FileStorage:
             data_root: Root directory for file storage
             db_manager: DatabaseManager instance (for reference counting)
             logger: Optional logger instance
+            xml_encoding: Encoding of new XML files: 'plain', 'compressed' or
+                'delta' (default: STORAGE_XML_ENCODING)
+            cache_dir: Directory for decoded copies of encoded files
+                (default: tmp/storage next to data_root)
+            backend: Backend that new files are written to: 'files' or
+                'pack' (default: STORAGE_BACKEND)
+
+        Raises:
+            ValueError: If xml_encoding or backend is unknown
         """
         self.data_root = Path(data_root)
         self.logger = logger
         self.ref_manager = StorageReferenceManager(db_manager, logger)
+        self.xml_encoding = xml_encoding or STORAGE_XML_ENCODING
+        if self.xml_encoding not in XML_ENCODINGS:
+            raise ValueError(f"Unknown storage encoding: {self.xml_encoding}")
+        self.backend = backend or STORAGE_BACKEND
+        if self.backend not in STORAGE_BACKENDS:
+            raise ValueError(f"Unknown storage backend: {self.backend}")
+        self.cache_dir = Path(cache_dir) if cache_dir else self.data_root.parent / "tmp" / "storage"
 
         # Ensure data root exists
         self.data_root.mkdir(parents=True, exist_ok=True)
 
-    def save_file(self, content: bytes, file_type: str, increment_ref: bool = True) -> Tuple[str, Path]:
+    def save_file(
+        self,
+        content: bytes,
+        file_type: str,
+        increment_ref: bool = True,
+        base_hash: Optional[str] = None
+    ) -> Tuple[str, Path]:
         """
         Save file content and return hash and path.
 
@@ -60,9 +305,13 @@ class FileStorage:
             content: File content bytes
             file_type: Type of file ('pdf', 'tei', 'rng')
             increment_ref: Whether to increment reference count (default: True)
+            base_hash: Hash of the previous version of the document; with the
+                'delta' encoding, the file is stored as a delta against it
+                if that is smaller
 
         Returns:
-            Tuple of (file_hash, storage_path)
+            Tuple of (file_hash, storage_path); for files in pack files,
+            storage_path is the pack file
 
         Raises:
             ValueError: If file_type is unknown
@@ -71,40 +320,25 @@ class FileStorage:
         # Generate hash
         file_hash = generate_file_hash(content)
 
-        # Get storage path
-        storage_path = get_storage_path(self.data_root, file_hash, file_type)
-
-        # Check if file already exists (deduplication)
-        file_existed = storage_path.exists()
-
-        if file_existed:
+        try:
+            if base_hash and self.xml_encoding == 'delta' and file_type in ENCODED_FILE_TYPES \
+                    and not self.file_exists(file_hash, file_type):
+                storage_path = self._write_encoded(file_hash, file_type, content, 'delta', base_hash)
+                written = True
+            else:
+                storage_path, written = write_storage_file(
+                    self.data_root, content, file_hash, file_type, self.xml_encoding, self.backend
+                )
+        except Exception as e:
             if self.logger:
-                self.logger.debug(f"File already exists (deduplicated): {file_hash[:8]}...")
-        else:
-            # Write file atomically (temp file + move)
-            temp_path = storage_path.with_suffix(storage_path.suffix + '.tmp')
-
-            try:
-                # Ensure shard directory exists
-                storage_path.parent.mkdir(parents=True, exist_ok=True)
-
-                # Write to temp file
-                temp_path.write_bytes(content)
-
-                # Atomic move
-                temp_path.rename(storage_path)
-
-                if self.logger:
-                    self.logger.debug(f"Saved file: {file_hash[:8]}... ({len(content)} bytes)")
-
-            except Exception as e:
-                # Cleanup temp file on error
-                if temp_path.exists():
-                    temp_path.unlink()
+                self.logger.error(f"Failed to save file {file_hash[:8]}...: {e}")
+            raise
 
-                if self.logger:
-                    self.logger.error(f"Failed to save file {file_hash[:8]}...: {e}")
-                raise
+        if self.logger:
+            if written:
+                self.logger.debug(f"Saved file: {file_hash[:8]}... ({len(content)} bytes)")
+            else:
+                self.logger.debug(f"File already exists (deduplicated): {file_hash[:8]}...")
 
         # Increment reference count (whether file existed or was newly created)
         if increment_ref:
@@ -114,7 +348,10 @@ class FileStorage:
 
     def get_file_path(self, file_hash: str, file_type: str) -> Optional[Path]:
         """
-        Get storage path for a file.
+        Get path of a file with its plain content.
+
+        For encoded files and files in pack files, this is a decoded copy in
+        the cache directory, which is created on first access.
 
         Args:
             file_hash: SHA-256 hash of file content
@@ -126,11 +363,51 @@ class FileStorage:
         Raises:
             ValueError: If file_type is unknown
         """
-        storage_path = get_storage_path(self.data_root, file_hash, file_type)
+        storage_path = self.get_blob_path(file_hash, file_type)
 
-        if storage_path.exists():
+        if storage_path is not None and not storage_path.name.endswith(ENCODED_SUFFIX):
             return storage_path
-        return None
+        if storage_path is None and not self.file_exists(file_hash, file_type):
+            return None
+        return self._materialize(file_hash, file_type)
+
+    def get_blob_path(self, file_hash: str, file_type: str) -> Optional[Path]:
+        """
+        Get path of the stored file, which may be encoded.
+
+        Use for file system housekeeping, not for reading. Files in pack
+        files have no path of their own; see file_exists() and
+        get_stored_size().
+
+        Args:
+            file_hash: SHA-256 hash of file content
+            file_type: Type of file ('pdf', 'tei', 'rng')
+
+        Returns:
+            Path to the stored file if it exists as a single file, None otherwise
+
+        Raises:
+            ValueError: If file_type is unknown
+        """
+        return find_storage_file(self.data_root, file_hash, file_type)
+
+    def get_stored_size(self, file_hash: str, file_type: str) -> Optional[int]:
+        """
+        Get the number of bytes a file takes up in storage.
+
+        Args:
+            file_hash: SHA-256 hash of file content
+            file_type: Type of file ('pdf', 'tei', 'rng')
+
+        Returns:
+            Stored (possibly encoded) size in bytes, or None if the file does not exist
+        """
+        storage_path = self.get_blob_path(file_hash, file_type)
+        if storage_path is not None:
+            return storage_path.stat().st_size
+        pack_store = get_pack_store(self.data_root, create=False)
+        entry = pack_store.lookup(file_hash) if pack_store else None
+        return entry.length if entry else None
 
     def read_file(self, file_hash: str, file_type: str) -> Optional[bytes]:
         """
@@ -147,18 +424,235 @@ class FileStorage:
             ValueError: If file_type is unknown
             OSError: If file read fails
         """
-        file_path = self.get_file_path(file_hash, file_type)
+        return read_storage_file(self.data_root, file_hash, file_type)
+
+    def reencode_file(
+        self,
+        file_hash: str,
+        file_type: str,
+        xml_encoding: str,
+        base_hash: Optional[str] = None
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Store an existing file in another encoding (repacking).
 
-        if file_path:
-            return file_path.read_bytes()
-        return None
+        The content, and so the hash, stays the same. Files that are not XML
+        are left as they are. The file is written to the storage's backend.
+
+        Args:
+            file_hash: SHA-256 hash of file content
+            file_type: Type of file ('pdf', 'tei', 'rng')
+            xml_encoding: 'plain', 'compressed' or 'delta'
+            base_hash: Base for the 'delta' encoding
+
+        Returns:
+            Tuple of (old_size, new_size) in bytes, or None if the file does not exist
+
+        Raises:
+            ValueError: If xml_encoding is unknown
+        """
+        if xml_encoding not in XML_ENCODINGS:
+            raise ValueError(f"Unknown storage encoding: {xml_encoding}")
+        old_size = self.get_stored_size(file_hash, file_type)
+        if old_size is None:
+            return None
+        if file_type not in ENCODED_FILE_TYPES:
+            return old_size, old_size
+
+        content = self.read_file(file_hash, file_type)
+        if content is None:
+            return None
+        if xml_encoding == 'plain':
+            self._store_blob(file_hash, file_type, content, False)
+            self.ref_manager.set_delta_base(file_hash, None)
+        else:
+            self._write_encoded(file_hash, file_type, content, xml_encoding, base_hash)
+        return self._resized(file_hash, file_type, old_size)
+
+    def move_file(self, file_hash: str, file_type: str, backend: str) -> Optional[Tuple[int, int]]:
+        """
+        Move an existing file to another backend, keeping its encoding.
+
+        Deltas stay valid, since their base is found in either backend.
+
+        Args:
+            file_hash: SHA-256 hash of file content
+            file_type: Type of file ('pdf', 'tei', 'rng')
+            backend: 'files' or 'pack'
+
+        Returns:
+            Tuple of (old_size, new_size) in bytes, or None if the file does not exist
+
+        Raises:
+            ValueError: If backend is unknown
+        """
+        if backend not in STORAGE_BACKENDS:
+            raise ValueError(f"Unknown storage backend: {backend}")
+        blob = read_stored_blob(self.data_root, file_hash, file_type)
+        old_size = self.get_stored_size(file_hash, file_type)
+        if blob is None or old_size is None:
+            return None
+        storage_path = self.get_blob_path(file_hash, file_type)
+        if backend == 'files' and storage_path is not None:
+            # Drop a copy in a pack file, if any
+            self._remove_blob(file_hash, file_type, keep_path=storage_path)
+        elif backend == 'pack' and storage_path is None:
+            return old_size, old_size
+        else:
+            self._store_blob(file_hash, file_type, blob[0], blob[1], backend)
+        return self._resized(file_hash, file_type, old_size)
+
+    def _resized(self, file_hash: str, file_type: str, old_size: int) -> Optional[Tuple[int, int]]:
+        """Return (old_size, new_size) after rewriting a file, or None if it was removed meanwhile."""
+        new_size = self.get_stored_size(file_hash, file_type)
+        if new_size is None:
+            return None
+        return old_size, new_size
+
+    def _store_blob(
+        self,
+        file_hash: str,
+        file_type: str,
+        data: bytes,
+        encoded: bool,
+        backend: Optional[str] = None
+    ) -> Path:
+        """Write stored bytes, replacing any other stored form of the file."""
+        backend = backend or self.backend
+        storage_path = _write_blob(self.data_root, file_hash, file_type, data, encoded, backend)
+        if backend == 'pack':
+            self._remove_blob(file_hash, file_type, keep_pack=True)
+        else:
+            self._remove_blob(file_hash, file_type, keep_path=storage_path)
+        return storage_path
+
+    def _remove_blob(
+        self,
+        file_hash: str,
+        file_type: str,
+        keep_path: Optional[Path] = None,
+        keep_pack: bool = False
+    ) -> bool:
+        """Remove the stored forms of a file, except the one to keep; True if any existed."""
+        removed = False
+        paths = [get_storage_path(self.data_root, file_hash, file_type, create=False)]
+        if file_type in ENCODED_FILE_TYPES:
+            paths.append(get_encoded_storage_path(self.data_root, file_hash, file_type, create=False))
+        for path in paths:
+            if path != keep_path and path.exists():
+                path.unlink(missing_ok=True)
+                removed = True
+        if not keep_pack:
+            pack_store = get_pack_store(self.data_root, create=False)
+            if pack_store is not None and pack_store.remove(file_hash):
+                removed = True
+        return removed
+
+    def _write_encoded(
+        self,
+        file_hash: str,
+        file_type: str,
+        content: bytes,
+        xml_encoding: str,
+        base_hash: Optional[str] = None,
+        backend: Optional[str] = None
+    ) -> Path:
+        """Write content encoded, as a delta if possible and smaller; record the delta base."""
+        blob = compress_blob(content)
+        delta_base = None
+        if xml_encoding == 'delta' and base_hash and base_hash != file_hash:
+            delta = self._encode_delta(file_hash, file_type, content, base_hash)
+            if delta is not None and len(delta) < len(blob):
+                blob, delta_base = delta, base_hash
+
+        storage_path = self._store_blob(file_hash, file_type, blob, True, backend)
+        self.ref_manager.set_delta_base(file_hash, delta_base)
+        return storage_path
+
+    def _blob_header(self, file_hash: str, file_type: str) -> Optional[BlobHeader]:
+        """Get the header of a stored file, or None if it is not encoded or not stored."""
+        storage_path = self.get_blob_path(file_hash, file_type)
+        if storage_path is not None:
+            if not storage_path.name.endswith(ENCODED_SUFFIX):
+                return None
+            with open(storage_path, 'rb') as f:
+                return parse_header(f.read(_HEADER_SIZE))
+        blob = read_stored_blob(self.data_root, file_hash, file_type)
+        if blob is None or not blob[1]:
+            return None
+        return parse_header(blob[0][:_HEADER_SIZE])
+
+    def _encode_delta(self, file_hash: str, file_type: str, content: bytes, base_hash: str) -> Optional[bytes]:
+        """Encode content as a delta against base_hash, or None if the base is unsuitable."""
+        if not self.file_exists(base_hash, file_type):
+            return None
+
+        # Check the depth of the base chain, and that it does not lead back to this file
+        base_depth = None
+        chain_hash = base_hash
+        for _ in range(STORAGE_MAX_DELTA_DEPTH + 1):
+            header = self._blob_header(chain_hash, file_type)
+            if header is None:
+                break
+            if base_depth is None:
+                base_depth = header.depth
+            if header.base_hash is None:
+                break
+            if header.base_hash == file_hash:
+                return None
+            chain_hash = header.base_hash
+            if not self.file_exists(chain_hash, file_type):
+                return None
+        else:
+            return None
+        base_depth = base_depth or 0
+        if base_depth >= STORAGE_MAX_DELTA_DEPTH:
+            return None
+
+        base_content = self.read_file(base_hash, file_type)
+        if base_content is None:
+            return None
+        delta = delta_blob(content, base_content, base_hash, base_depth)
+        # Never store a delta that does not reproduce the content
+        if decode_blob(delta, lambda _: base_content) != content:
+            if self.logger:
+                self.logger.warning(f"Delta of {file_hash[:8]}... did not round-trip, storing compressed")
+            return None
+        return delta
+
+    def _cache_path(self, file_hash: str, file_type: str) -> Path:
+        return self.cache_dir / file_hash[:2] / f"{file_hash}{get_file_extension(file_type)}"
+
+    def _materialize(self, file_hash: str, file_type: str) -> Optional[Path]:
+        """Get the decoded copy of an encoded or packed file, creating it if needed."""
+        cache_path = self._cache_path(file_hash, file_type)
+        if cache_path.exists():
+            return cache_path
+        content = self.read_file(file_hash, file_type)
+        if content is None:
+            return None
+        _atomic_write(cache_path, content)
+        return cache_path
+
+    def _detach_dependents(self, file_hash: str, file_type: str) -> None:
+        """Store the deltas against a file compressed before the file is deleted."""
+        for dependent_hash in self.ref_manager.get_delta_dependents(file_hash):
+            content = self.read_file(dependent_hash, file_type)
+            if content is None:
+                self.ref_manager.set_delta_base(dependent_hash, None)
+                continue
+            self._write_encoded(dependent_hash, file_type, content, 'compressed')
+            if self.logger:
+                self.logger.debug(f"Stored {dependent_hash[:8]}... compressed, its delta base is deleted")
 
     def delete_file(self, file_hash: str, file_type: str, decrement_ref: bool = True) -> bool:
         """
         Delete a file with reference counting support.
 
         By default, decrements reference count and only physically deletes
-        the file when ref_count reaches 0.
+        the file when ref_count reaches 0. Files in pack files are removed
+        from the pack index; their space is reclaimed by repacking (see
+        StorageGarbageCollector.collect_pack_garbage()).
 
         Set decrement_ref=False to force delete without checking references
         (use with caution - only for garbage collection).
@@ -175,9 +669,7 @@ class FileStorage:
             ValueError: If file_type is unknown
             OSError: If file deletion fails
         """
-        file_path = self.get_file_path(file_hash, file_type)
-
-        if not file_path:
+        if not self.file_exists(file_hash, file_type):
             return False
 
         # Check reference count before deleting
@@ -199,7 +691,13 @@ class FileStorage:
 
         # Delete physical file
         try:
-            file_path.unlink()
+            if file_type in ENCODED_FILE_TYPES:
+                self._detach_dependents(file_hash, file_type)
+                self.ref_manager.set_delta_base(file_hash, None)
+            file_path = self.get_blob_path(file_hash, file_type)
+            # Remove all stored forms of the file and the decoded copy, if any
+            self._remove_blob(file_hash, file_type)
+            self._cache_path(file_hash, file_type).unlink(missing_ok=True)
 
             if self.logger:
                 self.logger.info(f"Deleted file: {file_hash[:8]}... (ref_count reached 0)")
@@ -209,16 +707,17 @@ class FileStorage:
                 self.ref_manager.remove_reference_entry(file_hash)
 
             # Cleanup empty shard directory
-            shard_dir = file_path.parent
-            try:
-                if shard_dir.exists() and not any(shard_dir.iterdir()):
-                    shard_dir.rmdir()
-
-                    if self.logger:
-                        self.logger.debug(f"Removed empty shard directory: {shard_dir.name}")
-            except (OSError, FileNotFoundError):
-                # Directory not empty or was already removed
-                pass
+            if file_path is not None:
+                shard_dir = file_path.parent
+                try:
+                    if shard_dir.exists() and not any(shard_dir.iterdir()):
+                        shard_dir.rmdir()
+
+                        if self.logger:
+                            self.logger.debug(f"Removed empty shard directory: {shard_dir.name}")
+                except (OSError, FileNotFoundError):
+                    # Directory not empty or was already removed
+                    pass
 
             return True
 
@@ -241,22 +740,30 @@ class FileStorage:
         Raises:
             ValueError: If file_type is unknown
         """
-        return self.get_file_path(file_hash, file_type) is not None
+        return storage_file_exists(self.data_root, file_hash, file_type)
 
     def get_storage_stats(self) -> Dict[str, any]: # type:ignore
         """
         Get storage statistics.
 
+        Files in pack files are counted from the pack index, without
+        touching the pack files.
+
         Returns:
             Dictionary with storage statistics:
             - total_shards: Number of shard directories
             - total_files: Total number of files
             - total_size: Total size in bytes
             - files_by_type: Dict of file counts by type
+            - encoded_files: Number of encoded (compressed or delta) files
+            - pack_files: Number of pack files
+            - packed_files: Number of files in pack files
+            - pack_garbage_bytes: Bytes in pack files used by deleted files
         """
         total_shards = 0
         total_files = 0
         total_size = 0
+        encoded_files = 0
         files_by_type = {'pdf': 0, 'tei': 0, 'rng': 0, 'other': 0}
 
         # Scan all shard directories
@@ -271,21 +778,33 @@ class FileStorage:
                         total_size += file_path.stat().st_size
 
                         # Count by type
-                        if file_path.suffix == '.pdf':
-                            files_by_type['pdf'] += 1
-                        elif file_path.name.endswith('.tei.xml'):
-                            files_by_type['tei'] += 1
-                        elif file_path.suffix == '.rng':
-                            files_by_type['rng'] += 1
+                        parsed = parse_storage_filename(file_path.name)
+                        if parsed:
+                            files_by_type[parsed[1]] += 1
+                            encoded_files += parsed[2]
                         else:
                             files_by_type['other'] += 1
 
+        pack_stats = {'packs': 0, 'blobs': 0, 'pack_bytes': 0, 'live_bytes': 0}
+        pack_store = get_pack_store(self.data_root, create=False)
+        if pack_store is not None:
+            pack_stats = pack_store.get_stats()
+            total_files += pack_stats['blobs']
+            total_size += pack_stats['pack_bytes']
+            encoded_files += pack_stats['encoded_blobs']
+            for file_type, count in pack_stats['blobs_by_type'].items():
+                files_by_type[file_type] += count
+
         return {
             'total_shards': total_shards,
             'total_files': total_files,
             'total_size': total_size,
             'files_by_type': files_by_type,
-            'avg_files_per_shard': total_files / total_shards if total_shards > 0 else 0
+            'encoded_files': encoded_files,
+            'pack_files': pack_stats['packs'],
+            'packed_files': pack_stats['blobs'],
+            'pack_garbage_bytes': pack_stats['pack_bytes'] - pack_stats['live_bytes'],
+            'avg_files_per_shard': (total_files - pack_stats['blobs']) / total_shards if total_shards > 0 else 0
         }
 
     def verify_file(self, file_hash: str, file_type: str) -> bool:
@@ -325,9 +844,12 @@ class FileStorage:
             file_repository: FileRepository instance to check database
 
         Returns:
-            List of tuples: (file_hash, file_type, file_path, file_size)
+            List of tuples: (file_hash, file_type, file_path, file_size).
+            For files in pack files, file_path is the pack file; delete
+            orphans with delete_file(), not by unlinking file_path.
         """
         orphaned = []
+        seen = set()
 
         # Scan all shard directories
         for shard_dir in self.data_root.iterdir():
@@ -339,23 +861,15 @@ class FileStorage:
                 if not file_path.is_file() or file_path.suffix == '.tmp':
                     continue
 
-                # Extract hash from filename
-                file_name = file_path.stem
-                # Handle .tei.xml files
-                if file_path.name.endswith('.tei.xml'):
-                    file_hash = file_name[:-4]  # Remove .tei
-                    file_type = 'tei'
-                elif file_path.suffix == '.pdf':
-                    file_hash = file_name
-                    file_type = 'pdf'
-                elif file_path.suffix == '.rng':
-                    file_hash = file_name
-                    file_type = 'rng'
-                else:
+                # Extract hash and type from filename
+                parsed = parse_storage_filename(file_path.name)
+                if parsed is None:
                     # Unknown file type, skip
                     if self.logger:
                         self.logger.debug(f"Skipping unknown file type: {file_path}")
                     continue
+                file_hash, file_type, _ = parsed
+                seen.add(file_hash)
 
                 # Check if there's a database entry for this file
                 file_metadata = file_repository.get_file_by_id(file_hash, include_deleted=True)
@@ -370,4 +884,18 @@ class FileStorage:
                             f"Found orphaned file: {file_hash[:8]}... ({file_type}, {file_size} bytes)"
                         )
 
+        # Check the files in pack files
+        pack_store = get_pack_store(self.data_root, create=False)
+        if pack_store is not None:
+            for file_hash, entry in pack_store.iter_entries():
+                if file_hash in seen:
+                    continue
+                if file_repository.get_file_by_id(file_hash, include_deleted=True) is None:
+                    orphaned.append((file_hash, entry.file_type, pack_store.pack_path(entry.pack_id), entry.length))
+
+                    if self.logger:
+                        self.logger.debug(
+                            f"Found orphaned packed file: {file_hash[:8]}... ({entry.file_type}, {entry.length} bytes)"
+                        )
+
         return orphaned
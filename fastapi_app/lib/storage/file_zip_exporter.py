@@ -1,29 +1,53 @@
 """
-File zip exporter for creating in-memory zip archives from exported files.
-
-Creates zip archives from exported files using FileExporter and directory structure.
-Supports streaming responses for large archives and XSLT transformations.
+File zip exporter for creating zip archives from exported files.
+
+Two modes:
+- export_to_zip() exports the files to a temporary directory using
+  FileExporter, applies XSLT transformations and zips the directory.
+- export_to_zip_stream() streams the archive while it is created: files are
+  read from storage in export order, XSLT transformations run in the CPU
+  worker pool, and PDFs are stored without compression. Completed archives
+  are cached by the export parameters and the content hashes of the exported
+  files, so repeated (or resumed) downloads of an unchanged export are
+  served from the cache.
 """
 
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Callable, Deque, Iterator, Optional, List, Dict, Tuple
+import hashlib
+import json
+import os
 import tempfile
+import time
 import zipfile
 import logging
 import shutil
 import re
 
 from fastapi_app.config import get_settings
+from fastapi_app.lib.core.executors import CPU_POOL_SIZE, discard_cpu_executor, get_cpu_executor
+from fastapi_app.lib.models.models import FileMetadata
 from fastapi_app.lib.storage.file_storage import FileStorage
 from fastapi_app.lib.repository.file_repository import FileRepository
 from fastapi_app.lib.core.database import DatabaseManager
 from fastapi_app.lib.storage.file_exporter import FileExporter
+from fastapi_app.lib.storage.zip_stream import CHUNK_SIZE, ZipEntry, stream_zip
 
 logger = logging.getLogger(__name__)
 
 # Regex to validate plugin URLs (only allow /api/plugins/* URLs)
 PLUGIN_URL_PATTERN = re.compile(r'^/api/plugins/[^/]+/static/')
 
+# Maximum total size of cached export archives in bytes
+EXPORT_CACHE_MAX_BYTES = int(os.environ.get("EXPORT_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+# Bump to invalidate cached archives when the archive layout changes
+EXPORT_CACHE_VERSION = 1
+
 
 class FileZipExporter:
     """
@@ -158,6 +182,73 @@ class FileZipExporter:
 
         return zip_path
 
+    def export_to_zip_stream(
+        self,
+        collections: Optional[List[str]] = None,
+        variants: Optional[List[str]] = None,
+        regex: Optional[str] = None,
+        include_versions: bool = False,
+        group_by: str = "collection",
+        filename_transforms: Optional[List[str]] = None,
+        tei_only: bool = False,
+        additional_formats: Optional[List[Dict[str, str]]] = None,
+        progress_callback: Optional[Callable[[int, int, str], None]] = None,
+        cache_dir: Optional[Path] = None
+    ) -> "ZipExportStream":
+        """
+        Plan a streamed export; takes the same parameters as export_to_zip().
+
+        The files to export are determined immediately. The archive is
+        created while the returned stream is iterated.
+
+        Args:
+            progress_callback: Optional callback(done, total, label), called
+                while the archive is streamed
+            cache_dir: Directory of cached archives (default: tmp/exports in
+                the data directory)
+
+        Returns:
+            ZipExportStream; check its cached_path before iterating it
+
+        Raises:
+            ValueError: If parameters are invalid
+        """
+        exporter = FileExporter(self.db, self.storage, self.repo, dry_run=True)
+        plan = exporter.plan_export(
+            collections=collections,
+            variants=variants,
+            regex=regex,
+            include_versions=include_versions,
+            group_by=group_by,
+            filename_transforms=filename_transforms,
+            tei_only=tei_only
+        )
+        formats = self._resolve_formats(additional_formats or [])
+
+        cache_key = hashlib.sha256(json.dumps({
+            'version': EXPORT_CACHE_VERSION,
+            'collections': collections,
+            'variants': variants,
+            'regex': regex,
+            'include_versions': include_versions,
+            'group_by': group_by,
+            'filename_transforms': filename_transforms,
+            'tei_only': tei_only,
+            'formats': [
+                [f['id'], f['ext'], f['strip_tags'], _file_hash(f['path'])] for f in formats
+            ],
+            'files': [[path.as_posix(), file_meta.id] for file_meta, path in plan],
+        }).encode('utf-8')).hexdigest()
+
+        return ZipExportStream(
+            storage=self.storage,
+            plan=plan,
+            formats=formats,
+            cache_key=cache_key,
+            cache_dir=cache_dir or get_settings().tmp_dir / "exports",
+            progress_callback=progress_callback
+        )
+
     def _apply_xslt_transformations(
         self,
         export_dir: Path,
@@ -177,43 +268,21 @@ class FileZipExporter:
             logger.warning("lxml not available, skipping XSLT transformations")
             return
 
-        for format_spec in additional_formats:
-            format_id = format_spec.get('id')
-            xslt_url = format_spec.get('url')
-            output_type = format_spec.get('output', 'html')
-            strip_tags = format_spec.get('stripTags', False)
-            ext = format_spec.get('ext', format_id)  # Use ext field or fallback to format_id
-
-            if not format_id or not xslt_url:
-                logger.warning(f"Invalid format specification: {format_spec}")
-                continue
+        for format_spec in self._resolve_formats(additional_formats):
+            format_id = format_spec['id']
+            ext = format_spec['ext']
+            strip_tags = format_spec['strip_tags']
 
-            # Only allow plugin URLs for security
-            if not PLUGIN_URL_PATTERN.match(xslt_url):
-                logger.warning(f"Rejected non-plugin URL for XSLT: {xslt_url}")
-                continue
-
-            logger.info(f"Applying XSLT transformation for format: {format_id} (output={output_type}, stripTags={strip_tags}, ext={ext})")
-
-            # Fetch the XSLT stylesheet
             try:
-                from fastapi_app.config import get_settings
-                settings = get_settings()
-                # Map plugin URL to filesystem path
-                xslt_path = self._url_to_path(xslt_url, settings)
-                if not xslt_path or not xslt_path.exists():
-                    logger.warning(f"XSLT file not found: {xslt_path}")
-                    continue
-
                 # Parse XSLT
-                with open(xslt_path, 'rb') as f:
+                with open(format_spec['path'], 'rb') as f:
                     xslt_doc = etree.parse(f)
                     xslt_transform = etree.XSLT(xslt_doc)
 
-                logger.debug(f"Loaded XSLT from: {xslt_path}")
+                logger.debug(f"Loaded XSLT from: {format_spec['path']}")
 
             except Exception as e:
-                logger.error(f"Failed to load XSLT from {xslt_url}: {e}")
+                logger.error(f"Failed to load XSLT from {format_spec['url']}: {e}")
                 continue
 
             # Find all TEI XML files in the export directory
@@ -292,17 +361,8 @@ class FileZipExporter:
                         if strip_tags:
                             result_str = self._strip_html_tags(result_str)
 
-                        # Use the ext field for output extension (with leading period)
-                        output_ext = f'.{ext}' if ext else '.txt'
-
-                        # Determine output filename - strip ".tei" from the stem
-                        # e.g., "doc.tei.xml" -> "doc"
-                        output_filename = tei_file.stem
-                        if output_filename.endswith('.tei'):
-                            output_filename = output_filename[:-4]  # Remove ".tei"
-
                         # Write output file in the format folder
-                        output_file = format_dir / f"{output_filename}{output_ext}"
+                        output_file = format_dir / _format_output_filename(tei_file.name, ext)
                         with open(output_file, 'w', encoding='utf-8') as f:
                             f.write(result_str)
 
@@ -311,6 +371,57 @@ class FileZipExporter:
                     except Exception as e:
                         logger.error(f"Failed to transform {tei_file}: {e}")
 
+    def _resolve_formats(self, additional_formats: List[Dict[str, str]]) -> List[Dict]:
+        """
+        Validate additional export formats and find their XSLT stylesheets.
+
+        Args:
+            additional_formats: List of format specifications
+                [{'id': str, 'url': str, 'output': str, 'stripTags': bool, 'ext': str}]
+
+        Returns:
+            List of dicts with id, url, ext, output, strip_tags and the XSLT path
+        """
+        settings = get_settings()
+        formats = []
+        for format_spec in additional_formats:
+            format_id = format_spec.get('id')
+            xslt_url = format_spec.get('url')
+            output_type = format_spec.get('output', 'html')
+            strip_tags = format_spec.get('stripTags', False)
+            ext = format_spec.get('ext', format_id)  # Use ext field or fallback to format_id
+
+            if not format_id or not xslt_url:
+                logger.warning(f"Invalid format specification: {format_spec}")
+                continue
+
+            # Only allow plugin URLs for security
+            if not PLUGIN_URL_PATTERN.match(xslt_url):
+                logger.warning(f"Rejected non-plugin URL for XSLT: {xslt_url}")
+                continue
+
+            logger.info(f"Applying XSLT transformation for format: {format_id} (output={output_type}, stripTags={strip_tags}, ext={ext})")
+
+            # Map plugin URL to filesystem path
+            try:
+                xslt_path = self._url_to_path(xslt_url, settings)
+            except Exception as e:
+                logger.error(f"Failed to load XSLT from {xslt_url}: {e}")
+                continue
+            if not xslt_path or not xslt_path.exists():
+                logger.warning(f"XSLT file not found: {xslt_path}")
+                continue
+
+            formats.append({
+                'id': format_id,
+                'url': xslt_url,
+                'ext': ext,
+                'output': output_type,
+                'strip_tags': strip_tags,
+                'path': xslt_path,
+            })
+        return formats
+
     @staticmethod
     def _strip_html_tags(html_content: str) -> str:
         """
@@ -418,3 +529,227 @@ class FileZipExporter:
             logger.info(f"Cleaning up temporary directory: {self.temp_dir}")
             shutil.rmtree(self.temp_dir)
             self.temp_dir = None
+
+
+class ZipExportStream:
+    """
+    A planned export that produces its ZIP archive when iterated.
+
+    If a complete archive of the same export is cached, cached_path points
+    to it and iterating the stream reads it from there. Otherwise, the
+    archive is created on the fly and written to the cache at the same time;
+    it is added to the cache only if it was streamed completely without read
+    or transformation errors (see errors).
+    """
+
+    def __init__(
+        self,
+        storage: FileStorage,
+        plan: List[Tuple[FileMetadata, Path]],
+        formats: List[Dict],
+        cache_key: str,
+        cache_dir: Path,
+        progress_callback: Optional[Callable[[int, int, str], None]] = None
+    ):
+        self.storage = storage
+        self.plan = plan
+        self.formats = formats
+        self.cache_key = cache_key
+        self.cache_dir = Path(cache_dir)
+        self.progress_callback = progress_callback
+        self.errors: List[Dict[str, str]] = []
+
+        path = self.cache_dir / f"{cache_key}.zip"
+        self.cached_path: Optional[Path] = path if path.exists() else None
+        if self.cached_path:
+            # Mark as recently used for cache eviction
+            os.utime(self.cached_path)
+
+    @property
+    def file_count(self) -> int:
+        """Number of exported files (without additional formats)."""
+        return len(self.plan)
+
+    def __iter__(self) -> Iterator[bytes]:
+        if self.cached_path and self.cached_path.exists():
+            with open(self.cached_path, 'rb') as f:
+                while chunk := f.read(CHUNK_SIZE):
+                    yield chunk
+            return
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        part_path = self.cache_dir / f"{self.cache_key}.{os.getpid()}.{id(self)}.part"
+        try:
+            with open(part_path, 'wb') as cache_file:
+                for chunk in stream_zip(self._entries()):
+                    cache_file.write(chunk)
+                    yield chunk
+            if self.errors:
+                # Don't replay an incomplete archive to later downloads
+                logger.warning(f"Not caching export with {len(self.errors)} error(s)")
+            else:
+                os.replace(part_path, self.cache_dir / f"{self.cache_key}.zip")
+                _prune_export_cache(self.cache_dir, EXPORT_CACHE_MAX_BYTES)
+        finally:
+            part_path.unlink(missing_ok=True)
+
+    def _entries(self) -> Iterator[ZipEntry]:
+        """Archive entries in export order, with transformation results as they complete."""
+        max_pending = max(2, 2 * CPU_POOL_SIZE)
+        pending: Deque[Tuple[str, FileMetadata, Future, tuple]] = deque()
+        seen = set()
+        total = len(self.plan)
+        last_percent = -1
+
+        for done, (file_meta, path) in enumerate(self.plan, 1):
+            arcname = path.as_posix()
+            if arcname in seen:
+                logger.debug(f"Skipping duplicate export path: {arcname}")
+                continue
+            seen.add(arcname)
+
+            try:
+                content = self.storage.read_file(file_meta.id, file_meta.file_type)
+                if content is None:
+                    raise FileNotFoundError(f"File not found in storage: {file_meta.id}")
+            except Exception as e:
+                logger.error(f"Error exporting file {file_meta.id[:8]}: {e}")
+                self.errors.append({'file_id': file_meta.id, 'filename': file_meta.filename, 'error': str(e)})
+                continue
+
+            yield ZipEntry(arcname, content)
+
+            if self.formats and arcname.endswith('.tei.xml'):
+                for format_spec in self.formats:
+                    output_name = _format_output_path(path, format_spec).as_posix()
+                    if output_name in seen:
+                        continue
+                    seen.add(output_name)
+                    args = (str(format_spec['path']), content, format_spec['strip_tags'])
+                    pending.append((output_name, file_meta, self._submit(args), args))
+
+            # Add finished transformations; wait if too many are queued
+            while pending and (len(pending) > max_pending or pending[0][2].done()):
+                yield self._transformation_entry(*pending.popleft())
+
+            percent = done * 100 // total
+            if self.progress_callback and percent != last_percent:
+                last_percent = percent
+                self.progress_callback(done, total, f"Exporting {done}/{total}: {path.name}")
+
+        while pending:
+            yield self._transformation_entry(*pending.popleft())
+
+    @staticmethod
+    def _submit(args: tuple) -> Future:
+        """
+        Submit a transformation to the CPU worker pool.
+
+        If the pool is broken or shut down, the transformation runs in this
+        process instead and an already completed future is returned.
+        """
+        executor = get_cpu_executor()
+        try:
+            return executor.submit(transform_tei, *args)
+        except (BrokenProcessPool, RuntimeError) as e:
+            logger.warning(f"CPU worker pool unavailable, transforming in process: {e}")
+            if isinstance(e, BrokenProcessPool):
+                discard_cpu_executor(executor)
+            future: Future = Future()
+            try:
+                future.set_result(transform_tei(*args))
+            except Exception as transform_error:
+                future.set_exception(transform_error)
+            return future
+
+    def _transformation_entry(
+        self, output_name: str, file_meta: FileMetadata, future: Future, args: tuple
+    ) -> ZipEntry:
+        """Entry for the result of a transformation, skipped and recorded as error if it failed."""
+        def result():
+            try:
+                try:
+                    return future.result()
+                except BrokenProcessPool:
+                    # Worker died (possibly while running another task): retry in process
+                    logger.warning(f"CPU worker pool broke, transforming {output_name} in process")
+                    return transform_tei(*args)
+            except Exception as e:
+                logger.error(f"Failed to transform to {output_name}: {e}")
+                self.errors.append({'file_id': file_meta.id, 'filename': output_name, 'error': str(e)})
+                return None
+        return ZipEntry(output_name, result)
+
+
+def transform_tei(xslt_path: str, content: bytes, strip_tags: bool = False) -> str:
+    """
+    Apply an XSLT stylesheet to TEI content. Runs in the CPU worker pool.
+
+    Args:
+        xslt_path: Path of the stylesheet
+        content: TEI XML content
+        strip_tags: If True, strip HTML tags from the result
+
+    Returns:
+        Transformation result as text
+    """
+    from lxml import etree
+
+    xslt_transform = _load_xslt(xslt_path, os.stat(xslt_path).st_mtime)
+    result = xslt_transform(etree.fromstring(content))
+    result_str = str(result) if not isinstance(result, str) else result
+    if strip_tags:
+        result_str = FileZipExporter._strip_html_tags(result_str)
+    return result_str
+
+
+@lru_cache(maxsize=32)
+def _load_xslt(xslt_path: str, mtime: float):
+    """Parse a stylesheet once per worker process (and modification time)."""
+    from lxml import etree
+
+    with open(xslt_path, 'rb') as f:
+        return etree.XSLT(etree.parse(f))
+
+
+def _format_output_filename(tei_filename: str, ext: Optional[str]) -> str:
+    """Name of a transformation result: "doc.tei.xml" -> "doc.{ext}"."""
+    output_filename = Path(tei_filename).stem
+    if output_filename.endswith('.tei'):
+        output_filename = output_filename[:-4]  # Remove ".tei"
+    return f"{output_filename}{f'.{ext}' if ext else '.txt'}"
+
+
+def _format_output_path(tei_path: Path, format_spec: Dict) -> Path:
+    """
+    Archive path of a transformation result.
+
+    Results go to a format folder within the top-level collection/type folder
+    of the TEI file, e.g. "corpus/tei/doc.tei.xml" -> "corpus/csv/doc.csv".
+    """
+    parent = Path(tei_path.parts[0]) if len(tei_path.parts) >= 2 else Path()
+    return parent / format_spec['id'] / _format_output_filename(tei_path.name, format_spec['ext'])
+
+
+def _file_hash(path: Path) -> str:
+    """SHA-256 hash of a file's content."""
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def _prune_export_cache(cache_dir: Path, max_bytes: int) -> None:
+    """Delete the least recently used cached archives beyond max_bytes."""
+    archives = []
+    for path in cache_dir.glob("*.zip"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        archives.append((stat.st_mtime, stat.st_size, path))
+    archives.sort(reverse=True)
+
+    total = 0
+    for _, size, path in archives:
+        total += size
+        if total > max_bytes:
+            path.unlink(missing_ok=True)
+            logger.debug(f"Removed cached export {path.name}")
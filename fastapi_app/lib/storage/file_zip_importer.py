@@ -16,6 +16,7 @@ from fastapi_app.lib.storage.file_storage import FileStorage
 from fastapi_app.lib.repository.file_repository import FileRepository
 from fastapi_app.lib.core.database import DatabaseManager
 from fastapi_app.lib.storage.file_importer import FileImporter, ImportStats
+from fastapi_app.lib.sse.sse_utils import ProgressBar
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +39,9 @@ class FileZipImporter:
         db: DatabaseManager,
         storage: FileStorage,
         repo: FileRepository,
-        dry_run: bool = False
+        dry_run: bool = False,
+        workers: int = 1,
+        progress: Optional[ProgressBar] = None
     ):
         """
         Initialize file zip importer.
@@ -48,11 +51,15 @@ class FileZipImporter:
             storage: File storage manager
             repo: File repository
             dry_run: If True, extract and scan but don't import
+            workers: Worker processes for FileImporter (above 1: pipelined import)
+            progress: Optional progress bar passed to FileImporter
         """
         self.db = db
         self.storage = storage
         self.repo = repo
         self.dry_run = dry_run
+        self.workers = workers
+        self.progress = progress
         self.temp_dir: Optional[Path] = None
 
     def import_from_zip(
@@ -130,7 +137,9 @@ class FileZipImporter:
                 gold_dir_name=gold_dir_name,
                 gold_pattern=gold_pattern,
                 version_pattern=version_pattern,
-                on_collection_created=on_collection_created
+                on_collection_created=on_collection_created,
+                workers=self.workers,
+                progress=self.progress
             )
 
             # Import the extracted files
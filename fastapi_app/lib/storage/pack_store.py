@@ -0,0 +1,483 @@
+"""
+Pack file storage of content-addressed blobs.
+
+An alternative to one file per blob (see file_storage.py): blobs are
+appended to a few large pack files in {data_root}/packs, and an SQLite index
+maps each hash to its pack, offset and length. This keeps the number of
+inodes small, which makes backups, rsync and directory scans fast, and
+listing or measuring the stored blobs needs only the index.
+
+Pack layout: a sequence of records
+
+    MAGIC (4) | hash (32) | file type (1) | flags (1) | length (8) | data
+
+Records are self-describing, so the index can be rebuilt from the packs.
+Packs are append-only: writers append under an exclusive lock (between
+threads and processes), fsync the pack and add the index entry afterwards,
+so neither readers nor a restart after a crash see an entry for incomplete
+data. Deleting a blob only removes its index entry (under the same lock,
+so that a concurrent repack cannot index it again); repack() copies the
+live records of packs with garbage into a new pack and deletes the old
+packs.
+
+Reads use memory maps of the pack files, which are shared by all threads.
+"""
+
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Literal, NamedTuple, Optional, Tuple, overload
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads are serialized
+    fcntl = None
+
+from fastapi_app.lib.core.db_utils import init_database
+from fastapi_app.lib.core.sqlite_utils import get_connection, transaction
+from fastapi_app.lib.utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Directory of the pack files, relative to the storage root
+PACK_DIR = "packs"
+
+# Lock file of writers, in the pack directory
+LOCK_FILE = "write.lock"
+
+# Size after which a new pack file is started
+STORAGE_PACK_MAX_BYTES = int(os.environ.get("STORAGE_PACK_MAX_BYTES", 256 * 1024 * 1024))
+
+RECORD_MAGIC = b"PKR\x01"
+_RECORD_HEADER = struct.Struct(">4s32sBBQ")
+
+_FLAG_ENCODED = 1
+
+_TYPE_CODES = {'pdf': 1, 'tei': 2, 'rng': 3}
+_TYPE_NAMES = {code: name for name, code in _TYPE_CODES.items()}
+
+PACK_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pack_index (
+    file_hash TEXT PRIMARY KEY,
+    file_type TEXT NOT NULL,
+    pack_id INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    encoded INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_pack_index_pack ON pack_index(pack_id);
+"""
+
+
+class PackEntry(NamedTuple):
+    """Location of a blob in a pack file."""
+    file_type: str
+    pack_id: int
+    offset: int
+    length: int
+    encoded: bool
+
+
+class PackStore:
+    """
+    Blob store of append-only pack files with an SQLite index.
+
+    Use get_pack_store() to share one instance (and its memory maps) per
+    storage root.
+    """
+
+    def __init__(self, data_root: Path, max_pack_bytes: Optional[int] = None):
+        """
+        Open or create the pack store of a storage root.
+
+        Args:
+            data_root: Root directory of file storage
+            max_pack_bytes: Size after which a new pack is started
+                (default: STORAGE_PACK_MAX_BYTES)
+        """
+        self.root = Path(data_root) / PACK_DIR
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / "index.db"
+        self.max_pack_bytes = max_pack_bytes or STORAGE_PACK_MAX_BYTES
+        self._lock = threading.Lock()
+        self._maps: Dict[int, Tuple[int, mmap.mmap]] = {}
+        self._maps_lock = threading.Lock()
+        init_database(self.index_path, PACK_INDEX_SCHEMA, logger)
+
+    def pack_path(self, pack_id: int) -> Path:
+        """Path of a pack file."""
+        return self.root / f"pack-{pack_id:06d}.pack"
+
+    def pack_ids(self) -> list:
+        """Ids of the existing pack files, in ascending order."""
+        return sorted(int(path.stem[5:]) for path in self.root.glob("pack-*.pack"))
+
+    # Reading
+
+    def lookup(self, file_hash: str) -> Optional[PackEntry]:
+        """
+        Find a blob in the index.
+
+        Args:
+            file_hash: SHA-256 hash of the blob
+
+        Returns:
+            PackEntry, or None if the blob is not stored
+        """
+        with get_connection(self.index_path) as conn:
+            row = conn.execute(
+                "SELECT file_type, pack_id, offset, length, encoded FROM pack_index WHERE file_hash = ?",
+                (file_hash,)
+            ).fetchone()
+        if row is None:
+            return None
+        return PackEntry(row['file_type'], row['pack_id'], row['offset'], row['length'], bool(row['encoded']))
+
+    def read(self, file_hash: str) -> Optional[Tuple[bytes, bool]]:
+        """
+        Read a blob.
+
+        Args:
+            file_hash: SHA-256 hash of the blob
+
+        Returns:
+            Tuple of (data, encoded), or None if the blob is not stored
+        """
+        entry = self.lookup(file_hash)
+        if entry is None:
+            return None
+        try:
+            return self._read_entry(entry), entry.encoded
+        except FileNotFoundError:
+            # The pack was repacked between lookup and read
+            entry = self.lookup(file_hash)
+            if entry is None:
+                return None
+            return self._read_entry(entry), entry.encoded
+
+    def _read_entry(self, entry: PackEntry) -> bytes:
+        end = entry.offset + entry.length
+        mapped = self._map(entry.pack_id, end)
+        return mapped[entry.offset:end]
+
+    def _map(self, pack_id: int, min_size: int) -> mmap.mmap:
+        """Get a memory map of a pack covering at least min_size bytes."""
+        with self._maps_lock:
+            cached = self._maps.get(pack_id)
+            if cached and cached[0] >= min_size:
+                return cached[1]
+            # The pack has grown since it was mapped (or was never mapped)
+            with open(self.pack_path(pack_id), 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < min_size:
+                    raise ValueError(f"Pack {pack_id} is shorter than its index entries")
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            # A replaced map is closed when it is no longer referenced
+            self._maps[pack_id] = (size, mapped)
+            return mapped
+
+    def contains(self, file_hash: str) -> bool:
+        """Whether a blob is stored."""
+        return self.lookup(file_hash) is not None
+
+    def iter_entries(self) -> Iterator[Tuple[str, PackEntry]]:
+        """Iterate over (file_hash, PackEntry) of all stored blobs."""
+        with get_connection(self.index_path) as conn:
+            rows = conn.execute(
+                "SELECT file_hash, file_type, pack_id, offset, length, encoded FROM pack_index"
+            ).fetchall()
+        for row in rows:
+            yield row['file_hash'], PackEntry(
+                row['file_type'], row['pack_id'], row['offset'], row['length'], bool(row['encoded'])
+            )
+
+    def get_stats(self) -> Dict:
+        """
+        Get pack statistics from the index and the sizes of the pack files.
+
+        Returns:
+            Dictionary with packs, blobs, blobs_by_type, encoded_blobs,
+            pack_bytes (size of the pack files) and live_bytes (size of the
+            indexed records)
+        """
+        with get_connection(self.index_path) as conn:
+            rows = conn.execute("""
+                SELECT file_type, COUNT(*) AS blobs, SUM(encoded) AS encoded, SUM(length + ?) AS live
+                FROM pack_index GROUP BY file_type
+            """, (_RECORD_HEADER.size,)).fetchall()
+        pack_ids = self.pack_ids()
+        return {
+            'packs': len(pack_ids),
+            'blobs': sum(row['blobs'] for row in rows),
+            'blobs_by_type': {row['file_type']: row['blobs'] for row in rows},
+            'encoded_blobs': sum(row['encoded'] for row in rows),
+            'pack_bytes': sum(self.pack_path(pack_id).stat().st_size for pack_id in pack_ids),
+            'live_bytes': sum(row['live'] for row in rows),
+        }
+
+    # Writing
+
+    @contextmanager
+    def _write_lock(self):
+        """Exclusive lock for appending, between threads and processes."""
+        with self._lock:
+            with open(self.root / LOCK_FILE, 'a') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def write(self, file_hash: str, file_type: str, data: bytes, encoded: bool = False) -> PackEntry:
+        """
+        Append a blob and index it, replacing the index entry of an existing blob.
+
+        Args:
+            file_hash: SHA-256 hash of the (decoded) content
+            file_type: Type of file ('pdf', 'tei', 'rng')
+            data: Stored bytes
+            encoded: Whether data is an encoded blob (see blob_codec.py)
+
+        Returns:
+            PackEntry of the new record
+        """
+        with self._write_lock():
+            entry = self._append(file_hash, file_type, data, encoded)
+            with transaction(self.index_path) as conn:
+                self._index(conn, file_hash, entry)
+        return entry
+
+    def _append(self, file_hash: str, file_type: str, data: bytes, encoded: bool, sync: bool = True) -> PackEntry:
+        """
+        Append a record to the current pack; the write lock must be held.
+
+        With sync=False, the caller must call _sync() before indexing the record.
+        """
+        pack_ids = self.pack_ids()
+        pack_id = pack_ids[-1] if pack_ids else 1
+        path = self.pack_path(pack_id)
+        if path.exists() and path.stat().st_size + len(data) + _RECORD_HEADER.size > self.max_pack_bytes \
+                and path.stat().st_size > 0:
+            pack_id += 1
+            path = self.pack_path(pack_id)
+        new_pack = not path.exists()
+
+        header = _RECORD_HEADER.pack(
+            RECORD_MAGIC, bytes.fromhex(file_hash), _TYPE_CODES[file_type],
+            _FLAG_ENCODED if encoded else 0, len(data)
+        )
+        with open(path, 'ab') as f:
+            offset = f.seek(0, os.SEEK_END) + len(header)
+            f.write(header)
+            f.write(data)
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+        if new_pack:
+            self._sync_dir()
+        return PackEntry(file_type, pack_id, offset, len(data), encoded)
+
+    def _sync(self, pack_id: int) -> None:
+        """Flush a pack file to disk."""
+        with open(self.pack_path(pack_id), 'rb') as f:
+            os.fsync(f.fileno())
+
+    def _sync_dir(self) -> None:
+        """Flush the pack directory, so that new pack files survive a crash."""
+        if os.name == 'nt':
+            return
+        fd = os.open(self.root, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _index(conn, file_hash: str, entry: PackEntry) -> None:
+        conn.execute("""
+            INSERT OR REPLACE INTO pack_index (file_hash, file_type, pack_id, offset, length, encoded)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (file_hash, entry.file_type, entry.pack_id, entry.offset, entry.length, int(entry.encoded)))
+
+    def remove(self, file_hash: str) -> bool:
+        """
+        Remove a blob from the index. Its space is reclaimed by repack().
+
+        Args:
+            file_hash: SHA-256 hash of the blob
+
+        Returns:
+            True if the blob was stored
+        """
+        with self._write_lock():
+            with transaction(self.index_path) as conn:
+                cursor = conn.execute("DELETE FROM pack_index WHERE file_hash = ?", (file_hash,))
+                return cursor.rowcount > 0
+
+    # Maintenance
+
+    def repack(self, min_garbage_ratio: float = 0.2, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Rewrite packs with unreferenced records and delete them.
+
+        The live records of every pack whose share of unreferenced bytes is
+        at least min_garbage_ratio are appended to a new pack, then the old
+        pack file is deleted.
+
+        Args:
+            min_garbage_ratio: Minimum share of garbage for a pack to be rewritten
+            dry_run: If True, only report what would be done
+
+        Returns:
+            Dictionary with packs_rewritten, blobs_moved and bytes_freed
+        """
+        stats = {'packs_rewritten': 0, 'blobs_moved': 0, 'bytes_freed': 0}
+        with self._write_lock():
+            pack_ids = self.pack_ids()
+            with get_connection(self.index_path) as conn:
+                live = {
+                    row['pack_id']: row['live']
+                    for row in conn.execute(
+                        "SELECT pack_id, SUM(length + ?) AS live FROM pack_index GROUP BY pack_id",
+                        (_RECORD_HEADER.size,)
+                    )
+                }
+
+            candidates = []
+            for pack_id in pack_ids:
+                size = self.pack_path(pack_id).stat().st_size
+                garbage = size - live.get(pack_id, 0)
+                if size > 0 and garbage > 0 and garbage / size >= min_garbage_ratio:
+                    candidates.append((pack_id, garbage))
+            stats['packs_rewritten'] = len(candidates)
+            stats['bytes_freed'] = sum(garbage for _, garbage in candidates)
+            if dry_run or not candidates:
+                return stats
+
+            # Live records are copied into a new pack. Pack ids are never
+            # reused, since other processes may still have a removed pack mapped.
+            self._start_new_pack(pack_ids[-1] + 1)
+            for pack_id, garbage in candidates:
+                with get_connection(self.index_path) as conn:
+                    rows = conn.execute(
+                        "SELECT file_hash FROM pack_index WHERE pack_id = ?", (pack_id,)
+                    ).fetchall()
+                moved = []
+                for row in rows:
+                    entry = self.lookup(row['file_hash'])
+                    if entry is None or entry.pack_id != pack_id:
+                        continue
+                    data = self._read_entry(entry)
+                    new_entry = self._append(row['file_hash'], entry.file_type, data, entry.encoded, sync=False)
+                    moved.append((row['file_hash'], new_entry))
+                for new_pack_id in {entry.pack_id for _, entry in moved}:
+                    self._sync(new_pack_id)
+                with transaction(self.index_path) as conn:
+                    for file_hash, entry in moved:
+                        # Only relocate entries that still point to the old pack
+                        conn.execute("""
+                            UPDATE pack_index SET pack_id = ?, offset = ?, length = ?
+                            WHERE file_hash = ? AND pack_id = ?
+                        """, (entry.pack_id, entry.offset, entry.length, file_hash, pack_id))
+                stats['blobs_moved'] += len(moved)
+
+                self._unmap(pack_id)
+                self.pack_path(pack_id).unlink()
+                logger.info(f"Repacked pack {pack_id}: {len(moved)} blobs moved, {garbage} bytes freed")
+        return stats
+
+    def _start_new_pack(self, pack_id: int) -> None:
+        self.pack_path(pack_id).touch()
+        self._sync_dir()
+
+    def _unmap(self, pack_id: int) -> None:
+        with self._maps_lock:
+            self._maps.pop(pack_id, None)
+
+    def rebuild_index(self) -> int:
+        """
+        Rebuild the index by scanning the pack files (recovery).
+
+        Later records of the same hash win, like when they were written.
+
+        Returns:
+            Number of indexed blobs
+        """
+        entries: Dict[str, PackEntry] = {}
+        with self._write_lock():
+            for pack_id in self.pack_ids():
+                size = self.pack_path(pack_id).stat().st_size
+                with open(self.pack_path(pack_id), 'rb') as f:
+                    while True:
+                        header = f.read(_RECORD_HEADER.size)
+                        if len(header) < _RECORD_HEADER.size:
+                            break
+                        magic, raw_hash, type_code, flags, length = _RECORD_HEADER.unpack(header)
+                        if magic != RECORD_MAGIC:
+                            logger.error(f"Corrupt record in pack {pack_id} at offset {f.tell() - len(header)}")
+                            break
+                        offset = f.tell()
+                        if offset + length > size:
+                            logger.error(f"Truncated record in pack {pack_id} at offset {offset}")
+                            break
+                        f.seek(length, os.SEEK_CUR)
+                        entries[raw_hash.hex()] = PackEntry(
+                            _TYPE_NAMES[type_code], pack_id, offset, length, bool(flags & _FLAG_ENCODED)
+                        )
+            with transaction(self.index_path) as conn:
+                conn.execute("DELETE FROM pack_index")
+                for file_hash, entry in entries.items():
+                    self._index(conn, file_hash, entry)
+        return len(entries)
+
+    def close(self) -> None:
+        """Close the memory maps."""
+        with self._maps_lock:
+            for _, mapped in self._maps.values():
+                try:
+                    mapped.close()
+                except BufferError:
+                    pass
+            self._maps.clear()
+
+
+_stores: Dict[str, PackStore] = {}
+_stores_lock = threading.Lock()
+
+
+@overload
+def get_pack_store(data_root: Path, create: Literal[True] = True) -> PackStore: ...
+
+
+@overload
+def get_pack_store(data_root: Path, create: bool) -> Optional[PackStore]: ...
+
+
+def get_pack_store(data_root: Path, create: bool = True) -> Optional[PackStore]:
+    """
+    Get the shared PackStore of a storage root.
+
+    Args:
+        data_root: Root directory of file storage
+        create: If False, return None unless the store already exists
+
+    Returns:
+        PackStore instance; None only if create is False and there is no store
+    """
+    key = str(Path(data_root).resolve())
+    store = _stores.get(key)
+    if store is not None and store.root.exists():
+        return store
+    if not create and not (Path(data_root) / PACK_DIR / "index.db").exists():
+        return None
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None or not store.root.exists():
+            store = PackStore(Path(data_root))
+            _stores[key] = store
+        return store
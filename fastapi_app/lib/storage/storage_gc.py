@@ -12,6 +12,7 @@ from pathlib import Path
 from typing import Dict, List, Tuple
 from fastapi_app.lib.storage.storage_references import StorageReferenceManager
 from fastapi_app.lib.storage.file_storage import FileStorage
+from fastapi_app.lib.storage.pack_store import get_pack_store
 from fastapi_app.lib.utils.logging_utils import get_logger
 
 
@@ -26,6 +27,7 @@ class StorageGarbageCollector:
     - Files with ref_count = 0
     - Orphaned files (no reference tracking entry)
     - Mismatched references (files in DB but not in storage)
+    - Space of deleted files in pack files (repacking)
     """
 
     def __init__(self, storage: FileStorage, ref_manager: StorageReferenceManager, dry_run: bool = False):
@@ -128,6 +130,33 @@ class StorageGarbageCollector:
 
         return stats
 
+    def collect_pack_garbage(self, min_garbage_ratio: float = 0.2) -> Dict[str, int]:
+        """
+        Reclaim the space of deleted files in pack files.
+
+        Deleting a file only removes it from the pack index; packs in which
+        deleted files make up at least min_garbage_ratio of the size are
+        rewritten without them.
+
+        Args:
+            min_garbage_ratio: Minimum share of garbage for a pack to be rewritten
+
+        Returns:
+            Dictionary with repack stats: {
+                'packs_rewritten': int,
+                'blobs_moved': int,
+                'bytes_freed': int
+            }
+        """
+        pack_store = get_pack_store(self.storage.data_root, create=False)
+        if pack_store is None:
+            return {'packs_rewritten': 0, 'blobs_moved': 0, 'bytes_freed': 0}
+
+        stats = pack_store.repack(min_garbage_ratio=min_garbage_ratio, dry_run=self.dry_run)
+        prefix = "[DRY RUN] Would repack" if self.dry_run else "Repacked"
+        logger.info(f"{prefix} {stats['packs_rewritten']} pack files, {stats['bytes_freed']} bytes freed")
+        return stats
+
     def verify_references(self) -> Dict[str, List[str]]:
         """
         Verify reference integrity.
@@ -174,7 +203,8 @@ class StorageGarbageCollector:
 
         1. Clean up zero-ref files
         2. Clean up orphaned files
-        3. Report stats
+        3. Repack pack files with deleted files
+        4. Report stats
 
         Returns:
             Dictionary with stats for each phase
@@ -187,6 +217,7 @@ class StorageGarbageCollector:
             'zero_refs': self.collect_zero_refs(),
             'orphaned': self.collect_orphaned_files()
         }
+        stats['packs'] = self.collect_pack_garbage()
 
         total_deleted = stats['zero_refs']['deleted'] + stats['orphaned']['deleted']
         total_errors = stats['zero_refs']['errors'] + stats['orphaned']['errors']
@@ -23,6 +23,9 @@ from typing import Optional
 from contextlib import contextmanager
 import threading
 
+from fastapi_app.lib.storage.pack_store import get_pack_store
+from fastapi_app.lib.utils.hash_utils import parse_storage_filename
+
 
 class StorageReferenceManager:
     """
@@ -85,6 +88,9 @@ class StorageReferenceManager:
         - ref_count: Number of database entries referencing this file
         - created_at: When first reference was added
         - updated_at: When ref_count last changed
+
+        The storage_deltas table records which stored blobs are deltas
+        against which base blob, so bases are not deleted from under them.
         """
         with self._get_connection() as conn:
             conn.execute("""
@@ -102,6 +108,16 @@ class StorageReferenceManager:
                 ON storage_refs(ref_count)
                 WHERE ref_count = 0
             """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS storage_deltas (
+                    file_hash TEXT PRIMARY KEY,
+                    base_hash TEXT NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_storage_deltas_base
+                ON storage_deltas(base_hash)
+            """)
             conn.commit()
 
             if self.logger:
@@ -152,6 +168,36 @@ class StorageReferenceManager:
 
             return new_count
 
+    def increment_references(self, conn: sqlite3.Connection, references: list[tuple[str, str]]) -> None:
+        """
+        Increment reference counts for many files within the caller's transaction.
+
+        Bulk counterpart of increment_reference() for batch inserts: duplicate
+        hashes are aggregated into a single update. Does not commit.
+
+        Args:
+            conn: Connection with an open transaction
+            references: (file_hash, file_type) tuples, one per new reference
+        """
+        counts: dict[str, list] = {}
+        for file_hash, file_type in references:
+            entry = counts.setdefault(file_hash, [file_type, 0])
+            entry[1] += 1
+
+        conn.executemany("""
+            INSERT OR IGNORE INTO storage_refs (file_hash, file_type, ref_count)
+            VALUES (?, ?, 0)
+        """, [(file_hash, file_type) for file_hash, (file_type, _) in counts.items()])
+        conn.executemany("""
+            UPDATE storage_refs
+            SET ref_count = ref_count + ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE file_hash = ?
+        """, [(count, file_hash) for file_hash, (_, count) in counts.items()])
+
+        if self.logger:
+            self.logger.debug(f"Incremented ref counts for {len(counts)} files")
+
     def decrement_reference(self, file_hash: str) -> tuple[int, bool]:
         """
         Decrement reference count for a file.
@@ -266,6 +312,41 @@ class StorageReferenceManager:
             if self.logger:
                 self.logger.debug(f"Removed reference entry for {file_hash[:8]}...")
 
+    def set_delta_base(self, file_hash: str, base_hash: Optional[str]) -> None:
+        """
+        Record the base of a delta-encoded blob.
+
+        Args:
+            file_hash: Hash of the blob
+            base_hash: Hash of its base, or None if the blob is no longer a delta
+        """
+        with self._get_connection() as conn:
+            if base_hash is None:
+                conn.execute("DELETE FROM storage_deltas WHERE file_hash = ?", (file_hash,))
+            else:
+                conn.execute("""
+                    INSERT OR REPLACE INTO storage_deltas (file_hash, base_hash)
+                    VALUES (?, ?)
+                """, (file_hash, base_hash))
+            conn.commit()
+
+    def get_delta_dependents(self, base_hash: str) -> list[str]:
+        """
+        Get the blobs stored as deltas against a base blob.
+
+        Args:
+            base_hash: Hash of the base blob
+
+        Returns:
+            List of blob hashes
+        """
+        with self._get_connection() as conn:
+            cursor = conn.execute(
+                "SELECT file_hash FROM storage_deltas WHERE base_hash = ?",
+                (base_hash,)
+            )
+            return [row['file_hash'] for row in cursor.fetchall()]
+
     def rebuild_from_files_table(self) -> dict[str, int]:
         """
         Rebuild reference counts from files table (recovery/migration).
@@ -321,7 +402,8 @@ class StorageReferenceManager:
             storage_root: Root directory of hash-sharded storage
 
         Returns:
-            List of (file_hash, file_type) tuples for orphaned files
+            List of (file_hash, file_type) tuples for orphaned files,
+            including files in pack files
         """
         orphaned = []
 
@@ -343,26 +425,26 @@ class StorageReferenceManager:
                 if not file_path.is_file():
                     continue
 
-                # Extract hash from filename (hash + extension)
-                filename = file_path.name
-
-                # Determine file type from extension
-                if filename.endswith('.pdf'):
-                    file_hash = filename[:-4]
-                    file_type = 'pdf'
-                elif filename.endswith('.tei.xml'):
-                    file_hash = filename[:-8]
-                    file_type = 'tei'
-                elif filename.endswith('.rng'):
-                    file_hash = filename[:-4]
-                    file_type = 'rng'
-                else:
+                # Extract hash and type from filename (hash + extension)
+                parsed = parse_storage_filename(file_path.name)
+                if parsed is None:
                     continue  # Unknown file type
+                file_hash, file_type, _ = parsed
 
                 # Check if tracked
                 if file_hash not in tracked_hashes:
+                    # A file can briefly exist both plain and encoded
+                    tracked_hashes.add(file_hash)
                     orphaned.append((file_hash, file_type))
 
+        # Files in pack files, from the pack index
+        pack_store = get_pack_store(storage_root, create=False)
+        if pack_store is not None:
+            for file_hash, entry in pack_store.iter_entries():
+                if file_hash not in tracked_hashes:
+                    tracked_hashes.add(file_hash)
+                    orphaned.append((file_hash, entry.file_type))
+
         if self.logger and orphaned:
             self.logger.warning(f"Found {len(orphaned)} orphaned files in storage")
 
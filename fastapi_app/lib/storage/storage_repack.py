@@ -0,0 +1,219 @@
+"""
+Repacking of files in hash-sharded storage.
+
+Converts the stored XML files to another storage encoding (plain,
+compressed or delta, see file_storage.py). For the delta encoding, the
+files of each document and variant are processed in version order, and
+each one is stored as a delta against the previous one where that is
+smaller than compressing it.
+
+Also moves all stored files between the storage backends (single files or
+pack files, see pack_store.py).
+
+Files are rewritten atomically under the same content hash, so repacking
+can run while the server is running.
+"""
+
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from fastapi_app.lib.storage.file_storage import (
+    ENCODED_FILE_TYPES,
+    STORAGE_BACKENDS,
+    XML_ENCODINGS,
+    FileStorage,
+)
+from fastapi_app.lib.storage.pack_store import get_pack_store
+from fastapi_app.lib.utils.hash_utils import parse_storage_filename
+from fastapi_app.lib.utils.logging_utils import get_logger
+
+
+logger = get_logger(__name__)
+
+
+def list_version_chains(storage: FileStorage) -> List[List[Tuple[str, str]]]:
+    """
+    List the XML files of each document and variant in version order.
+
+    The gold standard comes first, since new versions are created from it.
+
+    Args:
+        storage: FileStorage instance
+
+    Returns:
+        List of chains, each a list of (file_hash, file_type) tuples
+    """
+    placeholders = ", ".join("?" for _ in ENCODED_FILE_TYPES)
+    with storage.ref_manager.db_manager.get_connection() as conn:
+        rows = conn.execute(f"""
+            SELECT id, file_type, doc_id, variant
+            FROM files
+            WHERE file_type IN ({placeholders})
+            ORDER BY doc_id, COALESCE(variant, ''), file_type,
+                     is_gold_standard DESC, COALESCE(version, 0), created_at
+        """, ENCODED_FILE_TYPES).fetchall()
+
+    chains: List[List[Tuple[str, str]]] = []
+    last_key = None
+    for row in rows:
+        key = (row['doc_id'], row['variant'], row['file_type'])
+        if key != last_key:
+            chains.append([])
+            last_key = key
+        chains[-1].append((row['id'], row['file_type']))
+    return chains
+
+
+def repack_storage(
+    storage: FileStorage,
+    xml_encoding: str,
+    dry_run: bool = False,
+    progress_callback: Optional[Callable[[int, int], None]] = None
+) -> Dict[str, int]:
+    """
+    Store all XML files of the database in the given encoding.
+
+    Args:
+        storage: FileStorage instance
+        xml_encoding: 'plain', 'compressed' or 'delta'
+        dry_run: If True, only count the files and their current size
+        progress_callback: Optional callback(done, total)
+
+    Returns:
+        Dictionary with stats: files, missing, errors, size_before, size_after
+
+    Raises:
+        ValueError: If xml_encoding is unknown
+    """
+    if xml_encoding not in XML_ENCODINGS:
+        raise ValueError(f"Unknown storage encoding: {xml_encoding}")
+
+    chains = list_version_chains(storage)
+    total = sum(len(chain) for chain in chains)
+    stats = {'files': 0, 'missing': 0, 'errors': 0, 'size_before': 0, 'size_after': 0}
+    done_hashes = set()
+    done = 0
+
+    for chain in chains:
+        base_hash = None
+        for file_hash, file_type in chain:
+            done += 1
+            if file_hash in done_hashes:
+                # Shared content, already repacked in another chain
+                base_hash = file_hash
+                continue
+            done_hashes.add(file_hash)
+
+            try:
+                if dry_run:
+                    size = storage.get_stored_size(file_hash, file_type)
+                    sizes = (size, size) if size is not None else None
+                else:
+                    sizes = storage.reencode_file(
+                        file_hash, file_type, xml_encoding,
+                        base_hash=base_hash if xml_encoding == 'delta' else None
+                    )
+            except Exception as e:
+                logger.error(f"Failed to repack {file_hash[:8]}...: {e}")
+                stats['errors'] += 1
+                continue
+
+            if sizes is None:
+                logger.warning(f"File not found in storage: {file_hash[:8]}...")
+                stats['missing'] += 1
+                continue
+
+            stats['files'] += 1
+            stats['size_before'] += sizes[0]
+            stats['size_after'] += sizes[1]
+            base_hash = file_hash
+
+            if progress_callback:
+                progress_callback(done, total)
+
+    logger.info(
+        f"Repacked {stats['files']} files as {xml_encoding}: "
+        f"{stats['size_before']} -> {stats['size_after']} bytes"
+        f"{' (dry run)' if dry_run else ''}"
+    )
+    return stats
+
+
+def _iter_single_files(storage: FileStorage) -> Iterator[Tuple[str, str]]:
+    """Iterate over (file_hash, file_type) of the files stored as single files."""
+    seen = set()
+    for shard_dir in storage.data_root.iterdir():
+        if not shard_dir.is_dir() or len(shard_dir.name) != 2:
+            continue
+        for file_path in shard_dir.iterdir():
+            parsed = parse_storage_filename(file_path.name)
+            if parsed is None or parsed[0] in seen or not file_path.is_file():
+                continue
+            seen.add(parsed[0])
+            yield parsed[0], parsed[1]
+
+
+def move_storage(
+    storage: FileStorage,
+    backend: str,
+    dry_run: bool = False,
+    progress_callback: Optional[Callable[[int, int], None]] = None
+) -> Dict[str, int]:
+    """
+    Move all stored files to the given backend, keeping their encoding.
+
+    Includes files without a database entry, so that garbage collection
+    still finds them. After moving out of pack files, the emptied packs
+    are deleted.
+
+    Args:
+        storage: FileStorage instance
+        backend: 'files' or 'pack'
+        dry_run: If True, only count the files and their size
+        progress_callback: Optional callback(done, total)
+
+    Returns:
+        Dictionary with stats: files, errors, size_before, size_after
+
+    Raises:
+        ValueError: If backend is unknown
+    """
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend: {backend}")
+
+    pack_store = get_pack_store(storage.data_root, create=False)
+    if backend == 'pack':
+        files = list(_iter_single_files(storage))
+    elif pack_store is not None:
+        files = [(file_hash, entry.file_type) for file_hash, entry in pack_store.iter_entries()]
+    else:
+        files = []
+
+    stats = {'files': 0, 'errors': 0, 'size_before': 0, 'size_after': 0}
+    for done, (file_hash, file_type) in enumerate(files, 1):
+        try:
+            if dry_run:
+                size = storage.get_stored_size(file_hash, file_type)
+                sizes = (size, size) if size is not None else None
+            else:
+                sizes = storage.move_file(file_hash, file_type, backend)
+        except Exception as e:
+            logger.error(f"Failed to move {file_hash[:8]}...: {e}")
+            stats['errors'] += 1
+            continue
+
+        if sizes is not None:
+            stats['files'] += 1
+            stats['size_before'] += sizes[0]
+            stats['size_after'] += sizes[1]
+
+        if progress_callback:
+            progress_callback(done, len(files))
+
+    if backend == 'files' and pack_store is not None and not dry_run:
+        pack_store.repack()
+
+    logger.info(
+        f"Moved {stats['files']} files to the {backend} backend"
+        f"{' (dry run)' if dry_run else ''}"
+    )
+    return stats
@@ -0,0 +1,145 @@
+"""
+Streaming ZIP archive writer.
+
+stream_zip() turns a sequence of entries into an iterator of byte chunks that
+can be passed to a StreamingResponse. The archive is never held in memory or
+written to disk: zipfile writes into an unseekable sink (using data
+descriptors instead of seeking back to local headers), and the sink is
+drained after every block. Memory use is bounded by CHUNK_SIZE.
+
+Entry content is read lazily when the entry is reached, so expensive work
+(database snapshots, transformations) can be deferred until the client has
+received the preceding entries.
+"""
+
+import io
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+# Size of the blocks read from files and of the chunks yielded to the client
+CHUNK_SIZE = 1024 * 1024
+
+# File types that are already compressed and are stored without deflating
+COMPRESSED_EXTENSIONS = {
+    '.pdf', '.zip', '.gz', '.bz2', '.xz', '.zst', '.png', '.jpg', '.jpeg', '.gif', '.webp'
+}
+
+EntrySource = Union[Path, bytes, str]
+
+
+@dataclass
+class ZipEntry:
+    """
+    A file to add to a streamed archive.
+
+    Attributes:
+        arcname: Path of the file in the archive
+        source: File path, bytes or text content, or a callable returning one
+            of them, which is called when the entry is written
+        compress: True to deflate, False to store; None decides by file extension
+        date_time: Modification time (default: file mtime or now)
+    """
+    arcname: str
+    source: Union[EntrySource, Callable[[], Optional[EntrySource]]]
+    compress: Optional[bool] = None
+    date_time: Optional[datetime] = None
+
+
+def is_compressed_file(name: str) -> bool:
+    """Whether a file name has the extension of an already compressed format."""
+    return Path(name).suffix.lower() in COMPRESSED_EXTENSIONS
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, unseekable stream collecting the bytes written by zipfile."""
+
+    def __init__(self):
+        self._chunks = []
+        self._size = 0
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._size += len(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    @property
+    def buffered(self) -> int:
+        return self._size
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        self._size = 0
+        return data
+
+
+def stream_zip(entries: Iterable[ZipEntry], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Stream a ZIP archive.
+
+    Entries whose callable source returns None are skipped.
+
+    Args:
+        entries: Entries to add, in archive order
+        chunk_size: Block size for reading files and minimum size of yielded chunks
+
+    Yields:
+        Consecutive chunks of the archive
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', allowZip64=True) as zf:
+        for entry in entries:
+            source = entry.source() if callable(entry.source) else entry.source
+            if source is None:
+                continue
+            if isinstance(source, str):
+                source = source.encode('utf-8')
+
+            compress = entry.compress
+            if compress is None:
+                compress = not is_compressed_file(entry.arcname)
+
+            if isinstance(source, Path):
+                zinfo = zipfile.ZipInfo.from_file(source, entry.arcname)
+            else:
+                zinfo = zipfile.ZipInfo(entry.arcname, _zip_date_time(datetime.now()))
+                zinfo.file_size = len(source)
+            if entry.date_time is not None:
+                zinfo.date_time = _zip_date_time(entry.date_time)
+            zinfo.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+
+            with zf.open(zinfo, 'w') as dest:
+                if isinstance(source, Path):
+                    with open(source, 'rb') as src:
+                        while block := src.read(chunk_size):
+                            dest.write(block)
+                            if sink.buffered >= chunk_size:
+                                yield sink.drain()
+                else:
+                    for start in range(0, len(source), chunk_size):
+                        dest.write(source[start:start + chunk_size])
+                        if sink.buffered >= chunk_size:
+                            yield sink.drain()
+            if sink.buffered >= chunk_size:
+                yield sink.drain()
+
+    # Central directory, written when the archive is closed
+    if sink.buffered:
+        yield sink.drain()
+
+
+def _zip_date_time(value: datetime) -> tuple:
+    """Convert a datetime to a ZIP timestamp (which cannot represent years before 1980)."""
+    return max(value.timetuple()[:6], (1980, 1, 1, 0, 0, 0))
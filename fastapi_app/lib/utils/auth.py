@@ -3,13 +3,19 @@ Authentication management for PDF-TEI-Editor.
 
 This module provides framework-agnostic authentication utilities with dependency injection.
 No Flask or FastAPI dependencies - all parameters are explicitly passed.
+
+The parsed users.json is cached per file and reused as long as the file's
+modification time and size are unchanged, so looking up the user of a request
+costs a stat() call instead of reading and parsing the file.
 """
 
+import copy
 import json
+import os
 import sys
 import threading
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 
 # Platform-specific imports for file locking
@@ -41,6 +47,28 @@ def _unlock_file(file_handle):
         fcntl.flock(file_handle, fcntl.LOCK_UN)
 
 
+# users.json path -> ((mtime_ns, size), users list, users by username)
+_users_cache: Dict[str, Tuple[Tuple[int, int], list, Dict[str, dict]]] = {}
+_users_cache_lock = threading.Lock()
+
+
+def invalidate_users_cache(users_file: Optional[Path] = None):
+    """
+    Drop cached users.json contents.
+
+    Writes through AuthManager invalidate the cache automatically; other writers
+    are detected by the changed modification time or size.
+
+    Args:
+        users_file: File to invalidate, or None for all files
+    """
+    with _users_cache_lock:
+        if users_file is None:
+            _users_cache.clear()
+        else:
+            _users_cache.pop(str(users_file), None)
+
+
 class AuthManager:
     """
     Authentication manager with dependency injection.
@@ -78,13 +106,35 @@ class AuthManager:
                         json.dump([], f, indent=2)
                     return []
 
-                with open(self.users_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                return copy.deepcopy(self._load_users()[0])
             except (IOError, json.JSONDecodeError) as e:
                 if self.logger:
                     self.logger.error(f"Error reading users file: {e}")
                 return []
 
+    def _load_users(self) -> Tuple[list, Dict[str, dict]]:
+        """
+        Return the cached users list and username index, re-reading users.json
+        if its modification time or size changed. Callers must not modify the
+        returned objects.
+        """
+        key = str(self.users_file)
+        stat = os.stat(self.users_file)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with _users_cache_lock:
+            cached = _users_cache.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1], cached[2]
+
+        with open(self.users_file, 'r', encoding='utf-8') as f:
+            users = json.load(f)
+        by_username = {}
+        for user in users:
+            by_username.setdefault(user.get('username'), user)
+        with _users_cache_lock:
+            _users_cache[key] = (signature, users, by_username)
+        return users, by_username
+
     def _write_users(self, users_data: list):
         """
         Write users to users.json file.
@@ -100,6 +150,8 @@ class AuthManager:
             except IOError as e:
                 if self.logger:
                     self.logger.error(f"Error writing users file: {e}")
+            finally:
+                invalidate_users_cache(self.users_file)
 
     def get_user_by_username(self, username: str) -> Optional[dict]:
         """
@@ -111,14 +163,24 @@ class AuthManager:
         Returns:
             User dictionary or None if not found
         """
-        users = self._read_users()
-        for user in users:
-            if user.get('username') == username:
-                # Return copy without sensitive session data
-                user_copy = user.copy()
-                user_copy.pop('session_id', None)  # Remove legacy session_id
-                return user_copy
-        return None
+        if not self.users_file.exists():
+            self._read_users()  # Creates an empty users file
+            return None
+
+        with self.lock:
+            try:
+                user = self._load_users()[1].get(username)
+            except (IOError, json.JSONDecodeError) as e:
+                if self.logger:
+                    self.logger.error(f"Error reading users file: {e}")
+                return None
+
+        if user is None:
+            return None
+        # Return copy without sensitive session data
+        user_copy = copy.deepcopy(user)
+        user_copy.pop('session_id', None)  # Remove legacy session_id
+        return user_copy
 
     def verify_password(self, username: str, passwd_hash: str) -> Optional[dict]:
         """
@@ -211,6 +273,7 @@ class AuthManager:
                 self.users_file.parent.mkdir(parents=True, exist_ok=True)
                 with open(self.users_file, 'w', encoding='utf-8') as f:
                     json.dump(users, f, indent=2)
+                invalidate_users_cache(self.users_file)
 
                 if self.logger:
                     self.logger.info(f"Created user {username}")
@@ -24,19 +24,43 @@ Low-level API (for advanced use):
     get_config_value(key, db_dir, default)
     set_config_value(key, value, db_dir)
     get_config_metadata(key, db_dir)
+
+Caching and change notifications:
+    The parsed config.json is cached per process and re-read only when the
+    file's inode, modification time or size change, so lookups are dictionary
+    accesses plus one stat() call. Listeners registered with
+    add_config_listener() are called with the changed keys whenever the cached
+    configuration changes, whether through set/delete or an external write.
+
+    def on_change(db_dir, changed_keys):
+        if 'annotation.lang' in changed_keys:
+            ...
+
+    add_config_listener(on_change)
 """
 
+import copy
 import json
 import os
 import sys
+import threading
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Callable, Dict, Optional, Set, Tuple
 from fastapi_app.lib.utils.data_utils import get_data_file_path
+from fastapi_app.lib.utils.logging_utils import get_logger
 
 MASKED_SENTINEL = "****"
 
 _METADATA_SUFFIXES = ('.type', '.values', '.description', '.masked')
 
+logger = get_logger(__name__)
+
+# config.json path -> ((inode, mtime_ns, size), parsed config)
+_config_cache: Dict[str, Tuple[Tuple[int, int, int], dict]] = {}
+_config_cache_lock = threading.Lock()
+_config_listeners: list[Callable[[Path, Set[str]], None]] = []
+_MISSING = object()
+
 
 # Platform-specific imports for file locking
 if sys.platform == 'win32':
@@ -166,32 +190,128 @@ class Config:
         return load_full_config(self.db_dir, apply_masks=apply_masks)
 
 
-def load_full_config(db_dir: Path, apply_masks: bool = False) -> dict:
+def add_config_listener(listener: Callable[[Path, Set[str]], None]):
     """
-    Load complete configuration from config.json.
+    Register a function to be called when the configuration changes.
+
+    The listener is called synchronously with the database directory and the
+    set of keys whose values were added, changed or removed. Exceptions are
+    logged and do not affect the caller.
 
     Args:
-        db_dir: Path to the database directory containing config.json
-        apply_masks: When True, replace values of masked keys with MASKED_SENTINEL
+        listener: Callable accepting (db_dir, changed_keys)
+    """
+    if listener not in _config_listeners:
+        _config_listeners.append(listener)
 
-    Returns:
-        Configuration dictionary
+
+def remove_config_listener(listener: Callable[[Path, Set[str]], None]):
+    """
+    Unregister a listener added with add_config_listener().
+
+    Args:
+        listener: The listener to remove
+    """
+    if listener in _config_listeners:
+        _config_listeners.remove(listener)
+
+
+def invalidate_config_cache(db_dir: Optional[Path] = None):
+    """
+    Drop cached configuration so that the next lookup re-reads config.json.
+
+    Args:
+        db_dir: Database directory to invalidate, or None for all
+    """
+    with _config_cache_lock:
+        if db_dir is None:
+            _config_cache.clear()
+        else:
+            _config_cache.pop(str(get_data_file_path(db_dir, 'config')), None)
+
+
+def _file_signature(config_file: Path) -> Tuple[int, int, int]:
+    stat = os.stat(config_file)
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _update_cached_config(config_file: Path, signature: Tuple[int, int, int], data: dict,
+                          old_data: Optional[dict] = None):
+    """
+    Store parsed config data and notify listeners about changed keys.
+
+    Changes are computed against old_data if given (the file content a write
+    started from), else against the previously cached data.
+    """
+    key = str(config_file)
+    with _config_cache_lock:
+        previous = _config_cache.get(key)
+        _config_cache[key] = (signature, data)
+
+    if old_data is None and previous is not None:
+        old_data = previous[1]
+    if old_data is None or not _config_listeners:
+        return
+    changed_keys = {
+        k for k in old_data.keys() | data.keys()
+        if old_data.get(k, _MISSING) != data.get(k, _MISSING)
+    }
+    if not changed_keys:
+        return
+    for listener in list(_config_listeners):
+        try:
+            listener(config_file.parent, changed_keys)
+        except Exception as e:
+            logger.error(f"Error in config change listener {listener!r}: {e}")
+
+
+def _get_cached_config(db_dir: Path) -> dict:
+    """
+    Return the parsed config.json for db_dir from the cache, re-reading the
+    file if it changed. The returned dict is shared and must not be modified.
     """
     config_file = get_data_file_path(db_dir, 'config')
 
-    if not config_file.exists():
+    try:
+        signature = _file_signature(config_file)
+    except FileNotFoundError:
         # Create empty config if it doesn't exist
         config_file.parent.mkdir(parents=True, exist_ok=True)
         with open(config_file, 'w', encoding='utf-8') as f:
             json.dump({}, f, indent=2)
+        signature = _file_signature(config_file)
+        _update_cached_config(config_file, signature, {})
         return {}
 
+    with _config_cache_lock:
+        cached = _config_cache.get(str(config_file))
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
     try:
         with open(config_file, 'r', encoding='utf-8') as f:
             data = json.load(f)
     except (IOError, json.JSONDecodeError):
+        # Not cached: the file may be in the middle of a non-atomic write
         return {}
 
+    _update_cached_config(config_file, signature, data)
+    return data
+
+
+def load_full_config(db_dir: Path, apply_masks: bool = False) -> dict:
+    """
+    Load complete configuration from config.json.
+
+    Args:
+        db_dir: Path to the database directory containing config.json
+        apply_masks: When True, replace values of masked keys with MASKED_SENTINEL
+
+    Returns:
+        Configuration dictionary (a copy that may be modified by the caller)
+    """
+    data = copy.deepcopy(_get_cached_config(db_dir))
+
     if apply_masks:
         for key in list(data.keys()):
             if not key.endswith(_METADATA_SUFFIXES):
@@ -215,12 +335,14 @@ def get_config_value(key: str, db_dir: Path, default: Any = None, apply_masks: b
         The configuration value or default
     """
     try:
-        config_data = load_full_config(db_dir)
+        config_data = _get_cached_config(db_dir)
         if apply_masks and config_data.get(f"{key}.masked") is True:
             return MASKED_SENTINEL
-        return config_data.get(key, default)
+        value = config_data.get(key, default)
     except (FileNotFoundError, ValueError):
         return default
+    # Mutable values are copied so callers cannot modify the cache
+    return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
 
 
 def get_config_metadata(key: str, db_dir: Path) -> dict[str, Any]:
@@ -233,10 +355,10 @@ def get_config_metadata(key: str, db_dir: Path) -> dict[str, Any]:
     Returns:
         Dict with 'type', 'values', 'description', and 'masked' entries (values may be None)
     """
-    config_data = load_full_config(db_dir)
+    config_data = _get_cached_config(db_dir)
     return {
         "type": config_data.get(f"{key}.type"),
-        "values": config_data.get(f"{key}.values"),
+        "values": copy.deepcopy(config_data.get(f"{key}.values")),
         "description": config_data.get(f"{key}.description"),
         "masked": config_data.get(f"{key}.masked", False),
     }
@@ -291,6 +413,7 @@ def set_config_value(
                         config_data = {}
                 else:
                     config_data = {}
+                original_data = dict(config_data)
 
                 # Special validation for *.values keys
                 if key.endswith(".values") and not isinstance(value, list):
@@ -347,9 +470,12 @@ def set_config_value(
                     except OSError:
                         pass
                     raise
+                signature = _file_signature(config_file)
             finally:
                 _unlock_file(lf)
 
+        # Outside the file lock, so listeners may write the config themselves
+        _update_cached_config(config_file, signature, config_data, original_data)
         return True, f"Set {key} to {json.dumps(value)}"
 
     except (FileNotFoundError, ValueError) as e:
@@ -388,6 +514,7 @@ def delete_config_value(key: str, db_dir: Path) -> tuple[bool, str]:
                 if key not in config_data:
                     return False, f"Key '{key}' not found"
 
+                original_data = dict(config_data)
                 del config_data[key]
 
                 tmp_fd, tmp_path = tempfile.mkstemp(dir=config_file.parent, suffix='.tmp')
@@ -403,9 +530,11 @@ def delete_config_value(key: str, db_dir: Path) -> tuple[bool, str]:
                     except OSError:
                         pass
                     raise
+                signature = _file_signature(config_file)
             finally:
                 _unlock_file(lf)
 
+        _update_cached_config(config_file, signature, config_data, original_data)
         return True, f"Deleted key '{key}'"
 
     except (FileNotFoundError, ValueError) as e:
@@ -267,11 +267,46 @@ class DocIdResolver:
         # but include for safety - use empty string instead of None
         return ("", 'custom')
 
+    def build_tei_index(
+        self,
+        tei_files: List[Path],
+        tei_metadata: Dict[Path, Dict[str, Any]]
+    ) -> Dict[Tuple[str, str], List[int]]:
+        """
+        Index TEI files by the keys find_matching_teis() compares.
+
+        With the index, matching a PDF only checks TEIs sharing a key with it
+        instead of all TEI files, which keeps grouping of large imports linear.
+
+        Args:
+            tei_files: List of all TEI file paths
+            tei_metadata: Dict mapping TEI paths to their metadata
+
+        Returns:
+            Dict mapping (key type, value) to positions in tei_files
+        """
+        index: Dict[Tuple[str, str], List[int]] = {}
+        for position, tei_path in enumerate(tei_files):
+            tei_stem = tei_path.stem.replace('.tei', '')
+            metadata = tei_metadata.get(tei_path, {})
+            keys = {('raw', tei_stem), ('decoded', self.decode_filename_to_doi(tei_stem))}
+            fileref = metadata.get('fileref', '')
+            if fileref:
+                fileref_normalized = fileref.replace('.pdf', '')
+                keys.add(('raw', fileref_normalized))
+                keys.add(('decoded', self.decode_filename_to_doi(fileref_normalized)))
+            if metadata.get('doc_id'):
+                keys.add(('doi', metadata['doc_id']))
+            for key in keys:
+                index.setdefault(key, []).append(position)
+        return index
+
     def find_matching_teis(
         self,
         pdf_path: Path,
         tei_files: List[Path],
-        tei_metadata: Dict[Path, Dict[str, Any]]
+        tei_metadata: Dict[Path, Dict[str, Any]],
+        tei_index: Optional[Dict[Tuple[str, str], List[int]]] = None
     ) -> List[Tuple[Path, Dict[str, Any]]]:
         """
         Find TEI files that match the given PDF.
@@ -286,16 +321,28 @@ class DocIdResolver:
             pdf_path: Path to PDF file
             tei_files: List of all TEI file paths
             tei_metadata: Dict mapping TEI paths to their metadata
+            tei_index: Optional index from build_tei_index() for tei_files;
+                restricts the comparison to candidate TEIs
 
         Returns:
             List of tuples (tei_path, metadata) for matching TEIs, ordered by priority
         """
         pdf_stem = pdf_path.stem
         pdf_stem_decoded = self.decode_filename_to_doi(pdf_stem)
+        pdf_doi = self.extract_doi_from_filename(pdf_stem)
+
+        if tei_index is not None:
+            positions = set(tei_index.get(('raw', pdf_stem), []))
+            positions.update(tei_index.get(('decoded', pdf_stem_decoded), []))
+            if pdf_doi:
+                positions.update(tei_index.get(('doi', pdf_doi), []))
+            candidates = [tei_files[position] for position in sorted(positions)]
+        else:
+            candidates = tei_files
 
         matches = []
 
-        for tei_path in tei_files:
+        for tei_path in candidates:
             tei_stem = tei_path.stem.replace('.tei', '')
             metadata = tei_metadata.get(tei_path, {})
 
@@ -319,7 +366,6 @@ class DocIdResolver:
                     continue
 
             # Strategy 4: Both have same DOI (regardless of encoding)
-            pdf_doi = self.extract_doi_from_filename(pdf_stem)
             tei_doi = metadata.get('doc_id')
             if pdf_doi and tei_doi and pdf_doi == tei_doi:
                 matches.append((tei_path, metadata, 4))
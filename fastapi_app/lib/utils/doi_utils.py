@@ -27,6 +27,10 @@ DOI_REGEX = r"^10\.\d{4,9}/[-._;()/:A-Z0-9]+$"
 # Non-anchored pattern for searching DOIs within text
 DOI_SEARCH_PATTERN = re.compile(r'10\.\d{4,9}/[-._;()/:A-Z0-9]+', re.IGNORECASE)
 
+# Metadata API endpoints; the DOI is appended to the URL
+CROSSREF_API_URL = "https://api.crossref.org/works/"
+DATACITE_API_URL = "https://api.datacite.org/dois/"
+
 
 def validate_doi(doi: str) -> bool:
     """
@@ -147,11 +151,22 @@ def parse_crossref_metadata(doi: str, timeout: int = 10) -> Dict[str, Any]:
     Raises:
         requests.exceptions.HTTPError: If API request fails
     """
-    url = f"https://api.crossref.org/works/{doi}"
+    url = f"{CROSSREF_API_URL}{doi}"
     response = requests.get(url, timeout=timeout)
     response.raise_for_status()
-    data = response.json()
+    return crossref_to_metadata(response.json())
+
 
+def crossref_to_metadata(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a CrossRef API response to the metadata format.
+
+    Args:
+        data: Parsed JSON response of the CrossRef works endpoint
+
+    Returns:
+        Dictionary with parsed metadata
+    """
     message = data.get("message", {})
 
     # Extract title
@@ -207,11 +222,22 @@ def parse_datacite_metadata(doi: str, timeout: int = 10) -> Dict[str, Any]:
     Raises:
         requests.exceptions.HTTPError: If API request fails
     """
-    url = f"https://api.datacite.org/dois/{doi}"
+    url = f"{DATACITE_API_URL}{doi}"
     response = requests.get(url, timeout=timeout)
     response.raise_for_status()
-    data = response.json()
+    return datacite_to_metadata(response.json())
 
+
+def datacite_to_metadata(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a DataCite API response to the metadata format.
+
+    Args:
+        data: Parsed JSON response of the DataCite dois endpoint
+
+    Returns:
+        Dictionary with parsed metadata
+    """
     attributes = data.get("data", {}).get("attributes", {})
 
     # Extract title
@@ -55,19 +55,21 @@ def get_file_extension(file_type: str) -> str:
     return extensions[file_type]
 
 
-def get_storage_path(data_root: Path, file_hash: str, file_type: str) -> Path:
+def get_storage_path(data_root: Path, file_hash: str, file_type: str, create: bool = True) -> Path:
     """
     Get storage path using git-style hash sharding.
 
     Pattern: {data_root}/{hash[:2]}/{hash}{extension}
     Example: data/ab/abcdef123....tei.xml
 
-    Creates the shard directory if it doesn't exist.
+    Creates the shard directory if it doesn't exist, unless create is False
+    (for lookups, which should not touch the file system).
 
     Args:
         data_root: Root directory for file storage
         file_hash: SHA-256 hash of file content
         file_type: Type of file ('pdf', 'tei', 'rng')
+        create: Whether to create the shard directory (default: True)
 
     Returns:
         Full path to where the file should be stored
@@ -77,7 +79,8 @@ def get_storage_path(data_root: Path, file_hash: str, file_type: str) -> Path:
     """
     # Create shard directory (first 2 characters of hash)
     shard_dir = data_root / file_hash[:2]
-    shard_dir.mkdir(parents=True, exist_ok=True)
+    if create:
+        shard_dir.mkdir(parents=True, exist_ok=True)
 
     # Get extension and build full path
     extension = get_file_extension(file_type)
@@ -105,6 +108,52 @@ def get_relative_storage_path(file_hash: str, file_type: str) -> str:
     return f"{file_hash[:2]}/{file_hash}{extension}"
 
 
+# Suffix of encoded (compressed or delta) blobs, appended to the extension
+ENCODED_SUFFIX = '.z'
+
+
+def get_encoded_storage_path(data_root: Path, file_hash: str, file_type: str, create: bool = True) -> Path:
+    """
+    Get the storage path of the encoded form of a file.
+
+    Pattern: {data_root}/{hash[:2]}/{hash}{extension}.z
+    Example: data/ab/abcdef123....tei.xml.z
+
+    Args:
+        data_root: Root directory for file storage
+        file_hash: SHA-256 hash of file content
+        file_type: Type of file ('pdf', 'tei', 'rng')
+        create: Whether to create the shard directory (default: True)
+
+    Returns:
+        Full path to where the encoded file should be stored
+
+    Raises:
+        ValueError: If file_type is unknown
+    """
+    storage_path = get_storage_path(data_root, file_hash, file_type, create)
+    return storage_path.with_name(storage_path.name + ENCODED_SUFFIX)
+
+
+def parse_storage_filename(filename: str) -> Optional[tuple]:
+    """
+    Get hash, file type and encoding from the name of a file in storage.
+
+    Args:
+        filename: Name of a file in a shard directory
+
+    Returns:
+        Tuple of (file_hash, file_type, encoded), or None for other files
+    """
+    encoded = filename.endswith(ENCODED_SUFFIX)
+    if encoded:
+        filename = filename[:-len(ENCODED_SUFFIX)]
+    for file_type, extension in (('tei', '.tei.xml'), ('pdf', '.pdf'), ('rng', '.rng')):
+        if filename.endswith(extension):
+            return filename[:-len(extension)], file_type, encoded
+    return None
+
+
 # Legacy hash lookup functions (for migration compatibility)
 # These will be removed once migration to SQLite is complete
 
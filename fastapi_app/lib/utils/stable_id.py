@@ -16,7 +16,7 @@ the stable_id remains constant for the lifetime of the document version.
 
 import secrets
 import string
-from typing import Set
+from typing import Container, Set
 
 # Alphabet: lowercase letters + digits (no ambiguous characters)
 # Excludes: 0/O, 1/l/I for readability
@@ -26,7 +26,7 @@ MIN_LENGTH = 6  # 6 chars = ~887M combinations, 0.006% collision at 10k IDs
 MAX_LENGTH = 12
 
 
-def generate_stable_id(existing_ids: Set[str], length: int = MIN_LENGTH) -> str:
+def generate_stable_id(existing_ids: Container[str], length: int = MIN_LENGTH) -> str:
     """
     Generate a collision-resistant stable identifier.
 
@@ -35,8 +35,10 @@ def generate_stable_id(existing_ids: Set[str], length: int = MIN_LENGTH) -> str:
     length and retries.
 
     Args:
-        existing_ids: Set of all currently-used stable IDs
-        length: Initial length to try (default: 5)
+        existing_ids: Container of currently-used stable IDs. Only membership
+            tests are used, so this can be an object that probes the database
+            (see FileRepository) instead of a set of all IDs.
+        length: Initial length to try (default: 6)
 
     Returns:
         Unique stable ID string (e.g., "x7k2m", "p9q4w")
@@ -58,7 +60,7 @@ def generate_stable_id(existing_ids: Set[str], length: int = MIN_LENGTH) -> str:
         )
 
     # Generate random ID
-    stable_id = ''.join(secrets.choice(ALPHABET) for _ in range(length))
+    stable_id = random_stable_id(length)
 
     # Check for collision
     if stable_id in existing_ids:
@@ -69,6 +71,19 @@ def generate_stable_id(existing_ids: Set[str], length: int = MIN_LENGTH) -> str:
     return stable_id
 
 
+def random_stable_id(length: int = MIN_LENGTH) -> str:
+    """
+    Generate a random stable ID candidate without collision checking.
+
+    Args:
+        length: Number of characters
+
+    Returns:
+        Random ID string from ALPHABET
+    """
+    return ''.join(secrets.choice(ALPHABET) for _ in range(length))
+
+
 def is_valid_stable_id(stable_id: str) -> bool:
     """
     Validate stable ID format.
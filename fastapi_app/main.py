@@ -12,6 +12,7 @@ from pathlib import Path
 from .config import get_settings
 from .lib.utils.logging_utils import setup_logging, get_logger
 from .lib.core.database_init import initialize_all_databases
+from .lib.core.compression import CompressionMiddleware, PrecompressedStaticFiles
 
 
 logger = get_logger(__name__)
@@ -139,6 +140,19 @@ async def lifespan(app: FastAPI):
                 auth_manager.delete_user(diagnostic_user)
                 logger.info(f"Removed diagnostic user '{diagnostic_user}' on startup")
 
+    # Forward configuration changes to the event bus as "config.changed"
+    import asyncio
+    from .lib.sse.event_bus import get_event_bus
+    from .lib.utils.config_utils import add_config_listener
+    event_loop = asyncio.get_running_loop()
+
+    def _on_config_changed(db_dir, changed_keys):
+        asyncio.run_coroutine_threadsafe(
+            get_event_bus().emit("config.changed", keys=sorted(changed_keys)), event_loop
+        )
+
+    add_config_listener(_on_config_changed)
+
     # Initialize plugins (discovery and route registration happen at module level)
     from .lib.plugins.plugin_manager import PluginManager
     try:
@@ -149,6 +163,17 @@ async def lifespan(app: FastAPI):
         logger.error(f"Error initializing plugin system: {e}")
         # Non-fatal - continue without plugins
 
+    # Log handlers that block the event loop
+    from .lib.core.executors import EventLoopLagMonitor
+    loop_lag_monitor = EventLoopLagMonitor()
+    loop_lag_monitor.start()
+
+    # Remove expired file locks and announce them to SSE subscribers
+    from .lib.sse.lock_events import LockExpiryWatcher
+    from .lib.core.dependencies import get_session_manager
+    lock_expiry_watcher = LockExpiryWatcher(settings.db_dir, get_sse_service(), get_session_manager())
+    lock_expiry_watcher.start()
+
     # Log startup complete
     logger.info(f"FastAPI server ready at http://{settings.HOST}:{settings.PORT}")
 
@@ -186,6 +211,26 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error shutting down plugins: {e}")
 
+    from .lib.utils.config_utils import remove_config_listener
+    remove_config_listener(_on_config_changed)
+
+    # Stop event loop monitoring, the lock expiry watcher and the shared executors
+    await loop_lag_monitor.stop()
+    await lock_expiry_watcher.stop()
+    from .lib.core.executors import shutdown_executors
+    shutdown_executors()
+
+    # Stop schema validator worker processes
+    from .lib.core.schema_validator import shutdown_validator_pool
+    shutdown_validator_pool()
+
+    # Write pending session last-access times
+    from .lib.core.sessions import flush_all_session_access_times
+    flush_all_session_access_times()
+
+    # Stop forwarding SSE messages between worker processes
+    get_sse_service().close()
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -204,6 +249,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Negotiated zstd/br/gzip compression of JSON, XML, HTML, JS and CSS responses
+app.add_middleware(CompressionMiddleware)
+
 # Import API routers
 from .api import auth, config
 from .routers import (
@@ -338,8 +386,9 @@ if is_dev_mode:
 # Mount docs
 docs_root = project_root / 'docs'
 if docs_root.exists():
-    app.mount("/docs", StaticFiles(directory=str(docs_root)), name="docs")
+    app.mount("/docs", PrecompressedStaticFiles(directory=str(docs_root)), name="docs")
 
 # Mount web root for all other static files (must be last - catch-all)
-# html=True enables serving index.html for directory requests
-app.mount("/", StaticFiles(directory=str(web_root), html=True), name="static")
+# html=True enables serving index.html for directory requests; precompressed
+# variants written by the build (bin/precompress-assets.js) are served if accepted
+app.mount("/", PrecompressedStaticFiles(directory=str(web_root), html=True), name="static")
@@ -95,85 +95,71 @@ class AnnotationHistoryPlugin(Plugin):
         try:
             from lxml import etree
 
-            from fastapi_app.lib.utils.tei_utils import extract_tei_metadata, get_annotator_name
+            from fastapi_app.lib.services.derived_data import summarize_tei
 
-            # Parse XML with lxml
             root = etree.fromstring(xml_content.encode("utf-8"))
+            return self._document_info(summarize_tei(root), file_metadata)
 
-            # Use the existing utility to extract metadata
-            tei_metadata = extract_tei_metadata(root)
+        except Exception as e:
+            logger.error(f"Error extracting document info: {e}")
+            return None
 
-            # Get title - prefer edition_title, fallback to title from titleStmt
-            title = tei_metadata.get("edition_title") or tei_metadata.get(
-                "title", "Untitled"
-            )
+    def _document_info(
+        self, summary: dict[str, Any], file_metadata: Any
+    ) -> dict[str, Any]:
+        """
+        Build document and revision information from a TEI document's tei.summary.
 
-            # Check if this is a gold standard file (use database as source of truth)
-            # Note: TEI status="published" does NOT mean gold standard
-            is_gold = getattr(file_metadata, "is_gold_standard", False)
-
-            # Extract ALL change elements
-            ns = {"tei": "http://www.tei-c.org/ns/1.0"}
-            change_elements = root.findall(".//tei:revisionDesc/tei:change", ns)
-
-            revisions = []
-            for change_elem in change_elements:
-                # Get description from desc element
-                desc_elem = change_elem.find("tei:desc", ns)
-                change_desc = (
-                    desc_elem.text.strip()
-                    if desc_elem is not None and desc_elem.text
-                    else ""
-                )
+        Args:
+            summary: Derived tei.summary data of the document
+            file_metadata: File metadata object
 
-                # Get annotator from @who attribute and look up full name
-                who_id = change_elem.get("who", "")
-                annotator = get_annotator_name(root, who_id)
-
-                # Get status attribute
-                status = change_elem.get("status", "draft")
-
-                # Get and format date from @when attribute
-                when_attr = change_elem.get("when", "")
-                change_date = self._format_date(when_attr) if when_attr else ""
-
-                revisions.append(
-                    {
-                        "desc": change_desc,
-                        "annotator": annotator,
-                        "status": status,
-                        "date": change_date,
-                        "date_raw": when_attr,  # Store raw ISO date for sorting
-                    }
-                )
+        Returns:
+            Dictionary with document info and all revisions
+        """
+        # Get title - prefer edition_title, fallback to title from titleStmt
+        title = summary["edition_title"] or summary["title"] or "Untitled"
 
-            # Get last change for collapsed view summary (most recent = highest date)
-            if revisions:
-                # Sort by date_raw descending to get most recent first
-                sorted_revisions = sorted(revisions, key=lambda r: r["date_raw"] or "", reverse=True)
-                last_change = sorted_revisions[0]
-            else:
-                last_change = {
-                    "desc": "",
-                    "annotator": "",
-                    "status": "",
-                    "date": "",
-                    "date_raw": "",
+        # Check if this is a gold standard file (use database as source of truth)
+        # Note: TEI status="published" does NOT mean gold standard
+        is_gold = getattr(file_metadata, "is_gold_standard", False)
+
+        revisions = []
+        for change in summary["changes"]:
+            when_attr = change["when"]
+            revisions.append(
+                {
+                    "desc": change["desc"] or "",
+                    "annotator": change["annotator"],
+                    "status": change["status"] or "draft",
+                    "date": self._format_date(when_attr) if when_attr else "",
+                    "date_raw": when_attr,  # Store raw ISO date for sorting
                 }
+            )
 
-            return {
-                "title": title,
-                "is_gold": is_gold,
-                "variant": getattr(file_metadata, "variant", ""),
-                "stable_id": file_metadata.stable_id,
-                "doc_id": getattr(file_metadata, "doc_id", ""),
-                "last_change": last_change,
-                "revisions": revisions,  # All changes in chronological order
+        # Get last change for collapsed view summary (most recent = highest date)
+        if revisions:
+            # Sort by date_raw descending to get most recent first
+            sorted_revisions = sorted(revisions, key=lambda r: r["date_raw"] or "", reverse=True)
+            last_change = sorted_revisions[0]
+        else:
+            last_change = {
+                "desc": "",
+                "annotator": "",
+                "status": "",
+                "date": "",
+                "date_raw": "",
             }
 
-        except Exception as e:
-            logger.error(f"Error extracting document info: {e}")
-            return None
+        return {
+            "title": title,
+            "is_gold": is_gold,
+            "variant": getattr(file_metadata, "variant", ""),
+            "stable_id": file_metadata.stable_id,
+            "doc_id": getattr(file_metadata, "doc_id", ""),
+            "last_change": last_change,
+            "revisions": revisions,  # All changes in chronological order
+        }
 
     def _sort_documents(self, documents: list[dict[str, Any]]) -> None:
         """
@@ -10,6 +10,7 @@ import logging
 from fastapi_app.lib.core.dependencies import (
     get_db,
     get_file_storage,
+    get_derived_data_cache,
     get_auth_manager,
     get_session_manager,
 )
@@ -29,7 +30,8 @@ async def view_history(
     session_manager=Depends(get_session_manager),
     auth_manager=Depends(get_auth_manager),
     db=Depends(get_db),
-    file_storage=Depends(get_file_storage)
+    file_storage=Depends(get_file_storage),
+    derived_cache=Depends(get_derived_data_cache)
 ):
     """
     View annotation history as HTML page with nested tables.
@@ -84,29 +86,19 @@ async def view_history(
         if not tei_files:
             return HTMLResponse(content="<p>No annotation versions found for this PDF document.</p>")
 
-        # Parse each TEI file and extract complete document info
+        # Filter by variant if specified (and not "all" or empty)
+        if variant and variant not in ("all", ""):
+            tei_files = [
+                f for f in tei_files if getattr(f, "variant", None) == variant
+            ]
+
+        # Build the complete document info from the cached TEI summaries
         plugin = AnnotationHistoryPlugin()
-        documents = []
-        for file_metadata in tei_files:
-            # Filter by variant if specified (and not "all" or empty)
-            if variant and variant not in ("all", ""):
-                file_variant = getattr(file_metadata, "variant", None)
-                if file_variant != variant:
-                    continue
-
-            try:
-                content_bytes = file_storage.read_file(file_metadata.id, "tei")
-                if not content_bytes:
-                    logger.warning(f"Empty content for file {file_metadata.id}")
-                    continue
-
-                xml_content = content_bytes.decode("utf-8")
-                doc_info = plugin._parse_tei_document_info(xml_content, file_metadata)
-                if doc_info:
-                    documents.append(doc_info)
-            except Exception as e:
-                logger.error(f"Failed to parse TEI file {file_metadata.id}: {e}")
-                continue
+        summaries = derived_cache.get_many([f.id for f in tei_files], "tei.summary", file_storage)
+        documents = [
+            plugin._document_info(summaries[f.id], f)
+            for f in tei_files if summaries.get(f.id)
+        ]
 
         if not documents:
             return HTMLResponse(
@@ -174,7 +166,8 @@ async def export_csv(
     pdf: str = Query(..., description="PDF stable_id or file hash"),
     variant: str = Query("all", description="Model variant filter"),
     db=Depends(get_db),
-    file_storage=Depends(get_file_storage)
+    file_storage=Depends(get_file_storage),
+    derived_cache=Depends(get_derived_data_cache)
 ):
     """
     Export annotation history as CSV file.
@@ -205,29 +198,19 @@ async def export_csv(
         if not tei_files:
             raise HTTPException(status_code=404, detail="No annotation versions found")
 
-        # Parse each TEI file and extract complete document info
+        # Filter by variant if specified (and not "all" or empty)
+        if variant and variant not in ("all", ""):
+            tei_files = [
+                f for f in tei_files if getattr(f, "variant", None) == variant
+            ]
+
+        # Build the complete document info from the cached TEI summaries
         plugin = AnnotationHistoryPlugin()
-        documents = []
-        for file_metadata in tei_files:
-            # Filter by variant if specified (and not "all" or empty)
-            if variant and variant not in ("all", ""):
-                file_variant = getattr(file_metadata, "variant", None)
-                if file_variant != variant:
-                    continue
-
-            try:
-                content_bytes = file_storage.read_file(file_metadata.id, "tei")
-                if not content_bytes:
-                    logger.warning(f"Empty content for file {file_metadata.id}")
-                    continue
-
-                xml_content = content_bytes.decode("utf-8")
-                doc_info = plugin._parse_tei_document_info(xml_content, file_metadata)
-                if doc_info:
-                    documents.append(doc_info)
-            except Exception as e:
-                logger.error(f"Failed to parse TEI file {file_metadata.id}: {e}")
-                continue
+        summaries = derived_cache.get_many([f.id for f in tei_files], "tei.summary", file_storage)
+        documents = [
+            plugin._document_info(summaries[f.id], f)
+            for f in tei_files if summaries.get(f.id)
+        ]
 
         if not documents:
             raise HTTPException(
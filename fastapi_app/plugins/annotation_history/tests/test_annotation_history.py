@@ -7,7 +7,10 @@ Tests XML parsing, nested HTML table generation, and error handling.
 @testCovers fastapi_app/plugins/annotation_history/routes.py
 """
 
+import shutil
+import tempfile
 import unittest
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 from fastapi.testclient import TestClient
 
@@ -400,12 +403,18 @@ class TestAnnotationHistoryRoutes(unittest.TestCase):
             get_auth_manager,
             get_session_manager,
             get_db,
+            get_derived_data_cache,
             get_file_storage,
         )
+        from fastapi_app.lib.services.derived_data import DerivedDataCache
 
         self.app = FastAPI()
         self.app.include_router(router)
 
+        # Derived data cache in a temporary directory
+        self.cache_dir = Path(tempfile.mkdtemp())
+        self.derived_cache = DerivedDataCache(self.cache_dir)
+
         # Create mocks for dependencies
         self.mock_session_manager = MagicMock()
         self.mock_auth_manager = MagicMock()
@@ -424,9 +433,14 @@ class TestAnnotationHistoryRoutes(unittest.TestCase):
         self.app.dependency_overrides[get_auth_manager] = lambda: self.mock_auth_manager
         self.app.dependency_overrides[get_db] = lambda: self.mock_db
         self.app.dependency_overrides[get_file_storage] = lambda: self.mock_storage
+        self.app.dependency_overrides[get_derived_data_cache] = lambda: self.derived_cache
 
         self.client = TestClient(self.app)
 
+    def tearDown(self):
+        """Remove the derived data cache."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
     def test_view_success(self):
         """Test successful HTML view via HTTP route."""
         # Sample TEI XML with multiple revisions
@@ -6,6 +6,7 @@ import csv
 import io
 import logging
 from collections import defaultdict
+from datetime import datetime
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from fastapi.responses import HTMLResponse, StreamingResponse
@@ -14,9 +15,12 @@ from lxml import etree
 from fastapi_app.lib.core.dependencies import (
     get_auth_manager,
     get_db,
+    get_derived_data_cache,
     get_file_storage,
     get_session_manager,
 )
+from fastapi_app.lib.core.executors import run_blocking
+from fastapi_app.lib.services.derived_data import change_signatures, summarize_tei
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +28,8 @@ router = APIRouter(prefix="/api/plugins/annotation-progress", tags=["annotation-
 
 
 @router.get("/view", response_class=HTMLResponse)
-async def view_progress(
+@run_blocking
+def view_progress(
     collection: str = Query(..., description="Collection ID"),
     variant: str | None = Query(None, description="Variant filter"),
     session_id: str | None = Query(None),
@@ -111,24 +116,16 @@ async def view_progress(
                 if normalized not in doc_pdf_stable_id:
                     doc_pdf_stable_id[normalized] = f.stable_id
 
-        # Group annotations by doc_id
+        # Group annotations by doc_id (TEI summaries come from the derived data cache)
+        summaries = get_derived_data_cache().get_many(
+            [f.id for f in tei_files], "tei.summary", file_storage
+        )
         doc_annotations = defaultdict(list)
         for file_metadata in tei_files:
-            try:
-                content_bytes = file_storage.read_file(file_metadata.id, "tei")
-                if not content_bytes:
-                    continue
-
-                xml_content = content_bytes.decode("utf-8")
-                annotation_info = _extract_annotation_info(xml_content, file_metadata)
-
-                if annotation_info:
-                    doc_id = normalize_legacy_encoding(file_metadata.doc_id or "Unknown")
-                    doc_annotations[doc_id].append(annotation_info)
-
-            except Exception as e:
-                logger.error(f"Failed to parse TEI file {file_metadata.id}: {e}")
-                continue
+            summary = summaries.get(file_metadata.id)
+            if summary:
+                doc_id = normalize_legacy_encoding(file_metadata.doc_id or "Unknown")
+                doc_annotations[doc_id].append(_annotation_info(summary, file_metadata))
 
         # Calculate collection statistics
         total_docs = len(all_doc_ids)
@@ -345,7 +342,8 @@ async def view_progress(
 
 
 @router.get("/export")
-async def export_csv(
+@run_blocking
+def export_csv(
     collection: str = Query(..., description="Collection ID"),
     variant: str | None = Query(None, description="Variant filter"),
     session_id: str | None = Query(None),
@@ -415,24 +413,16 @@ async def export_csv(
                 f for f in tei_files if getattr(f, "variant", None) == variant
             ]
 
-        # Group annotations by doc_id
+        # Group annotations by doc_id (TEI summaries come from the derived data cache)
+        summaries = get_derived_data_cache().get_many(
+            [f.id for f in tei_files], "tei.summary", file_storage
+        )
         doc_annotations = defaultdict(list)
         for file_metadata in tei_files:
-            try:
-                content_bytes = file_storage.read_file(file_metadata.id, "tei")
-                if not content_bytes:
-                    continue
-
-                xml_content = content_bytes.decode("utf-8")
-                annotation_info = _extract_annotation_info(xml_content, file_metadata)
-
-                if annotation_info:
-                    doc_id = normalize_legacy_encoding(file_metadata.doc_id or "Unknown")
-                    doc_annotations[doc_id].append(annotation_info)
-
-            except Exception as e:
-                logger.error(f"Failed to parse TEI file {file_metadata.id}: {e}")
-                continue
+            summary = summaries.get(file_metadata.id)
+            if summary:
+                doc_id = normalize_legacy_encoding(file_metadata.doc_id or "Unknown")
+                doc_annotations[doc_id].append(_annotation_info(summary, file_metadata))
 
         # Generate CSV
         output = io.StringIO()
@@ -502,77 +492,61 @@ def _extract_annotation_info(xml_content: str, file_metadata) -> dict | None:
         Dictionary with annotation label, revision count, last change info, and change signatures
     """
     try:
-        from fastapi_app.lib.utils.tei_utils import (
-            get_artifact_label,
-            get_annotator_name,
-            extract_change_signatures,
-        )
-
         root = etree.fromstring(xml_content.encode("utf-8"))
-        ns = {
-            "tei": "http://www.tei-c.org/ns/1.0",
-        }
-
-        annotation_label = get_artifact_label(root) or "Untitled"
-
-        # Count all change elements (revision count)
-        change_elements = root.findall(".//tei:revisionDesc/tei:change", ns)
-        revision_count = len(change_elements)
-
-        # Extract change signatures for ancestry tracking
-        change_signatures = extract_change_signatures(root)
-
-        # Get the last change element
-        last_change = root.find(".//tei:revisionDesc/tei:change[last()]", ns)
-
-        last_change_desc = ""
-        last_annotator = ""
-        last_change_status = ""
-        last_change_timestamp = None
-
-        if last_change is not None:
-            # Get description from text content or desc subelement
-            desc_elem = last_change.find("tei:desc", ns)
-            if desc_elem is not None and desc_elem.text:
-                last_change_desc = desc_elem.text.strip()
-            elif last_change.text:
-                last_change_desc = last_change.text.strip()
-
-            # Get annotator name
-            who_id = last_change.get("who", "")
-            last_annotator = get_annotator_name(root, who_id)
-
-            # Get status attribute
-            last_change_status = last_change.get("status", "")
-
-            # Get timestamp for comparison
-            when = last_change.get("when", "")
-            if when:
-                try:
-                    from datetime import datetime
-                    last_change_timestamp = datetime.fromisoformat(when.replace("Z", "+00:00"))
-                    if last_change_timestamp.tzinfo is not None:
-                        last_change_timestamp = last_change_timestamp.replace(tzinfo=None)
-                except (ValueError, AttributeError):
-                    pass
-
-        return {
-            "annotation_label": annotation_label,
-            "revision_count": revision_count,
-            "stable_id": file_metadata.stable_id,
-            "last_change_desc": last_change_desc,
-            "last_annotator": last_annotator,
-            "last_change_status": last_change_status,
-            "last_change_timestamp": last_change_timestamp,
-            "change_signatures": change_signatures,
-            "is_gold_standard": getattr(file_metadata, "is_gold_standard", False),
-        }
-
+        return _annotation_info(summarize_tei(root), file_metadata)
     except Exception as e:
         logger.error(f"Error extracting annotation info: {e}")
         return None
 
 
+def _annotation_info(summary: dict, file_metadata) -> dict:
+    """
+    Build the annotation information of a TEI document from its tei.summary.
+
+    Args:
+        summary: Derived tei.summary data of the document
+        file_metadata: File metadata object
+
+    Returns:
+        Dictionary with annotation label, revision count, last change info, and change signatures
+    """
+    changes = summary["changes"]
+
+    last_change_desc = ""
+    last_annotator = ""
+    last_change_status = ""
+    last_change_timestamp = None
+
+    if changes:
+        last_change = changes[-1]
+        # Get description from desc subelement or text content
+        last_change_desc = last_change["desc"] or last_change["text"] or ""
+        last_annotator = last_change["annotator"]
+        last_change_status = last_change["status"]
+
+        # Get timestamp for comparison
+        when = last_change["when"]
+        if when:
+            try:
+                last_change_timestamp = datetime.fromisoformat(when.replace("Z", "+00:00"))
+                if last_change_timestamp.tzinfo is not None:
+                    last_change_timestamp = last_change_timestamp.replace(tzinfo=None)
+            except (ValueError, AttributeError):
+                pass
+
+    return {
+        "annotation_label": summary["label"] or "Untitled",
+        "revision_count": len(changes),
+        "stable_id": file_metadata.stable_id,
+        "last_change_desc": last_change_desc,
+        "last_annotator": last_annotator,
+        "last_change_status": last_change_status,
+        "last_change_timestamp": last_change_timestamp,
+        "change_signatures": change_signatures(summary),
+        "is_gold_standard": getattr(file_metadata, "is_gold_standard", False),
+    }
+
+
 def _format_version_chains_html(annotations: list[dict]) -> str:
     """
     Format annotation versions as HTML showing linear ancestry chains.
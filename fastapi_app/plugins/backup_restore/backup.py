@@ -0,0 +1,296 @@
+"""
+Streamed backups of the data directory.
+
+A backup is a ZIP archive of db/ and files/ that is written directly to the
+response while files are read (see lib/storage/zip_stream.py):
+
+- SQLite databases are not copied byte by byte, since they may be written
+  to at the same time. Each one is snapshotted with the SQLite online backup
+  API right before it is added; WAL and journal files are left out.
+- Every backup contains a manifest (backup-manifest.json) listing all files
+  in files/. The manifest is also recorded in data/backup-manifests/ once the
+  archive has been sent completely.
+- Incremental backups contain db/ and only those files of files/ that are
+  not listed in the manifest of a previous backup. Files in files/ are named
+  by their content hash and never change, so these are exactly the files
+  added since then. Basing each incremental backup on the last full one
+  gives differential backups.
+- The exception are pack files (files/packs/, see lib/storage/pack_store.py),
+  which are appended to. They are always included, and their SQLite index
+  is snapshotted before the packs are read, so that it only refers to
+  records that are in the archive.
+
+Restoring an incremental backup takes the files it does not contain from the
+current data directory.
+"""
+
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from fastapi_app.lib.storage.pack_store import LOCK_FILE, PACK_DIR
+from fastapi_app.lib.storage.zip_stream import ZipEntry, stream_zip
+
+logger = logging.getLogger(__name__)
+
+# Name of the manifest in the archive
+MANIFEST_NAME = "backup-manifest.json"
+
+# Directory of recorded manifests, relative to the data root
+MANIFEST_DIR = "backup-manifests"
+
+# Number of recorded manifests that are kept
+MAX_MANIFESTS = 50
+
+SQLITE_HEADER = b"SQLite format 3\x00"
+
+# Files next to SQLite databases that are covered by the snapshot
+SQLITE_SIDE_FILE_SUFFIXES = ("-wal", "-shm", "-journal")
+
+# Files in files/ that change, so they are part of every incremental backup
+MUTABLE_FILES_PREFIX = f"files/{PACK_DIR}/"
+
+
+def is_sqlite_file(path: Path) -> bool:
+    """Whether a file is an SQLite database."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(SQLITE_HEADER)) == SQLITE_HEADER
+    except OSError:
+        return False
+
+
+def snapshot_sqlite(db_path: Path, target_path: Path) -> Path:
+    """
+    Copy a consistent snapshot of an SQLite database using the online backup API.
+
+    Args:
+        db_path: Database to copy (may be in use)
+        target_path: Path of the snapshot
+
+    Returns:
+        target_path
+    """
+    source = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        target = sqlite3.connect(target_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+    finally:
+        source.close()
+    return target_path
+
+
+def list_backup_files(data_root: Path, directory: str) -> List[str]:
+    """List the files of a backed-up directory as sorted paths relative to the data root."""
+    base = data_root / directory
+    if not base.exists():
+        return []
+    return sorted(
+        path.relative_to(data_root).as_posix()
+        for path in base.rglob("*")
+        if path.is_file()
+    )
+
+
+def list_manifests(data_root: Path) -> List[Dict]:
+    """
+    List the recorded backup manifests, newest first, without their file lists.
+
+    Args:
+        data_root: Data directory
+
+    Returns:
+        List of dicts with id, created, mode, base and file_count
+    """
+    manifests = []
+    manifest_dir = data_root / MANIFEST_DIR
+    if not manifest_dir.exists():
+        return manifests
+    for path in sorted(manifest_dir.glob("*.json"), reverse=True):
+        try:
+            manifest = json.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable backup manifest {path.name}: {e}")
+            continue
+        manifests.append({
+            "id": manifest["id"],
+            "created": manifest["created"],
+            "mode": manifest["mode"],
+            "base": manifest.get("base"),
+            "file_count": len(manifest["files"]),
+        })
+    return manifests
+
+
+def load_manifest(data_root: Path, backup_id: Optional[str] = None) -> Optional[Dict]:
+    """
+    Load a recorded backup manifest.
+
+    Args:
+        data_root: Data directory
+        backup_id: Id of the backup (default: the most recent one)
+
+    Returns:
+        The manifest, or None if there is no such backup
+    """
+    manifest_dir = data_root / MANIFEST_DIR
+    if backup_id is None:
+        manifests = list_manifests(data_root)
+        if not manifests:
+            return None
+        backup_id = manifests[0]["id"]
+    path = manifest_dir / f"{Path(backup_id).name}.json"
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def record_manifest(data_root: Path, manifest: Dict) -> None:
+    """Record the manifest of a completed backup and drop the oldest recorded ones."""
+    manifest_dir = data_root / MANIFEST_DIR
+    manifest_dir.mkdir(parents=True, exist_ok=True)
+    path = manifest_dir / f"{manifest['id']}.json"
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(manifest))
+    os.replace(tmp_path, path)
+
+    for old in sorted(manifest_dir.glob("*.json"), reverse=True)[MAX_MANIFESTS:]:
+        old.unlink(missing_ok=True)
+
+
+def stream_backup(data_root: Path, backup_id: str, base: Optional[Dict] = None) -> Iterator[bytes]:
+    """
+    Stream a backup archive of db/ and files/.
+
+    The manifest is recorded only if the archive is sent completely.
+
+    Args:
+        data_root: Data directory
+        backup_id: Id of the new backup
+        base: Manifest of the backup an incremental backup is based on
+            (None for a full backup)
+
+    Yields:
+        Chunks of the ZIP archive
+    """
+    files = [
+        rel_path for rel_path in list_backup_files(data_root, "files")
+        if not rel_path.endswith(SQLITE_SIDE_FILE_SUFFIXES) and not rel_path.endswith(f"/{LOCK_FILE}")
+    ]
+    manifest = {
+        "id": backup_id,
+        "created": datetime.now().isoformat(),
+        "mode": "incremental" if base else "full",
+        "base": base["id"] if base else None,
+        "files": files,
+    }
+    if base:
+        known = set(base["files"])
+        files = [
+            rel_path for rel_path in files
+            if rel_path not in known or rel_path.startswith(MUTABLE_FILES_PREFIX)
+        ]
+
+    deleted = set()
+    snapshot_dir = Path(tempfile.mkdtemp(prefix="pdf-tei-backup-"))
+
+    def db_entries():
+        for rel_path in list_backup_files(data_root, "db"):
+            path = data_root / rel_path
+            if path.name.endswith(SQLITE_SIDE_FILE_SUFFIXES):
+                continue
+            if is_sqlite_file(path):
+                snapshot = snapshot_dir / rel_path.replace("/", "_")
+                yield ZipEntry(rel_path, lambda path=path, snapshot=snapshot: _snapshot_or_copy(path, snapshot))
+            else:
+                yield ZipEntry(rel_path, path)
+
+    def file_entries():
+        # Sorted, so the pack index (index.db) comes before the pack files
+        for rel_path in files:
+            path = data_root / rel_path
+            if rel_path.startswith(MUTABLE_FILES_PREFIX) and is_sqlite_file(path):
+                snapshot = snapshot_dir / rel_path.replace("/", "_")
+                yield ZipEntry(rel_path, lambda path=path, snapshot=snapshot: _snapshot_or_copy(path, snapshot))
+            else:
+                yield ZipEntry(rel_path, lambda rel_path=rel_path: _existing_file(rel_path))
+
+    def _existing_file(rel_path: str) -> Optional[Path]:
+        # Files deleted since they were listed are left out of the manifest, too
+        path = data_root / rel_path
+        if path.exists():
+            return path
+        deleted.add(rel_path)
+        return None
+
+    def all_entries():
+        yield from db_entries()
+        yield from file_entries()
+        manifest["files"] = [rel_path for rel_path in manifest["files"] if rel_path not in deleted]
+        yield ZipEntry(MANIFEST_NAME, json.dumps(manifest, indent=2))
+
+    try:
+        yield from stream_zip(all_entries())
+        record_manifest(data_root, manifest)
+        logger.info(
+            f"Backup {backup_id} sent ({manifest['mode']}, "
+            f"{len(files)} of {len(manifest['files'])} files)"
+        )
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+
+def _snapshot_or_copy(path: Path, snapshot: Path) -> Optional[Path]:
+    """Snapshot a database; fall back to the file itself if that fails."""
+    try:
+        return snapshot_sqlite(path, snapshot)
+    except sqlite3.Error as e:
+        logger.error(f"Snapshot of {path.name} failed, adding the file as is: {e}")
+        return path if path.exists() else None
+
+
+def complete_incremental_restore(restore_dir: Path, data_root: Path) -> List[str]:
+    """
+    Add the files an extracted incremental backup does not contain from the data directory.
+
+    Files are hard-linked where possible. Does nothing for full backups.
+
+    Args:
+        restore_dir: Directory the backup was extracted to
+        data_root: Current data directory
+
+    Returns:
+        Paths of files that are neither in the backup nor in the data directory
+    """
+    manifest_path = restore_dir / MANIFEST_NAME
+    if not manifest_path.exists():
+        return []
+    manifest = json.loads(manifest_path.read_text())
+    manifest_path.unlink()
+    if manifest.get("mode") != "incremental":
+        return []
+
+    missing = []
+    for rel_path in manifest["files"]:
+        target = restore_dir / rel_path
+        if target.exists():
+            continue
+        source = data_root / rel_path
+        if not source.exists():
+            missing.append(rel_path)
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
+    return missing
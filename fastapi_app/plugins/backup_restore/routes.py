@@ -1,8 +1,9 @@
 """
 Custom routes for Backup & Restore plugin.
 
-Provides endpoints for downloading a ZIP backup of the data directory
-and restoring from an uploaded ZIP file.
+Provides endpoints for downloading a streamed ZIP backup of the data
+directory (full or incremental, see backup.py) and restoring from an
+uploaded ZIP file.
 """
 
 import asyncio
@@ -24,6 +25,12 @@ from fastapi_app.lib.core.dependencies import (
     get_sse_service,
 )
 from fastapi_app.lib.sse.sse_utils import broadcast_to_all_sessions, send_notification
+from fastapi_app.plugins.backup_restore.backup import (
+    complete_incremental_restore,
+    list_manifests,
+    load_manifest,
+    stream_backup,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -125,12 +132,20 @@ async def backup_restore_view(
 
 @router.get("/download")
 async def download_backup(
+    mode: str = Query("full", description="full, or incremental (only files added since a previous backup)"),
+    since: str | None = Query(None, description="Id of the backup an incremental backup is based on "
+                                                "(default: the most recent one)"),
     session_id: str | None = Query(None),
     x_session_id: str | None = Header(None, alias="X-Session-ID"),
     session_manager=Depends(get_session_manager),
     auth_manager=Depends(get_auth_manager),
 ):
-    """Download the data directory as a ZIP file."""
+    """Download the data directory as a streamed ZIP file.
+
+    SQLite databases are added as consistent snapshots. Incremental backups
+    contain db/ and only the files added to files/ since the backup given by
+    `since`.
+    """
     session_id_value, _ = _authenticate_admin(
         session_id, x_session_id, session_manager, auth_manager
     )
@@ -143,38 +158,47 @@ async def download_backup(
     if not data_root.exists():
         raise HTTPException(status_code=404, detail="Data directory not found")
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"backup_{timestamp}.zip"
+    if mode not in ("full", "incremental"):
+        raise HTTPException(status_code=400, detail=f"Invalid backup mode: {mode}")
 
-    logger.info(f"Creating backup ZIP of {data_root} for admin user")
+    base = None
+    if mode == "incremental":
+        base = load_manifest(data_root, since)
+        if base is None:
+            detail = f"Backup {since} not found" if since else "No previous backup to base an incremental backup on"
+            raise HTTPException(status_code=404, detail=detail)
 
-    # Only include db/ and files/ subdirectories
-    backup_dirs = [data_root / "db", data_root / "files"]
-
-    buffer = io.BytesIO()
-    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-        for backup_dir in backup_dirs:
-            if not backup_dir.exists():
-                continue
-            for file_path in sorted(backup_dir.rglob("*")):
-                if file_path.is_file():
-                    rel_path = file_path.relative_to(data_root)
-                    zf.write(file_path, str(rel_path))
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    backup_id = f"backup_{timestamp}"
+    filename = f"{backup_id}{'_incremental' if base else ''}.zip"
 
-    buffer.seek(0)
-    size = buffer.getbuffer().nbytes
-    logger.info(f"Backup ZIP created: {filename} ({size} bytes)")
+    logger.info(
+        f"Streaming {mode} backup of {data_root} for admin user"
+        + (f" (based on {base['id']})" if base else "")
+    )
 
     return StreamingResponse(
-        iter([buffer.getvalue()]),
+        stream_backup(data_root, backup_id, base),
         media_type="application/zip",
-        headers={
-            "Content-Disposition": f'attachment; filename="{filename}"',
-            "Content-Length": str(size),
-        },
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
 
+@router.get("/backups")
+async def list_backups(
+    session_id: str | None = Query(None),
+    x_session_id: str | None = Header(None, alias="X-Session-ID"),
+    session_manager=Depends(get_session_manager),
+    auth_manager=Depends(get_auth_manager),
+):
+    """List the completed backups incremental backups can be based on, newest first."""
+    _authenticate_admin(session_id, x_session_id, session_manager, auth_manager)
+
+    from fastapi_app.config import get_settings
+
+    return JSONResponse({"backups": list_manifests(get_settings().data_root)})
+
+
 @router.post("/restore")
 async def restore_backup(
     file: UploadFile = File(...),
@@ -268,6 +292,19 @@ async def restore_backup(
 
     zf.close()
 
+    # Incremental backups only contain the files added since their base backup
+    from fastapi_app.config import get_settings
+
+    missing = complete_incremental_restore(restore_dir, get_settings().data_root)
+    if missing:
+        shutil.rmtree(restore_dir)
+        detail = (
+            f"Incremental backup requires {len(missing)} files that are not in the "
+            f"current data directory. Restore its base backup first."
+        )
+        send_notification(sse_service, session_id_value, detail, "danger", "exclamation-octagon")
+        raise HTTPException(status_code=400, detail=detail)
+
     send_notification(
         sse_service, session_id_value,
         "Restore data extracted. Preparing server restart...",
@@ -3,12 +3,14 @@ Unit tests for Backup & Restore plugin.
 
 @testCovers fastapi_app/plugins/backup_restore/plugin.py
 @testCovers fastapi_app/plugins/backup_restore/routes.py
+@testCovers fastapi_app/plugins/backup_restore/backup.py
 @testCovers fastapi_app/lib/data_restore.py
 """
 
 import io
 import json
 import shutil
+import sqlite3
 import tempfile
 import unittest
 import zipfile
@@ -223,5 +225,136 @@ class TestSupervisorDetection(unittest.TestCase):
         self.assertTrue(_is_supervised())
 
 
+class TestStreamedBackup(unittest.TestCase):
+    """Test streamed full and incremental backups."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.data_root = self.temp_dir / "data"
+        (self.data_root / "db").mkdir(parents=True)
+        (self.data_root / "db" / "users.json").write_text("[]")
+        (self.data_root / "db" / "config.json").write_text("{}")
+        self.add_file("files/ab/abc.pdf", b"%PDF-1.4")
+
+        # Database in WAL mode with changes that are not checkpointed yet
+        self.conn = sqlite3.connect(self.data_root / "db" / "metadata.db")
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA wal_autocheckpoint=0")
+        self.conn.execute("CREATE TABLE files (id TEXT)")
+        self.conn.execute("INSERT INTO files VALUES ('abc')")
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(self.temp_dir)
+
+    def add_file(self, rel_path: str, content: bytes):
+        path = self.data_root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+
+    def backup(self, backup_id: str, base=None) -> zipfile.ZipFile:
+        from fastapi_app.plugins.backup_restore.backup import stream_backup
+
+        return zipfile.ZipFile(io.BytesIO(b"".join(stream_backup(self.data_root, backup_id, base))))
+
+    def test_full_backup_with_database_snapshot(self):
+        """The backup contains db/, files/ and a snapshot including uncheckpointed changes."""
+        self.assertTrue((self.data_root / "db" / "metadata.db-wal").exists())
+
+        with self.backup("backup_1") as zf:
+            names = set(zf.namelist())
+            snapshot = self.temp_dir / "snapshot.db"
+            snapshot.write_bytes(zf.read("db/metadata.db"))
+            manifest = json.loads(zf.read("backup-manifest.json"))
+
+        self.assertIn("db/users.json", names)
+        self.assertIn("files/ab/abc.pdf", names)
+        self.assertNotIn("db/metadata.db-wal", names)
+        conn = sqlite3.connect(snapshot)
+        self.assertEqual(conn.execute("SELECT id FROM files").fetchall(), [("abc",)])
+        conn.close()
+        self.assertEqual(manifest["mode"], "full")
+        self.assertEqual(manifest["files"], ["files/ab/abc.pdf"])
+
+    def test_incremental_backup(self):
+        """An incremental backup contains only the files added since its base backup."""
+        from fastapi_app.plugins.backup_restore.backup import list_manifests, load_manifest
+
+        self.backup("backup_1").close()
+        self.add_file("files/cd/cde.tei.xml", b"<TEI/>")
+
+        with self.backup("backup_2", load_manifest(self.data_root)) as zf:
+            names = set(zf.namelist())
+            manifest = json.loads(zf.read("backup-manifest.json"))
+
+        self.assertIn("db/metadata.db", names)
+        self.assertIn("files/cd/cde.tei.xml", names)
+        self.assertNotIn("files/ab/abc.pdf", names)
+        self.assertEqual(manifest["base"], "backup_1")
+        self.assertEqual(manifest["files"], ["files/ab/abc.pdf", "files/cd/cde.tei.xml"])
+        self.assertEqual([m["id"] for m in list_manifests(self.data_root)], ["backup_2", "backup_1"])
+
+    def test_pack_files_in_every_backup(self):
+        """Pack files change, so incremental backups include them with a snapshot of their index."""
+        from fastapi_app.lib.storage.pack_store import PackStore
+        from fastapi_app.plugins.backup_restore.backup import load_manifest
+
+        store = PackStore(self.data_root / "files")
+        store.write("ab" * 32, "tei", b"<TEI>1</TEI>")
+        self.backup("backup_1").close()
+        store.write("cd" * 32, "tei", b"<TEI>2</TEI>")
+
+        with self.backup("backup_2", load_manifest(self.data_root)) as zf:
+            names = set(zf.namelist())
+            snapshot = self.temp_dir / "index.db"
+            snapshot.write_bytes(zf.read("files/packs/index.db"))
+
+        self.assertIn("files/packs/pack-000001.pack", names)
+        self.assertNotIn("files/packs/write.lock", names)
+        self.assertFalse(any(name.endswith(("-wal", "-shm")) for name in names))
+        conn = sqlite3.connect(snapshot)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM pack_index").fetchone(), (2,))
+        conn.close()
+        store.close()
+
+    def test_manifest_recorded_only_when_complete(self):
+        """An aborted download does not count as a base for incremental backups."""
+        from fastapi_app.plugins.backup_restore.backup import list_manifests, stream_backup
+
+        stream = stream_backup(self.data_root, "backup_1")
+        next(stream)
+        stream.close()
+
+        self.assertEqual(list_manifests(self.data_root), [])
+
+    def test_incremental_restore_uses_current_files(self):
+        """Restoring an incremental backup takes the files it lacks from the data directory."""
+        from fastapi_app.plugins.backup_restore.backup import (
+            MANIFEST_NAME,
+            complete_incremental_restore,
+            load_manifest,
+        )
+
+        self.backup("backup_1").close()
+        self.add_file("files/cd/cde.tei.xml", b"<TEI/>")
+        restore_dir = self.temp_dir / "data_restore"
+        with self.backup("backup_2", load_manifest(self.data_root)) as zf:
+            zf.extractall(restore_dir)
+
+        self.assertEqual(complete_incremental_restore(restore_dir, self.data_root), [])
+        self.assertEqual((restore_dir / "files" / "ab" / "abc.pdf").read_bytes(), b"%PDF-1.4")
+        self.assertFalse((restore_dir / MANIFEST_NAME).exists())
+
+        # Files that are in neither place are reported
+        shutil.rmtree(restore_dir)
+        with self.backup("backup_3", load_manifest(self.data_root, "backup_2")) as zf:
+            zf.extractall(restore_dir)
+        (self.data_root / "files" / "ab" / "abc.pdf").unlink()
+        self.assertEqual(
+            complete_incremental_restore(restore_dir, self.data_root), ["files/ab/abc.pdf"]
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
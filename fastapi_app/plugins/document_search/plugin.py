@@ -1,15 +1,19 @@
 """
 Document Search plugin.
 
-Provides full-text search across all documents accessible to the current user.
+Provides full-text search across all documents accessible to the current user,
+backed by a persistent index that is shared by all users.
 """
 
 import logging
 from pathlib import Path
 from typing import Any, Callable
 
+from fastapi_app.lib.core.executors import run_in_io_pool
 from fastapi_app.lib.plugins.frontend_extension_registry import FrontendExtensionRegistry
 from fastapi_app.lib.plugins.plugin_base import Plugin, PluginContext
+from fastapi_app.lib.sse.event_bus import get_event_bus
+from fastapi_app.plugins.document_search.search_index import refresh_search_index
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +28,7 @@ class DocumentSearchPlugin(Plugin):
             "name": "Document Search",
             "description": "Search across all accessible documents",
             "category": "search",
-            "version": "1.0.0",
+            "version": "2.0.0",
             "required_roles": ["user"],
             "endpoints": [],
         }
@@ -39,5 +43,23 @@ class DocumentSearchPlugin(Plugin):
             fe_registry.register_extension(extension_file, self.metadata["id"])
             logger.info("Registered document-search frontend extension")
 
+        # Keep the search index up to date with saves and deletions; other
+        # changes (imports, sync) are picked up from the change log at query time
+        event_bus = get_event_bus()
+        event_bus.on("document.save", self._on_documents_changed)
+        event_bus.on("file.deleted", self._on_documents_changed)
+
+    async def cleanup(self) -> None:
+        event_bus = get_event_bus()
+        event_bus.off("document.save", self._on_documents_changed)
+        event_bus.off("file.deleted", self._on_documents_changed)
+
+    async def _on_documents_changed(self, **kwargs) -> None:
+        """Update the search index in the background."""
+        try:
+            await run_in_io_pool(refresh_search_index)
+        except Exception as e:
+            logger.error(f"Failed to update the document search index: {e}")
+
     async def search(self, context: PluginContext, params: dict) -> dict:
         return {"outputUrl": "/api/plugins/document-search/view"}
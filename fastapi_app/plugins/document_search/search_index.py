@@ -0,0 +1,637 @@
+"""
+Persistent full-text index of the Document Search plugin.
+
+A single index, shared by all users and worker processes, is kept in
+search_index.db next to metadata.db. It has one entry per document and
+variant (the gold standard TEI file, or else the highest version) with the
+text of:
+
+- label: the document label, as shown in the results
+- bibl: the bibliographic metadata of the PDF (title, authors, journal, ...)
+- header: the TEI header, without the revision description
+- body: the TEI text
+- annotations: the annotation label, annotator names and revision descriptions
+
+The index follows the file change log of metadata.db (see migration 009):
+refresh() compares the latest log version with the version the index was
+built from and re-indexes only the documents changed in between, so every
+write path (save, import, delete, sync) is picked up. The text of TEI
+content that is already indexed (same content hash) is reused instead of
+reading and parsing the file again.
+
+Access control is applied at query time: entries store the collections of
+their document, and search() only returns entries of the user's collections.
+"""
+
+import html
+import json
+import logging
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+from lxml import etree
+
+from fastapi_app.config import get_settings
+from fastapi_app.lib.core.db_utils import init_database
+from fastapi_app.lib.core.sqlite_utils import get_connection
+from fastapi_app.lib.models.models import FileMetadata
+from fastapi_app.lib.repository.file_repository import FileRepository
+from fastapi_app.lib.utils.tei_utils import get_artifact_label
+
+logger = logging.getLogger(__name__)
+
+# Version of the indexed text; bumping it rebuilds existing indexes
+INDEX_FORMAT = 1
+
+# Maximum number of characters indexed per column
+MAX_TEXT_CHARS = 500_000
+
+# Number of tokens of context in result snippets
+SNIPPET_TOKENS = 16
+
+# Relative weight of a match in each text column (label, bibl, header, body, annotations)
+COLUMN_WEIGHTS = (10.0, 5.0, 2.0, 1.0, 2.0)
+
+# Fields that can be used in the filter DSL (field:value syntax)
+FILTERABLE_FIELDS = {"is_gold_standard", "status", "variant", "created_by", "collection"}
+
+SEARCH_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS index_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL,
+    xml_id TEXT NOT NULL,
+    pdf_id TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    is_gold_standard TEXT NOT NULL,
+    status TEXT,
+    variant TEXT,
+    created_by TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_entries_doc_id ON entries(doc_id);
+CREATE INDEX IF NOT EXISTS idx_entries_content_hash ON entries(content_hash);
+
+CREATE TABLE IF NOT EXISTS entry_collections (
+    collection TEXT NOT NULL,
+    entry_id INTEGER NOT NULL,
+    PRIMARY KEY (collection, entry_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_entry_collections_entry ON entry_collections(entry_id);
+"""
+
+# Text columns, in the order of COLUMN_WEIGHTS
+TEXT_COLUMNS = ("label", "bibl", "header", "body", "annotations")
+
+# Markers around matches in highlight() and snippet() output; replaced by
+# <strong> after the text was HTML-escaped
+_MARK_START = "\x02"
+_MARK_END = "\x03"
+
+TEI_NS = {"tei": "http://www.tei-c.org/ns/1.0"}
+_TEI_HEADER = "{http://www.tei-c.org/ns/1.0}teiHeader"
+_TEI_REVISION_DESC = "{http://www.tei-c.org/ns/1.0}revisionDesc"
+
+_BOOL_TRUE = {"true", "1", "yes"}
+
+# Shared index instances: db_dir -> SearchIndex
+_indexes: dict[Path, "SearchIndex"] = {}
+_indexes_lock = threading.Lock()
+
+
+@dataclass
+class SearchPage:
+    """A page of search results."""
+    results: list[dict[str, Any]]
+    total: int
+
+
+def get_display_label(f: FileMetadata) -> str:
+    """Return display label following priority: label > doc_metadata title > doc_id."""
+    if f.label and f.label.lower() not in ("untitled", "unknown title"):
+        return f.label
+    title = (f.doc_metadata or {}).get("title", "")
+    if title and title.lower() not in ("untitled", "unknown title"):
+        return title
+    return f.doc_id
+
+
+def _normalize(text: str) -> str:
+    """Collapse whitespace and cap the length of indexed text."""
+    return " ".join(text.split())[:MAX_TEXT_CHARS]
+
+
+def extract_bibl_text(doc_id: str, doc_metadata: dict[str, Any]) -> str:
+    """
+    Get the searchable text of a document's bibliographic metadata.
+
+    Args:
+        doc_id: Document identifier (e.g. a DOI)
+        doc_metadata: Bibliographic metadata of the PDF
+
+    Returns:
+        The metadata values as one string
+    """
+    parts = [doc_id]
+    for key in ("title", "date", "journal", "volume", "issue", "pages",
+                "publisher", "doi", "issn", "isbn", "url"):
+        value = doc_metadata.get(key)
+        if value:
+            parts.append(str(value))
+    for author in doc_metadata.get("authors") or []:
+        if isinstance(author, dict):
+            parts.append(" ".join(str(author.get(k) or "") for k in ("given", "family")))
+        elif author:
+            parts.append(str(author))
+    return _normalize(" ".join(parts))
+
+
+def extract_tei_text(content: bytes) -> tuple[str, str, str]:
+    """
+    Get the searchable text of a TEI document.
+
+    Args:
+        content: TEI XML content
+
+    Returns:
+        (header, body, annotations) text; empty strings if the content cannot be parsed
+    """
+    try:
+        root = etree.fromstring(content)
+    except Exception as e:
+        logger.warning(f"Cannot index unparseable TEI content: {e}")
+        return "", "", ""
+
+    header_parts: list[str] = []
+    header = root.find(_TEI_HEADER)
+    if header is not None:
+        for child in header.iter():
+            if child.tag == _TEI_REVISION_DESC:
+                continue
+            if any(ancestor.tag == _TEI_REVISION_DESC for ancestor in child.iterancestors()):
+                continue
+            if child.text:
+                header_parts.append(child.text)
+            if child.tail and child is not header:
+                header_parts.append(child.tail)
+
+    text = root.find("tei:text", TEI_NS)
+    body = "".join(text.itertext()) if text is not None else ""
+
+    annotation_parts = [get_artifact_label(root) or ""]
+    annotation_parts.extend(
+        "".join(pers_name.itertext())
+        for pers_name in root.iterfind(".//tei:titleStmt/tei:respStmt/tei:persName", TEI_NS)
+    )
+    for change in root.iterfind(".//tei:revisionDesc/tei:change", TEI_NS):
+        annotation_parts.append(change.get("status", ""))
+        annotation_parts.append("".join(change.itertext()))
+
+    return _normalize(" ".join(header_parts)), _normalize(body), _normalize(" ".join(annotation_parts))
+
+
+def parse_dsl(q: str) -> tuple[list[tuple[str, bool, list[str]]], str]:
+    """
+    Parse DSL filter tokens from a query string.
+
+    Syntax: ``field:value``, ``field:not:value``, ``field:v1|v2``, ``field:not:v1|v2``
+    Supported fields: is_gold_standard, status, variant, created_by, collection
+    Boolean fields (is_gold_standard): true/1/yes -> '1', anything else -> '0'
+
+    Returns:
+        filters: list of (field, negated, values) tuples
+        remaining: query string with filter tokens removed
+    """
+    filter_re = re.compile(r'^(\w+):(not:)?(.+)$')
+    filters: list[tuple[str, bool, list[str]]] = []
+    remaining: list[str] = []
+
+    for token in q.split():
+        m = filter_re.match(token)
+        if m and m.group(1) in FILTERABLE_FIELDS:
+            field = m.group(1)
+            negated = bool(m.group(2))
+            raw_values = m.group(3).split("|")
+            if field == "is_gold_standard":
+                values = ["1" if v.lower() in _BOOL_TRUE else "0" for v in raw_values]
+            else:
+                values = raw_values
+            filters.append((field, negated, values))
+        else:
+            remaining.append(token)
+
+    return filters, " ".join(remaining)
+
+
+def parse_query(q: str) -> list[str]:
+    """Split query on whitespace, preserving quoted phrases."""
+    return re.findall(r'"[^"]*"|\S+', q)
+
+
+def build_fts5_query(terms: list[str]) -> str:
+    """Build FTS5 MATCH expression from terms.
+
+    Unquoted terms are split on non-word characters so that e.g. "10.1163"
+    becomes the sub-tokens ["10", "1163"]. All sub-tokens except the last are
+    matched exactly; the last gets a prefix wildcard (*).
+    """
+    fts_parts: list[str] = []
+    for term in terms:
+        if term.startswith('"'):
+            fts_parts.append(term)
+        else:
+            sub = [t for t in re.split(r'\W+', term) if t]
+            if not sub:
+                continue
+            fts_parts.extend(sub[:-1])
+            fts_parts.append(sub[-1] + "*")
+    return " AND ".join(fts_parts)
+
+
+def _marked_to_html(text: str) -> str:
+    """HTML-escape text and turn the match markers into <strong> tags."""
+    return html.escape(text).replace(_MARK_START, "<strong>").replace(_MARK_END, "</strong>")
+
+
+def _mark_terms(text: str, terms: list[str]) -> str:
+    """Wrap case-insensitive occurrences of terms in match markers (LIKE fallback)."""
+    clean = [re.escape(t.strip('"')) for t in terms if t.strip('"')]
+    if not clean:
+        return text
+    return re.sub(f"({'|'.join(clean)})", f"{_MARK_START}\\1{_MARK_END}", text, flags=re.IGNORECASE)
+
+
+class SearchIndex:
+    """
+    Full-text index of the TEI documents in search_index.db.
+
+    Thread-safe; refreshes by several processes are serialized by the
+    database write lock and applied only once.
+    """
+
+    def __init__(self, db_dir: Path, logger_inst=None):
+        """
+        Initialize the index with its SQLite backend.
+
+        Args:
+            db_dir: Path to the database directory (containing metadata.db)
+            logger_inst: Optional logger instance
+        """
+        self.db_dir = Path(db_dir)
+        self.db_path = self.db_dir / "search_index.db"
+        self.logger = logger_inst if logger_inst is not None else logger
+        self._refresh_lock = threading.Lock()
+        init_database(self.db_path, SEARCH_INDEX_SCHEMA, self.logger)
+        self.use_fts5 = self._create_text_table()
+
+    def _create_text_table(self) -> bool:
+        """Create the text table. Returns True if FTS5 is available, False for LIKE fallback."""
+        with get_connection(self.db_path) as conn:
+            row = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'entry_text'").fetchone()
+            if row is not None:
+                return "fts5" in row["sql"].lower()
+            try:
+                conn.execute(f"CREATE VIRTUAL TABLE entry_text USING fts5({', '.join(TEXT_COLUMNS)})")
+                return True
+            except sqlite3.OperationalError:
+                self.logger.warning("FTS5 not available, falling back to plain table with LIKE search")
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS entry_text (id INTEGER PRIMARY KEY, {', '.join(TEXT_COLUMNS)})"
+                )
+                return False
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    def get_version(self) -> int | None:
+        """Return the file change log version the index is up to date with (None if never built)."""
+        with get_connection(self.db_path) as conn:
+            return self._get_version(conn)
+
+    def refresh(self, repo: FileRepository, file_storage) -> int:
+        """
+        Bring the index up to date with metadata.db.
+
+        Only documents changed since the last refresh are re-indexed; the
+        whole index is rebuilt if it was never built, its format changed or
+        the change log no longer reaches back to its version.
+
+        Args:
+            repo: File repository of metadata.db
+            file_storage: FileStorage to read TEI files from
+
+        Returns:
+            Number of documents re-indexed
+        """
+        with self._refresh_lock:
+            target = repo.get_change_version()
+            with get_connection(self.db_path) as conn:
+                version = self._get_version(conn)
+            if version == target:
+                return 0
+
+            doc_ids: set | None = None
+            if version is not None and version < target:
+                doc_ids = repo.get_changed_doc_ids(version, target)
+            if doc_ids is not None:
+                # None entries stand for remote lock changes
+                doc_ids.discard(None)
+                files_by_doc = repo.get_files_by_doc_ids(sorted(doc_ids)) if doc_ids else {}
+            else:
+                files_by_doc = {}
+                for f in repo.list_files(include_deleted=False):
+                    files_by_doc.setdefault(f.doc_id, []).append(f)
+
+            entries = [
+                entry
+                for doc_id, doc_files in files_by_doc.items()
+                for entry in self._document_entries(doc_id, doc_files)
+            ]
+            texts = self._load_texts({entry["content_hash"] for entry in entries})
+            for entry in entries:
+                text = texts.get(entry["content_hash"])
+                if text is None:
+                    text = texts[entry["content_hash"]] = self._read_tei_text(file_storage, entry["content_hash"])
+                entry["header"], entry["body"], entry["annotations"] = text
+
+            with get_connection(self.db_path) as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    if self._get_version(conn) != version:
+                        # Another process refreshed the index meanwhile
+                        conn.execute("ROLLBACK")
+                        return 0
+                    self._write(conn, files_by_doc.keys() if doc_ids is not None else None, entries)
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO index_state (key, value) VALUES (?, ?)",
+                        [("version", str(target)), ("format", str(INDEX_FORMAT))]
+                    )
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+
+            self.logger.debug(
+                f"Search index at version {target}: re-indexed {len(files_by_doc)} documents "
+                f"({'full rebuild' if doc_ids is None else 'incremental'})"
+            )
+            return len(files_by_doc)
+
+    def _get_version(self, conn: sqlite3.Connection) -> int | None:
+        state = {row["key"]: row["value"] for row in conn.execute("SELECT key, value FROM index_state")}
+        if state.get("format") != str(INDEX_FORMAT) or "version" not in state:
+            return None
+        return int(state["version"])
+
+    def _document_entries(self, doc_id: str, doc_files: list[FileMetadata]) -> list[dict[str, Any]]:
+        """Select the indexed TEI files of a document: one per variant, gold standard or highest version."""
+        pdf = next((f for f in doc_files if f.file_type == "pdf"), None)
+        tei_files = [f for f in doc_files if f.file_type == "tei"]
+        if not pdf or not tei_files:
+            return []
+
+        by_variant: dict[str | None, list[FileMetadata]] = {}
+        for tei in tei_files:
+            by_variant.setdefault(tei.variant, []).append(tei)
+
+        label = f"{get_display_label(pdf)} ({doc_id})"
+        bibl = extract_bibl_text(doc_id, pdf.doc_metadata or {})
+        entries = []
+        for variant_teis in by_variant.values():
+            gold = next((t for t in variant_teis if t.is_gold_standard), None)
+            best = gold if gold else max(variant_teis, key=lambda t: t.version or 0)
+            entries.append({
+                "doc_id": doc_id,
+                "xml_id": best.stable_id,
+                "pdf_id": pdf.stable_id,
+                "content_hash": best.id,
+                "is_gold_standard": "1" if best.is_gold_standard else "0",
+                "status": best.status,
+                "variant": best.variant,
+                "created_by": best.created_by,
+                "collections": list(pdf.doc_collections or []),
+                "label": label,
+                "bibl": bibl,
+            })
+        return entries
+
+    def _load_texts(self, content_hashes: Iterable[str]) -> dict[str, tuple[str, str, str]]:
+        """Load the indexed TEI text of content that is already in the index."""
+        texts = {}
+        with get_connection(self.db_path) as conn:
+            for row in conn.execute(
+                """
+                SELECT e.content_hash, t.header, t.body, t.annotations
+                FROM entries e JOIN entry_text t ON t.rowid = e.id
+                WHERE e.content_hash IN (SELECT value FROM json_each(?))
+                """,
+                (json.dumps(sorted(content_hashes)),)
+            ):
+                texts[row["content_hash"]] = (row["header"], row["body"], row["annotations"])
+        return texts
+
+    def _read_tei_text(self, file_storage, content_hash: str) -> tuple[str, str, str]:
+        try:
+            content = file_storage.read_file(content_hash, "tei")
+        except Exception as e:
+            self.logger.error(f"Failed to read tei file {content_hash}: {e}")
+            return "", "", ""
+        if not content:
+            return "", "", ""
+        return extract_tei_text(content)
+
+    def _write(self, conn: sqlite3.Connection, doc_ids: Iterable[str] | None, entries: list[dict[str, Any]]) -> None:
+        """Replace the entries of the given documents (of all documents if doc_ids is None)."""
+        if doc_ids is None:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM entry_collections")
+            conn.execute("DELETE FROM entry_text")
+        else:
+            doc_ids_json = json.dumps(list(doc_ids))
+            old_ids = "SELECT id FROM entries WHERE doc_id IN (SELECT value FROM json_each(?))"
+            conn.execute(f"DELETE FROM entry_text WHERE rowid IN ({old_ids})", (doc_ids_json,))
+            conn.execute(f"DELETE FROM entry_collections WHERE entry_id IN ({old_ids})", (doc_ids_json,))
+            conn.execute("DELETE FROM entries WHERE doc_id IN (SELECT value FROM json_each(?))", (doc_ids_json,))
+
+        for entry in entries:
+            cursor = conn.execute(
+                """
+                INSERT INTO entries
+                    (doc_id, xml_id, pdf_id, content_hash, is_gold_standard, status, variant, created_by)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (entry["doc_id"], entry["xml_id"], entry["pdf_id"], entry["content_hash"],
+                 entry["is_gold_standard"], entry["status"], entry["variant"], entry["created_by"])
+            )
+            entry_id = cursor.lastrowid
+            conn.execute(
+                f"INSERT INTO entry_text (rowid, {', '.join(TEXT_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                (entry_id, *(entry[column] for column in TEXT_COLUMNS))
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO entry_collections (collection, entry_id) VALUES (?, ?)",
+                [(collection, entry_id) for collection in entry["collections"]]
+            )
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def search(
+        self,
+        q: str,
+        accessible_collections: list[str] | None = None,
+        limit: int = 50,
+        offset: int = 0
+    ) -> SearchPage:
+        """
+        Search the index.
+
+        Args:
+            q: Query with text terms (all must match, the last one as prefix,
+                quoted phrases exactly) and DSL filters (see parse_dsl())
+            accessible_collections: Collections the user may access (None = all)
+            limit: Maximum number of results
+            offset: Number of results to skip (paging)
+
+        Returns:
+            SearchPage with the results, ranked by relevance, and the total
+            number of matches. Empty for malformed queries and queries
+            without text terms or filters.
+        """
+        filters, text_query = parse_dsl(q)
+        terms = parse_query(text_query) if text_query.strip() else []
+        if not terms and not filters:
+            return SearchPage(results=[], total=0)
+
+        where: list[str] = []
+        args: list[Any] = []
+
+        if accessible_collections is not None:
+            where.append(
+                "EXISTS (SELECT 1 FROM entry_collections c WHERE c.entry_id = e.id"
+                " AND c.collection IN (SELECT value FROM json_each(?)))"
+            )
+            args.append(json.dumps(accessible_collections))
+
+        for field, negated, values in filters:
+            values_json = json.dumps(values)
+            if field == "collection":
+                clause = (
+                    "EXISTS (SELECT 1 FROM entry_collections c WHERE c.entry_id = e.id"
+                    " AND c.collection IN (SELECT value FROM json_each(?)))"
+                )
+                where.append(f"NOT {clause}" if negated else clause)
+            elif negated:
+                where.append(f"(e.{field} IS NULL OR e.{field} NOT IN (SELECT value FROM json_each(?)))")
+            else:
+                where.append(f"e.{field} IN (SELECT value FROM json_each(?))")
+            args.append(values_json)
+
+        label_col = TEXT_COLUMNS.index("label")
+        if not terms:
+            match_expr = "entry_text.label"
+            snippet_expr = "NULL"
+            order = "e.doc_id, e.variant"
+        elif self.use_fts5:
+            where.append("entry_text MATCH ?")
+            args.append(build_fts5_query(terms))
+            match_expr = f"highlight(entry_text, {label_col}, '{_MARK_START}', '{_MARK_END}')"
+            snippet_expr = f"snippet(entry_text, -1, '{_MARK_START}', '{_MARK_END}', '…', {SNIPPET_TOKENS})"
+            order = f"bm25(entry_text, {', '.join(str(w) for w in COLUMN_WEIGHTS)})"
+        else:
+            for term in terms:
+                where.append("(" + " OR ".join(f"LOWER(entry_text.{c}) LIKE ?" for c in TEXT_COLUMNS) + ")")
+                args.extend([f"%{term.strip(chr(34)).lower()}%"] * len(TEXT_COLUMNS))
+            match_expr = "entry_text.label"
+            snippet_expr = "NULL"
+            order = "e.doc_id, e.variant"
+
+        from_where = (
+            " FROM entry_text JOIN entries e ON e.id = entry_text.rowid"
+            + (" WHERE " + " AND ".join(where) if where else "")
+        )
+
+        try:
+            with get_connection(self.db_path) as conn:
+                total = conn.execute(f"SELECT COUNT(*){from_where}", args).fetchone()[0]
+                rows = conn.execute(
+                    f"SELECT e.id, e.xml_id, e.pdf_id, e.is_gold_standard, e.status, e.variant, e.created_by,"
+                    f" {match_expr} AS match, {snippet_expr} AS snippet"
+                    f"{from_where} ORDER BY {order} LIMIT ? OFFSET ?",
+                    [*args, limit, offset]
+                ).fetchall()
+                collections = self._entry_collections(conn, [row["id"] for row in rows])
+        except sqlite3.OperationalError as e:
+            self.logger.debug("Search query error (malformed query): %s", e)
+            return SearchPage(results=[], total=0)
+
+        results = []
+        for row in rows:
+            match = row["match"]
+            snippet = row["snippet"]
+            if terms and not self.use_fts5:
+                match = _mark_terms(match, terms)
+            entry_collections = collections.get(row["id"], [])
+            if accessible_collections is not None:
+                entry_collections = [c for c in entry_collections if c in accessible_collections]
+            result = {
+                "xml_id": row["xml_id"],
+                "pdf_id": row["pdf_id"],
+                "match": _marked_to_html(match),
+                "is_gold": row["is_gold_standard"] == "1",
+                "status": row["status"],
+                "variant": row["variant"],
+                "created_by": row["created_by"],
+                "collections": entry_collections,
+            }
+            # Context of matches outside the label
+            if snippet and _MARK_START in snippet and snippet != match:
+                result["snippet"] = _marked_to_html(snippet)
+            results.append(result)
+        return SearchPage(results=results, total=total)
+
+    def _entry_collections(self, conn: sqlite3.Connection, entry_ids: list[int]) -> dict[int, list[str]]:
+        collections: dict[int, list[str]] = {}
+        for row in conn.execute(
+            """
+            SELECT entry_id, collection FROM entry_collections
+            WHERE entry_id IN (SELECT value FROM json_each(?))
+            ORDER BY collection
+            """,
+            (json.dumps(entry_ids),)
+        ):
+            collections.setdefault(row["entry_id"], []).append(row["collection"])
+        return collections
+
+
+def get_search_index() -> SearchIndex:
+    """Get the search index of the configured database directory."""
+    db_dir = Path(get_settings().db_dir)
+    with _indexes_lock:
+        index = _indexes.get(db_dir)
+        if index is None or not index.db_path.exists():
+            index = _indexes[db_dir] = SearchIndex(db_dir)
+        return index
+
+
+def refresh_search_index() -> int:
+    """
+    Bring the search index of the configured database directory up to date (blocking).
+
+    Returns:
+        Number of documents re-indexed
+    """
+    from fastapi_app.lib.core.dependencies import get_db, get_file_storage
+
+    return get_search_index().refresh(FileRepository(get_db()), get_file_storage())
@@ -0,0 +1,188 @@
+"""
+Unit tests for the persistent document search index.
+
+Tests:
+- Header, body, bibliographic metadata and annotations are searchable, label matches rank first
+- Results are restricted to the collections the user may access
+- DSL filters are applied in SQL, also without text terms
+- Results are paged and the total number of matches is reported
+- Snippets and highlights are HTML-escaped
+- Refreshes re-index only changed documents, reuse indexed text and drop deleted documents
+- The index is rebuilt when the change log no longer reaches back to its version
+
+@testCovers fastapi_app/plugins/document_search/search_index.py
+"""
+
+import gc
+import logging
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi_app.lib.core.database import DatabaseManager
+from fastapi_app.lib.models.models import FileCreate, FileUpdate
+from fastapi_app.lib.repository.file_repository import FileRepository
+from fastapi_app.lib.storage.file_storage import FileStorage
+from fastapi_app.plugins.document_search.search_index import SearchIndex, build_fts5_query, parse_dsl
+
+TEI_TEMPLATE = """<TEI xmlns="http://www.tei-c.org/ns/1.0">
+  <teiHeader>
+    <fileDesc>
+      <titleStmt>
+        <title>{title}</title>
+        <respStmt><persName>{annotator}</persName><resp>Annotator</resp></respStmt>
+      </titleStmt>
+    </fileDesc>
+    <revisionDesc>
+      <change when="2025-01-01" status="draft"><desc>{change}</desc></change>
+    </revisionDesc>
+  </teiHeader>
+  <text><body><p>{body}</p></body></text>
+</TEI>"""
+
+
+class TestSearchIndex(unittest.TestCase):
+    """Test indexing and searching TEI documents."""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.db_dir = self.tmp_dir / "db"
+        self.db_dir.mkdir()
+        self.logger = logging.getLogger("test_search_index")
+        self.logger.setLevel(logging.ERROR)
+        db = DatabaseManager(self.db_dir / "metadata.db")
+        self.repo = FileRepository(db)
+        self.storage = FileStorage(self.tmp_dir / "files", db)
+        self.index = SearchIndex(self.db_dir, self.logger)
+
+    def tearDown(self):
+        gc.collect()
+        shutil.rmtree(self.tmp_dir)
+
+    def add_document(self, doc_id, title, collections, body="", annotator="Jane Roe",
+                     change="Initial annotation", variant="grobid", status="draft"):
+        self.repo.insert_file(FileCreate(
+            id=f"pdf-{doc_id}", filename=f"{doc_id}.pdf", doc_id=doc_id, file_type="pdf",
+            file_size=100, label=title, doc_collections=collections,
+            doc_metadata={"title": title, "authors": [{"given": "Johannes", "family": "Brahms"}],
+                          "journal": "Musical Quarterly"}
+        ))
+        return self.add_tei(doc_id, TEI_TEMPLATE.format(
+            title=title, annotator=annotator, change=change, body=body
+        ), variant=variant, status=status, collections=collections)
+
+    def add_tei(self, doc_id, xml, variant="grobid", status="draft", collections=(), version=1):
+        file_hash, _ = self.storage.save_file(xml.encode(), "tei")
+        return self.repo.insert_file(FileCreate(
+            id=file_hash, filename=f"{doc_id}.tei.xml", doc_id=doc_id, file_type="tei",
+            file_size=len(xml), variant=variant, status=status, version=version,
+            doc_collections=list(collections), created_by="alice"
+        ))
+
+    def search(self, q, collections=None, **kwargs):
+        self.index.refresh(self.repo, self.storage)
+        return self.index.search(q, collections, **kwargs)
+
+    def xml_ids(self, page):
+        return [r["xml_id"] for r in page.results]
+
+    def test_full_text(self):
+        quartet = self.add_document("doc1", "String Quartets", ["c1"], body="The opus fifty-one manuscripts")
+        symphony = self.add_document("doc2", "Symphony No. 4", ["c1"], body="A study of string writing",
+                                     annotator="Max Mustermann", change="Corrected footnotes")
+
+        self.assertEqual(self.xml_ids(self.search("manuscripts")), [quartet.stable_id])
+        self.assertEqual(self.xml_ids(self.search("mustermann")), [symphony.stable_id])
+        self.assertEqual(self.xml_ids(self.search("footnotes")), [symphony.stable_id])
+        self.assertEqual(len(self.search("brahms quarterly").results), 2)
+        # Label matches rank above body matches
+        self.assertEqual(self.xml_ids(self.search("string")), [quartet.stable_id, symphony.stable_id])
+
+        result = self.search("manuscripts").results[0]
+        self.assertEqual(result["pdf_id"], self.repo.get_files_by_doc_id("doc1")[0].stable_id)
+        self.assertEqual(result["match"], "String Quartets (doc1)")
+        self.assertIn("<strong>manuscripts</strong>", result["snippet"])
+        self.assertEqual(result["collections"], ["c1"])
+
+    def test_collection_access(self):
+        self.add_document("doc1", "Brahms letters", ["c1", "c2"])
+        restricted = self.add_document("doc2", "Brahms diaries", ["c3"])
+
+        page = self.search("brahms", ["c2"])
+        self.assertEqual(page.total, 1)
+        self.assertEqual(page.results[0]["collections"], ["c2"])
+        self.assertEqual(self.search("diaries", ["c1", "c2"]).total, 0)
+        self.assertEqual(self.xml_ids(self.search("diaries")), [restricted.stable_id])
+
+    def test_dsl_filters(self):
+        draft = self.add_document("doc1", "Brahms letters", ["c1"], status="draft")
+        published = self.add_document("doc2", "Brahms diaries", ["c2"], status="published", variant="manual")
+
+        self.assertEqual(self.xml_ids(self.search("status:published")), [published.stable_id])
+        self.assertEqual(self.xml_ids(self.search("brahms status:not:published")), [draft.stable_id])
+        self.assertEqual(self.xml_ids(self.search("collection:c2|c3")), [published.stable_id])
+        self.assertEqual(self.xml_ids(self.search("collection:not:c2")), [draft.stable_id])
+        self.assertEqual(self.search("is_gold_standard:true").total, 0)
+        self.assertEqual(self.search("status:published", ["c1"]).total, 0)
+        self.assertEqual(parse_dsl("variant:a|b brahms"), ([("variant", False, ["a", "b"])], "brahms"))
+        self.assertEqual(build_fts5_query(["10.1163", '"string quartet"']), '10 AND 1163* AND "string quartet"')
+
+    def test_paging(self):
+        for i in range(5):
+            self.add_document(f"doc{i}", f"Brahms letters {i}", ["c1"])
+
+        first = self.search("brahms", limit=2)
+        rest = self.search("brahms", limit=10, offset=2)
+        self.assertEqual((first.total, len(first.results)), (5, 2))
+        self.assertEqual((rest.total, len(rest.results)), (5, 3))
+        self.assertFalse(set(self.xml_ids(first)) & set(self.xml_ids(rest)))
+
+    def test_escaping(self):
+        self.add_document("doc1", "<b>Brahms</b> letters", ["c1"], body="<i>x</i> &lt;script&gt; brahms")
+
+        result = self.search("brahms").results[0]
+        self.assertEqual(result["match"], "&lt;b&gt;<strong>Brahms</strong>&lt;/b&gt; letters (doc1)")
+        self.assertNotIn("<script>", result.get("snippet", ""))
+        self.assertEqual(self.search('"unbalanced').total, 0)
+
+    def test_incremental_refresh(self):
+        self.add_document("doc1", "Brahms letters", ["c1"], body="first draft")
+        other = self.add_document("doc2", "Brahms diaries", ["c1"])
+        self.assertEqual(self.index.refresh(self.repo, self.storage), 2)
+        self.assertEqual(self.index.refresh(self.repo, self.storage), 0)
+
+        # A new version is indexed instead of the previous one, other documents are not read again
+        xml = TEI_TEMPLATE.format(title="Brahms letters", annotator="Jane Roe", change="Revised", body="second draft")
+        with patch.object(self.storage, "read_file", wraps=self.storage.read_file) as read_file:
+            version2 = self.add_tei("doc1", xml, version=2)
+            self.assertEqual(self.index.refresh(self.repo, self.storage), 1)
+            self.assertEqual(read_file.call_count, 1)
+        self.assertEqual(self.search("first").total, 0)
+        self.assertEqual(self.xml_ids(self.search("second")), [version2.stable_id])
+
+        # Metadata changes reuse the indexed text
+        with patch.object(self.storage, "read_file", wraps=self.storage.read_file) as read_file:
+            self.repo.update_file(version2.id, FileUpdate(status="published"))
+            self.assertEqual(self.xml_ids(self.search("second status:published")), [version2.stable_id])
+            read_file.assert_not_called()
+
+        self.repo.delete_file(other.id)
+        self.assertEqual(self.search("diaries").total, 0)
+
+    def test_rebuild_after_log_pruning(self):
+        self.add_document("doc1", "Brahms letters", ["c1"])
+        self.index.refresh(self.repo, self.storage)
+        self.add_document("doc2", "Brahms diaries", ["c1"])
+
+        with patch.object(self.repo, "get_changed_doc_ids", return_value=None):
+            self.assertEqual(self.index.refresh(self.repo, self.storage), 2)
+        self.assertEqual(self.index.search("brahms").total, 2)
+
+        # Another index instance (worker process) sees the refreshed index
+        self.assertEqual(SearchIndex(self.db_dir, self.logger).refresh(self.repo, self.storage), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,11 +9,11 @@ from datetime import datetime
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from fastapi.responses import StreamingResponse, HTMLResponse
-from lxml import etree
 
 from fastapi_app.lib.core.dependencies import (
     get_auth_manager,
     get_db,
+    get_derived_data_cache,
     get_file_storage,
     get_session_manager,
 )
@@ -87,21 +87,15 @@ async def view_history(
                 f for f in tei_files if getattr(f, "variant", None) == variant
             ]
 
-        # Extract edit history
+        # Extract edit history from the cached TEI summaries
+        summaries = get_derived_data_cache().get_many(
+            [f.id for f in tei_files], "tei.summary", file_storage
+        )
         history_entries = []
         for file_metadata in tei_files:
-            try:
-                content_bytes = file_storage.read_file(file_metadata.id, "tei")
-                if not content_bytes:
-                    continue
-
-                xml_content = content_bytes.decode("utf-8")
-                entries = _extract_revision_info(xml_content, file_metadata)
-                history_entries.extend(entries)
-
-            except Exception as e:
-                logger.error(f"Failed to parse TEI file {file_metadata.id}: {e}")
-                continue
+            summary = summaries.get(file_metadata.id)
+            if summary:
+                history_entries.extend(_revision_info(summary, file_metadata))
 
         # Sort by date descending
         history_entries.sort(key=lambda x: x["timestamp"], reverse=True)
@@ -209,21 +203,15 @@ async def export_csv(
                 f for f in tei_files if getattr(f, "variant", None) == variant
             ]
 
-        # Extract edit history
+        # Extract edit history from the cached TEI summaries
+        summaries = get_derived_data_cache().get_many(
+            [f.id for f in tei_files], "tei.summary", file_storage
+        )
         history_entries = []
         for file_metadata in tei_files:
-            try:
-                content_bytes = file_storage.read_file(file_metadata.id, "tei")
-                if not content_bytes:
-                    continue
-
-                xml_content = content_bytes.decode("utf-8")
-                entries = _extract_revision_info(xml_content, file_metadata)
-                history_entries.extend(entries)
-
-            except Exception as e:
-                logger.error(f"Failed to parse TEI file {file_metadata.id}: {e}")
-                continue
+            summary = summaries.get(file_metadata.id)
+            if summary:
+                history_entries.extend(_revision_info(summary, file_metadata))
 
         # Sort by date descending
         history_entries.sort(key=lambda x: x["timestamp"], reverse=True)
@@ -266,80 +254,51 @@ async def export_csv(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def _extract_revision_info(xml_content: str, file_metadata) -> list[dict]:
+def _revision_info(summary: dict, file_metadata) -> list[dict]:
     """
-    Extract revision information from TEI document.
+    Build the revision entries of a TEI document from its tei.summary.
 
     Args:
-        xml_content: TEI XML content as string
+        summary: Derived tei.summary data of the document
         file_metadata: File metadata object
 
     Returns:
         List of revision entries (one per change element)
     """
-    try:
-        from fastapi_app.lib.utils.tei_utils import get_artifact_label, get_annotator_name
-
-        root = etree.fromstring(xml_content.encode("utf-8"))
-        ns = {
-            "tei": "http://www.tei-c.org/ns/1.0",
-        }
-
-        doc_label = get_artifact_label(root) or "Untitled"
-
-        # Get ALL change elements
-        change_elements = root.findall(".//tei:revisionDesc/tei:change", ns)
-
-        if not change_elements:
-            return []
-
-        # Get doc_id from file metadata
-        doc_id = file_metadata.doc_id or "Unknown"
-
-        # Extract all changes
-        results = []
-        for change in change_elements:
-            # Extract change information
-            when = change.get("when", "")
-            who_attr = change.get("who", "")
-            who_id = who_attr.lstrip("#")
-            status = change.get("status", "")
-
-            # Look up full name from respStmt using @xml:id
-            who_name = get_annotator_name(root, who_attr)
-
-            # Get description from text content or desc subelement
-            desc_elem = change.find("tei:desc", ns)
-            if desc_elem is not None and desc_elem.text:
-                description = desc_elem.text.strip()
-            elif change.text:
-                description = change.text.strip()
-            else:
-                description = "No description"
-
-            # Parse timestamp
-            try:
-                timestamp = datetime.fromisoformat(when.replace("Z", "+00:00"))
-                # Remove timezone info for consistent comparison
-                if timestamp.tzinfo is not None:
-                    timestamp = timestamp.replace(tzinfo=None)
-            except (ValueError, AttributeError):
-                timestamp = datetime.now()
-
-            results.append({
-                "timestamp": timestamp,
-                "date_str": timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-                "doc_id": doc_id,
-                "doc_label": doc_label,
-                "description": description,
-                "who_id": who_id,
-                "who": who_name,
-                "status": status,
-                "stable_id": file_metadata.stable_id,
-            })
-
-        return results
-
-    except Exception as e:
-        logger.error(f"Error extracting revision info: {e}")
-        return []
+    doc_label = summary["label"] or "Untitled"
+
+    # Get doc_id from file metadata
+    doc_id = file_metadata.doc_id or "Unknown"
+
+    results = []
+    for change in summary["changes"]:
+        # Get description from desc subelement or text content
+        if change["desc"] is not None:
+            description = change["desc"]
+        elif change["text"] is not None:
+            description = change["text"]
+        else:
+            description = "No description"
+
+        # Parse timestamp
+        try:
+            timestamp = datetime.fromisoformat(change["when"].replace("Z", "+00:00"))
+            # Remove timezone info for consistent comparison
+            if timestamp.tzinfo is not None:
+                timestamp = timestamp.replace(tzinfo=None)
+        except (ValueError, AttributeError):
+            timestamp = datetime.now()
+
+        results.append({
+            "timestamp": timestamp,
+            "date_str": timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+            "doc_id": doc_id,
+            "doc_label": doc_label,
+            "description": description,
+            "who_id": change["who"].lstrip("#"),
+            "who": change["annotator"],
+            "status": change["status"],
+            "stable_id": file_metadata.stable_id,
+        })
+
+    return results
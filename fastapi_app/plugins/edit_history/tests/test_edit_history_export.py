@@ -6,10 +6,13 @@ Tests CSV export functionality, authentication, and access control.
 @testCovers fastapi_app/plugins/edit_history/routes.py
 """
 
+import shutil
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
 from datetime import datetime
 from io import BytesIO
+from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
@@ -45,6 +48,20 @@ class TestEditHistoryExport(unittest.IsolatedAsyncioTestCase):
 
         self.client = TestClient(self.app)
 
+        # Derived data cache in a temporary directory
+        from fastapi_app.lib.services.derived_data import DerivedDataCache
+        self.cache_dir = Path(tempfile.mkdtemp())
+        cache_patcher = patch(
+            "fastapi_app.plugins.edit_history.routes.get_derived_data_cache",
+            return_value=DerivedDataCache(self.cache_dir),
+        )
+        cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
+
+    def tearDown(self):
+        """Remove the derived data cache."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
     def test_export_csv_no_session(self):
         """Test export without session ID returns 401."""
         response = self.client.get(
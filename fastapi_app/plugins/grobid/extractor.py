@@ -11,6 +11,7 @@ from lxml import etree
 
 logger = logging.getLogger(__name__)
 
+from fastapi_app.lib.core.executors import run_in_io_pool
 from fastapi_app.lib.extraction import BaseExtractor, get_retry_session
 from fastapi_app.lib.services.metadata_extraction import get_metadata_for_document
 from fastapi_app.plugins.grobid.config import (
@@ -128,68 +129,12 @@ class GrobidTrainingExtractor(BaseExtractor):
         grobid_server_url = get_grobid_server_url()
         if grobid_server_url is None:
             raise ValueError("GROBID server URL not configured")
-        self._check_grobid_health(grobid_server_url)
-        grobid_version, grobid_revision = self._get_grobid_version(grobid_server_url)
-
-        # Get the appropriate handler
-        handler = self._get_handler(variant_id)
-
-        # Check if this is a training variant (should use cache)
+        # Server requests and cache access block, run them outside the event loop
+        raw_tei_content, grobid_version, grobid_revision = await run_in_io_pool(
+            self._fetch_raw_tei, pdf_path, grobid_server_url, variant_id, flavor, options
+        )
         is_training_variant = variant_id.startswith("grobid.training.")
 
-        if is_training_variant:
-            from fastapi_app.plugins.grobid.cache import check_cache, cache_training_data
-
-            # Get doc_id from options or PDF filename
-            doc_id = options.get('doc_id')
-            if not doc_id:
-                pdf_name = os.path.basename(pdf_path)
-                doc_id = os.path.splitext(pdf_name)[0]
-
-            # Check cache
-            cached_data = check_cache(doc_id, grobid_revision, force_refresh=is_grobid_cache_disabled())
-
-            if cached_data:
-                # Use cached data - find the specific variant file
-                temp_dir = cached_data["temp_dir"]
-                suffix = f'.{variant_id.removeprefix("grobid.")}.tei.xml'
-
-                raw_tei_content = None
-                for filename in cached_data["files"]:
-                    if filename.endswith(suffix):
-                        with open(os.path.join(temp_dir, filename), 'r', encoding='utf-8') as f:
-                            raw_tei_content = f.read()
-                        break
-
-                if raw_tei_content is None:
-                    # Variant not in cache, fetch fresh
-                    raw_tei_content = handler.fetch_tei(pdf_path, grobid_server_url, variant_id, flavor, options)
-            else:
-                # Cache miss - fetch and cache
-                from fastapi_app.plugins.grobid.handlers.training import TrainingHandler
-                training_handler: TrainingHandler = handler  # type: ignore[assignment]
-                temp_dir, extracted_files = training_handler._fetch_training_package(
-                    pdf_path, grobid_server_url, flavor
-                )
-
-                # Cache the training data
-                cache_training_data(doc_id, grobid_revision, temp_dir, extracted_files)
-
-                # Find and read the specific variant file
-                suffix = f'.{variant_id.removeprefix("grobid.")}.tei.xml'
-                raw_tei_content = None
-                for filename in extracted_files:
-                    if filename.endswith(suffix):
-                        with open(os.path.join(temp_dir, filename), 'r', encoding='utf-8') as f:
-                            raw_tei_content = f.read()
-                        break
-
-                if raw_tei_content is None:
-                    raise RuntimeError(f"Could not find '*{suffix}' file in GROBID output.")
-        else:
-            # Non-training variants (fulltext, references) - no caching
-            raw_tei_content = handler.fetch_tei(pdf_path, grobid_server_url, variant_id, flavor, options)
-
         # Log raw GROBID response for debugging
         log_extraction_response("grobid", pdf_path, raw_tei_content, ".raw.xml")
 
@@ -366,6 +311,79 @@ class GrobidTrainingExtractor(BaseExtractor):
         return result_xml
 
 
+    def _fetch_raw_tei(self, pdf_path: str, grobid_server_url: str, variant_id: str,
+                       flavor: str, options: Dict[str, Any]) -> tuple[str, str, str]:
+        """
+        Fetch the raw TEI for a variant from the GROBID server or the training data cache.
+
+        Returns:
+            Tuple of (raw TEI content, GROBID version, GROBID revision)
+        """
+        self._check_grobid_health(grobid_server_url)
+        grobid_version, grobid_revision = self._get_grobid_version(grobid_server_url)
+
+        # Get the appropriate handler
+        handler = self._get_handler(variant_id)
+
+        # Check if this is a training variant (should use cache)
+        is_training_variant = variant_id.startswith("grobid.training.")
+
+        if is_training_variant:
+            from fastapi_app.plugins.grobid.cache import check_cache, cache_training_data
+
+            # Get doc_id from options or PDF filename
+            doc_id = options.get('doc_id')
+            if not doc_id:
+                pdf_name = os.path.basename(pdf_path)
+                doc_id = os.path.splitext(pdf_name)[0]
+
+            # Check cache
+            cached_data = check_cache(doc_id, grobid_revision, force_refresh=is_grobid_cache_disabled())
+
+            if cached_data:
+                # Use cached data - find the specific variant file
+                temp_dir = cached_data["temp_dir"]
+                suffix = f'.{variant_id.removeprefix("grobid.")}.tei.xml'
+
+                raw_tei_content = None
+                for filename in cached_data["files"]:
+                    if filename.endswith(suffix):
+                        with open(os.path.join(temp_dir, filename), 'r', encoding='utf-8') as f:
+                            raw_tei_content = f.read()
+                        break
+
+                if raw_tei_content is None:
+                    # Variant not in cache, fetch fresh
+                    raw_tei_content = handler.fetch_tei(pdf_path, grobid_server_url, variant_id, flavor, options)
+            else:
+                # Cache miss - fetch and cache
+                from fastapi_app.plugins.grobid.handlers.training import TrainingHandler
+                training_handler: TrainingHandler = handler  # type: ignore[assignment]
+                temp_dir, extracted_files = training_handler._fetch_training_package(
+                    pdf_path, grobid_server_url, flavor
+                )
+
+                # Cache the training data
+                cache_training_data(doc_id, grobid_revision, temp_dir, extracted_files)
+
+                # Find and read the specific variant file
+                suffix = f'.{variant_id.removeprefix("grobid.")}.tei.xml'
+                raw_tei_content = None
+                for filename in extracted_files:
+                    if filename.endswith(suffix):
+                        with open(os.path.join(temp_dir, filename), 'r', encoding='utf-8') as f:
+                            raw_tei_content = f.read()
+                        break
+
+                if raw_tei_content is None:
+                    raise RuntimeError(f"Could not find '*{suffix}' file in GROBID output.")
+        else:
+            # Non-training variants (fulltext, references) - no caching
+            raw_tei_content = handler.fetch_tei(pdf_path, grobid_server_url, variant_id, flavor, options)
+
+
+        return raw_tei_content, grobid_version, grobid_revision
+
     def _clean_invalid_xml_attributes(self, xml_content: str) -> str:
         """Clean invalid XML attributes that cause parsing errors."""
         # Fix invalid xml:id attributes like xml:id="-1"
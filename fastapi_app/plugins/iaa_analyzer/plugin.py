@@ -11,10 +11,15 @@ from typing import Any, Callable
 
 from lxml import etree
 
+from fastapi_app.lib.core.executors import run_in_cpu_pool, run_in_io_pool
 from fastapi_app.lib.plugins.plugin_base import Plugin, PluginContext
+from fastapi_app.lib.services.derived_data import derived_extractor
 
 logger = logging.getLogger(__name__)
 
+# Derived data extractor of the element sequences compared by the analyzer
+ELEMENTS_EXTRACTOR = "iaa-analyzer.elements"
+
 # Tags to ignore in element sequence comparison
 IGNORE_TAGS = frozenset([
     # Add tags that should be skipped in comparison, e.g., 'pb', 'milestone'
@@ -81,65 +86,24 @@ class IAAAnalyzerPlugin(Plugin):
 
         variant_filter = params.get("variant")
 
-        from fastapi_app.lib.core.dependencies import get_db, get_file_storage
-        from fastapi_app.lib.repository.file_repository import FileRepository
-
         try:
-            db = get_db()
-            file_repo = FileRepository(db)
-            file_storage = get_file_storage()
-
-            # Get doc_id from the PDF's stable_id or file hash
-            doc_id = file_repo.get_doc_id_by_file_id(pdf_id)
-            if not doc_id:
+            loaded = await run_in_io_pool(
+                self._load_document_versions, pdf_id, variant_filter
+            )
+            if loaded is None:
                 return {
                     "error": "PDF file not found",
                     "html": "<p>PDF file not found.</p>",
                 }
 
-            # Get all TEI files for this document
-            all_files = file_repo.get_files_by_doc_id(doc_id)
-            tei_files = [f for f in all_files if f.file_type == "tei"]
-
-            # Filter by variant if specified (and not "all" or empty)
-            if variant_filter and variant_filter not in ("all", ""):
-                tei_files = [
-                    f
-                    for f in tei_files
-                    if getattr(f, "variant", None) == variant_filter
-                ]
-
-            if len(tei_files) < 2:
+            tei_count, versions = loaded
+            if tei_count < 2:
                 return {
                     "html": "<p>Need at least 2 TEI versions to compare. Found {} version(s).</p>".format(
-                        len(tei_files)
+                        tei_count
                     ),
                 }
 
-            # Extract metadata and element sequences
-            versions = []
-            for file_metadata in tei_files:
-                try:
-                    content_bytes = file_storage.read_file(file_metadata.id, "tei")
-                    if not content_bytes:
-                        logger.warning(f"Empty content for file {file_metadata.id}")
-                        continue
-
-                    xml_content = content_bytes.decode("utf-8")
-                    metadata = self._extract_metadata(xml_content, file_metadata)
-                    elements = self._extract_element_sequence(xml_content)
-
-                    versions.append(
-                        {
-                            "file_id": file_metadata.id,
-                            "metadata": metadata,
-                            "elements": elements,
-                        }
-                    )
-                except Exception as e:
-                    logger.error(f"Failed to parse TEI file {file_metadata.id}: {e}")
-                    continue
-
             if len(versions) < 2:
                 return {
                     "html": "<p>Need at least 2 valid TEI versions to compare. Found {} valid version(s).</p>".format(
@@ -147,8 +111,8 @@ class IAAAnalyzerPlugin(Plugin):
                     ),
                 }
 
-            # Compute pairwise agreements
-            comparisons = self._compute_pairwise_agreements(versions)
+            # Comparing the element sequences is CPU-bound
+            comparisons = await run_in_cpu_pool(compare_versions, versions)
 
             # Generate HTML table with session_id for diff links
             # Session ID is passed via params from the route handler
@@ -175,59 +139,48 @@ class IAAAnalyzerPlugin(Plugin):
                 "html": f"<p>Error analyzing inter-annotator agreement: {str(e)}</p>",
             }
 
-    def _extract_metadata(
-        self, xml_content: str, file_metadata: Any
-    ) -> dict[str, Any]:
+    def _load_document_versions(
+        self, pdf_id: str, variant_filter: str | None
+    ) -> tuple[int, list[dict[str, Any]]] | None:
         """
-        Extract document title and annotator from TEI header.
+        Load the versions of all TEI files of the document a PDF belongs to.
 
         Args:
-            xml_content: TEI XML content as string
-            file_metadata: File metadata object
+            pdf_id: PDF stable_id or file hash
+            variant_filter: Optional variant ('all' or empty for all variants)
 
         Returns:
-            Dictionary with title, annotator, annotator_id, and stable_id
+            Tuple of (number of TEI files, versions that could be parsed), or
+            None if the PDF is unknown
         """
-        try:
-            from fastapi_app.lib.utils.tei_utils import extract_tei_metadata, get_annotator_name
-
-            root = etree.fromstring(xml_content.encode("utf-8"))
+        from fastapi_app.lib.core.dependencies import (
+            get_db,
+            get_derived_data_cache,
+            get_file_storage,
+        )
+        from fastapi_app.lib.repository.file_repository import FileRepository
 
-            # Use existing utility to extract metadata
-            tei_metadata = extract_tei_metadata(root)
+        file_repo = FileRepository(get_db())
 
-            # Get title - prefer edition_title, fallback to title
-            title = tei_metadata.get("edition_title") or tei_metadata.get(
-                "title", "Untitled"
-            )
+        # Get doc_id from the PDF's stable_id or file hash
+        doc_id = file_repo.get_doc_id_by_file_id(pdf_id)
+        if not doc_id:
+            return None
 
-            # Extract last annotator from revisionDesc
-            ns = {"tei": "http://www.tei-c.org/ns/1.0"}
-            last_change_elem = root.find(
-                ".//tei:revisionDesc/tei:change[last()]", ns
-            )
-            annotator = "Unknown"
-            annotator_id = ""
-            if last_change_elem is not None:
-                who_attr = last_change_elem.get("who", "")
-                annotator_id = who_attr.lstrip("#")
-                annotator = get_annotator_name(root, who_attr)
+        # Get all TEI files for this document
+        all_files = file_repo.get_files_by_doc_id(doc_id)
+        tei_files = [f for f in all_files if f.file_type == "tei"]
 
-            return {
-                "title": title.strip() if title else "Untitled",
-                "annotator": annotator.strip() if annotator else "Unknown",
-                "annotator_id": annotator_id,
-                "stable_id": file_metadata.stable_id,
-            }
+        # Filter by variant if specified (and not "all" or empty)
+        if variant_filter and variant_filter not in ("all", ""):
+            tei_files = [
+                f
+                for f in tei_files
+                if getattr(f, "variant", None) == variant_filter
+            ]
 
-        except Exception as e:
-            logger.error(f"Error extracting metadata: {e}")
-            return {
-                "title": "Error",
-                "annotator": "Unknown",
-                "annotator_id": "",
-                "stable_id": file_metadata.stable_id,
-            }
+        versions = load_versions(tei_files, get_file_storage(), get_derived_data_cache())
+        return len(tei_files), versions
 
     def _extract_element_sequence(self, xml_content: str) -> list[dict[str, Any]]:
         """
@@ -241,60 +194,7 @@ class IAAAnalyzerPlugin(Plugin):
         """
         try:
             root = etree.fromstring(xml_content.encode("utf-8"))
-
-            ns = {"tei": "http://www.tei-c.org/ns/1.0"}
-            text_elem = root.find(".//tei:text", ns)
-
-            if text_elem is None:
-                logger.warning("No <text> element found in TEI document")
-                return []
-
-            sequence = []
-            # Traverse all descendants in document order
-            for elem in text_elem.iter():
-                if elem == text_elem:
-                    continue  # Skip the <text> element itself
-
-                # Skip non-element nodes (comments, processing instructions, etc.)
-                if not isinstance(elem.tag, str):
-                    continue
-
-                # Extract tag name without namespace
-                tag = etree.QName(elem).localname
-
-                # Skip ignored tags
-                if tag in IGNORE_TAGS:
-                    continue
-
-                # Normalize text and tail
-                text = self._normalize_text(elem.text)
-                tail = self._normalize_text(elem.tail)
-
-                # Extract ALL attributes except ignored ones
-                attrs = {}
-                for attr_name, attr_value in elem.attrib.items():
-                    # Handle namespaced attributes
-                    if '}' in attr_name:
-                        # Extract local name from {namespace}localname format
-                        ns_uri, local = attr_name.split('}')
-                        # Convert to prefix:local format for common namespaces
-                        if 'www.w3.org/XML' in ns_uri:
-                            full_name = f'xml:{local}'
-                        else:
-                            full_name = local
-                    else:
-                        full_name = attr_name
-
-                    # Skip ignored attributes
-                    if full_name not in IGNORE_ATTRIBUTES:
-                        attrs[full_name] = attr_value
-
-                sequence.append(
-                    {"tag": tag, "text": text, "tail": tail, "attrs": attrs}
-                )
-
-            return sequence
-
+            return extract_element_sequence(root)
         except Exception as e:
             logger.error(f"Error extracting element sequence: {e}")
             return []
@@ -309,10 +209,7 @@ class IAAAnalyzerPlugin(Plugin):
         Returns:
             Normalized text or None
         """
-        if not text:
-            return None
-        normalized = " ".join(text.split())
-        return normalized if normalized else None
+        return normalize_text(text)
 
     def _compute_pairwise_agreements(
         self, versions: list[dict[str, Any]]
@@ -489,3 +386,167 @@ class IAAAnalyzerPlugin(Plugin):
             .replace('"', "&quot;")
             .replace("'", "&#x27;")
         )
+
+
+def normalize_text(text: str | None) -> str | None:
+    """
+    Normalize text content: strip, collapse whitespace, return None if empty.
+
+    Args:
+        text: Text content to normalize
+
+    Returns:
+        Normalized text or None
+    """
+    if not text:
+        return None
+    normalized = " ".join(text.split())
+    return normalized if normalized else None
+
+
+@derived_extractor(ELEMENTS_EXTRACTOR, version=1)
+def extract_element_sequence(root: etree._Element) -> list[dict[str, Any]]:
+    """
+    Extract flattened sequence of element tokens from the <text> element.
+
+    Registered as derived data extractor, so that the sequence of each TEI
+    version is computed only once.
+
+    Args:
+        root: TEI root element
+
+    Returns:
+        List of element tokens with tag, text, tail, and attributes
+    """
+    ns = {"tei": "http://www.tei-c.org/ns/1.0"}
+    text_elem = root.find(".//tei:text", ns)
+
+    if text_elem is None:
+        logger.warning("No <text> element found in TEI document")
+        return []
+
+    sequence = []
+    # Traverse all descendants in document order
+    for elem in text_elem.iter():
+        if elem == text_elem:
+            continue  # Skip the <text> element itself
+
+        # Skip non-element nodes (comments, processing instructions, etc.)
+        if not isinstance(elem.tag, str):
+            continue
+
+        # Extract tag name without namespace
+        tag = etree.QName(elem).localname
+
+        # Skip ignored tags
+        if tag in IGNORE_TAGS:
+            continue
+
+        # Normalize text and tail
+        text = normalize_text(elem.text)
+        tail = normalize_text(elem.tail)
+
+        # Extract ALL attributes except ignored ones
+        attrs = {}
+        for attr_name, attr_value in elem.attrib.items():
+            # Handle namespaced attributes
+            if '}' in attr_name:
+                # Extract local name from {namespace}localname format
+                ns_uri, local = attr_name.split('}')
+                # Convert to prefix:local format for common namespaces
+                if 'www.w3.org/XML' in ns_uri:
+                    full_name = f'xml:{local}'
+                else:
+                    full_name = local
+            else:
+                full_name = attr_name
+
+            # Skip ignored attributes
+            if full_name not in IGNORE_ATTRIBUTES:
+                attrs[full_name] = attr_value
+
+        sequence.append(
+            {"tag": tag, "text": text, "tail": tail, "attrs": attrs}
+        )
+
+    return sequence
+
+
+def version_metadata(summary: dict[str, Any], file_metadata: Any) -> dict[str, Any]:
+    """
+    Build the title and last annotator of a version from its tei.summary.
+
+    Args:
+        summary: Derived tei.summary data of the TEI file
+        file_metadata: File metadata object
+
+    Returns:
+        Dictionary with title, annotator, annotator_id, and stable_id
+    """
+    # Get title - prefer edition_title, fallback to title
+    title = summary["edition_title"] or summary["title"]
+
+    # Last annotator from revisionDesc
+    annotator = "Unknown"
+    annotator_id = ""
+    if summary["changes"]:
+        last_change = summary["changes"][-1]
+        annotator_id = last_change["who"].lstrip("#")
+        annotator = last_change["annotator"]
+
+    return {
+        "title": title.strip() if title else "Untitled",
+        "annotator": annotator.strip() if annotator else "Unknown",
+        "annotator_id": annotator_id,
+        "stable_id": file_metadata.stable_id,
+    }
+
+
+def load_versions(
+    tei_files: list[Any], file_storage: Any, derived_cache: Any
+) -> list[dict[str, Any]]:
+    """
+    Load the metadata and element sequences of TEI versions from the derived data cache.
+
+    Args:
+        tei_files: File metadata objects of the TEI versions
+        file_storage: FileStorage for files without cached data
+        derived_cache: DerivedDataCache instance
+
+    Returns:
+        List of version dicts (file_id, metadata, elements) of the files that
+        could be read and parsed
+    """
+    file_ids = [f.id for f in tei_files]
+    summaries = derived_cache.get_many(file_ids, "tei.summary", file_storage)
+    sequences = derived_cache.get_many(file_ids, ELEMENTS_EXTRACTOR, file_storage)
+
+    versions = []
+    for file_metadata in tei_files:
+        summary = summaries.get(file_metadata.id)
+        if not summary:
+            logger.warning(f"Cannot read or parse TEI file {file_metadata.id}")
+            continue
+        versions.append(
+            {
+                "file_id": file_metadata.id,
+                "metadata": version_metadata(summary, file_metadata),
+                "elements": sequences.get(file_metadata.id) or [],
+            }
+        )
+    return versions
+
+
+def compare_versions(versions: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Compute pairwise agreements of TEI versions.
+
+    Module-level so that it can run in the CPU worker pool.
+
+    Args:
+        versions: Version dicts as returned by load_versions()
+
+    Returns:
+        List of comparisons
+    """
+    return IAAAnalyzerPlugin()._compute_pairwise_agreements(versions)
@@ -15,9 +15,11 @@ from lxml import etree
 from fastapi_app.lib.core.dependencies import (
     get_auth_manager,
     get_db,
+    get_derived_data_cache,
     get_file_storage,
     get_session_manager,
 )
+from fastapi_app.lib.core.executors import run_blocking
 from fastapi_app.lib.repository.file_repository import FileRepository
 from fastapi_app.plugins.iaa_analyzer.diff_utils import (
     escape_html,
@@ -39,7 +41,8 @@ _DIFF_VIEWER_CSS = (_PLUGIN_DIR / "diff-viewer.css").read_text(encoding="utf-8")
 
 
 @router.get("/export")
-async def export_csv(
+@run_blocking
+def export_csv(
     pdf: str = Query(..., description="PDF stable_id or file hash"),
     variant: str = Query("all", description="Model variant filter"),
 ):
@@ -53,7 +56,7 @@ async def export_csv(
     Returns:
         CSV file download
     """
-    from fastapi_app.plugins.iaa_analyzer.plugin import IAAAnalyzerPlugin
+    from fastapi_app.plugins.iaa_analyzer.plugin import IAAAnalyzerPlugin, load_versions
 
     try:
         db = get_db()
@@ -81,31 +84,9 @@ async def export_csv(
                 detail=f"Need at least 2 TEI versions to compare. Found {len(tei_files)} version(s).",
             )
 
-        # Reuse plugin methods to extract data
+        # Reuse plugin functions to load the versions
         plugin = IAAAnalyzerPlugin()
-        versions = []
-
-        for file_metadata in tei_files:
-            try:
-                content_bytes = file_storage.read_file(file_metadata.id, "tei")
-                if not content_bytes:
-                    logger.warning(f"Empty content for file {file_metadata.id}")
-                    continue
-
-                xml_content = content_bytes.decode("utf-8")
-                metadata = plugin._extract_metadata(xml_content, file_metadata)
-                elements = plugin._extract_element_sequence(xml_content)
-
-                versions.append(
-                    {
-                        "file_id": file_metadata.id,
-                        "metadata": metadata,
-                        "elements": elements,
-                    }
-                )
-            except Exception as e:
-                logger.error(f"Failed to parse TEI file {file_metadata.id}: {e}")
-                continue
+        versions = load_versions(tei_files, file_storage, get_derived_data_cache())
 
         if len(versions) < 2:
             raise HTTPException(
@@ -297,7 +278,8 @@ def _generate_diff_html(
 
 
 @router.get("/diff")
-async def show_diff(
+@run_blocking
+def show_diff(
     stable_id1: str = Query(..., description="First document stable ID"),
     stable_id2: str = Query(..., description="Second document stable ID"),
     content_xpath: str = Query(".//tei:text", description="XPath to content element to compare"),
@@ -132,23 +132,19 @@ class KisskiService(ExtractionService):
             Physical file path or None if not found
         """
         try:
-            from fastapi_app.lib.core.dependencies import get_db
+            from fastapi_app.lib.core.dependencies import get_db, get_file_storage
             from fastapi_app.lib.repository.file_repository import FileRepository
-            from fastapi_app.config import get_settings
-            from fastapi_app.lib.utils.hash_utils import get_storage_path
 
             db = get_db()
             repo = FileRepository(db)
-            settings = get_settings()
 
             file_metadata = repo.get_file_by_stable_id(stable_id)
             if file_metadata and file_metadata.file_type == 'pdf':
-                storage_root = settings.data_root / "files"
-                file_path = get_storage_path(storage_root, file_metadata.id, 'pdf')
-                if file_path.exists():
+                file_path = get_file_storage().get_file_path(file_metadata.id, 'pdf')
+                if file_path is not None:
                     return str(file_path)
                 else:
-                    logger.warning(f"PDF file not found at path: {file_path}")
+                    logger.warning(f"PDF file not found in storage: {file_metadata.id[:16]}")
             else:
                 logger.warning(f"No PDF file found for stable_id: {stable_id}")
         except Exception as e:
@@ -13,12 +13,15 @@ from fastapi.responses import HTMLResponse
 from fastapi_app.lib.core.dependencies import (
     get_auth_manager,
     get_db,
+    get_derived_data_cache,
+    get_doi_metadata_cache,
     get_file_storage,
     get_session_manager,
     get_sse_service,
 )
 from fastapi_app.lib.sse.sse_utils import ProgressBar, send_notification
 from fastapi_app.lib.repository.file_repository import FileRepository
+from fastapi_app.lib.services.doi_resolver import DoiResolver
 from fastapi_app.lib.services.metadata_update_utils import update_tei_metadata
 
 logger = logging.getLogger(__name__)
@@ -247,6 +250,8 @@ async def execute_update(
     sse_service=Depends(get_sse_service),
     db=Depends(get_db),
     file_storage=Depends(get_file_storage),
+    doi_metadata_cache=Depends(get_doi_metadata_cache),
+    derived_cache=Depends(get_derived_data_cache),
 ):
     """
     Execute metadata update with SSE progress tracking.
@@ -307,7 +312,9 @@ async def execute_update(
             force=force,
             extraction_fallback=extraction_fallback,
             progress_callback=on_progress,
-            cancellation_check=is_cancelled
+            cancellation_check=is_cancelled,
+            doi_resolver=DoiResolver(doi_metadata_cache, logger=logger),
+            derived_cache=derived_cache
         )
         logger.info(f"Metadata update complete: {stats}")
 
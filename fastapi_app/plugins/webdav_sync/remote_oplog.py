@@ -0,0 +1,399 @@
+"""
+Segmented operation log for WebDAV synchronization.
+
+The log on the WebDAV server consists of:
+
+- immutable segment files, ``oplog/segments/{first_seq}-{last_seq}.jsonl``,
+  each holding the ops one client appended in one sync cycle (one JSON
+  object per line)
+- a small head, ``oplog/head.json``, with the highest seq, the list of
+  segments and the client registry (last applied seq, last seen, active
+  locks)
+
+A sync cycle downloads the head and only the segments with ops newer than
+the client's last_applied_seq, and uploads the head plus one new segment
+with its own ops - instead of round-tripping the whole log.
+
+Writers are serialized by the sync lock (see SyncService), which makes
+assigning seqs from the head safe.  Segments are uploaded before the head,
+so the head never refers to a missing segment; a segment that is not in the
+head (after an interrupted sync) is ignored and overwritten by the next
+writer.  Like queue.db before, a missing head means "no ops yet".
+
+A queue.db written by earlier versions (see remote_queue.py) is imported on
+first use and left in place.
+"""
+
+import json
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, cast
+
+from webdav4.fsspec import WebdavFileSystem
+
+from .remote_queue import RemoteQueueManager
+
+# Version of the head format; clients refuse heads of newer formats
+HEAD_FORMAT = 1
+
+# Directory of the log, relative to the remote root
+OPLOG_DIR = "oplog"
+
+_SEGMENT_NAME = re.compile(r"^(\d+)-(\d+)\.jsonl$")
+
+
+def segment_name(first_seq: int, last_seq: int) -> str:
+    """Return the file name of the segment with the given seq range."""
+    return f"{first_seq:012d}-{last_seq:012d}.jsonl"
+
+
+def parse_segment_name(name: str) -> Tuple[int, int]:
+    """
+    Return the (first_seq, last_seq) range of a segment file name.
+
+    Raises:
+        ValueError: If name is not a segment file name
+    """
+    match = _SEGMENT_NAME.match(name)
+    if not match:
+        raise ValueError(f"Not a segment file name: {name}")
+    return int(match.group(1)), int(match.group(2))
+
+
+def _empty_head() -> Dict[str, Any]:
+    return {"format": HEAD_FORMAT, "max_seq": 0, "segments": [], "clients": {}}
+
+
+class RemoteOpLog:
+    """
+    Reads and appends to the segmented operation log on the WebDAV server.
+
+    Has the same op and client methods as RemoteQueueManager.  Call load()
+    first, and commit() to upload the changes.
+
+    Thread-safety: not thread-safe.  Each sync cycle creates its own instance.
+    """
+
+    def __init__(self, webdav_config: Dict[str, str], logger=None, fs=None):
+        """
+        Args:
+            webdav_config: WebDAV settings (base_url, username, password, remote_root)
+            logger: Optional logger
+            fs: fsspec file system to use instead of connecting to base_url
+        """
+        self.logger = logger
+        self.webdav_config = webdav_config
+        self.remote_root = webdav_config["remote_root"].rstrip("/")
+        self.oplog_root = f"{self.remote_root}/{OPLOG_DIR}"
+        self.head_path = f"{self.oplog_root}/head.json"
+        self.segments_root = f"{self.oplog_root}/segments"
+
+        self.fs = fs or WebdavFileSystem(
+            webdav_config["base_url"],
+            auth=(webdav_config["username"], webdav_config["password"]),
+        )
+
+        self._head: Optional[Dict[str, Any]] = None
+        self._ops: List[Dict[str, Any]] = []
+        self._loaded_since: Optional[int] = None
+        self._new_segments: Dict[str, List[Dict[str, Any]]] = {}
+        self._removed_segments: List[str] = []
+        self._dirty = False
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def load(self, since_seq: Optional[int] = None) -> None:
+        """
+        Download the head and the segments with ops after since_seq.
+
+        Args:
+            since_seq: Only ops with a greater seq are downloaded; None
+                downloads the head only (client registry and locks).
+
+        Raises:
+            RuntimeError: If the head was written by a newer version
+        """
+        head = self._read_head()
+        if head is None:
+            head = self._import_legacy_queue() or _empty_head()
+        elif head.get("format", 0) > HEAD_FORMAT:
+            raise RuntimeError(
+                f"Sync log format {head['format']} is newer than supported ({HEAD_FORMAT})"
+            )
+        self._head = head
+        self._loaded_since = since_seq
+        self._ops = []
+        if since_seq is None:
+            return
+
+        downloaded = 0
+        for name in head["segments"]:
+            _, last_seq = parse_segment_name(name)
+            if last_seq <= since_seq:
+                continue
+            ops = self._new_segments.get(name)
+            if ops is None:
+                ops = self._read_segment(name)
+                downloaded += 1
+            self._ops.extend(op for op in ops if op["seq"] > since_seq)
+        self._ops.sort(key=lambda op: op["seq"])
+
+        if self.logger:
+            self.logger.info(
+                f"Loaded sync log head (seq {head['max_seq']}) and {downloaded} "
+                f"of {len(head['segments'])} segment(s) since seq {since_seq}"
+            )
+
+    def commit(self) -> None:
+        """
+        Upload the new segment(s) and the head, then delete compacted segments.
+
+        Does nothing if nothing has changed since load().
+        """
+        self._require_loaded()
+        if not self._dirty:
+            return
+
+        if self._new_segments and not self.fs.exists(self.segments_root):
+            self.fs.makedirs(self.segments_root, exist_ok=True)
+        elif not self.fs.exists(self.oplog_root):
+            self.fs.makedirs(self.oplog_root, exist_ok=True)
+
+        for name, ops in self._new_segments.items():
+            content = b"".join(
+                json.dumps(op, separators=(",", ":")).encode("utf-8") + b"\n" for op in ops
+            )
+            self._write_file(f"{self.segments_root}/{name}", content)
+
+        self._write_file(self.head_path, json.dumps(self._head, indent=1).encode("utf-8"))
+
+        # Only after the head no longer refers to them
+        for name in self._removed_segments:
+            try:
+                self.fs.rm(f"{self.segments_root}/{name}")
+            except Exception as exc:
+                if self.logger:
+                    self.logger.warning(f"Failed to delete compacted segment {name}: {exc}")
+
+        if self.logger:
+            self.logger.info(
+                f"Uploaded sync log head and {len(self._new_segments)} segment(s), "
+                f"deleted {len(self._removed_segments)} compacted segment(s)"
+            )
+        self._new_segments = {}
+        self._removed_segments = []
+        self._dirty = False
+
+    # ------------------------------------------------------------------
+    # Client registry
+    # ------------------------------------------------------------------
+
+    def register_client(self, client_id: str, active_locks: str = "{}") -> None:
+        """Insert or refresh this client's entry in the client registry.
+
+        Args:
+            client_id: This client's UUID.
+            active_locks: JSON string mapping stable_id → lock info dict.
+        """
+        self._require_loaded()
+        client = self._head["clients"].setdefault(client_id, {"last_applied_seq": 0})  # type: ignore[index]
+        client["last_seen_at"] = datetime.now(timezone.utc).isoformat()
+        client["active_locks"] = active_locks
+        self._dirty = True
+
+    def get_all_client_locks(self, own_client_id: str) -> Dict[str, str]:
+        """Return active_locks JSON strings for all clients except own.
+
+        Returns:
+            Dict mapping client_id → active_locks JSON string.
+        """
+        self._require_loaded()
+        return {
+            client_id: client.get("active_locks", "{}")
+            for client_id, client in self._head["clients"].items()  # type: ignore[index]
+            if client_id != own_client_id
+        }
+
+    def update_client_seq(self, client_id: str, last_seq: int) -> None:
+        """Record the highest seq this client has applied."""
+        self._require_loaded()
+        client = self._head["clients"].setdefault(client_id, {"active_locks": "{}"})  # type: ignore[index]
+        client["last_applied_seq"] = last_seq
+        client["last_seen_at"] = datetime.now(timezone.utc).isoformat()
+        self._dirty = True
+
+    def get_client_seq(self, client_id: str) -> int:
+        """Return the last_applied_seq recorded for this client (0 if unknown)."""
+        self._require_loaded()
+        client = self._head["clients"].get(client_id)  # type: ignore[index]
+        return int(client["last_applied_seq"]) if client else 0
+
+    # ------------------------------------------------------------------
+    # Operation log
+    # ------------------------------------------------------------------
+
+    def get_pending_ops(self, own_client_id: str, since_seq: int) -> List[Dict[str, Any]]:
+        """
+        Return ops produced by other clients with seq > since_seq, ordered by seq.
+
+        Args:
+            own_client_id: This instance's client ID (ops from self are skipped).
+            since_seq: Only return ops with seq strictly greater than this
+                value; must not be lower than the since_seq passed to load().
+
+        Returns:
+            List of op dicts with keys: seq, client_id, op_type, stable_id,
+            file_id, file_data (str or None), created_at.
+
+        Raises:
+            ValueError: If the ops after since_seq were not loaded
+        """
+        self._require_loaded()
+        if self._loaded_since is None or since_seq < self._loaded_since:
+            raise ValueError(f"Ops after seq {since_seq} were not loaded")
+        return [
+            dict(op) for op in self._ops
+            if op["seq"] > since_seq and op["client_id"] != own_client_id
+        ]
+
+    def append_ops(self, ops: List[Dict[str, Any]]) -> int:
+        """
+        Add ops to the log as a new segment, assigning their seqs.
+
+        Args:
+            ops: List of dicts with keys: client_id, op_type, stable_id,
+                 file_id, file_data (str or None), created_at.
+
+        Returns:
+            The seq of the last appended op, or the current max seq if ops is empty.
+        """
+        self._require_loaded()
+        if not ops:
+            return self.get_max_seq()
+
+        first_seq = self._head["max_seq"] + 1  # type: ignore[index]
+        records = [
+            {
+                "seq": first_seq + i,
+                "client_id": op["client_id"],
+                "op_type": op["op_type"],
+                "stable_id": op["stable_id"],
+                "file_id": op["file_id"],
+                "file_data": op.get("file_data"),
+                "created_at": op["created_at"],
+            }
+            for i, op in enumerate(ops)
+        ]
+        last_seq = records[-1]["seq"]
+        self._add_segment(records)
+        self._ops.extend(records)
+        self._head["max_seq"] = last_seq  # type: ignore[index]
+        return last_seq
+
+    def get_max_seq(self) -> int:
+        """Return the highest seq ever assigned, or 0 if the log is empty."""
+        self._require_loaded()
+        return int(self._head["max_seq"])  # type: ignore[index]
+
+    def compact(self, stale_after_days: int = 7) -> None:
+        """
+        Drop the segments that all active clients have already applied, and
+        purge clients that have been absent for more than stale_after_days days.
+
+        Compaction is best-effort: if it fails the sync cycle still succeeds.
+        """
+        self._require_loaded()
+        try:
+            cutoff = (
+                datetime.now(timezone.utc) - timedelta(days=stale_after_days)
+            ).isoformat()
+            clients = self._head["clients"]  # type: ignore[index]
+            # Drop stale clients first so their watermark doesn't block compaction.
+            for client_id in [cid for cid, c in clients.items() if c.get("last_seen_at", "") < cutoff]:
+                del clients[client_id]
+                self._dirty = True
+
+            min_seq = min((int(c["last_applied_seq"]) for c in clients.values()), default=0)
+            if min_seq <= 0:
+                return
+            kept = []
+            for name in self._head["segments"]:  # type: ignore[index]
+                if parse_segment_name(name)[1] > min_seq:
+                    kept.append(name)
+                elif self._new_segments.pop(name, None) is None:
+                    self._removed_segments.append(name)
+            if len(kept) != len(self._head["segments"]):  # type: ignore[index]
+                self._head["segments"] = kept  # type: ignore[index]
+                self._dirty = True
+        except Exception as exc:
+            if self.logger:
+                self.logger.warning(f"Compaction failed (non-fatal): {exc}")
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _require_loaded(self) -> None:
+        if self._head is None:
+            raise RuntimeError("Sync log not loaded")
+
+    def _add_segment(self, records: List[Dict[str, Any]]) -> None:
+        name = segment_name(records[0]["seq"], records[-1]["seq"])
+        self._new_segments[name] = records
+        self._head["segments"].append(name)  # type: ignore[index]
+        self._dirty = True
+
+    def _read_file(self, path: str) -> bytes:
+        with cast(BinaryIO, self.fs.open(path, "rb")) as f:
+            return f.read()
+
+    def _write_file(self, path: str, content: bytes) -> None:
+        with cast(BinaryIO, self.fs.open(path, "wb")) as f:
+            f.write(content)
+
+    def _read_head(self) -> Optional[Dict[str, Any]]:
+        if not self.fs.exists(self.head_path):
+            return None
+        return json.loads(self._read_file(self.head_path).decode("utf-8"))
+
+    def _read_segment(self, name: str) -> List[Dict[str, Any]]:
+        content = self._read_file(f"{self.segments_root}/{name}").decode("utf-8")
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+    def _import_legacy_queue(self) -> Optional[Dict[str, Any]]:
+        """Convert a queue.db of earlier versions into a head and one segment."""
+        legacy = RemoteQueueManager(self.webdav_config, self.logger, fs=self.fs)
+        if not self.fs.exists(legacy.remote_db_path):
+            return None
+
+        if self.logger:
+            self.logger.info("Importing queue.db into the segmented sync log")
+        legacy.connect(legacy.download())
+        try:
+            ops = legacy.get_pending_ops("", 0)
+            clients = legacy.get_clients()
+        finally:
+            legacy.disconnect()
+
+        self._head = {
+            "format": HEAD_FORMAT,
+            # Seqs are never reused, even of ops that were compacted away
+            "max_seq": max(
+                [op["seq"] for op in ops] + [c["last_applied_seq"] for c in clients], default=0
+            ),
+            "segments": [],
+            "clients": {
+                c["client_id"]: {
+                    "last_applied_seq": c["last_applied_seq"],
+                    "last_seen_at": c["last_seen_at"],
+                    "active_locks": c["active_locks"],
+                }
+                for c in clients
+            },
+        }
+        if ops:
+            self._add_segment(ops)
+        self._dirty = True
+        return self._head
@@ -9,6 +9,10 @@ delete) from every client; on sync a client applies all ops since its own
 last_applied_seq that were produced by other clients, then appends its own
 pending ops.  Because the log is append-only, an empty or missing queue.db
 means "no ops yet" — it never destroys existing client state.
+
+Superseded by the segmented log in remote_oplog.py, which no longer
+round-trips the whole database on every sync; kept to import the queue.db
+of earlier versions.
 """
 
 import gc
@@ -55,12 +59,12 @@ class RemoteQueueManager:
     Thread-safety: not thread-safe.  Each sync cycle creates its own instance.
     """
 
-    def __init__(self, webdav_config: Dict[str, str], logger=None):
+    def __init__(self, webdav_config: Dict[str, str], logger=None, fs=None):
         self.logger = logger
         self.remote_root = webdav_config["remote_root"].rstrip("/")
         self.remote_db_path = f"{self.remote_root}/queue.db"
 
-        self.fs = WebdavFileSystem(
+        self.fs = fs or WebdavFileSystem(
             webdav_config["base_url"],
             auth=(webdav_config["username"], webdav_config["password"]),
         )
@@ -208,6 +212,15 @@ class RemoteQueueManager:
         )
         self._conn.commit()  # type: ignore[union-attr]
 
+    def get_clients(self) -> List[Dict[str, Any]]:
+        """Return all client entries as dicts with keys: client_id,
+        last_applied_seq, last_seen_at, active_locks."""
+        self._require_conn()
+        rows = self._conn.execute(  # type: ignore[union-attr]
+            "SELECT client_id, last_applied_seq, last_seen_at, active_locks FROM clients"
+        ).fetchall()
+        return [dict(r) for r in rows]
+
     def get_client_seq(self, client_id: str) -> int:
         """Return the last_applied_seq stored for this client in the DB (0 if unknown)."""
         self._require_conn()
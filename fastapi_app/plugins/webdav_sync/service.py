@@ -1,16 +1,16 @@
 """
 WebDAV synchronization service — operation-log edition.
 
-Uses an append-only operation log (queue.db) shared on WebDAV instead of a
-mutable metadata snapshot.  Each sync cycle:
+Uses an append-only, segmented operation log shared on WebDAV (see
+remote_oplog.py) instead of a mutable metadata snapshot.  Each sync cycle:
 
   1. Lock
-  2. Download queue.db
+  2. Download the log head and the segments newer than last_applied_seq
   3. Register own client ID
   4. Apply ops from other clients (download files, update local DB)
-  5. Append own pending ops (upload files, record in log)
-  6. Compact old ops
-  7. Upload queue.db + update version.txt
+  5. Append own pending ops (upload files, record in a new segment)
+  6. Compact old segments
+  7. Upload the new segment and the head + update version.txt
   8. Release lock
 """
 
@@ -38,7 +38,7 @@ from fastapi_app.lib.sync.models import (
 )
 from fastapi_app.lib.core.locking import get_all_active_locks
 from fastapi_app.lib.utils.hash_utils import get_file_extension, get_storage_path
-from .remote_queue import RemoteQueueManager
+from .remote_oplog import RemoteOpLog
 
 # Remote lock TTL: local timeout + one full sync-cycle buffer
 _REMOTE_LOCK_TTL_SECONDS = 90 + 360
@@ -59,7 +59,7 @@ class SyncService(SyncServiceBase):
     Operation-log–based WebDAV sync service.
 
     Key properties vs the previous metadata.db approach:
-    - Append-only log: an empty or missing queue.db means "no ops yet", never
+    - Append-only log: an empty or missing log means "no ops yet", never
       "all files deleted".
     - Seq counter only moves forward; version regression is impossible.
     - A fresh instance with an empty local DB simply applies all ops in the log
@@ -182,82 +182,77 @@ class SyncService(SyncServiceBase):
             try:
                 own_client_id = self._get_or_create_client_id()
 
-                send_progress(20, "Downloading sync queue...")
-                queue_mgr = RemoteQueueManager(self.webdav_config, self.logger)
-                queue_db_path = queue_mgr.download()
-                queue_mgr.connect(queue_db_path)
+                last_seq = int(
+                    self.file_repo.get_sync_metadata("last_applied_seq") or "0"
+                )
+
+                send_progress(20, "Downloading sync log...")
+                oplog = RemoteOpLog(self.webdav_config, self.logger, fs=self.fs)
+                oplog.load(since_seq=last_seq)
 
+                # Serialize own active locks so other instances can see them
+                own_active_locks: Dict[str, Any] = {}
+                if self.db_dir:
+                    try:
+                        raw = get_all_active_locks(self.db_dir, self.logger or __import__('logging').getLogger(__name__))
+                        now_iso = datetime.now(timezone.utc).isoformat()
+                        own_active_locks = {
+                            stable_id: {"acquired_at": now_iso, "updated_at": now_iso}
+                            for stable_id in raw
+                        }
+                    except Exception:
+                        pass
+                oplog.register_client(own_client_id, json.dumps(own_active_locks))
+
+                # Cache remote lock state from other clients
                 try:
-                    # Serialize own active locks so other instances can see them
-                    own_active_locks: Dict[str, Any] = {}
-                    if self.db_dir:
+                    remote_client_locks = oplog.get_all_client_locks(own_client_id)
+                    merged_remote_locks: Dict[str, Any] = {}
+                    for locks_json in remote_client_locks.values():
                         try:
-                            raw = get_all_active_locks(self.db_dir, self.logger or __import__('logging').getLogger(__name__))
-                            now_iso = datetime.now(timezone.utc).isoformat()
-                            own_active_locks = {
-                                stable_id: {"acquired_at": now_iso, "updated_at": now_iso}
-                                for stable_id in raw
-                            }
-                        except Exception:
+                            client_locks = json.loads(locks_json) if locks_json else {}
+                            merged_remote_locks.update(client_locks)
+                        except (json.JSONDecodeError, TypeError):
                             pass
-                    queue_mgr.register_client(own_client_id, json.dumps(own_active_locks))
-
-                    # Cache remote lock state from other clients
-                    try:
-                        remote_client_locks = queue_mgr.get_all_client_locks(own_client_id)
-                        merged_remote_locks: Dict[str, Any] = {}
-                        for locks_json in remote_client_locks.values():
-                            try:
-                                client_locks = json.loads(locks_json) if locks_json else {}
-                                merged_remote_locks.update(client_locks)
-                            except (json.JSONDecodeError, TypeError):
-                                pass
-                        self.file_repo.set_remote_locks(merged_remote_locks)
-                    except Exception as exc:
-                        if self.logger:
-                            self.logger.warning(f"Failed to cache remote locks (non-fatal): {exc}")
-
-                    last_seq = int(
-                        self.file_repo.get_sync_metadata("last_applied_seq") or "0"
-                    )
-
-                    pending_ops = queue_mgr.get_pending_ops(own_client_id, last_seq)
+                    self.file_repo.set_remote_locks(merged_remote_locks)
+                except Exception as exc:
                     if self.logger:
-                        self.logger.debug(
-                            f"Pending ops from other clients: {len(pending_ops)} "
-                            f"(since seq {last_seq})"
-                        )
+                        self.logger.warning(f"Failed to cache remote locks (non-fatal): {exc}")
 
-                    if pending_ops:
-                        send_progress(30, f"Applying {len(pending_ops)} remote op(s)...")
-                        self._apply_ops(pending_ops, summary, client_id)
-                    else:
-                        send_progress(30, "No remote changes")
+                pending_ops = oplog.get_pending_ops(own_client_id, last_seq)
+                if self.logger:
+                    self.logger.debug(
+                        f"Pending ops from other clients: {len(pending_ops)} "
+                        f"(since seq {last_seq})"
+                    )
 
-                    own_ops = self._collect_own_ops(own_client_id, summary, client_id)
-                    if self.logger:
-                        self.logger.debug(f"Own ops to append: {len(own_ops)}")
-                    if own_ops:
-                        send_progress(60, f"Uploading {sum(1 for o in own_ops if o['op_type'] == 'upsert')} local change(s)...")
-                    else:
-                        send_progress(60, "No local changes to upload")
-                    max_seq = queue_mgr.append_ops(own_ops)
+                if pending_ops:
+                    send_progress(30, f"Applying {len(pending_ops)} remote op(s)...")
+                    self._apply_ops(pending_ops, summary, client_id)
+                else:
+                    send_progress(30, "No remote changes")
 
-                    queue_mgr.update_client_seq(own_client_id, max_seq)
-                    queue_mgr.compact()
+                own_ops = self._collect_own_ops(own_client_id, summary, client_id)
+                if self.logger:
+                    self.logger.debug(f"Own ops to append: {len(own_ops)}")
+                if own_ops:
+                    send_progress(60, f"Uploading {sum(1 for o in own_ops if o['op_type'] == 'upsert')} local change(s)...")
+                else:
+                    send_progress(60, "No local changes to upload")
+                max_seq = oplog.append_ops(own_ops)
 
-                    send_progress(90, "Uploading sync queue...")
-                    queue_mgr.upload(queue_db_path)
+                oplog.update_client_seq(own_client_id, max_seq)
+                oplog.compact()
 
-                    self._set_remote_version(max_seq)
-                    self.file_repo.set_sync_metadata("last_applied_seq", str(max_seq))
-                    self.file_repo.set_sync_metadata(
-                        "last_sync_time", datetime.now(timezone.utc).isoformat()
-                    )
-                    summary.new_version = max_seq
+                send_progress(90, "Uploading sync log...")
+                oplog.commit()
 
-                finally:
-                    queue_mgr.disconnect()
+                self._set_remote_version(max_seq)
+                self.file_repo.set_sync_metadata("last_applied_seq", str(max_seq))
+                self.file_repo.set_sync_metadata(
+                    "last_sync_time", datetime.now(timezone.utc).isoformat()
+                )
+                summary.new_version = max_seq
 
             finally:
                 self._release_lock()
@@ -276,11 +271,11 @@ class SyncService(SyncServiceBase):
         return summary
 
     def sync_locks(self) -> None:
-        """Push own current lock state to queue.db without a full sync.
+        """Push own current lock state to the sync log without a full sync.
 
-        Downloads queue.db, updates this client's active_locks column, also
+        Downloads the log head only, updates this client's active_locks, also
         reads other clients' lock state to refresh the local cache, then
-        uploads.  No file transfers or op processing occurs.
+        uploads the head.  No file transfers or op processing occurs.
 
         Skips silently if the sync lock cannot be acquired (another sync is
         already running).
@@ -301,28 +296,24 @@ class SyncService(SyncServiceBase):
                 for stable_id in raw
             }
 
-            queue_mgr = RemoteQueueManager(self.webdav_config, self.logger)
-            queue_db_path = queue_mgr.download()
-            queue_mgr.connect(queue_db_path)
-            try:
-                queue_mgr.register_client(own_client_id, json.dumps(own_active_locks))
+            oplog = RemoteOpLog(self.webdav_config, self.logger, fs=self.fs)
+            oplog.load()
+            oplog.register_client(own_client_id, json.dumps(own_active_locks))
 
-                # Refresh remote lock cache while we have the DB
-                try:
-                    remote_client_locks = queue_mgr.get_all_client_locks(own_client_id)
-                    merged: Dict[str, Any] = {}
-                    for locks_json in remote_client_locks.values():
-                        try:
-                            merged.update(json.loads(locks_json) if locks_json else {})
-                        except (json.JSONDecodeError, TypeError):
-                            pass
-                    self.file_repo.set_remote_locks(merged)
-                except Exception as exc:
-                    _log.debug(f"sync_locks: remote cache refresh failed (non-fatal): {exc}")
+            # Refresh remote lock cache while we have the head
+            try:
+                remote_client_locks = oplog.get_all_client_locks(own_client_id)
+                merged: Dict[str, Any] = {}
+                for locks_json in remote_client_locks.values():
+                    try:
+                        merged.update(json.loads(locks_json) if locks_json else {})
+                    except (json.JSONDecodeError, TypeError):
+                        pass
+                self.file_repo.set_remote_locks(merged)
+            except Exception as exc:
+                _log.debug(f"sync_locks: remote cache refresh failed (non-fatal): {exc}")
 
-                queue_mgr.upload(queue_db_path)
-            finally:
-                queue_mgr.disconnect()
+            oplog.commit()
         finally:
             self._release_lock()
 
@@ -401,9 +392,9 @@ class SyncService(SyncServiceBase):
             file_type = (json.loads(op["file_data"]) if op.get("file_data") else {}).get(
                 "file_type", "tei"
             )
-            local_path = get_storage_path(self.file_storage.data_root, file_id, file_type)
-            if local_path.exists():
+            if self.file_storage.file_exists(file_id, file_type):
                 return
+            local_path = get_storage_path(self.file_storage.data_root, file_id, file_type)
             remote_path = self._get_remote_file_path(file_id, file_type)
             self._download_file(remote_path, local_path)
 
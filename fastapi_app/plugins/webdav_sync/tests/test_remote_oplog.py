@@ -0,0 +1,223 @@
+"""
+Unit tests for the segmented WebDAV sync log.
+
+Tests:
+- Appending ops writes one immutable segment and the head
+- A client downloads only the segments newer than its last_applied_seq
+- Head-only loads for lock propagation
+- Compaction removes segments applied by all clients and purges stale clients
+- Segments of interrupted syncs are ignored and overwritten
+- Import of the queue.db of earlier versions
+
+Runs against an in-memory stand-in for the WebDAV server.
+
+@testCovers fastapi_app/plugins/webdav_sync/remote_oplog.py
+"""
+
+import io
+import json
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from fastapi_app.plugins.webdav_sync.remote_oplog import RemoteOpLog, segment_name
+from fastapi_app.plugins.webdav_sync.remote_queue import QUEUE_SCHEMA
+
+WEBDAV_CONFIG = {'base_url': 'http://x', 'username': 'u', 'password': 'p', 'remote_root': '/r'}
+HEAD_PATH = '/r/oplog/head.json'
+SEGMENTS_ROOT = '/r/oplog/segments'
+
+
+class MemoryWebdavFS:
+    """In-memory WebDAV file system that records transfers."""
+
+    def __init__(self):
+        self.files = {}
+        self.reads = []
+        self.writes = []
+
+    def exists(self, path):
+        prefix = path.rstrip('/') + '/'
+        return path in self.files or any(p.startswith(prefix) for p in self.files)
+
+    def makedirs(self, path, exist_ok=False):
+        pass
+
+    def rm(self, path):
+        del self.files[path]
+
+    def open(self, path, mode='rb'):
+        if 'r' in mode:
+            if path not in self.files:
+                raise FileNotFoundError(path)
+            self.reads.append(path)
+            return io.BytesIO(self.files[path])
+        fs = self
+
+        class Writer(io.BytesIO):
+            def close(self):
+                fs.files[path] = self.getvalue()
+                fs.writes.append(path)
+                super().close()
+
+        return Writer()
+
+    def segments(self):
+        return sorted(p.rsplit('/', 1)[1] for p in self.files if p.startswith(SEGMENTS_ROOT + '/'))
+
+
+def make_op(client_id: str, stable_id: str, op_type: str = 'upsert') -> dict:
+    return {
+        'client_id': client_id,
+        'op_type': op_type,
+        'stable_id': stable_id,
+        'file_id': f'hash-{stable_id}',
+        'file_data': json.dumps({'stable_id': stable_id}) if op_type == 'upsert' else None,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+    }
+
+
+class TestRemoteOpLog(unittest.TestCase):
+    """Test the segmented operation log."""
+
+    def setUp(self):
+        self.fs = MemoryWebdavFS()
+
+    def sync(self, client_id: str, since_seq: int, stable_ids=()) -> tuple:
+        """Run the log part of a sync cycle; returns (pending ops, new seq)."""
+        oplog = RemoteOpLog(WEBDAV_CONFIG, fs=self.fs)
+        oplog.load(since_seq=since_seq)
+        oplog.register_client(client_id)
+        pending = oplog.get_pending_ops(client_id, since_seq)
+        max_seq = oplog.append_ops([make_op(client_id, s) for s in stable_ids])
+        oplog.update_client_seq(client_id, max_seq)
+        oplog.compact()
+        oplog.commit()
+        return pending, max_seq
+
+    def test_empty_log(self):
+        oplog = RemoteOpLog(WEBDAV_CONFIG, fs=self.fs)
+        oplog.load(since_seq=0)
+        self.assertEqual(oplog.get_pending_ops('a', 0), [])
+        self.assertEqual(oplog.get_max_seq(), 0)
+        self.assertEqual(oplog.append_ops([]), 0)
+
+    def test_append_writes_segment_and_head(self):
+        self.sync('b', 0)
+        _, max_seq = self.sync('a', 0, ['s1', 's2'])
+
+        self.assertEqual(max_seq, 2)
+        self.assertEqual(self.fs.segments(), [segment_name(1, 2)])
+        self.assertEqual(self.fs.writes[-1], HEAD_PATH)
+        head = json.loads(self.fs.files[HEAD_PATH])
+        self.assertEqual((head['max_seq'], head['segments']), (2, [segment_name(1, 2)]))
+        self.assertEqual(head['clients']['a']['last_applied_seq'], 2)
+
+    def test_downloads_only_new_segments(self):
+        self.sync('b', 0)
+        self.sync('a', 0, ['s1'])
+        pending, b_seq = self.sync('b', 0, ['s2'])
+        self.assertEqual([op['stable_id'] for op in pending], ['s1'])
+
+        # a has applied seq 1; only b's segment is downloaded, and only
+        # a's segment and the head are uploaded
+        self.fs.reads.clear()
+        self.fs.writes.clear()
+        pending, a_seq = self.sync('a', 1, ['s3'])
+
+        self.assertEqual([(op['seq'], op['stable_id']) for op in pending], [(2, 's2')])
+        self.assertEqual(a_seq, 3)
+        self.assertEqual(self.fs.reads, [HEAD_PATH, f'{SEGMENTS_ROOT}/{segment_name(2, 2)}'])
+        self.assertEqual(self.fs.writes, [f'{SEGMENTS_ROOT}/{segment_name(3, 3)}', HEAD_PATH])
+
+    def test_head_only_load(self):
+        self.sync('a', 0, ['s1'])
+        self.fs.reads.clear()
+
+        oplog = RemoteOpLog(WEBDAV_CONFIG, fs=self.fs)
+        oplog.load()
+        oplog.register_client('b', json.dumps({'s1': {}}))
+        oplog.commit()
+
+        self.assertEqual(self.fs.reads, [HEAD_PATH])
+        with self.assertRaises(ValueError):
+            oplog.get_pending_ops('b', 0)
+
+        oplog = RemoteOpLog(WEBDAV_CONFIG, fs=self.fs)
+        oplog.load()
+        self.assertEqual(oplog.get_all_client_locks('a'), {'b': json.dumps({'s1': {}})})
+        self.assertEqual(oplog.get_max_seq(), 1)
+
+    def test_compaction(self):
+        self.sync('b', 0)
+        self.sync('a', 0, ['s1'])
+        self.assertEqual(self.fs.segments(), [segment_name(1, 1)])
+        self.sync('b', 0, ['s2'])
+        # b has applied seq 1, a has not seen seq 2 yet
+        self.assertEqual(self.fs.segments(), [segment_name(2, 2)])
+        self.sync('a', 1)
+        self.assertEqual(self.fs.segments(), [])
+
+        # A stale client does not block compaction
+        self.sync('a', 2, ['s3'])
+        self.assertEqual(self.fs.segments(), [segment_name(3, 3)])
+        head = json.loads(self.fs.files[HEAD_PATH])
+        head['clients']['b']['last_seen_at'] = (
+            datetime.now(timezone.utc) - timedelta(days=8)
+        ).isoformat()
+        self.fs.files[HEAD_PATH] = json.dumps(head).encode()
+        self.sync('a', 3)
+        head = json.loads(self.fs.files[HEAD_PATH])
+        self.assertEqual(list(head['clients']), ['a'])
+        self.assertEqual((head['segments'], self.fs.segments()), ([], []))
+
+    def test_interrupted_sync_is_ignored(self):
+        self.sync('b', 0)
+        self.sync('a', 0, ['s1'])
+        # A segment uploaded without its head
+        self.fs.files[f'{SEGMENTS_ROOT}/{segment_name(2, 2)}'] = b'{"seq": 2}\n'
+
+        pending, max_seq = self.sync('b', 0, ['s2'])
+
+        self.assertEqual([op['stable_id'] for op in pending], ['s1'])
+        self.assertEqual(max_seq, 2)
+        pending, _ = self.sync('a', 1)
+        self.assertEqual([op['stable_id'] for op in pending], ['s2'])
+
+    def test_import_legacy_queue(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / 'queue.db'
+            conn = sqlite3.connect(db_path)
+            conn.executescript(QUEUE_SCHEMA)
+            now = datetime.now(timezone.utc).isoformat()
+            for seq, stable_id in ((5, 's1'), (6, 's2')):
+                op = make_op('a', stable_id)
+                conn.execute(
+                    "INSERT INTO ops VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (seq, op['client_id'], op['op_type'], op['stable_id'],
+                     op['file_id'], op['file_data'], op['created_at']),
+                )
+            conn.execute("INSERT INTO clients VALUES ('a', 6, ?, '{}')", (now,))
+            conn.execute("INSERT INTO clients VALUES ('b', 4, ?, '{}')", (now,))
+            conn.execute("INSERT INTO clients VALUES ('c', 5, ?, '{}')", (now,))
+            conn.commit()
+            conn.close()
+            self.fs.files['/r/queue.db'] = db_path.read_bytes()
+
+        pending, max_seq = self.sync('b', 4, ['s3'])
+
+        self.assertEqual([(op['seq'], op['stable_id']) for op in pending], [(5, 's1'), (6, 's2')])
+        self.assertEqual(max_seq, 7)
+        self.assertEqual(self.fs.segments(), [segment_name(5, 6), segment_name(7, 7)])
+        self.assertIn('/r/queue.db', self.fs.files)
+
+        oplog = RemoteOpLog(WEBDAV_CONFIG, fs=self.fs)
+        oplog.load(since_seq=6)
+        self.assertEqual(oplog.get_client_seq('a'), 6)
+        self.assertEqual([op['stable_id'] for op in oplog.get_pending_ops('a', 6)], ['s3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
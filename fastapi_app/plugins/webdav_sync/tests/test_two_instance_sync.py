@@ -50,7 +50,7 @@ def _make_service(file_repo: FileRepository, file_storage: FileStorage) -> SyncS
 
 
 def _upsert_op(seq: int, file_id: str, stable_id: str, **kwargs) -> dict:
-    """Build a minimal upsert op dict (as returned by RemoteQueueManager)."""
+    """Build a minimal upsert op dict (as returned by RemoteOpLog)."""
     file_data = {
         'id': file_id,
         'stable_id': stable_id,
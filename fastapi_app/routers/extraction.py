@@ -32,7 +32,6 @@ from ..lib.core.dependencies import (
 )
 from ..lib.repository.file_repository import FileRepository
 from ..lib.storage.file_storage import FileStorage
-from ..lib.utils.hash_utils import get_storage_path
 from ..lib.models import FileCreate
 
 logger = logging.getLogger(__name__)
@@ -155,16 +154,10 @@ async def extract_metadata(
                 detail=f"Extractor {request.extractor} expects {expected_types_str} input, but file has type: {file_metadata.file_type}"
             )
 
-        # Get physical file path from hash-sharded storage
-        # Note: files are stored in data_root/files subdirectory
-        storage_root = settings.data_root / "files"
-        file_path = get_storage_path(
-            storage_root,
-            file_metadata.id,
-            file_metadata.file_type
-        )
+        # Get physical file path from storage (a decoded copy for encoded or packed files)
+        file_path = storage.get_file_path(file_metadata.id, file_metadata.file_type)
 
-        if not file_path.exists():
+        if file_path is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"Physical file not found for: {request.file_id}"
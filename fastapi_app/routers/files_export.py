@@ -7,12 +7,12 @@ Key features:
 - Session-based authentication
 - Collection-based access control
 - Two-step export: stats check then download
-- Zip archive creation
-- Streaming file download
+- Zip archive streamed while it is created
+- Cached archives of unchanged exports, with resumable downloads
 """
 
 from fastapi import APIRouter, Depends, Query, Request, HTTPException
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from typing import Optional, List, Dict, Any
 from pathlib import Path
 import tempfile
@@ -28,8 +28,11 @@ from ..lib.core.dependencies import (
     get_file_repository,
     get_file_storage,
     require_authenticated_user,
-    get_session_id
+    get_session_id,
+    get_sse_service
 )
+from ..lib.sse.sse_service import SSEService
+from ..lib.sse.sse_utils import ProgressBar
 from ..lib.permissions.user_utils import get_user_collections
 from ..config import get_settings
 from ..lib.utils.logging_utils import get_logger
@@ -52,6 +55,8 @@ def export_files(
     db: DatabaseManager = Depends(get_db),
     repo: FileRepository = Depends(get_file_repository),
     storage: FileStorage = Depends(get_file_storage),
+    session_id: Optional[str] = Depends(get_session_id),
+    sse_service: SSEService = Depends(get_sse_service),
     current_user: dict = Depends(require_authenticated_user)
 ):
     """
@@ -76,10 +81,13 @@ def export_files(
         db: Database manager (injected)
         repo: File repository (injected)
         storage: File storage (injected)
+        session_id: Session ID for progress events (injected)
+        sse_service: SSE service (injected)
         current_user: Current user dict (injected)
 
     Returns:
-        FileResponse with zip archive (download=true) or JSONResponse with stats
+        StreamingResponse with the zip archive, or FileResponse if the same
+        export is cached (download=true); JSONResponse with stats otherwise
     """
     logger.info(
         f"Export request - user={current_user.get('username')}, "
@@ -182,38 +190,58 @@ def export_files(
             logger.error(f"Export stats failed: {e}", exc_info=True)
             raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
 
-    # Download mode: create actual ZIP file
+    # Download mode: stream the ZIP archive while it is created
     zip_exporter = FileZipExporter(db, storage, repo)
+    progress = ProgressBar(sse_service, session_id) if session_id else None
+
+    def on_progress(done: int, total: int, label: str):
+        if progress:
+            progress.set_value(done * 100 // total)
+            progress.set_label(label)
 
     try:
-        # Export to zip
-        zip_path = zip_exporter.export_to_zip(
+        export_stream = zip_exporter.export_to_zip_stream(
             collections=final_collections,
             variants=variants_list,
             include_versions=include_versions,
             group_by=group_by,
             tei_only=tei_only,
-            additional_formats=additional_formats_list
-        )
-
-        logger.info(f"Export completed: {zip_path} ({zip_path.stat().st_size} bytes)")
-
-        # Return as file download
-        # Note: FileResponse will clean up temp file after sending
-        from starlette.background import BackgroundTask
-        return FileResponse(
-            path=str(zip_path),
-            media_type="application/zip",
-            filename="export.zip",
-            background=BackgroundTask(zip_exporter.cleanup)
+            additional_formats=additional_formats_list,
+            progress_callback=on_progress if progress else None
         )
-
     except ValueError as e:
         logger.error(f"Invalid export parameters: {e}")
-        zip_exporter.cleanup()
         raise HTTPException(status_code=400, detail=str(e))
-
     except Exception as e:
         logger.error(f"Export failed: {e}", exc_info=True)
-        zip_exporter.cleanup()
         raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
+
+    if export_stream.cached_path:
+        # Unchanged export: serve the cached archive (supports range requests)
+        logger.info(f"Export served from cache: {export_stream.cached_path.name}")
+        return FileResponse(
+            path=str(export_stream.cached_path),
+            media_type="application/zip",
+            filename="export.zip"
+        )
+
+    logger.info(f"Streaming export of {export_stream.file_count} files")
+
+    def stream():
+        if progress:
+            progress.show(label="Exporting files...", value=0, cancellable=False)
+        try:
+            yield from export_stream
+            logger.info(
+                f"Export completed: {export_stream.file_count} files, "
+                f"{len(export_stream.errors)} errors"
+            )
+        finally:
+            if progress:
+                progress.hide()
+
+    return StreamingResponse(
+        stream(),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="export.zip"'}
+    )
@@ -19,10 +19,12 @@ from fastapi import APIRouter, Depends, HTTPException
 from ..config import get_settings
 from ..lib.repository.file_repository import FileRepository
 from ..lib.storage.file_storage import FileStorage
+from ..lib.storage.storage_gc import StorageGarbageCollector
 from ..lib.models.models_files import GarbageCollectRequest, GarbageCollectResponse
 from ..lib.core.dependencies import (
     get_file_repository,
     get_file_storage,
+    get_derived_data_cache,
     require_authenticated_user
 )
 from ..lib.utils.logging_utils import get_logger
@@ -137,10 +139,10 @@ def garbage_collect_files(
 
                 if ref_count == 0:
                     # Get file size before deletion for statistics
-                    file_path = storage.get_file_path(file_hash, file_type)
-                    file_size = file_path.stat().st_size if file_path and file_path.exists() else 0
+                    stored_size = storage.get_stored_size(file_hash, file_type)
+                    file_size = stored_size or 0
 
-                    if file_path and file_path.exists():
+                    if stored_size is not None:
                         # Physically delete the file (force delete, bypass ref counting)
                         deleted = storage.delete_file(file_hash, file_type, decrement_ref=False)
 
@@ -179,10 +181,11 @@ def garbage_collect_files(
     orphaned_count = 0
     orphaned_size = 0
 
-    for file_hash, file_type, file_path, file_size in orphaned_files:
+    for file_hash, file_type, _, file_size in orphaned_files:
         try:
-            # Delete the orphaned file
-            file_path.unlink()
+            # Delete the orphaned file, which may be in a pack file
+            if not storage.delete_file(file_hash, file_type, decrement_ref=False):
+                continue
             orphaned_count += 1
             orphaned_size += file_size
             files_deleted += 1
@@ -195,15 +198,6 @@ def garbage_collect_files(
                 f"Deleted orphaned file: {file_hash[:8]}... ({file_type}, {file_size} bytes)"
             )
 
-            # Clean up empty shard directory
-            shard_dir = file_path.parent
-            try:
-                if shard_dir.exists() and not any(shard_dir.iterdir()):
-                    shard_dir.rmdir()
-                    logger.debug(f"Removed empty shard directory: {shard_dir.name}")
-            except (OSError, FileNotFoundError):
-                pass
-
         except Exception as e:
             logger.error(f"Failed to delete orphaned file {file_hash[:8]}...: {e}")
             continue
@@ -261,8 +255,8 @@ def garbage_collect_files(
 
         try:
             # Get file size before deletion
-            file_path = storage.get_file_path(file_hash, file_type)
-            file_size = file_path.stat().st_size if file_path and file_path.exists() else 0
+            stored_size = storage.get_stored_size(file_hash, file_type)
+            file_size = stored_size or 0
 
             # Permanently delete the database record
             repo.permanently_delete_file(file_hash)
@@ -273,7 +267,7 @@ def garbage_collect_files(
             if file_hash not in deleted_hashes:
                 ref_count = repo.ref_manager.get_reference_count(file_hash)
 
-                if ref_count == 0 and file_path and file_path.exists():
+                if ref_count == 0 and stored_size is not None:
                     # Physically delete the file
                     deleted = storage.delete_file(file_hash, file_type, decrement_ref=False)
 
@@ -304,6 +298,12 @@ def garbage_collect_files(
     else:
         logger.info("No orphaned XML files found")
 
+    # Reclaim the space of deleted files in pack files, if the pack backend is used
+    try:
+        StorageGarbageCollector(storage, repo.ref_manager).collect_pack_garbage()
+    except Exception as e:
+        logger.error(f"Failed to repack pack files: {e}")
+
     # Clean up schema cache
     logger.info("Cleaning up schema cache...")
     settings = get_settings()
@@ -328,6 +328,15 @@ def garbage_collect_files(
     else:
         logger.info("Schema cache directory does not exist or is empty")
 
+    # Remove derived data of content that no longer exists
+    logger.info("Pruning derived data cache...")
+    try:
+        keep_hashes = [f.id for f in repo.get_all_files(include_deleted=True)]
+        pruned_count = get_derived_data_cache().prune(keep_hashes)
+        logger.info(f"Derived data cleanup completed: {pruned_count} entries deleted")
+    except Exception as e:
+        logger.error(f"Failed to prune derived data cache: {e}")
+
     # Clean up application tmp directory
     logger.info("Cleaning up application tmp directory...")
     tmp_dir = settings.tmp_dir
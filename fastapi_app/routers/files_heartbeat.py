@@ -1,7 +1,9 @@
 """
 File heartbeat API router for FastAPI.
 
-Implements POST /api/files/heartbeat - Refresh file lock (keep-alive).
+Implements:
+- POST /api/files/heartbeat - Refresh file lock (keep-alive)
+- POST /api/files/heartbeat/batch - Refresh the locks of many files at once
 
 Key changes from Flask:
 - No cache_status in response (database is always current, no cache in FastAPI)
@@ -10,9 +12,14 @@ Key changes from Flask:
 
 from fastapi import APIRouter, Depends, HTTPException
 
-from ..lib.core.locking import acquire_lock
+from ..lib.core.locking import acquire_lock, renew_locks
 from ..lib.repository.file_repository import FileRepository
-from ..lib.models.models_files import HeartbeatRequest, HeartbeatResponse
+from ..lib.models.models_files import (
+    HeartbeatRequest,
+    HeartbeatResponse,
+    HeartbeatBatchRequest,
+    HeartbeatBatchResponse
+)
 from ..lib.core.dependencies import get_session_id, get_file_repository
 from ..config import get_settings
 from ..lib.utils.logging_utils import get_logger
@@ -64,3 +71,45 @@ def heartbeat(
         status_code=409,
         detail="Failed to refresh lock. It may have been acquired by another session."
     )
+
+
+
+@router.post("/heartbeat/batch", response_model=HeartbeatBatchResponse)
+def heartbeat_batch(
+    request: HeartbeatBatchRequest,
+    repo: FileRepository = Depends(get_file_repository),
+    session_id: str = Depends(get_session_id)
+):
+    """
+    Refresh the locks of many files (keep-alive for all open editors).
+
+    Replaces one heartbeat request per file: the files are looked up with one
+    query and all locks are refreshed in one transaction. Only locks held by
+    the session are refreshed; a lock that was released, expired or taken
+    over by another session is reported as lost and not acquired again.
+
+    Lock changes of other sessions are pushed as lockChanged SSE events, see
+    lib/sse/lock_events.py.
+
+    Args:
+        request: HeartbeatBatchRequest with stable_ids
+        repo: File repository (injected)
+        session_id: Current session ID (injected)
+
+    Returns:
+        HeartbeatBatchResponse listing the refreshed, lost and unknown files
+    """
+    requested = list(dict.fromkeys(request.stable_ids))
+    existing = repo.get_existing_stable_ids(requested)
+    stable_ids = [stable_id for stable_id in requested if stable_id in existing]
+
+    logger.debug(f"Heartbeat for {len(stable_ids)} files (session: {session_id[:8]}...)")
+
+    settings = get_settings()
+    results = renew_locks(stable_ids, session_id, settings.db_dir, logger) if stable_ids else {}
+
+    return HeartbeatBatchResponse(
+        renewed=[stable_id for stable_id in stable_ids if results[stable_id]],
+        lost=[stable_id for stable_id in stable_ids if not results[stable_id]],
+        not_found=[stable_id for stable_id in requested if stable_id not in existing]
+    )
@@ -17,13 +17,19 @@ import tempfile
 import logging
 
 from ..lib.core.database import DatabaseManager
+from ..lib.core.executors import run_in_io_pool
 from ..lib.repository.file_repository import FileRepository
 from ..lib.storage.file_storage import FileStorage
 from ..lib.storage.file_zip_importer import FileZipImporter
+from ..lib.storage.file_importer import IMPORT_WORKERS
+from ..lib.sse.sse_service import SSEService
+from ..lib.sse.sse_utils import ProgressBar
 from ..lib.core.dependencies import (
     get_db,
     get_file_repository,
     get_file_storage,
+    get_session_id,
+    get_sse_service,
     require_authenticated_user
 )
 from ..lib.permissions.user_utils import get_user_collections
@@ -43,6 +49,8 @@ async def import_files(
     db: DatabaseManager = Depends(get_db),
     repo: FileRepository = Depends(get_file_repository),
     storage: FileStorage = Depends(get_file_storage),
+    session_id: Optional[str] = Depends(get_session_id),
+    sse_service: SSEService = Depends(get_sse_service),
     current_user: dict = Depends(require_authenticated_user)
 ) -> dict:
     """
@@ -58,6 +66,8 @@ async def import_files(
         db: Database manager (injected)
         repo: File repository (injected)
         storage: File storage (injected)
+        session_id: Session ID receiving import progress events (injected)
+        sse_service: SSE service (injected)
         current_user: Current user dict (injected)
 
     Returns:
@@ -99,6 +109,7 @@ async def import_files(
     # Save uploaded file to temporary location
     temp_zip = None
     zip_importer = None
+    progress = ProgressBar(sse_service, session_id) if session_id else None
 
     try:
         # Create temporary file for uploaded zip
@@ -106,7 +117,7 @@ async def import_files(
             temp_zip = Path(tmp.name)
             # Read and write uploaded file
             contents = await file.read()
-            tmp.write(contents)
+            await run_in_io_pool(tmp.write, contents)
 
         logger.info(f"Saved uploaded file to: {temp_zip} ({len(contents)} bytes)")
 
@@ -120,10 +131,17 @@ async def import_files(
                 )
 
         # Create zip importer
-        zip_importer = FileZipImporter(db, storage, repo, dry_run=False)
+        zip_importer = FileZipImporter(
+            db, storage, repo, dry_run=False, workers=IMPORT_WORKERS, progress=progress
+        )
+
+        if progress:
+            progress.show(label="Importing files...", value=0, cancellable=False)
 
-        # Import files from zip
-        stats = zip_importer.import_from_zip(
+        # Import files from zip in a worker thread, so that progress events
+        # are delivered while the import runs
+        stats = await run_in_io_pool(
+            zip_importer.import_from_zip,
             zip_path=temp_zip,
             collection=collection,
             recursive_collections=recursive_collections,
@@ -164,6 +182,9 @@ async def import_files(
         raise HTTPException(status_code=500, detail=f"Import failed: {str(e)}")
 
     finally:
+        if progress:
+            progress.hide()
+
         # Clean up temporary zip file
         if temp_zip and temp_zip.exists():
             logger.info(f"Cleaning up temporary zip file: {temp_zip}")
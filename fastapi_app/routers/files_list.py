@@ -10,22 +10,16 @@ Key features:
 - Lock status integration
 - Access control filtering
 - Optional variant filtering
+- Served from an incrementally maintained snapshot (see file_list_snapshot)
+- ETag / If-None-Match support and deltas since a previous version
 """
 
-from fastapi import APIRouter, Depends, Query, Request
-from typing import Optional, Dict, List
-from collections import defaultdict
+from fastapi import APIRouter, Depends, Query, Request, Response
+from typing import Optional
 
-from ..lib.core.database import DatabaseManager
 from ..lib.repository.file_repository import FileRepository
-from ..lib.models.models_files import (
-    FileListResponseModel,
-    DocumentGroupModel,
-    FileItemModel,
-    ArtifactModel
-)
+from ..lib.models.models_files import FileListResponseModel
 from ..lib.core.dependencies import (
-    get_db,
     get_file_repository,
     get_current_user,
     get_session_id
@@ -33,6 +27,11 @@ from ..lib.core.dependencies import (
 from ..lib.core.locking import get_all_active_locks
 from ..lib.permissions.access_control import DocumentAccessFilter
 from ..lib.permissions.user_utils import get_user_collections
+from ..lib.services.file_list_snapshot import (
+    get_file_list_snapshot,
+    get_remote_locked_ids,
+    serialize_file_list
+)
 from ..config import get_settings
 from ..lib.utils.logging_utils import get_logger
 
@@ -41,15 +40,20 @@ logger = get_logger(__name__)
 router = APIRouter(prefix="/files", tags=["files"])
 
 
-@router.get("/list", response_model=FileListResponseModel)
+@router.get(
+    "/list",
+    response_model=FileListResponseModel,
+    responses={304: {"description": "Not Modified (ETag matches If-None-Match)"}}
+)
 def list_files(
     request: Request,
     variant: Optional[str] = Query(None, description="Filter by variant"),
     refresh: bool = Query(False, description="Force refresh (deprecated in FastAPI)"),
+    since: Optional[int] = Query(None, description="Return only documents changed since this list version"),
     repo: FileRepository = Depends(get_file_repository),
     session_id: Optional[str] = Depends(get_session_id),
     current_user: Optional[dict] = Depends(get_current_user)
-) -> FileListResponseModel:
+):
     """
     List all files grouped by document.
 
@@ -60,11 +64,20 @@ def list_files(
     - Access control filtering applied
     - Stable IDs throughout
 
+    The response carries the list `version` and an ETag, which also covers
+    the user's collections, roles and document permissions. Requests with a
+    matching If-None-Match header receive 304 Not Modified. With `since`
+    set to a previously received version, only documents changed since then
+    are returned in `files` (`delta` = true), doc_ids that disappeared are
+    listed in `removed`, and `locked` holds all locked artifact ids. If the
+    version is too old, a full list is returned (`delta` = false).
+
     Note: 'refresh' parameter ignored - database is always current.
 
     Args:
         variant: Optional variant filter (e.g., "grobid")
         refresh: Deprecated parameter (ignored)
+        since: Optional list version for delta responses
         repo: File repository (injected)
         session_id: Current session ID (injected)
         current_user: Current user dict (injected)
@@ -72,292 +85,75 @@ def list_files(
     Returns:
         FileListResponseModel with files property containing List of DocumentGroupModel objects
     """
-    logger.debug(f"Listing files - variant={variant}, user={current_user}")
-
-    # Get all non-deleted files from database
-    all_files = repo.list_files(include_deleted=False)
-
-    logger.debug(f"Found {len(all_files)} total files")
-
-    # Group files by doc_id
-    documents_map: Dict[str, DocumentGroupModel] = {}
-
-    for file_metadata in all_files:
-        doc_id = file_metadata.doc_id
-
-        # Initialize document group if not exists
-        if doc_id not in documents_map:
-            # Get PDF file for this document to get collections/metadata
-            pdf_file = repo.get_pdf_for_document(doc_id)
-
-            if pdf_file:
-                # Normal case: document has a PDF source
-                source_item = _build_file_item(pdf_file)
-                documents_map[doc_id] = DocumentGroupModel(
-                    doc_id=doc_id,
-                    collections=pdf_file.doc_collections or [],
-                    doc_metadata=pdf_file.doc_metadata or {},
-                    source=source_item,
-                    artifacts=[]
-                )
-            else:
-                # Standalone file case (e.g., RNG schema) - file is its own source
-                # This handles XML-to-XML extractions that don't have a PDF source
-                source_item = _build_file_item(file_metadata)
-
-                # For standalone files with variants, create an artifact entry for filtering
-                # This allows variant filtering to work (e.g., filter by "rng")
-                artifacts = []
-                if file_metadata.variant:
-                    # Create artifact from the source file for filtering purposes
-                    artifact = _build_artifact(file_metadata)
-                    artifacts.append(artifact)
-
-                documents_map[doc_id] = DocumentGroupModel(
-                    doc_id=doc_id,
-                    collections=file_metadata.doc_collections or [],
-                    doc_metadata=file_metadata.doc_metadata or {},
-                    source=source_item,
-                    artifacts=artifacts
-                )
-
-        doc_group = documents_map[doc_id]
-
-        # Skip source files (already added as source above)
-        if file_metadata.file_type == 'pdf':
-            continue
-
-        # Skip standalone files that are their own source (already added as source + artifact if variant exists)
-        if doc_group.source.id == file_metadata.stable_id:
-            continue
-
-        # Build artifact for TEI and RNG files
-        if file_metadata.file_type in ['tei', 'rng']:
-            artifact = _build_artifact(file_metadata)
-            doc_group.artifacts.append(artifact)
-
-    logger.debug(f"Grouped into {len(documents_map)} documents")
+    logger.debug(f"Listing files - variant={variant}, since={since}, user={current_user}")
 
-    # Apply variant filtering if specified
-    if variant is not None:
-        documents_map = _apply_variant_filtering(documents_map, variant)
-        logger.debug(f"After variant filter: {len(documents_map)} documents")
+    snapshot = get_file_list_snapshot(repo.db)
+    version = snapshot.refresh(repo)
 
-    # Add lock information (local + remote)
+    # Lock overlay (local + remote)
     settings = get_settings()
+    locked_ids: set = set()
     try:
         active_locks = get_all_active_locks(settings.db_dir, logger)
-        _add_lock_info(documents_map, active_locks, session_id)
+        locked_ids.update(
+            stable_id for stable_id, lock_session in active_locks.items()
+            if lock_session != session_id
+        )
     except Exception as e:
         logger.error(f"Error getting lock info: {e}")
         # Continue without lock info
     try:
-        _add_remote_lock_info(documents_map, repo)
+        locked_ids.update(get_remote_locked_ids(snapshot.remote_locks))
     except Exception as e:
         logger.error(f"Error getting remote lock info: {e}")
 
-    # Apply collection-based filtering first
-    settings = get_settings()
     accessible_collections = get_user_collections(current_user, settings.db_dir)
-
-    if accessible_collections is not None:
-        # User has limited collection access - filter documents and their collection lists
-        logger.debug(f"Filtering by collections: {accessible_collections}")
-        files_data = []
-        for doc_group in documents_map.values():
-            doc_collections = doc_group.collections or []
-            # Filter collections to only those the user can access
-            accessible_doc_collections = [col for col in doc_collections if col in accessible_collections]
-
-            # Only include document if user has access to at least one of its collections
-            if accessible_doc_collections:
-                # Update the document's collections list to only show accessible collections
-                doc_group.collections = accessible_doc_collections
-                files_data.append(doc_group)
-        logger.debug(f"After collection filtering: {len(files_data)} documents")
-    else:
-        # User has access to all collections (admin or wildcard)
-        files_data = list(documents_map.values())
-        logger.debug(f"User has access to all collections")
-
-    # Apply document-level access control filtering
-    files_data = DocumentAccessFilter.filter_files_by_access(files_data, current_user)
-
-    logger.debug(f"After access control: {len(files_data)} documents")
-
-    return FileListResponseModel(files=files_data)
-
-
-def _build_file_item(file_metadata) -> FileItemModel:
-    """
-    Build FileItemModel from FileMetadata (for source files).
-
-    Args:
-        file_metadata: FileMetadata model
-
-    Returns:
-        FileItemModel with stable_id as id, label from file.label, doc_metadata.title, doc_id, or filename
-    """
-    # Priority: file.label > doc_metadata.title > doc_id > filename
-    label = None
-
-    if file_metadata.label and file_metadata.label.lower() not in ['untitled', 'unknown title']:
-        label = file_metadata.label
-    elif file_metadata.doc_metadata and isinstance(file_metadata.doc_metadata, dict):
-        title = file_metadata.doc_metadata.get('title', '')
-        if title and title.lower() not in ['untitled', 'unknown title']:
-            label = title
-
-    # Fallback to doc_id or filename
-    if not label:
-        if file_metadata.doc_id:
-            label = file_metadata.doc_id
-        else:
-            # Remove extension from filename
-            import os
-            label = os.path.splitext(file_metadata.filename)[0]
-
-    return FileItemModel(
-        id=file_metadata.stable_id,
-        filename=file_metadata.filename,
-        file_type=file_metadata.file_type,
-        label=label,
-        file_size=file_metadata.file_size or 0,
-        created_at=file_metadata.created_at,
-        updated_at=file_metadata.updated_at,
-        created_by=file_metadata.created_by  # Owner for access control
+    collections_key = sorted(accessible_collections) if accessible_collections is not None else None
+
+    changed_doc_ids = None
+    if since is not None and since <= version:
+        changed_doc_ids = repo.get_changed_doc_ids(since, version)
+        if changed_doc_ids is not None:
+            changed_doc_ids.discard(None)
+
+    etag = snapshot.etag(
+        version,
+        variant,
+        collections_key,
+        DocumentAccessFilter.access_key(current_user),
+        sorted(locked_ids),
+        current_user.get('username') if current_user else None,
+        since if changed_doc_ids is not None else None
     )
-
-
-def _build_artifact(file_metadata) -> ArtifactModel:
-    """
-    Build ArtifactModel from FileMetadata (for TEI artifacts).
-
-    Args:
-        file_metadata: FileMetadata model
-
-    Returns:
-        ArtifactModel with all required fields, content hash stored as private attribute
-    """
-    # Extract label - prefer metadata label (edition title), with smart fallbacks
-    if file_metadata.label and file_metadata.label.lower() not in ['untitled', 'unknown title']:
-        label = file_metadata.label
-    elif file_metadata.is_gold_standard:
-        label = f"Gold ({file_metadata.variant})" if file_metadata.variant else "Gold"
-    else:
-        # Fallback to doc_id or filename
-        if file_metadata.doc_id:
-            label = file_metadata.doc_id
-        else:
-            import os
-            label = os.path.splitext(file_metadata.filename)[0]
-
-    artifact = ArtifactModel(
-        id=file_metadata.stable_id,
-        filename=file_metadata.filename,
-        file_type=file_metadata.file_type,
-        label=label,
-        file_size=file_metadata.file_size or 0,
-        created_at=file_metadata.created_at,
-        updated_at=file_metadata.updated_at,
-        variant=file_metadata.variant,
-        version=file_metadata.version,
-        is_gold_standard=file_metadata.is_gold_standard,
-        status=file_metadata.status,
-        is_locked=False,  # Will be updated later
-        access_control=None,  # Will be updated later if needed
-        created_by=file_metadata.created_by  # Owner for access control
-    )
-
-    # Store content hash as private attribute for internal use (e.g., locking)
-    artifact._content_hash = file_metadata.id  # type: ignore
-
-    return artifact
-
-
-def _add_remote_lock_info(
-    documents: Dict[str, DocumentGroupModel],
-    repo: FileRepository,
-) -> None:
-    """Mark artifacts as locked if a non-expired remote lock exists for them.
-
-    Remote lock state is populated during WebDAV sync and stored in
-    sync_metadata['remote_locks'].  Artifacts already marked locked by the
-    local lock check are left unchanged.
-
-    Args:
-        documents: Dict of doc_id -> DocumentGroupModel (modified in place).
-        repo: File repository used to read the remote lock cache.
-    """
-    from datetime import datetime, timezone
-    _REMOTE_LOCK_TTL_SECONDS = 90 + 360
-
-    remote_locks = repo.get_remote_locks()
-    if not remote_locks:
-        return
-
-    now = datetime.now(timezone.utc)
-    for doc_group in documents.values():
-        for artifact in doc_group.artifacts:
-            if artifact.is_locked:
-                continue  # already locked locally
-            lock_info = remote_locks.get(artifact.id)
-            if not lock_info:
-                continue
-            updated_at_str = lock_info.get("updated_at") or lock_info.get("acquired_at", "")
-            if not updated_at_str:
-                continue
-            try:
-                updated_at = datetime.fromisoformat(updated_at_str)
-                if updated_at.tzinfo is None:
-                    updated_at = updated_at.replace(tzinfo=timezone.utc)
-                age_seconds = (now - updated_at).total_seconds()
-                if age_seconds < _REMOTE_LOCK_TTL_SECONDS:
-                    artifact.is_locked = True
-            except (ValueError, TypeError):
-                continue
-
-
-def _apply_variant_filtering(
-    documents: Dict[str, DocumentGroupModel],
-    variant: str
-) -> Dict[str, DocumentGroupModel]:
-    """
-    Filter documents to only those with artifacts matching the specified variant.
-
-    Args:
-        documents: Dict of doc_id -> DocumentGroupModel
-        variant: Variant name to filter by
-
-    Returns:
-        Filtered dict with only matching documents
-    """
-    filtered = {}
-    for doc_id, doc_group in documents.items():
-        # Check if any artifact has the matching variant
-        has_variant = any(
-            artifact.variant == variant
-            for artifact in doc_group.artifacts
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    body = snapshot.get_body(etag)
+    if body is None:
+        files_data = snapshot.documents_view(
+            variant=variant,
+            collections=accessible_collections,
+            locked_ids=locked_ids,
+            doc_ids=changed_doc_ids
         )
-        if has_variant:
-            filtered[doc_id] = doc_group
-    return filtered
 
+        # Apply document-level access control filtering
+        files_data = DocumentAccessFilter.filter_files_by_access(files_data, current_user)
+        logger.debug(f"After access control: {len(files_data)} documents")
 
-def _add_lock_info(
-    documents: Dict[str, DocumentGroupModel],
-    active_locks: Dict[str, str],
-    session_id: Optional[str]
-) -> None:
-    """
-    Add lock status to artifacts in document groups (modifies in place).
+        payload: dict = {"files": files_data, "version": version}
+        if changed_doc_ids is not None:
+            returned = {doc['doc_id'] for doc in files_data}
+            payload["delta"] = True
+            payload["removed"] = sorted(changed_doc_ids - returned)
+            payload["locked"] = sorted(locked_ids)
+        elif since is not None:
+            payload["delta"] = False
 
-    Args:
-        documents: Dict of doc_id -> DocumentGroupModel
-        active_locks: Dict of content_hash -> session_id
-        session_id: Current session ID
-    """
-    for doc_group in documents.values():
-        for artifact in doc_group.artifacts:
-            if artifact.id in active_locks and active_locks[artifact.id] != session_id:
-                artifact.is_locked = True
+        body = serialize_file_list(payload)
+        snapshot.put_body(etag, body)
+
+    return Response(content=body, media_type="application/json", headers=headers)
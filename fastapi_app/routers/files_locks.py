@@ -37,6 +37,7 @@ from ..lib.utils.logging_utils import get_logger
 from ..lib.sse.sse_service import SSEService
 from ..lib.core.sessions import SessionManager
 from ..lib.sse.sse_utils import broadcast_to_other_sessions
+from ..lib.sse.lock_events import broadcast_lock_changes, lock_change
 
 
 logger = get_logger(__name__)
@@ -184,6 +185,13 @@ def acquire_lock_endpoint(
             },
             logger=logger
         )
+        broadcast_lock_changes(
+            sse_service,
+            session_manager,
+            [lock_change(file_metadata.stable_id, "acquired", current_user.get("username"))],
+            current_session_id=session_id,
+            logger_inst=logger
+        )
 
         _schedule_lock_sync(repo)
         return "OK"
@@ -242,6 +250,14 @@ def release_lock_endpoint(
             },
             logger=logger
         )
+        if result["action"] == "released":
+            broadcast_lock_changes(
+                sse_service,
+                session_manager,
+                [lock_change(file_metadata.stable_id, "released")],
+                current_session_id=session_id,
+                logger_inst=logger
+            )
 
         _schedule_lock_sync(repo)
         return ReleaseLockResponse(
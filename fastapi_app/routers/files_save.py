@@ -28,10 +28,12 @@ from ..lib.core.dependencies import (
     require_authenticated_user,
     get_session_id,
     get_sse_service,
-    get_session_manager
+    get_session_manager,
+    get_derived_data_cache
 )
 from ..lib.repository.file_repository import FileRepository
 from ..lib.storage.file_storage import FileStorage
+from ..lib.core.executors import get_io_executor, run_in_io_pool
 from ..lib.core.locking import acquire_lock, release_lock
 from ..lib.utils.logging_utils import get_logger
 from ..lib.permissions.user_utils import user_has_collection_access
@@ -188,6 +190,112 @@ def _update_fileref_in_xml_with_logging(xml_string: str, file_id: str, logger) -
         return xml_string
 
 
+def _populate_derived_data(content_hash: str, content: bytes) -> None:
+    """Compute the derived data of saved TEI content in the background."""
+    def populate():
+        try:
+            get_derived_data_cache().populate(content_hash, content)
+        except Exception as e:
+            logger.error(f"Failed to populate derived data of {content_hash[:8]}: {e}")
+
+    get_io_executor().submit(populate)
+
+
+def _prepare_save(request: SaveFileRequest, file_repo: FileRepository, logger_inst) -> tuple:
+    """
+    Parse the XML of a save request and resolve the file it belongs to.
+
+    Args:
+        request: Save request
+        file_repo: File repository
+        logger_inst: Logger instance
+
+    Returns:
+        (xml_string, file_id, doc_id, variant, tei_metadata, existing_file, existing_gold):
+        the XML with updated fileref and encoded entities, the resolved ids, the
+        TEI metadata, the file to update (if any) and the document's gold standard
+
+    Raises:
+        HTTPException: 400 if the XML is invalid or has no file_id
+    """
+    # Decode base64 if needed
+    xml_string = request.xml_string
+    if request.encoding == "base64":
+        xml_string = base64.b64decode(xml_string).decode('utf-8')
+
+    # Validate XML is well-formed
+    try:
+        xml_root = etree.fromstring(xml_string.encode('utf-8'))
+    except etree.XMLSyntaxError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid XML: {str(e)}")
+
+    # Extract metadata from XML
+    file_id, variant = _extract_metadata_from_xml(xml_string, request.file_id, logger_inst)
+
+    # Extract full TEI metadata including label, status and last_revision
+    from ..lib.utils.tei_utils import extract_tei_metadata
+    tei_metadata = extract_tei_metadata(xml_root)
+
+    # For new saves, file_id becomes the doc_id (PDF and TEI share same doc_id)
+    doc_id = file_id
+
+    # Determine save strategy based on existing files in database
+    existing_gold = file_repo.get_gold_standard(doc_id)
+
+    # Resolve file context based on save operation:
+    # - For updates (new_version=False): Find the existing file to update
+    # - For new versions (new_version=True): Find the source file to extract doc_id
+    #   (the source file_id is needed to determine which document this version belongs to)
+    existing_file = None
+
+    if not request.new_version and len(request.file_id) >= 5:
+        # UPDATE operation: Resolve file_id to find the file to update
+        try:
+            resolved_file_id = file_repo.resolve_file_id(request.file_id)
+            existing_file = file_repo.get_file_by_id(resolved_file_id)
+
+            if existing_file:
+                # Use the file's doc_id for this operation
+                doc_id = existing_file.doc_id
+                file_id = existing_file.doc_id
+                logger_inst.info(f"Updating existing file: {existing_file.stable_id}")
+        except ValueError:
+            pass  # Not a valid file_id, treat as new file
+
+    elif request.new_version and len(request.file_id) >= 5:
+        # NEW VERSION operation: Resolve source file_id to extract doc_id
+        # The source file_id tells us which document this new version belongs to
+        try:
+            source_file_id = file_repo.resolve_file_id(request.file_id)
+            source_file = file_repo.get_file_by_id(source_file_id)
+
+            if source_file:
+                # Extract doc_id from source - new version will share this doc_id
+                doc_id = source_file.doc_id
+                file_id = source_file.doc_id
+                logger_inst.info(f"Creating new version from source: {source_file_id[:8]}, doc_id: {doc_id[:16]}")
+        except ValueError:
+            # Source file_id not found - use file_id as doc_id for new document
+            pass
+
+    # Update fileref in XML to ensure consistency with resolved doc_id
+    # This must happen AFTER resolving the correct doc_id from source file
+    xml_string = _update_fileref_in_xml_with_logging(xml_string, file_id, logger_inst)
+
+    # Encode XML entities if configured
+    from ..lib.utils.xml_utils import apply_entity_encoding_from_config
+    xml_string = apply_entity_encoding_from_config(xml_string)
+
+    # Refresh existing_gold after resolving doc_id
+    if existing_file:
+        existing_gold = file_repo.get_gold_standard(doc_id)
+    elif request.new_version:
+        # For new versions, refresh gold based on resolved doc_id
+        existing_gold = file_repo.get_gold_standard(doc_id)
+
+    return xml_string, file_id, doc_id, variant, tei_metadata, existing_file, existing_gold
+
+
 @router.post("/save", response_model=SaveFileResponse)
 async def save_file(
     request: SaveFileRequest,
@@ -218,85 +326,14 @@ async def save_file(
     settings = get_settings()
 
     try:
-        # Decode base64 if needed
-        xml_string = request.xml_string
-        if request.encoding == "base64":
-            xml_string = base64.b64decode(xml_string).decode('utf-8')
-
-        # Validate XML is well-formed
-        try:
-            etree.fromstring(xml_string.encode('utf-8'))
-        except etree.XMLSyntaxError as e:
-            raise HTTPException(status_code=400, detail=f"Invalid XML: {str(e)}")
-
-        # Extract metadata from XML
-        file_id, variant = _extract_metadata_from_xml(xml_string, request.file_id, logger_inst)
-
-        # Extract full TEI metadata including label, status and last_revision
-        from ..lib.utils.tei_utils import extract_tei_metadata
-        xml_root = etree.fromstring(xml_string.encode('utf-8'))
-        tei_metadata = extract_tei_metadata(xml_root)
+        # Parsing the XML and resolving the file block, run them outside the event loop
+        xml_string, file_id, doc_id, variant, tei_metadata, existing_file, existing_gold = (
+            await run_in_io_pool(_prepare_save, request, file_repo, logger_inst)
+        )
         label = tei_metadata.get('edition_title')  # Extract edition title for label
         tei_status = tei_metadata.get('status')  # Extract status from last revision
         last_revision = tei_metadata.get('last_revision')  # Extract timestamp from last revision
 
-        # For new saves, file_id becomes the doc_id (PDF and TEI share same doc_id)
-        doc_id = file_id
-
-        # Determine save strategy based on existing files in database
-        existing_gold = file_repo.get_gold_standard(doc_id)
-
-        # Resolve file context based on save operation:
-        # - For updates (new_version=False): Find the existing file to update
-        # - For new versions (new_version=True): Find the source file to extract doc_id
-        #   (the source file_id is needed to determine which document this version belongs to)
-        existing_file = None
-
-        if not request.new_version and len(request.file_id) >= 5:
-            # UPDATE operation: Resolve file_id to find the file to update
-            try:
-                resolved_file_id = file_repo.resolve_file_id(request.file_id)
-                existing_file = file_repo.get_file_by_id(resolved_file_id)
-
-                if existing_file:
-                    # Use the file's doc_id for this operation
-                    doc_id = existing_file.doc_id
-                    file_id = existing_file.doc_id
-                    logger_inst.info(f"Updating existing file: {existing_file.stable_id}")
-            except ValueError:
-                pass  # Not a valid file_id, treat as new file
-
-        elif request.new_version and len(request.file_id) >= 5:
-            # NEW VERSION operation: Resolve source file_id to extract doc_id
-            # The source file_id tells us which document this new version belongs to
-            try:
-                source_file_id = file_repo.resolve_file_id(request.file_id)
-                source_file = file_repo.get_file_by_id(source_file_id)
-
-                if source_file:
-                    # Extract doc_id from source - new version will share this doc_id
-                    doc_id = source_file.doc_id
-                    file_id = source_file.doc_id
-                    logger_inst.info(f"Creating new version from source: {source_file_id[:8]}, doc_id: {doc_id[:16]}")
-            except ValueError:
-                # Source file_id not found - use file_id as doc_id for new document
-                pass
-
-        # Update fileref in XML to ensure consistency with resolved doc_id
-        # This must happen AFTER resolving the correct doc_id from source file
-        xml_string = _update_fileref_in_xml_with_logging(xml_string, file_id, logger_inst)
-
-        # Encode XML entities if configured
-        from ..lib.utils.xml_utils import apply_entity_encoding_from_config
-        xml_string = apply_entity_encoding_from_config(xml_string)
-
-        # Refresh existing_gold after resolving doc_id
-        if existing_file:
-            existing_gold = file_repo.get_gold_standard(doc_id)
-        elif request.new_version:
-            # For new versions, refresh gold based on resolved doc_id
-            existing_gold = file_repo.get_gold_standard(doc_id)
-
         # Determine save operation
         status = "saved"
         is_gold_standard = False
@@ -331,7 +368,7 @@ async def save_file(
                 )
 
         # Acquire lock for existing file (using stable_id, not content hash)
-            if not acquire_lock(existing_file.stable_id, session_id, settings.db_dir, logger_inst):
+            if not await run_in_io_pool(acquire_lock, existing_file.stable_id, session_id, settings.db_dir, logger_inst):
                 raise HTTPException(status_code=423, detail="Failed to acquire lock")
 
         # Emit document.save event before saving
@@ -359,7 +396,8 @@ async def save_file(
 
         # Save to storage (hash might change if content changed)
             xml_bytes = xml_string.encode('utf-8')
-            saved_hash, storage_path = file_storage.save_file(xml_bytes, existing_file.file_type, increment_ref=False)
+            saved_hash, storage_path = await run_in_io_pool(file_storage.save_file, xml_bytes, existing_file.file_type, increment_ref=False)
+            _populate_derived_data(saved_hash, xml_bytes)
             file_size = len(xml_bytes)
 
             # Only update if hash actually changed
@@ -369,7 +407,8 @@ async def save_file(
                 # No need to transfer lock - stable_id never changes!
 
                 # Update database (FileRepository handles reference counting automatically)
-                file_repo.update_file(
+                await run_in_io_pool(
+                    file_repo.update_file,
                     existing_file.id,
                     FileUpdate(
                         id=saved_hash,  # Update hash if content changed
@@ -383,7 +422,8 @@ async def save_file(
             else:
                 logger_inst.debug(f"Content unchanged: {existing_file.id[:8]}")
                 # Just update metadata without changing ID
-                file_repo.update_file(
+                await run_in_io_pool(
+                    file_repo.update_file,
                     existing_file.id,
                     FileUpdate(
                         label=label,  # Still update label even if content unchanged
@@ -399,7 +439,8 @@ async def save_file(
                 pdf_file = file_repo.get_pdf_for_document(doc_id)
                 if pdf_file:
                     from ..lib.utils.tei_utils import update_pdf_metadata_from_tei
-                    update_pdf_metadata_from_tei(
+                    await run_in_io_pool(
+                        update_pdf_metadata_from_tei,
                         pdf_file,
                         tei_metadata,
                         file_repo,
@@ -465,7 +506,13 @@ async def save_file(
 
         # Save to storage
             xml_bytes = xml_string.encode('utf-8')
-            saved_hash, storage_path = file_storage.save_file(xml_bytes, 'tei', increment_ref=False)
+            # Previous version of the document, which the new one can be stored as a delta against
+            base_file = latest_version or (existing_gold if existing_gold and existing_gold.variant == variant else None)
+            saved_hash, storage_path = await run_in_io_pool(
+                file_storage.save_file, xml_bytes, 'tei', increment_ref=False,
+                base_hash=base_file.id if base_file else None
+            )
+            _populate_derived_data(saved_hash, xml_bytes)
             file_size = len(xml_bytes)
 
         # Check if this hash already exists (content-addressed storage means same content = same hash)
@@ -475,14 +522,14 @@ async def save_file(
                     # File with this content already exists - return it instead of creating duplicate
                     logger_inst.info(f"File with hash {saved_hash[:8]} already exists, returning existing file")
                     # Acquire lock if we don't have it (using stable_id)
-                    if not acquire_lock(existing_hash_file.stable_id, session_id, settings.db_dir, logger_inst):
+                    if not await run_in_io_pool(acquire_lock, existing_hash_file.stable_id, session_id, settings.db_dir, logger_inst):
                         raise HTTPException(status_code=423, detail="Failed to acquire lock")
                     return SaveFileResponse(status="saved", file_id=existing_hash_file.stable_id)
             except ValueError:
                 pass  # Hash doesn't exist, continue with creation
 
         # Create file first to get stable_id, then acquire lock
-            created_file = file_repo.insert_file(FileCreate(
+            created_file = await run_in_io_pool(file_repo.insert_file, FileCreate(
                 id=saved_hash,
                 filename=f"{file_id}.{variant}.v{next_version}.tei.xml" if variant else f"{file_id}.v{next_version}.tei.xml",
                 doc_id=doc_id,
@@ -501,7 +548,7 @@ async def save_file(
             ))
 
         # Now acquire lock using stable_id
-            if not acquire_lock(created_file.stable_id, session_id, settings.db_dir, logger_inst):
+            if not await run_in_io_pool(acquire_lock, created_file.stable_id, session_id, settings.db_dir, logger_inst):
                 raise HTTPException(status_code=423, detail="Failed to acquire lock")
 
             # Set default permissions for new file (granular mode only)
@@ -562,12 +609,13 @@ async def save_file(
 
         # Save to storage
             xml_bytes = xml_string.encode('utf-8')
-            saved_hash, storage_path = file_storage.save_file(xml_bytes, 'tei', increment_ref=False)
+            saved_hash, storage_path = await run_in_io_pool(file_storage.save_file, xml_bytes, 'tei', increment_ref=False)
+            _populate_derived_data(saved_hash, xml_bytes)
             file_size = len(xml_bytes)
 
         # Insert new gold standard first to get stable_id
             filename = f"{file_id}.{variant}.tei.xml" if variant else f"{file_id}.tei.xml"
-            created_file = file_repo.insert_file(FileCreate(
+            created_file = await run_in_io_pool(file_repo.insert_file, FileCreate(
                 id=saved_hash,
                 # stable_id will be auto-generated by insert_file (short, permanent ID)
                 filename=filename,
@@ -587,7 +635,7 @@ async def save_file(
             ))
 
         # Now acquire lock using stable_id
-            if not acquire_lock(created_file.stable_id, session_id, settings.db_dir, logger_inst):
+            if not await run_in_io_pool(acquire_lock, created_file.stable_id, session_id, settings.db_dir, logger_inst):
                 raise HTTPException(status_code=423, detail="Failed to acquire lock")
 
             # Set default permissions for new file (granular mode only)
@@ -596,7 +644,8 @@ async def save_file(
         # Update PDF metadata from TEI (for new gold standard)
             if pdf_file and tei_metadata:
                 from ..lib.utils.tei_utils import update_pdf_metadata_from_tei
-                update_pdf_metadata_from_tei(
+                await run_in_io_pool(
+                    update_pdf_metadata_from_tei,
                     pdf_file,
                     tei_metadata,
                     file_repo,
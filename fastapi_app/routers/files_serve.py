@@ -1,7 +1,9 @@
 """
 File serving API router for FastAPI.
 
-Implements GET /api/files/{document_id} - Serve file content by hash.
+Implements:
+- GET /api/files/content/{file_hash} - Serve file content by content hash (immutable)
+- GET /api/files/{document_id} - Serve the current content of a file by stable_id or hash
 
 Key features:
 - Accept stable_id or full hash
@@ -9,12 +11,22 @@ Key features:
 - Serve from hash-sharded storage
 - Access control enforcement
 - Proper MIME types
+- Strong ETags equal to the content hash, If-None-Match -> 304
+- HTTP Range requests (partial loading of PDFs by PDF.js)
+
+Content addressed by hash never changes and may be cached by the browser
+forever. Content addressed by stable_id changes when the file is saved and is
+not cached; with ?redirect=true, the stable_id URL redirects to the content
+URL of the current hash, so that only the (cheap) redirect is repeated when a
+document is reopened.
 """
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
+import re
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse, RedirectResponse, Response
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
 from ..lib.repository.file_repository import FileRepository
 from ..lib.storage.file_storage import FileStorage
@@ -30,10 +42,123 @@ from ..lib.utils.logging_utils import get_logger
 logger = get_logger(__name__)
 router = APIRouter(prefix="/files", tags=["files"])
 
+MIME_TYPES = {
+    'pdf': 'application/pdf',
+    'tei': 'application/xml',
+    'rng': 'application/xml',
+    'xml': 'application/xml'
+}
+
+# Headers for content that may change (addressed by stable_id)
+NO_CACHE_HEADERS = {
+    "Cache-Control": "no-cache, no-store, must-revalidate",
+    "Pragma": "no-cache",
+    "Expires": "0"
+}
+
+# Headers for content that never changes (addressed by hash); private because
+# access to the content is restricted
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+_FILE_HASH_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def _check_read_access(file_metadata, current_user: Optional[dict], document_id: str) -> None:
+    """Raise 403 if the user may not read the file."""
+    if not check_file_access(file_metadata, current_user, 'read'):
+        logger.warning(
+            f"Access denied for user {current_user.get('username') if current_user else 'anonymous'} "
+            f"to file {document_id}"
+        )
+        raise HTTPException(
+            status_code=403,
+            detail="Access denied: You don't have permission to view this document"
+        )
+
+
+def _file_response(
+    request: Request,
+    storage: FileStorage,
+    file_metadata,
+    document_id: str,
+    cache_headers: Dict[str, str]
+) -> Response:
+    """
+    Serve the content of a file with its hash as strong ETag.
+
+    Answers conditional requests matching the ETag with 304 without touching
+    the storage; Range requests are handled by FileResponse.
+    """
+    etag = f'"{file_metadata.id}"'
+    headers = {**cache_headers, "ETag": etag}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    file_path = storage.get_file_path(file_metadata.id, file_metadata.file_type)
+    if not file_path or not file_path.exists():
+        logger.error(f"File in database but not in storage: {document_id}")
+        raise HTTPException(
+            status_code=404,
+            detail=f"File content not found: {document_id}"
+        )
+
+    mime_type = MIME_TYPES.get(file_metadata.file_type, 'application/octet-stream')
+    logger.info(f"Serving file {document_id[:8]}... ({file_metadata.file_type})")
+    return FileResponse(file_path, media_type=mime_type, headers=headers)
+
+
+@router.get("/content/{file_hash}")
+def serve_file_by_hash(
+    file_hash: str,
+    request: Request,
+    repo: FileRepository = Depends(get_file_repository),
+    storage: FileStorage = Depends(get_file_storage),
+    current_user: Optional[dict] = Depends(get_current_user)
+):
+    """
+    Serve file content by content hash, cacheable forever.
+
+    Args:
+        file_hash: Full content hash (64 hex chars)
+        request: Request (for conditional and Range requests)
+        repo: File repository (injected)
+        storage: File storage (injected)
+        current_user: Current user dict (injected)
+
+    Returns:
+        FileResponse with file content, 206 for Range requests, or 304 if
+        the client has the content already
+
+    Raises:
+        HTTPException: 404 if file not found, 403 if access denied
+    """
+    file_metadata = repo.get_file_by_id(file_hash) if _FILE_HASH_RE.match(file_hash) else None
+    if not file_metadata:
+        raise HTTPException(status_code=404, detail=f"File not found: {file_hash}")
+
+    _check_read_access(file_metadata, current_user, file_hash)
+    return _file_response(
+        request, storage, file_metadata, file_hash, {"Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    )
+
 
 @router.get("/{document_id}")
 def serve_file_by_id(
     document_id: str,
+    request: Request,
+    redirect: bool = Query(False, description="Redirect to the content URL of the current hash"),
     repo: FileRepository = Depends(get_file_repository),
     storage: FileStorage = Depends(get_file_storage),
     current_user: Optional[dict] = Depends(get_current_user)
@@ -41,17 +166,22 @@ def serve_file_by_id(
     """
     Serve file content by document identifier (stable_id or full hash).
 
-    Returns the actual file content with appropriate MIME type.
-    Access control is enforced.
+    Returns the actual file content with appropriate MIME type, or with
+    redirect=true a redirect to /files/content/{hash}. Access control is
+    enforced. The content is not cached, since the file a stable_id points
+    to changes when it is saved.
 
     Args:
         document_id: stable_id or full hash (64 chars)
+        request: Request (for conditional and Range requests)
+        redirect: Redirect to the immutable content URL instead of serving the content
         repo: File repository (injected)
         storage: File storage (injected)
         current_user: Current user dict (injected)
 
     Returns:
-        FileResponse with file content
+        FileResponse with file content, 307 redirect, or 304 if the client
+        has the current content already
 
     Raises:
         HTTPException: 404 if file not found, 403 if access denied
@@ -63,11 +193,7 @@ def serve_file_by_id(
             return FileResponse(
                 empty_pdf_path,
                 media_type="application/pdf",
-                headers={
-                    "Cache-Control": "no-cache, no-store, must-revalidate",
-                    "Pragma": "no-cache",
-                    "Expires": "0"
-                }
+                headers=NO_CACHE_HEADERS
             )
         raise HTTPException(status_code=404, detail="empty.pdf not found")
 
@@ -86,45 +212,14 @@ def serve_file_by_id(
         logger.warning(f"File not in database: {document_id}")
         raise HTTPException(status_code=404, detail=f"File not found: {document_id}")
 
-    # Check read access
-    if not check_file_access(file_metadata, current_user, 'read'):
-        logger.warning(
-            f"Access denied for user {current_user.get('username') if current_user else 'anonymous'} "
-            f"to file {document_id}"
-        )
-        raise HTTPException(
-            status_code=403,
-            detail="Access denied: You don't have permission to view this document"
-        )
+    _check_read_access(file_metadata, current_user, document_id)
 
-    # Get file from storage
-    file_path = storage.get_file_path(file_metadata.id, file_metadata.file_type)
-    if not file_path or not file_path.exists():
-        logger.error(f"File in database but not in storage: {document_id}")
-        raise HTTPException(
-            status_code=404,
-            detail=f"File content not found: {document_id}"
+    if redirect:
+        # Relative to this URL, so that it works under any mount point
+        return RedirectResponse(
+            f"content/{file_metadata.id}", status_code=307, headers=NO_CACHE_HEADERS
         )
 
-    # Determine MIME type
-    mime_type_map = {
-        'pdf': 'application/pdf',
-        'tei': 'application/xml',
-        'rng': 'application/xml',
-        'xml': 'application/xml'
-    }
-    mime_type = mime_type_map.get(file_metadata.file_type, 'application/octet-stream')
-
-    logger.info(f"Serving file {document_id[:8]}... ({file_metadata.file_type})")
-
-    # Set cache control headers to prevent browser caching of mutable content
-    # This ensures users always get the latest version after saving changes
-    return FileResponse(
-        file_path,
-        media_type=mime_type,
-        headers={
-            "Cache-Control": "no-cache, no-store, must-revalidate",
-            "Pragma": "no-cache",
-            "Expires": "0"
-        }
-    )
+    # Prevent browser caching of mutable content, so that users always get
+    # the latest version after saving changes
+    return _file_response(request, storage, file_metadata, document_id, NO_CACHE_HEADERS)
@@ -34,6 +34,7 @@ from ..lib.core.dependencies import (
     get_session_id,
     get_current_user
 )
+from ..lib.core.executors import run_in_io_pool
 from ..lib.utils.logging_utils import get_logger
 from ..lib.utils.doc_id_utils import resolve_doc_id
 from ..lib.utils.config_utils import get_config
@@ -93,18 +94,51 @@ async def upload_file(
     # Read file content
     content = await file.read()
 
+    # Storage and database work blocks, run it outside the event loop
+    return await run_in_io_pool(
+        _save_upload, file.filename, content, collection_id, storage, repo, session_id, user
+    )
+
+
+def _save_upload(
+    filename: str,
+    content: bytes,
+    collection_id: Optional[str],
+    storage: FileStorage,
+    repo: FileRepository,
+    session_id: str,
+    user: Optional[dict]
+) -> UploadResponse:
+    """
+    Validate an uploaded file, save it to storage and register it in the database.
+
+    Args:
+        filename: Original filename
+        content: File bytes
+        collection_id: Optional collection used to resolve the doc_id
+        storage: File storage
+        repo: File repository
+        session_id: Current session ID
+        user: Current user
+
+    Returns:
+        UploadResponse with file type and stable_id
+
+    Raises:
+        HTTPException: 400 if the file type is invalid, 500 if saving metadata fails
+    """
     # Validate MIME type
-    if not _is_allowed_mime_type(file.filename, content):
-        logger.warning(f"Invalid file type for {file.filename}")
+    if not _is_allowed_mime_type(filename, content):
+        logger.warning(f"Invalid file type for {filename}")
         raise HTTPException(
             status_code=400,
             detail="Invalid file type. Allowed types: application/pdf, application/xml"
         )
 
     # Determine file type
-    if file.filename.lower().endswith('.pdf'):
+    if filename.lower().endswith('.pdf'):
         file_type = 'pdf'
-    elif file.filename.lower().endswith('.xml'):
+    elif filename.lower().endswith('.xml'):
         file_type = 'xml'
     else:
         # Fallback based on content (if libmagic available)
@@ -127,7 +161,7 @@ async def upload_file(
 
     # Resolve doc_id according to the configured strategy.
     mode = get_config().get('document.id.mode', default='doi')
-    doc_id = resolve_doc_id(mode, file.filename, content, file_type, collection_id, repo)
+    doc_id = resolve_doc_id(mode, filename, content, file_type, collection_id, repo)
     label = doc_id
 
     # Save to hash-sharded storage
@@ -182,7 +216,7 @@ async def upload_file(
         label=label,
         doc_collections=["_inbox"],
         file_metadata={
-            "original_filename": file.filename,
+            "original_filename": filename,
             "upload_source": "upload_endpoint",
             "session_id": session_id
         },
@@ -194,7 +228,7 @@ async def upload_file(
         logger.info(f"Inserted file metadata into database: {file_hash[:16]}...")
 
         # Return auto-generated stable_id (short, permanent ID)
-        logger.info(f"Upload complete: {file.filename} -> {created_file.stable_id}")
+        logger.info(f"Upload complete: {filename} -> {created_file.stable_id}")
 
         return UploadResponse(
             type=file_type,
@@ -2,7 +2,8 @@
 Maintenance endpoints for remote UI control via SSE.
 
 Provides admin-only endpoints to broadcast maintenance events to all connected
-clients (show blocking spinner, remove it, force page reload).
+clients (show blocking spinner, remove it, force page reload), and database
+connection pool metrics.
 """
 
 from typing import Dict
@@ -10,6 +11,7 @@ from typing import Dict
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 
+from ..lib.core import sqlite_utils
 from ..lib.core.dependencies import (
     get_session_manager,
     get_sse_service,
@@ -87,3 +89,15 @@ async def maintenance_reload(
         logger=logger,
     )
     return {"status": "ok", "clients_notified": count}
+
+
+@router.get("/db-pool-stats")
+def db_pool_stats(user: Dict = Depends(require_admin_user)):
+    """
+    Get metrics of the SQLite connection pools of this worker process.
+
+    Per database: profile, open/idle/in-use connections, hits (reused
+    connection), misses (new connection), waits and total wait time for a
+    free connection, and overflow connections opened beyond the limit.
+    """
+    return {"pools": sqlite_utils.get_pool_stats()}
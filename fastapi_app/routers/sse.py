@@ -6,7 +6,7 @@ Provides real-time progress updates for long-running operations like sync.
 For FastAPI migration - Phase 6.
 """
 
-from fastapi import APIRouter, Depends, Body, Request
+from fastapi import APIRouter, Depends, Body, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from typing import List
 import logging
@@ -45,11 +45,15 @@ async def subscribe(
 
     Example event types:
     - connected: Initial connection confirmation
+    - ping: Keep-alive after SSE_KEEPALIVE_INTERVAL seconds without events
     - syncProgress: Progress percentage (0-100)
     - syncMessage: Status message
     - syncComplete: Sync finished successfully
     - syncError: Sync error occurred
 
+    The stream is an async generator, so open connections don't occupy
+    threadpool threads. Returns 503 if SSE_MAX_STREAMS streams are open.
+
     Returns:
         StreamingResponse with text/event-stream content type
     """
@@ -60,8 +64,12 @@ async def subscribe(
 
     logger.info(f"SSE subscription request from user {username} (session: {client_id[:8]}...)")
 
+    if not sse_service.has_stream_capacity():
+        logger.warning(f"Rejecting SSE subscription, {sse_service.active_streams} streams open")
+        raise HTTPException(status_code=503, detail="Too many open event streams")
+
     return StreamingResponse(
-        sse_service.event_stream(client_id),
+        sse_service.async_event_stream(client_id),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -10,19 +10,28 @@ For FastAPI migration - Phase 5.
 
 from fastapi import APIRouter, HTTPException, Depends
 from pathlib import Path
+from typing import Optional
 import json
 import logging
 
 from ..config import get_settings
-from ..lib.core.dependencies import require_authenticated_user
+from ..lib.core.dependencies import require_authenticated_user, require_admin_user, get_session_id
 from ..lib.models.models_validation import (
     ValidateRequest,
     ValidateResponse,
     ValidationErrorModel,
     AutocompleteDataRequest,
-    AutocompleteDataResponse
+    AutocompleteDataResponse,
+    ValidatorPoolStatsResponse
 )
-from ..lib.core.schema_validator import validate, extract_schema_locations, get_schema_cache_info, ValidationError
+from ..lib.core.schema_validator import (
+    validate,
+    extract_schema_locations,
+    get_schema_cache_info,
+    get_validator_pool,
+    ValidationError
+)
+from ..lib.core.incremental_validation import validate_incremental
 from ..lib.utils.autocomplete_generator import generate_autocomplete_map
 
 # For internet connectivity check
@@ -36,6 +45,7 @@ router = APIRouter(prefix="/validate", tags=["validation"])
 def validate_xml(
     request: ValidateRequest,
     settings=Depends(get_settings),
+    session_id: Optional[str] = Depends(get_session_id),
     user: dict = Depends(require_authenticated_user)
 ) -> ValidateResponse:
     """
@@ -43,14 +53,32 @@ def validate_xml(
 
     Supports both XSD (xsi:schemaLocation) and RelaxNG (xml-model) schemas.
     Automatically downloads and caches schemas on first use.
-    Uses subprocess isolation for timeout protection on complex schemas.
+    Validation runs in a pool of worker processes that keep compiled schemas
+    cached; stuck workers are killed when the schema's timeout is exceeded.
+
+    If file_id is given, the result is cached per session and document. A
+    subsequent request with base_hash set to the returned content_hash only
+    revalidates the subtree that changed, falling back to full validation
+    where the RelaxNG grammar does not allow this.
 
     Returns:
         List of validation errors. Empty list if validation passed.
     """
     try:
         # Perform validation using framework-agnostic library
-        errors = validate(request.xml_string, cache_root=settings.schema_cache_dir)
+        content_hash = None
+        incremental = False
+        if request.file_id:
+            errors, content_hash, incremental = validate_incremental(
+                request.xml_string,
+                session_id or "",
+                request.file_id,
+                base_hash=request.base_hash,
+                xpath=request.xpath,
+                cache_root=settings.schema_cache_dir
+            )
+        else:
+            errors = validate(request.xml_string, cache_root=settings.schema_cache_dir)
 
         # Convert to Pydantic models
         error_models = [
@@ -63,7 +91,7 @@ def validate_xml(
             for err in errors
         ]
 
-        return ValidateResponse(errors=error_models)
+        return ValidateResponse(errors=error_models, content_hash=content_hash, incremental=incremental)
 
     except ValidationError as e:
         if "404" not in str(e) and "Not Found" not in str(e):
@@ -74,6 +102,19 @@ def validate_xml(
         raise HTTPException(status_code=500, detail=f"Validation failed: {str(e)}")
 
 
+@router.get("/pool-stats", response_model=ValidatorPoolStatsResponse)
+def get_validator_pool_stats(
+    user: dict = Depends(require_admin_user)
+) -> ValidatorPoolStatsResponse:
+    """
+    Get metrics of the schema validator worker pool (admin only).
+
+    Returns:
+        Worker counts and cumulative request, compile, timeout and timing counters.
+    """
+    return ValidatorPoolStatsResponse(**get_validator_pool().get_stats())
+
+
 @router.post("/autocomplete-data", response_model=AutocompleteDataResponse)
 def generate_autocomplete_data(
     request: AutocompleteDataRequest,
@@ -112,6 +112,20 @@ describe('File Heartbeat API E2E Tests', { concurrency: 1 }, () => {
     logger.success('Multiple sequential heartbeats successful');
   });
 
+  test('POST /api/files/heartbeat/batch should refresh own locks', async () => {
+    const session = await getSession();
+
+    const result = await authenticatedApiCall(session.sessionId, '/files/heartbeat/batch', 'POST', {
+      stable_ids: [testState.testFileHash, 'nonexistenthash123456']
+    }, BASE_URL);
+
+    assert.deepStrictEqual(result.renewed, [testState.testFileHash], 'Should refresh the held lock');
+    assert.deepStrictEqual(result.lost, [], 'Should not report the held lock as lost');
+    assert.deepStrictEqual(result.not_found, ['nonexistenthash123456'], 'Should report unknown files');
+
+    logger.success('Batched heartbeat refreshed the lock');
+  });
+
   test('POST /api/files/heartbeat should fail if lock is lost', async () => {
     const session = await getSession();
 
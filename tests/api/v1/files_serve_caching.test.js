@@ -218,6 +218,40 @@ describe('File Serve Caching Issue Tests', () => {
     logger.success(`  Expires: ${expires}`);
   });
 
+  test('Step 6: stable_id redirects to the immutable content URL of the current version', async () => {
+    const response = await fetch(`${BASE_URL}/api/files/${testState.stableId}?redirect=true`, {
+      headers: { 'X-Session-ID': reviewerSession.sessionId },
+      redirect: 'manual'
+    });
+
+    assert.strictEqual(response.status, 307, 'Should redirect');
+    assert.ok(response.headers.get('Cache-Control').includes('no-store'), 'Redirect must not be cached');
+    const location = response.headers.get('Location');
+    assert.match(location, /^content\/[0-9a-f]{64}$/, `Should redirect to content URL: ${location}`);
+
+    testState.contentUrl = new URL(location, `${BASE_URL}/api/files/${testState.stableId}`).href;
+    logger.success(`Redirected to ${testState.contentUrl}`);
+  });
+
+  test('Step 7: content URL is cacheable and supports conditional and range requests', async () => {
+    const headers = { 'X-Session-ID': reviewerSession.sessionId };
+    const response = await fetch(testState.contentUrl, { headers });
+
+    assert.ok(response.ok, 'Should fetch content successfully');
+    assert.ok((await response.text()).includes('<?xml-model'), 'Should serve the current version');
+    assert.ok(response.headers.get('Cache-Control').includes('immutable'), 'Content should be immutable');
+    const etag = response.headers.get('ETag');
+    assert.ok(etag, 'ETag header should be set');
+
+    const notModified = await fetch(testState.contentUrl, { headers: { ...headers, 'If-None-Match': etag } });
+    assert.strictEqual(notModified.status, 304, 'Should answer matching If-None-Match with 304');
+
+    const partial = await fetch(testState.contentUrl, { headers: { ...headers, Range: 'bytes=0-4' } });
+    assert.strictEqual(partial.status, 206, 'Should answer Range requests with partial content');
+    assert.strictEqual(await partial.text(), '<?xml');
+    logger.success('Content URL supports caching, 304 and range requests');
+  });
+
   test('Cleanup: delete test file', async () => {
     if (testState.stableId) {
       try {
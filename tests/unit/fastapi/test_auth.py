@@ -7,6 +7,8 @@ Self-contained tests that can be run independently.
 """
 
 import gc
+import json
+import os
 import tempfile
 import unittest
 from pathlib import Path
@@ -14,6 +16,8 @@ from pathlib import Path
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
+from unittest.mock import patch
+
 from fastapi_app.lib.utils.auth import AuthManager
 from fastapi_app.lib.core.sessions import SessionManager
 from fastapi_app.lib.core.db_utils import close_all_connections
@@ -180,6 +184,29 @@ class TestAuthManager(unittest.TestCase):
         self.assertEqual(user['active'], True)
         self.assertEqual(user['created_at'], '2024-01-01')
 
+    def test_users_file_cached_until_changed(self):
+        """users.json is parsed once and re-read after external modification."""
+        self.auth.create_user('testuser', 'hash123', role='user')
+        self.auth.get_user_by_username('testuser')
+
+        with patch('fastapi_app.lib.utils.auth.json.load') as json_load:
+            user = self.auth.get_user_by_username('testuser')
+            json_load.assert_not_called()
+
+        # Returned users are copies
+        user['role'] = 'admin'
+        self.assertEqual(self.auth.get_user_by_username('testuser')['role'], 'user')
+
+        # External write (e.g. user management CLI)
+        users_file = self.db_dir / 'users.json'
+        with open(users_file, 'w', encoding='utf-8') as f:
+            json.dump([{'username': 'other', 'passwd_hash': 'x'}], f)
+        stat = users_file.stat()
+        os.utime(users_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        self.assertIsNone(self.auth.get_user_by_username('testuser'))
+        self.assertIsNotNone(AuthManager(self.db_dir).get_user_by_username('other'))
+
     def test_concurrent_user_operations(self):
         """Test that concurrent user operations don't corrupt data."""
         import threading
@@ -0,0 +1,196 @@
+"""
+Unit tests for HTTP response compression.
+
+Tests:
+- Content encodings are negotiated by quality value and server preference
+- Compressible responses above the size threshold are compressed, with Vary and a weak ETag
+- zstd, br and gzip bodies decode to the original, whole and streamed
+- Compressed responses do not advertise Accept-Ranges
+- Small, binary, partial, event-stream and already encoded responses are sent unchanged
+- Streaming responses are compressed chunk by chunk
+- Precompressed variants of static files are served if accepted and not outdated
+- Fingerprinted static files are cached forever, others revalidated
+
+@testCovers fastapi_app/lib/core/compression.py
+"""
+
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+from pathlib import Path
+
+import brotli
+import zstandard
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from fastapi_app.lib.core.compression import (
+    IMMUTABLE_CACHE_CONTROL,
+    CompressionMiddleware,
+    PrecompressedStaticFiles,
+    negotiate_encoding
+)
+
+DATA = {"files": [{"doc_id": f"10.1234/doc-{i}", "label": "A document label"} for i in range(200)]}
+
+
+DECODERS = {
+    "gzip": lambda data: zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(data),
+    "br": brotli.decompress,
+    "zstd": lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data),
+}
+
+
+def create_app(encodings=("gzip",)) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024, encodings=list(encodings))
+
+    @app.get("/list")
+    def file_list():
+        return JSONResponse(DATA, headers={"ETag": '"abc"', "Accept-Ranges": "bytes"})
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/pdf")
+    def pdf():
+        return Response(b"%PDF" + b"0" * 5000, media_type="application/pdf")
+
+    @app.get("/partial")
+    def partial():
+        return Response(b"<a/>" * 1000, status_code=206, media_type="application/xml")
+
+    @app.get("/encoded")
+    def encoded():
+        return Response(gzip.compress(b"<a/>" * 1000), media_type="application/xml",
+                        headers={"Content-Encoding": "gzip"})
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse(iter([b"data: x\n\n" * 500]), media_type="text/event-stream")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((b"<p>chunk</p>" * 200 for _ in range(5)), media_type="application/xml")
+
+    return app
+
+
+class TestCompression(unittest.TestCase):
+    """Test encoding negotiation and the compression middleware."""
+
+    def setUp(self):
+        self.client = TestClient(create_app())
+
+    def test_negotiate_encoding(self):
+        encodings = ["zstd", "br", "gzip"]
+        self.assertEqual(negotiate_encoding("gzip, deflate, br, zstd", encodings), "zstd")
+        self.assertEqual(negotiate_encoding("gzip, deflate, br", encodings), "br")
+        self.assertEqual(negotiate_encoding("br;q=0.5, gzip", encodings), "gzip")
+        self.assertEqual(negotiate_encoding("*;q=0.1, gzip;q=0", encodings), "zstd")
+        self.assertIsNone(negotiate_encoding("deflate, identity", encodings))
+        self.assertIsNone(negotiate_encoding("gzip;q=0", encodings))
+        self.assertIsNone(negotiate_encoding("", encodings))
+
+    def test_compresses_large_responses(self):
+        response = self.client.get("/list", headers={"Accept-Encoding": "gzip"})
+
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertEqual(response.headers["vary"], "Accept-Encoding")
+        self.assertEqual(response.headers["etag"], 'W/"abc"')
+        self.assertNotIn("accept-ranges", response.headers)
+        self.assertLess(int(response.headers["content-length"]), len(json.dumps(DATA)) / 5)
+        self.assertEqual(response.json(), DATA)
+
+        response = self.client.get("/list", headers={"Accept-Encoding": "identity"})
+        self.assertNotIn("content-encoding", response.headers)
+        self.assertEqual(response.headers["vary"], "Accept-Encoding")
+        self.assertEqual(response.headers["etag"], '"abc"')
+        self.assertEqual(response.headers["accept-ranges"], "bytes")
+
+    def test_round_trip(self):
+        client = TestClient(create_app(DECODERS))
+        expected = {"/list": bytes(JSONResponse(DATA).body), "/stream": b"<p>chunk</p>" * 1000}
+        for encoding, decode in DECODERS.items():
+            for path, body in expected.items():
+                with self.subTest(encoding=encoding, path=path):
+                    # Raw bytes, so that the client does not decode them itself
+                    with client.stream("GET", path, headers={"Accept-Encoding": encoding}) as response:
+                        self.assertEqual(response.headers["content-encoding"], encoding)
+                        raw = b"".join(response.iter_raw())
+                    self.assertEqual(decode(raw), body)
+
+    def test_uncompressed_responses(self):
+        for path in ("/small", "/pdf", "/partial", "/events"):
+            response = self.client.get(path, headers={"Accept-Encoding": "gzip"})
+            self.assertNotIn("content-encoding", response.headers, path)
+
+        response = self.client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.content, b"<a/>" * 1000)
+
+    def test_streaming(self):
+        response = self.client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertNotIn("content-length", response.headers)
+        self.assertEqual(response.content, b"<p>chunk</p>" * 1000)
+
+
+class TestPrecompressedStaticFiles(unittest.TestCase):
+    """Test serving precompressed static file variants."""
+
+    def setUp(self):
+        self.web_root = Path(tempfile.mkdtemp())
+        self.script = b"console.log('precompressed');\n" * 100
+        (self.web_root / "app.js").write_bytes(self.script)
+        (self.web_root / "app.js.gz").write_bytes(gzip.compress(self.script))
+        (self.web_root / "app.3f2a9c1b.js").write_bytes(self.script)
+        (self.web_root / "empty.pdf").write_bytes(b"%PDF")
+
+        app = FastAPI()
+        app.mount("/", PrecompressedStaticFiles(directory=str(self.web_root)), name="static")
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        shutil.rmtree(self.web_root)
+
+    def test_serves_variant(self):
+        response = self.client.get("/app.js", headers={"Accept-Encoding": "br, gzip"})
+
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertTrue(response.headers["content-type"].startswith("text/javascript"))
+        self.assertEqual(response.headers["content-length"], str((self.web_root / "app.js.gz").stat().st_size))
+        self.assertEqual(response.headers["vary"], "Accept-Encoding")
+        self.assertEqual(response.headers["cache-control"], "no-cache")
+        self.assertEqual(response.content, self.script)
+
+        etag = response.headers["etag"]
+        response = self.client.get("/app.js", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_original_if_not_accepted_or_outdated(self):
+        response = self.client.get("/app.js", headers={"Accept-Encoding": "identity"})
+        self.assertNotIn("content-encoding", response.headers)
+        self.assertEqual(response.content, self.script)
+
+        stat = (self.web_root / "app.js").stat()
+        os.utime(self.web_root / "app.js.gz", (stat.st_atime, stat.st_mtime - 60))
+        response = self.client.get("/app.js", headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("content-encoding", response.headers)
+
+    def test_cache_control(self):
+        response = self.client.get("/app.3f2a9c1b.js")
+        self.assertEqual(response.headers["cache-control"], IMMUTABLE_CACHE_CONTROL)
+        response = self.client.get("/empty.pdf")
+        self.assertEqual(response.headers["cache-control"], "no-cache")
+        self.assertNotIn("vary", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,14 +6,18 @@ Self-contained tests that can be run independently.
 @testCovers fastapi_app/lib/utils/config_utils.py
 """
 
+import json
 import tempfile
 import unittest
 from pathlib import Path
+from unittest.mock import patch
 
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
-from fastapi_app.lib.utils.config_utils import Config, get_config_metadata
+from fastapi_app.lib.utils.config_utils import (
+    Config, get_config_metadata, add_config_listener, remove_config_listener
+)
 
 
 class TestConfigUtils(unittest.TestCase):
@@ -228,5 +232,53 @@ class TestConfigUtils(unittest.TestCase):
         self.assertEqual(config_data['some.key.type'], 'string')
 
 
+    def test_reads_are_cached_until_file_changes(self):
+        """config.json is parsed once and re-read after an external write."""
+        self.config.set('a', [1, 2])
+        self.config.get('a')
+
+        with patch('fastapi_app.lib.utils.config_utils.json.load') as json_load:
+            value = self.config.get('a')
+            json_load.assert_not_called()
+
+        # Returned values are copies of the cached data
+        value.append(3)
+        self.assertEqual(self.config.get('a'), [1, 2])
+
+        # External write (replacing the file changes its inode)
+        config_file = self.db_dir / 'config.json'
+        tmp_file = self.db_dir / 'config.tmp'
+        tmp_file.write_text(json.dumps({'a': [4]}), encoding='utf-8')
+        tmp_file.replace(config_file)
+        self.assertEqual(self.config.get('a'), [4])
+
+    def test_change_listeners(self):
+        """Listeners receive the changed keys of writes and external edits."""
+        changes = []
+
+        def listener(db_dir, changed_keys):
+            changes.append((db_dir, changed_keys))
+
+        add_config_listener(listener)
+        try:
+            self.config.set('a', 1)
+            self.assertEqual(changes[-1], (self.db_dir, {'a', 'a.type'}))
+
+            self.config.set('a', 1)  # unchanged value
+            self.assertEqual(len(changes), 1)
+
+            self.config.delete('a')
+            self.assertEqual(changes[-1][1], {'a'})
+
+            config_file = self.db_dir / 'config.json'
+            tmp_file = self.db_dir / 'config.tmp'
+            tmp_file.write_text(json.dumps({'a.type': 'number', 'b': True}), encoding='utf-8')
+            tmp_file.replace(config_file)
+            self.config.get('b')
+            self.assertEqual(changes[-1][1], {'b'})
+        finally:
+            remove_config_listener(listener)
+
+
 if __name__ == '__main__':
     unittest.main()
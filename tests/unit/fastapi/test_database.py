@@ -293,9 +293,129 @@ class TestFileRepository(unittest.TestCase):
         grobid_files = self.repo.list_files(variant='grobid')
         self.assertEqual(len(grobid_files), 1)
 
-        # Test collection filter
+        # Test collection filter (the TEI file inherits the PDF's collections)
         corpus1_files = self.repo.list_files(collection='corpus1')
-        self.assertEqual(len(corpus1_files), 1)
+        self.assertEqual({f.id for f in corpus1_files}, {'pdf1', 'tei1'})
+        self.assertEqual(len(self.repo.list_files(collection='corpus1', file_type='pdf')), 1)
+
+    def test_stable_id_allocation(self):
+        """Generated and batch-allocated stable IDs are unique and unused."""
+        from unittest.mock import patch
+        from fastapi_app.lib.utils import stable_id as stable_id_utils
+
+        existing = self.repo.insert_file(FileCreate(
+            id='pdf1', filename='pdf1.pdf', doc_id='doc1', file_type='pdf', file_size=1
+        ))
+
+        ids = self.repo.allocate_stable_ids(50)
+        self.assertEqual(len(set(ids)), 50)
+        self.assertNotIn(existing.stable_id, ids)
+        self.assertTrue(all(stable_id_utils.is_valid_stable_id(i) for i in ids))
+        self.assertEqual(self.repo.allocate_stable_ids(0), [])
+
+        # Collisions with existing rows are replaced by longer IDs
+        candidates = iter([existing.stable_id, 'abcdefg'])
+        with patch.object(stable_id_utils, 'random_stable_id', lambda length: next(candidates)):
+            self.assertEqual(self.repo.allocate_stable_ids(1), ['abcdefg'])
+
+        # insert_file() probes the primary key instead of loading all IDs
+        candidates = iter([existing.stable_id, 'hjkmnpq'])
+        with patch.object(stable_id_utils, 'random_stable_id', lambda length: next(candidates)):
+            tei = self.repo.insert_file(FileCreate(
+                id='tei1', filename='tei1.tei.xml', doc_id='doc1', file_type='tei', file_size=1
+            ))
+        self.assertEqual(tei.stable_id, 'hjkmnpq')
+
+    def test_allocated_stable_id_taken_before_insert(self):
+        """Inserts replace allocated stable IDs that were used concurrently, but not explicit ones."""
+        import sqlite3
+
+        taken, free, other = self.repo.allocate_stable_ids(3)
+        # A concurrent writer (another repository instance) uses an allocated ID
+        FileRepository(self.db).insert_file(FileCreate(
+            id='pdf1', filename='pdf1.pdf', doc_id='doc1', file_type='pdf', file_size=1,
+            stable_id=taken
+        ))
+
+        file = self.repo.insert_file(FileCreate(
+            id='pdf2', filename='pdf2.pdf', doc_id='doc2', file_type='pdf', file_size=1,
+            stable_id=taken
+        ))
+        self.assertNotEqual(file.stable_id, taken)
+
+        FileRepository(self.db).insert_file(FileCreate(
+            id='pdf5', filename='pdf5.pdf', doc_id='doc5', file_type='pdf', file_size=1,
+            stable_id=other
+        ))
+        count = self.repo.insert_files([
+            FileCreate(id='pdf3', filename='pdf3.pdf', doc_id='doc3', file_type='pdf',
+                       file_size=1, stable_id=other),
+            FileCreate(id='pdf4', filename='pdf4.pdf', doc_id='doc4', file_type='pdf',
+                       file_size=1, stable_id=free),
+        ])
+        self.assertEqual(count, 2)
+        stable_ids = [self.repo.get_file_by_id(f'pdf{i}').stable_id for i in range(1, 6)]
+        self.assertEqual(len(set(stable_ids)), 5)
+        self.assertEqual(stable_ids[0], taken)
+        self.assertEqual(stable_ids[3], free)
+
+        # Explicit stable_ids (e.g. from sync) are identities and never replaced
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.repo.insert_file(FileCreate(
+                id='pdf6', filename='pdf6.pdf', doc_id='doc6', file_type='pdf', file_size=1,
+                stable_id=taken
+            ))
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.repo.insert_files([FileCreate(
+                id='pdf6', filename='pdf6.pdf', doc_id='doc6', file_type='pdf', file_size=1,
+                stable_id='abcdef'
+            ), FileCreate(
+                id='pdf7', filename='pdf7.pdf', doc_id='doc7', file_type='pdf', file_size=1,
+                stable_id=free
+            )])
+        self.assertIsNone(self.repo.get_file_by_id('pdf6'))
+
+    def test_collection_membership_table(self):
+        """file_collections follows all writes and matches ids exactly."""
+        pdf = self.repo.insert_file(FileCreate(
+            id='pdf1', filename='pdf1.pdf', doc_id='doc1', file_type='pdf',
+            file_size=1000, doc_collections=['corpus1', 'corpus10']
+        ))
+        tei = self.repo.insert_file(FileCreate(
+            id='tei1', filename='tei1.tei.xml', doc_id='doc1', file_type='tei', file_size=500
+        ))
+
+        def members(collection_id):
+            return {f.id for f in self.repo.get_files_by_collection(collection_id)}
+
+        self.assertEqual(members('corpus1'), {'pdf1', 'tei1'})
+        self.assertEqual(members('corpus'), set())  # no substring matches
+
+        self.repo.update_file('pdf1', FileUpdate(doc_collections=['corpus2']))
+        self.assertEqual(members('corpus1'), set())
+        self.assertEqual(members('corpus2'), {'pdf1', 'tei1'})
+
+        # Writes that bypass the repository are covered by triggers
+        with self.db.transaction() as conn:
+            conn.execute(
+                "UPDATE files SET doc_collections = '[\"corpus3\"]' WHERE stable_id = ?",
+                (tei.stable_id,)
+            )
+        self.assertEqual(members('corpus3'), {'tei1'})
+
+        self.repo.delete_file('pdf1')
+        self.assertEqual(members('corpus2'), set())
+        self.assertEqual(
+            {f.id for f in self.repo.get_files_by_collection('corpus2', include_deleted=True)},
+            {'pdf1'}
+        )
+
+        self.repo.permanently_delete_file('pdf1')
+        with self.db.get_connection() as conn:
+            rows = conn.execute(
+                "SELECT collection_id FROM file_collections WHERE stable_id = ?", (pdf.stable_id,)
+            ).fetchall()
+        self.assertEqual(rows, [])
 
     def test_document_centric_queries(self):
         """Test document-centric queries."""
@@ -363,6 +483,50 @@ class TestFileRepository(unittest.TestCase):
         versions = self.repo.get_all_versions(doc_id)
         self.assertEqual(len(versions), 2)
 
+    def test_list_document_groups(self):
+        """Test single-query grouped listing with variant and collection filters."""
+        self.repo.insert_file(FileCreate(
+            id='pdf1', filename='pdf1.pdf', doc_id='doc1', file_type='pdf',
+            file_size=1000, doc_collections=['corpus1'], doc_metadata={'title': 'Paper 1'}
+        ))
+        self.repo.insert_file(FileCreate(
+            id='tei1', filename='tei1.tei.xml', doc_id='doc1', file_type='tei',
+            file_size=500, variant='grobid'
+        ))
+        self.repo.insert_file(FileCreate(
+            id='pdf2', filename='pdf2.pdf', doc_id='doc2', file_type='pdf',
+            file_size=2000, doc_collections=['corpus2']
+        ))
+        # Standalone file without PDF is its own source
+        self.repo.insert_file(FileCreate(
+            id='rng1', filename='rng1.rng', doc_id='schema1', file_type='rng',
+            file_size=300, variant='rng', doc_collections=['corpus1']
+        ))
+        # Deleted files are excluded
+        self.repo.insert_file(FileCreate(
+            id='tei2', filename='tei2.tei.xml', doc_id='doc2', file_type='tei',
+            file_size=500, variant='grobid'
+        ))
+        self.repo.delete_file('tei2')
+
+        groups = {g['doc_id']: g for g in self.repo.list_document_groups()}
+        self.assertEqual(set(groups), {'doc1', 'doc2', 'schema1'})
+        self.assertEqual(groups['doc1']['source']['id'], 'pdf1')
+        self.assertEqual(groups['doc1']['source']['doc_metadata'], {'title': 'Paper 1'})
+        self.assertEqual([f['id'] for f in groups['doc1']['files']], ['tei1'])
+        self.assertEqual(groups['doc2']['files'], [])
+        self.assertEqual(groups['schema1']['source']['id'], 'rng1')
+
+        # Variant filter only matches live non-PDF files
+        grobid = self.repo.list_document_groups(variant='grobid')
+        self.assertEqual([g['doc_id'] for g in grobid], ['doc1'])
+
+        # Collection filter matches exact collection ids of the source file
+        corpus1 = self.repo.list_document_groups(collections=['corpus1'])
+        self.assertEqual({g['doc_id'] for g in corpus1}, {'doc1', 'schema1'})
+        self.assertEqual(self.repo.list_document_groups(collections=['corpus']), [])
+        self.assertEqual(self.repo.list_document_groups(collections=[]), [])
+
     def test_get_doc_id_by_file_id(self):
         """Test get_doc_id_by_file_id method."""
         doc_id = '10.1234/test'
@@ -0,0 +1,155 @@
+"""
+Unit tests for the derived data cache.
+
+Tests:
+- Extraction of the tei.summary facts
+- Computing missing entries on read and serving stored entries without parsing
+- Null results for unparseable content
+- Eager population and lazily computed extractors
+- Invalidation by extractor version and pruning of deleted content
+
+@testCovers fastapi_app/lib/services/derived_data.py
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from lxml import etree
+
+from fastapi_app.lib.services import derived_data
+from fastapi_app.lib.services.derived_data import (
+    DerivedDataCache,
+    change_signatures,
+    register_extractor,
+    summarize_tei,
+)
+
+TEI_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<TEI xmlns="http://www.tei-c.org/ns/1.0">
+  <teiHeader>
+    <fileDesc>
+      <titleStmt>
+        <title level="a">Test Document</title>
+        <respStmt>
+          <persName xml:id="anna">Anna Annotator</persName>
+          <resp>Annotator</resp>
+        </respStmt>
+      </titleStmt>
+      <publicationStmt>
+        <idno type="DOI">10.1234/test</idno>
+      </publicationStmt>
+      <sourceDesc><bibl>Test</bibl></sourceDesc>
+    </fileDesc>
+    <revisionDesc>
+      <change when="2024-01-01T10:00:00Z" status="draft" who="#anna">
+        <desc>First version</desc>
+        <note type="label">Version 1</note>
+      </change>
+      <change when="2024-01-02T10:00:00Z">Second version</change>
+    </revisionDesc>
+  </teiHeader>
+  <text><body><p>Content</p></body></text>
+</TEI>"""
+
+
+def count_paragraphs(root) -> int:
+    """Lazy extractor used by the tests."""
+    return len(root.findall(".//{http://www.tei-c.org/ns/1.0}p"))
+
+
+class TestDerivedDataCache(unittest.TestCase):
+    """Test the derived data cache."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.cache = DerivedDataCache(self.test_dir)
+        self.storage = MagicMock()
+        self.storage.read_file.side_effect = lambda file_id, file_type: {
+            "hash-1": TEI_XML,
+            "broken": b"<TEI><unclosed>",
+        }.get(file_id)
+        register_extractor("test.paragraphs", count_paragraphs, version=1)
+
+    def tearDown(self):
+        derived_data._extractors.pop("test.paragraphs", None)
+        shutil.rmtree(self.test_dir)
+
+    def test_summarize_tei(self):
+        """The summary contains label, DOI and all changes."""
+        summary = summarize_tei(etree.fromstring(TEI_XML))
+
+        self.assertEqual(summary["label"], "Version 1")
+        self.assertEqual(summary["title"], "Test Document")
+        self.assertEqual(summary["doi"], "10.1234/test")
+        self.assertFalse(summary["has_biblstruct"])
+        self.assertEqual(len(summary["changes"]), 2)
+        first, second = summary["changes"]
+        self.assertEqual(first["annotator"], "Anna Annotator")
+        self.assertEqual(first["desc"], "First version")
+        self.assertEqual(second["status"], "")
+        self.assertIsNone(second["desc"])
+        self.assertEqual(second["text"], "Second version")
+        self.assertEqual(
+            change_signatures(summary),
+            [("#anna", "2024-01-01T10:00:00Z", "draft"), ("", "2024-01-02T10:00:00Z", "")],
+        )
+
+    def test_get_many_computes_and_stores(self):
+        """Missing entries are computed once; later reads come from the database."""
+        results = self.cache.get_many(["hash-1", "missing"], "tei.summary", self.storage)
+        self.assertEqual(results["hash-1"]["label"], "Version 1")
+        self.assertNotIn("missing", results)
+        self.assertEqual(self.storage.read_file.call_count, 2)
+
+        self.storage.read_file.reset_mock()
+        cache = DerivedDataCache(self.test_dir)
+        results = cache.get_many(["hash-1"], "tei.summary", self.storage)
+        self.assertEqual(results["hash-1"]["doi"], "10.1234/test")
+        self.storage.read_file.assert_not_called()
+        self.assertEqual(cache.get_stats()["hits"], 1)
+
+    def test_unparseable_content_is_stored_as_null(self):
+        """Content that cannot be parsed is not parsed again."""
+        self.assertIsNone(self.cache.get("broken", "tei.summary", self.storage))
+        self.storage.read_file.reset_mock()
+
+        results = self.cache.get_many(["broken"], "tei.summary", self.storage)
+        self.assertEqual(results, {"broken": None})
+        self.storage.read_file.assert_not_called()
+
+    def test_populate_and_lazy_extractors(self):
+        """populate() stores eager extractors; lazy ones are computed on first use."""
+        self.cache.populate("hash-1", TEI_XML)
+
+        self.assertEqual(
+            self.cache.get("hash-1", "tei.summary", self.storage)["label"], "Version 1"
+        )
+        self.storage.read_file.assert_not_called()
+
+        self.assertEqual(self.cache.get("hash-1", "test.paragraphs", self.storage), 1)
+        self.storage.read_file.assert_called_once()
+
+    def test_unknown_extractor(self):
+        """Requesting an unregistered extractor raises ValueError."""
+        with self.assertRaises(ValueError):
+            self.cache.get_many(["hash-1"], "test.unknown", self.storage)
+
+    def test_version_bump_and_prune(self):
+        """A new extractor version recomputes results; prune removes stale entries."""
+        self.cache.get("hash-1", "test.paragraphs", self.storage)
+        register_extractor("test.paragraphs", lambda root: 42, version=2)
+
+        self.assertEqual(self.cache.get("hash-1", "test.paragraphs", self.storage), 42)
+
+        # Outdated version 1 of test.paragraphs is removed
+        self.assertEqual(self.cache.prune(["hash-1"]), 1)
+        # Deleted content loses all its entries
+        self.assertEqual(self.cache.prune([]), 2)
+        self.assertEqual(self.cache.get_stats()["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
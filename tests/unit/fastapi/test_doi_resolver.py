@@ -0,0 +1,285 @@
+"""
+Unit tests for DOI resolution and the batch TEI metadata update.
+
+Tests:
+- Lookup at CrossRef with fallback to DataCite, against a local stub server
+- Retry of rate-limited and failing requests
+- Persistent caching of found and unknown DOIs
+- Bounded concurrency of lookups
+- update_tei_metadata() queries the TEI files once and resolves DOIs in one batch
+
+@testCovers fastapi_app/lib/services/doi_resolver.py
+@testCovers fastapi_app/lib/services/metadata_update_utils.py
+"""
+
+import asyncio
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from lxml import etree
+
+from fastapi_app.lib.core.executors import shutdown_executors
+from fastapi_app.lib.services.derived_data import DerivedDataCache
+from fastapi_app.lib.services.doi_resolver import DoiMetadataCache, DoiResolver
+from fastapi_app.lib.services.metadata_update_utils import update_tei_metadata
+from fastapi_app.lib.utils.doi_utils import encode_filename
+
+CROSSREF_RESPONSE = {
+    "message": {
+        "title": ["Found Article"],
+        "author": [{"given": "Jane", "family": "Smith"}],
+        "issued": {"date-parts": [[2023]]},
+        "container-title": ["Journal of Tests"],
+        "DOI": "10.1234/found",
+    }
+}
+
+DATACITE_RESPONSE = {
+    "data": {
+        "id": "10.1234/datacite",
+        "attributes": {
+            "titles": [{"title": "Dataset"}],
+            "creators": [{"givenName": "John", "familyName": "Doe"}],
+            "publicationYear": 2022,
+        },
+    }
+}
+
+TEI_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<TEI xmlns="http://www.tei-c.org/ns/1.0">
+  <teiHeader>
+    <fileDesc>
+      <titleStmt><title>Draft</title></titleStmt>
+      <publicationStmt><p>Unpublished</p></publicationStmt>
+      <sourceDesc><bibl>Test</bibl></sourceDesc>
+    </fileDesc>
+  </teiHeader>
+  <text><body><p>Content</p></body></text>
+</TEI>"""
+
+
+class StubApiHandler(BaseHTTPRequestHandler):
+    """Serves CrossRef and DataCite responses from the server's `routes`."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            responses = server.routes.get(self.path, [(404, {})])
+            status, body = responses.pop(0) if len(responses) > 1 else responses[0]
+        time.sleep(server.delay)
+        with server.lock:
+            server.active -= 1
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServerTestCase(unittest.TestCase):
+    """Starts a stub metadata API and a temporary cache directory."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubApiHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.active = 0
+        self.server.max_active = 0
+        self.server.delay = 0
+        self.server.routes = {
+            "/works/10.1234/found": [(200, CROSSREF_RESPONSE)],
+            "/dois/10.1234/datacite": [(200, DATACITE_RESPONSE)],
+        }
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.cache = DoiMetadataCache(self.test_dir)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.test_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutdown_executors()
+
+    def make_resolver(self, **kwargs) -> DoiResolver:
+        options = dict(host_rate=0, backoff=0.01, timeout=5)
+        options.update(kwargs)
+        return DoiResolver(
+            self.cache,
+            crossref_url=f"{self.base_url}/works/",
+            datacite_url=f"{self.base_url}/dois/",
+            **options
+        )
+
+
+class TestDoiResolver(StubServerTestCase):
+    """Test concurrent, cached DOI lookups."""
+
+    def test_crossref_and_datacite_fallback(self):
+        """DOIs are looked up at CrossRef, then DataCite; unknown DOIs resolve to None."""
+        results = asyncio.run(self.make_resolver().resolve_many(
+            ["10.1234/found", "https://doi.org/10.1234/datacite", "10.1234/missing", "no-doi"]
+        ))
+
+        self.assertEqual(results["10.1234/found"]["title"], "Found Article")
+        self.assertEqual(results["10.1234/found"]["authors"], [{"given": "Jane", "family": "Smith"}])
+        self.assertEqual(results["https://doi.org/10.1234/datacite"]["title"], "Dataset")
+        self.assertIsNone(results["10.1234/missing"])
+        self.assertIsNone(results["no-doi"])
+        self.assertEqual(len(self.server.requests), 5)
+
+    def test_results_are_cached(self):
+        """A second run only queries the APIs for DOIs it has not seen."""
+        asyncio.run(self.make_resolver().resolve_many(["10.1234/found", "10.1234/missing"]))
+        self.server.requests.clear()
+
+        resolver = self.make_resolver()
+        results = asyncio.run(resolver.resolve_many(
+            ["10.1234/FOUND", "10.1234/missing", "10.1234/datacite"]
+        ))
+
+        self.assertEqual(results["10.1234/FOUND"]["title"], "Found Article")
+        self.assertIsNone(results["10.1234/missing"])
+        self.assertEqual(self.server.requests, ["/works/10.1234/datacite", "/dois/10.1234/datacite"])
+        self.assertEqual(resolver.stats["cached"], 2)
+        self.assertEqual(self.cache.get_stats(), {"entries": 3, "not_found": 1})
+
+    def test_expired_not_found_is_looked_up_again(self):
+        """Unknown DOIs are asked for again once the not-found TTL has passed."""
+        self.cache.not_found_ttl = -1
+        asyncio.run(self.make_resolver().resolve_many(["10.1234/missing"]))
+        asyncio.run(self.make_resolver().resolve_many(["10.1234/missing"]))
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_retries_transient_failures(self):
+        """Rate-limited and failing requests are retried; failures are not cached."""
+        self.server.routes["/works/10.1234/flaky"] = [
+            (429, {}), (503, {}), (200, CROSSREF_RESPONSE)
+        ]
+        self.server.routes["/works/10.1234/down"] = [(500, {})]
+
+        resolver = self.make_resolver(retries=2)
+        results = asyncio.run(resolver.resolve_many(["10.1234/flaky", "10.1234/down"]))
+
+        self.assertEqual(results["10.1234/flaky"]["title"], "Found Article")
+        self.assertIsNone(results["10.1234/down"])
+        self.assertEqual(resolver.stats["failed"], 1)
+        self.assertEqual(self.server.requests.count("/works/10.1234/down"), 3)
+        self.assertNotIn("10.1234/down", self.cache.get_many(["10.1234/down"]))
+
+    def test_concurrency_is_bounded(self):
+        """No more than `concurrency` requests are in flight."""
+        self.server.delay = 0.05
+        dois = [f"10.1234/doc{i}" for i in range(8)]
+
+        asyncio.run(self.make_resolver(concurrency=3).resolve_many(dois))
+
+        self.assertLessEqual(self.server.max_active, 3)
+        self.assertGreater(self.server.max_active, 1)
+
+    def test_host_rate_limit(self):
+        """Requests to one host are spaced according to the rate limit."""
+        start = time.monotonic()
+        asyncio.run(self.make_resolver(host_rate=20, concurrency=4).resolve_many(
+            [f"10.1234/found{i}" for i in range(3)]
+        ))
+        # 6 requests (CrossRef and DataCite 404) to the same host, 50 ms apart
+        self.assertGreaterEqual(time.monotonic() - start, 0.25)
+
+
+class TestUpdateTeiMetadata(StubServerTestCase):
+    """Test the batch metadata update of TEI files."""
+
+    def setUp(self):
+        super().setUp()
+        self.derived_cache = DerivedDataCache(self.test_dir)
+        doc_ids = [encode_filename("10.1234/found"), encode_filename("10.1234/datacite"), "nodoi"]
+        self.pdfs = [
+            SimpleNamespace(id=f"pdf{i}", stable_id=f"pdf-stable{i}", doc_id=doc_id, doc_metadata={})
+            for i, doc_id in enumerate(doc_ids)
+        ]
+        self.teis = [
+            SimpleNamespace(id=f"tei{i}", stable_id=f"tei-stable{i}", doc_id=doc_id)
+            for i, doc_id in enumerate(doc_ids)
+        ]
+        self.file_repo = MagicMock()
+        self.file_repo.db.db_path = self.test_dir / "metadata.db"
+        self.file_repo.list_files.side_effect = lambda file_type: (
+            self.pdfs if file_type == "pdf" else self.teis
+        )
+        self.saved = {}
+        self.file_storage = MagicMock()
+        self.file_storage.read_file.side_effect = lambda file_id, file_type: (
+            self.saved.get(file_id, TEI_XML)
+        )
+
+        def save_file(content, file_type):
+            file_id = f"new{len(self.saved)}"
+            self.saved[file_id] = content
+            return file_id, True
+
+        self.file_storage.save_file.side_effect = save_file
+
+    def run_update(self, **kwargs):
+        return asyncio.run(update_tei_metadata(
+            self.file_repo,
+            self.file_storage,
+            extraction_fallback=False,
+            doi_resolver=self.make_resolver(),
+            derived_cache=self.derived_cache,
+            **kwargs
+        ))
+
+    def test_update_with_doi_metadata(self):
+        """TEI files of PDFs with DOIs get a biblStruct; the TEI list is queried once."""
+        stats = self.run_update()
+
+        self.assertEqual(stats, {"processed": 3, "updated": 2, "skipped": 1, "errors": 0})
+        self.assertEqual(self.file_repo.list_files.call_count, 2)
+        titles = sorted(
+            etree.fromstring(content).findtext(
+                ".//{http://www.tei-c.org/ns/1.0}biblStruct//{http://www.tei-c.org/ns/1.0}title"
+            )
+            for content in self.saved.values()
+        )
+        self.assertEqual(titles, ["Dataset", "Found Article"])
+
+    def test_rerun_uses_caches(self):
+        """A forced re-run reads DOI metadata from the cache instead of the APIs."""
+        self.run_update()
+        self.server.requests.clear()
+
+        stats = self.run_update(force=True)
+
+        self.assertEqual(stats["updated"], 2)
+        self.assertEqual(self.server.requests, [])
+
+    def test_cancellation(self):
+        """A cancelled update raises before changing files."""
+        with self.assertRaises(Exception):
+            self.run_update(cancellation_check=lambda: True)
+        self.assertEqual(self.saved, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
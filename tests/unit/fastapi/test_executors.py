@@ -0,0 +1,139 @@
+"""
+Unit tests for the shared executors and the event loop lag monitor.
+
+Tests:
+- Running blocking functions in the I/O pool off the event loop thread
+- Route handlers decorated with run_blocking keep their signature
+- Running functions in the CPU process pool
+- Logging of event loop stalls with the blocking function
+
+@testCovers fastapi_app/lib/core/executors.py
+"""
+
+import asyncio
+import contextvars
+import inspect
+import os
+import threading
+import time
+import unittest
+import unittest.mock
+from pathlib import Path
+
+from fastapi_app.lib.core import executors
+from fastapi_app.lib.core.executors import (
+    EventLoopLagMonitor,
+    get_executor_stats,
+    run_blocking,
+    run_in_cpu_pool,
+    run_in_io_pool,
+    shutdown_executors,
+)
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+def block_loop(seconds: float) -> None:
+    """Blocking call made directly on the event loop."""
+    time.sleep(seconds)
+
+
+class TestExecutors(unittest.TestCase):
+    """Test running blocking work in the shared executors."""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutdown_executors()
+
+    def test_io_pool_runs_off_loop_thread(self):
+        """Blocking functions run in a pool thread and see the caller's context."""
+        async def main():
+            request_id.set("req-1")
+            loop_thread = threading.get_ident()
+            thread, value = await run_in_io_pool(
+                lambda: (threading.get_ident(), request_id.get())
+            )
+            return loop_thread, thread, value
+
+        loop_thread, thread, value = asyncio.run(main())
+        self.assertNotEqual(thread, loop_thread)
+        self.assertEqual(value, "req-1")
+
+    def test_io_pool_propagates_exceptions(self):
+        """Exceptions raised in the pool reach the awaiting handler."""
+        def fail():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            asyncio.run(run_in_io_pool(fail))
+
+    def test_run_blocking_keeps_signature(self):
+        """Decorated functions become coroutine functions with the original signature."""
+        def handler(collection: str, variant: str = "all") -> str:
+            return f"{collection}/{variant}/{threading.current_thread().name}"
+
+        wrapped = run_blocking(handler)
+        self.assertTrue(inspect.iscoroutinefunction(wrapped))
+        self.assertEqual(inspect.signature(wrapped), inspect.signature(handler))
+
+        result = asyncio.run(wrapped("corpus", variant="grobid"))
+        self.assertTrue(result.startswith("corpus/grobid/io-pool"))
+
+    def test_cpu_pool_runs_in_other_process(self):
+        """CPU-bound functions run in a worker process."""
+        pid = asyncio.run(run_in_cpu_pool(os.getpid))
+        self.assertNotEqual(pid, os.getpid())
+        self.assertGreaterEqual(get_executor_stats()["cpu_submitted"], 1)
+
+
+class TestEventLoopLagMonitor(unittest.TestCase):
+    """Test detection of handlers blocking the event loop."""
+
+    def run_monitored(self, blocking_seconds: float):
+        """Run a coroutine that blocks the loop while a monitor is active."""
+        logger = unittest.mock.Mock()
+        monitor = EventLoopLagMonitor(threshold=0.05, logger_inst=logger)
+
+        async def main():
+            monitor.start()
+            await asyncio.sleep(0.1)
+            block_loop(blocking_seconds)
+            await asyncio.sleep(0.1)
+            await monitor.stop()
+
+        asyncio.run(main())
+        return monitor, logger
+
+    def test_logs_blocking_function(self):
+        """A stall is logged with the function that blocked the loop."""
+        # Treat this test module as application code
+        with unittest.mock.patch.object(executors, "_APP_DIR", str(Path(__file__).parent) + os.sep):
+            monitor, logger = self.run_monitored(0.3)
+
+        # A loaded machine can add stalls of its own; one of them must be ours
+        self.assertGreaterEqual(monitor.stalls, 1)
+        self.assertGreater(monitor.max_lag, 0.2)
+        messages = [call[0][0] for call in logger.warning.call_args_list]
+        self.assertTrue(all("Event loop blocked for" in message for message in messages))
+        self.assertTrue(any("block_loop" in message for message in messages), messages)
+
+    def test_no_log_without_stall(self):
+        """Short calls are not reported."""
+        monitor, logger = self.run_monitored(0.01)
+        self.assertEqual(monitor.stalls, 0)
+        logger.warning.assert_not_called()
+
+    def test_disabled_with_zero_threshold(self):
+        """A threshold of 0 disables monitoring."""
+        monitor = EventLoopLagMonitor(threshold=0)
+
+        async def main():
+            monitor.start()
+            await monitor.stop()
+
+        asyncio.run(main())
+        self.assertEqual(monitor.get_stats()["stalls"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
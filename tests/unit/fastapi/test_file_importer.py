@@ -10,11 +10,13 @@ Tests:
 - File grouping by document ID
 - Metadata extraction and inheritance
 - Gold standard detection using patterns (filename and directory)
+- Derived data of imported TEI files (sequential and pipelined)
 
 @testCovers fastapi_app/lib/storage/file_importer.py
 """
 
 import unittest
+import unittest.mock
 import tempfile
 import shutil
 import json
@@ -26,6 +28,7 @@ from fastapi_app.lib.storage.file_importer import FileImporter
 from fastapi_app.lib.core.database import DatabaseManager
 from fastapi_app.lib.repository.file_repository import FileRepository
 from fastapi_app.lib.storage.file_storage import FileStorage
+from fastapi_app.lib.services.derived_data import DerivedDataCache
 
 
 class TestFileImporter(unittest.TestCase):
@@ -613,6 +616,145 @@ startxref
         self.assertTrue(gold_file.is_gold_standard)
         self.assertFalse(non_gold_file.is_gold_standard)
 
+    def _file_summary(self):
+        """Comparable summary of all file records (without ids and timestamps)."""
+        return sorted(
+            (f.filename, f.doc_id, f.file_type, f.version, f.is_gold_standard,
+             f.label, f.doc_collections, json.dumps(f.doc_metadata, sort_keys=True))
+            for f in self.repo.list_files()
+        )
+
+    def _create_corpus(self):
+        """Create PDFs with TEI versions in two collection subdirectories."""
+        for collection in ("corpus1", "corpus2"):
+            for i in range(3):
+                stem = f"10.1234_{collection}-{i}"
+                self.create_test_pdf(self.import_dir / collection / f"{stem}.pdf")
+                self.create_test_tei(
+                    self.import_dir / collection / f"{stem}.tei.xml",
+                    doc_id=f"10.1234/{collection}-{i}", title=f"Gold {collection} {i}"
+                )
+                self.create_test_tei(
+                    self.import_dir / collection / f"{stem}.v1.tei.xml",
+                    doc_id=f"10.1234/{collection}-{i}", title=f"Version {collection} {i}"
+                )
+
+    def test_pipelined_import_matches_sequential(self):
+        """Test that the pipelined mode creates the same records as the sequential import."""
+        self._create_corpus()
+
+        stats = FileImporter(self.db, self.storage, self.repo).import_directory(
+            self.import_dir, recursive_collections=True
+        )
+        self.assertEqual(stats['files_imported'], 18)
+        sequential = self._file_summary()
+
+        self.db.clear_all_data()
+
+        # Small batches so that documents span several write transactions
+        importer = FileImporter(self.db, self.storage, self.repo, workers=2, batch_size=2)
+        stats = importer.import_directory(self.import_dir, recursive_collections=True)
+
+        self.assertEqual(stats['files_scanned'], 18)
+        self.assertEqual(stats['files_imported'], 18)
+        self.assertEqual(stats['errors'], [])
+        self.assertEqual(self._file_summary(), sequential)
+
+        # PDF metadata and label were taken from the TEI files
+        pdf = next(f for f in self.repo.list_files() if f.filename == "10.1234_corpus1-0.pdf")
+        self.assertEqual(pdf.doc_metadata.get("doi"), "10.1234/corpus1-0")
+
+        # Content is in storage and every record holds a reference
+        for file_meta in self.repo.list_files():
+            self.assertTrue(self.storage.file_exists(file_meta.id, file_meta.file_type))
+            self.assertGreaterEqual(self.storage.ref_manager.get_reference_count(file_meta.id), 1)
+
+    def test_import_stores_derived_data(self):
+        """Test that both import modes store the derived data of TEI files."""
+        self._create_corpus()
+
+        for workers in (1, 2):
+            self.db.clear_all_data()
+            cache = DerivedDataCache(self.test_dir)
+            cache.prune([])
+
+            FileImporter(self.db, self.storage, self.repo, workers=workers).import_directory(
+                self.import_dir, recursive_collections=True
+            )
+
+            tei_ids = [f.id for f in self.repo.list_files() if f.file_type == 'tei']
+            self.assertTrue(tei_ids)
+            unreadable = unittest.mock.Mock()
+            unreadable.read_file.side_effect = AssertionError("content must not be read")
+            summaries = cache.get_many(tei_ids, "tei.summary", unreadable)
+            self.assertEqual(len(summaries), len(tei_ids))
+            self.assertTrue(all(summary is not None for summary in summaries.values()))
+
+    def test_pipelined_reimport_skips_existing_files(self):
+        """Test that re-importing in pipelined mode skips files and adds new collections."""
+        self._create_corpus()
+
+        importer = FileImporter(self.db, self.storage, self.repo, workers=2)
+        importer.import_directory(self.import_dir, collection="first")
+
+        importer = FileImporter(self.db, self.storage, self.repo, workers=2)
+        stats = importer.import_directory(self.import_dir, collection="second")
+
+        self.assertEqual(stats['files_imported'], 0)
+        self.assertEqual(stats['files_skipped'], 18)
+        files = self.repo.list_files()
+        self.assertEqual(len(files), 18)
+        for file_meta in files:
+            self.assertEqual(file_meta.doc_collections, ["first", "second"])
+
+    def test_pipelined_import_removes_blobs_of_failed_batch(self):
+        """Test that content written for a batch that fails to commit is removed again."""
+        self._create_corpus()
+
+        insert_files = self.repo.insert_files
+        calls = []
+
+        def fail_first_batch(creates):
+            calls.append([create.id for create in creates])
+            if len(calls) == 1:
+                raise RuntimeError("database is locked")
+            return insert_files(creates)
+
+        importer = FileImporter(self.db, self.storage, self.repo, workers=2, batch_size=2)
+        with unittest.mock.patch.object(self.repo, 'insert_files', side_effect=fail_first_batch):
+            stats = importer.import_directory(self.import_dir, recursive_collections=True)
+
+        self.assertEqual(len(stats['errors']), 2)
+        imported = {f.id for f in self.repo.list_files()}
+        for file_meta in self.repo.list_files():
+            self.assertTrue(self.storage.file_exists(file_meta.id, file_meta.file_type))
+        failed = [file_id for file_id in calls[0] if file_id not in imported]
+        self.assertTrue(failed)
+        for file_id in failed:
+            self.assertFalse(self.storage.file_exists(file_id, 'tei'))
+            self.assertFalse(self.storage.file_exists(file_id, 'pdf'))
+
+    def test_pipelined_import_reports_progress(self):
+        """Test that the pipelined mode reports monotonic progress up to 100."""
+        self._create_corpus()
+
+        class RecordingProgress:
+            def __init__(self):
+                self.values = []
+
+            def set_label(self, label):
+                pass
+
+            def set_value(self, value):
+                self.values.append(value)
+
+        progress = RecordingProgress()
+        importer = FileImporter(self.db, self.storage, self.repo, workers=2, progress=progress, batch_size=2)
+        importer.import_directory(self.import_dir)
+
+        self.assertEqual(progress.values, sorted(progress.values))
+        self.assertEqual(progress.values[-1], 100)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,211 @@
+"""
+Unit tests for the versioned file list snapshot and GET /files/list caching.
+
+@testCovers fastapi_app/lib/services/file_list_snapshot.py
+@testCovers fastapi_app/lib/core/migrations/versions/m009_add_file_changes_log.py
+@testCovers fastapi_app/routers/files_list.py:list_files
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from fastapi_app.lib.core.database import DatabaseManager
+from fastapi_app.lib.models.models import FileCreate
+from fastapi_app.lib.repository.file_repository import FileRepository
+from fastapi_app.lib.services.file_list_snapshot import FileListSnapshot
+
+
+class TestFileListSnapshot(unittest.TestCase):
+    """Test incremental maintenance of the snapshot via the change log."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.db = DatabaseManager(self.test_dir / "metadata.db")
+        self.repo = FileRepository(self.db)
+
+    def tearDown(self):
+        import gc
+        gc.collect()
+        shutil.rmtree(self.test_dir)
+
+    def _add(self, file_id, doc_id, file_type="pdf", **kwargs):
+        return self.repo.insert_file(FileCreate(
+            id=file_id, filename=f"{file_id}.{file_type}", doc_id=doc_id,
+            file_type=file_type, file_size=100, **kwargs
+        ))
+
+    def test_write_paths_bump_change_version(self):
+        """Triggers log every insert, update and delete."""
+        v0 = self.repo.get_change_version()
+        pdf = self._add("pdf1", "doc1", doc_collections=["c1"])
+        v1 = self.repo.get_change_version()
+        self.assertGreater(v1, v0)
+
+        self.repo.update_doc_id(pdf.stable_id, "doc2")
+        v2 = self.repo.get_change_version()
+        self.assertGreater(v2, v1)
+        self.assertEqual(self.repo.get_changed_doc_ids(v1, v2), {"doc1", "doc2"})
+
+        self.repo.delete_file("pdf1")
+        self.assertGreater(self.repo.get_change_version(), v2)
+
+    def test_incremental_refresh(self):
+        """Only changed documents are reloaded."""
+        self._add("pdf1", "doc1", doc_collections=["c1"])
+        self._add("pdf2", "doc2", doc_collections=["c2"])
+
+        snapshot = FileListSnapshot()
+        version = snapshot.refresh(self.repo)
+        self.assertEqual({d["doc_id"] for d in snapshot.documents_view()}, {"doc1", "doc2"})
+
+        # Unchanged database: no reload
+        with patch.object(self.repo, "list_document_groups") as list_groups:
+            self.assertEqual(snapshot.refresh(self.repo), version)
+            list_groups.assert_not_called()
+
+        tei = self._add("tei1", "doc1", file_type="tei", variant="grobid")
+        with patch.object(self.repo, "list_document_groups", wraps=self.repo.list_document_groups) as list_groups:
+            new_version = snapshot.refresh(self.repo)
+            list_groups.assert_called_once_with(doc_ids=["doc1"])
+        self.assertGreater(new_version, version)
+
+        docs = snapshot.documents_view(variant="grobid", locked_ids={tei.stable_id})
+        self.assertEqual([d["doc_id"] for d in docs], ["doc1"])
+        self.assertTrue(docs[0]["artifacts"][0]["is_locked"])
+        # Lock overlay does not modify the stored document
+        self.assertFalse(snapshot.documents_view(variant="grobid")[0]["artifacts"][0]["is_locked"])
+
+        self.repo.delete_file("pdf2")
+        snapshot.refresh(self.repo)
+        self.assertEqual([d["doc_id"] for d in snapshot.documents_view()], ["doc1"])
+
+    def test_collection_view(self):
+        """Collection access excludes documents and trims collection lists."""
+        self._add("pdf1", "doc1", doc_collections=["c1", "c2"])
+        self._add("pdf2", "doc2", doc_collections=["c2"])
+        snapshot = FileListSnapshot()
+        snapshot.refresh(self.repo)
+
+        docs = snapshot.documents_view(collections=["c1"])
+        self.assertEqual(len(docs), 1)
+        self.assertEqual(docs[0]["collections"], ["c1"])
+        self.assertEqual(snapshot.documents_view(collections=[]), [])
+
+
+class TestFileListEndpointCaching(unittest.TestCase):
+    """Test ETag, 304 and delta responses of GET /files/list."""
+
+    def setUp(self):
+        from fastapi_app.main import app
+        from fastapi_app.lib.core.dependencies import (
+            get_file_repository, get_current_user, get_session_id
+        )
+
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.db_dir = self.test_dir / "db"
+        self.db_dir.mkdir()
+        self.db = DatabaseManager(self.db_dir / "metadata.db")
+        self.repo = FileRepository(self.db)
+
+        self.settings_patcher = patch("fastapi_app.routers.files_list.get_settings")
+        mock_settings = self.settings_patcher.start()
+        mock_settings.return_value.db_dir = self.db_dir
+
+        self.app = app
+        app.dependency_overrides[get_file_repository] = lambda: self.repo
+        app.dependency_overrides[get_current_user] = lambda: {"username": "admin", "roles": ["*"]}
+        app.dependency_overrides[get_session_id] = lambda: "test-session"
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        import gc
+        self.app.dependency_overrides.clear()
+        self.settings_patcher.stop()
+        gc.collect()
+        shutil.rmtree(self.test_dir)
+
+    def _add(self, file_id, doc_id):
+        self.repo.insert_file(FileCreate(
+            id=file_id, filename=f"{file_id}.pdf", doc_id=doc_id,
+            file_type="pdf", file_size=100, doc_collections=["c1"]
+        ))
+
+    def test_etag_and_not_modified(self):
+        self._add("pdf1", "doc1")
+        response = self.client.get("/api/v1/files/list")
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["etag"]
+        version = response.json()["version"]
+        self.assertTrue(etag.startswith(f'"{version}-'))
+
+        response = self.client.get("/api/v1/files/list", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+        self._add("pdf2", "doc2")
+        response = self.client.get("/api/v1/files/list", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(response.json()["version"], version)
+        self.assertEqual(len(response.json()["files"]), 2)
+
+    def test_delta_since_version(self):
+        self._add("pdf1", "doc1")
+        self._add("pdf2", "doc2")
+        version = self.client.get("/api/v1/files/list").json()["version"]
+
+        self._add("pdf3", "doc3")
+        self.repo.delete_file("pdf1")
+
+        data = self.client.get(f"/api/v1/files/list?since={version}").json()
+        self.assertTrue(data["delta"])
+        self.assertEqual([d["doc_id"] for d in data["files"]], ["doc3"])
+        self.assertEqual(data["removed"], ["doc1"])
+        self.assertEqual(data["locked"], [])
+
+        # Unknown (future) version falls back to a full list
+        data = self.client.get(f"/api/v1/files/list?since={data['version'] + 100}").json()
+        self.assertFalse(data["delta"])
+        self.assertEqual({d["doc_id"] for d in data["files"]}, {"doc2", "doc3"})
+
+    def test_etag_covers_document_permissions(self):
+        from fastapi_app.lib.core.dependencies import get_current_user
+        from fastapi_app.lib.repository.permissions_db import (
+            PermissionsDB, set_document_permissions
+        )
+
+        self._add("pdf1", "doc1")
+        permissions_db = PermissionsDB(self.db_dir / "permissions.db")
+        self.app.dependency_overrides[get_current_user] = \
+            lambda: {"username": "annotator", "roles": ["annotator"]}
+
+        with patch.dict("os.environ", {"ACCESS_CONTROL_MODE": "granular"}), \
+                patch("fastapi_app.routers.files_list.get_user_collections", return_value=None), \
+                patch("fastapi_app.lib.permissions.acl_utils._get_permissions_db",
+                      return_value=permissions_db):
+            etag = self.client.get("/api/v1/files/list").headers["etag"]
+            response = self.client.get("/api/v1/files/list", headers={"If-None-Match": etag})
+            self.assertEqual(response.status_code, 304)
+
+            set_document_permissions("pdf1", "owner", "owner", "someone", permissions_db)
+            response = self.client.get("/api/v1/files/list", headers={"If-None-Match": etag})
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response.headers["etag"], etag)
+
+    def test_etag_covers_user_roles(self):
+        from fastapi_app.lib.core.dependencies import get_current_user
+
+        self._add("pdf1", "doc1")
+        etag = self.client.get("/api/v1/files/list").headers["etag"]
+
+        self.app.dependency_overrides[get_current_user] = lambda: {"username": "admin", "roles": ["user"]}
+        with patch("fastapi_app.routers.files_list.get_user_collections", return_value=None):
+            response = self.client.get("/api/v1/files/list", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
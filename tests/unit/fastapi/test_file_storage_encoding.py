@@ -0,0 +1,255 @@
+"""
+Unit tests for compressed and delta-encoded XML storage.
+
+Tests:
+- Blob codec round trips and corrupt data detection
+- Compressed storage with transparent read_file() and get_file_path()
+- Delta storage of versions, with bounded chain depth
+- Deleting a delta base keeps its dependents readable
+- Repacking stored files between encodings
+- Storage scans recognize encoded files
+
+@testCovers fastapi_app/lib/storage/blob_codec.py
+@testCovers fastapi_app/lib/storage/file_storage.py
+@testCovers fastapi_app/lib/storage/storage_repack.py
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi_app.lib.core.database import DatabaseManager
+from fastapi_app.lib.models.models import FileCreate
+from fastapi_app.lib.repository.file_repository import FileRepository
+from fastapi_app.lib.storage import blob_codec, file_storage
+from fastapi_app.lib.storage.file_storage import FileStorage, write_storage_file
+from fastapi_app.lib.storage.storage_repack import repack_storage
+from fastapi_app.lib.utils.hash_utils import generate_file_hash, get_storage_path
+
+
+def make_tei(version: int, references: int = 60) -> bytes:
+    """TEI document whose versions differ in a few lines."""
+    bibls = "".join(
+        f'      <bibl xml:id="b{i}"><author>Author {i}</author>'
+        f'<title>{"Revised title" if i < version else "Title"} {i}</title></bibl>\n'
+        for i in range(references)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<TEI xmlns="http://www.tei-c.org/ns/1.0">\n'
+        f'  <teiHeader><fileDesc><titleStmt><title>Version {version}</title></titleStmt></fileDesc></teiHeader>\n'
+        f'  <text><back><listBibl>\n{bibls}  </listBibl></back></text>\n'
+        '</TEI>\n'
+    ).encode('utf-8')
+
+
+class TestBlobCodec(unittest.TestCase):
+    """Test encoding and decoding of blobs."""
+
+    def test_compressed_round_trip(self):
+        content = make_tei(1)
+        blob = blob_codec.compress_blob(content)
+        self.assertTrue(blob_codec.is_encoded(blob))
+        self.assertLess(len(blob), len(content) / 3)
+        self.assertEqual(blob_codec.decode_blob(blob, lambda _: None), content)
+
+    def test_delta_round_trip(self):
+        base, content = make_tei(1), make_tei(3) + b"<!-- no trailing newline -->"
+        base_hash = generate_file_hash(base)
+        blob = blob_codec.delta_blob(content, base, base_hash, base_depth=2)
+
+        header = blob_codec.parse_header(blob)
+        self.assertEqual((header.kind, header.depth, header.base_hash), (blob_codec.KIND_DELTA, 3, base_hash))
+        self.assertLess(len(blob), len(blob_codec.compress_blob(content)))
+        self.assertEqual(blob_codec.decode_blob(blob, {base_hash: base}.get), content)
+
+    def test_invalid_blobs(self):
+        blob = blob_codec.compress_blob(make_tei(1))
+        with self.assertRaises(blob_codec.BlobFormatError):
+            blob_codec.decode_blob(b"<TEI/>", lambda _: None)
+        with self.assertRaises(blob_codec.BlobFormatError):
+            blob_codec.decode_blob(blob[:len(blob) // 2] + b"garbage", lambda _: None)
+
+        delta = blob_codec.delta_blob(make_tei(2), make_tei(1), "ab" * 32, 0)
+        with self.assertRaises(blob_codec.BlobFormatError):
+            blob_codec.decode_blob(delta, lambda _: None)
+
+
+class StorageTestCase(unittest.TestCase):
+    """Creates a database and a storage directory."""
+
+    xml_encoding = 'plain'
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.db = DatabaseManager(self.test_dir / "metadata.db")
+        self.storage = self.make_storage(self.xml_encoding)
+
+    def tearDown(self):
+        import gc
+        gc.collect()
+        shutil.rmtree(self.test_dir)
+
+    def make_storage(self, xml_encoding: str) -> FileStorage:
+        return FileStorage(
+            self.test_dir / "files", self.db, xml_encoding=xml_encoding, cache_dir=self.test_dir / "cache"
+        )
+
+    def stored_names(self) -> list:
+        return sorted(path.name for path in (self.test_dir / "files").rglob("*") if path.is_file())
+
+
+class TestCompressedStorage(StorageTestCase):
+    """Test the compressed encoding."""
+
+    xml_encoding = 'compressed'
+
+    def test_save_and_read(self):
+        """XML files are stored compressed and read back transparently; PDFs stay plain."""
+        content = make_tei(1)
+        file_hash, storage_path = self.storage.save_file(content, 'tei')
+        pdf_hash, pdf_path = self.storage.save_file(b"%PDF-1.4 test", 'pdf')
+
+        self.assertEqual(storage_path.name, f"{file_hash}.tei.xml.z")
+        self.assertEqual(pdf_path.name, f"{pdf_hash}.pdf")
+        self.assertLess(storage_path.stat().st_size, len(content))
+        self.assertEqual(self.storage.read_file(file_hash, 'tei'), content)
+        self.assertTrue(self.storage.file_exists(file_hash, 'tei'))
+        self.assertTrue(self.storage.verify_file(file_hash, 'tei'))
+
+    def test_get_file_path_returns_decoded_copy(self):
+        """get_file_path() returns a plain copy, which is removed with the file."""
+        content = make_tei(1)
+        file_hash, _ = self.storage.save_file(content, 'tei')
+
+        path = self.storage.get_file_path(file_hash, 'tei')
+        self.assertTrue(path.is_relative_to(self.test_dir / "cache"))
+        self.assertEqual(path.name, f"{file_hash}.tei.xml")
+        self.assertEqual(path.read_bytes(), content)
+
+        self.assertTrue(self.storage.delete_file(file_hash, 'tei'))
+        self.assertFalse(path.exists())
+        self.assertFalse(self.storage.file_exists(file_hash, 'tei'))
+
+    def test_existing_plain_file_is_reused(self):
+        """Files stored plain before the encoding was enabled are not stored twice."""
+        content = make_tei(1)
+        self.make_storage('plain').save_file(content, 'tei', increment_ref=False)
+        file_hash, storage_path = self.storage.save_file(content, 'tei')
+
+        self.assertEqual(storage_path.name, f"{file_hash}.tei.xml")
+        self.assertEqual(self.stored_names(), [f"{file_hash}.tei.xml"])
+        _, written = write_storage_file(self.test_dir / "files", content, file_hash, 'tei', 'compressed')
+        self.assertFalse(written)
+
+    def test_scans_recognize_encoded_files(self):
+        """Storage statistics and orphan detection handle encoded files."""
+        file_hash, _ = self.storage.save_file(make_tei(1), 'tei', increment_ref=False)
+
+        stats = self.storage.get_storage_stats()
+        self.assertEqual(stats['files_by_type']['tei'], 1)
+        self.assertEqual(stats['encoded_files'], 1)
+        self.assertEqual(self.storage.ref_manager.get_orphaned_files(self.storage.data_root), [(file_hash, 'tei')])
+
+
+class TestDeltaStorage(StorageTestCase):
+    """Test the delta encoding."""
+
+    xml_encoding = 'delta'
+
+    def save_versions(self, count: int) -> list:
+        hashes = []
+        for version in range(count):
+            file_hash, _ = self.storage.save_file(
+                make_tei(version), 'tei', base_hash=hashes[-1] if hashes else None
+            )
+            hashes.append(file_hash)
+        return hashes
+
+    def header(self, file_hash: str):
+        return blob_codec.parse_header(self.storage.get_blob_path(file_hash, 'tei').read_bytes())
+
+    def test_versions_are_stored_as_deltas(self):
+        """New versions are deltas against their base and read back unchanged."""
+        hashes = self.save_versions(3)
+
+        self.assertEqual(self.header(hashes[0]).kind, blob_codec.KIND_COMPRESSED)
+        self.assertEqual(self.header(hashes[2]).base_hash, hashes[1])
+        self.assertEqual(self.header(hashes[2]).depth, 2)
+        for version, file_hash in enumerate(hashes):
+            self.assertEqual(self.storage.read_file(file_hash, 'tei'), make_tei(version))
+        self.assertEqual(self.storage.ref_manager.get_delta_dependents(hashes[1]), [hashes[2]])
+
+    def test_chain_depth_is_bounded(self):
+        """Once the maximum depth is reached, a version is stored compressed."""
+        with patch.object(file_storage, 'STORAGE_MAX_DELTA_DEPTH', 2):
+            hashes = self.save_versions(5)
+
+        self.assertEqual([self.header(h).depth for h in hashes], [0, 1, 2, 0, 1])
+        self.assertEqual(self.storage.read_file(hashes[4], 'tei'), make_tei(4))
+
+    def test_deleting_base_keeps_dependents(self):
+        """Deltas against a deleted file are stored compressed first."""
+        hashes = self.save_versions(3)
+
+        self.assertTrue(self.storage.delete_file(hashes[1], 'tei'))
+
+        self.assertFalse(self.storage.file_exists(hashes[1], 'tei'))
+        self.assertEqual(self.header(hashes[2]).kind, blob_codec.KIND_COMPRESSED)
+        self.assertEqual(self.storage.read_file(hashes[2], 'tei'), make_tei(2))
+        self.assertEqual(self.storage.ref_manager.get_delta_dependents(hashes[1]), [])
+
+
+class TestRepack(StorageTestCase):
+    """Test converting stored files between encodings."""
+
+    def setUp(self):
+        super().setUp()
+        repo = FileRepository(self.db)
+        self.contents = {}
+        for doc in range(2):
+            for version in range(4):
+                content = make_tei(version) + f"<!-- doc {doc} -->\n".encode()
+                file_hash, _ = self.storage.save_file(content, 'tei', increment_ref=False)
+                self.contents[file_hash] = content
+                repo.insert_file(FileCreate(
+                    id=file_hash,
+                    filename=f"doc{doc}.tei.xml",
+                    doc_id=f"doc{doc}",
+                    file_type='tei',
+                    file_size=len(content),
+                    variant='grobid',
+                    version=version or None,
+                    is_gold_standard=version == 0
+                ))
+
+    def assert_contents(self, storage: FileStorage):
+        for file_hash, content in self.contents.items():
+            self.assertEqual(storage.read_file(file_hash, 'tei'), content)
+
+    def test_repack_to_delta_and_back(self):
+        storage = self.make_storage('delta')
+
+        dry_run = repack_storage(storage, 'delta', dry_run=True)
+        self.assertEqual(dry_run['files'], 8)
+        self.assertEqual(dry_run['size_after'], dry_run['size_before'])
+        self.assertTrue(all(name.endswith('.tei.xml') for name in self.stored_names()))
+
+        stats = repack_storage(storage, 'delta')
+        self.assertEqual((stats['files'], stats['errors'], stats['missing']), (8, 0, 0))
+        self.assertLess(stats['size_after'], stats['size_before'] / 5)
+        self.assertTrue(all(name.endswith('.tei.xml.z') for name in self.stored_names()))
+        self.assert_contents(storage)
+
+        stats = repack_storage(storage, 'plain')
+        self.assertEqual(stats['files'], 8)
+        self.assertTrue(all(name.endswith('.tei.xml') for name in self.stored_names()))
+        self.assert_contents(storage)
+        for file_hash in self.contents:
+            self.assertEqual(storage.get_file_path(file_hash, 'tei'), get_storage_path(storage.data_root, file_hash, 'tei'))
+
+
+if __name__ == "__main__":
+    unittest.main()
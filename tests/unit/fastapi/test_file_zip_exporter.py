@@ -0,0 +1,205 @@
+"""
+Unit tests for the streamed ZIP export.
+
+Tests:
+- Streamed archive has the same content as the directory-based export
+- PDFs are stored without compression
+- XSLT transformations run in the worker pool and are added to the archive
+- Completed archives are cached and reused for unchanged exports
+- Progress reporting
+
+@testCovers fastapi_app/lib/storage/file_zip_exporter.py
+"""
+
+import io
+import shutil
+import tempfile
+import unittest
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi_app.lib.core.database import DatabaseManager
+from fastapi_app.lib.core.executors import shutdown_executors
+from fastapi_app.lib.models.models import FileCreate
+from fastapi_app.lib.repository.file_repository import FileRepository
+from fastapi_app.lib.storage import file_zip_exporter
+from fastapi_app.lib.storage.file_storage import FileStorage
+from fastapi_app.lib.storage.file_zip_exporter import FileZipExporter
+
+TEI_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<TEI xmlns="http://www.tei-c.org/ns/1.0">
+    <teiHeader>
+        <fileDesc>
+            <titleStmt><title>{title}</title></titleStmt>
+        </fileDesc>
+    </teiHeader>
+    <text><body><p>Test content</p></body></text>
+</TEI>
+"""
+
+TITLE_XSLT = b"""<?xml version="1.0" encoding="UTF-8"?>
+<xsl:stylesheet version="1.0" xmlns:xsl="http://www.w3.org/1999/XSL/Transform"
+    xmlns:tei="http://www.tei-c.org/ns/1.0">
+    <xsl:output method="text"/>
+    <xsl:template match="/">title,<xsl:value-of select="//tei:titleStmt/tei:title"/></xsl:template>
+</xsl:stylesheet>
+"""
+
+TITLE_FORMAT = {'id': 'csv', 'url': '/api/plugins/test/static/title.xslt', 'ext': 'csv'}
+
+
+class TestFileZipExporterStream(unittest.TestCase):
+    """Test streamed export archives."""
+
+    def setUp(self):
+        """Create a database with two documents in one collection."""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.storage_root = self.test_dir / "storage"
+        self.cache_dir = self.test_dir / "exports"
+        self.storage_root.mkdir()
+        self.xslt_path = self.test_dir / "title.xslt"
+        self.xslt_path.write_bytes(TITLE_XSLT)
+
+        self.db = DatabaseManager(self.test_dir / "test.db")
+        self.storage = FileStorage(self.storage_root, self.db)
+        self.repo = FileRepository(self.db)
+
+        for index in range(2):
+            doc_id = f"10.1111/doc{index}"
+            self.add_file(doc_id, "pdf", f"%PDF-1.4\ndocument {index}\n%%EOF".encode(), ["corpus"])
+            self.add_file(doc_id, "tei", TEI_TEMPLATE.format(title=f"Title {index}").encode(),
+                          variant="grobid", is_gold=True)
+
+    def tearDown(self):
+        import gc
+        gc.collect()
+        shutil.rmtree(self.test_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutdown_executors()
+
+    def add_file(self, doc_id, file_type, content, collections=None, variant=None, is_gold=False):
+        file_hash, _ = self.storage.save_file(content, file_type)
+        self.repo.insert_file(FileCreate(
+            id=file_hash,
+            filename=f"{doc_id}.{file_type}",
+            doc_id=doc_id,
+            file_type=file_type,
+            file_size=len(content),
+            variant=variant,
+            is_gold_standard=is_gold,
+            doc_collections=collections or []
+        ))
+        return file_hash
+
+    def export_stream(self, **kwargs):
+        exporter = FileZipExporter(self.db, self.storage, self.repo)
+        with patch.object(FileZipExporter, '_url_to_path', return_value=self.xslt_path):
+            return exporter.export_to_zip_stream(cache_dir=self.cache_dir, **kwargs)
+
+    @staticmethod
+    def read_archive(data: bytes) -> dict:
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            return {info.filename: (zf.read(info), info.compress_type) for info in zf.infolist()}
+
+    def test_stream_matches_directory_export(self):
+        """The streamed archive contains the same files as export_to_zip()."""
+        exporter = FileZipExporter(self.db, self.storage, self.repo)
+        try:
+            zip_path = exporter.export_to_zip()
+            with zipfile.ZipFile(zip_path) as zf:
+                expected = {name: zf.read(name) for name in zf.namelist() if not name.endswith('/')}
+        finally:
+            exporter.cleanup()
+
+        entries = self.read_archive(b''.join(self.export_stream()))
+
+        self.assertEqual({name: content for name, (content, _) in entries.items()}, expected)
+        self.assertEqual(len(entries), 4)
+        for name, (_, compress_type) in entries.items():
+            expected_type = zipfile.ZIP_STORED if name.endswith('.pdf') else zipfile.ZIP_DEFLATED
+            self.assertEqual(compress_type, expected_type, name)
+
+    def test_xslt_transformations(self):
+        """Additional formats are transformed in the worker pool and added per collection."""
+        entries = self.read_archive(b''.join(self.export_stream(additional_formats=[TITLE_FORMAT])))
+
+        self.assertEqual(entries["corpus/csv/10.1111__doc0.grobid.csv"][0], b"title,Title 0")
+        self.assertEqual(entries["corpus/csv/10.1111__doc1.grobid.csv"][0], b"title,Title 1")
+
+    def test_failed_transformation_is_skipped(self):
+        """A stylesheet that fails does not break the export."""
+        self.xslt_path.write_bytes(b"<not-xslt/>")
+        entries = self.read_archive(b''.join(self.export_stream(additional_formats=[TITLE_FORMAT])))
+
+        self.assertEqual(len(entries), 4)
+        self.assertFalse(any('/csv/' in name for name in entries))
+
+    def test_failed_export_is_not_cached(self):
+        """Archives with failed transformations are reported and not cached."""
+        self.xslt_path.write_bytes(b"<not-xslt/>")
+        stream = self.export_stream(additional_formats=[TITLE_FORMAT])
+        b''.join(stream)
+
+        self.assertEqual(len(stream.errors), 2)
+        self.assertIsNone(self.export_stream(additional_formats=[TITLE_FORMAT]).cached_path)
+        self.assertEqual(list(self.cache_dir.iterdir()), [])
+
+    def test_transform_in_process_if_pool_unavailable(self):
+        """Transformations fall back to this process if the worker pool cannot take them."""
+        with patch.object(ProcessPoolExecutor, 'submit', side_effect=RuntimeError("shut down")):
+            stream = self.export_stream(additional_formats=[TITLE_FORMAT])
+            entries = self.read_archive(b''.join(stream))
+
+        self.assertEqual(stream.errors, [])
+        self.assertEqual(entries["corpus/csv/10.1111__doc0.grobid.csv"][0], b"title,Title 0")
+
+    def test_cache(self):
+        """A complete archive is cached and reused until the exported files change."""
+        first = self.export_stream()
+        self.assertIsNone(first.cached_path)
+        data = b''.join(first)
+
+        second = self.export_stream()
+        self.assertIsNotNone(second.cached_path)
+        self.assertEqual(b''.join(second), data)
+
+        # Other parameters or files produce a different archive
+        self.assertIsNone(self.export_stream(tei_only=True).cached_path)
+        self.add_file("10.1111/doc2", "pdf", b"%PDF-1.4\nnew\n%%EOF", ["corpus"])
+        self.add_file("10.1111/doc2", "tei", TEI_TEMPLATE.format(title="New").encode(),
+                      variant="grobid", is_gold=True)
+        self.assertIsNone(self.export_stream().cached_path)
+
+    def test_interrupted_stream_is_not_cached(self):
+        """An archive that was not streamed completely is not cached."""
+        stream = iter(self.export_stream())
+        next(stream)
+        stream.close()
+
+        self.assertIsNone(self.export_stream().cached_path)
+        self.assertEqual(list(self.cache_dir.iterdir()), [])
+
+    def test_cache_size_limit(self):
+        """The least recently used archives are removed beyond the size limit."""
+        b''.join(self.export_stream())
+        size = next(self.cache_dir.glob("*.zip")).stat().st_size
+        with patch.object(file_zip_exporter, 'EXPORT_CACHE_MAX_BYTES', size):
+            b''.join(self.export_stream(tei_only=True))
+
+        self.assertEqual(len(list(self.cache_dir.glob("*.zip"))), 1)
+        self.assertIsNotNone(self.export_stream(tei_only=True).cached_path)
+
+    def test_progress(self):
+        """Progress is reported up to the number of exported files."""
+        calls = []
+        b''.join(self.export_stream(progress_callback=lambda done, total, label: calls.append((done, total))))
+
+        self.assertEqual(calls[-1], (4, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
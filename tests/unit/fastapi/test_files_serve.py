@@ -0,0 +1,127 @@
+"""
+Unit tests for serving file content.
+
+Tests:
+- Content addressed by hash is immutable, with the hash as strong ETag
+- Conditional requests matching the ETag are answered with 304
+- Range requests return partial content (PDF.js partial loading)
+- stable_id URLs are not cached and redirect to the content URL on request
+- Access control applies to content URLs
+
+@testCovers fastapi_app/routers/files_serve.py
+"""
+
+import gc
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from fastapi_app.lib.core.database import DatabaseManager
+from fastapi_app.lib.models.models import FileCreate
+from fastapi_app.lib.repository.file_repository import FileRepository
+from fastapi_app.lib.storage.file_storage import FileStorage
+from fastapi_app.routers.files_serve import IMMUTABLE_CACHE_CONTROL
+
+PDF_CONTENT = b"%PDF-1.4\n" + bytes(range(256)) * 40 + b"\n%%EOF\n"
+
+
+class TestFilesServe(unittest.TestCase):
+    """Test GET /files/content/{hash} and GET /files/{stable_id}."""
+
+    def setUp(self):
+        from fastapi_app.main import app
+        from fastapi_app.lib.core.dependencies import get_current_user, get_file_repository, get_file_storage
+
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        db = DatabaseManager(self.tmp_dir / "metadata.db")
+        self.repo = FileRepository(db)
+        self.storage = FileStorage(self.tmp_dir / "files", db)
+        file_hash, _ = self.storage.save_file(PDF_CONTENT, "pdf")
+        self.pdf = self.repo.insert_file(FileCreate(
+            id=file_hash, filename="doc1.pdf", doc_id="doc1", file_type="pdf", file_size=len(PDF_CONTENT)
+        ))
+
+        self.access_patcher = patch("fastapi_app.routers.files_serve.check_file_access", return_value=True)
+        self.check_file_access = self.access_patcher.start()
+
+        self.app = app
+        app.dependency_overrides[get_file_repository] = lambda: self.repo
+        app.dependency_overrides[get_file_storage] = lambda: self.storage
+        app.dependency_overrides[get_current_user] = lambda: {"username": "alice", "roles": ["user"]}
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        self.app.dependency_overrides.clear()
+        self.access_patcher.stop()
+        gc.collect()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_content_by_hash(self):
+        url = f"/api/v1/files/content/{self.pdf.id}"
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, PDF_CONTENT)
+        self.assertEqual(response.headers["content-type"], "application/pdf")
+        self.assertEqual(response.headers["cache-control"], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response.headers["etag"], f'"{self.pdf.id}"')
+        self.assertEqual(response.headers["accept-ranges"], "bytes")
+
+        for if_none_match in (f'"{self.pdf.id}"', f'"other", W/"{self.pdf.id}"', "*"):
+            with patch.object(self.storage, "get_file_path") as get_file_path:
+                response = self.client.get(url, headers={"If-None-Match": if_none_match})
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.content, b"")
+            self.assertEqual(response.headers["etag"], f'"{self.pdf.id}"')
+            get_file_path.assert_not_called()
+
+        self.assertEqual(self.client.get(url, headers={"If-None-Match": '"other"'}).status_code, 200)
+
+    def test_range_requests(self):
+        url = f"/api/v1/files/content/{self.pdf.id}"
+
+        response = self.client.get(url, headers={"Range": "bytes=100-199"})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, PDF_CONTENT[100:200])
+        self.assertEqual(response.headers["content-range"], f"bytes 100-199/{len(PDF_CONTENT)}")
+
+        response = self.client.get(url, headers={"Range": "bytes=0-9", "If-Range": f'"{self.pdf.id}"'})
+        self.assertEqual(response.status_code, 206)
+        response = self.client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"outdated"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, PDF_CONTENT)
+
+    def test_unknown_or_inaccessible_content(self):
+        self.assertEqual(self.client.get(f"/api/v1/files/content/{'0' * 64}").status_code, 404)
+        self.assertEqual(self.client.get(f"/api/v1/files/content/{self.pdf.stable_id}").status_code, 404)
+
+        self.check_file_access.return_value = False
+        self.assertEqual(self.client.get(f"/api/v1/files/content/{self.pdf.id}").status_code, 403)
+
+    def test_stable_id(self):
+        response = self.client.get(f"/api/v1/files/{self.pdf.stable_id}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, PDF_CONTENT)
+        self.assertEqual(response.headers["cache-control"], "no-cache, no-store, must-revalidate")
+        self.assertEqual(response.headers["etag"], f'"{self.pdf.id}"')
+
+        for prefix in ("/api/v1/files", "/api/files"):
+            response = self.client.get(
+                f"{prefix}/{self.pdf.stable_id}", params={"redirect": "true"}, follow_redirects=False
+            )
+            self.assertEqual(response.status_code, 307)
+            self.assertEqual(response.headers["location"], f"content/{self.pdf.id}")
+            self.assertIn("no-store", response.headers["cache-control"])
+
+        response = self.client.get(f"/api/files/{self.pdf.stable_id}", params={"redirect": "true"})
+        self.assertEqual(str(response.url), f"http://testserver/api/files/content/{self.pdf.id}")
+        self.assertEqual(response.headers["cache-control"], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response.content, PDF_CONTENT)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+Unit tests for incremental (changed subtree) validation.
+
+@testCovers fastapi_app/lib/core/incremental_validation.py
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi_app.lib.core import incremental_validation
+from fastapi_app.lib.core.incremental_validation import validate_incremental
+from fastapi_app.lib.core.schema_validator import get_schema_cache_info, validate
+
+SCHEMA_URL = "https://example.org/schema/test.rng"
+
+SCHEMA = """<?xml version="1.0"?>
+<grammar xmlns="http://relaxng.org/ns/structure/1.0" ns="http://www.tei-c.org/ns/1.0">
+  <start><ref name="TEI"/></start>
+  <define name="TEI">
+    <element name="TEI">
+      <element name="listBibl"><zeroOrMore><ref name="bibl"/></zeroOrMore></element>
+    </element>
+  </define>
+  <define name="bibl">
+    <element name="bibl">
+      <ref name="title"/>
+      <optional><element name="date"><text/></element></optional>
+    </element>
+  </define>
+  <define name="title"><element name="title"><text/></element></define>
+</grammar>
+"""
+
+
+def make_document(bibls):
+    return (
+        '<?xml version="1.0"?>\n'
+        f'<?xml-model href="{SCHEMA_URL}" type="application/xml" '
+        'schematypens="http://relaxng.org/ns/structure/1.0"?>\n'
+        '<TEI xmlns="http://www.tei-c.org/ns/1.0">\n'
+        '  <listBibl>\n'
+        + "".join(f"    <bibl>\n      {content}\n    </bibl>\n" for content in bibls)
+        + '  </listBibl>\n'
+        '</TEI>\n'
+    )
+
+
+class TestIncrementalValidation(unittest.TestCase):
+    """Compare incremental results with full validation."""
+
+    def setUp(self):
+        self.cache_root = Path(tempfile.mkdtemp())
+        cache_dir, cache_file, _ = get_schema_cache_info(SCHEMA_URL, self.cache_root)
+        cache_dir.mkdir(parents=True)
+        cache_file.write_text(SCHEMA)
+        incremental_validation.clear_incremental_cache()
+
+    def tearDown(self):
+        incremental_validation.clear_incremental_cache()
+        shutil.rmtree(self.cache_root)
+
+    def _validate(self, xml, base_hash=None):
+        return validate_incremental(xml, "session", "doc", base_hash=base_hash, cache_root=self.cache_root)
+
+    def test_edit_in_valid_subtree_shifts_later_errors(self):
+        bibls = ["<title>A</title>", "<title>B</title>", "<foo/>"]
+        errors, content_hash, incremental = self._validate(make_document(bibls))
+        self.assertFalse(incremental)
+        self.assertEqual(len(errors), 1)
+
+        # Add a line to the first entry: the error in the third entry moves down
+        bibls[0] = "<title>A</title>\n      <date>2020</date>"
+        xml = make_document(bibls)
+        errors, new_hash, incremental = self._validate(xml, base_hash=content_hash)
+        self.assertTrue(incremental)
+        self.assertNotEqual(new_hash, content_hash)
+        self.assertEqual(errors, validate(xml, cache_root=self.cache_root))
+
+        # Unchanged document is answered from the cache
+        self.assertEqual(self._validate(xml, base_hash=new_hash), (errors, new_hash, True))
+
+    def test_edit_in_invalid_subtree(self):
+        bibls = ["<title>A</title>", "<foo/>"]
+        _, content_hash, _ = self._validate(make_document(bibls))
+
+        bibls[1] = "<bar/>"
+        xml = make_document(bibls)
+        errors, _, incremental = self._validate(xml, base_hash=content_hash)
+        self.assertTrue(incremental)
+        self.assertEqual(errors, validate(xml, cache_root=self.cache_root))
+
+    def test_falls_back_to_full_validation(self):
+        bibls = ["<title>A</title>", "<foo/>"]
+        _, content_hash, _ = self._validate(make_document(bibls))
+
+        # Wrong base hash
+        _, _, incremental = self._validate(make_document(bibls + ["<title>C</title>"]), base_hash="unknown")
+        self.assertFalse(incremental)
+
+        # Subtree becomes valid: errors on ancestors may change
+        _, content_hash, _ = self._validate(make_document(bibls))
+        bibls[1] = "<title>B</title>"
+        xml = make_document(bibls)
+        errors, content_hash, incremental = self._validate(xml, base_hash=content_hash)
+        self.assertFalse(incremental)
+        self.assertEqual(errors, [])
+
+        # Structural change of the list
+        xml = make_document(bibls + ["<title>C</title>"])
+        _, _, incremental = self._validate(xml, base_hash=content_hash)
+        self.assertFalse(incremental)
+
+    def test_first_line_columns_are_shifted(self):
+        bibls = ["<title>A</title>", "<foo/>"]
+        _, content_hash, _ = self._validate(make_document(bibls))
+
+        # The second <bibl> starts at column 4 of line 8
+        subtree_errors = [
+            {"message": "first line", "line": 1, "column": 7},
+            {"message": "unknown column", "line": 1, "column": 0},
+            {"message": "second line", "line": 2, "column": 7},
+        ]
+        bibls[1] = "<bar/>"
+        with patch.object(incremental_validation, "validate_with_timeout", return_value=subtree_errors):
+            errors, _, incremental = self._validate(make_document(bibls), base_hash=content_hash)
+        self.assertTrue(incremental)
+        self.assertEqual(
+            [(e["line"], e["column"]) for e in errors],
+            [(8, 11), (8, 0), (9, 7)]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
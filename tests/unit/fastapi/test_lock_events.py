@@ -0,0 +1,151 @@
+"""
+Unit tests for lock state deltas and the batched heartbeat.
+
+Tests:
+- Lock changes are broadcast as one lockChanged event, excluding the session that made them
+- The expiry watcher removes expired locks and announces them
+- POST /files/heartbeat/batch refreshes own locks and reports lost and unknown files
+
+@testCovers fastapi_app/lib/sse/lock_events.py
+@testCovers fastapi_app/routers/files_heartbeat.py:heartbeat_batch
+"""
+
+import gc
+import json
+import logging
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from fastapi_app.lib.core.database import DatabaseManager
+from fastapi_app.lib.core.lock_manager import LEASE_SECONDS
+from fastapi_app.lib.core.locking import acquire_lock, init_locks_db, reset_locks_db_initialized
+from fastapi_app.lib.models.models import FileCreate
+from fastapi_app.lib.repository.file_repository import FileRepository
+from fastapi_app.lib.sse.lock_events import (
+    LOCK_CHANGED_EVENT,
+    LockExpiryWatcher,
+    broadcast_lock_changes,
+    lock_change
+)
+
+
+def make_session_manager(*session_ids: str) -> MagicMock:
+    session_manager = MagicMock()
+    session_manager.get_all_sessions.return_value = [{"session_id": s} for s in session_ids]
+    return session_manager
+
+
+class TestLockEvents(unittest.TestCase):
+    """Test broadcasting of lock changes."""
+
+    def setUp(self):
+        self.db_dir = Path(tempfile.mkdtemp())
+        self.logger = logging.getLogger("test_lock_events")
+        self.logger.setLevel(logging.ERROR)
+        init_locks_db(self.db_dir, self.logger)
+        self.sse_service = MagicMock()
+        self.session_manager = make_session_manager("session-a", "session-b")
+
+    def tearDown(self):
+        reset_locks_db_initialized()
+        gc.collect()
+        shutil.rmtree(self.db_dir)
+
+    def test_broadcast_lock_changes(self):
+        changes = [lock_change("file1", "acquired", "alice"), lock_change("file2", "released")]
+
+        count = broadcast_lock_changes(
+            self.sse_service, self.session_manager, changes, current_session_id="session-a"
+        )
+
+        self.assertEqual(count, 1)
+        self.sse_service.send_messages.assert_called_once_with(
+            client_ids=["session-b"],
+            event_type=LOCK_CHANGED_EVENT,
+            data=json.dumps({"changes": [
+                {"stable_id": "file1", "action": "acquired", "locked_by": "alice"},
+                {"stable_id": "file2", "action": "released"},
+            ]})
+        )
+
+        self.assertEqual(broadcast_lock_changes(self.sse_service, self.session_manager, []), 0)
+        self.assertEqual(self.sse_service.send_messages.call_count, 1)
+
+    def test_expiry_watcher(self):
+        acquire_lock("file1", "session-a", self.db_dir, self.logger)
+        acquire_lock("file2", "session-a", self.db_dir, self.logger)
+        with sqlite3.connect(self.db_dir / "locks.db") as conn:
+            conn.execute(
+                "UPDATE locks SET updated_at = datetime('now', ?) WHERE file_id = 'file1'",
+                (f"-{LEASE_SECONDS + 10} seconds",)
+            )
+
+        watcher = LockExpiryWatcher(self.db_dir, self.sse_service, self.session_manager, logger_inst=self.logger)
+        self.assertEqual(watcher.check(), {"file1": "session-a"})
+
+        kwargs = self.sse_service.send_messages.call_args.kwargs
+        self.assertEqual(kwargs["client_ids"], ["session-a", "session-b"])
+        self.assertEqual(json.loads(kwargs["data"]), {"changes": [{"stable_id": "file1", "action": "expired"}]})
+
+        self.sse_service.reset_mock()
+        self.assertEqual(watcher.check(), {})
+        self.sse_service.send_messages.assert_not_called()
+
+
+class TestHeartbeatBatchEndpoint(unittest.TestCase):
+    """Test POST /files/heartbeat/batch."""
+
+    def setUp(self):
+        from fastapi_app.main import app
+        from fastapi_app.lib.core.dependencies import get_file_repository, get_session_id
+
+        self.db_dir = Path(tempfile.mkdtemp())
+        self.logger = logging.getLogger("test_lock_events")
+        self.repo = FileRepository(DatabaseManager(self.db_dir / "metadata.db"))
+        self.stable_ids = [
+            self.repo.insert_file(FileCreate(
+                id=f"tei{i}", filename=f"tei{i}.tei.xml", doc_id="doc1", file_type="tei", file_size=100
+            )).stable_id
+            for i in range(3)
+        ]
+
+        self.settings_patcher = patch("fastapi_app.routers.files_heartbeat.get_settings")
+        self.settings_patcher.start().return_value.db_dir = self.db_dir
+
+        self.app = app
+        app.dependency_overrides[get_file_repository] = lambda: self.repo
+        app.dependency_overrides[get_session_id] = lambda: "session-a"
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        self.app.dependency_overrides.clear()
+        self.settings_patcher.stop()
+        reset_locks_db_initialized()
+        gc.collect()
+        shutil.rmtree(self.db_dir)
+
+    def test_heartbeat_batch(self):
+        own, other, unlocked = self.stable_ids
+        acquire_lock(own, "session-a", self.db_dir, self.logger)
+        acquire_lock(other, "session-b", self.db_dir, self.logger)
+
+        response = self.client.post("/api/v1/files/heartbeat/batch", json={
+            "stable_ids": [own, other, unlocked, "missing"]
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            "renewed": [own],
+            "lost": [other, unlocked],
+            "not_found": ["missing"]
+        })
+
+
+if __name__ == "__main__":
+    unittest.main()
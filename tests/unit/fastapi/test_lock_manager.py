@@ -0,0 +1,157 @@
+"""
+Unit tests for the lease-based lock manager.
+
+Tests:
+- Lock state is coherent between managers of the same directory (worker processes)
+- The conditional upsert denies locks taken by another process since the last reload
+- Unchanged lock tables are not reloaded
+- Remote locks from the sync metadata are cached and refreshed on change
+- Leases expire, are taken over and purged by their indexed expiry
+- Batched renewal refreshes only the session's own leases, in one transaction
+- Expired leases are reported once, by the manager that removes them
+
+@testCovers fastapi_app/lib/core/lock_manager.py
+@testCovers fastapi_app/lib/core/migrations/versions/m011_locks_expires_at.py
+"""
+
+import gc
+import logging
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi_app.lib.core.database import DatabaseManager
+from fastapi_app.lib.core.lock_manager import LEASE_SECONDS, LockManager
+from fastapi_app.lib.core.locking import init_locks_db, reset_locks_db_initialized
+from fastapi_app.lib.repository.file_repository import FileRepository
+
+
+class TestLockManager(unittest.TestCase):
+    """Test lock managers that share a locks.db, as worker processes do."""
+
+    def setUp(self):
+        self.db_dir = Path(tempfile.mkdtemp())
+        self.logger = logging.getLogger("test_lock_manager")
+        self.logger.setLevel(logging.ERROR)
+        init_locks_db(self.db_dir, self.logger)
+        self.worker_a = LockManager(self.db_dir)
+        self.worker_b = LockManager(self.db_dir)
+
+    def tearDown(self):
+        self.worker_a.close()
+        self.worker_b.close()
+        reset_locks_db_initialized()
+        gc.collect()
+        shutil.rmtree(self.db_dir)
+
+    def set_updated_at(self, file_id: str, age_seconds: int) -> None:
+        updated_at = datetime.now(timezone.utc) - timedelta(seconds=age_seconds)
+        with sqlite3.connect(self.db_dir / "locks.db") as conn:
+            conn.execute(
+                "UPDATE locks SET updated_at = ? WHERE file_id = ?",
+                (updated_at.strftime('%Y-%m-%d %H:%M:%S'), file_id)
+            )
+
+    def test_coherent_between_workers(self):
+        self.assertTrue(self.worker_a.acquire("file1", "session-a", self.logger))
+
+        self.assertEqual(self.worker_b.active_locks(), {"file1": "session-a"})
+        self.assertFalse(self.worker_b.acquire("file1", "session-b", self.logger))
+        self.assertEqual(self.worker_b.release("file1", "session-b").session_id, "session-a")
+
+        self.assertEqual(self.worker_a.release("file1", "session-a").session_id, "session-a")
+        self.assertTrue(self.worker_b.acquire("file1", "session-b", self.logger))
+        self.assertEqual(self.worker_a.active_locks(), {"file1": "session-b"})
+
+    def test_concurrent_acquire_denied_by_database(self):
+        self.worker_b.active_locks()
+        self.assertTrue(self.worker_a.acquire("file1", "session-a", self.logger))
+
+        # worker_b has not seen the lock yet; the upsert must not overwrite it
+        with patch.object(self.worker_b, "_sync"):
+            self.assertFalse(self.worker_b.acquire("file1", "session-b", self.logger))
+        self.assertEqual(self.worker_b.get_lease("file1").session_id, "session-a")
+
+    def test_unchanged_table_is_not_reloaded(self):
+        self.worker_a.acquire("file1", "session-a", self.logger)
+        self.worker_b.active_locks()
+
+        with patch.object(self.worker_b, "_reload", wraps=self.worker_b._reload) as reload:
+            for _ in range(3):
+                self.worker_b.active_locks()
+            self.assertEqual(reload.call_count, 0)
+            self.worker_a.acquire("file2", "session-a", self.logger)
+            self.assertEqual(set(self.worker_b.active_locks()), {"file1", "file2"})
+            self.assertEqual(reload.call_count, 1)
+
+    def test_remote_locks(self):
+        repo = FileRepository(DatabaseManager(self.db_dir / "metadata.db"))
+        now = datetime.now(timezone.utc)
+        repo.set_remote_locks({"file1": {"acquired_at": now.isoformat(), "updated_at": now.isoformat()}})
+
+        self.assertFalse(self.worker_a.acquire("file1", "session-a", self.logger))
+
+        expired = (now - timedelta(hours=1)).isoformat()
+        repo.set_remote_locks({"file1": {"acquired_at": expired, "updated_at": expired}})
+        self.assertTrue(self.worker_a.acquire("file1", "session-a", self.logger))
+
+    def test_expiry_takeover_and_purge(self):
+        self.worker_a.acquire("file1", "session-a", self.logger)
+        self.worker_a.acquire("file2", "session-a", self.logger)
+        self.set_updated_at("file1", LEASE_SECONDS + 10)
+
+        self.assertEqual(self.worker_b.active_locks(), {"file2": "session-a"})
+        self.assertEqual(self.worker_b.active_locks(timeout_seconds=LEASE_SECONDS + 60), {
+            "file1": "session-a", "file2": "session-a"
+        })
+        self.assertTrue(self.worker_b.acquire("file1", "session-b", self.logger))
+        self.assertEqual(self.worker_a.get_lease("file1").session_id, "session-b")
+
+        self.set_updated_at("file2", LEASE_SECONDS + 10)
+        self.assertEqual(self.worker_a.purge_expired(), 1)
+        self.assertEqual(self.worker_b.active_locks(), {"file1": "session-b"})
+
+        with sqlite3.connect(self.db_dir / "locks.db") as conn:
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT file_id FROM locks WHERE expires_at <= ?", (0,)
+            ).fetchall()
+        self.assertIn("idx_locks_expires_at", str(plan))
+
+    def test_renew_many(self):
+        self.worker_a.acquire("file1", "session-a", self.logger)
+        self.worker_a.acquire("file2", "session-a", self.logger)
+        self.worker_b.acquire("file3", "session-b", self.logger)
+        self.set_updated_at("file2", LEASE_SECONDS + 10)
+
+        results = self.worker_b.renew_many(["file1", "file2", "file3", "file4", "file1"], "session-a")
+
+        self.assertEqual(results, {"file1": True, "file2": True, "file3": False, "file4": False})
+        self.assertEqual(self.worker_a.active_locks(), {
+            "file1": "session-a", "file2": "session-a", "file3": "session-b"
+        })
+        self.assertIsNone(self.worker_a.get_lease("file4"))
+
+    def test_renew_many_after_release(self):
+        self.worker_a.acquire("file1", "session-a", self.logger)
+        self.worker_a.release("file1", "session-a")
+
+        self.assertEqual(self.worker_a.renew_many(["file1"], "session-a"), {"file1": False})
+        self.assertEqual(self.worker_b.active_locks(), {})
+
+    def test_expire_reports_once(self):
+        self.worker_a.acquire("file1", "session-a", self.logger)
+        self.worker_a.acquire("file2", "session-b", self.logger)
+        self.set_updated_at("file1", LEASE_SECONDS + 10)
+        self.worker_b.active_locks()
+
+        self.assertEqual(self.worker_b.expire(), {"file1": "session-a"})
+        self.assertEqual(self.worker_a.expire(), {})
+        self.assertEqual(self.worker_a.active_locks(), {"file2": "session-b"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,275 @@
+"""
+Unit tests for the pack file storage backend.
+
+Tests:
+- Pack store writes, memory-mapped reads and rollover to new packs
+- Repacking reclaims the space of removed blobs
+- Rebuilding the index from the pack files
+- FileStorage with the pack backend: read_file(), get_file_path(), deltas,
+  deletion, statistics and orphan detection
+- Garbage collection repacks pack files
+- Moving stored files between the backends
+
+@testCovers fastapi_app/lib/storage/pack_store.py
+@testCovers fastapi_app/lib/storage/file_storage.py
+@testCovers fastapi_app/lib/storage/storage_gc.py
+@testCovers fastapi_app/lib/storage/storage_repack.py
+"""
+
+import gc
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi_app.lib.core.database import DatabaseManager
+from fastapi_app.lib.core.sqlite_utils import transaction
+from fastapi_app.lib.storage import blob_codec
+from fastapi_app.lib.storage.file_storage import FileStorage
+from fastapi_app.lib.storage.pack_store import PackStore, get_pack_store
+from fastapi_app.lib.storage.storage_gc import StorageGarbageCollector
+from fastapi_app.lib.storage.storage_repack import move_storage
+from fastapi_app.lib.utils.hash_utils import generate_file_hash
+
+
+def make_tei(version: int) -> bytes:
+    bibls = "".join(
+        f'<bibl xml:id="b{i}"><title>{"Revised" if i < version else "Title"} {i}</title></bibl>\n'
+        for i in range(40)
+    )
+    return f'<TEI xmlns="http://www.tei-c.org/ns/1.0">\n{bibls}</TEI>\n'.encode('utf-8')
+
+
+class TestPackStore(unittest.TestCase):
+    """Test the pack store on its own."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.store = PackStore(self.test_dir, max_pack_bytes=4096)
+
+    def tearDown(self):
+        self.store.close()
+        gc.collect()
+        shutil.rmtree(self.test_dir)
+
+    def write(self, content: bytes, encoded: bool = False) -> str:
+        file_hash = generate_file_hash(content)
+        self.store.write(file_hash, 'tei', content, encoded)
+        return file_hash
+
+    def test_write_and_read(self):
+        first = self.write(b"<TEI>first</TEI>")
+        second = self.write(b"<TEI>second</TEI>", encoded=True)
+
+        self.assertEqual(self.store.read(first), (b"<TEI>first</TEI>", False))
+        self.assertEqual(self.store.read(second), (b"<TEI>second</TEI>", True))
+        self.assertTrue(self.store.contains(first))
+        self.assertIsNone(self.store.read("ab" * 32))
+        self.assertEqual(self.store.lookup(first).file_type, 'tei')
+        self.assertEqual(self.store.pack_ids(), [1])
+
+    def test_new_pack_when_full(self):
+        hashes = [self.write(bytes([i]) * 1500) for i in range(5)]
+
+        self.assertGreater(len(self.store.pack_ids()), 1)
+        for i, file_hash in enumerate(hashes):
+            self.assertEqual(self.store.read(file_hash)[0], bytes([i]) * 1500)
+        stats = self.store.get_stats()
+        self.assertEqual((stats['blobs'], stats['blobs_by_type']), (5, {'tei': 5}))
+
+    def test_repack_reclaims_removed_blobs(self):
+        hashes = [self.write(bytes([i]) * 1000) for i in range(3)]
+        self.assertTrue(self.store.remove(hashes[0]))
+        self.assertFalse(self.store.remove(hashes[0]))
+        size_before = self.store.get_stats()['pack_bytes']
+
+        self.assertEqual(self.store.repack(dry_run=True)['packs_rewritten'], 1)
+        self.assertEqual(self.store.get_stats()['pack_bytes'], size_before)
+
+        stats = self.store.repack()
+        self.assertEqual((stats['packs_rewritten'], stats['blobs_moved']), (1, 2))
+        self.assertFalse(self.store.pack_path(1).exists())
+        self.assertLess(self.store.get_stats()['pack_bytes'], size_before)
+        self.assertEqual(self.store.read(hashes[2])[0], bytes([2]) * 1000)
+
+        # Pack ids are not reused
+        self.write(b"<TEI>new</TEI>")
+        self.assertNotIn(1, self.store.pack_ids())
+
+    def test_repack_does_not_resurrect_removed_blobs(self):
+        hashes = [self.write(bytes([i]) * 1000) for i in range(3)]
+        self.store.remove(hashes[0])
+        read_entry = self.store._read_entry
+
+        def read_and_remove(entry):
+            # A blob removed while its record is being copied stays removed
+            with transaction(self.store.index_path) as conn:
+                conn.execute("DELETE FROM pack_index WHERE file_hash = ?", (hashes[1],))
+            return read_entry(entry)
+
+        with patch.object(self.store, '_read_entry', side_effect=read_and_remove):
+            self.store.repack()
+
+        self.assertIsNone(self.store.lookup(hashes[1]))
+        self.assertEqual(self.store.read(hashes[2])[0], bytes([2]) * 1000)
+
+    def test_write_syncs_pack_before_indexing(self):
+        calls = []
+        with patch('os.fsync', side_effect=lambda fd: calls.append('fsync')), \
+                patch.object(PackStore, '_index', side_effect=lambda *args: calls.append('index')):
+            self.write(b"<TEI>first</TEI>")
+
+        self.assertEqual(calls[-1], 'index')
+        self.assertIn('fsync', calls[:-1])
+
+    def test_rebuild_index(self):
+        first = self.write(b"<TEI>first</TEI>")
+        second = self.write(b"<TEI>second</TEI>", encoded=True)
+        with transaction(self.store.index_path) as conn:
+            conn.execute("DELETE FROM pack_index")
+        self.assertIsNone(self.store.read(first))
+
+        self.assertEqual(self.store.rebuild_index(), 2)
+        self.assertEqual(self.store.read(first), (b"<TEI>first</TEI>", False))
+        self.assertEqual(self.store.read(second), (b"<TEI>second</TEI>", True))
+
+
+class PackStorageTestCase(unittest.TestCase):
+    """Creates a database and a storage directory."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.db = DatabaseManager(self.test_dir / "metadata.db")
+
+    def tearDown(self):
+        store = get_pack_store(self.test_dir / "files", create=False)
+        if store:
+            store.close()
+        gc.collect()
+        shutil.rmtree(self.test_dir)
+
+    def make_storage(self, backend: str, xml_encoding: str = 'plain') -> FileStorage:
+        return FileStorage(
+            self.test_dir / "files", self.db, xml_encoding=xml_encoding,
+            cache_dir=self.test_dir / "cache", backend=backend
+        )
+
+    def shard_files(self) -> list:
+        return [
+            path for path in (self.test_dir / "files").rglob("*")
+            if path.is_file() and path.parent.name != "packs"
+        ]
+
+
+class TestPackBackend(PackStorageTestCase):
+    """Test FileStorage with the pack backend."""
+
+    def setUp(self):
+        super().setUp()
+        self.storage = self.make_storage('pack', 'compressed')
+
+    def test_save_and_read(self):
+        """Files are appended to a pack, without shard directories."""
+        tei_hash, tei_path = self.storage.save_file(make_tei(1), 'tei')
+        pdf_hash, _ = self.storage.save_file(b"%PDF-1.4 test", 'pdf')
+
+        self.assertEqual(tei_path.parent.name, "packs")
+        self.assertEqual(self.shard_files(), [])
+        self.assertEqual(self.storage.read_file(tei_hash, 'tei'), make_tei(1))
+        self.assertEqual(self.storage.read_file(pdf_hash, 'pdf'), b"%PDF-1.4 test")
+        self.assertTrue(self.storage.verify_file(tei_hash, 'tei'))
+        self.assertLess(self.storage.get_stored_size(tei_hash, 'tei'), len(make_tei(1)))
+
+        # Saving the same content again does not append it again
+        size = self.storage.get_storage_stats()['total_size']
+        self.storage.save_file(make_tei(1), 'tei')
+        self.assertEqual(self.storage.get_storage_stats()['total_size'], size)
+
+    def test_get_file_path_returns_copy(self):
+        pdf_hash, _ = self.storage.save_file(b"%PDF-1.4 test", 'pdf')
+
+        path = self.storage.get_file_path(pdf_hash, 'pdf')
+        self.assertTrue(path.is_relative_to(self.test_dir / "cache"))
+        self.assertEqual(path.read_bytes(), b"%PDF-1.4 test")
+
+        self.assertTrue(self.storage.delete_file(pdf_hash, 'pdf'))
+        self.assertFalse(path.exists())
+        self.assertFalse(self.storage.file_exists(pdf_hash, 'pdf'))
+        self.assertIsNone(self.storage.get_file_path(pdf_hash, 'pdf'))
+
+    def test_delta_versions(self):
+        """Deltas in packs are decoded, and survive deleting their base."""
+        storage = self.make_storage('pack', 'delta')
+        hashes = []
+        for version in range(3):
+            file_hash, _ = storage.save_file(make_tei(version), 'tei', base_hash=hashes[-1] if hashes else None)
+            hashes.append(file_hash)
+
+        header = blob_codec.parse_header(get_pack_store(storage.data_root).read(hashes[2])[0])
+        self.assertEqual((header.kind, header.depth), (blob_codec.KIND_DELTA, 2))
+        self.assertEqual(storage.read_file(hashes[2], 'tei'), make_tei(2))
+
+        self.assertTrue(storage.delete_file(hashes[1], 'tei'))
+        self.assertEqual(storage.read_file(hashes[2], 'tei'), make_tei(2))
+
+    def test_stats_and_orphans_from_index(self):
+        tei_hash, _ = self.storage.save_file(make_tei(1), 'tei', increment_ref=False)
+        self.storage.save_file(b"%PDF-1.4 test", 'pdf')
+
+        stats = self.storage.get_storage_stats()
+        self.assertEqual((stats['total_files'], stats['packed_files'], stats['pack_files']), (2, 2, 1))
+        self.assertEqual(stats['files_by_type']['tei'], 1)
+        self.assertEqual(stats['encoded_files'], 1)
+        self.assertEqual(self.storage.ref_manager.get_orphaned_files(self.storage.data_root), [(tei_hash, 'tei')])
+
+    def test_garbage_collection_repacks(self):
+        """Deleted files are removed from packs by garbage collection."""
+        tei_hash, _ = self.storage.save_file(make_tei(1), 'tei', increment_ref=False)
+        pdf_hash, _ = self.storage.save_file(b"%PDF-1.4 " + b"x" * 5000, 'pdf')
+        self.storage.ref_manager.increment_reference(tei_hash, 'tei')
+        self.storage.delete_file(pdf_hash, 'pdf')
+
+        collector = StorageGarbageCollector(self.storage, self.storage.ref_manager)
+        stats = collector.full_cleanup()
+
+        self.assertEqual(stats['packs']['packs_rewritten'], 1)
+        self.assertGreater(stats['packs']['bytes_freed'], 5000)
+        self.assertEqual(self.storage.get_storage_stats()['pack_garbage_bytes'], 0)
+        self.assertEqual(self.storage.read_file(tei_hash, 'tei'), make_tei(1))
+
+
+class TestMoveStorage(PackStorageTestCase):
+    """Test moving stored files between the backends."""
+
+    def test_move_to_packs_and_back(self):
+        storage = self.make_storage('files', 'delta')
+        contents = {}
+        base_hash = None
+        for version in range(3):
+            base_hash, _ = storage.save_file(make_tei(version), 'tei', base_hash=base_hash)
+            contents[base_hash] = ('tei', make_tei(version))
+        pdf_hash, _ = storage.save_file(b"%PDF-1.4 test", 'pdf')
+        contents[pdf_hash] = ('pdf', b"%PDF-1.4 test")
+        size = storage.get_storage_stats()['total_size']
+
+        self.assertEqual(move_storage(storage, 'pack', dry_run=True)['files'], 4)
+        self.assertEqual(len(self.shard_files()), 4)
+
+        stats = move_storage(storage, 'pack')
+        self.assertEqual((stats['files'], stats['errors']), (4, 0))
+        self.assertEqual(self.shard_files(), [])
+        for file_hash, (file_type, content) in contents.items():
+            self.assertEqual(storage.read_file(file_hash, file_type), content)
+
+        stats = move_storage(storage, 'files')
+        self.assertEqual((stats['files'], stats['errors']), (4, 0))
+        self.assertEqual(len(self.shard_files()), 4)
+        self.assertEqual(get_pack_store(storage.data_root).get_stats()['pack_bytes'], 0)
+        self.assertEqual(storage.get_storage_stats()['total_size'], size)
+        for file_hash, (file_type, content) in contents.items():
+            self.assertEqual(storage.read_file(file_hash, file_type), content)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Unit tests for the schema validator worker pool.
+
+@testCovers fastapi_app/lib/core/schema_validator.py
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from fastapi_app.lib.core.schema_validator import (
+    RELAXNG_NAMESPACE,
+    ValidationTimeoutError,
+    ValidatorPool,
+)
+
+SCHEMA_A = b"""<?xml version="1.0"?>
+<element name="doc" xmlns="http://relaxng.org/ns/structure/1.0">
+  <element name="title"><text/></element>
+</element>
+"""
+
+SCHEMA_B = b"""<?xml version="1.0"?>
+<element name="doc" xmlns="http://relaxng.org/ns/structure/1.0">
+  <element name="name"><text/></element>
+</element>
+"""
+
+DOC = b"<doc><title>Test</title></doc>"
+
+
+class TestValidatorPool(unittest.TestCase):
+    """Test validation, schema caching and timeouts in the worker pool."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.schema_file = self.test_dir / "schema.rng"
+        self.schema_file.write_bytes(SCHEMA_A)
+        self.pool = ValidatorPool(size=1)
+
+    def tearDown(self):
+        self.pool.shutdown()
+        shutil.rmtree(self.test_dir)
+
+    def _validate(self, xml_bytes=DOC, timeout=30):
+        return self.pool.validate(str(self.schema_file), xml_bytes, RELAXNG_NAMESPACE, timeout=timeout)
+
+    def test_compiled_schema_is_reused(self):
+        self.assertEqual(self._validate(), [])
+        errors = self._validate(b"<doc><name>Test</name></doc>")
+        self.assertEqual(len(errors), 1)
+        self.assertGreaterEqual(errors[0]["line"], 1)
+
+        stats = self.pool.get_stats()
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["schema_compiles"], 1)
+        self.assertEqual(stats["schema_cache_hits"], 1)
+        self.assertEqual(stats["workers_started"], 1)
+        self.assertEqual(stats["idle_workers"], 1)
+
+    def test_schema_recompiled_when_file_changes(self):
+        self.assertEqual(self._validate(), [])
+        self.schema_file.write_bytes(SCHEMA_B)
+        future = time.time() + 10
+        os.utime(self.schema_file, (future, future))
+
+        self.assertEqual(len(self._validate()), 1)
+        self.assertEqual(self.pool.get_stats()["schema_compiles"], 2)
+
+    def test_timeout_replaces_worker(self):
+        with self.assertRaises(ValidationTimeoutError):
+            self._validate(timeout=0)
+        self.assertEqual(self.pool.get_stats()["timeouts"], 1)
+
+        # The replacement worker handles the next request
+        self.assertEqual(self._validate(), [])
+        stats = self.pool.get_stats()
+        self.assertEqual(stats["workers"], 1)
+        self.assertEqual(stats["workers_started"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
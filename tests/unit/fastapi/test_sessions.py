@@ -15,6 +15,10 @@ from pathlib import Path
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from fastapi_app.lib.core import sessions
 from fastapi_app.lib.core.sessions import SessionManager
 from fastapi_app.lib.core.db_utils import close_all_connections
 
@@ -304,5 +308,110 @@ class TestSessionManager(unittest.TestCase):
         self.assertEqual(len(all_sessions), 10)
 
 
+    def _read_last_access(self, session_id):
+        with sessions.get_connection(self.session_mgr.db_path) as conn:
+            return conn.execute(
+                "SELECT last_access FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()['last_access']
+
+    def test_session_lookups_are_cached(self):
+        """Validating a cached session does not query the database."""
+        session_id = self.session_mgr.create_session('testuser')
+        self.session_mgr.get_session(session_id)
+
+        with patch.object(sessions, 'get_connection') as get_connection:
+            self.assertTrue(self.session_mgr.is_session_valid(session_id, 86400))
+            self.assertEqual(self.session_mgr.get_username_by_session_id(session_id), 'testuser')
+            get_connection.assert_not_called()
+
+        # Cache is shared by all managers of the same database
+        other_mgr = SessionManager(self.db_dir)
+        other_mgr.delete_session(session_id)
+        self.assertIsNone(self.session_mgr.get_session(session_id))
+        self.assertFalse(self.session_mgr.is_session_valid(session_id, 86400))
+
+    def test_access_time_write_behind(self):
+        """Access time updates are coalesced and written after the flush interval."""
+        session_id = self.session_mgr.create_session('testuser')
+        created = self._read_last_access(session_id)
+        time.sleep(0.01)
+
+        with patch.object(sessions, 'ACCESS_FLUSH_INTERVAL', 3600):
+            self.session_mgr.update_session_access_time(session_id)
+            self.session_mgr.update_session_access_time(session_id)
+            # Visible through the manager, not yet in the database
+            self.assertGreater(self.session_mgr.get_session(session_id)['last_access'], created)
+            self.assertEqual(self._read_last_access(session_id), created)
+
+            self.session_mgr.flush_access_times()
+            self.assertEqual(
+                self._read_last_access(session_id),
+                self.session_mgr.get_session(session_id)['last_access']
+            )
+
+        with patch.object(sessions, 'ACCESS_FLUSH_INTERVAL', 0):
+            time.sleep(0.01)
+            self.session_mgr.update_session_access_time(session_id)
+            self.assertEqual(
+                self._read_last_access(session_id),
+                self.session_mgr.get_session(session_id)['last_access']
+            )
+
+    def test_delete_during_lookup_is_not_cached(self):
+        """A session deleted while a lookup reads it is not put back into the cache."""
+        session_id = self.session_mgr.create_session('testuser')
+        other_mgr = SessionManager(self.db_dir)
+        real_get_connection = sessions.get_connection
+        deleted = []
+
+        @contextmanager
+        def get_connection_then_delete(db_path):
+            with real_get_connection(db_path) as conn:
+                yield conn
+            if not deleted:
+                # The lookup has read the row; delete it before the lookup caches it
+                deleted.append(True)
+                other_mgr.delete_session(session_id)
+
+        with patch.object(sessions, 'get_connection', get_connection_then_delete):
+            self.assertIsNotNone(self.session_mgr.get_session(session_id))
+
+        self.assertEqual(deleted, [True])
+        self.assertIsNone(self.session_mgr.get_session(session_id))
+        self.assertFalse(self.session_mgr.is_session_valid(session_id, 86400))
+
+    def test_deletion_by_other_process_is_noticed(self):
+        """Sessions deleted through another connection are not served from the cache."""
+        session_id = self.session_mgr.create_session('testuser')
+        other_id = self.session_mgr.create_session('otheruser')
+        self.session_mgr.get_session(session_id)
+        self.session_mgr.get_session(other_id)
+
+        # Writes other than deletions keep the cache
+        with sessions.get_connection(self.session_mgr.db_path) as conn:
+            conn.execute("UPDATE sessions SET username = 'renamed' WHERE session_id = ?", (session_id,))
+            conn.commit()
+        self.assertEqual(self.session_mgr.get_session(session_id)['username'], 'testuser')
+
+        # What logout in another worker process does
+        with sessions.get_connection(self.session_mgr.db_path) as conn:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            conn.commit()
+        self.assertIsNone(self.session_mgr.get_session(session_id))
+        self.assertEqual(self.session_mgr.get_session(other_id)['username'], 'otheruser')
+
+    def test_cache_expires_after_ttl(self):
+        """Changes other than deletions are re-read after the TTL."""
+        session_id = self.session_mgr.create_session('testuser')
+        self.session_mgr.get_session(session_id)
+
+        with sessions.get_connection(self.session_mgr.db_path) as conn:
+            conn.execute("UPDATE sessions SET username = 'renamed' WHERE session_id = ?", (session_id,))
+            conn.commit()
+
+        self.assertEqual(self.session_mgr.get_session(session_id)['username'], 'testuser')
+        with patch.object(sessions, 'SESSION_CACHE_TTL', 0):
+            self.assertEqual(self.session_mgr.get_session(session_id)['username'], 'renamed')
+
 if __name__ == '__main__':
     unittest.main()
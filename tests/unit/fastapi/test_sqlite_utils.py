@@ -0,0 +1,126 @@
+"""
+Unit tests for the SQLite connection pool and pragma profiles.
+
+@testCovers fastapi_app/lib/core/sqlite_utils.py
+"""
+
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi_app.lib.core import sqlite_utils
+from fastapi_app.lib.core.sqlite_utils import ConnectionPool, PragmaProfile
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Test reuse, bounds, nesting and state reset of pooled connections."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        sqlite_utils.close_all_pools()
+        shutil.rmtree(self.test_dir)
+
+    def test_profile_applied(self):
+        pool = ConnectionPool(self.test_dir / "locks.db")
+        self.assertEqual(pool.profile.name, "locks")
+        with pool.connection() as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "delete")
+            self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 2)  # FULL
+            self.assertEqual(conn.execute("PRAGMA temp_store").fetchone()[0], 2)  # MEMORY
+
+        pool = ConnectionPool(self.test_dir / "metadata.db")
+        with pool.connection() as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            self.assertEqual(conn.execute("PRAGMA cache_size").fetchone()[0], -16000)
+            self.assertEqual(conn.execute("PRAGMA foreign_keys").fetchone()[0], 1)
+
+    def test_connections_are_reused_and_reset(self):
+        pool = ConnectionPool(self.test_dir / "test.db")
+        with pool.connection() as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+            first = conn
+        with pool.connection() as conn:
+            self.assertIs(conn, first)
+            conn.isolation_level = ""
+            conn.execute("INSERT INTO t VALUES (1)")  # implicit transaction, not committed
+        with pool.connection() as conn:
+            self.assertIsNone(conn.isolation_level)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM t").fetchone()[0], 0)
+
+        stats = pool.get_stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["open"], 1)
+        self.assertEqual(stats["idle"], 1)
+
+    def test_nested_use_does_not_wait(self):
+        pool = ConnectionPool(self.test_dir / "test.db", PragmaProfile(name="test", max_connections=1))
+        with pool.connection() as outer:
+            with pool.connection() as inner:
+                self.assertIsNot(inner, outer)
+        stats = pool.get_stats()
+        self.assertEqual(stats["overflows"], 1)
+        self.assertEqual(stats["open"], 1)
+
+    def test_bounded_pool_waits_for_release(self):
+        pool = ConnectionPool(self.test_dir / "test.db", PragmaProfile(name="test", max_connections=1))
+        acquired = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with pool.connection():
+                acquired.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        acquired.wait(5)
+        threading.Timer(0.1, release.set).start()
+        with pool.connection():
+            pass
+        thread.join()
+
+        stats = pool.get_stats()
+        self.assertEqual(stats["waits"], 1)
+        self.assertGreater(stats["wait_seconds"], 0)
+        self.assertEqual(stats["overflows"], 0)
+        self.assertEqual(stats["open"], 1)
+
+    def test_shared_pool_by_path(self):
+        db_path = self.test_dir / "sessions.db"
+        with sqlite_utils.get_connection(db_path) as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+        self.assertIs(sqlite_utils.get_pool(db_path), sqlite_utils.get_pool(db_path))
+        databases = [stats["database"] for stats in sqlite_utils.get_pool_stats()]
+        self.assertIn(str(db_path), databases)
+
+    def test_get_connection_timeout_and_retries(self):
+        db_path = self.test_dir / "test.db"
+        with sqlite_utils.get_connection(db_path, timeout=2.5) as conn:
+            self.assertEqual(conn.execute("PRAGMA busy_timeout").fetchone()[0], 2500)
+        with sqlite_utils.get_connection(db_path) as conn:
+            self.assertEqual(conn.execute("PRAGMA busy_timeout").fetchone()[0], 30000)
+
+        # Journal mode is already set, so only opening the pooled connection fails
+        sqlite_utils.close_all_pools()
+        attempts = []
+
+        def failing_connect(*args, **kwargs):
+            attempts.append(1)
+            raise sqlite3.OperationalError("unable to open database file")
+
+        with patch.object(sqlite_utils.sqlite3, "connect", failing_connect):
+            with self.assertRaises(sqlite3.OperationalError):
+                with sqlite_utils.get_connection(db_path, retry_count=2, retry_delay=0):
+                    pass
+        self.assertEqual(len(attempts), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+"""
+Unit tests for the SSE fan-out brokers.
+
+Tests:
+- Forwarding messages between services with socket brokers
+- Batched delivery to clients of several processes
+- Delivery reports for clients no process holds
+- Removal of sockets of exited processes
+- Splitting of messages for many clients
+
+@testCovers fastapi_app/lib/sse/sse_broker.py
+"""
+
+import shutil
+import socket
+import tempfile
+import unittest
+import unittest.mock
+from pathlib import Path
+
+from fastapi_app.lib.sse import sse_broker
+from fastapi_app.lib.sse.sse_broker import LocalSSEBroker, SocketSSEBroker, create_sse_broker
+from fastapi_app.lib.sse.sse_service import SSEService
+
+
+class TestSocketSSEBroker(unittest.TestCase):
+    """Test message forwarding between SSE services."""
+
+    def setUp(self):
+        """Create two services ("workers") sharing a socket directory."""
+        # Short path: Unix socket paths are limited to ~100 characters
+        self.socket_dir = Path(tempfile.mkdtemp(prefix="sse-"))
+        self.worker1 = SSEService(broker=SocketSSEBroker(self.socket_dir, name="w1"))
+        self.worker2 = SSEService(broker=SocketSSEBroker(self.socket_dir, name="w2"))
+
+    def tearDown(self):
+        """Stop the brokers and remove the socket directory."""
+        self.worker1.close()
+        self.worker2.close()
+        shutil.rmtree(self.socket_dir)
+
+    def test_message_reaches_client_of_other_worker(self):
+        """Test that a message for a client of another worker is forwarded."""
+        msg_queue = self.worker2.create_queue('client')
+
+        self.assertTrue(self.worker1.send_message('client', 'syncProgress', '42'))
+
+        message = msg_queue.get(timeout=2)
+        self.assertEqual(message, {'event': 'syncProgress', 'data': '42'})
+
+    def test_send_messages_to_clients_of_all_workers(self):
+        """Test that a broadcast reaches local and forwarded clients once each."""
+        local_queue = self.worker1.create_queue('local')
+        remote_queues = [self.worker2.create_queue(f'remote{i}') for i in range(3)]
+
+        queued = self.worker1.send_messages(
+            ['local', 'remote0', 'remote1', 'remote2', 'gone'], 'notice', 'hello'
+        )
+
+        self.assertEqual(queued, 1)
+        self.assertEqual(local_queue.get_nowait()['data'], 'hello')
+        for msg_queue in remote_queues:
+            self.assertEqual(msg_queue.get(timeout=2)['data'], 'hello')
+            self.assertTrue(msg_queue.empty())
+        # A single datagram carried the message for all remote clients
+        self.assertEqual(self.worker1.broker.get_stats()['sent'], 1)
+
+    def test_unknown_client_is_not_forwarded(self):
+        """Test that messages for clients no worker holds are reported as undelivered."""
+        msg_queue = self.worker2.create_queue('client')
+
+        self.assertFalse(self.worker1.send_message('nobody', 'test', 'lost'))
+        self.assertTrue(self.worker1.send_message('client', 'test', 'delivered'))
+
+        self.assertEqual(msg_queue.get(timeout=2)['data'], 'delivered')
+        self.assertTrue(msg_queue.empty())
+        self.assertEqual(self.worker1.broker.get_stats()['sent'], 1)
+
+        self.worker2.remove_queue('client')
+        self.assertFalse(self.worker1.send_message('client', 'test', 'lost'))
+
+    def test_full_peer_buffer_defers_send(self):
+        """Test that datagrams a busy peer cannot take are sent by the sender thread in order."""
+        msg_queue = self.worker2.create_queue('client')
+        send_sock = unittest.mock.Mock()
+        send_sock.sendto.side_effect = BlockingIOError
+        with unittest.mock.patch.object(self.worker1.broker, '_send_sock', send_sock):
+            self.assertTrue(self.worker1.send_message('client', 'test', 'first'))
+        # Follows the queued datagram instead of overtaking it
+        self.assertTrue(self.worker1.send_message('client', 'test', 'second'))
+
+        self.assertEqual(msg_queue.get(timeout=2)['data'], 'first')
+        self.assertEqual(msg_queue.get(timeout=2)['data'], 'second')
+        stats = self.worker1.broker.get_stats()
+        self.assertEqual(stats['sent'], 2)
+        self.assertEqual(stats['dropped'], 0)
+
+    def test_stale_socket_is_removed(self):
+        """Test that the socket and clients of an exited worker are removed on send."""
+        stale_path = self.socket_dir / "dead.sock"
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(str(stale_path))
+        sock.close()  # The file remains, but nobody listens
+        dead = SocketSSEBroker(self.socket_dir, name="dead")
+        dead.subscribe('client')
+
+        self.assertFalse(self.worker1.send_message('client', 'test', 'data'))
+
+        self.assertFalse(stale_path.exists())
+        self.assertEqual(list(self.socket_dir.glob("clients/*@dead")), [])
+
+    def test_large_broadcast_is_split(self):
+        """Test that messages for many clients are split into several datagrams."""
+        original = sse_broker.MAX_DATAGRAM_SIZE
+        sse_broker.MAX_DATAGRAM_SIZE = 1024
+        try:
+            client_ids = [f'client-{i:04d}' for i in range(200)]
+            queues = [self.worker2.create_queue(client_id) for client_id in client_ids]
+
+            self.worker1.send_messages(client_ids, 'test', 'data')
+
+            for msg_queue in queues:
+                self.assertEqual(msg_queue.get(timeout=2)['data'], 'data')
+            self.assertGreater(self.worker1.broker.get_stats()['sent'], 1)
+        finally:
+            sse_broker.MAX_DATAGRAM_SIZE = original
+
+
+class TestCreateSSEBroker(unittest.TestCase):
+    """Test broker selection."""
+
+    def test_default_is_local(self):
+        """Test that the local broker is used unless configured otherwise."""
+        with unittest.mock.patch.dict('os.environ', {}, clear=False) as env:
+            env.pop('SSE_BROKER', None)
+            self.assertIsInstance(create_sse_broker(), LocalSSEBroker)
+
+    def test_socket_broker(self):
+        """Test selecting the socket broker with an explicit directory."""
+        with unittest.mock.patch.dict('os.environ', {'SSE_BROKER': 'socket', 'SSE_BROKER_DIR': '/tmp/sse-x'}):
+            broker = create_sse_broker()
+        self.assertIsInstance(broker, SocketSSEBroker)
+        self.assertEqual(broker.socket_dir, Path('/tmp/sse-x'))
+
+    def test_local_service_reports_undeliverable_messages(self):
+        """Test that without forwarding, messages for unknown clients fail."""
+        service = SSEService()
+        self.assertFalse(service.send_message('unknown', 'test', 'data'))
+
+
+if __name__ == '__main__':
+    unittest.main()
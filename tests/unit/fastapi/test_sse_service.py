@@ -6,18 +6,18 @@ Tests:
 - Message sending
 - Event stream generation
 - SSE message formatting
-- Queue cleanup
 - Thread safety
 - Keep-alive pings
 
 @testCovers fastapi_app/lib/sse/sse_service.py
 """
 
+import asyncio
 import unittest
 import queue
+import threading
 import time
 from unittest.mock import Mock
-from datetime import datetime, timedelta
 
 from fastapi_app.lib.sse.sse_service import SSEService
 
@@ -33,10 +33,7 @@ class TestSSEService(unittest.TestCase):
     def test_initialization(self):
         """Test service initialization."""
         self.assertIsNotNone(self.service.message_queues)
-        self.assertIsNotNone(self.service.queue_timestamps)
         self.assertIsNotNone(self.service.lock)
-        self.assertEqual(self.service.queue_timeout, 0.5)
-        self.assertIsInstance(self.service.max_queue_age, timedelta)
 
     def test_create_queue(self):
         """Test creating message queue for a client."""
@@ -48,7 +45,6 @@ class TestSSEService(unittest.TestCase):
         # Verify queue was created
         self.assertIsInstance(msg_queue, queue.Queue)
         self.assertIn(client_id, self.service.message_queues)
-        self.assertIn(client_id, self.service.queue_timestamps)
 
         # Verify logger was called
         self.logger.debug.assert_called()
@@ -67,7 +63,6 @@ class TestSSEService(unittest.TestCase):
 
         # Verify queue was removed
         self.assertNotIn(client_id, self.service.message_queues)
-        self.assertNotIn(client_id, self.service.queue_timestamps)
 
         # Removing non-existent queue should not error
         self.service.remove_queue('nonexistent_client')
@@ -145,78 +140,6 @@ class TestSSEService(unittest.TestCase):
         expected = 'event: update\ndata: {"status": "complete", "count": 42}\n\n'
         self.assertEqual(formatted, expected)
 
-    def test_event_stream_generator(self):
-        """Test event stream generation."""
-        client_id = 'test_client_123'
-
-        # Create generator
-        stream = self.service.event_stream(client_id)
-
-        # First message should be connection confirmation
-        first_msg = next(stream)
-        self.assertIn('event: connected', first_msg)
-        self.assertIn('data: Stream connected', first_msg)
-
-        # Send some messages
-        self.service.send_message(client_id, 'testEvent', 'test data')
-        self.service.send_message(client_id, 'progress', '50')
-
-        # Get messages from stream
-        msg1 = next(stream)
-        self.assertIn('event: testEvent', msg1)
-        self.assertIn('data: test data', msg1)
-
-        msg2 = next(stream)
-        self.assertIn('event: progress', msg2)
-        self.assertIn('data: 50', msg2)
-
-    def test_event_stream_keep_alive(self):
-        """Test that stream sends keep-alive pings when no messages."""
-        client_id = 'test_client_123'
-
-        # Set a very short timeout for testing
-        self.service.queue_timeout = 0.1
-
-        # Create generator
-        stream = self.service.event_stream(client_id)
-
-        # Skip connection message
-        next(stream)
-
-        # Wait for keep-alive (should timeout and send ping)
-        start_time = time.time()
-        ping_msg = next(stream)
-        elapsed = time.time() - start_time
-
-        # Should be a ping event with keepalive data
-        self.assertEqual(ping_msg, 'event: ping\ndata: keepalive\n\n')
-
-        # Should have waited approximately queue_timeout
-        self.assertGreater(elapsed, 0.05)
-        self.assertLess(elapsed, 0.5)
-
-    def test_event_stream_cleanup(self):
-        """Test that stream cleans up queue when closed."""
-        client_id = 'test_client_123'
-
-        # Create generator
-        stream = self.service.event_stream(client_id)
-
-        # Start stream
-        next(stream)
-
-        # Verify queue exists
-        self.assertIn(client_id, self.service.message_queues)
-
-        # Close stream
-        try:
-            stream.close()
-        except StopIteration:
-            pass
-
-        # Verify queue was removed
-        self.assertNotIn(client_id, self.service.message_queues)
-
     def test_get_active_clients(self):
         """Test getting list of active clients."""
         # Initially empty
@@ -243,40 +166,6 @@ class TestSSEService(unittest.TestCase):
         self.assertEqual(len(clients), 2)
         self.assertNotIn('client2', clients)
 
-    def test_cleanup_stale_queues(self):
-        """Test cleanup of stale queues."""
-        # Create some queues
-        self.service.create_queue('client1')
-        self.service.create_queue('client2')
-        self.service.create_queue('client3')
-
-        # Make client1 and client2 stale
-        old_time = datetime.now() - timedelta(hours=2)
-        self.service.queue_timestamps['client1'] = old_time
-        self.service.queue_timestamps['client2'] = old_time
-
-        # Run cleanup
-        removed_count = self.service.cleanup_stale_queues()
-
-        # Verify stale queues were removed
-        self.assertEqual(removed_count, 2)
-        self.assertNotIn('client1', self.service.message_queues)
-        self.assertNotIn('client2', self.service.message_queues)
-        self.assertIn('client3', self.service.message_queues)
-
-    def test_cleanup_no_stale_queues(self):
-        """Test cleanup when no queues are stale."""
-        # Create some queues
-        self.service.create_queue('client1')
-        self.service.create_queue('client2')
-
-        # Run cleanup
-        removed_count = self.service.cleanup_stale_queues()
-
-        # No queues should be removed
-        self.assertEqual(removed_count, 0)
-        self.assertEqual(len(self.service.message_queues), 2)
-
     def test_thread_safety(self):
         """Test that operations are thread-safe."""
         import threading
@@ -362,6 +251,103 @@ class TestSSEService(unittest.TestCase):
             msg = msg_queue.get_nowait()
             self.assertEqual(msg['data'], str(i))
 
+    def test_full_queue_drops_oldest_message(self):
+        """Test that a full queue drops the oldest message and counts it."""
+        service = SSEService(self.logger, max_queue_size=3)
+        service.create_queue('client')
+
+        for i in range(5):
+            self.assertTrue(service.send_message('client', 'test', str(i)))
+
+        msg_queue = service.message_queues['client']
+        self.assertEqual([msg_queue.get_nowait()['data'] for _ in range(3)], ['2', '3', '4'])
+        self.assertEqual(service.get_stats()['dropped'], {'client': 2})
+
+        service.remove_queue('client')
+        self.assertEqual(service.get_stats()['dropped'], {})
+
+    def test_send_messages(self):
+        """Test sending one message to several clients."""
+        self.service.create_queue('client1')
+        self.service.create_queue('client2')
+
+        queued = self.service.send_messages(['client1', 'client2', 'unknown'], 'event', 'data')
+
+        self.assertEqual(queued, 2)
+        self.assertEqual(self.service.message_queues['client1'].get_nowait()['data'], 'data')
+        self.assertEqual(self.service.message_queues['client2'].get_nowait()['data'], 'data')
+
+    def test_async_event_stream_delivers_messages_from_threads(self):
+        """Test that the async stream wakes up for messages sent from other threads."""
+        async def run():
+            stream = self.service.async_event_stream('client')
+            self.assertIn('event: connected', await stream.__anext__())
+
+            next_message = asyncio.ensure_future(stream.__anext__())
+            await asyncio.sleep(0.05)
+            self.assertFalse(next_message.done())
+
+            thread = threading.Thread(
+                target=self.service.send_message, args=('client', 'syncProgress', '42')
+            )
+            thread.start()
+            thread.join()
+
+            message = await asyncio.wait_for(next_message, timeout=1)
+            await stream.aclose()
+            return message
+
+        message = asyncio.run(run())
+        self.assertEqual(message, 'event: syncProgress\ndata: 42\n\n')
+        self.assertNotIn('client', self.service.message_queues)
+        self.assertEqual(self.service.active_streams, 0)
+
+    def test_async_event_stream_keep_alive(self):
+        """Test that the async stream pings only after the keep-alive interval."""
+        self.service.keepalive_interval = 0.1
+
+        async def run():
+            stream = self.service.async_event_stream('client')
+            await stream.__anext__()
+            start = time.time()
+            ping = await stream.__anext__()
+            elapsed = time.time() - start
+            await stream.aclose()
+            return ping, elapsed
+
+        ping, elapsed = asyncio.run(run())
+        self.assertEqual(ping, 'event: ping\ndata: keepalive\n\n')
+        self.assertGreaterEqual(elapsed, 0.09)
+
+    def test_async_event_stream_keeps_pending_messages(self):
+        """Test that messages queued before the stream started are delivered."""
+        self.service.create_queue('client')
+        self.service.send_message('client', 'early', 'data')
+
+        async def run():
+            stream = self.service.async_event_stream('client')
+            await stream.__anext__()
+            message = await stream.__anext__()
+            await stream.aclose()
+            return message
+
+        self.assertEqual(asyncio.run(run()), 'event: early\ndata: data\n\n')
+
+    def test_stream_capacity(self):
+        """Test the limit for concurrent async streams."""
+        self.service.max_streams = 1
+
+        async def run():
+            stream = self.service.async_event_stream('client')
+            await stream.__anext__()
+            during = self.service.has_stream_capacity()
+            await stream.aclose()
+            return during
+
+        self.assertTrue(self.service.has_stream_capacity())
+        self.assertFalse(asyncio.run(run()))
+        self.assertTrue(self.service.has_stream_capacity())
+
 
 if __name__ == '__main__':
     unittest.main()
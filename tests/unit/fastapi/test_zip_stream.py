@@ -0,0 +1,95 @@
+"""
+Unit tests for the streaming ZIP writer.
+
+Tests:
+- Streamed archives are valid and contain all entries
+- Chunks are bounded and produced while entries are written
+- Already compressed files are stored, others deflated
+- Lazy entry sources
+
+@testCovers fastapi_app/lib/storage/zip_stream.py
+"""
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from fastapi_app.lib.storage.zip_stream import ZipEntry, stream_zip
+
+
+class TestStreamZip(unittest.TestCase):
+    """Test streaming ZIP archives."""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_archive_contents(self):
+        """Files, bytes and text entries end up in a valid archive."""
+        path = self.test_dir / "doc.tei.xml"
+        path.write_bytes(b"<TEI/>" * 1000)
+
+        data = b"".join(stream_zip([
+            ZipEntry("tei/doc.tei.xml", path),
+            ZipEntry("raw.bin", b"\x00\x01"),
+            ZipEntry("notes.txt", "Grüße"),
+        ]))
+
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(zf.read("tei/doc.tei.xml"), b"<TEI/>" * 1000)
+            self.assertEqual(zf.read("raw.bin"), b"\x00\x01")
+            self.assertEqual(zf.read("notes.txt").decode("utf-8"), "Grüße")
+
+    def test_chunks_are_bounded(self):
+        """Large files are streamed in chunks instead of being buffered."""
+        path = self.test_dir / "large.pdf"
+        path.write_bytes(os.urandom(300_000))
+
+        chunks = list(stream_zip([ZipEntry("large.pdf", path)], chunk_size=64 * 1024))
+
+        self.assertGreater(len(chunks), 4)
+        self.assertTrue(all(len(chunk) < 3 * 64 * 1024 for chunk in chunks))
+        with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as zf:
+            self.assertEqual(zf.read("large.pdf"), path.read_bytes())
+
+    def test_compression_by_extension(self):
+        """PDFs are stored; other files are deflated unless stated otherwise."""
+        data = b"".join(stream_zip([
+            ZipEntry("doc.pdf", b"%PDF-1.4"),
+            ZipEntry("doc.xml", b"<TEI/>"),
+            ZipEntry("forced.xml", b"<TEI/>", compress=False),
+        ]))
+
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            types = {info.filename: info.compress_type for info in zf.infolist()}
+        self.assertEqual(types["doc.pdf"], zipfile.ZIP_STORED)
+        self.assertEqual(types["doc.xml"], zipfile.ZIP_DEFLATED)
+        self.assertEqual(types["forced.xml"], zipfile.ZIP_STORED)
+
+    def test_lazy_sources(self):
+        """Callable sources are called when their entry is written; None skips the entry."""
+        calls = []
+
+        def source(name):
+            calls.append(name)
+            return name.encode() if name != "skipped" else None
+
+        stream = stream_zip(
+            ZipEntry(name, lambda name=name: source(name)) for name in ["a", "skipped", "b"]
+        )
+        self.assertEqual(calls, [])
+
+        with zipfile.ZipFile(io.BytesIO(b"".join(stream))) as zf:
+            self.assertEqual(zf.namelist(), ["a", "b"])
+        self.assertEqual(calls, ["a", "skipped", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()